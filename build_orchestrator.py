@@ -0,0 +1,417 @@
+#!/usr/bin/env python3
+"""
+Parallel multi-variant firmware builder with a content-addressed artifact store.
+
+Builds the N8, N16 and N32 PlatformIO environments concurrently. Each
+environment gets its own build root (.pio/parallel/<env>) so the parallel
+`pio run` processes never share project.checksum or object files. Library
+and package installs are done one environment at a time first, so the
+parallel stage only compiles.
+
+Artifacts (firmware.bin, bootloader.bin, partitions.bin, firmware.elf and
+firmware.map, the linker map read by firmware_size.py) are stored by SHA-256
+under firmware/store/objects/, and every build is recorded in
+firmware/store/manifest.json with its size, partition table and OTA slot
+usage, git revision and build time. Identical images are stored once, and
+rebuilding an unchanged image leaves the manifest untouched. A build whose
+image does not fit the OTA slot is recorded but not made the variant's latest.
+`--reproducible` pins __DATE__/__TIME__ to the commit time through
+SOURCE_DATE_EPOCH, so rebuilding the same commit gives the same image.
+
+Usage:
+  python3 build_orchestrator.py                    # build all variants in parallel
+  python3 build_orchestrator.py build N16 N32      # selected variants
+  python3 build_orchestrator.py build --reproducible --jobs 2
+  python3 build_orchestrator.py list               # builds in the manifest
+  python3 build_orchestrator.py lookup N16         # path of latest N16 firmware.bin
+  python3 build_orchestrator.py gc --keep 5        # drop old builds and unreferenced objects
+"""
+
+import argparse
+import concurrent.futures
+import configparser
+import datetime
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import time
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+STORE_DIR = os.path.join(PROJECT_DIR, 'firmware', 'store')
+PARALLEL_BUILD_DIR = os.path.join(PROJECT_DIR, '.pio', 'parallel')
+
+# Same variants as organize_firmware.sh: env, flash size, chip name
+VARIANTS = [
+    ('esp32-s3-wroom-1-n8', '8MB', 'N8'),
+    ('esp32-s3-wroom-1-n16', '16MB', 'N16'),
+    ('esp32-s3-wroom-1-n32r16v', '32MB', 'N32'),
+]
+ARTIFACTS = ['firmware.bin', 'bootloader.bin', 'partitions.bin', 'firmware.elf', 'firmware.map']
+
+
+def variant_info(name):
+    for env, flash, chip in VARIANTS:
+        if name in (env, chip, chip.lower()):
+            return env, flash, chip
+    raise SystemExit('Unknown variant: %s (use N8, N16, N32 or the env name)' % name)
+
+
+def env_option(env, key, default=None):
+    """Read an option for [env:<env>], falling back to the common [env] section."""
+    config = configparser.RawConfigParser(strict=False)
+    config.read(os.path.join(PROJECT_DIR, 'platformio.ini'))
+    section = 'env:%s' % env
+    if config.has_option(section, key):
+        return config.get(section, key).strip()
+    if config.has_option('env', key):
+        return config.get('env', key).strip()
+    return default
+
+
+def parse_partitions(csv_path):
+    """Parse an ESP-IDF partition CSV into a list of dicts (sizes in bytes)."""
+    partitions = []
+    with open(csv_path) as f:
+        for line in f:
+            line = line.split('#', 1)[0].strip()
+            if not line:
+                continue
+            fields = [x.strip() for x in line.split(',')]
+            if len(fields) < 5:
+                continue
+
+            def number(text):
+                text = text.upper()
+                if text.endswith('K'):
+                    return int(text[:-1], 0) * 1024
+                if text.endswith('M'):
+                    return int(text[:-1], 0) * 1024 * 1024
+                return int(text, 0) if text else 0
+
+            partitions.append({
+                'name': fields[0], 'type': fields[1], 'subtype': fields[2],
+                'offset': number(fields[3]), 'size': number(fields[4]),
+            })
+    return partitions
+
+
+def app_slot_size(partitions):
+    """Smallest app partition - every OTA slot must hold the image."""
+    apps = [p['size'] for p in partitions if p['type'] == 'app']
+    return min(apps) if apps else 0
+
+
+def firmware_version():
+    source = os.path.join(PROJECT_DIR, 'src', 'Main-Thermostat.cpp')
+    with open(source, encoding='utf-8', errors='replace') as f:
+        match = re.search(r'sw_version\s*=\s*"([^"]+)"', f.read())
+    return match.group(1) if match else 'unknown'
+
+
+def git(*args):
+    try:
+        return subprocess.run(['git'] + list(args), cwd=PROJECT_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def git_info():
+    rev = git('rev-parse', 'HEAD')
+    dirty = bool(git('status', '--porcelain', '--untracked-files=no'))
+    commit_time = git('log', '-1', '--format=%ct')
+    return {'rev': rev or 'unknown', 'dirty': dirty,
+            'commit_time': int(commit_time) if commit_time else None}
+
+
+def sha256_file(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load_manifest():
+    path = os.path.join(STORE_DIR, 'manifest.json')
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return {'builds': [], 'latest': {}}
+
+
+def save_manifest(manifest):
+    os.makedirs(STORE_DIR, exist_ok=True)
+    path = os.path.join(STORE_DIR, 'manifest.json')
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+        f.write('\n')
+    os.replace(tmp, path)
+
+
+def object_path(sha):
+    return os.path.join(STORE_DIR, 'objects', sha[:2], sha)
+
+
+def store_object(path):
+    """Copy a file into the store under its hash; returns (sha256, size, already_present)."""
+    sha = sha256_file(path)
+    dest = object_path(sha)
+    if os.path.exists(dest):
+        return sha, os.path.getsize(dest), True
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    tmp = dest + '.tmp'
+    shutil.copyfile(path, tmp)
+    os.replace(tmp, dest)
+    return sha, os.path.getsize(dest), False
+
+
+def pio_command():
+    for candidate in ('pio', 'platformio'):
+        if shutil.which(candidate):
+            return candidate
+    raise SystemExit('[BUILD] PlatformIO CLI (pio) not found in PATH')
+
+
+def install_dependencies(pio, envs):
+    """Serial package/library install so parallel builds never race on downloads."""
+    for env in envs:
+        print('[BUILD] Installing packages for %s...' % env, flush=True)
+        result = subprocess.run([pio, 'pkg', 'install', '-e', env], cwd=PROJECT_DIR,
+                                capture_output=True, text=True)
+        if result.returncode != 0:
+            print(result.stdout[-2000:] + result.stderr[-2000:])
+            raise SystemExit('[BUILD] Package install failed for %s' % env)
+
+
+def generate_assets():
+    """Write include/WebAssets.h once up front; the pre-build runs in the parallel builds then find it current."""
+    result = subprocess.run([sys.executable, os.path.join(PROJECT_DIR, 'web_assets.py')], cwd=PROJECT_DIR,
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        print(result.stdout[-2000:] + result.stderr[-2000:])
+        raise SystemExit('[BUILD] web_assets.py failed')
+    print('[BUILD] %s' % (result.stdout.strip().splitlines() or [''])[-1], flush=True)
+
+
+def build_env(pio, env, clean, jobs, source_date_epoch):
+    """Run one `pio run` in its own build root; returns (env, ok, seconds, log_path)."""
+    build_root = os.path.join(PARALLEL_BUILD_DIR, env)
+    os.makedirs(build_root, exist_ok=True)
+    log_path = os.path.join(PARALLEL_BUILD_DIR, env + '.log')
+    child_env = dict(os.environ, PLATFORMIO_BUILD_DIR=build_root)
+    if source_date_epoch is not None:
+        child_env['SOURCE_DATE_EPOCH'] = str(source_date_epoch)
+
+    start = time.monotonic()
+    with open(log_path, 'w') as log:
+        if clean:
+            subprocess.run([pio, 'run', '-e', env, '-t', 'clean'], cwd=PROJECT_DIR,
+                           env=child_env, stdout=log, stderr=subprocess.STDOUT)
+        command = [pio, 'run', '-e', env]
+        if jobs:
+            command += ['-j', str(jobs)]
+        result = subprocess.run(command, cwd=PROJECT_DIR, env=child_env,
+                                stdout=log, stderr=subprocess.STDOUT)
+    return env, result.returncode == 0, time.monotonic() - start, log_path
+
+
+def record_build(manifest, env, flash, chip, seconds, git_state, build_time):
+    artifact_dir = os.path.join(PARALLEL_BUILD_DIR, env, env)
+    files = {}
+    new_objects = 0
+    for name in ARTIFACTS:
+        path = os.path.join(artifact_dir, name)
+        if not os.path.exists(path):
+            continue
+        sha, size, existed = store_object(path)
+        files[name] = {'sha256': sha, 'size': size}
+        new_objects += 0 if existed else 1
+    if 'firmware.bin' not in files:
+        raise RuntimeError('%s produced no firmware.bin' % env)
+
+    partitions_csv = env_option(env, 'board_build.partitions', 'default.csv')
+    partitions = parse_partitions(os.path.join(PROJECT_DIR, partitions_csv))
+    slot = app_slot_size(partitions)
+    image_size = files['firmware.bin']['size']
+    build_id = files['firmware.bin']['sha256'][:12]
+
+    entry = {
+        'id': build_id,
+        'variant': chip,
+        'env': env,
+        'flash_size': flash,
+        'version': firmware_version(),
+        'git_rev': git_state['rev'],
+        'git_dirty': git_state['dirty'],
+        'build_time': build_time,
+        'build_seconds': round(seconds, 1),
+        'partition_table': {
+            'file': partitions_csv,
+            'app_slot_size': slot,
+            'partitions': partitions,
+        },
+        'image_size': image_size,
+        'slot_usage_pct': round(100.0 * image_size / slot, 1) if slot else None,
+        'fits_ota_slot': image_size <= slot if slot else None,
+        'files': files,
+    }
+
+    duplicate = any(b['id'] == build_id and b['variant'] == chip for b in manifest['builds'])
+    if not duplicate:
+        manifest['builds'].append(entry)
+    # An image that overflows the OTA slot is recorded but never becomes the one lookup hands out
+    if entry['fits_ota_slot'] is not False:
+        manifest['latest'][chip] = build_id
+    return entry, duplicate, new_objects
+
+
+def cmd_build(args):
+    pio = pio_command()
+    selected = [variant_info(v) for v in args.variants] if args.variants else VARIANTS
+    envs = [env for env, _, _ in selected]
+    git_state = git_info()
+
+    source_date_epoch = None
+    if args.reproducible:
+        if git_state['dirty']:
+            print('[BUILD] Warning: working tree is dirty - build will not match the commit')
+        source_date_epoch = git_state['commit_time']
+
+    if not args.skip_install:
+        install_dependencies(pio, envs)
+    generate_assets()
+
+    print('[BUILD] Building %s in parallel (git %s%s)' % (
+        ', '.join(chip for _, _, chip in selected), git_state['rev'][:10],
+        '-dirty' if git_state['dirty'] else ''), flush=True)
+    start = time.monotonic()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(envs)) as pool:
+        futures = [pool.submit(build_env, pio, env, args.clean, args.jobs, source_date_epoch)
+                   for env in envs]
+        results = {}
+        for future in concurrent.futures.as_completed(futures):
+            env, ok, seconds, log_path = future.result()
+            results[env] = (ok, seconds, log_path)
+            print('[BUILD] %s %s in %.1fs (log: %s)' % (
+                env, 'succeeded' if ok else 'FAILED', seconds, os.path.relpath(log_path)), flush=True)
+    wall = time.monotonic() - start
+
+    manifest = load_manifest()
+    build_time = datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds')
+    failed = False
+    print()
+    print('%-5s %-12s %10s %7s %-6s %s' % ('CHIP', 'ID', 'SIZE', 'SLOT%', 'STORE', 'PARTITIONS'))
+    for env, flash, chip in selected:
+        ok, seconds, log_path = results[env]
+        if not ok:
+            failed = True
+            with open(log_path) as f:
+                tail = f.readlines()[-20:]
+            print('[BUILD] %s failed, last lines:\n%s' % (env, ''.join(tail)))
+            continue
+        entry, duplicate, new_objects = record_build(manifest, env, flash, chip, seconds,
+                                                     git_state, build_time)
+        print('%-5s %-12s %10d %6.1f%% %-6s %s' % (
+            chip, entry['id'], entry['image_size'], entry['slot_usage_pct'] or 0,
+            'dedup' if duplicate else 'new', entry['partition_table']['file']))
+        if entry['fits_ota_slot'] is False:
+            failed = True
+            print('[BUILD] ERROR: %s image does not fit the %d byte OTA slot' % (
+                chip, entry['partition_table']['app_slot_size']))
+    save_manifest(manifest)
+    serial = sum(results[env][1] for env in envs)
+    print('\n[BUILD] Wall time %.1fs (sum of builds %.1fs)' % (wall, serial))
+    return 1 if failed else 0
+
+
+def latest_entry(manifest, chip):
+    build_id = manifest['latest'].get(chip)
+    for entry in reversed(manifest['builds']):
+        if entry['id'] == build_id and entry['variant'] == chip:
+            return entry
+    return None
+
+
+def cmd_lookup(args):
+    _, _, chip = variant_info(args.variant)
+    manifest = load_manifest()
+    entry = latest_entry(manifest, chip)
+    if entry is None or args.file not in entry['files']:
+        print('No %s build with %s in %s' % (chip, args.file, STORE_DIR), file=sys.stderr)
+        return 1
+    print(object_path(entry['files'][args.file]['sha256']))
+    return 0
+
+
+def cmd_list(args):
+    manifest = load_manifest()
+    print('%-5s %-12s %-8s %-12s %10s %7s %s' % ('CHIP', 'ID', 'VERSION', 'GIT', 'SIZE', 'SLOT%', 'BUILT'))
+    for entry in manifest['builds']:
+        latest = '*' if manifest['latest'].get(entry['variant']) == entry['id'] else ' '
+        print('%-5s %-12s %-8s %-12s %10d %6.1f%% %s %s' % (
+            entry['variant'], entry['id'], entry['version'],
+            entry['git_rev'][:10] + ('+' if entry['git_dirty'] else ''),
+            entry['image_size'], entry['slot_usage_pct'] or 0, entry['build_time'], latest))
+    return 0
+
+
+def cmd_gc(args):
+    manifest = load_manifest()
+    kept = []
+    for _, _, chip in VARIANTS:
+        builds = [b for b in manifest['builds'] if b['variant'] == chip]
+        latest = manifest['latest'].get(chip)
+        recent = builds[-args.keep:]
+        kept += [b for b in builds if b in recent or b['id'] == latest]
+    manifest['builds'] = [b for b in manifest['builds'] if b in kept]
+
+    referenced = {f['sha256'] for b in manifest['builds'] for f in b['files'].values()}
+    removed = 0
+    objects_dir = os.path.join(STORE_DIR, 'objects')
+    for root, _, names in os.walk(objects_dir):
+        for name in names:
+            if name not in referenced:
+                os.remove(os.path.join(root, name))
+                removed += 1
+    save_manifest(manifest)
+    print('[BUILD] Kept %d builds, removed %d unreferenced objects' % (len(manifest['builds']), removed))
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Parallel firmware builds with a content-addressed store')
+    sub = parser.add_subparsers(dest='command')
+
+    build = sub.add_parser('build', help='Build variants in parallel (default)')
+    build.add_argument('variants', nargs='*', help='N8, N16, N32 (default: all)')
+    build.add_argument('--clean', action='store_true', help='Clean each environment first')
+    build.add_argument('--jobs', '-j', type=int, help='Compiler jobs per environment')
+    build.add_argument('--skip-install', action='store_true', help='Skip the serial package install step')
+    build.add_argument('--reproducible', action='store_true',
+                       help='Set SOURCE_DATE_EPOCH to the commit time so identical sources give identical images')
+
+    lookup = sub.add_parser('lookup', help='Print the store path of the latest artifact for a variant')
+    lookup.add_argument('variant')
+    lookup.add_argument('--file', default='firmware.bin', choices=ARTIFACTS)
+
+    sub.add_parser('list', help='List builds in the manifest')
+
+    gc = sub.add_parser('gc', help='Remove old builds and unreferenced objects')
+    gc.add_argument('--keep', type=int, default=5, help='Builds to keep per variant')
+
+    args = parser.parse_args()
+    if args.command is None:
+        args = parser.parse_args(['build'] + sys.argv[1:])
+
+    handlers = {'build': cmd_build, 'lookup': cmd_lookup, 'list': cmd_list, 'gc': cmd_gc}
+    return handlers[args.command](args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,150 @@
+"""
+ESP32-S3 Smart Thermostat - export stage shared by the FreeCAD case scripts
+
+Writes only the formats asked for, skips a format when the shape has not
+changed since it was last written, and serializes STEP and STL in parallel
+worker processes from a BREP of the shape while the document is saved.
+
+Formats come from --export=step,stl,fcstd on the command line or the
+CASE_EXPORT environment variable (default: all three). --force or
+CASE_EXPORT_FORCE=1 rewrites files even when unchanged. The hashes of what
+was written live in freecad_outputs/.export_hashes.json.
+
+Usage (from the case scripts):
+  CASE_EXPORT=stl freecadcmd case/freecad_front_case.py
+  CASE_EXPORT=step,stl CASE_EXPORT_FORCE=1 freecadcmd case/freecad_back_case.py
+"""
+
+import hashlib
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import FreeCAD as App
+import Part
+
+FORMATS = ("step", "stl", "fcstd")
+EXTENSIONS = {"step": ".step", "stl": ".stl", "fcstd": ".FCStd"}
+HASH_FILE = ".export_hashes.json"
+
+# Highest quality mesh for 3D printing, same as FreeCAD GUI export with premium settings
+STL_SETTINGS = {
+    "LinearDeflection": 0.005,      # 5 microns - very fine detail
+    "AngularDeflection": 0.174533,  # 10 degrees in radians - smooth curves
+    "Relative": False,
+}
+
+
+def options(argv=None, environ=None):
+    """(formats, force) from --export=/--force arguments or CASE_EXPORT/CASE_EXPORT_FORCE."""
+    argv = sys.argv if argv is None else argv
+    environ = os.environ if environ is None else environ
+    spec = environ.get("CASE_EXPORT", "")
+    force = environ.get("CASE_EXPORT_FORCE", "") not in ("", "0")
+    for arg in argv:
+        if arg.startswith("--export="):
+            spec = arg.split("=", 1)[1]
+        elif arg == "--force":
+            force = True
+    if not spec.strip() or spec.strip() == "all":
+        return list(FORMATS), force
+    formats = [f.strip().lower() for f in spec.split(",") if f.strip()]
+    unknown = [f for f in formats if f not in FORMATS]
+    if unknown:
+        App.Console.PrintWarning("Unknown export format(s) %s, expected %s\n" % (", ".join(unknown), ", ".join(FORMATS)))
+    return [f for f in FORMATS if f in formats], force
+
+
+def _write(fmt, brep_path, path):
+    """Worker: load the BREP and write one format. Returns an error message or None."""
+    try:
+        shape = Part.Shape()
+        shape.read(brep_path)
+        if fmt == "step":
+            shape.exportStep(path)
+        else:
+            import Mesh
+            import MeshPart
+            mesh = Mesh.Mesh()
+            mesh.addFacets(MeshPart.meshFromShape(Shape=shape, **STL_SETTINGS).Facets)
+            mesh.write(path)
+        return None
+    except Exception as ex:
+        return "%s export failed: %s" % (fmt.upper(), ex)
+
+
+def export(shell, doc, out_dir, base_name, check=None):
+    """Write the requested formats of shell (and doc) to out_dir/base_name.*; returns the paths written.
+
+    check is (wall, floor) for stl_check, run on a freshly written STL.
+    """
+    formats, force = options()
+    hash_path = os.path.join(out_dir, HASH_FILE)
+    try:
+        with open(hash_path) as f:
+            hashes = json.load(f)
+    except (OSError, ValueError):
+        hashes = {}
+
+    brep = shell.exportBrepToString()
+    version = ".".join(App.Version()[:3])
+    digests, todo = {}, []
+    for fmt in formats:
+        name = base_name + EXTENSIONS[fmt]
+        key = "%s|%s|%s" % (version, fmt, json.dumps(STL_SETTINGS, sort_keys=True) if fmt == "stl" else "")
+        digests[name] = hashlib.sha256((key + brep).encode()).hexdigest()
+        if not force and hashes.get(name) == digests[name] and os.path.exists(os.path.join(out_dir, name)):
+            App.Console.PrintMessage("Unchanged, skipped %s\n" % name)
+        else:
+            todo.append(fmt)
+    if not todo:
+        return []
+
+    written, errors = [], []
+    files = [f for f in todo if f != "fcstd"]
+    with tempfile.TemporaryDirectory() as tmp:
+        brep_path = os.path.join(tmp, base_name + ".brep")
+        with open(brep_path, "w") as f:
+            f.write(brep)
+        jobs = [(fmt, brep_path, os.path.join(out_dir, base_name + EXTENSIONS[fmt])) for fmt in files]
+        # Fork keeps FreeCAD loaded in the workers; elsewhere write one after another
+        pool = None
+        if jobs and len(jobs) + ("fcstd" in todo) > 1 and "fork" in multiprocessing.get_all_start_methods():
+            pool = ProcessPoolExecutor(len(jobs), mp_context=multiprocessing.get_context("fork"))
+        try:
+            pending = [(job, pool.submit(_write, *job)) for job in jobs] if pool else []
+            if "fcstd" in todo:
+                doc.saveAs(os.path.join(out_dir, base_name + EXTENSIONS["fcstd"]))
+                written.append(base_name + EXTENSIONS["fcstd"])
+            results = [(job, future.result()) for job, future in pending] if pool else \
+                [(job, _write(*job)) for job in jobs]
+        finally:
+            if pool:
+                pool.shutdown()
+    for (fmt, _, path), error in results:
+        if error:
+            errors.append(error)
+        else:
+            written.append(os.path.basename(path))
+
+    for error in errors:
+        App.Console.PrintWarning("%s\n" % error)
+    for name in written:
+        hashes[name] = digests[name]
+        App.Console.PrintMessage("Exported %s\n" % os.path.join(out_dir, name))
+    with open(hash_path, "w") as f:
+        json.dump(hashes, f, indent=2, sort_keys=True)
+
+    # Check the exported STL (watertight, normals, wall thickness, overhangs)
+    stl_name = base_name + EXTENSIONS["stl"]
+    if check and stl_name in written:
+        try:
+            import stl_check
+            stl_check.check_part(os.path.join(out_dir, stl_name), check[0], check[1],
+                                 App.Console.PrintMessage, App.Console.PrintWarning)
+        except ImportError as ex:
+            App.Console.PrintWarning("STL check skipped (%s)\n" % ex)
+    return [os.path.join(out_dir, name) for name in written]
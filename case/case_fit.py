@@ -0,0 +1,455 @@
+#!/usr/bin/env python3
+"""
+ESP32-S3 Smart Thermostat - assembled fit and PCB clearance check
+
+Puts the exported front and back shells together the way they assemble (back
+flipped over onto the front, wall tops meeting), adds the PCB from the KiCad
+board (Edge.Cuts outline, seated on the front standoffs) and a box per
+footprint courtyard for the components, then reports:
+  - mating parameters that differ between the two case scripts (the
+    "Must match front case" values: PCB size and holes, snap tabs, vents...)
+  - pcb_mount_holes / display_holes that are not on a KiCad mounting hole
+  - interference (one part's surface inside another) with its depth
+  - contact area and the smallest gap between facing surfaces for each
+    pair of parts, and the tightest components against the shells
+
+Surfaces are sampled about once per square millimetre; nearby triangles are
+found through a uniform-grid spatial index and the exact point-to-triangle
+distance is taken, so gaps between facing walls are exact and edges are good
+to the sampling. Gaps wider than --radius are not measured.
+
+Component heights are not in the board file: F side parts (towards the back
+case) get the back script's component_height, B side parts (towards the
+display face) get --bottom-height.
+
+Usage:
+  python3 case/case_fit.py
+  python3 case/case_fit.py --radius 5 --top-height 18
+  python3 case/case_fit.py --front other_front.stl --back other_back.stl --flip y
+"""
+
+import argparse
+import ast
+import math
+import os
+import re
+import sys
+import time
+
+import numpy as np
+
+import stl_check
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+OUTPUT_DIR = os.path.join(SCRIPT_DIR, "freecad_outputs")
+FRONT_SCRIPT = os.path.join(SCRIPT_DIR, "freecad_front_case.py")
+BACK_SCRIPT = os.path.join(SCRIPT_DIR, "freecad_back_case.py")
+FRONT_STL = os.path.join(OUTPUT_DIR, "front_case_display_freecad.stl")
+BACK_STL = os.path.join(OUTPUT_DIR, "back_case_wall_freecad.stl")
+BOARD = os.path.join(SCRIPT_DIR, "..", "pcb", "ESP32-DevKitC3-Simple-Thermostat-PCB.kicad_pcb")
+
+# Parameters both case scripts define that have to agree for the halves to mate
+MATING = (
+    "pcb_length", "pcb_width", "pcb_thickness", "pcb_clearance", "pcb_mount_holes",
+    "wall_thickness", "case_length", "case_width", "corner_r",
+    "snap_tab_width", "snap_tab_length", "snap_tab_height", "snap_tab_undercut", "snap_slot_clearance",
+    "vent_slot_count", "vent_slot_count_side", "vent_slot_length", "vent_slot_width", "vent_spacing",
+    "vent_corner_margin",
+)
+
+CONTACT = 0.05               # Surfaces closer than this are touching (mm)
+FACING = 0.5                 # Gaps count when both surfaces face each other this squarely (cosine)
+HOLE_TOL = 0.05              # Script hole positions must be this close to a KiCad hole (mm)
+CHUNK = 20000                # Sample points per distance batch
+JITTER = np.array([1.234e-4, 2.345e-4, 0.0])     # Keeps inside-test rays off mesh edges
+
+
+# ---------- Parameters ----------
+
+SAFE_NODES = (ast.Constant, ast.Name, ast.Load, ast.BinOp, ast.UnaryOp, ast.operator, ast.unaryop,
+              ast.List, ast.Tuple, ast.Dict)
+
+
+def read_parameters(path):
+    """Module-level assignments of a case script that are plain arithmetic on earlier ones."""
+    with open(path) as f:
+        tree = ast.parse(f.read(), path)
+    values = {}
+    for node in tree.body:
+        if not (isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name)):
+            continue
+        if not all(isinstance(n, SAFE_NODES) for n in ast.walk(node.value)):
+            continue
+        try:
+            values[node.targets[0].id] = eval(compile(ast.Expression(node.value), path, "eval"),
+                                              {"__builtins__": {}}, dict(values))
+        except (NameError, TypeError, ZeroDivisionError):
+            pass
+    return values
+
+
+def compare_parameters(front, back):
+    mismatches = []
+    for name in MATING:
+        if name in front and name in back and not np.allclose(np.asarray(front[name], float),
+                                                              np.asarray(back[name], float)):
+            mismatches.append("%s: front %r, back %r" % (name, front[name], back[name]))
+    return mismatches
+
+
+# ---------- Board ----------
+
+def read_board(path):
+    """Edge.Cuts bounding box, mounting holes and per-footprint courtyard boxes in board coordinates."""
+    with open(path) as f:
+        text = f.read()
+    outline = []
+    for item in re.finditer(r'\n\t\(gr_(?:rect|line|arc)\b(.*?)\n\t\)', text, re.S):
+        if '(layer "Edge.Cuts")' in item.group(1):
+            outline += [(float(x), float(y)) for x, y in
+                        re.findall(r'\((?:start|end|mid) ([-\d.]+) ([-\d.]+)\)', item.group(1))]
+    if not outline:
+        raise ValueError("%s has no Edge.Cuts outline" % path)
+
+    holes, parts = [], []
+    starts = [m.start() for m in re.finditer(r'\n\t\(footprint "', text)] + [len(text)]
+    for begin, end in zip(starts, starts[1:]):
+        block = text[begin:end]
+        name = re.search(r'\(footprint "([^"]+)"', block).group(1)
+        side = re.search(r'\(layer "([FB])\.Cu"\)', block).group(1)
+        at = [float(v) for v in re.search(r'\(at ([-\d. ]+)\)', block).group(1).split()]
+        x, y, angle = at[0], at[1], math.radians(at[2] if len(at) > 2 else 0.0)
+        ref = re.search(r'\(property "Reference" "([^"]*)"', block)
+        ref = ref.group(1) if ref else name
+        if "MountingHole" in name:
+            holes.append((ref, name, x, y))
+            continue
+        local = []
+        for item in re.split(r'\n\t\t\(fp_', block)[1:]:
+            if '(layer "%s.CrtYd")' % side not in item:
+                continue
+            pts = {k: (float(a), float(b)) for k, a, b in
+                   re.findall(r'\((start|end|mid|center) ([-\d.]+) ([-\d.]+)\)', item)}
+            local += [(float(a), float(b)) for a, b in re.findall(r'\(xy ([-\d.]+) ([-\d.]+)\)', item)]
+            if item.startswith("circle"):
+                r = math.dist(pts["center"], pts["end"])
+                local += [(pts["center"][0] + dx * r, pts["center"][1] + dy * r) for dx, dy in
+                          ((-1, -1), (1, 1))]
+            else:
+                local += [p for k, p in pts.items() if k != "center"]
+        if not local:
+            continue
+        lx, ly = np.array(local).T
+        bx = x + lx * math.cos(angle) + ly * math.sin(angle)     # KiCad angles turn counter-clockwise, y down
+        by = y - lx * math.sin(angle) + ly * math.cos(angle)
+        parts.append((ref, side, bx.min(), by.min(), bx.max(), by.max()))
+    xs, ys = zip(*outline)
+    return {"outline": (min(xs), min(ys), max(xs), max(ys)), "holes": holes, "parts": parts}
+
+
+def check_holes(board, params, names):
+    """Script hole lists (board-relative) against the KiCad mounting holes."""
+    x0, y0 = board["outline"][:2]
+    kicad = np.array([(x - x0, y - y0) for _, _, x, y in board["holes"]]).reshape(-1, 2)
+    problems, worst, count = [], 0.0, 0
+    for name in names:
+        for hx, hy in params.get(name, []):
+            offset = np.min(np.hypot(kicad[:, 0] - hx, kicad[:, 1] - hy)) if len(kicad) else np.inf
+            worst, count = max(worst, offset), count + 1
+            if offset > HOLE_TOL:
+                problems.append("%s (%.2f, %.2f) is %.2f mm from the nearest KiCad mounting hole"
+                                % (name, hx, hy, offset))
+    return problems, worst, count
+
+
+# ---------- Geometry ----------
+
+def box_mesh(lo, hi):
+    """Twelve outward-wound triangles of an axis-aligned box."""
+    c = np.array([[hi[0] if i & 1 else lo[0], hi[1] if i & 2 else lo[1], hi[2] if i & 4 else lo[2]]
+                  for i in range(8)])
+    quads = ((0, 2, 3, 1), (4, 5, 7, 6), (0, 1, 5, 4), (2, 6, 7, 3), (0, 4, 6, 2), (1, 3, 7, 5))
+    return np.array([c[[q[0], q[1], q[2]]] for q in quads] + [c[[q[0], q[2], q[3]]] for q in quads])
+
+
+class Body:
+    """A closed triangle mesh with surface samples; labels name groups of triangles (one per component)."""
+
+    def __init__(self, name, tri, labels=None, names=None):
+        cross = np.cross(tri[:, 1] - tri[:, 0], tri[:, 2] - tri[:, 0])
+        norm = np.linalg.norm(cross, axis=1)
+        keep = norm > 1e-12
+        self.name = name
+        self.tri = tri[keep]
+        self.unit = cross[keep] / norm[keep, None]
+        self.labels = (np.zeros(len(tri), np.int64) if labels is None else labels)[keep]
+        self.names = names or [name]
+        self.lo, self.hi = self.tri.reshape(-1, 3).min(axis=0), self.tri.reshape(-1, 3).max(axis=0)
+        owner, self.points, self.weight = stl_check.sample_points(self.tri, norm[keep] / 2.0,
+                                                                  np.random.default_rng(1))
+        self.normals = self.unit[owner]
+        self.point_labels = self.labels[owner]
+        self._grids = {}
+
+    def grid(self, radius):
+        if radius not in self._grids:
+            self._grids[radius] = GridIndex(self.tri.min(axis=1) - radius, self.tri.max(axis=1) + radius,
+                                            max(radius, 1.0))
+        return self._grids[radius]
+
+    def inside(self, points):
+        """Ray parity along +z: True where a point is inside this (closed) body."""
+        ray, _ = stl_check.ray_hits(self.tri, self.unit, points + JITTER, 2, 1.0)
+        return np.bincount(ray, minlength=len(points)) % 2 == 1
+
+
+class GridIndex:
+    """Boxes bucketed into uniform cells; query returns (point, box) pairs sharing a cell."""
+
+    def __init__(self, lo, hi, cell):
+        clo = np.floor(lo / cell).astype(np.int64)
+        chi = np.floor(hi / cell).astype(np.int64)
+        self.cell, self.origin = cell, clo.min(axis=0)
+        self.span = chi.max(axis=0) - self.origin + 1
+        n = chi - clo + 1
+        cells = n.prod(axis=1)
+        owner = np.repeat(np.arange(len(lo)), cells)
+        step = np.arange(cells.sum()) - np.repeat(np.cumsum(cells) - cells, cells)
+        plane = n[owner, 1] * n[owner, 2]
+        ix = clo[owner, 0] - self.origin[0] + step // plane
+        iy = clo[owner, 1] - self.origin[1] + step % plane // n[owner, 2]
+        iz = clo[owner, 2] - self.origin[2] + step % n[owner, 2]
+        keys = (ix * self.span[1] + iy) * self.span[2] + iz
+        order = np.argsort(keys, kind="stable")
+        self.keys, self.owner = keys[order], owner[order]
+
+    def query(self, points):
+        pc = np.floor(points / self.cell).astype(np.int64) - self.origin
+        inside = np.all((pc >= 0) & (pc < self.span), axis=1)
+        pkeys = np.where(inside, (pc[:, 0] * self.span[1] + pc[:, 1]) * self.span[2] + pc[:, 2], -1)
+        first = np.searchsorted(self.keys, pkeys, "left")
+        count = np.where(inside, np.searchsorted(self.keys, pkeys, "right") - first, 0)
+        point = np.repeat(np.arange(len(points)), count)
+        pos = np.repeat(first, count) + np.arange(count.sum()) - np.repeat(np.cumsum(count) - count, count)
+        return point, self.owner[pos]
+
+
+def closest_points(p, a, b, c):
+    """Closest point on each triangle (a, b, c) to p, all (n, 3); Ericson's Voronoi-region test."""
+    dot = lambda x, y: np.einsum("ij,ij->i", x, y)
+    ab, ac, ap, bp, cp = b - a, c - a, p - a, p - b, p - c
+    d1, d2, d3, d4, d5, d6 = dot(ab, ap), dot(ac, ap), dot(ab, bp), dot(ac, bp), dot(ab, cp), dot(ac, cp)
+    va, vb, vc = d3 * d6 - d5 * d4, d5 * d2 - d1 * d6, d1 * d4 - d3 * d2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        denom = 1.0 / (va + vb + vc)
+        result = a + ab * (vb * denom)[:, None] + ac * (vc * denom)[:, None]
+        regions = (
+            ((va <= 0) & (d4 - d3 >= 0) & (d5 - d6 >= 0),
+             lambda: b + (c - b) * ((d4 - d3) / ((d4 - d3) + (d5 - d6)))[:, None]),
+            ((d6 >= 0) & (d5 <= d6), lambda: c),
+            ((vb <= 0) & (d2 >= 0) & (d6 <= 0), lambda: a + ac * (d2 / (d2 - d6))[:, None]),
+            ((vc <= 0) & (d1 >= 0) & (d3 <= 0), lambda: a + ab * (d1 / (d1 - d3))[:, None]),
+            ((d3 >= 0) & (d4 <= d3), lambda: b),
+            ((d1 <= 0) & (d2 <= 0), lambda: a),
+        )
+        for mask, point in regions:      # Later regions take precedence, as in the sequential test
+            result[mask] = point()[mask]
+    return result
+
+
+def nearest(a, b, radius):
+    """For each sample of a: distance to b's surface (inf past radius), closest point and b triangle."""
+    n = len(a.points)
+    distance, closest, triangle = np.full(n, np.inf), np.zeros((n, 3)), np.full(n, -1)
+    near = np.nonzero(np.all((a.points > b.lo - radius) & (a.points < b.hi + radius), axis=1))[0]
+    grid = b.grid(radius)
+    for start in range(0, len(near), CHUNK):
+        rows = near[start:start + CHUNK]
+        point, tri = grid.query(a.points[rows])
+        if not len(point):
+            continue
+        p = a.points[rows][point]
+        q = closest_points(p, b.tri[tri, 0], b.tri[tri, 1], b.tri[tri, 2])
+        d = np.linalg.norm(q - p, axis=1)
+        order = np.lexsort((d, point))
+        first = order[np.r_[True, point[order][1:] != point[order][:-1]]]
+        hit = rows[point[first]]
+        keep = d[first] <= radius
+        distance[hit[keep]], closest[hit[keep]], triangle[hit[keep]] = d[first][keep], q[first][keep], tri[first][keep]
+    return distance, closest, triangle
+
+
+def compare(a, b, radius):
+    """Interference, contact and facing clearance between two bodies, per label of a."""
+    result = {"a": a, "b": b, "interference": [], "contact": 0.0, "gap": None}
+    for x, y, flipped in ((a, b, False), (b, a, True)):
+        distance, closest, triangle = nearest(x, y, radius)
+        inbox = np.all((x.points > y.lo) & (x.points < y.hi), axis=1)
+        inside = np.zeros(len(x.points), bool)
+        inside[inbox] = y.inside(x.points[inbox])
+        deep = inside & (distance > CONTACT)
+        if deep.any():
+            labels = x.point_labels[deep] if not flipped else y.labels[np.maximum(triangle[deep], 0)]
+            result["interference"].append({
+                "area": float(x.weight[deep].sum()), "depth": float(distance[deep].max()),
+                "lo": x.points[deep].min(axis=0), "hi": x.points[deep].max(axis=0),
+                "labels": sorted(set(labels.tolist())) if not flipped else sorted(set(x.point_labels[deep].tolist())),
+                "of": x.name})
+        if not flipped:
+            result["contact"] = float(x.weight[distance <= CONTACT].sum())
+            result["distance"] = np.where(inside & (distance > CONTACT), 0.0, distance)
+        ok = np.isfinite(distance) & ~inside & (distance > CONTACT)
+        vec = closest[ok] - x.points[ok]
+        facing = (np.einsum("ij,ij->i", vec, x.normals[ok]) > FACING * distance[ok]) & \
+                 (np.einsum("ij,ij->i", -vec, y.unit[triangle[ok]]) > FACING * distance[ok])
+        if facing.any():
+            i = np.argmin(np.where(facing, distance[ok], np.inf))
+            where = (x.points[ok][i] + closest[ok][i]) / 2.0
+            if result["gap"] is None or distance[ok][i] < result["gap"][0]:
+                result["gap"] = (float(distance[ok][i]), where)
+    return result
+
+
+# ---------- Assembly ----------
+
+def assemble(front, back, board, front_stl, back_stl, flip, top_height, bottom_height):
+    """Front as exported; back turned over onto it; PCB and component boxes on the front standoffs."""
+    front_tri, _ = stl_check.load_stl(front_stl)
+    back_tri, _ = stl_check.load_stl(back_stl)
+    seam = front["case_height"]
+    turned = back_tri.copy()
+    if flip == "x":      # Half turn about an X axis: y mirrors about the case centre line, z turns over
+        turned[..., 1] = front["case_width"] - back_tri[..., 1]
+    else:
+        turned[..., 0] = -front["case_length"] - back_tri[..., 0]
+    turned[..., 2] = seam + back["case_height"] - back_tri[..., 2]
+
+    # Board coordinates to case coordinates: the scripts place the PCB at wall + clearance from the
+    # origin before mirroring X, with KiCad's downward y used as-is
+    x0, y0, x1, y1 = board["outline"]
+    inset = front["wall_thickness"] + front["pcb_clearance"]
+    to_case_x = lambda bx: -(inset + bx - x0)
+    to_case_y = lambda by: inset + by - y0
+    pcb_bottom = front["face_thickness"] + front["standoff_height"]
+    pcb_top = pcb_bottom + front["pcb_thickness"]
+    pcb = box_mesh((to_case_x(x1), to_case_y(y0), pcb_bottom), (to_case_x(x0), to_case_y(y1), pcb_top))
+
+    bodies = {"front": Body("front", front_tri), "back": Body("back", turned), "board": Body("board", pcb)}
+    for side, name, z0, z1 in (("F", "top parts", pcb_top, pcb_top + top_height),
+                               ("B", "bottom parts", pcb_bottom - bottom_height, pcb_bottom)):
+        parts = [p for p in board["parts"] if p[1] == side]
+        if not parts or z1 <= z0:
+            continue
+        tri = np.concatenate([box_mesh((to_case_x(bx1), to_case_y(by0), z0), (to_case_x(bx0), to_case_y(by1), z1))
+                              for _, _, bx0, by0, bx1, by1 in parts])
+        bodies[name] = Body(name, tri, np.repeat(np.arange(len(parts)), 12), [p[0] for p in parts])
+    return bodies, seam, (pcb_bottom, pcb_top)
+
+
+def describe(result, radius):
+    a, b = result["a"], result["b"]
+    text = []
+    for hit in result["interference"]:
+        who = ""
+        if len(a.names) > 1:
+            who = " (%s)" % ", ".join(a.names[i] for i in hit["labels"])
+        text.append("INTERFERENCE: %.0f mm^2 of %s inside the other part%s, %s%.2f mm deep, "
+                    "(%.1f, %.1f, %.1f)-(%.1f, %.1f, %.1f)" % (
+                        hit["area"], hit["of"], who, ">= " if hit["depth"] >= radius else "",
+                        min(hit["depth"], radius), *hit["lo"], *hit["hi"]))
+    if not result["interference"]:
+        text.append("no interference")
+    if result["contact"] > 0.5:
+        text.append("%.0f mm^2 in contact" % result["contact"])
+    if result["gap"]:
+        text.append("min gap %.2f mm at (%.1f, %.1f, %.1f)" % (result["gap"][0], *result["gap"][1]))
+    else:
+        text.append("no facing surfaces within %.1f mm" % radius)
+    return "%s / %s: %s" % (a.name, b.name, "; ".join(text))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the assembled fit of the case halves and the PCB")
+    parser.add_argument("--front", default=FRONT_STL, help="Front case STL (default: freecad_outputs)")
+    parser.add_argument("--back", default=BACK_STL, help="Back case STL (default: freecad_outputs)")
+    parser.add_argument("--board", default=BOARD, help="KiCad board file (default: pcb/)")
+    parser.add_argument("--flip", choices=("x", "y"), default="x",
+                        help="Axis the back case is turned over about (default x)")
+    parser.add_argument("--radius", type=float, default=3.0, help="Largest gap measured, mm (default 3)")
+    parser.add_argument("--top-height", type=float,
+                        help="F side component height, mm (default: component_height from the back script)")
+    parser.add_argument("--bottom-height", type=float, default=2.5,
+                        help="B side component height towards the face, mm (default 2.5)")
+    parser.add_argument("--parts", type=int, default=8, help="Tightest components to list (default 8)")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    front, back = read_parameters(FRONT_SCRIPT), read_parameters(BACK_SCRIPT)
+    try:
+        board = read_board(args.board)
+        bodies, seam, (pcb_bottom, pcb_top) = assemble(
+            front, back, board, args.front, args.back, args.flip,
+            args.top_height if args.top_height is not None else back["component_height"], args.bottom_height)
+    except (OSError, ValueError, KeyError) as e:
+        print("Error: %s" % e)
+        return 1
+    failed = False
+
+    print("Assembly: back turned over about %s onto the front at z=%.2f mm; PCB on the front standoffs, "
+          "z %.2f-%.2f mm" % (args.flip.upper(), seam, pcb_bottom, pcb_top))
+    mismatches = compare_parameters(front, back)
+    if mismatches:
+        failed = True
+        for line in mismatches:
+            print("  MISMATCH %s" % line)
+    else:
+        print("  %d mating parameters agree between %s and %s" % (
+            sum(1 for n in MATING if n in front and n in back), os.path.basename(FRONT_SCRIPT),
+            os.path.basename(BACK_SCRIPT)))
+
+    x0, y0, x1, y1 = board["outline"]
+    size = "outline %.2f x %.2f mm" % (x1 - x0, y1 - y0)
+    if abs(x1 - x0 - front["pcb_length"]) > HOLE_TOL or abs(y1 - y0 - front["pcb_width"]) > HOLE_TOL:
+        failed = True
+        print("  MISMATCH board %s, scripts use %.2f x %.2f mm" % (size, front["pcb_length"], front["pcb_width"]))
+    else:
+        print("  board %s matches pcb_length x pcb_width" % size)
+    problems = []
+    for params, names in ((front, ("pcb_mount_holes", "display_holes")), (back, ("pcb_mount_holes",))):
+        found, worst, count = check_holes(board, params, names)
+        problems += found
+    if problems:
+        failed = True
+        for line in problems:
+            print("  MISMATCH %s" % line)
+    else:
+        print("  pcb_mount_holes and display_holes are on KiCad mounting holes (max offset %.2f mm)" % worst)
+
+    pairs = [("front", "back"), ("board", "front"), ("board", "back"),
+             ("top parts", "back"), ("top parts", "front"), ("bottom parts", "front")]
+    parts = {}
+    for a, b in pairs:
+        if a not in bodies or b not in bodies:
+            continue
+        result = compare(bodies[a], bodies[b], args.radius)
+        failed |= bool(result["interference"])
+        print(describe(result, args.radius))
+        if len(bodies[a].names) > 1:
+            for label, name in enumerate(bodies[a].names):
+                mine = bodies[a].point_labels == label
+                gap = float(result["distance"][mine].min()) if mine.any() else np.inf
+                if gap < parts.get(name, (np.inf,))[0]:
+                    parts[name] = (gap, b, a)
+
+    tight = sorted((v[0], name, v[1], v[2]) for name, v in parts.items() if np.isfinite(v[0]))
+    if tight and args.parts:
+        print("Tightest components (within %.1f mm):" % args.radius)
+        print("  %-6s %-13s %-6s %s" % ("Ref", "Side", "Case", "Gap"))
+        for gap, name, case, body in tight[:args.parts]:
+            print("  %-6s %-13s %-6s %s" % (name, body, case, "INSIDE" if gap == 0 else "%.2f mm" % gap))
+    print("Checked in %.1f s" % (time.perf_counter() - started))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
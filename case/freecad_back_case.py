@@ -7,9 +7,8 @@ This case mounts to the wall and provides wiring/mounting holes
 
 import FreeCAD as App
 import Part
-import Mesh
-import MeshPart
 import os
+import sys
 
 # Create a new document
 doc = App.newDocument("BackCase")
@@ -557,28 +556,7 @@ out_dir = os.path.join(script_dir, "freecad_outputs")
 if not os.path.exists(out_dir):
     os.makedirs(out_dir)
 
-step_path = os.path.join(out_dir, "back_case_wall_freecad.step")
-stl_path = os.path.join(out_dir, "back_case_wall_freecad.stl")
-
-# Export STEP
-Part.export([part_obj], step_path)
-
-# Export STL with highest quality mesh for 3D printing
-# Use same method as FreeCAD GUI export with premium settings
-import Mesh
-mesh = Mesh.Mesh()
-mesh.addFacets(MeshPart.meshFromShape(
-    Shape=shell,
-    LinearDeflection=0.005,      # 5 microns - very fine detail
-    AngularDeflection=0.174533,  # 10 degrees in radians - smooth curves
-    Relative=False
-).Facets)
-mesh.write(stl_path)
-
-App.Console.PrintMessage("Exported STEP to: %s\n" % step_path)
-App.Console.PrintMessage("Exported STL to: %s\n" % stl_path)
-
-# Save document
-fcstd_path = os.path.join(out_dir, "back_case_wall_freecad.FCStd")
-doc.saveAs(fcstd_path)
-App.Console.PrintMessage("Saved FCStd to: %s\n" % fcstd_path)
+# Write the requested formats (CASE_EXPORT / --export=, default all), skipping unchanged ones
+sys.path.insert(0, script_dir)
+import case_export
+case_export.export(shell, doc, out_dir, "back_case_wall_freecad", check=(side_wall_thickness, bottom_thickness))
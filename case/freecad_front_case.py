@@ -1,11 +1,11 @@
 # FreeCAD script to build front case shell with edge-only fillet at face/wall junction
 # Run with: freecadcmd case/freecad_front_case.py
+# Only the STL: CASE_EXPORT=stl freecadcmd case/freecad_front_case.py (see case_export.py)
 
 import FreeCAD as App
 import Part
-import Mesh
-import MeshPart
 import os
+import sys
 
 # ---------- Parameters (mirrored from front_case_display.scad) ----------
 pcb_length = 133.0
@@ -175,11 +175,11 @@ for offset in range(-3, 4):  # Multiple diagonal bars
 
 # Combine all bars
 lattice_mesh = lattice_bars[0]
-for bar in lattice_bars[1:]:
+for i, bar in enumerate(lattice_bars[1:], 1):
     try:
         lattice_mesh = lattice_mesh.fuse(bar)
-    except:
-        pass
+    except Exception as ex:
+        App.Console.PrintWarning("Lattice bar %d fuse failed: %s\n" % (i, ex))
 
 # Rotate 90° and translate to sensor position (same as opening)
 lattice_mesh = lattice_mesh.rotate(App.Vector(0, 0, 0), App.Vector(0, 0, 1), 90)
@@ -536,27 +536,7 @@ out_dir = os.path.join(script_dir, "freecad_outputs")
 if not os.path.exists(out_dir):
     os.makedirs(out_dir)
 
-step_path = os.path.join(out_dir, "front_case_display_freecad.step")
-stl_path = os.path.join(out_dir, "front_case_display_freecad.stl")
-
-# Export STEP
-Part.export([part_obj], step_path)
-
-# Export STL with highest quality mesh for 3D printing
-# Use same method as FreeCAD GUI export with premium settings
-mesh = Mesh.Mesh()
-mesh.addFacets(MeshPart.meshFromShape(
-    Shape=shell,
-    LinearDeflection=0.005,      # 5 microns - very fine detail
-    AngularDeflection=0.174533,  # 10 degrees in radians - smooth curves
-    Relative=False
-).Facets)
-mesh.write(stl_path)
-
-App.Console.PrintMessage("Exported STEP to: %s\n" % step_path)
-App.Console.PrintMessage("Exported STL to: %s\n" % stl_path)
-
-# Save doc (optional)
-doc_file = os.path.join(out_dir, "front_case_display_freecad.FCStd")
-doc.saveAs(doc_file)
-App.Console.PrintMessage("Saved FCStd to: %s\n" % doc_file)
+# Write the requested formats (CASE_EXPORT / --export=, default all), skipping unchanged ones
+sys.path.insert(0, script_dir)
+import case_export
+case_export.export(shell, doc, out_dir, "front_case_display_freecad", check=(wall_thickness, face_thickness))
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+ESP32-S3 Smart Thermostat - filament and print-time estimate for the case parts
+
+Estimates from the exported meshes what a slicer would report, close enough
+to compare designs:
+  - volume, surface area, layer count
+  - shell plastic (perimeters on walls, solid layers on flat faces) plus
+    infill of the rest, in grams
+  - support: steep overhangs that are not flat bridges, each supported down
+    to the surface below it (or the bed)
+  - print time from extruded volume over --flow plus a per-layer overhead
+  - a wall strength index: the share of the outer walls that is solid
+    (vent slots remove it) times the median measured wall thickness squared
+    (bending strength of a plate goes with t^2). Higher is stronger.
+
+With --sweep it regenerates the parts headless (freecadcmd) for every
+combination of the given case-script parameters, in parallel, and prints
+the Pareto-optimal variants: no other variant is at least as strong while
+using less filament or less time. Parameters are replaced in a copy of each
+script, so derived values (case_length from wall_thickness...) follow; a
+parameter is applied to every part whose script defines it.
+
+Calibrate --flow and --layer-time against one real slicer run; the ranking
+between variants does not depend on them much.
+
+Usage:
+  python3 case/print_estimate.py
+  python3 case/print_estimate.py --infill 20 --layer-height 0.28
+  python3 case/print_estimate.py --sweep wall_thickness=3,4,5 --sweep vent_slot_count=9,15 --jobs 4
+  python3 case/print_estimate.py --sweep corner_r=2,4,6 --part front --csv sweep.csv
+"""
+
+import argparse
+import ast
+import csv
+import itertools
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import stl_check
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+OUTPUT_DIR = os.path.join(SCRIPT_DIR, "freecad_outputs")
+
+# Part name -> (case script, exported STL name)
+PARTS = {
+    "front": ("freecad_front_case.py", "front_case_display_freecad.stl"),
+    "back": ("freecad_back_case.py", "back_case_wall_freecad.stl"),
+}
+
+SUPPORT_DENSITY = 0.15       # Fraction of the supported column that is plastic
+BRIDGE_COS = 0.999           # Flat downward faces are bridged, not supported
+
+
+# ---------- Estimate ----------
+
+def estimate(path, layer_height=0.2, line_width=0.45, perimeters=2, solid_layers=4, infill=15.0,
+             density=1.24, flow=5.0, layer_time=5.0, overhang=45.0):
+    """Volume, plastic, support, time and wall strength index for one STL."""
+    tri, _ = stl_check.load_stl(path)
+    cross = np.cross(tri[:, 1] - tri[:, 0], tri[:, 2] - tri[:, 0])
+    norm = np.linalg.norm(cross, axis=1)
+    keep = norm > 1e-12
+    tri, cross, norm = tri[keep], cross[keep], norm[keep]
+    unit = cross / norm[:, None]
+    area = norm / 2.0
+    lo, hi = tri.reshape(-1, 3).min(axis=0), tri.reshape(-1, 3).max(axis=0)
+    volume = abs(np.einsum("ij,ij->i", tri[:, 0], np.cross(tri[:, 1], tri[:, 2])).sum()) / 6.0
+
+    # Shell: perimeters on vertical faces, solid layers on horizontal ones, blended by slope
+    nz = np.abs(unit[:, 2])
+    skin = nz * solid_layers * layer_height + (1.0 - nz) * perimeters * line_width
+    shell = min(volume, float(np.sum(area * skin)))
+    plastic = shell + (volume - shell) * infill / 100.0
+
+    # Support columns under steep overhangs that are not flat bridges
+    centroid = tri.mean(axis=1)
+    steep = (unit[:, 2] < -np.cos(np.radians(overhang))) & (unit[:, 2] >= -BRIDGE_COS) & \
+            (centroid[:, 2] > lo[2] + stl_check.PLANE_TOL)
+    drop = centroid[steep, 2] - lo[2]
+    ray, distance = stl_check.ray_hits(tri, unit, centroid[steep], 2, -1.0)
+    below = np.full(len(drop), np.inf)
+    np.minimum.at(below, ray, distance)
+    column = np.minimum(drop, below)
+    support = float(np.sum(area[steep] * column)) * SUPPORT_DENSITY
+
+    # Wall strength index from the thickness rays on the outer walls
+    points, value, weight, faces = stl_check.thickness(tri, unit, area, np.random.default_rng(1))
+    side = ((np.abs(points[:, 0] - lo[0]) < stl_check.PLANE_TOL) | (np.abs(points[:, 0] - hi[0]) < stl_check.PLANE_TOL) |
+            (np.abs(points[:, 1] - lo[1]) < stl_check.PLANE_TOL) | (np.abs(points[:, 1] - hi[1]) < stl_check.PLANE_TOL)) & \
+        (np.abs(unit[faces, 2]) < 0.5) & np.isfinite(value)
+    walls = 2.0 * ((hi[0] - lo[0]) + (hi[1] - lo[1])) * (hi[2] - lo[2])
+    solid = min(1.0, float(weight[side].sum()) / walls) if walls else 0.0
+    strength = solid * float(np.median(value[side])) ** 2 if side.any() else 0.0
+
+    layers = int(np.ceil((hi[2] - lo[2]) / layer_height - 1e-9))
+    return {
+        "volume": volume / 1000.0,
+        "area": float(area.sum()),
+        "layers": layers,
+        "overhang": float(area[steep].sum()),
+        "support": support / 1000.0,
+        "grams": (plastic + support) / 1000.0 * density,
+        "minutes": ((plastic + support) / flow + layers * layer_time) / 60.0,
+        "strength": strength,
+    }
+
+
+# ---------- Sweep ----------
+
+def override_source(source, values):
+    """Case script source with module-level parameters replaced; returns (source, names applied)."""
+    tree = ast.parse(source)
+    assigned = {}
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+            assigned.setdefault(node.targets[0].id, node)
+    lines = source.splitlines(True)
+    applied = []
+    for name, value in values.items():
+        target = name
+        while target in assigned and isinstance(assigned[target].value, ast.Name):
+            target = assigned[target].value.id      # wall_thickness = side_wall_thickness: set the source
+        node = assigned.get(target)
+        if node is None:
+            continue
+        lines[node.lineno - 1] = "%s = %r  # sweep\n" % (target, value)
+        for i in range(node.lineno, node.end_lineno):
+            lines[i] = ""
+        applied.append(name)
+    return "".join(lines), applied
+
+
+def build_part(part, values, work, freecad, timeout):
+    """Generate one part headless in work/ with overridden parameters; returns the STL path."""
+    script, stl_name = PARTS[part]
+    with open(os.path.join(SCRIPT_DIR, script)) as f:
+        source, _ = override_source(f.read(), values)
+    with open(os.path.join(work, script), "w") as f:
+        f.write(source)
+    for module in ("case_export.py", "stl_check.py"):
+        shutil.copy(os.path.join(SCRIPT_DIR, module), work)
+    env = dict(os.environ, CASE_EXPORT="stl")      # The estimate needs only the mesh
+    run = subprocess.run([freecad, script], cwd=work, env=env, capture_output=True, text=True, timeout=timeout)
+    stl = os.path.join(work, "freecad_outputs", stl_name)
+    if not os.path.exists(stl):
+        raise RuntimeError("%s produced no STL (exit %d): %s" % (script, run.returncode,
+                                                                  (run.stderr or run.stdout).strip()[-300:]))
+    return stl
+
+
+def run_variant(job):
+    """Worker: build and estimate every part for one parameter combination."""
+    values, parts, freecad, timeout, settings = job
+    result = {"values": values, "parts": {}, "error": None}
+    for part in parts:
+        work = tempfile.mkdtemp(prefix="case_sweep_")
+        try:
+            result["parts"][part] = estimate(build_part(part, values, work, freecad, timeout), **settings)
+        except (OSError, RuntimeError, ValueError, subprocess.TimeoutExpired) as e:
+            result["error"] = "%s: %s" % (part, e)
+            break
+        finally:
+            shutil.rmtree(work, ignore_errors=True)
+    return result
+
+
+def pareto(rows):
+    """Indices of rows no other row beats: strength at least as high, grams and minutes no higher."""
+    keep = []
+    for i, a in enumerate(rows):
+        dominated = any(b["strength"] >= a["strength"] and b["grams"] <= a["grams"] and b["minutes"] <= a["minutes"]
+                        and (b["strength"], -b["grams"], -b["minutes"]) != (a["strength"], -a["grams"], -a["minutes"])
+                        for b in rows)
+        if not dominated:
+            keep.append(i)
+    return keep
+
+
+def parse_sweep(specs):
+    grid = {}
+    for spec in specs:
+        name, _, values = spec.partition("=")
+        if not name or not values:
+            raise ValueError("--sweep expects name=v1,v2,... (got %r)" % spec)
+        grid[name.strip()] = [float(v) if "." in v or "e" in v.lower() else int(v) for v in values.split(",")]
+    return grid
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Estimate filament and print time for the case parts")
+    parser.add_argument("stl", nargs="*", help="STL files to estimate (default: the parts in freecad_outputs/)")
+    parser.add_argument("--layer-height", type=float, default=0.2, help="Layer height, mm (default 0.2)")
+    parser.add_argument("--line-width", type=float, default=0.45, help="Extrusion width, mm (default 0.45)")
+    parser.add_argument("--perimeters", type=int, default=2, help="Wall loops (default 2)")
+    parser.add_argument("--solid-layers", type=int, default=4, help="Top/bottom solid layers (default 4)")
+    parser.add_argument("--infill", type=float, default=15.0, help="Infill percent (default 15)")
+    parser.add_argument("--density", type=float, default=1.24, help="Filament density, g/cm^3 (default 1.24, PLA)")
+    parser.add_argument("--flow", type=float, default=5.0, help="Average volumetric flow, mm^3/s (default 5)")
+    parser.add_argument("--layer-time", type=float, default=5.0,
+                        help="Travel/layer-change overhead per layer, s (default 5)")
+    parser.add_argument("--sweep", action="append", default=[], metavar="NAME=V1,V2,...",
+                        help="Case parameter values to sweep (repeatable; all combinations are built)")
+    parser.add_argument("--part", choices=("front", "back", "both"), default="both", help="Parts to sweep")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Parallel builds (default: all cores)")
+    parser.add_argument("--freecad", default="freecadcmd", help="FreeCAD command-line binary (default freecadcmd)")
+    parser.add_argument("--timeout", type=float, default=900, help="Seconds per part build (default 900)")
+    parser.add_argument("--all", action="store_true", help="List every variant, not just the Pareto front")
+    parser.add_argument("--csv", help="Also write the sweep table to this CSV file")
+    args = parser.parse_args()
+
+    settings = {"layer_height": args.layer_height, "line_width": args.line_width, "perimeters": args.perimeters,
+                "solid_layers": args.solid_layers, "infill": args.infill, "density": args.density,
+                "flow": args.flow, "layer_time": args.layer_time}
+
+    if not args.sweep:
+        paths = args.stl or [os.path.join(OUTPUT_DIR, stl) for _, stl in PARTS.values()]
+        print("%-36s %8s %8s %6s %10s %9s %7s %7s %8s" % ("Part", "cm^3", "mm^2", "Layers", "Supp mm^2",
+                                                         "Supp cm^3", "Grams", "Min", "Strength"))
+        for path in paths:
+            try:
+                e = estimate(path, **settings)
+            except (OSError, ValueError) as ex:
+                print("%s: %s" % (path, ex))
+                return 1
+            print("%-36s %8.1f %8.0f %6d %10.0f %9.1f %7.1f %7.0f %8.1f" % (
+                os.path.basename(path), e["volume"], e["area"], e["layers"], e["overhang"], e["support"],
+                e["grams"], e["minutes"], e["strength"]))
+        return 0
+
+    try:
+        grid = parse_sweep(args.sweep)
+    except ValueError as e:
+        print("Error: %s" % e)
+        return 1
+    if not shutil.which(args.freecad):
+        print("Error: %s not found; install FreeCAD or pass --freecad" % args.freecad)
+        return 1
+    parts = ["front", "back"] if args.part == "both" else [args.part]
+    sources = []
+    for part in parts:
+        with open(os.path.join(SCRIPT_DIR, PARTS[part][0])) as f:
+            sources.append(f.read())
+    for name in grid:
+        if not any(override_source(source, {name: 0})[1] for source in sources):
+            print("Error: no %s script defines %s" % (" or ".join(parts), name))
+            return 1
+    names = list(grid)
+    jobs = [(dict(zip(names, combo)), parts, args.freecad, args.timeout, settings)
+            for combo in itertools.product(*(grid[n] for n in names))]
+
+    started = time.perf_counter()
+    rows = []
+    with ProcessPoolExecutor(max_workers=max(1, min(args.jobs, len(jobs)))) as pool:
+        for done, result in enumerate(pool.map(run_variant, jobs), 1):
+            if result["error"]:
+                print("  %s: %s" % (result["values"], result["error"]))
+                continue
+            estimates = list(result["parts"].values())
+            rows.append(dict(result["values"],
+                             grams=sum(e["grams"] for e in estimates),
+                             minutes=sum(e["minutes"] for e in estimates),
+                             support=sum(e["support"] for e in estimates),
+                             strength=min(e["strength"] for e in estimates)))
+            print("  built %d/%d (%.0f s)" % (done, len(jobs), time.perf_counter() - started), file=sys.stderr)
+    if not rows:
+        print("No variant built")
+        return 1
+
+    front = set(pareto(rows))
+    for i, row in enumerate(rows):
+        row["pareto"] = i in front
+    shown = sorted((r for r in rows if args.all or r["pareto"]), key=lambda r: (-r["strength"], r["grams"]))
+    print("%d variants of %s, %d on the Pareto front (strength up, grams and minutes down):" % (
+        len(rows), "+".join(parts), len(front)))
+    header = names + ["strength", "grams", "minutes", "support_cm3"]
+    print("  " + " ".join("%12s" % h for h in header) + ("  pareto" if args.all else ""))
+    for row in shown:
+        cells = ["%12g" % row[n] for n in names] + ["%12.1f" % row["strength"], "%12.1f" % row["grams"],
+                                                   "%12.0f" % row["minutes"], "%12.1f" % row["support"]]
+        print("  " + " ".join(cells) + (("       *" if row["pareto"] else "") if args.all else ""))
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=names + ["strength", "grams", "minutes", "support", "pareto"])
+            writer.writeheader()
+            writer.writerows(rows)
+        print("Wrote %s" % args.csv)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
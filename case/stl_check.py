@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+"""
+ESP32-S3 Smart Thermostat - STL checks for the exported case parts
+
+Loads a binary (memory-mapped) or ASCII STL into NumPy arrays and checks what
+the slicer would otherwise find first:
+  - watertight: every edge shared by exactly two triangles (open and
+    non-manifold edges are what a failed fuse leaves behind)
+  - normals: consistent winding between neighbours, outward overall (positive
+    volume), stored facet normals agreeing with the winding, no zero-area
+    triangles
+  - wall thickness: rays are cast inward from the flat faces; the outer walls
+    and the floor (the faces on the part's bounding box) are compared with the
+    script's side_wall_thickness / bottom_thickness (wall_thickness /
+    face_thickness for the front case), and anything thinner than
+    --min-feature is listed as a thin feature
+  - overhangs: downward faces steeper than --overhang degrees from vertical
+    that are not on the bed (the part prints as exported, lowest face down),
+    with the flat bridges counted separately
+
+Both FreeCAD scripts run this on the STL they export. Run by hand it checks
+the parts in freecad_outputs/ and reads the thicknesses from the scripts.
+
+Usage:
+  python3 case/stl_check.py
+  python3 case/stl_check.py case/freecad_outputs/front_case_display_freecad.stl
+  python3 case/stl_check.py --wall 5 --floor 4 --min-feature 1.0 part.stl
+  python3 case/stl_check.py --strict --max-overhang 2500
+
+Exit status is 1 when a mesh is not watertight or has flipped normals. Thin
+walls, thin features and overhangs are warnings: the snap slots and the
+display lattice are thinner than the nominal walls by design.
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+
+import numpy as np
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+OUTPUT_DIR = os.path.join(SCRIPT_DIR, "freecad_outputs")
+
+# Case script parameters giving the nominal wall and floor, first match wins
+WALL_PARAMS = ("side_wall_thickness", "wall_thickness")
+FLOOR_PARAMS = ("bottom_thickness", "face_thickness")
+
+BINARY_DTYPE = np.dtype([("normal", "<f4", (3,)), ("v", "<f4", (3, 3)), ("attr", "<u2")])
+WELD = 1e-3                  # Vertices closer than this (mm) are the same vertex
+PLANE_TOL = 0.01             # Faces within this of the bounding box are outer faces (mm)
+AXIS_COS = 0.999             # Faces this close to an axis are "flat" and get thickness rays
+SAMPLE_AREA = 1.0            # One thickness sample per this much face area (mm^2)
+MAX_SAMPLES = 400            # Per triangle
+CELL = 1.0                   # Grid cell for matching rays to triangles (mm)
+THICK_TOL = 0.05             # Thickness shortfall that is still nominal (mm)
+
+
+# ---------- Loading ----------
+
+def load_stl(path):
+    """(n, 3, 3) float64 vertices and the stored (n, 3) normals (zeros for ASCII)."""
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        head = f.read(84)
+    if len(head) == 84:
+        count = int(np.frombuffer(head, "<u4", 1, 80)[0])
+        if size == 84 + count * BINARY_DTYPE.itemsize:
+            records = np.memmap(path, BINARY_DTYPE, "r", 84, (count,)) if count else np.zeros(0, BINARY_DTYPE)
+            return np.asarray(records["v"], np.float64), np.asarray(records["normal"], np.float64)
+    if not head.lstrip().startswith(b"solid"):
+        raise ValueError("%s is neither a binary STL of the right size nor an ASCII STL" % path)
+    with open(path, "rb") as f:
+        data = f.read()
+    values = re.findall(rb"vertex\s+(\S+)\s+(\S+)\s+(\S+)", data)
+    if len(values) % 3:
+        raise ValueError("%s: %d vertices is not a whole number of facets" % (path, len(values)))
+    tri = np.array(values, dtype="S").astype(np.float64).reshape(-1, 3, 3)
+    return tri, np.zeros((len(tri), 3))
+
+
+# ---------- Topology ----------
+
+def weld(tri):
+    """Shared vertex indices, (n, 3)."""
+    q = np.round(tri.reshape(-1, 3) / WELD).astype(np.int64)
+    q -= q.min(axis=0)
+    if q.max() >= 1 << 21:
+        _, index = np.unique(q, axis=0, return_inverse=True)
+    else:
+        _, index = np.unique((q[:, 0] << 42) | (q[:, 1] << 21) | q[:, 2], return_inverse=True)
+    return index.reshape(-1, 3)
+
+
+def edge_report(faces):
+    vertex_count = int(faces.max()) + 1 if len(faces) else 0
+    a = faces.reshape(-1)
+    b = faces[:, [1, 2, 0]].reshape(-1)
+    undirected, counts = np.unique(np.minimum(a, b) * vertex_count + np.maximum(a, b), return_counts=True)
+    _, directed_counts = np.unique(a * vertex_count + b, return_counts=True)
+    open_keys = undirected[counts == 1]
+    return {
+        "edges": len(undirected),
+        "open": int(np.sum(counts == 1)),
+        "non_manifold": int(np.sum(counts > 2)),
+        "misoriented": int(np.sum(directed_counts > 1)),
+        "open_vertices": np.unique(np.concatenate([open_keys // vertex_count, open_keys % vertex_count]))
+        if len(open_keys) else np.zeros(0, np.int64),
+    }
+
+
+# ---------- Thickness ----------
+
+def sample_points(tri, area, rng):
+    """Points spread over each triangle, about one per SAMPLE_AREA, and the area each stands for."""
+    counts = np.clip(np.ceil(area / SAMPLE_AREA).astype(np.int64), 1, MAX_SAMPLES)
+    owner = np.repeat(np.arange(len(tri)), counts)
+    r1 = np.sqrt(rng.random(len(owner)))
+    r2 = rng.random(len(owner))
+    w = np.stack([1.0 - r1, r1 * (1.0 - r2), r1 * r2], axis=1)
+    w[np.repeat(np.cumsum(counts) - counts, 1)] = 1.0 / 3.0     # First sample of each triangle at its centroid
+    points = np.einsum("ij,ijk->ik", w, tri[owner])
+    return owner, points, (area / counts)[owner]
+
+
+def ray_hits(tri, unit, points, axis, direction):
+    """Every surface a ray from each point along +/-axis crosses: (ray index, distance) arrays."""
+    u, v = [k for k in range(3) if k != axis]
+    cand = np.nonzero(np.abs(unit[:, axis]) > 1e-6)[0]       # Triangles edge-on to the ray cannot be hit
+    if not len(cand) or not len(points):
+        return np.zeros(0, np.int64), np.zeros(0)
+    t = tri[cand]
+    flat = t[:, :, [u, v]]
+    au, av, ak = t[:, 0, u], t[:, 0, v], t[:, 0, axis]
+    e1u, e1v, e1k = t[:, 1, u] - au, t[:, 1, v] - av, t[:, 1, axis] - ak
+    e2u, e2v, e2k = t[:, 2, u] - au, t[:, 2, v] - av, t[:, 2, axis] - ak
+    inv = 1.0 / (e1u * e2v - e1v * e2u)      # Non-zero: the triangle is not edge-on to the ray
+    lo = np.floor(flat.min(axis=1) / CELL).astype(np.int64)
+    hi = np.floor(flat.max(axis=1) / CELL).astype(np.int64)
+    origin = lo.min(axis=0)
+    span = hi.max(axis=0) - origin + 1
+    nu, nv = hi[:, 0] - lo[:, 0] + 1, hi[:, 1] - lo[:, 1] + 1
+    cells = nu * nv
+    owner = np.repeat(np.arange(len(cand)), cells)
+    step = np.arange(cells.sum()) - np.repeat(np.cumsum(cells) - cells, cells)
+    keys = (lo[owner, 0] - origin[0] + step // nv[owner]) * span[1] + (lo[owner, 1] - origin[1] + step % nv[owner])
+    order = np.argsort(keys, kind="stable")
+    keys, owner = keys[order], owner[order]
+
+    pc = np.floor(points[:, [u, v]] / CELL).astype(np.int64) - origin
+    inside = np.all((pc >= 0) & (pc < span), axis=1)
+    pkeys = np.where(inside, pc[:, 0] * span[1] + pc[:, 1], -1)
+    first = np.searchsorted(keys, pkeys, "left")
+    last = np.searchsorted(keys, pkeys, "right")
+    hits = np.where(inside, last - first, 0)
+    ray = np.repeat(np.arange(len(points)), hits)
+    pos = np.repeat(first, hits) + np.arange(hits.sum()) - np.repeat(np.cumsum(hits) - hits, hits)
+    idx = owner[pos]
+    pu = points[ray, u] - au[idx]
+    pv = points[ray, v] - av[idx]
+
+    # Barycentric point-in-triangle in the (u, v) plane, then the hit height along the axis
+    w1 = (pu * e2v[idx] - pv * e2u[idx]) * inv[idx]
+    w2 = (e1u[idx] * pv - e1v[idx] * pu) * inv[idx]
+    eps = -1e-9
+    ok = (w1 >= eps) & (w2 >= eps) & (w1 + w2 <= 1.0 - eps)
+    distance = (ak[idx] + w1 * e1k[idx] + w2 * e2k[idx] - points[ray, axis]) * direction
+    ok &= distance > 1e-3
+    return ray[ok], distance[ok]
+
+
+def axis_thickness(tri, unit, points, axis, direction):
+    """Distance from each point along +/-axis to the nearest other surface, inf when nothing is hit."""
+    best = np.full(len(points), np.inf)
+    ray, distance = ray_hits(tri, unit, points, axis, direction)
+    np.minimum.at(best, ray, distance)
+    return best
+
+
+def thickness(tri, unit, area, rng):
+    """Samples on the flat faces: points, thickness, area each stands for, and their face index."""
+    flat = np.nonzero(np.max(np.abs(unit), axis=1) > AXIS_COS)[0]
+    owner, points, weight = sample_points(tri[flat], area[flat], rng)
+    faces = flat[owner]
+    axis = np.argmax(np.abs(unit[faces]), axis=1)
+    inward = -np.sign(unit[faces, axis])
+    result = np.full(len(points), np.inf)
+    for k in range(3):
+        for direction in (-1.0, 1.0):
+            mask = (axis == k) & (inward == direction)
+            result[mask] = axis_thickness(tri, unit, points[mask], k, direction)
+    return points, result, weight, faces
+
+
+def thin_spots(points, values, limit, spacing=3.0, count=5):
+    """A few of the thinnest places under limit, at least spacing apart."""
+    spots = []
+    for i in np.argsort(values):
+        if values[i] >= limit or len(spots) == count:
+            break
+        if all(np.linalg.norm(points[i] - points[j]) >= spacing for j in spots):
+            spots.append(i)
+    return [(points[i], values[i]) for i in spots]
+
+
+# ---------- Check ----------
+
+def check(path, wall, floor, min_feature=0.8, overhang=45.0):
+    """Run every check on one STL. Returns a dict with 'errors', 'warnings' and 'lines' of report text."""
+    started = time.perf_counter()
+    tri, stored = load_stl(path)
+    errors, warnings, lines = [], [], []
+    if not len(tri):
+        return {"errors": ["no triangles"], "warnings": [], "lines": [], "seconds": 0.0}
+
+    cross = np.cross(tri[:, 1] - tri[:, 0], tri[:, 2] - tri[:, 0])
+    norm = np.linalg.norm(cross, axis=1)
+    area = norm / 2.0
+    degenerate = norm < 1e-12
+    unit = np.divide(cross, norm[:, None], out=np.zeros_like(cross), where=~degenerate[:, None])
+    lo, hi = tri.reshape(-1, 3).min(axis=0), tri.reshape(-1, 3).max(axis=0)
+    volume = np.einsum("ij,ij->i", tri[:, 0], np.cross(tri[:, 1], tri[:, 2])).sum() / 6.0
+    lines.append("%d triangles, %.1f x %.1f x %.1f mm, volume %.1f cm^3, area %.0f mm^2" % (
+        len(tri), *(hi - lo), abs(volume) / 1000.0, area.sum()))
+
+    # Topology
+    edges = edge_report(weld(tri))
+    if edges["open"] or edges["non_manifold"]:
+        where = ""
+        if len(edges["open_vertices"]):
+            verts = tri.reshape(-1, 3)[np.unique(weld(tri).reshape(-1), return_index=True)[1]]
+            spot = verts[edges["open_vertices"]]
+            where = " around (%.1f, %.1f, %.1f)-(%.1f, %.1f, %.1f)" % (*spot.min(axis=0), *spot.max(axis=0))
+        errors.append("not watertight: %d open and %d non-manifold edges%s" % (
+            edges["open"], edges["non_manifold"], where))
+    else:
+        lines.append("watertight: %d edges, each shared by two triangles" % edges["edges"])
+    if edges["misoriented"]:
+        errors.append("%d edges where neighbouring triangles wind the same way (flipped triangles)"
+                      % edges["misoriented"])
+    if volume < 0:
+        errors.append("normals point inward (negative volume)")
+    has_stored = np.any(stored != 0.0, axis=1) & ~degenerate
+    disagree = int(np.sum(np.einsum("ij,ij->i", stored[has_stored], unit[has_stored]) < 0))
+    if disagree:
+        errors.append("%d stored facet normals point against their winding" % disagree)
+    if degenerate.any():
+        warnings.append("%d zero-area triangles" % int(degenerate.sum()))
+
+    # Thickness
+    points, value, weight, faces = thickness(tri, unit, area, np.random.default_rng(1))
+    on_side = (np.abs(points[:, 0] - lo[0]) < PLANE_TOL) | (np.abs(points[:, 0] - hi[0]) < PLANE_TOL) | \
+              (np.abs(points[:, 1] - lo[1]) < PLANE_TOL) | (np.abs(points[:, 1] - hi[1]) < PLANE_TOL)
+    side = on_side & (np.abs(unit[faces, 2]) < 0.5)
+    bottom = (np.abs(points[:, 2] - lo[2]) < PLANE_TOL) & (unit[faces, 2] < -AXIS_COS)
+    for label, mask, nominal in (("walls", side, wall), ("floor", bottom, floor)):
+        hit = mask & np.isfinite(value)
+        if nominal is None or not hit.any():
+            continue
+        under = hit & (value < nominal - THICK_TOL)
+        share = 100.0 * weight[under].sum() / weight[hit].sum()
+        text = "%s: nominal %.2f mm, min %.2f mm, %.1f%% of %.0f mm^2 under nominal" % (
+            label, nominal, value[hit].min(), share, weight[hit].sum())
+        if under.any():
+            text += "; thinnest " + ", ".join("%.2f mm at (%.1f, %.1f, %.1f)" % (v, *p)
+                                            for p, v in thin_spots(points[hit], value[hit], nominal - THICK_TOL))
+            warnings.append(text)
+        else:
+            lines.append(text)
+    finite = np.isfinite(value)
+    thin = finite & (value < min_feature)
+    if thin.any():
+        warnings.append("%.0f mm^2 of features thinner than %.2f mm, thinnest %s" % (
+            weight[thin].sum(), min_feature, ", ".join("%.2f mm at (%.1f, %.1f, %.1f)" % (v, *p)
+                                                        for p, v in thin_spots(points[finite], value[finite],
+                                                                               min_feature))))
+    elif finite.any():
+        lines.append("thinnest flat feature %.2f mm (limit %.2f mm)" % (value[finite].min(), min_feature))
+
+    # Overhangs (the bed is the lowest face)
+    centroid_z = tri[:, :, 2].mean(axis=1)
+    down = (unit[:, 2] < -np.cos(np.radians(overhang))) & (centroid_z > lo[2] + PLANE_TOL)
+    bridge = down & (unit[:, 2] < -AXIS_COS)
+    if down.any():
+        lines.append("overhangs past %g deg: %.0f mm^2 (%.0f mm^2 flat bridges) between z %.1f and %.1f mm" % (
+            overhang, area[down].sum(), area[bridge].sum(), centroid_z[down].min(), centroid_z[down].max()))
+    else:
+        lines.append("no overhangs past %g deg" % overhang)
+
+    seconds = time.perf_counter() - started
+    return {"errors": errors, "warnings": warnings, "lines": lines, "seconds": seconds,
+            "overhang_area": float(area[down].sum())}
+
+
+def script_parameters(stl_path):
+    """Nominal wall and floor from the case script that writes this STL.
+
+    The scripts name their outputs by base name (case_export.export(..., "back_case_wall_freecad")),
+    so the quoted base name or the full file name identifies the script.
+    """
+    name = os.path.basename(stl_path)
+    base = os.path.splitext(name)[0]
+    for script in sorted(os.listdir(SCRIPT_DIR)):
+        if not (script.startswith("freecad_") and script.endswith(".py")):
+            continue
+        with open(os.path.join(SCRIPT_DIR, script)) as f:
+            source = f.read()
+        if name not in source and '"%s"' % base not in source:
+            continue
+        values = dict(re.findall(r"^(\w+)\s*=\s*([0-9.]+)\s*(?:#.*)?$", source, re.M))
+        pick = lambda names: next((float(values[n]) for n in names if n in values), None)
+        return pick(WALL_PARAMS), pick(FLOOR_PARAMS), script
+    return None, None, None
+
+
+def check_part(stl_path, wall, floor, message=print, warning=print, min_feature=0.8, overhang=45.0):
+    """Check an exported part and report it through message/warning (App.Console from FreeCAD). True if clean."""
+    result = check(stl_path, wall, floor, min_feature, overhang)
+    message("STL check %s (%.2f s)\n" % (os.path.basename(stl_path), result["seconds"]))
+    for line in result["lines"]:
+        message("  %s\n" % line)
+    for line in result["warnings"]:
+        warning("  WARNING: %s\n" % line)
+    for line in result["errors"]:
+        warning("  ERROR: %s\n" % line)
+    return not result["errors"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check exported case STLs for printability")
+    parser.add_argument("stl", nargs="*", help="STL files (default: every .stl in freecad_outputs/)")
+    parser.add_argument("--wall", type=float, help="Nominal outer wall thickness (default: from the case script)")
+    parser.add_argument("--floor", type=float, help="Nominal floor thickness (default: from the case script)")
+    parser.add_argument("--min-feature", type=float, default=0.8,
+                        help="Flag features thinner than this, mm (default 0.8, two 0.4 mm perimeters)")
+    parser.add_argument("--overhang", type=float, default=45.0, help="Overhang angle from vertical (default 45)")
+    parser.add_argument("--max-overhang", type=float,
+                        help="Fail when the overhang area is above this many mm^2 (default: report only)")
+    parser.add_argument("--strict", action="store_true", help="Fail on warnings (thin walls, thin features) too")
+    args = parser.parse_args()
+
+    paths = args.stl or sorted(os.path.join(OUTPUT_DIR, f) for f in os.listdir(OUTPUT_DIR) if f.endswith(".stl"))
+    if not paths:
+        print("No STL files found in %s" % OUTPUT_DIR)
+        return 1
+    failed = False
+    for path in paths:
+        wall, floor, script = script_parameters(path)
+        wall = args.wall if args.wall is not None else wall
+        floor = args.floor if args.floor is not None else floor
+        try:
+            result = check(path, wall, floor, args.min_feature, args.overhang)
+        except (OSError, ValueError) as e:
+            print("%s: %s" % (path, e))
+            failed = True
+            continue
+        missing = [what for what, value in (("wall", wall), ("floor", floor)) if value is None]
+        if missing:
+            result["errors"].append("no nominal %s thickness (%s) - thickness checks skipped, pass %s" % (
+                " or ".join(missing), "no case script writes %s" % os.path.basename(path) if not script
+                else "not found in %s" % script, " and ".join("--" + m for m in missing)))
+        if args.max_overhang is not None and result["overhang_area"] > args.max_overhang:
+            result["errors"].append("overhang area %.0f mm^2 is above %.0f mm^2" % (
+                result["overhang_area"], args.max_overhang))
+        status = "FAIL" if result["errors"] else "WARN" if result["warnings"] else "OK"
+        print("%s: %s (%.2f s%s)" % (os.path.relpath(path), status, result["seconds"],
+                                     ", limits from %s" % script if script else ""))
+        for line in result["lines"]:
+            print("  %s" % line)
+        for line in result["warnings"]:
+            print("  WARNING: %s" % line)
+        for line in result["errors"]:
+            print("  ERROR: %s" % line)
+        failed |= bool(result["errors"]) or (args.strict and bool(result["warnings"]))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,600 @@
+#!/usr/bin/env python3
+"""
+Retag bare debugLog() calls as leveled, categorized log macros (include/Log.h).
+Follows on from convert_serial_to_debuglog.py, which turned the Serial.print
+calls into debugLog().
+
+Only the macro changes; the format string and arguments are kept:
+  debugLog("[MQTT] Inbound queue full ...")   -> LOG_I(MQTT, "[MQTT] Inbound queue full ...")
+  debugLog("[DEBUG] getLocalTime took ...")   -> LOG_D(DISPLAY, "[DEBUG] getLocalTime took ...")
+  debugLog("ERROR: Sensor initialization ...") -> LOG_E(SENSOR, "ERROR: Sensor initialization ...")
+
+Category, first match wins:
+  1. The [TAG] or "TAG:" prefix ([SENSOR], [MOTION_WAKE], LD2410:, SCHEDULE:,
+     controlRelays:) - each word is looked up in WORD_CATEGORIES
+  2. After a level-only tag ([DEBUG], [WARNING], ERROR:) the first word of the
+     message ("[DEBUG] updateDisplay start")
+  3. The enclosing function's name (handleMQTTMessage -> MQTT)
+  4. Any word of the message ("Connecting to WiFi...")
+  5. The file name (Weather.cpp -> WEATHER), otherwise SYSTEM
+Level, from the tag or the start of the message: ERROR -> LOG_E, WARNING or
+Failed -> LOG_W, DEBUG -> LOG_D. Otherwise from anywhere in the message:
+error or FAILED -> LOG_E; warning or invalid -> LOG_W; fail/failed/failure ->
+LOG_E, or LOG_W when the line names a way around it (skipping, retry,
+fallback). Then lines in DEBUG_LINES (per-cycle and periodic status output)
+-> LOG_D, otherwise LOG_I.
+A call that continues the previous line (the previous format had no trailing
+newline) takes the previous call's category and level; an indented detail line
+("  Source: %d") takes those of the line it belongs to, unless it states a
+more severe level itself.
+
+Already converted LOG_I/LOG_D/LOG_V calls whose message reports a failure are
+raised the same way (only the macro name changes).
+
+Without --write nothing is changed: the summary lists calls per category and
+level, and any Serial.print that still bypasses the logger. --check exits 1
+while bare debugLog() calls or understated failure lines remain.
+
+--setting-check compiles src/Log.cpp with --cxx into a small harness and
+compares logApplySetting()/logFormatLevels() with a Python model over random
+"mqtt=debug,sensor=warn" style settings.
+
+Usage:
+  python3 convert_debuglog_to_log.py
+  python3 convert_debuglog_to_log.py --list src/Main-Thermostat.cpp
+  python3 convert_debuglog_to_log.py --diff
+  python3 convert_debuglog_to_log.py --write
+  python3 convert_debuglog_to_log.py --check
+  python3 convert_debuglog_to_log.py --setting-check --rounds 500
+"""
+
+import argparse
+import difflib
+import glob
+import os
+import random
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+
+CATEGORIES = ('SYSTEM', 'SENSOR', 'HVAC', 'SCHEDULE', 'DISPLAY', 'MOTION',
+              'WIFI', 'MQTT', 'WEB', 'WEATHER', 'OTA', 'HISTORY')     # enum LogCategory
+LEVELS = ('none', 'error', 'warn', 'info', 'debug', 'verbose')       # LOG_LEVEL_*
+MACROS = {1: 'LOG_E', 2: 'LOG_W', 3: 'LOG_I', 4: 'LOG_D', 5: 'LOG_V'}
+ERROR, WARN, INFO, DEBUG = 1, 2, 3, 4
+
+# Lower-case words of tags, function names and file names
+WORD_CATEGORIES = {
+    'boot': 'SYSTEM', 'mem': 'SYSTEM', 'diag': 'SYSTEM', 'diagnostics': 'SYSTEM',
+    'settings': 'SYSTEM', 'reboot': 'SYSTEM', 'factory': 'SYSTEM',
+    'sensor': 'SENSOR', 'ds18b20': 'SENSOR', 'bme280': 'SENSOR', 'bme680': 'SENSOR',
+    'aht20': 'SENSOR', 'pressure': 'SENSOR', 'readings': 'SENSOR',
+    'hvac': 'HVAC', 'relay': 'HVAC', 'relays': 'HVAC', 'heating': 'HVAC', 'cooling': 'HVAC',
+    'fan': 'HVAC', 'mode': 'HVAC', 'hydronic': 'HVAC', 'lockout': 'HVAC', 'shower': 'HVAC', 'stage': 'HVAC',
+    'schedule': 'SCHEDULE', 'override': 'SCHEDULE',
+    'display': 'DISPLAY', 'draw': 'DISPLAY', 'touch': 'DISPLAY', 'filtered': 'DISPLAY',
+    'keyboard': 'DISPLAY', 'calibrate': 'DISPLAY', 'calibration': 'DISPLAY', 'screen': 'DISPLAY',
+    'sleep': 'DISPLAY', 'brightness': 'DISPLAY', 'tft': 'DISPLAY',
+    'ld2410': 'MOTION', 'radar': 'MOTION', 'motion': 'MOTION',
+    'wifi': 'WIFI',
+    'mqtt': 'MQTT', 'discovery': 'MQTT',
+    'web': 'WEB', 'request': 'WEB', 'requests': 'WEB', 'sse': 'WEB', 'server': 'WEB',
+    'weather': 'WEATHER',
+    'ota': 'OTA', 'firmware': 'OTA',
+    'history': 'HISTORY',
+}
+
+LEVEL_WORDS = {'error': ERROR, 'warning': WARN, 'warn': WARN, 'failed': WARN, 'debug': DEBUG}
+
+# Per-cycle and periodic status lines: off unless the category is at debug
+DEBUG_LINES = [re.compile(p) for p in (
+    r'^DISPLAY_UPDATE:',
+    r'^\[DISPLAY_TASK\]',
+    r'^\[DISPLAY_FLAG_SET\]',
+    r'^controlRelays:',
+    r'^Relay states:',
+    r'^SCHEDULE: Evaluated',
+    r'^WEATHER: Source=',
+    r'^LD2410: Status',
+    r'^LD2410: Presence=',
+    r'^Message arrived',
+    r'^\[TOUCH\]',
+    r'^\[FILTERED\]',
+    r'^Touch at',
+    r'^Published Home Assistant discovery payload',
+    r'^\[Weather\] (?:update\(\)|updateFrom\w+\(\)) - (?:starting|calling)',
+    r'^\[Weather\] (?:OWM|HA) - (?:URL|Payload|Sending|Headers|HTTP response|Received|JSON parsed|Extracting|Forecast)',
+    r'^\[Weather\] displayOnTFT\(\)',
+    r'^[a-z][A-Za-z0-9]*: %',              # loadSettings() dump
+)]
+
+# Comments, literals and the calls themselves
+TOKEN_RE = re.compile(r'//[^\n]*|/\*.*?\*/|"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\'|\bdebugLog\s*\(', re.S)
+LITERAL_RE = re.compile(r'\s*"((?:\\.|[^"\\\n])*)"')
+FUNCTION_RE = re.compile(r'^(?!(?:if|else|for|while|switch|return|do|case)\b)[A-Za-z_][\w:<>,\*&\s]*?'
+                         r'\b((?:\w+::)?~?\w+)\s*\([^;{}]*\)\s*(?:const\s*)?\{?\s*$', re.M)
+SERIAL_RE = re.compile(r'\bSerial\.print(?:ln|f)?\s*\(')
+TAG_RE = re.compile(r'\[([^\]\n]{1,32})\]\s*')
+# An upper-case tag ("WEATHER CONFIG:") or an identifier that is not a "name: %d" dump
+PREFIX_RE = re.compile(r'([A-Z][A-Z0-9_ ]{0,30}[A-Z0-9]|[A-Za-z]\w{0,30}):\s(?!%)')
+# Level stated at the start of the message ("ERROR: ...", "✗ Failed to ...")
+MESSAGE_LEVEL_RE = re.compile(r'[^\w%]*(?:(ERROR|Error)|(WARNING|Warning|WARN)|(Failed|FAILED))\b')
+# Level stated anywhere in the message ("Write error", "Update FAILED", "mount failed"); "Error=%s" is a field
+ERROR_WORD_RE = re.compile(r'\b(?:ERROR|Error|error|FAILED)\b(?!=)')
+WARN_WORD_RE = re.compile(r'\b(?:WARNING|Warning|warning|Invalid|invalid)\b')
+# Failures, including lost data ("No memory for", "is damaged", "Dropping ... refused"); a warning if recovered
+FAIL_WORD_RE = re.compile(r'\b(?:[Ff]ail|[Ff]ailed|[Ff]ailure|No memory|[Oo]ut of memory|damaged|corrupt|refused|Dropping)\b')
+RECOVERY_RE = re.compile(r'\b(?:skipping|skipped|retry|retrying|fallback|falling back|instead|direct|again)\b')
+# Leveled calls below warn, to catch failure lines that were tagged as info
+LEVELED_RE = re.compile(r'//[^\n]*|/\*.*?\*/|"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\'|\bLOG_([IDV])\s*\(\s*(\w+)\s*,', re.S)
+
+
+# ============================================================================
+# CLASSIFICATION
+# ============================================================================
+
+def split_words(name):
+    """Lower-case words of a tag, camelCase function or file name."""
+    words = []
+    for part in re.split(r'[^A-Za-z0-9]+', name.replace('WiFi', 'Wifi')):
+        words += re.findall(r'[A-Z0-9]+(?![a-z])|[A-Z]?[a-z0-9]+', part)
+    return [w.lower() for w in words if w]
+
+
+def word_category(words):
+    for word in words:
+        if word in WORD_CATEGORIES:
+            return WORD_CATEGORIES[word]
+    return None
+
+
+def word_level(words):
+    for word in words:
+        if word in LEVEL_WORDS:
+            return LEVEL_WORDS[word]
+    return None
+
+
+def message_level(text):
+    match = MESSAGE_LEVEL_RE.match(text)
+    if match:
+        return ERROR if match.group(1) else WARN
+    if ERROR_WORD_RE.search(text):
+        return ERROR
+    if WARN_WORD_RE.search(text):
+        return WARN
+    if FAIL_WORD_RE.search(text):
+        return WARN if RECOVERY_RE.search(text) else ERROR
+    return None
+
+
+def classify(text, function, path):
+    """(category, level) for a format string."""
+    body = re.sub(r'^(?:\\n)+', '', text)
+    category = level = None
+    rest = body
+    match = TAG_RE.match(body) or PREFIX_RE.match(body)
+    if match:
+        words = split_words(match.group(1))
+        category = word_category(words)
+        level = word_level(words)
+        rest = body[match.end():]
+        if category is None:
+            # Level-only tag such as [DEBUG] or ERROR: - try the message's first word
+            first = re.match(r'(\w+)', rest)
+            if first:
+                category = word_category(split_words(first.group(1)))
+    if level is None:
+        level = message_level(rest)
+    if category is None and function:
+        category = word_category(split_words(function))
+    if category is None:
+        category = word_category(split_words(rest))
+    if category is None:
+        category = word_category(split_words(os.path.splitext(os.path.basename(path))[0])) or 'SYSTEM'
+    if level is None:
+        level = DEBUG if any(p.search(body) for p in DEBUG_LINES) else INFO
+    return category, level
+
+
+# ============================================================================
+# SCANNING
+# ============================================================================
+
+def line_of(source, offset):
+    return source.count('\n', 0, offset) + 1
+
+
+def in_preprocessor(source, offset):
+    """True inside a #define (including continuation lines)."""
+    start = source.rfind('\n', 0, offset) + 1
+    while start > 1 and source[start - 2] == '\\':
+        start = source.rfind('\n', 0, start - 1) + 1
+    return source[start:offset].lstrip().startswith('#')
+
+
+def function_spans(source):
+    """(offset, name) of each function definition, in order."""
+    return [(m.start(), m.group(1)) for m in FUNCTION_RE.finditer(source)]
+
+
+def enclosing(spans, offset):
+    name = None
+    for start, function in spans:
+        if start > offset:
+            break
+        name = function
+    return name
+
+
+def find_calls(source):
+    """Bare debugLog( call sites: dicts with offset, end (after the paren), literal, function."""
+    spans = function_spans(source)
+    calls = []
+    for match in TOKEN_RE.finditer(source):
+        token = match.group(0)
+        if not token.startswith('debugLog'):
+            continue
+        before = source[:match.start()].rstrip()
+        if before.endswith('void') or in_preprocessor(source, match.start()):
+            continue            # The definition/declarations and Log.h's own macro
+        literal = None
+        pos = match.end()
+        parts = []
+        while True:
+            lit = LITERAL_RE.match(source, pos)
+            if not lit:
+                break
+            parts.append(lit.group(1))
+            pos = lit.end()
+        if parts:
+            literal = ''.join(parts)
+        calls.append({'offset': match.start(), 'end': match.end(), 'literal': literal,
+                      'function': enclosing(spans, match.start())})
+    return calls
+
+
+def find_understated(source, path):
+    """LOG_I/LOG_D/LOG_V calls whose message reports a failure: dicts with offset, line, category, level."""
+    spans = function_spans(source)
+    calls = []
+    for match in LEVELED_RE.finditer(source):
+        if not match.group(1) or in_preprocessor(source, match.start()):
+            continue
+        parts = []
+        pos = match.end()
+        while True:
+            lit = LITERAL_RE.match(source, pos)
+            if not lit:
+                break
+            parts.append(lit.group(1))
+            pos = lit.end()
+        if not parts:
+            continue
+        level = classify(''.join(parts), enclosing(spans, match.start()), path)[1]
+        if level <= WARN:
+            calls.append({'offset': match.start(), 'line': line_of(source, match.start()),
+                          'category': match.group(2), 'level': level, 'literal': ''.join(parts),
+                          'was': 'LOG_' + match.group(1)})
+    return calls
+
+
+def relevel(source, calls):
+    """Swap the macro name of each understated call (same length, so nothing else moves)."""
+    for call in calls:
+        offset = call['offset']
+        source = source[:offset] + MACROS[call['level']] + source[offset + len(call['was']):]
+    return source
+
+
+def assign(calls, path):
+    """Fill in category/level, carrying them across continued and detail lines."""
+    previous = head = None
+    for call in calls:
+        text = call['literal']
+        category, level = classify(text or '', call['function'], path)
+        same = previous is not None and previous['function'] == call['function'] and text is not None
+        detail = text is not None and re.match(r'(?:\\n)*[ \t]', text) is not None \
+            and TAG_RE.match(text.lstrip()) is None
+        if same and not previous['ends_line']:
+            category, level = previous['category'], previous['level']
+        elif same and detail and head is not None and head['function'] == call['function']:
+            own = message_level(re.sub(r'^(?:\\n)+', '', text))
+            category = head['category']
+            level = own if own is not None and own < head['level'] else head['level']
+        else:
+            head = call
+        call['category'] = category
+        call['level'] = level
+        call['ends_line'] = text is None or text.endswith('\\n')
+        previous = call
+    return calls
+
+
+def ungated_output(source):
+    """Line numbers of Serial.print calls outside debugLog() itself."""
+    spans = function_spans(source)
+    lines = []
+    for match in SERIAL_RE.finditer(source):
+        if enclosing(spans, match.start()) != 'debugLog':
+            lines.append(line_of(source, match.start()))
+    return lines
+
+
+# ============================================================================
+# REWRITING
+# ============================================================================
+
+def add_include(source):
+    if '#include "Log.h"' in source:
+        return source
+    spans = function_spans(source)
+    limit = spans[0][0] if spans else len(source)
+    includes = list(re.finditer(r'^#include[^\n]*\n', source[:limit], re.M))
+    local = [m for m in includes if m.group(0).startswith('#include "')]
+    last = (local or includes or [None])[-1]
+    if last is None:
+        return '#include "Log.h"\n' + source
+    return source[:last.end()] + '#include "Log.h"\n' + source[last.end():]
+
+
+def call_close(source, pos):
+    """Offset of the parenthesis closing the call whose arguments start at pos."""
+    depth = 1
+    for match in re.finditer(r'"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\'|//[^\n]*|/\*.*?\*/|[()]', source[pos:], re.S):
+        token = match.group(0)
+        if token == '(':
+            depth += 1
+        elif token == ')':
+            depth -= 1
+            if depth == 0:
+                return pos + match.start()
+    return len(source)
+
+
+def convert(source, calls):
+    out = []
+    pos = 0
+    for call in calls:
+        out.append(source[pos:call['offset']])
+        macro = '%s(%s, ' % (MACROS[call['level']], call['category'])
+        out.append(macro)
+        pos = call['end']
+        while pos < len(source) and source[pos] in ' \t':
+            pos += 1
+        # Arguments continued on later lines were aligned under the old call: shift them along
+        close = call_close(source, pos)
+        shift = ' ' * (len(macro) - (pos - call['offset']))
+        out.append(source[pos:close].replace('\n', '\n' + shift) if shift else source[pos:close])
+        pos = close
+    out.append(source[pos:])
+    converted = ''.join(out)
+    return add_include(converted) if calls else converted
+
+
+def default_files(project_dir):
+    files = []
+    for pattern in ('src/*.cpp', 'src/*.h', 'include/*.h'):
+        files += glob.glob(os.path.join(project_dir, pattern))
+    return sorted(f for f in files if os.path.basename(f) not in ('Log.h', 'Log.cpp', 'WebAssets.h'))
+
+
+def print_summary(results):
+    counts = {}
+    for path, calls, _, _ in results:
+        for call in calls:
+            key = (call['category'], call['level'])
+            counts[key] = counts.get(key, 0) + 1
+    print('%-10s %6s %6s %6s %6s' % ('category', 'error', 'warn', 'info', 'debug'))
+    for category in CATEGORIES:
+        row = [counts.get((category, level), 0) for level in (ERROR, WARN, INFO, DEBUG)]
+        if any(row):
+            print('%-10s %6d %6d %6d %6d' % ((category.lower(),) + tuple(row)))
+    total = sum(counts.values())
+    print('%d call(s) in %d file(s)' % (total, sum(1 for r in results if r[1])))
+    for path, _, _, serial in results:
+        for line in serial:
+            print('%s:%d: Serial.print bypasses the logger' % (os.path.relpath(path), line))
+
+
+def print_list(path, source, calls):
+    for call in calls:
+        text = (call['literal'] or '<not a literal>').replace('\\n', ' ').strip()
+        print('%s:%d: %s(%s) %s' % (os.path.relpath(path), line_of(source, call['offset']),
+                                    MACROS[call['level']], call['category'], text[:70]))
+
+
+# ============================================================================
+# SETTING CHECK
+# ============================================================================
+
+HARNESS = r'''
+#include "Log.h"
+#include <stdio.h>
+#include <string.h>
+
+void debugLog(const char* format, ...) {}
+
+int main() {
+    char line[1024];
+    char levels[512];
+    while (fgets(line, sizeof(line), stdin)) {
+        line[strcspn(line, "\n")] = '\0';
+        bool ok = logApplySetting(line);
+        logFormatLevels(levels, sizeof(levels));
+        printf("%d %s\n", ok ? 1 : 0, levels);
+    }
+    return 0;
+}
+'''
+
+ITEM_LENGTH = 32            # logApplySetting item buffer
+
+
+def model_level(name):
+    if len(name) == 1 and '0' <= name <= '5':
+        return int(name)
+    name = name.lower()
+    if name in LEVELS:
+        return LEVELS.index(name)
+    return 2 if name == 'warning' else None
+
+
+def model_apply(levels, setting):
+    """Python copy of logApplySetting(): (ok, levels)."""
+    new = list(levels)
+    items = [item for item in re.split(r'[, \t\r\n]', setting) if item]
+    if not items:
+        return False, levels
+    for item in items:
+        if len(item) >= ITEM_LENGTH:
+            return False, levels
+        name, equals, level_name = item.partition('=')
+        level = model_level(level_name if equals else item)
+        if level is None:
+            return False, levels
+        if not equals or name.lower() == 'all':
+            new = [level] * len(CATEGORIES)
+            continue
+        if name.lower() not in [c.lower() for c in CATEGORIES]:
+            return False, levels
+        new[[c.lower() for c in CATEGORIES].index(name.lower())] = level
+    return True, new
+
+
+def model_format(levels):
+    return ','.join('%s=%s' % (c.lower(), LEVELS[l]) for c, l in zip(CATEGORIES, levels))
+
+
+def random_setting(rng):
+    words = [c.lower() for c in CATEGORIES] + ['all', 'bogus', 'MQTT', 'Sensor', '']
+    levels = list(LEVELS) + ['warning', 'DEBUG', 'Info', '0', '3', '5', '6', 'loud', '']
+    items = []
+    for _ in range(rng.randint(0, 4)):
+        kind = rng.random()
+        if kind < 0.25:
+            items.append(rng.choice(levels))
+        elif kind < 0.9:
+            items.append('%s=%s' % (rng.choice(words), rng.choice(levels)))
+        elif kind < 0.95:
+            items.append('x' * rng.randint(28, 40) + '=debug')
+        else:
+            items.append('mqtt=debug=1')
+    separators = [',', ' ', ', ', '\t', ',,']
+    return ''.join(item + rng.choice(separators) for item in items).rstrip(' \t,') if items else rng.choice(['', ' ', ','])
+
+
+def build_harness(cxx, project_dir, work_dir):
+    source = os.path.join(work_dir, 'harness.cpp')
+    binary = os.path.join(work_dir, 'harness')
+    with open(source, 'w') as f:
+        f.write(HARNESS)
+    subprocess.run([cxx, '-O2', '-std=c++11', '-Wall', '-I', os.path.join(project_dir, 'include'), source,
+                    os.path.join(project_dir, 'src', 'Log.cpp'), '-o', binary], check=True)
+    return binary
+
+
+def setting_check(args):
+    if shutil.which(args.cxx) is None:
+        print('Error: %s not found' % args.cxx)
+        return 1
+    work_dir = tempfile.mkdtemp(prefix='log_')
+    try:
+        binary = build_harness(args.cxx, args.project_dir, work_dir)
+        failed = 0
+        accepted = 0
+        total = 0
+        for seed in range(args.seed, args.seed + args.rounds):
+            rng = random.Random(seed)
+            settings = [random_setting(rng) for _ in range(20)]
+            levels = [LEVELS.index('info')] * len(CATEGORIES)
+            expected = []
+            for setting in settings:
+                ok, levels = model_apply(levels, setting)
+                accepted += ok
+                expected.append('%d %s' % (ok, model_format(levels)))
+            total += len(settings)
+            actual = subprocess.run([binary], input=''.join(s + '\n' for s in settings),
+                                    stdout=subprocess.PIPE, text=True, check=True).stdout.splitlines()
+            if actual != expected:
+                failed += 1
+                line = next(i for i, (a, e) in enumerate(zip(actual + [''] * len(expected), expected)) if a != e)
+                print('FAIL seed %d setting %r: got %r, expected %r' % (
+                    seed, settings[line], actual[line] if line < len(actual) else '', expected[line]))
+        print('%d rounds, %d settings, %d accepted' % (args.rounds, total, accepted))
+        if failed:
+            print('%d rounds FAILED' % failed)
+            return 1
+        print('logApplySetting matches the model')
+        return 0
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Retag debugLog() calls as leveled, categorized log macros')
+    parser.add_argument('files', nargs='*', help='Sources to convert (default src/ and include/)')
+    parser.add_argument('--write', action='store_true', help='Rewrite the files')
+    parser.add_argument('--diff', action='store_true', help='Print a unified diff of the changes')
+    parser.add_argument('--list', action='store_true', help='Print every call with its macro and category')
+    parser.add_argument('--check', action='store_true', help='Exit 1 if any bare debugLog() calls remain')
+    parser.add_argument('--setting-check', action='store_true',
+                        help='Compare the compiled logApplySetting() with the model instead')
+    parser.add_argument('--rounds', type=int, default=200, help='Random rounds for --setting-check (default 200)')
+    parser.add_argument('--seed', type=int, default=1, help='First --setting-check seed')
+    parser.add_argument('--cxx', default=os.environ.get('CXX', 'c++'), help='Host C++ compiler (default c++)')
+    parser.add_argument('--project-dir', default=os.path.dirname(os.path.abspath(__file__)))
+    args = parser.parse_args()
+
+    if args.setting_check:
+        return setting_check(args)
+
+    results = []
+    understated = {}
+    for path in args.files or default_files(args.project_dir):
+        with open(path) as f:
+            source = f.read()
+        calls = assign(find_calls(source), path)
+        results.append((path, calls, source, ungated_output(source)))
+        understated[path] = find_understated(source, path)
+
+    if args.check:
+        remaining = [(path, line_of(source, call['offset'])) for path, calls, source, _ in results for call in calls]
+        for path, line in remaining:
+            print('%s:%d: bare debugLog()' % (os.path.relpath(path), line))
+        for path, calls in understated.items():
+            for call in calls:
+                print('%s:%d: %s reports a failure, expected %s' % (
+                    os.path.relpath(path), call['line'], call['was'], MACROS[call['level']]))
+        return 1 if remaining or any(understated.values()) else 0
+
+    for path, calls, source, _ in results:
+        if not calls and not understated[path]:
+            continue
+        if args.list:
+            print_list(path, source, calls)
+            for call in understated[path]:
+                print('%s:%d: %s -> %s(%s) %s' % (os.path.relpath(path), call['line'], call['was'],
+                                                  MACROS[call['level']], call['category'],
+                                                  call['literal'].replace('\\n', ' ').strip()[:60]))
+        converted = convert(relevel(source, understated[path]), calls)
+        if args.diff:
+            name = os.path.relpath(path)
+            sys.stdout.writelines(difflib.unified_diff(source.splitlines(True), converted.splitlines(True),
+                                                       'a/' + name, 'b/' + name))
+        if args.write:
+            with open(path, 'w') as f:
+                f.write(converted)
+    print_summary(results)
+    raised = sum(len(calls) for calls in understated.values())
+    if raised:
+        print('%d leveled call(s) report a failure below warn' % raised)
+    if not args.write:
+        print('(dry run - use --write to apply)')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
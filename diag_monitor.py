@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Poll the /api/diag diagnostics history from a fleet of thermostats and flag
+heap fragmentation trends before they turn into crashes.
+
+Each device keeps about an hour of 30-second samples (DiagnosticsHistory).
+The binary dump (?format=bin) is decoded and for every device we report:
+  - current free heap, largest free block and low-water mark
+  - the trend of the largest free block (bytes/hour, least squares)
+  - the fragmentation ratio (largest / free) and how it is moving
+  - busiest task CPU and HTTP/MQTT request rates
+CPU figures are percent of one core, so on the dual-core S3 the task columns
+add up to 200%. A firmware built without FreeRTOS run-time stats reports
+them as unavailable (None here, -1 in --csv-dir dumps).
+A device is flagged when the largest block is shrinking fast enough to reach
+the --min-block threshold within --horizon hours, or is already below it.
+
+Usage:
+  python3 diag_monitor.py thermostat1.local 192.168.1.50 ...
+  python3 diag_monitor.py --hosts-file fleet.txt --watch 300
+  python3 diag_monitor.py --csv-dir diag_dumps host1 host2
+"""
+
+import argparse
+import concurrent.futures
+import os
+import struct
+import sys
+import time
+import urllib.request
+
+HEADER = struct.Struct('<IBBHHH')
+MAGIC = 0x47414944
+TASKS = ['loop', 'sensor', 'display', 'async_tcp', 'idle0', 'idle1', 'other']
+FIELDS = ['uptime_s', 'heap_free', 'heap_largest', 'heap_min_free',
+          'alloc_blocks', 'free_blocks', 'stack_loop', 'stack_sensor', 'stack_display']
+COUNTERS = ['mqtt_rx', 'mqtt_publishes', 'mqtt_reconnects', 'http_requests']
+CPU_UNAVAILABLE = 0xFF      # DIAG_CPU_UNAVAILABLE
+
+
+def sample_struct(task_count):
+    return struct.Struct('<IIIIHHHHH%dBHHHH' % task_count)
+
+
+def decode(blob):
+    """Decode the binary /api/diag dump into (interval_sec, [sample dicts])."""
+    if len(blob) < HEADER.size:
+        raise ValueError('short response (%d bytes)' % len(blob))
+    magic, version, task_count, sample_size, count, interval = HEADER.unpack_from(blob)
+    if magic != MAGIC:
+        raise ValueError('bad magic 0x%08x' % magic)
+    if version != 1:
+        raise ValueError('unsupported version %d' % version)
+    layout = sample_struct(task_count)
+    if layout.size != sample_size:
+        raise ValueError('sample size %d, expected %d' % (sample_size, layout.size))
+
+    samples = []
+    offset = HEADER.size
+    for _ in range(count):
+        values = layout.unpack_from(blob, offset)
+        offset += sample_size
+        sample = dict(zip(FIELDS, values[:len(FIELDS)]))
+        cpu = values[len(FIELDS):len(FIELDS) + task_count]
+        sample['cpu'] = {t: None if v == CPU_UNAVAILABLE else v for t, v in zip(TASKS, cpu)}
+        sample.update(zip(COUNTERS, values[len(FIELDS) + task_count:]))
+        samples.append(sample)
+    return interval, samples
+
+
+def fetch(host, timeout):
+    url = host if host.startswith('http') else 'http://%s' % host
+    with urllib.request.urlopen(url.rstrip('/') + '/api/diag?format=bin', timeout=timeout) as response:
+        return response.read()
+
+
+def slope(xs, ys):
+    """Least-squares slope of ys over xs (units of y per unit of x)."""
+    n = len(xs)
+    if n < 2:
+        return 0.0
+    mean_x = sum(xs) / n
+    mean_y = sum(ys) / n
+    sxx = sum((x - mean_x) ** 2 for x in xs)
+    if sxx == 0:
+        return 0.0
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / sxx
+
+
+def analyze(host, interval, samples, min_block, horizon_hours):
+    if not samples:
+        return {'host': host, 'status': 'NO DATA'}
+    last = samples[-1]
+    hours = [s['uptime_s'] / 3600.0 for s in samples]
+    largest_trend = slope(hours, [s['heap_largest'] for s in samples])
+    frag = [s['heap_largest'] / s['heap_free'] if s['heap_free'] else 0.0 for s in samples]
+    frag_trend = slope(hours, frag)
+    span_sec = max(samples[-1]['uptime_s'] - samples[0]['uptime_s'], interval)
+
+    status = 'OK'
+    eta = None
+    if last['heap_largest'] < min_block:
+        status = 'CRITICAL'
+    elif largest_trend < 0:
+        eta = (last['heap_largest'] - min_block) / -largest_trend
+        if eta < horizon_hours:
+            status = 'WARN'
+
+    measured = [t for t in TASKS if not t.startswith('idle') and last['cpu'].get(t) is not None]
+    busiest = max(measured, key=lambda t: last['cpu'][t]) if measured else None
+    return {
+        'host': host,
+        'status': status,
+        'uptime_h': last['uptime_s'] / 3600.0,
+        'free': last['heap_free'],
+        'largest': last['heap_largest'],
+        'min_free': last['heap_min_free'],
+        'largest_trend': largest_trend,
+        'frag': frag[-1],
+        'frag_trend': frag_trend,
+        'eta_h': eta,
+        'busiest': '%s %d%%' % (busiest, last['cpu'][busiest]) if busiest else 'cpu n/a',
+        'http_per_min': sum(s['http_requests'] for s in samples) * 60.0 / span_sec,
+        'mqtt_per_min': sum(s['mqtt_rx'] for s in samples) * 60.0 / span_sec,
+    }
+
+
+def write_csv(path, samples):
+    with open(path, 'w') as f:
+        f.write(','.join(FIELDS + ['cpu_' + t for t in TASKS] + COUNTERS) + '\n')
+        for s in samples:
+            cpu = [-1 if s['cpu'][t] is None else s['cpu'][t] for t in TASKS]
+            row = [s[k] for k in FIELDS] + cpu + [s[k] for k in COUNTERS]
+            f.write(','.join(str(v) for v in row) + '\n')
+
+
+def poll(host, args):
+    try:
+        interval, samples = decode(fetch(host, args.timeout))
+    except Exception as e:
+        return {'host': host, 'status': 'ERROR', 'error': str(e)}, None
+    return analyze(host, interval, samples, args.min_block, args.horizon), samples
+
+
+def print_report(results):
+    print('%-24s %-8s %7s %8s %8s %8s %10s %6s %8s %-16s %7s %7s' % (
+        'HOST', 'STATUS', 'UP(h)', 'FREE', 'LARGEST', 'MINFREE', 'LRG B/h', 'FRAG', 'ETA(h)',
+        'BUSIEST', 'HTTP/m', 'MQTT/m'))
+    order = {'CRITICAL': 0, 'WARN': 1, 'ERROR': 2, 'NO DATA': 3, 'OK': 4}
+    for r in sorted(results, key=lambda r: (order.get(r['status'], 5), r['host'])):
+        if r['status'] in ('ERROR', 'NO DATA'):
+            print('%-24s %-8s %s' % (r['host'], r['status'], r.get('error', '')))
+            continue
+        print('%-24s %-8s %7.1f %8d %8d %8d %+10.0f %6.2f %8s %-16s %7.1f %7.1f' % (
+            r['host'], r['status'], r['uptime_h'], r['free'], r['largest'], r['min_free'],
+            r['largest_trend'], r['frag'],
+            '%.1f' % r['eta_h'] if r['eta_h'] is not None else '-',
+            r['busiest'], r['http_per_min'], r['mqtt_per_min']))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Poll thermostat diagnostics history and flag heap trends')
+    parser.add_argument('hosts', nargs='*', help='Device hostnames or IPs')
+    parser.add_argument('--hosts-file', help='File with one host per line')
+    parser.add_argument('--min-block', type=int, default=16384,
+                        help='Largest free block considered unsafe (default 16384 bytes)')
+    parser.add_argument('--horizon', type=float, default=24.0,
+                        help='Warn when the largest block would hit --min-block within this many hours')
+    parser.add_argument('--timeout', type=float, default=10.0, help='HTTP timeout per device')
+    parser.add_argument('--workers', type=int, default=16, help='Concurrent requests')
+    parser.add_argument('--watch', type=int, default=0, help='Repeat every N seconds')
+    parser.add_argument('--csv-dir', help='Also save each device history as CSV here')
+    args = parser.parse_args()
+
+    hosts = list(args.hosts)
+    if args.hosts_file:
+        with open(args.hosts_file) as f:
+            hosts += [line.strip() for line in f if line.strip() and not line.startswith('#')]
+    if not hosts:
+        parser.error('no hosts given')
+    if args.csv_dir:
+        os.makedirs(args.csv_dir, exist_ok=True)
+
+    while True:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=args.workers) as pool:
+            outcomes = list(pool.map(lambda h: poll(h, args), hosts))
+        results = [o[0] for o in outcomes]
+        if args.csv_dir:
+            for host, (_, samples) in zip(hosts, outcomes):
+                if samples:
+                    write_csv(os.path.join(args.csv_dir, host.replace('/', '_').replace(':', '_') + '.csv'), samples)
+        print_report(results)
+        if not args.watch:
+            break
+        print()
+        time.sleep(args.watch)
+
+    return 1 if any(r['status'] in ('WARN', 'CRITICAL') for r in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
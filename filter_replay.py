@@ -0,0 +1,440 @@
+#!/usr/bin/env python3
+"""
+Replay recorded sensor traces through the firmware's filter pipeline
+(include/SensorFilter.h: Hampel outlier rejection -> median -> EMA) and show
+what each setting would have done to the relays.
+
+For every trace and filter setting it reports:
+  - relay transitions of a heat-mode hysteresis controller fed with the
+    filtered value (same rule as controlRelays: on below setpoint - swing,
+    off at setpoint), and how many of the on-cycles were shorter than
+    --min-cycle (short-cycling)
+  - outliers rejected by the Hampel stage
+  - value changes at 0.1 resolution (what MQTT would publish)
+  - tracking error against a centered (zero-lag) median of the raw trace
+  - lag: the shift that best aligns the filtered trace with the raw one
+The first row is always the raw trace with no filtering.
+
+Traces are CSV files with a header; --column picks the value column
+(default temp). Samples are assumed --interval seconds apart (the sensor
+task runs every 5 s). Values are in Celsius unless --fahrenheit is given;
+the filter always runs in Celsius like the firmware does.
+
+The filter here is a Python port of the header. --filter-check needs no
+trace: it compiles include/SensorFilter.h with --cxx into a small harness and
+feeds random traces (drift, noise, spikes, steps, failed reads) through both
+with random settings, comparing every output and the rejected count. The
+firmware computes in float and the port in double, so a Hampel decision that
+lands within rounding of the threshold is reported as a tie and ends that
+round rather than failing it.
+
+Usage:
+  python3 filter_replay.py trace.csv
+  python3 filter_replay.py --sweep --setpoint 21 --swing 0.5 trace1.csv trace2.csv
+  python3 filter_replay.py --config 5,3,0.1,0.1 --config 7,3,0.1,0.2 trace.csv
+  python3 filter_replay.py --synthetic 2000 --sweep
+  python3 filter_replay.py --filter-check --rounds 500
+"""
+
+import argparse
+import csv
+import math
+import os
+import random
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+
+MAX_WINDOW = 9
+MAD_SCALE = 1.4826
+
+# Same values as TEMP_FILTER_CONFIG / the old EMA-only filter in Main-Thermostat.cpp
+FIRMWARE_CONFIG = (5, 3.0, 0.1, 0.1)
+EMA_ONLY_CONFIG = (1, 0.0, 0.0, 0.1)
+
+CHECK_TOLERANCE = 1e-3     # Output difference allowed between the float firmware and this double port
+TIE_TOLERANCE = 1e-5       # Relative distance from the Hampel threshold treated as a rounding tie
+
+HARNESS = r'''
+#include "SensorFilter.h"
+#include <stdio.h>
+#include <stdlib.h>
+
+int main() {
+    static char line[64];
+    SensorFilterConfig config;
+    int window;
+    // First line: window hampelK minDeviation emaAlpha, then one reading per line
+    if (!fgets(line, sizeof(line), stdin) ||
+        sscanf(line, "%d %f %f %f", &window, &config.hampelK, &config.minDeviation, &config.emaAlpha) != 4) {
+        return 1;
+    }
+    config.window = (uint8_t)window;
+    SensorFilter filter(config);
+    while (fgets(line, sizeof(line), stdin)) {
+        float output = filter.update(strtof(line, NULL));
+        printf("%.6f %u\n", output, (unsigned)filter.rejectedCount());
+    }
+    fflush(stdout);
+    return 0;
+}
+'''
+
+
+def median(values):
+    ordered = sorted(values)
+    n = len(ordered)
+    return ordered[n // 2] if n % 2 else 0.5 * (ordered[n // 2 - 1] + ordered[n // 2])
+
+
+class SensorFilter:
+    """Line-by-line port of SensorFilter in include/SensorFilter.h."""
+
+    def __init__(self, window, hampel_k, min_deviation, ema_alpha):
+        self.window = max(1, min(MAX_WINDOW, int(window)))
+        self.hampel_k = hampel_k
+        self.min_deviation = min_deviation
+        self.ema_alpha = ema_alpha
+        self.raw = [0.0] * self.window
+        self.cleaned = [0.0] * self.window
+        self.count = 0
+        self.head = 0
+        self.output = None
+        self.rejected = 0
+        self.margin = None         # Distance from the Hampel threshold in the last update (--filter-check)
+
+    def update(self, value):
+        self.margin = None
+        if value is None or math.isnan(value):
+            return self.output
+        slot = self.head
+        self.head = (self.head + 1) % self.window
+        if self.count < self.window:
+            self.count += 1
+
+        self.raw[slot] = value
+        if self.count >= 3 and self.hampel_k > 0:
+            window = self.raw[:self.count]
+            med = median(window)
+            mad = median([abs(v - med) for v in window]) * MAD_SCALE
+            mad = max(mad, self.min_deviation)
+            self.margin = (abs(value - med) - self.hampel_k * mad) / (self.hampel_k * mad or 1.0)
+            if abs(value - med) > self.hampel_k * mad:
+                value = med
+                self.rejected += 1
+        self.cleaned[slot] = value
+
+        med = median(self.cleaned[:self.count])
+        if self.output is None:
+            self.output = med
+        else:
+            self.output = self.ema_alpha * med + (1.0 - self.ema_alpha) * self.output
+        return self.output
+
+
+# ============================================================================
+# TRACES
+# ============================================================================
+
+def load_trace(path, column, fahrenheit):
+    values = []
+    with open(path, newline='') as f:
+        reader = csv.DictReader(f)
+        if column not in (reader.fieldnames or []):
+            raise ValueError('%s has no column %r (columns: %s)' % (path, column, ', '.join(reader.fieldnames or [])))
+        for row in reader:
+            try:
+                value = float(row[column])
+            except (TypeError, ValueError):
+                value = float('nan')
+            values.append((value - 32.0) * 5.0 / 9.0 if fahrenheit else value)
+    return values
+
+
+def synthetic_trace(samples, seed):
+    """Slow room drift with sensor noise, quantization and occasional bad reads."""
+    rng = random.Random(seed)
+    values = []
+    for i in range(samples):
+        t = i * 5.0
+        value = 21.0 + 0.6 * math.sin(t / 1800.0) + 0.2 * math.sin(t / 240.0) + rng.gauss(0, 0.04)
+        if rng.random() < 0.01:
+            value += rng.choice((-1, 1)) * rng.uniform(1.5, 8.0)   # I2C glitch / self-heating spike
+        if rng.random() < 0.002:
+            value = float('nan')                                 # failed read
+        values.append(round(value, 2))
+    return values
+
+
+# ============================================================================
+# EVALUATION
+# ============================================================================
+
+def run_filter(values, config):
+    sensor_filter = SensorFilter(*config)
+    out = []
+    last = values[0]
+    for value in values:
+        result = sensor_filter.update(value)
+        last = result if result is not None else last
+        out.append(last)
+    return out, sensor_filter.rejected
+
+
+def relay_cycles(values, setpoint, swing, interval, min_cycle):
+    """Transitions and short on-cycles of the heat-mode hysteresis rule."""
+    heating = False
+    transitions = 0
+    short = 0
+    on_since = 0
+    for i, value in enumerate(values):
+        if value is None or math.isnan(value):
+            continue
+        if not heating and value < setpoint - swing:
+            heating = True
+            transitions += 1
+            on_since = i
+        elif heating and value >= setpoint:
+            heating = False
+            transitions += 1
+            if (i - on_since) * interval < min_cycle:
+                short += 1
+    return transitions, short
+
+
+def published_changes(values):
+    changes = 0
+    last = None
+    for value in values:
+        if value is None or math.isnan(value):
+            continue
+        rounded = round(value, 1)
+        if rounded != last:
+            changes += 1
+            last = rounded
+    return changes
+
+
+def centered_reference(values, width=9):
+    half = width // 2
+    ref = []
+    for i in range(len(values)):
+        window = [v for v in values[max(0, i - half):i + half + 1] if not math.isnan(v)]
+        ref.append(median(window) if window else float('nan'))
+    return ref
+
+
+def tracking_error(values, reference):
+    pairs = [(v, r) for v, r in zip(values, reference) if not math.isnan(v) and not math.isnan(r)]
+    if not pairs:
+        return float('nan')
+    return math.sqrt(sum((v - r) ** 2 for v, r in pairs) / len(pairs))
+
+
+def best_lag(values, reference, max_lag=60):
+    """Sample shift that minimises the error between filtered and reference."""
+    best = (float('inf'), 0)
+    for lag in range(0, max_lag + 1):
+        shifted = values[lag:]
+        error = tracking_error(shifted, reference[:len(shifted)])
+        if error < best[0]:
+            best = (error, lag)
+    return best[1]
+
+
+def evaluate(values, config, args):
+    reference = centered_reference(values)
+    if config is None:
+        filtered = [v if not math.isnan(v) else float('nan') for v in values]
+        rejected = 0
+    else:
+        filtered, rejected = run_filter(values, config)
+    setpoint = args.setpoint if args.setpoint is not None else median([v for v in reference if not math.isnan(v)])
+    transitions, short = relay_cycles(filtered, setpoint, args.swing, args.interval, args.min_cycle)
+    return {
+        'config': config,
+        'transitions': transitions,
+        'short_cycles': short,
+        'rejected': rejected,
+        'published': published_changes(filtered),
+        'rms': tracking_error(filtered, reference),
+        'lag_s': best_lag(filtered, reference) * args.interval,
+    }
+
+
+def parse_config(text):
+    parts = [float(p) for p in text.split(',')]
+    if len(parts) != 4:
+        raise argparse.ArgumentTypeError('expected window,hampelK,minDeviation,emaAlpha')
+    return (int(parts[0]), parts[1], parts[2], parts[3])
+
+
+def sweep_configs():
+    configs = []
+    for window in (1, 3, 5, 7, 9):
+        for hampel_k in ((0.0,) if window == 1 else (2.0, 3.0, 4.0)):
+            for alpha in (0.05, 0.1, 0.2, 0.3, 0.5, 1.0):
+                configs.append((window, hampel_k, FIRMWARE_CONFIG[2], alpha))
+    return configs
+
+
+def format_config(config):
+    if config is None:
+        return 'raw'
+    return 'w=%d k=%.1f dev=%.2f a=%.2f' % config
+
+
+def print_results(title, results, limit):
+    print('\n%s' % title)
+    print('%-30s %6s %6s %8s %9s %8s %7s' % ('FILTER', 'TRANS', 'SHORT', 'REJECTED', 'PUBLISHED', 'RMS', 'LAG s'))
+    for r in results[:limit]:
+        print('%-30s %6d %6d %8d %9d %8.3f %7.0f' % (
+            format_config(r['config']), r['transitions'], r['short_cycles'], r['rejected'],
+            r['published'], r['rms'], r['lag_s']))
+
+
+# ============================================================================
+# FILTER CHECK
+# ============================================================================
+
+def float32(value):
+    return struct.unpack('f', struct.pack('f', value))[0]
+
+
+def check_case(seed):
+    """Random setting and trace; readings are float32 so both sides see the same input."""
+    rng = random.Random(seed)
+    config = (rng.choice((0, 1, 2, 3, 4, 5, 7, 9, 12)), rng.choice((0.0, 2.0, 3.0, 4.5)),
+              float32(rng.choice((0.0, 0.05, 0.1, 0.3))), float32(rng.choice((0.05, 0.1, 0.3, 1.0))))
+    value = rng.uniform(15.0, 30.0)
+    noise = rng.choice((0.0, 0.01, 0.05, 0.2))
+    quantum = rng.choice((None, 0.01, 0.1))
+    values = []
+    for _ in range(rng.randint(1, 600)):
+        value += rng.gauss(0, 0.02)
+        if rng.random() < 0.005:
+            value += rng.uniform(-3.0, 3.0)                       # Step change (door, sensor moved)
+        reading = value + rng.gauss(0, noise)
+        if rng.random() < 0.02:
+            reading += rng.choice((-1, 1)) * rng.uniform(0.5, 8.0)  # Spike
+        if quantum:
+            reading = round(reading / quantum) * quantum
+        values.append(float('nan') if rng.random() < 0.01 else float32(reading))
+    return config, values
+
+
+def compare_case(config, values, actual):
+    """None if the port matches the harness output, 'tie' or a failure message otherwise."""
+    sensor_filter = SensorFilter(*config)
+    for i, value in enumerate(values):
+        expected = sensor_filter.update(value)
+        if i >= len(actual):
+            return 'harness stopped after %d readings' % len(actual)
+        output, rejected = actual[i].split()
+        output, rejected = float(output), int(rejected)
+        if rejected != sensor_filter.rejected:
+            if sensor_filter.margin is not None and abs(sensor_filter.margin) < TIE_TOLERANCE:
+                return 'tie'
+            return 'reading %d (%r): rejected %d, expected %d' % (i, value, rejected, sensor_filter.rejected)
+        if expected is None:
+            if not math.isnan(output):
+                return 'reading %d: output %r, expected no value yet' % (i, output)
+        elif not abs(output - expected) <= CHECK_TOLERANCE:
+            return 'reading %d (%r): output %r, expected %r' % (i, value, output, expected)
+    return None
+
+
+def filter_check(args):
+    if shutil.which(args.cxx) is None:
+        print('Error: %s not found' % args.cxx)
+        return 1
+    work_dir = tempfile.mkdtemp(prefix='filter_')
+    try:
+        source = os.path.join(work_dir, 'harness.cpp')
+        binary = os.path.join(work_dir, 'harness')
+        with open(source, 'w') as f:
+            f.write(HARNESS)
+        subprocess.run([args.cxx, '-O2', '-std=c++11', '-Wall', '-I', os.path.join(args.project_dir, 'include'),
+                        source, '-o', binary], check=True)
+        readings = ties = failed = 0
+        for seed in range(args.seed, args.seed + args.rounds):
+            config, values = check_case(seed)
+            stdin = '%d %r %r %r\n' % config + ''.join('%r\n' % v for v in values)
+            actual = subprocess.run([binary], input=stdin, stdout=subprocess.PIPE,
+                                    text=True, check=True).stdout.splitlines()
+            readings += len(values)
+            problem = compare_case(config, values, actual)
+            if problem == 'tie':
+                ties += 1
+            elif problem:
+                failed += 1
+                print('FAIL seed %d (%s): %s' % (seed, format_config(config), problem))
+        print('%d rounds, %d readings; %d rounds ended at a float/double tie' % (args.rounds, readings, ties))
+        if failed:
+            print('%d rounds FAILED' % failed)
+            return 1
+        print('filter_replay.py SensorFilter matches include/SensorFilter.h')
+        return 0
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay sensor traces through the SensorFilter pipeline')
+    parser.add_argument('traces', nargs='*', help='CSV trace files')
+    parser.add_argument('--column', default='temp', help='Value column (default temp)')
+    parser.add_argument('--fahrenheit', action='store_true', help='Trace values are in Fahrenheit')
+    parser.add_argument('--interval', type=float, default=5.0, help='Seconds between samples (default 5)')
+    parser.add_argument('--setpoint', type=float, help='Heat setpoint in Celsius (default: trace median)')
+    parser.add_argument('--swing', type=float, default=0.5, help='Hysteresis swing in Celsius (default 0.5)')
+    parser.add_argument('--min-cycle', type=float, default=300.0,
+                        help='On-cycles shorter than this many seconds count as short-cycling (default 300)')
+    parser.add_argument('--config', type=parse_config, action='append',
+                        help='Filter setting window,hampelK,minDeviation,emaAlpha (repeatable)')
+    parser.add_argument('--sweep', action='store_true', help='Try a grid of settings and rank them')
+    parser.add_argument('--top', type=int, default=15, help='Rows to show per trace in sweep mode')
+    parser.add_argument('--synthetic', type=int, metavar='SAMPLES', help='Generate a synthetic trace instead')
+    parser.add_argument('--seed', type=int, default=1, help='Seed for --synthetic (first --filter-check seed)')
+    parser.add_argument('--filter-check', action='store_true',
+                        help='Compare this port with the compiled include/SensorFilter.h instead')
+    parser.add_argument('--rounds', type=int, default=200, help='Random traces for --filter-check (default 200)')
+    parser.add_argument('--cxx', default=os.environ.get('CXX', 'c++'), help='Host C++ compiler (default c++)')
+    parser.add_argument('--project-dir', default=os.path.dirname(os.path.abspath(__file__)))
+    args = parser.parse_args()
+
+    if args.filter_check:
+        return filter_check(args)
+
+    traces = []
+    if args.synthetic:
+        traces.append(('synthetic(%d, seed %d)' % (args.synthetic, args.seed), synthetic_trace(args.synthetic, args.seed)))
+    for path in args.traces:
+        try:
+            traces.append((path, load_trace(path, args.column, args.fahrenheit)))
+        except (OSError, ValueError) as e:
+            print('Error: %s' % e)
+            return 1
+    if not traces:
+        parser.error('no traces given (or use --synthetic)')
+
+    configs = args.config or [EMA_ONLY_CONFIG, FIRMWARE_CONFIG]
+    if args.sweep:
+        configs = sweep_configs()
+
+    for name, values in traces:
+        if len(values) < 10:
+            print('%s: too short (%d samples)' % (name, len(values)))
+            continue
+        baseline = evaluate(values, None, args)
+        results = [evaluate(values, config, args) for config in configs]
+        if args.sweep:
+            results.sort(key=lambda r: (r['short_cycles'], r['transitions'], r['rms']))
+        print_results('%s - %d samples (%.1f h)' % (name, len(values), len(values) * args.interval / 3600.0),
+                      [baseline] + results, len(results) + 1 if not args.sweep else args.top + 1)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,542 @@
+#!/usr/bin/env python3
+"""
+Flash and RAM budget of the N8/N16/N32 builds, attributed to source files
+and libraries, checked against each variant's OTA app slot.
+
+Reads the linker map (firmware.map, written next to firmware.elf by the
+-Wl,-Map build flag in platformio.ini) and the ELF symbol table of a build:
+  - Every input section in the map is charged to its object: project sources
+    (src/Main-Thermostat.cpp), PlatformIO libraries (lib:TFT_eSPI,
+    lib:ESPAsyncWebServer), the Arduino core, ESP-IDF components (idf:lwip)
+    and the toolchain (toolchain:libc)
+  - Output sections are grouped into regions: flash code and rodata, IRAM,
+    DRAM data/bss, RTC and PSRAM (.ext_ram.bss). The image is everything the
+    bootloader copies out of flash; DRAM/IRAM are static use against the
+    dram0_0_seg/iram0_0_seg lengths from the map's memory configuration
+  - Symbols matching TAGS (web assets, TFT fonts, ArduinoJson ...) are
+    totalled across objects, since header-only code such as ArduinoJson and
+    the fonts compiled into TFT_eSPI.cpp.o are otherwise invisible
+Without a map only the ELF sections and symbols are used.
+
+The image (firmware.bin, or the loadable sections when it is missing) is
+checked against the smallest app partition of the variant's partition CSV
+(default_8mb.csv: 3.2 MB per OTA slot) and against the N8 slot, since an
+image that outgrows N8 breaks OTA there first. Less than --headroom percent
+free is a warning; with --check either one exits 1.
+
+A build is one of:
+  N8 / N16 / N32 or the env name   newest local build (.pio/build/<env> or
+                                    the build_orchestrator.py build root)
+  a build directory, .map or .elf
+  a build id from build_orchestrator.py's store (firmware/store/manifest.json)
+  a JSON report written with --json
+`diff OLD NEW` compares two builds region by region, group by group and
+symbol by symbol.
+
+Usage:
+  python3 firmware_size.py                         # report every variant that has been built
+  python3 firmware_size.py report N8 --top 30 --symbols 20
+  python3 firmware_size.py report N16 --json before.json
+  python3 firmware_size.py diff before.json N16
+  python3 firmware_size.py diff 3f2a9c1b0d4e N8 --check
+  python3 firmware_size.py report --by object N32
+"""
+
+import argparse
+import glob
+import json
+import os
+import re
+import shutil
+import struct
+import subprocess
+import sys
+
+from build_orchestrator import (PARALLEL_BUILD_DIR, PROJECT_DIR, VARIANTS, app_slot_size, env_option,
+                                load_manifest, object_path, parse_partitions, variant_info)
+
+# Output section -> region; first match wins
+REGIONS = [
+    (r'\.flash\.text|\.text$', 'flash_code'),
+    (r'\.flash\.(?:rodata|appdesc)|\.flash_rodata|\.rodata$', 'flash_rodata'),
+    (r'\.iram0\.bss', 'iram_bss'),
+    (r'\.iram0\.', 'iram'),
+    (r'\.dram0\.data|\.data$', 'dram_data'),
+    (r'\.dram0\.bss|\.noinit|\.bss$', 'dram_bss'),
+    (r'\.rtc.*bss', 'rtc_bss'),
+    (r'\.rtc', 'rtc'),
+    (r'\.ext_ram', 'psram'),
+]
+# Regions copied out of the image at boot, and what each counts against
+IMAGE_REGIONS = ('flash_code', 'flash_rodata', 'iram', 'dram_data', 'rtc')
+MEMORY = {'flash': ('flash_code', 'flash_rodata'), 'iram': ('iram', 'iram_bss'),
+          'dram': ('dram_data', 'dram_bss'), 'psram': ('psram',)}
+SEGMENTS = {'dram': 'dram0_0_seg', 'iram': 'iram0_0_seg'}
+
+# Symbol buckets that cut across objects
+TAGS = [
+    ('web assets', r'^WEB_ASSET_'),
+    ('TFT fonts', r'^(?:chr_f\w+|chrtbl_f\w+|widtbl_f\w+|font|\w+\d+pt7b(?:Bitmaps|Glyphs)?)$'),
+    ('ArduinoJson', r'ArduinoJson'),
+    ('TFT_eSPI', r'TFT_eSPI|TFT_eSprite'),
+    ('web server', r'AsyncWebServer|AsyncEventSource|AsyncWebSocket'),
+    ('debug log ring', r'^(?:debugBuffer\w*|addToDebugBuffer)'),
+]
+
+N8_CHIP = 'N8'
+DEFAULT_HEADROOM = 5.0              # Percent of the app slot left free
+MAP_NAME = 'firmware.map'
+ELF_NAME = 'firmware.elf'
+BIN_NAME = 'firmware.bin'
+
+OUTPUT_RE = re.compile(r'^(\.[\w.$]+|/DISCARD/|COMMON)(?:\s+(0x[0-9a-f]+)\s+(0x[0-9a-f]+))?', re.I)
+INPUT_RE = re.compile(r'^ (\S+)(?:\s+(0x[0-9a-f]+)\s+(0x[0-9a-f]+)\s+(\S.*))?$', re.I)
+CONTINUATION_RE = re.compile(r'^\s+(0x[0-9a-f]+)\s+(0x[0-9a-f]+)\s+(\S.*)$', re.I)
+FILL_RE = re.compile(r'^ \*fill\*\s+0x[0-9a-f]+\s+(0x[0-9a-f]+)', re.I)
+SEGMENT_RE = re.compile(r'^(\w+)\s+(0x[0-9a-f]+)\s+(0x[0-9a-f]+)', re.I)
+
+
+def region_of(section):
+    for pattern, region in REGIONS:
+        if re.match(pattern, section):
+            return region
+    return None
+
+
+# ============================================================================
+# LINKER MAP
+# ============================================================================
+
+def group_of(path, by):
+    """Source file / library / framework component an object belongs to."""
+    path = path.replace('\\', '/')
+    match = re.match(r'(.*?)(?:\(([^()]*)\))?$', path)
+    archive, member = match.group(1), match.group(2)
+    if by == 'object':
+        return os.path.basename(archive) + ('(%s)' % member if member else '')
+    if member is None:
+        source = re.search(r'/src/(.+?)\.(?:o|obj)$', archive)
+        if source:
+            return 'src/' + source.group(1)
+        return os.path.basename(archive)
+    name = re.sub(r'^lib|\.a$', '', os.path.basename(archive))
+    if name == 'FrameworkArduino':
+        return 'arduino core'
+    if re.search(r'/lib[0-9a-f]{3}/', archive) or '/.pio/' in archive or '/libdeps/' in archive:
+        return 'lib:' + name
+    if '/tools/sdk/' in archive or '/esp-idf/' in archive:
+        return 'idf:' + name
+    if 'toolchain' in archive or name in ('c', 'm', 'gcc', 'stdc++', 'g', 'nosys', 'supc++'):
+        return 'toolchain:' + name
+    return 'lib:' + name
+
+
+def parse_map(path, by):
+    """{'groups': {group: {region: bytes}}, 'segments': {name: length}} from a GNU ld map."""
+    groups = {}
+    segments = {}
+    state = None
+    section = region = None
+    pending = None
+    with open(path, errors='replace') as f:
+        for line in f:
+            line = line.rstrip('\n')
+            if line.startswith('Memory Configuration'):
+                state = 'memory'
+                continue
+            if line.startswith('Linker script and memory map'):
+                state = 'map'
+                continue
+            if state == 'memory':
+                match = SEGMENT_RE.match(line)
+                if match and match.group(1) != 'Name':
+                    segments[match.group(1)] = int(match.group(3), 16)
+                continue
+            if state != 'map' or not line.strip():
+                continue
+
+            if not line[0].isspace():
+                match = OUTPUT_RE.match(line)
+                if match:
+                    section = match.group(1)
+                    region = None if section == '/DISCARD/' else region_of(section)
+                pending = None
+                continue
+            if region is None:
+                continue
+            if pending is not None:
+                match = CONTINUATION_RE.match(line)
+                pending = None
+                if match:
+                    add(groups, group_of(match.group(3), by), region, int(match.group(2), 16))
+                continue
+            match = INPUT_RE.match(line)
+            if not match or match.group(1).startswith('*('):
+                continue
+            name, _, size, source = match.groups()
+            fill = FILL_RE.match(line)
+            if fill:
+                add(groups, '(padding)', region, int(fill.group(1), 16))
+            elif size is None:
+                pending = name                  # Long name: address, size and object on the next line
+            else:
+                add(groups, group_of(source, by), region, int(size, 16))
+    return {'groups': groups, 'segments': segments}
+
+
+def add(groups, group, region, size):
+    regions = groups.setdefault(group, {})
+    regions[region] = regions.get(region, 0) + size
+
+
+# ============================================================================
+# ELF SYMBOLS
+# ============================================================================
+
+def parse_elf(path):
+    """{'sections': {region: bytes}, 'symbols': {name: [region, size]}} from an ELF32/ELF64 file."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    if data[:4] != b'\x7fELF':
+        raise SystemExit('%s is not an ELF file' % path)
+    wide = data[4] == 2
+    endian = '<' if data[5] == 1 else '>'
+    if wide:
+        shoff, = struct.unpack_from(endian + 'Q', data, 0x28)
+        shentsize, shnum, shstrndx = struct.unpack_from(endian + 'HHH', data, 0x3A)
+        header = endian + 'IIQQQQIIQQ'
+    else:
+        shoff, = struct.unpack_from(endian + 'I', data, 0x20)
+        shentsize, shnum, shstrndx = struct.unpack_from(endian + 'HHH', data, 0x2E)
+        header = endian + 'IIIIIIIIII'
+    sections = [struct.unpack_from(header, data, shoff + i * shentsize) for i in range(shnum)]
+    # (name, type, flags, addr, offset, size, link, info, addralign, entsize)
+    names = sections[shstrndx]
+
+    def string(table, offset):
+        start = table[4] + offset
+        return data[start:data.index(b'\0', start)].decode('utf-8', 'replace')
+
+    section_regions = []
+    totals = {}
+    for section in sections:
+        name = string(names, section[0])
+        region = region_of(name) if section[2] & 0x2 else None     # SHF_ALLOC
+        section_regions.append(region)
+        if region:
+            totals[region] = totals.get(region, 0) + section[5]
+
+    symbols = {}
+    for section in sections:
+        if section[1] != 2:                     # SHT_SYMTAB
+            continue
+        strings = sections[section[6]]
+        entry = section[9] or (24 if wide else 16)
+        for offset in range(section[4], section[4] + section[5], entry):
+            if wide:
+                name, info, _, shndx, _, size = struct.unpack_from(endian + 'IBBHQQ', data, offset)
+            else:
+                name, _, size, info, _, shndx = struct.unpack_from(endian + 'IIIBBH', data, offset)
+            if size == 0 or info & 0xF not in (1, 2) or shndx >= len(section_regions):
+                continue                        # Only sized STT_OBJECT / STT_FUNC
+            region = section_regions[shndx]
+            if region:
+                symbol = string(strings, name)
+                if symbol in symbols:
+                    symbol = '%s@%s' % (symbol, region)
+                symbols[symbol] = [region, size]
+    return {'sections': totals, 'symbols': symbols}
+
+
+def demangle(names):
+    """Readable names via the toolchain's (or the host's) c++filt, unchanged without one."""
+    tools = glob.glob(os.path.expanduser('~/.platformio/packages/toolchain-xtensa-esp32s3/bin/*-c++filt'))
+    tool = tools[0] if tools else shutil.which('c++filt')
+    if not tool or not names:
+        return {name: name for name in names}
+    result = subprocess.run([tool], input='\n'.join(names), capture_output=True, text=True)
+    lines = result.stdout.splitlines()
+    if result.returncode != 0 or len(lines) != len(names):
+        return {name: name for name in names}
+    return dict(zip(names, lines))
+
+
+# ============================================================================
+# BUILDS
+# ============================================================================
+
+def build_dirs(env):
+    """Local build directories of an env, newest first."""
+    candidates = [os.path.join(PARALLEL_BUILD_DIR, env, env), os.path.join(PROJECT_DIR, '.pio', 'build', env)]
+    found = [d for d in candidates if os.path.exists(os.path.join(d, ELF_NAME))
+             or os.path.exists(os.path.join(d, MAP_NAME))]
+    return sorted(found, key=lambda d: -max(os.path.getmtime(os.path.join(d, n))
+                                            for n in (ELF_NAME, MAP_NAME) if os.path.exists(os.path.join(d, n))))
+
+
+def locate(spec):
+    """(label, env, {'map': path, 'elf': path, 'bin': path}) or (label, None, report dict) for JSON."""
+    if spec.endswith('.json') and os.path.isfile(spec):
+        with open(spec) as f:
+            return spec, None, json.load(f)
+    if os.path.isfile(spec):
+        directory = os.path.dirname(os.path.abspath(spec))
+        files = {'map': spec if spec.endswith('.map') else None, 'elf': spec if spec.endswith('.elf') else None}
+        return spec, env_from_path(directory), complete(directory, files)
+    if os.path.isdir(spec):
+        return spec, env_from_path(os.path.abspath(spec)), complete(spec, {})
+    for env, _, chip in VARIANTS:
+        if spec in (env, chip, chip.lower()):
+            directories = build_dirs(env)
+            if not directories:
+                raise SystemExit('No %s build found (run pio run -e %s or build_orchestrator.py)' % (chip, env))
+            return chip, env, complete(directories[0], {})
+    for entry in reversed(load_manifest()['builds']):
+        if entry['id'].startswith(spec):
+            files = {key: object_path(entry['files'][name]['sha256']) if name in entry['files'] else None
+                     for key, name in (('map', MAP_NAME), ('elf', ELF_NAME), ('bin', BIN_NAME))}
+            return '%s@%s' % (entry['variant'], entry['id']), entry['env'], files
+    raise SystemExit('Unknown build: %s (variant, directory, .map/.elf, store id or .json report)' % spec)
+
+
+def complete(directory, files):
+    for key, name in (('map', MAP_NAME), ('elf', ELF_NAME), ('bin', BIN_NAME)):
+        if not files.get(key):
+            path = os.path.join(directory, name)
+            files[key] = path if os.path.exists(path) else None
+    return files
+
+
+def env_from_path(path):
+    for env, _, _ in VARIANTS:
+        if env in path.replace('\\', '/').split('/'):
+            return env
+    return None
+
+
+def slot_of(env):
+    """(partition CSV, smallest app slot) of an env."""
+    partitions_csv = env_option(env, 'board_build.partitions', 'default.csv')
+    path = os.path.join(PROJECT_DIR, partitions_csv)
+    if not os.path.exists(path):
+        return partitions_csv, 0
+    return partitions_csv, app_slot_size(parse_partitions(path))
+
+
+def analyze(spec, by):
+    """Report dict for one build."""
+    label, env, files = locate(spec)
+    if env is None and 'regions' in files:
+        return files                            # Saved JSON report
+    if not files['map'] and not files['elf']:
+        raise SystemExit('%s: no %s or %s' % (label, MAP_NAME, ELF_NAME))
+    report = {'label': label, 'env': env, 'groups': {}, 'segments': {}, 'symbols': {}, 'regions': {}}
+    if files['map']:
+        parsed = parse_map(files['map'], by)
+        report['groups'] = parsed['groups']
+        report['segments'] = parsed['segments']
+        for regions in parsed['groups'].values():
+            for region, size in regions.items():
+                report['regions'][region] = report['regions'].get(region, 0) + size
+    if files['elf']:
+        parsed = parse_elf(files['elf'])
+        report['symbols'] = parsed['symbols']
+        if not files['map']:
+            report['regions'] = parsed['sections']
+            report['groups'] = {'(no map) ' + region: {region: size} for region, size in parsed['sections'].items()}
+    loaded = sum(report['regions'].get(region, 0) for region in IMAGE_REGIONS)
+    report['image_size'] = os.path.getsize(files['bin']) if files['bin'] else loaded
+    report['image_source'] = BIN_NAME if files['bin'] else 'loadable sections'
+    report['partitions'], report['slot'] = slot_of(env) if env else (None, 0)
+    report['n8_slot'] = slot_of(variant_info(N8_CHIP)[0])[1]
+    return report
+
+
+def memory_totals(regions):
+    return {memory: sum(regions.get(r, 0) for r in members) for memory, members in MEMORY.items()}
+
+
+def tag_totals(symbols):
+    totals = {}
+    for tag, pattern in TAGS:
+        regex = re.compile(pattern)
+        matched = [(name, value) for name, value in symbols.items() if regex.search(name)]
+        flash = sum(size for _, (region, size) in matched if region in IMAGE_REGIONS)
+        ram = sum(size for _, (region, size) in matched if region in MEMORY['dram'] + MEMORY['iram'])
+        totals[tag] = (flash, ram, len(matched))
+    return totals
+
+
+# ============================================================================
+# REPORT / DIFF
+# ============================================================================
+
+def slot_verdict(report, headroom):
+    """[(level, message)] for the image against the variant's slot and the N8 slot."""
+    verdicts = []
+    image = report['image_size']
+    checks = [(report.get('partitions'), report.get('slot'))]
+    if report.get('n8_slot') and report.get('n8_slot') != report.get('slot'):
+        checks.append(('N8', report['n8_slot']))
+    for name, slot in checks:
+        if not slot:
+            continue
+        free = slot - image
+        pct = 100.0 * free / slot
+        if free < 0:
+            verdicts.append(('FAIL', 'image %s is %s over the %s app slot (%s)' % (
+                kb(image), kb(-free), name, kb(slot))))
+        elif pct < headroom:
+            verdicts.append(('WARN', 'image leaves %s (%.1f%%) of the %s app slot (%s) free, under %.0f%%' % (
+                kb(free), pct, name, kb(slot), headroom)))
+        else:
+            verdicts.append(('OK', 'image uses %.1f%% of the %s app slot (%s free)' % (100.0 - pct, name, kb(free))))
+    return verdicts
+
+
+def kb(size):
+    return '%.1f KB' % (size / 1024.0) if abs(size) < 1024 * 1024 else '%.2f MB' % (size / 1048576.0)
+
+
+def print_report(report, top, symbols, headroom):
+    memory = memory_totals(report['regions'])
+    print('%s%s' % (report['label'], ' (%s)' % report['env'] if report.get('env') else ''))
+    print('  Image  %9d B  (%s)' % (report['image_size'], report['image_source']))
+    for level, message in slot_verdict(report, headroom):
+        print('  %-5s  %s' % (level, message))
+    for name in ('dram', 'iram', 'psram'):
+        if not memory[name]:
+            continue
+        segment = report.get('segments', {}).get(SEGMENTS.get(name))
+        members = ', '.join('%s %d' % (r.split('_')[-1], report['regions'].get(r, 0)) for r in MEMORY[name]
+                            if len(MEMORY[name]) > 1)
+        print('  %-5s  %9d B static%s%s' % (name.upper(), memory[name], ' (%s)' % members if members else '',
+                                            ' of %d (%.1f%% of %s)' % (segment, 100.0 * memory[name] / segment,
+                                                                       SEGMENTS[name]) if segment else ''))
+
+    print()
+    print('  %-36s %10s %10s %10s %10s' % ('group', 'flash', 'dram', 'iram', 'image'))
+    ranked = sorted(report['groups'].items(),
+                    key=lambda item: (-sum(item[1].get(r, 0) for r in IMAGE_REGIONS + ('dram_bss',)), item[0]))
+    for group, regions in ranked[:top]:
+        totals = memory_totals(regions)
+        image = sum(regions.get(r, 0) for r in IMAGE_REGIONS)
+        print('  %-36s %10d %10d %10d %10d' % (group[:36], totals['flash'], totals['dram'], totals['iram'], image))
+    if len(ranked) > top:
+        rest = [regions for _, regions in ranked[top:]]
+        print('  %-36s %10d %10d %10d %10d' % (
+            '(%d more)' % len(rest), sum(memory_totals(r)['flash'] for r in rest),
+            sum(memory_totals(r)['dram'] for r in rest), sum(memory_totals(r)['iram'] for r in rest),
+            sum(r.get(x, 0) for r in rest for x in IMAGE_REGIONS)))
+
+    if report['symbols']:
+        print()
+        print('  %-36s %10s %10s %8s' % ('tag', 'image', 'ram', 'symbols'))
+        for tag, (flash, ram, count) in tag_totals(report['symbols']).items():
+            print('  %-36s %10d %10d %8d' % (tag, flash, ram, count))
+    if symbols and report['symbols']:
+        largest = sorted(report['symbols'].items(), key=lambda item: -item[1][1])[:symbols]
+        readable = demangle([name for name, _ in largest])
+        print()
+        print('  %-12s %8s  %s' % ('region', 'bytes', 'largest symbols'))
+        for name, (region, size) in largest:
+            print('  %-12s %8d  %s' % (region, size, readable[name][:90]))
+    print()
+
+
+def print_deltas(title, old, new, top, readable=None):
+    deltas = [(name, old.get(name, 0), new.get(name, 0)) for name in set(old) | set(new)]
+    deltas = [d for d in deltas if d[1] != d[2]]
+    if not deltas:
+        return
+    print()
+    print('  %-44s %10s %10s %+10s' % (title, 'old', 'new', 'delta'))
+    for name, before, after in sorted(deltas, key=lambda d: (-abs(d[2] - d[1]), d[0]))[:top]:
+        label = (readable or {}).get(name, name)
+        note = ' (new)' if name not in old else ' (gone)' if name not in new else ''
+        print('  %-44s %10d %10d %+10d%s' % (label[:44], before, after, after - before, note))
+
+
+def cmd_report(args):
+    specs = args.builds
+    if args.json and len(specs) != 1:
+        raise SystemExit('--json saves one build - name it (e.g. report N8 --json before.json)')
+    if not specs:
+        specs = [chip for env, _, chip in VARIANTS if build_dirs(env)]
+        if not specs:
+            raise SystemExit('No builds found - run pio run or build_orchestrator.py first')
+    status = 0
+    saved = []
+    for spec in specs:
+        report = analyze(spec, args.by)
+        print_report(report, args.top, args.symbols, args.headroom)
+        saved.append(report)
+        if any(level != 'OK' for level, _ in slot_verdict(report, args.headroom)):
+            status = 1
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(saved[0], f, indent=1, sort_keys=True)
+            f.write('\n')
+        print('Report written to %s' % args.json)
+    return status if args.check else 0
+
+
+def cmd_diff(args):
+    old = analyze(args.old, args.by)
+    new = analyze(args.new, args.by)
+    print('%s -> %s' % (old['label'], new['label']))
+    print('  Image  %9d -> %9d B  (%+d)' % (old['image_size'], new['image_size'],
+                                            new['image_size'] - old['image_size']))
+    for level, message in slot_verdict(new, args.headroom):
+        print('  %-5s  %s' % (level, message))
+    print_deltas('memory', memory_totals(old['regions']), memory_totals(new['regions']), args.top)
+    print_deltas('region', old['regions'], new['regions'], args.top)
+    group_total = lambda groups: {g: sum(r.values()) for g, r in groups.items()}
+    print_deltas('group (all regions)', group_total(old['groups']), group_total(new['groups']), args.top)
+    if old['symbols'] and new['symbols']:
+        tags_old = {tag: flash + ram for tag, (flash, ram, _) in tag_totals(old['symbols']).items()}
+        tags_new = {tag: flash + ram for tag, (flash, ram, _) in tag_totals(new['symbols']).items()}
+        print_deltas('tag', tags_old, tags_new, args.top)
+        sizes_old = {name: size for name, (_, size) in old['symbols'].items()}
+        sizes_new = {name: size for name, (_, size) in new['symbols'].items()}
+        changed = sorted(set(sizes_old) | set(sizes_new),
+                         key=lambda n: -abs(sizes_new.get(n, 0) - sizes_old.get(n, 0)))[:args.symbols or args.top]
+        print_deltas('symbol', {n: sizes_old[n] for n in changed if n in sizes_old},
+                     {n: sizes_new[n] for n in changed if n in sizes_new}, args.symbols or args.top,
+                     demangle(changed))
+    print()
+    failed = any(level != 'OK' for level, _ in slot_verdict(new, args.headroom))
+    return 1 if args.check and failed else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Flash/RAM budget per source file and library, with OTA slot checks')
+    sub = parser.add_subparsers(dest='command')
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--by', choices=('group', 'object'), default='group',
+                        help='Attribute to source files and libraries (default) or to each object')
+    common.add_argument('--top', type=int, default=20, help='Rows per table (default 20)')
+    common.add_argument('--symbols', type=int, default=0, help='Also list the N largest symbols')
+    common.add_argument('--headroom', type=float, default=DEFAULT_HEADROOM,
+                        help='Warn when less than this %% of the app slot is free (default %.0f)' % DEFAULT_HEADROOM)
+    common.add_argument('--check', action='store_true', help='Exit 1 on an over-size image or a headroom warning')
+
+    report = sub.add_parser('report', parents=[common], help='Budget of one or more builds (default)')
+    report.add_argument('builds', nargs='*', help='N8, N16, N32, build dir, .map/.elf, store id (default: all built)')
+    report.add_argument('--json', help='Save the report (or a list of reports) for a later diff')
+
+    diff = sub.add_parser('diff', parents=[common], help='Compare two builds')
+    diff.add_argument('old')
+    diff.add_argument('new')
+
+    args = parser.parse_args()
+    if args.command is None:
+        args = parser.parse_args(['report'] + sys.argv[1:])
+
+    handlers = {'report': cmd_report, 'diff': cmd_diff}
+    return handlers[args.command](args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
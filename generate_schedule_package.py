@@ -0,0 +1,623 @@
+#!/usr/bin/env python3
+"""
+Generate Home Assistant schedule packages for any number of thermostats.
+
+template_thermostat_schedule.yaml (written for shop_thermostat) is parsed
+once into a model of its helpers (input_datetime / input_number /
+input_boolean per day and period) and its outbound automations (helper ->
+JSON payload on <MQTT host>/schedule/set). Every thermostat is then rendered
+from that model:
+  - Helpers that only differ by name share a YAML anchor (<<: *day_heat)
+  - The 77 per-helper automations collapse into one automation per device:
+    state triggers on all helpers, with the payload built from the helper id
+    (<host>_<day>_<period>_<field>), so day, period and field come from the
+    entity that changed
+
+Before anything is written the model is checked:
+  - Each template automation's payload (day, period, keys) is what the
+    generated automation would send for the same helper, and every helper
+    has exactly one automation
+  - Against src/Main-Thermostat.cpp: the topic is subscribed and advertised
+    as a command_topic by publishHomeAssistantDiscovery(), every key is one
+    the schedule/set handler reads and the discovery command_templates use,
+    every period is one of discovery's periodIds, and the template's day
+    numbers map to the same day names as the handler's (mqttDay + 1) % 7
+Problems exit 1 without writing. Without the firmware source (the script
+copied into the HA config directory) only the template checks run.
+
+A host is the helper prefix (lowercase_with_underscores); its MQTT hostname
+defaults to the Title-Case-With-Dashes form (shop_thermostat ->
+Shop-Thermostat), or give it explicitly as helper_prefix=MQTT-Hostname.
+Writes <dest>/<host>_schedule.yaml, and <host>_schedule_card.yaml when a
+--card template (HOST_PREFIX -> host) is given.
+
+Usage:
+  python3 generate_schedule_package.py shop_thermostat
+  python3 generate_schedule_package.py shop_thermostat studio_thermostat=Studio-Stat --dest packages
+  python3 generate_schedule_package.py --hosts-file fleet.txt --dest /config/packages --card ha_schedule_card.yaml
+  python3 generate_schedule_package.py --check shop_thermostat
+  python3 generate_schedule_package.py --benchmark 200
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_TEMPLATE = os.path.join(PROJECT_DIR, 'template_thermostat_schedule.yaml')
+FIRMWARE_SOURCE = os.path.join('src', 'Main-Thermostat.cpp')
+TEMPLATE_HOST = 'shop_thermostat'           # Helper prefix the template is written for
+TOPIC_PLACEHOLDER = 'HOSTNAME_PLACEHOLDER'  # MQTT hostname in the template's topics
+CARD_PLACEHOLDER = 'HOST_PREFIX'
+HOST_TOKEN = '\x00host\x00'                 # Placeholders in the compiled package text
+MQTT_TOKEN = '\x00mqtt\x00'
+QUEUE_MAX = 100                             # Helper changes queued while one publish runs
+
+HOST_RE = re.compile(r'^[a-z0-9_]+$')
+MQTT_HOST_RE = re.compile(r'^[A-Za-z0-9][A-Za-z0-9-]*$')
+PAYLOAD_FIELD_RE = re.compile(r'"(\w+)"\s*:\s*(?:(-?\d+)|"([^"]*)"|\{\{(.*?)\}\})', re.S)
+STATES_RE = re.compile(r'states\(\s*[\'"]([\w.]+)[\'"]\s*\)')
+
+
+class TemplateError(Exception):
+    pass
+
+
+# ============================================================================
+# Template YAML
+# ============================================================================
+
+def indent_of(line):
+    return len(line) - len(line.lstrip(' '))
+
+
+def content_of(line):
+    text = line.strip()
+    return '' if not text or text.startswith('#') else text
+
+
+def scalar(text):
+    if text[:1] == '"':
+        return json.loads(text)
+    if text[:1] == "'":
+        return text[1:-1].replace("''", "'")
+    text = re.sub(r'\s+#.*$', '', text)
+    if text in ('true', 'false'):
+        return text == 'true'
+    for kind in (int, float):
+        try:
+            return kind(text)
+        except ValueError:
+            pass
+    return text
+
+
+def load_yaml(text, path):
+    """Block mappings, sequences, scalars and >/| block scalars - the subset the template uses."""
+    lines = text.splitlines()
+    pos = 0
+
+    def fail(message):
+        raise TemplateError('%s:%d: %s' % (path, pos + 1, message))
+
+    def next_indent():
+        nonlocal pos
+        while pos < len(lines) and not content_of(lines[pos]):
+            pos += 1
+        return indent_of(lines[pos]) if pos < len(lines) else -1
+
+    def block_scalar(parent_indent, style):
+        nonlocal pos
+        body = []
+        while pos < len(lines) and (not lines[pos].strip() or indent_of(lines[pos]) > parent_indent):
+            body.append(lines[pos])
+            pos += 1
+        while body and not body[-1].strip():
+            body.pop()
+        margin = min(indent_of(line) for line in body if line.strip()) if body else 0
+        body = [line[margin:] for line in body]
+        if style[0] == '|':
+            value = '\n'.join(body)
+        else:
+            # Folded: line breaks between two lines at the margin become spaces
+            value = body[0] if body else ''
+            for previous, line in zip(body, body[1:]):
+                folds = previous and line and previous[0] != ' ' and line[0] != ' '
+                value += (' ' if folds else '\n') + line
+        return value if style.endswith('-') else value + '\n'
+
+    def value_of(rest, indent):
+        if rest in ('>', '>-', '|', '|-'):
+            return block_scalar(indent, rest)
+        if rest:
+            return scalar(rest)
+        child = next_indent()
+        if child > indent:
+            return node(child)
+        if child == indent and content_of(lines[pos]).startswith('-'):
+            return sequence(indent)
+        return None
+
+    def node(indent):
+        return sequence(indent) if content_of(lines[pos]).startswith('-') else mapping(indent)
+
+    def mapping(indent):
+        nonlocal pos
+        result = {}
+        while next_indent() == indent and not content_of(lines[pos]).startswith('-'):
+            match = re.match(r'([^\s:][^:]*?)\s*:(?:\s+(.*))?$', content_of(lines[pos]))
+            if not match:
+                fail('expected "key: value"')
+            key = scalar(match.group(1))
+            if key in result:
+                fail('duplicate key %s' % key)
+            pos += 1
+            result[key] = value_of((match.group(2) or '').strip(), indent)
+        if next_indent() > indent:
+            fail('unexpected indentation')
+        return result
+
+    def sequence(indent):
+        nonlocal pos
+        items = []
+        while next_indent() == indent and re.match(r'-(\s|$)', content_of(lines[pos])):
+            rest = content_of(lines[pos])[1:].strip()
+            if re.match(r'[^\s:"\'][^:]*:(\s|$)', rest):
+                lines[pos] = ' ' * (indent + 2) + rest        # "- key: value" opens a mapping
+                items.append(mapping(indent + 2))
+            else:
+                pos += 1
+                items.append(value_of(rest, indent) if rest else value_of('', indent))
+        return items
+
+    if next_indent() < 0:
+        return {}
+    if next_indent() != 0:
+        fail('top level must not be indented')
+    return mapping(0)
+
+
+# ============================================================================
+# Model
+# ============================================================================
+
+class Helper:
+    def __init__(self, domain, suffix, attrs):
+        self.domain = domain
+        self.suffix = suffix                    # monday_day_heat
+        self.attrs = attrs
+        parts = suffix.split('_')
+        self.day = parts[0]
+        self.period = '_'.join(parts[1:-1]) or None
+        self.field = parts[-1]
+        self.kind = '_'.join(parts[1:])         # day_heat, enabled
+        self.payload = None                     # From the template's automation
+
+
+class ScheduleTemplate:
+    """Helpers and outbound automations of template_thermostat_schedule.yaml."""
+
+    def __init__(self, path):
+        with open(path) as f:
+            document = load_yaml(f.read(), path)
+        self.path = path
+        self.domains = {}                       # domain -> [Helper]
+        self.days = {}                          # day name -> MQTT day number
+        self.fields = {}                        # field -> 'time' | 'bool' | 'float'
+        self.topic_suffix = None
+        for domain in ('input_datetime', 'input_number', 'input_boolean'):
+            helpers = document.get(domain) or {}
+            self.domains[domain] = [Helper(domain, self.strip_host(object_id), attrs or {})
+                                    for object_id, attrs in helpers.items()]
+        self.helpers = {'%s.%s' % (h.domain, h.suffix): h for hs in self.domains.values() for h in hs}
+        if not self.helpers:
+            raise TemplateError('%s: no input_datetime/input_number/input_boolean helpers' % path)
+        for automation in document.get('automation') or []:
+            self.read_automation(automation)
+        missing = [entity for entity, helper in self.helpers.items() if helper.payload is None]
+        if missing:
+            raise TemplateError('%s: no automation for %s' % (path, ', '.join(missing)))
+
+    def strip_host(self, object_id):
+        if not object_id.startswith(TEMPLATE_HOST + '_'):
+            raise TemplateError('%s: helper %s does not start with %s_' % (self.path, object_id, TEMPLATE_HOST))
+        return object_id[len(TEMPLATE_HOST) + 1:]
+
+    def read_automation(self, automation):
+        alias = automation.get('alias', '?')
+        triggers = automation.get('trigger')
+        actions = automation.get('action')
+        triggers = triggers if isinstance(triggers, list) else [triggers]
+        actions = actions if isinstance(actions, list) else [actions]
+        if len(triggers) != 1 or len(actions) != 1 or actions[0].get('service') != 'mqtt.publish':
+            raise TemplateError('%s: "%s" is not one state trigger and one mqtt.publish' % (self.path, alias))
+        domain, _, object_id = triggers[0].get('entity_id', '').partition('.')
+        entity = '%s.%s' % (domain, self.strip_host(object_id))
+        helper = self.helpers.get(entity)
+        if helper is None:
+            raise TemplateError('%s: "%s" triggers on %s, which is not a helper' % (self.path, alias, entity))
+        if helper.payload is not None:
+            raise TemplateError('%s: more than one automation for %s' % (self.path, entity))
+
+        data = actions[0].get('data') or {}
+        topic, _, suffix = str(data.get('topic', '')).partition('/')
+        if topic != TOPIC_PLACEHOLDER or not suffix:
+            raise TemplateError('%s: "%s" publishes to %s, expected %s/...' % (self.path, alias, data.get('topic'),
+                                                                              TOPIC_PLACEHOLDER))
+        if self.topic_suffix not in (None, suffix):
+            raise TemplateError('%s: "%s" publishes to %s/%s, others to %s/%s' % (self.path, alias, topic, suffix,
+                                                                                 topic, self.topic_suffix))
+        self.topic_suffix = suffix
+        helper.payload = self.read_payload(alias, helper, str(data.get('payload', '')))
+
+    def read_payload(self, alias, helper, payload):
+        """{key: value} of the payload, checked against what the generated automation sends for the helper."""
+        fields = {}
+        for key, number, string, expression in PAYLOAD_FIELD_RE.findall(payload):
+            if expression:
+                used = STATES_RE.findall(expression)
+                if any(entity.split('.', 1)[1] != '%s_%s' % (TEMPLATE_HOST, helper.suffix) for entity in used):
+                    raise TemplateError('%s: "%s" reads another entity (%s)' % (self.path, alias, ', '.join(used)))
+                if ".split(':')[0]" in expression:
+                    fields[key] = 'hour'
+                elif ".split(':')[1]" in expression:
+                    fields[key] = 'minute'
+                elif '"on"' in expression or "'on'" in expression:
+                    fields[key] = 'bool'
+                elif 'float' in expression:
+                    fields[key] = 'float'
+                else:
+                    raise TemplateError('%s: "%s": unrecognised value for "%s"' % (self.path, alias, key))
+            else:
+                fields[key] = int(number) if number else string
+
+        day = fields.pop('day', None)
+        if not isinstance(day, int):
+            raise TemplateError('%s: "%s" has no numeric "day"' % (self.path, alias))
+        if self.days.setdefault(helper.day, day) != day:
+            raise TemplateError('%s: "%s" numbers %s as day %d, elsewhere %d' % (self.path, alias, helper.day, day,
+                                                                               self.days[helper.day]))
+        if fields.pop('period', None) != helper.period:
+            raise TemplateError('%s: "%s" period does not match helper %s' % (self.path, alias, helper.suffix))
+        if fields == {'hour': 'hour', 'minute': 'minute'}:
+            kind = 'time'
+        elif list(fields) == [helper.field] and fields[helper.field] in ('bool', 'float'):
+            kind = fields[helper.field]
+        else:
+            raise TemplateError('%s: "%s" sends %s; the helper id %s implies "%s"' % (
+                self.path, alias, ', '.join(sorted(fields)), helper.suffix, helper.field))
+        if self.fields.setdefault(helper.field, kind) != kind:
+            raise TemplateError('%s: "%s": field %s is sent as %s elsewhere' % (self.path, alias, helper.field,
+                                                                              self.fields[helper.field]))
+        return fields
+
+    def sent_keys(self):
+        keys = {'day'}
+        for helper in self.helpers.values():
+            keys.update(helper.payload)
+            if helper.period:
+                keys.add('period')
+        return keys
+
+    def periods(self):
+        return {h.period for h in self.helpers.values() if h.period}
+
+
+# ============================================================================
+# Firmware
+# ============================================================================
+
+def function_body(source, code, name):
+    from log_hotpath import match_brace
+    match = re.search(r'\b%s\s*\([^;{}]*\)\s*\{' % re.escape(name), code)
+    if not match:
+        return None
+    return source[match.end() - 1:match_brace(code, match.end() - 1) + 1]
+
+
+def string_list(source, name):
+    match = re.search(r'\b%s\s*\[\s*\d*\s*\]\s*=\s*\{([^}]*)\}' % re.escape(name), source)
+    return re.findall(r'"([^"]*)"', match.group(1)) if match else []
+
+
+def read_firmware(path):
+    """What the firmware subscribes to, advertises and accepts on schedule/set."""
+    # Imported here: copied into the HA config directory the script runs without the repo's tools
+    from log_hotpath import blank, match_brace
+    with open(path) as f:
+        source = f.read()
+    code = blank(source)
+    firmware = {'path': path}
+
+    # reconnectMQTT() builds the topics from its copy of the hostname (mqttTaskConfig.clientId)
+    names = dict(re.findall(r'\bString\s+(\w+)\s*=\s*(?:hostname|prefix)\s*\+\s*"/([^"]+)"\s*;',
+                            function_body(source, code, 'reconnectMQTT') or ''))
+    firmware['subscribed'] = {names[var] for var in re.findall(r'\.subscribe\(\s*(\w+)\.c_str\(\)', source)
+                              if var in names}
+
+    discovery = function_body(source, code, 'publishHomeAssistantDiscovery') or ''
+    firmware['commands'] = set(re.findall(r'\["\w*command_topic"\]\s*=\s*hostname\s*\+\s*"/([^"]+)"', discovery))
+    templates = re.findall(r'\["command_template"\]\s*=\s*([^;]+);', discovery)
+    firmware['template_keys'] = {key for t in templates for key in re.findall(r'\\"(\w+)\\"\s*:', t)}
+    for array in {name for t in templates for name in re.findall(r'\\""\s*\+\s*(\w+)\[\w+\]\s*\+\s*"\\"\s*:', t)}:
+        firmware['template_keys'].update(string_list(discovery, array))    # ",\"" + tempKeys[t] + "\":..."
+    firmware['periods'] = set(string_list(discovery, 'periodIds'))
+    firmware['day_names'] = [name.lower() for name in string_list(discovery, 'dayNames')]
+
+    handler = re.search(r'==\s*scheduleSetTopic\s*\)\s*\{', code)
+    body = source[handler.end():match_brace(code, handler.end() - 1)] if handler else ''
+    firmware['handler_keys'] = (set(re.findall(r'containsKey\(\s*"(\w+)"\s*\)', body)) |
+                                set(re.findall(r'\bdoc\[\s*"(\w+)"\s*\]', body)))
+    offset = re.search(r'\(\s*mqttDay\s*\+\s*(\d+)\s*\)\s*%\s*7', body)
+    firmware['day_offset'] = int(offset.group(1)) if offset else None
+    return firmware
+
+
+def firmware_problems(template, firmware):
+    problems = []
+    where = os.path.relpath(firmware['path'])
+    suffix = template.topic_suffix
+    if suffix not in firmware['subscribed']:
+        problems.append('%s: <hostname>/%s is never subscribed' % (where, suffix))
+    if suffix not in firmware['commands']:
+        problems.append('%s: publishHomeAssistantDiscovery() advertises no command_topic <hostname>/%s '
+                        '(advertised: %s)' % (where, suffix, ', '.join(sorted(firmware['commands'])) or 'none'))
+    if not firmware['handler_keys']:
+        problems.append('%s: no handler for <hostname>/%s found' % (where, suffix))
+    for key in sorted(template.sent_keys()):
+        if firmware['handler_keys'] and key not in firmware['handler_keys']:
+            problems.append('%s: the %s handler ignores "%s"' % (where, suffix, key))
+        if key not in firmware['template_keys']:
+            problems.append('%s: no discovery command_template sends "%s"' % (where, key))
+    for period in sorted(template.periods() - firmware['periods']):
+        problems.append('%s: period "%s" is not one of discovery\'s periodIds (%s)' % (
+            where, period, ', '.join(sorted(firmware['periods']))))
+    names, offset = firmware['day_names'], firmware['day_offset']
+    if len(names) != 7 or offset is None:
+        problems.append('%s: cannot find dayNames[7] and the handler\'s (mqttDay + N) %% 7' % where)
+    else:
+        for day, number in sorted(template.days.items(), key=lambda item: item[1]):
+            expected = names[(number + offset) % 7] if 0 <= number < 7 else None
+            if expected != day:
+                problems.append('%s sends %s as day %d, which the firmware reads as %s' % (
+                    os.path.basename(template.path), day, number, expected or 'out of range'))
+    return problems
+
+
+# ============================================================================
+# Rendering
+# ============================================================================
+
+def flow_value(value):
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, (int, float)):
+        return str(value)
+    if re.match(r'^[A-Za-z_][\w:.\- ]*$', value) and not re.search(r':\s|\s$|^(true|false|null|yes|no|on|off)$',
+                                                                     value, re.I):
+        return value
+    return json.dumps(value, ensure_ascii=False)
+
+
+def helper_lines(template):
+    """Helper definitions; helpers of the same kind share an anchor and only repeat what differs."""
+    def items(pairs):
+        return ', '.join('%s: %s' % (key, flow_value(value)) for key, value in pairs).replace(TEMPLATE_HOST, HOST_TOKEN)
+
+    lines, anchors = [], {}
+    for domain, helpers in template.domains.items():
+        if not helpers:
+            continue
+        lines += ['', '%s:' % domain] if lines else ['%s:' % domain]
+        day = None
+        for helper in helpers:
+            if helper.day != day:
+                day = helper.day
+                lines.append('  # %s' % day.capitalize())
+            object_id = '%s_%s' % (HOST_TOKEN, helper.suffix)
+            anchor = helper.kind
+            if anchor in anchors and anchors[anchor][0] != domain:
+                anchor = '%s_%s' % (domain, helper.kind)
+            if anchor not in anchors:
+                anchors[anchor] = (domain, helper.attrs)
+                lines.append('  %s: &%s {%s}' % (object_id, anchor, items(helper.attrs.items())))
+            else:
+                shared = anchors[anchor][1]
+                differs = [(key, value) for key, value in helper.attrs.items() if shared.get(key) != value]
+                lines.append('  %s: {%s}' % (object_id, ', '.join(['<<: *%s' % anchor] + ([items(differs)] if differs else []))))
+    return lines
+
+
+def payload_lines(template):
+    """Jinja for the payload: day, period and field come from the id of the helper that changed."""
+    days = ', '.join("'%s': %d" % (day, number) for day, number in sorted(template.days.items(), key=lambda i: i[1]))
+    lines = [
+        "{%- set part = trigger.entity_id.split('.')[1][prefix | length:].split('_') -%}",
+        "{%- set field = part[-1] -%}",
+        "{%- set value = trigger.to_state.state -%}",
+        '{"day": {{ {%s}[part[0]] }}' % days,
+        "{%- if part | length > 2 %}, \"period\": \"{{ part[1:-1] | join('_') }}\"{% endif %}",
+    ]
+    branches = {
+        'time': ", \"hour\": {{ value.split(':')[0] | int }}, \"minute\": {{ value.split(':')[1] | int }}",
+        'bool': ", \"{{ field }}\": {{ 'true' if value == 'on' else 'false' }}",
+        'float': ", \"{{ field }}\": {{ value | float }}",
+    }
+    keyword = 'if'
+    for kind in ('time', 'bool', 'float'):
+        fields = sorted(field for field, k in template.fields.items() if k == kind)
+        if fields:
+            test = "field == '%s'" % fields[0] if len(fields) == 1 else 'field in %s' % fields
+            lines.append('{%%- %s %s %%}%s' % (keyword, test, branches[kind]))
+            keyword = 'elif'
+    lines.append('{%- endif %}}')
+    return lines
+
+
+def compile_package(template, template_name):
+    """Package text with HOST_TOKEN/MQTT_TOKEN in place of the helper prefix and MQTT hostname."""
+    lines = [
+        '# Home Assistant schedule package for %s (MQTT hostname %s)' % (HOST_TOKEN, MQTT_TOKEN),
+        '# Generated by generate_schedule_package.py from %s - edit the template, not this file' % template_name,
+        '',
+    ]
+    lines += helper_lines(template)
+    lines += [
+        '',
+        'automation:',
+        '  # OUTBOUND: any schedule helper change -> %s/%s' % (MQTT_TOKEN, template.topic_suffix),
+        '  # (INBOUND sync handled by multi_thermostat_schedule_sync.yaml)',
+        '  - id: %s_schedule_outbound' % HOST_TOKEN,
+        '    alias: "Thermostat - %s Schedule Helper Changed"' % HOST_TOKEN,
+        '    mode: queued',
+        '    max: %d' % QUEUE_MAX,
+        '    trigger:',
+    ]
+    for domain, helpers in template.domains.items():
+        if helpers:
+            lines += ['      - platform: state', '        entity_id:']
+            lines += ['          - %s.%s_%s' % (domain, HOST_TOKEN, helper.suffix) for helper in helpers]
+    lines += [
+        '    condition:',
+        '      - condition: template',
+        "        value_template: \"{{ trigger.to_state is not none and "
+        "trigger.to_state.state not in ['unknown', 'unavailable'] }}\"",
+        '    variables:',
+        '      prefix: "%s_"' % HOST_TOKEN,
+        '    action:',
+        '      - service: mqtt.publish',
+        '        data:',
+        '          topic: "%s/%s"' % (MQTT_TOKEN, template.topic_suffix),
+        '          payload: >-',
+    ]
+    lines += ['            ' + line for line in payload_lines(template)]
+    return '\n'.join(lines) + '\n'
+
+
+def mqtt_hostname(host):
+    """shop_thermostat -> Shop-Thermostat, as generate_schedule_package.sh always did."""
+    return '-'.join(word.capitalize() for word in host.split('_'))
+
+
+def parse_host(spec):
+    host, _, mqtt = spec.strip().partition('=')
+    host, mqtt = host.strip(), mqtt.strip() or mqtt_hostname(host.strip())
+    if not HOST_RE.match(host):
+        raise ValueError('helper prefix must be lowercase_with_underscores: %s' % host)
+    if not MQTT_HOST_RE.match(mqtt):
+        raise ValueError('not a valid MQTT hostname (letters, digits, dashes): %s' % mqtt)
+    return host, mqtt
+
+
+def read_hosts(specs, hosts_file):
+    lines = list(specs)
+    if hosts_file:
+        with open(hosts_file) as f:
+            lines += [line.split('#', 1)[0] for line in f]
+    hosts, seen_host, seen_mqtt = [], {}, {}
+    for spec in filter(None, (line.strip() for line in lines)):
+        host, mqtt = parse_host(spec)
+        if host in seen_host or mqtt.lower() in seen_mqtt:
+            raise ValueError('%s is listed twice' % (host if host in seen_host else mqtt))
+        seen_host[host] = seen_mqtt[mqtt.lower()] = True
+        hosts.append((host, mqtt))
+    return hosts
+
+
+def render(compiled, host, mqtt):
+    return compiled.replace(HOST_TOKEN, host).replace(MQTT_TOKEN, mqtt)
+
+
+# ============================================================================
+# Main
+# ============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description='Render Home Assistant schedule packages for a fleet of thermostats')
+    parser.add_argument('hosts', nargs='*', help='Helper prefix, or helper_prefix=MQTT-Hostname')
+    parser.add_argument('--hosts-file', help='One host per line (same forms, # comments)')
+    parser.add_argument('--template', default=DEFAULT_TEMPLATE, help='Package template (default %(default)s)')
+    parser.add_argument('--card', help='Dashboard card template; HOST_PREFIX is replaced by the host')
+    parser.add_argument('--dest', default='.', help='Output directory (default: current)')
+    parser.add_argument('--project-dir', default=PROJECT_DIR, help='Firmware tree to validate topics against')
+    parser.add_argument('--check', action='store_true', help='Validate only, write nothing (firmware source required)')
+    parser.add_argument('--benchmark', type=int, metavar='N', help='Render N synthetic hosts in memory and time it')
+    args = parser.parse_args()
+
+    try:
+        hosts = read_hosts(args.hosts, args.hosts_file)
+    except (OSError, ValueError) as e:
+        print('Error: %s' % e, file=sys.stderr)
+        return 1
+    if args.benchmark:
+        hosts = [('thermostat_%03d' % i, 'Thermostat-%03d' % i) for i in range(1, args.benchmark + 1)]
+    if not hosts and not args.check:
+        parser.error('no hosts given')
+
+    started = time.perf_counter()
+    try:
+        template = ScheduleTemplate(args.template)
+    except (OSError, TemplateError) as e:
+        print('Error: %s' % e, file=sys.stderr)
+        return 1
+    problems = []
+    firmware_path = os.path.join(args.project_dir, FIRMWARE_SOURCE)
+    if os.path.exists(firmware_path):
+        problems = firmware_problems(template, read_firmware(firmware_path))
+    elif args.check:
+        problems = ['%s not found' % firmware_path]
+    else:
+        print('Warning: %s not found, topics not checked against the firmware' % firmware_path, file=sys.stderr)
+    for problem in problems:
+        print('Error: %s' % problem, file=sys.stderr)
+    if problems:
+        return 1
+    compiled = compile_package(template, os.path.basename(args.template))
+    parsed_ms = (time.perf_counter() - started) * 1000
+
+    card = None
+    if args.card:
+        try:
+            with open(args.card) as f:
+                card = f.read()
+        except OSError as e:
+            print('Error: %s' % e, file=sys.stderr)
+            return 1
+
+    started = time.perf_counter()
+    packages = [(host, mqtt, render(compiled, host, mqtt)) for host, mqtt in hosts]
+    rendered_ms = (time.perf_counter() - started) * 1000
+    helpers = len(template.helpers)
+    print('Template: %d helpers, %d days, %s/%s - parsed and validated in %.1f ms' % (
+        helpers, len(template.days), TOPIC_PLACEHOLDER, template.topic_suffix, parsed_ms), file=sys.stderr)
+    if args.check:
+        print('OK: topics and payload keys match the firmware', file=sys.stderr)
+        return 0
+    if args.benchmark:
+        total = sum(len(text) for _, _, text in packages)
+        print('Rendered %d packages (%d helpers, %d automations, %d KB) in %.1f ms' % (
+            len(packages), helpers * len(packages), len(packages), total // 1024, rendered_ms), file=sys.stderr)
+        return 0
+
+    os.makedirs(args.dest, exist_ok=True)
+    for host, mqtt, text in packages:
+        outputs = [(os.path.join(args.dest, '%s_schedule.yaml' % host), text)]
+        if card is not None:
+            outputs.append((os.path.join(args.dest, '%s_schedule_card.yaml' % host), card.replace(CARD_PLACEHOLDER, host)))
+        for path, body in outputs:
+            if os.path.exists(path):
+                print('Info: overwriting existing %s' % path, file=sys.stderr)
+            with open(path, 'w') as f:
+                f.write(body)
+        print('Generated %s (%d lines) -> %s/%s' % (outputs[0][0], text.count('\n'), mqtt, template.topic_suffix),
+              file=sys.stderr)
+    print('%d package(s), %d helpers and 1 automation each, rendered in %.1f ms' % (
+        len(packages), helpers, rendered_ms), file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
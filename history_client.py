@@ -0,0 +1,447 @@
+#!/usr/bin/env python3
+"""
+Pull temperature, humidity and relay runtime history from a thermostat and
+decode it.
+
+The device keeps 1 minute, 15 minute and 1 hour records in LittleFS
+(include/HistoryCodec.h, include/HistoryStore.h). /api/history?format=bin
+returns the stored files for the requested range as they are, each after a
+4-byte length, so weeks of 1 minute history come back in one request of a few
+hundred KB that the device does not have to decode. This script decodes the
+records, keeps the ones in the range and prints a per-day summary (or per
+hour with --hourly): temperature min/avg/max, humidity and run hours per
+relay. --csv writes every record.
+
+--codec-check needs no device: it compiles the codec with --cxx into a small
+harness, encodes random series with gaps, missing values and file rollovers,
+and checks that this decoder returns exactly what went in. It also corrupts
+the encoded files and checks that both decoders stop at the same record.
+
+Usage:
+  python3 history_client.py thermostat.local
+  python3 history_client.py --days 21 --csv history.csv thermostat.local
+  python3 history_client.py --from 2025-01-01 --to 2025-02-01 --res 1h 192.168.1.50
+  python3 history_client.py --codec-check
+"""
+
+import argparse
+import datetime
+import os
+import random
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+MAGIC = 0x31545348           # "HST1"
+VERSION = 1
+HEADER = struct.Struct('<IBBxxII')
+NO_VALUE = -32768
+RELAYS = ('heat1', 'heat2', 'cool1', 'cool2', 'fan')
+FLAG_CLIMATE, FLAG_SKIP, FLAG_HYDRONIC = 0x20, 0x40, 0x80
+
+# name, interval, file span (HISTORY_TIERS)
+TIERS = (('1m', 60, 86400), ('15m', 900, 604800), ('1h', 3600, 2592000))
+
+HARNESS = r'''
+#include "HistoryCodec.h"
+#include <stdio.h>
+#include <string.h>
+
+// e <tier> then "time temp hum hyd r0 r1 r2 r3 r4" lines -> length-prefixed files on stdout
+// d -> length-prefixed files on stdin, one decoded record per line on stdout
+static int encode(int tier) {
+    static uint8_t file[1 << 20];
+    size_t len = 0;
+    HistoryEncoder encoder;
+    HistorySample s;
+    int t, h, y, r[5];
+    unsigned long time;
+    while (scanf("%lu %d %d %d %d %d %d %d %d", &time, &t, &h, &y, &r[0], &r[1], &r[2], &r[3], &r[4]) == 9) {
+        s.time = (uint32_t)time;
+        s.temp10 = (int16_t)t;
+        s.humidity10 = (int16_t)h;
+        s.hydronic10 = (int16_t)y;
+        for (int i = 0; i < 5; i++) s.runtime[i] = (uint16_t)r[i];
+        uint32_t start = historyFileStart((HistoryTier)tier, s.time);
+        if (!encoder.active() || encoder.fileStart() != start) {
+            if (len) { uint32_t n = len; fwrite(&n, 4, 1, stdout); fwrite(file, 1, len, stdout); }
+            encoder.begin((HistoryTier)tier, start, file);
+            len = HISTORY_HEADER_SIZE;
+        }
+        len += encoder.encode(s, file + len);
+    }
+    if (len) { uint32_t n = len; fwrite(&n, 4, 1, stdout); fwrite(file, 1, len, stdout); }
+    return 0;
+}
+
+static int decode() {
+    static uint8_t file[1 << 20];
+    uint32_t n;
+    while (fread(&n, 4, 1, stdin) == 1 && n <= sizeof(file) && fread(file, 1, n, stdin) == n) {
+        HistoryDecoder decoder;
+        if (n < HISTORY_HEADER_SIZE || !decoder.begin(file)) { puts("BAD"); continue; }
+        size_t pos = HISTORY_HEADER_SIZE;
+        HistorySample s;
+        int used = 0;
+        while (pos < n && (used = decoder.next(file + pos, n - pos, s)) > 0) {
+            pos += used;
+            printf("%lu %d %d %d %u %u %u %u %u\n", (unsigned long)s.time, s.temp10, s.humidity10, s.hydronic10,
+                   s.runtime[0], s.runtime[1], s.runtime[2], s.runtime[3], s.runtime[4]);
+        }
+        puts(used < 0 ? "CORRUPT" : pos < n ? "TRUNCATED" : "END");
+    }
+    return 0;
+}
+
+int main(int argc, char** argv) {
+    if (argc > 2 && argv[1][0] == 'e') return encode(argv[2][0] - '0');
+    return decode();
+}
+'''
+
+
+class Corrupt(Exception):
+    pass
+
+
+class Truncated(Exception):
+    pass
+
+
+# ============================================================================
+# DECODING
+# ============================================================================
+
+def read_varint(data, pos):
+    value = 0
+    for i in range(5):
+        if pos + i >= len(data):
+            raise Truncated()
+        value |= (data[pos + i] & 0x7F) << (7 * i)
+        if not data[pos + i] & 0x80:
+            return value & 0xFFFFFFFF, pos + i + 1
+    raise Corrupt('varint too long')
+
+
+def unzigzag(value):
+    return (value >> 1) ^ -(value & 1)
+
+
+def wrap16(value):
+    return (value + 0x8000) % 0x10000 - 0x8000
+
+
+def decode_file(data):
+    """Records of one stored file as (tier name, samples, status); status is end, truncated or corrupt."""
+    if len(data) < HEADER.size:
+        return None, [], 'bad header'
+    magic, version, tier, file_start, interval = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION or tier >= len(TIERS) or interval != TIERS[tier][1]:
+        return None, [], 'bad header'
+    slots = TIERS[tier][2] // interval
+    samples = []
+    pos, index, temp, humidity, hydronic = HEADER.size, 0, 0, 0, 0
+    try:
+        while pos < len(data):
+            flags = data[pos]
+            p = pos + 1
+            skip = 0
+            if flags & FLAG_SKIP:
+                skip, p = read_varint(data, p)
+            sample = {'temp': None, 'humidity': None, 'hydronic': None}
+            t, h, y = temp, humidity, hydronic
+            if flags & FLAG_CLIMATE:
+                value, p = read_varint(data, p)
+                t = wrap16(t + unzigzag(value))
+                value, p = read_varint(data, p)
+                h = wrap16(h + unzigzag(value))
+                sample['temp'], sample['humidity'] = t, h
+            if flags & FLAG_HYDRONIC:
+                value, p = read_varint(data, p)
+                y = wrap16(y + unzigzag(value))
+                sample['hydronic'] = y
+            for i, relay in enumerate(RELAYS):
+                value = 0
+                if flags & (1 << i):
+                    value, p = read_varint(data, p)
+                    if value > interval:
+                        raise Corrupt('runtime longer than the interval')
+                sample[relay] = value
+            if index + skip >= slots:
+                raise Corrupt('record past the end of the file')
+            index += skip
+            sample['time'] = file_start + index * interval
+            samples.append(sample)
+            index += 1
+            pos, temp, humidity, hydronic = p, t, h, y
+    except Truncated:
+        return TIERS[tier][0], samples, 'truncated'
+    except Corrupt:
+        return TIERS[tier][0], samples, 'corrupt'
+    return TIERS[tier][0], samples, 'end'
+
+
+def split_files(stream):
+    """Length-prefixed files of a format=bin response."""
+    files, pos = [], 0
+    while pos + 4 <= len(stream):
+        size = struct.unpack_from('<I', stream, pos)[0]
+        files.append(stream[pos + 4:pos + 4 + size])
+        pos += 4 + size
+    if pos != len(stream):
+        raise ValueError('response ends inside a file (%d of %d bytes)' % (len(stream) - pos - 4, size))
+    return files
+
+
+def decode_stream(stream, start, end):
+    tier, samples, problems = None, [], []
+    for data in split_files(stream):
+        name, file_samples, status = decode_file(data)
+        tier = name or tier
+        if status != 'end':
+            problems.append('%s file %s' % (status, name or '?'))
+        samples += [s for s in file_samples if start <= s['time'] < end]
+    return tier, samples, problems
+
+
+def fetch(host, start, end, res, timeout):
+    url = host if host.startswith('http') else 'http://%s' % host
+    url = '%s/api/history?from=%d&to=%d&res=%s&format=bin' % (url.rstrip('/'), start, end, res)
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        return response.read()
+
+
+# ============================================================================
+# REPORT
+# ============================================================================
+
+def convert(tenths, fahrenheit, offset=True):
+    if tenths is None:
+        return None
+    c = tenths / 10.0
+    return c * 9.0 / 5.0 + 32.0 if fahrenheit and offset else c
+
+
+def write_csv(path, samples, fahrenheit):
+    unit = 'f' if fahrenheit else 'c'
+    with open(path, 'w') as f:
+        f.write('time,temp_%s,humidity,hydronic_%s,%s\n' % (unit, unit, ','.join(r + '_s' for r in RELAYS)))
+        for s in samples:
+            stamp = datetime.datetime.fromtimestamp(s['time']).isoformat()
+            values = [convert(s['temp'], fahrenheit), None if s['humidity'] is None else s['humidity'] / 10.0,
+                      convert(s['hydronic'], fahrenheit)]
+            f.write('%s,%s,%s\n' % (stamp, ','.join('' if v is None else '%.1f' % v for v in values),
+                                    ','.join(str(s[r]) for r in RELAYS)))
+
+
+def print_summary(samples, fahrenheit, hourly):
+    fmt = '%Y-%m-%d %H:00' if hourly else '%Y-%m-%d'
+    groups = {}
+    for s in samples:
+        key = datetime.datetime.fromtimestamp(s['time']).strftime(fmt)
+        groups.setdefault(key, []).append(s)
+    unit = 'F' if fahrenheit else 'C'
+    print('%-16s %7s %7s %7s %7s %6s %s' % ('PERIOD', 'RECORDS', 'MIN ' + unit, 'AVG ' + unit, 'MAX ' + unit,
+                                         'RH %', ' '.join('%6s' % (r + ' h') for r in RELAYS)))
+    for key in sorted(groups):
+        rows = groups[key]
+        temps = [convert(s['temp'], fahrenheit) for s in rows if s['temp'] is not None]
+        hums = [s['humidity'] / 10.0 for s in rows if s['humidity'] is not None]
+        stats = ('%7.1f %7.1f %7.1f' % (min(temps), sum(temps) / len(temps), max(temps))) if temps else '%7s %7s %7s' % ('-', '-', '-')
+        print('%-16s %7d %s %6s %s' % (key, len(rows), stats, '%.0f' % (sum(hums) / len(hums)) if hums else '-',
+                                       ' '.join('%6.1f' % (sum(s[r] for s in rows) / 3600.0) for r in RELAYS)))
+
+
+def parse_time(text):
+    if text.isdigit():
+        return int(text)
+    return int(datetime.datetime.fromisoformat(text).timestamp())
+
+
+# ============================================================================
+# CODEC CHECK
+# ============================================================================
+
+def build_harness(cxx, project_dir, work_dir):
+    source = os.path.join(work_dir, 'harness.cpp')
+    binary = os.path.join(work_dir, 'harness')
+    with open(source, 'w') as f:
+        f.write(HARNESS)
+    subprocess.run([cxx, '-O2', '-std=c++11', '-Wall', '-I', os.path.join(project_dir, 'include'), source,
+                    os.path.join(project_dir, 'src', 'HistoryCodec.cpp'), '-o', binary], check=True)
+    return binary
+
+
+def random_series(rng, tier):
+    _, interval, span = TIERS[tier]
+    t = 1700000000 // span * span + rng.randrange(0, span // interval) * interval
+    temp, humidity, hydronic = rng.randint(100, 300), rng.randint(200, 700), rng.randint(300, 800)
+    series = []
+    for _ in range(rng.randint(1, 3000)):
+        roll = rng.random()
+        t += interval * (1 if roll < 0.97 else rng.choice((2, 5, 100, span // interval + 3)))
+        temp = max(-400, min(800, temp + rng.choice((0, 0, 0, 1, -1, 2, -2, rng.randint(-500, 500)))))
+        humidity = max(0, min(1000, humidity + rng.choice((0, 0, 1, -1, 5, -5))))
+        hydronic = max(-200, min(1200, hydronic + rng.randint(-3, 3)))
+        climate = rng.random() > 0.02
+        runtimes = [rng.choice((0, 0, 0, interval, rng.randint(1, interval))) for _ in RELAYS]
+        if rng.random() < 0.01:
+            runtimes[rng.randrange(len(RELAYS))] = interval + rng.randint(1, 30)   # Straddles the edge
+        series.append({
+            'time': t, 'temp': temp if climate else None, 'humidity': humidity if climate else None,
+            'hydronic': hydronic if rng.random() < 0.3 else None,
+            **dict(zip(RELAYS, runtimes)),
+        })
+    return series
+
+
+def expected_records(series, interval):
+    out = []
+    for s in series:
+        e = dict(s)
+        for r in RELAYS:
+            e[r] = min(e[r], interval)
+        out.append(e)
+    return out
+
+
+def harness_lines(samples):
+    nv = lambda v: NO_VALUE if v is None else v
+    return ''.join('%d %d %d %d %s\n' % (s['time'], nv(s['temp']), nv(s['humidity']), nv(s['hydronic']),
+                                         ' '.join(str(s[r]) for r in RELAYS)) for s in samples)
+
+
+def python_lines(files):
+    lines = []
+    nv = lambda v: NO_VALUE if v is None else v
+    for data in files:
+        name, samples, status = decode_file(data)
+        if name is None:
+            lines.append('BAD')
+            continue
+        lines += ['%d %d %d %d %s' % (s['time'], nv(s['temp']), nv(s['humidity']), nv(s['hydronic']),
+                                      ' '.join(str(s[r]) for r in RELAYS)) for s in samples]
+        lines.append(status.upper())
+    return lines
+
+
+def codec_check(args):
+    if shutil.which(args.cxx) is None:
+        print('Error: %s not found' % args.cxx)
+        return 1
+    work_dir = tempfile.mkdtemp(prefix='history_')
+    try:
+        binary = build_harness(args.cxx, args.project_dir, work_dir)
+        failed, records, encoded = 0, 0, 0
+        for seed in range(args.seed, args.seed + args.rounds):
+            rng = random.Random(seed)
+            tier = rng.randrange(len(TIERS))
+            series = random_series(rng, tier)
+            stream = subprocess.run([binary, 'e', str(tier)], input=harness_lines(series).encode(),
+                                    stdout=subprocess.PIPE, check=True).stdout
+            _, decoded, problems = decode_stream(stream, 0, 1 << 32)
+            expected = expected_records(series, TIERS[tier][1])
+            records += len(series)
+            encoded += len(stream)
+            if problems or decoded != expected:
+                failed += 1
+                bad = next((i for i, (d, e) in enumerate(zip(decoded, expected)) if d != e), min(len(decoded), len(expected)))
+                print('FAIL seed %d (%s): record %d of %d decoded as %s, expected %s %s' % (
+                    seed, TIERS[tier][0], bad, len(expected), decoded[bad] if bad < len(decoded) else None,
+                    expected[bad] if bad < len(expected) else None, problems))
+                continue
+
+            # Damage the files and make sure both decoders give up at the same place
+            files = split_files(stream)
+            damaged = []
+            for data in files:
+                data = bytearray(data)
+                for _ in range(rng.randint(1, 4)):
+                    if len(data) > HEADER.size and rng.random() < 0.5:
+                        data[rng.randrange(HEADER.size, len(data))] = rng.randrange(256)
+                    elif len(data) > HEADER.size:
+                        del data[rng.randrange(HEADER.size, len(data)):]
+                damaged.append(bytes(data))
+            blob = b''.join(struct.pack('<I', len(d)) + d for d in damaged)
+            ours = python_lines(damaged)
+            theirs = subprocess.run([binary, 'd'], input=blob, stdout=subprocess.PIPE,
+                                    check=True).stdout.decode().splitlines()
+            if ours != theirs:
+                failed += 1
+                bad = next((i for i, (a, b) in enumerate(zip(ours, theirs)) if a != b), min(len(ours), len(theirs)))
+                print('FAIL seed %d damaged: line %d python %r, C++ %r' % (
+                    seed, bad, ours[bad] if bad < len(ours) else None, theirs[bad] if bad < len(theirs) else None))
+        print('%d series, %d records, %d bytes encoded (%.2f bytes/record)' % (
+            args.rounds, records, encoded, encoded / max(1, records)))
+        if failed:
+            print('%d series FAILED' % failed)
+            return 1
+        print('codec round trip and damaged-file handling match')
+        return 0
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fetch and decode thermostat history')
+    parser.add_argument('host', nargs='?', help='Device hostname/IP')
+    parser.add_argument('--days', type=float, default=7.0, help='History to fetch, ending now (default 7)')
+    parser.add_argument('--from', dest='start', help='Start (ISO date/time or Unix time) instead of --days')
+    parser.add_argument('--to', dest='end', help='End (ISO date/time or Unix time, default now)')
+    parser.add_argument('--res', choices=('auto', '1m', '15m', '1h'), default='auto',
+                        help='Record interval (default auto: 1m up to 14 days, 15m up to 180)')
+    parser.add_argument('--csv', help='Write every record to this CSV file')
+    parser.add_argument('--hourly', action='store_true', help='Summarize per hour instead of per day')
+    parser.add_argument('--fahrenheit', action='store_true', help='Show temperatures in Fahrenheit')
+    parser.add_argument('--timeout', type=float, default=60.0, help='HTTP timeout')
+    parser.add_argument('--codec-check', action='store_true', help='Check the codec against this decoder instead')
+    parser.add_argument('--rounds', type=int, default=300, help='Random series for --codec-check (default 300)')
+    parser.add_argument('--seed', type=int, default=1, help='First --codec-check seed')
+    parser.add_argument('--cxx', default=os.environ.get('CXX', 'c++'), help='Host C++ compiler (default c++)')
+    parser.add_argument('--project-dir', default=os.path.dirname(os.path.abspath(__file__)))
+    args = parser.parse_args()
+
+    if args.codec_check:
+        return codec_check(args)
+    if not args.host:
+        parser.error('host is required unless --codec-check is given')
+    try:
+        end = parse_time(args.end) if args.end else int(time.time()) + 1
+        start = parse_time(args.start) if args.start else int(end - args.days * 86400)
+    except ValueError as e:
+        parser.error(str(e))
+    if start >= end:
+        parser.error('--from must be before --to')
+
+    started = time.perf_counter()
+    try:
+        stream = fetch(args.host, start, end, args.res, args.timeout)
+    except Exception as e:
+        print('Error: %s' % e)
+        return 1
+    elapsed = time.perf_counter() - started
+    try:
+        tier, samples, problems = decode_stream(stream, start, end)
+    except ValueError as e:
+        print('Error: %s' % e)
+        return 1
+
+    print('%s: %d %s records, %d bytes in %.1f s (%.2f bytes/record)' % (
+        args.host, len(samples), tier or '-', len(stream), elapsed, len(stream) / max(1, len(samples))))
+    for problem in problems:
+        print('  warning: %s' % problem)
+    if not samples:
+        return 1
+    print_summary(samples, args.fahrenheit, args.hourly)
+    if args.csv:
+        write_csv(args.csv, samples, args.fahrenheit)
+        print('Wrote %s' % args.csv)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,425 @@
+#!/usr/bin/env python3
+"""
+Property tests for the HVAC relay state machine (include/HvacEngine.h,
+src/HvacEngine.cpp) on the host.
+
+The engine is compiled with --cxx into a small harness that reads one tick of
+inputs per line and prints the state and relay bits after each update. Random
+scenarios drive it with a simulated room (heat/cool stages move the
+temperature, the room drifts towards the outdoor temperature), sensor noise,
+spikes and failed reads, irregular tick spacing (5 s sensor ticks mixed with
+immediate calls from web/MQTT setting changes), random mode/fan/setpoint
+changes, shower mode / hydronic lockout toggles, random staging settings and
+millis() values that wrap during the run.
+
+Every tick is checked against these properties:
+  exclusive   heat and cool relays are never on together
+  staging     stage 2 never without stage 1, never when disabled, never with
+              the reversing valve (HEAT2 is the valve there)
+  mode        no heat in off/cool mode or while inhibited, no cool in off/heat
+  min-off     a run never starts less than the minimum off time after the last
+  min-on      a run ended by temperature lasted at least the minimum on time
+  stage-time  stage 2 starts only after the stage 1 runtime, drops back only
+              after the stage 2 runtime
+  hysteresis  runs start only past the on threshold, end (unless forced) only
+              past the off threshold
+  liveness    a heat/cool call is never left waiting once the off time is over
+  fan         fan "on" always runs the fan; otherwise it follows fanRelayNeeded
+              while running; the fan schedule owns it only in cycle mode idle
+  chatter     starts per hour never exceed what the minimum off time allows
+
+Usage:
+  python3 hvac_properties.py
+  python3 hvac_properties.py --scenarios 1000 --ticks 5000 --seed 7
+  python3 hvac_properties.py --replay 123   # re-run one scenario seed verbosely
+"""
+
+import argparse
+import math
+import os
+import random
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+
+HEAT1, HEAT2, COOL1, COOL2, FAN = 0x01, 0x02, 0x04, 0x08, 0x10
+HEAT_BITS = HEAT1 | HEAT2
+COOL_BITS = COOL1 | COOL2
+
+MODES = ('off', 'heat', 'cool', 'auto')           # HvacMode order
+FAN_MODES = ('auto', 'on', 'cycle')               # HvacFanMode order
+STATES = ('idle', 'heat1', 'heat2', 'cool1', 'cool2')
+EVENTS = ('hold', 'heat call', 'cool call', 'stage 2 call', 'stage 2 clear', 'satisfied', 'force off')
+GUARDS = ('none', 'min off', 'min on', 'stage1', 'stage2')
+
+WRAP = 1 << 32
+
+HARNESS = r'''
+#include "HvacEngine.h"
+#include <chrono>
+#include <stdio.h>
+#include <stdlib.h>
+
+// stdin: one config line, then one line per tick; stdout: one line per tick, then the update time
+int main() {
+    HvacConfig config;
+    unsigned minOn, minOff, stage1, stage2;
+    int s2heat, s2cool, valve, fanNeeded;
+    if (scanf("%u %u %u %u %d %d %d %d", &minOn, &minOff, &stage1, &stage2,
+              &s2heat, &s2cool, &valve, &fanNeeded) != 8) return 2;
+    config.minOnMs = minOn;
+    config.minOffMs = minOff;
+    config.stage1MinRuntimeMs = stage1;
+    config.stage2MinRuntimeMs = stage2;
+    config.stage2HeatEnabled = s2heat;
+    config.stage2CoolEnabled = s2cool;
+    config.reversingValve = valve;
+    config.fanRelayNeeded = fanNeeded;
+
+    HvacEngine engine;
+    HvacInputs in;
+    unsigned now;
+    int mode, fanMode, inhibited;
+    char temp[32];
+    double seconds = 0;
+    while (scanf("%u %d %d %31s %f %f %f %f %f %f %d", &now, &mode, &fanMode, temp, &in.setHeat,
+                 &in.setCool, &in.setAuto, &in.swing, &in.autoSwing, &in.stage2Delta, &inhibited) == 11) {
+        in.mode = (HvacMode)mode;
+        in.fanMode = (HvacFanMode)fanMode;
+        in.temp = strtof(temp, NULL);
+        in.heatInhibited = inhibited;
+        auto start = std::chrono::steady_clock::now();
+        engine.update(in, config, now);
+        seconds += std::chrono::duration<double>(std::chrono::steady_clock::now() - start).count();
+        printf("%d %d %d %d %d\n", engine.state(), engine.relays(), engine.ownedRelays(),
+               engine.lastEvent(), engine.heldBy());
+        fflush(stdout);
+    }
+    printf("T %.9f\n", seconds);
+    return 0;
+}
+'''
+
+
+# ============================================================================
+# SCENARIOS
+# ============================================================================
+
+def random_config(rng):
+    valve = rng.random() < 0.25
+    return {
+        'min_on': rng.choice((0, 60000, 180000, 300000)),
+        'min_off': rng.choice((0, 120000, 300000, 600000)),
+        'stage1': rng.choice((0, 60000, 300000, 900000)),
+        'stage2': rng.choice((0, 60000, 120000)),
+        's2heat': rng.random() < 0.6,
+        's2cool': rng.random() < 0.6,
+        'valve': valve,
+        'fan_needed': rng.random() < 0.5,
+    }
+
+
+def generate(seed):
+    """Inputs for one scenario, with the room reacting to the engine's last output."""
+    rng = random.Random(seed)
+    config = random_config(rng)
+    now = rng.choice((0, rng.randrange(WRAP), WRAP - rng.randrange(1, 3600000)))
+    setpoints = {'heat': 70.0, 'cool': 76.0, 'auto': 73.0}
+    room = rng.uniform(60.0, 85.0)
+    outdoor = rng.uniform(10.0, 100.0)
+    noise = rng.choice((0.02, 0.1, 0.4))
+    state = {
+        'mode': rng.randrange(4), 'fan': rng.randrange(3), 'inhibited': False,
+        'swing': rng.choice((0.5, 1.0, 2.0)), 'auto_swing': rng.choice((1.0, 2.0, 3.0)),
+        'delta': rng.choice((0.5, 1.0, 2.0, 4.0)),
+    }
+    return config, rng, now, setpoints, room, outdoor, noise, state
+
+
+def next_tick(rng, now, setpoints, state):
+    if rng.random() < 0.05:
+        step = rng.randrange(0, 500)              # Immediate call after a setting change
+    else:
+        step = rng.randrange(4000, 6500)          # Sensor task tick
+    now = (now + step) % WRAP
+    if rng.random() < 0.004:
+        state['mode'] = rng.randrange(4)
+    if rng.random() < 0.004:
+        state['fan'] = rng.randrange(3)
+    if rng.random() < 0.003:
+        state['inhibited'] = not state['inhibited']
+    if rng.random() < 0.003:
+        key = rng.choice(('heat', 'cool', 'auto'))
+        setpoints[key] = round(setpoints[key] + rng.choice((-2.0, -1.0, 1.0, 2.0)), 1)
+    return now, step
+
+
+def room_step(room, outdoor, relays, seconds):
+    rate = 0.0
+    if relays & HEAT1 and not relays & COOL_BITS:
+        rate += 0.004 + (0.004 if relays & HEAT2 else 0.0)
+    if relays & COOL1:
+        rate -= 0.004 + (0.004 if relays & COOL2 else 0.0)
+    return room + seconds * (rate + (outdoor - room) * 0.00002)
+
+
+def sensor_reading(rng, room, noise):
+    roll = rng.random()
+    if roll < 0.002:
+        return float('nan')
+    if roll < 0.01:
+        return room + rng.choice((-1, 1)) * rng.uniform(2.0, 10.0)
+    return room + rng.gauss(0.0, noise)
+
+
+# ============================================================================
+# HARNESS
+# ============================================================================
+
+def build_harness(cxx, project_dir, work_dir):
+    source = os.path.join(work_dir, 'harness.cpp')
+    binary = os.path.join(work_dir, 'harness')
+    with open(source, 'w') as f:
+        f.write(HARNESS)
+    subprocess.run([cxx, '-O2', '-std=c++11', '-Wall', '-I', os.path.join(project_dir, 'include'), source,
+                    os.path.join(project_dir, 'src', 'HvacEngine.cpp'), '-o', binary], check=True)
+    return binary
+
+
+class Engine:
+    """Harness process driven one tick at a time (the room model needs each output)."""
+
+    def __init__(self, binary, config):
+        self.proc = subprocess.Popen([binary], stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True, bufsize=1)
+        self.proc.stdin.write('%d %d %d %d %d %d %d %d\n' % (
+            config['min_on'], config['min_off'], config['stage1'], config['stage2'],
+            config['s2heat'], config['s2cool'], config['valve'], config['fan_needed']))
+
+    def update(self, tick):
+        self.proc.stdin.write('%d %d %d %s %.2f %.2f %.2f %.2f %.2f %.2f %d\n' % (
+            tick['now'], tick['mode'], tick['fan'], 'nan' if math.isnan(tick['temp']) else '%.3f' % tick['temp'],
+            tick['set_heat'], tick['set_cool'], tick['set_auto'], tick['swing'], tick['auto_swing'],
+            tick['delta'], tick['inhibited']))
+        self.proc.stdin.flush()
+        state, relays, owned, event, held = (int(p) for p in self.proc.stdout.readline().split())
+        return {'state': state, 'relays': relays, 'owned': owned, 'event': event, 'held': held}
+
+    def close(self):
+        self.proc.stdin.close()
+        last = self.proc.stdout.readline().split()
+        self.proc.wait()
+        return float(last[1]) if len(last) == 2 and last[0] == 'T' else 0.0
+
+
+def run_scenario(binary, seed, ticks):
+    config, rng, now, setpoints, room, outdoor, noise, state = generate(seed)
+    engine = Engine(binary, config)
+    trace = []
+    relays = 0
+    for _ in range(ticks):
+        now, step = next_tick(rng, now, setpoints, state)
+        room = room_step(room, outdoor, relays, step / 1000.0)
+        tick = {
+            'now': now, 'step': step, 'mode': state['mode'], 'fan': state['fan'],
+            'temp': f32(round(sensor_reading(rng, room, noise), 3)), 'inhibited': int(state['inhibited']),
+            'set_heat': setpoints['heat'], 'set_cool': setpoints['cool'], 'set_auto': setpoints['auto'],
+            'swing': state['swing'], 'auto_swing': state['auto_swing'], 'delta': state['delta'],
+        }
+        tick.update(engine.update(tick))
+        relays = tick['relays']
+        trace.append(tick)
+    return config, trace, engine.close()
+
+
+# ============================================================================
+# PROPERTIES
+# ============================================================================
+
+def f32(value):
+    """Round to a C float so threshold comparisons match the engine exactly."""
+    return struct.unpack('f', struct.pack('f', value))[0]
+
+
+def elapsed(now, since):
+    return (now - since) % WRAP
+
+
+def heat_on_threshold(t):
+    if MODES[t['mode']] == 'auto':
+        return f32(f32(t['set_auto']) - f32(t['auto_swing']))
+    return f32(f32(t['set_heat']) - f32(t['swing']))
+
+
+def cool_on_threshold(t):
+    if MODES[t['mode']] == 'auto':
+        return f32(f32(t['set_auto']) + f32(t['auto_swing']))
+    return f32(f32(t['set_cool']) + f32(t['swing']))
+
+
+def check(config, trace):
+    """List of (tick index, property, message) for every violation."""
+    violations = []
+    prev = {'state': 0, 'relays': 0}
+    state_since = None
+    run_since = None
+    off_since = None
+    starts = []
+
+    def fail(i, prop, msg):
+        violations.append((i, prop, msg))
+
+    for i, t in enumerate(trace):
+        mode = MODES[t['mode']]
+        relays = t['relays']
+        was, now_state = STATES[prev['state']], STATES[t['state']]
+        running = now_state != 'idle'
+        heat_ok = mode in ('heat', 'auto') and not t['inhibited']
+        cool_ok = mode in ('cool', 'auto')
+
+        if relays & HEAT_BITS and relays & COOL_BITS:
+            fail(i, 'exclusive', 'heat and cool relays together (0x%02x)' % relays)
+        if (relays & HEAT2 and not relays & HEAT1) or (relays & COOL2 and not relays & COOL1):
+            fail(i, 'staging', 'stage 2 without stage 1 (0x%02x)' % relays)
+        if now_state.endswith('2') and not was.endswith('2') and \
+                (config['valve'] or not config['s2heat' if now_state == 'heat2' else 's2cool']):
+            fail(i, 'staging', '%s started while disabled' % now_state)
+        if relays & HEAT_BITS and not heat_ok:
+            fail(i, 'mode', 'heat relay on in %s mode (inhibited=%d)' % (mode, t['inhibited']))
+        if relays & COOL_BITS and not cool_ok:
+            fail(i, 'mode', 'cool relay on in %s mode' % mode)
+
+        if was == 'idle' and running:
+            if off_since is not None and elapsed(t['now'], off_since) < config['min_off']:
+                fail(i, 'min-off', 'restart after %d ms off' % elapsed(t['now'], off_since))
+            threshold_ok = (t['temp'] < heat_on_threshold(t)) if now_state.startswith('heat') \
+                else (t['temp'] > cool_on_threshold(t))
+            if not threshold_ok:
+                fail(i, 'hysteresis', '%s start at %.2f' % (now_state, t['temp']))
+            run_since = t['now']
+            starts.append(t['now'])
+        if was != 'idle' and not running:
+            forced = not (heat_ok if was.startswith('heat') else cool_ok)
+            if not forced:
+                if elapsed(t['now'], run_since) < config['min_on']:
+                    fail(i, 'min-on', 'run ended by temperature after %d ms' % elapsed(t['now'], run_since))
+                if was.startswith('heat'):
+                    satisfied = t['temp'] >= (heat_on_threshold(t) if mode == 'auto' else f32(t['set_heat']))
+                else:
+                    satisfied = t['temp'] <= cool_on_threshold(t) if mode == 'auto' else t['temp'] < f32(t['set_cool'])
+                if not satisfied:
+                    fail(i, 'hysteresis', '%s ended at %.2f without being satisfied' % (was, t['temp']))
+            off_since = t['now']
+        if was in ('heat1', 'cool1') and now_state.endswith('2') and \
+                elapsed(t['now'], state_since) < config['stage1']:
+            fail(i, 'stage-time', 'stage 2 after %d ms in stage 1' % elapsed(t['now'], state_since))
+        if was.endswith('2') and now_state in ('heat1', 'cool1') and \
+                elapsed(t['now'], state_since) < config['stage2']:
+            fail(i, 'stage-time', 'stage 2 dropped after %d ms' % elapsed(t['now'], state_since))
+
+        # Liveness: idle with a call pending and nothing in the way
+        if now_state == 'idle' and not math.isnan(t['temp']):
+            call = (heat_ok and t['temp'] < heat_on_threshold(t)) or (cool_ok and t['temp'] > cool_on_threshold(t))
+            delay_over = off_since is None or elapsed(t['now'], off_since) >= config['min_off']
+            if call and delay_over and was == 'idle':
+                fail(i, 'liveness', 'call at %.2f left waiting' % t['temp'])
+
+        fan_mode = FAN_MODES[t['fan']]
+        if fan_mode == 'on' and not relays & FAN:
+            fail(i, 'fan', 'fan off in fan "on" mode')
+        if fan_mode != 'on' and running and bool(relays & FAN) != config['fan_needed']:
+            fail(i, 'fan', 'fan %s while running with fanRelayNeeded=%d' % (
+                'on' if relays & FAN else 'off', config['fan_needed']))
+        schedule_owned = not t['owned'] & FAN
+        if schedule_owned != (fan_mode == 'cycle' and not running):
+            fail(i, 'fan', 'fan ownership wrong (owned=0x%02x, %s, %s)' % (t['owned'], fan_mode, now_state))
+
+        if t['state'] != prev['state']:
+            state_since = t['now']
+        prev = t
+
+    if config['min_off'] > 0:
+        allowed = 3600000 // config['min_off'] + 1
+        j = 0
+        for k in range(len(starts)):
+            while elapsed(starts[k], starts[j]) > 3600000:
+                j += 1
+            if k - j + 1 > allowed:
+                violations.append((len(trace) - 1, 'chatter', '%d starts within an hour (max %d)' % (k - j + 1, allowed)))
+                break
+    return violations, len(starts)
+
+
+def describe(config):
+    return 'min_on=%ds min_off=%ds stage1=%ds stage2=%ds s2heat=%d s2cool=%d valve=%d fan_needed=%d' % (
+        config['min_on'] // 1000, config['min_off'] // 1000, config['stage1'] // 1000, config['stage2'] // 1000,
+        config['s2heat'], config['s2cool'], config['valve'], config['fan_needed'])
+
+
+def print_trace(trace, around=None, width=6):
+    rows = range(len(trace)) if around is None else range(max(0, around - width), min(len(trace), around + 2))
+    for i in rows:
+        t = trace[i]
+        print('  %5d %10d %-4s %-5s %7.2f inh=%d  %-5s relays=0x%02x  %-13s held=%s' % (
+            i, t['now'], MODES[t['mode']], FAN_MODES[t['fan']], t['temp'], t['inhibited'],
+            STATES[t['state']], t['relays'], EVENTS[t['event']], GUARDS[t['held']]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Property tests for the HVAC relay state machine')
+    parser.add_argument('--scenarios', type=int, default=300, help='Random scenarios (default 300)')
+    parser.add_argument('--ticks', type=int, default=3000, help='Ticks per scenario (default 3000, ~4 h)')
+    parser.add_argument('--seed', type=int, default=1, help='First scenario seed')
+    parser.add_argument('--replay', type=int, metavar='SEED', help='Run one scenario and print every tick')
+    parser.add_argument('--cxx', default=os.environ.get('CXX', 'c++'), help='Host C++ compiler (default c++)')
+    parser.add_argument('--project-dir', default=os.path.dirname(os.path.abspath(__file__)))
+    args = parser.parse_args()
+
+    if shutil.which(args.cxx) is None:
+        print('Error: %s not found' % args.cxx)
+        return 1
+    work_dir = tempfile.mkdtemp(prefix='hvac_')
+    try:
+        binary = build_harness(args.cxx, args.project_dir, work_dir)
+        seeds = [args.replay] if args.replay is not None else range(args.seed, args.seed + args.scenarios)
+        totals = {}
+        ticks = 0
+        starts = 0
+        update_seconds = 0.0
+        failed = 0
+        started = time.perf_counter()
+        for seed in seeds:
+            config, trace, seconds = run_scenario(binary, seed, args.ticks)
+            violations, runs = check(config, trace)
+            ticks += len(trace)
+            starts += runs
+            update_seconds += seconds
+            if args.replay is not None:
+                print('seed %d: %s' % (seed, describe(config)))
+                print_trace(trace)
+            for _, prop, _ in violations:
+                totals[prop] = totals.get(prop, 0) + 1
+            if violations:
+                failed += 1
+                i, prop, msg = violations[0]
+                print('FAIL seed %d tick %d [%s] %s (%d violations)' % (seed, i, prop, msg, len(violations)))
+                print('  %s' % describe(config))
+                print_trace(trace, i)
+
+        print('\n%d scenarios, %d ticks (%.1f simulated hours), %d runs started' % (
+            len(seeds), ticks, ticks * 5.0 / 3600.0, starts))
+        print('engine update: %.0f ns/tick on the host; total %.1f s' % (
+            1e9 * update_seconds / max(1, ticks), time.perf_counter() - started))
+        if failed:
+            print('%d scenarios FAILED: %s' % (failed, ', '.join('%s=%d' % kv for kv in sorted(totals.items()))))
+            return 1
+        print('all properties held')
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,595 @@
+#!/usr/bin/env python3
+"""
+Runtime, starts and stage 2 analytics from recorded thermostat telemetry.
+
+Reads MQTT recordings and/or captured serial logs, follows each device's HVAC
+state through time and prints per-day summaries:
+  - run hours and duty cycle for heat, cool and fan, and hours in stage 2
+  - starts, the most starts in any clock hour and short cycles (runs shorter
+    than --short-run minutes)
+  - stage 2 escalations (stage 1 -> stage 2 during a call)
+  - heating/cooling degree-hours from the outdoor temperature (base --base)
+    and run hours per 100 degree-hours, a weather-normalized efficiency that
+    can be compared across days and devices
+
+Inputs (plain or .gz, any number, '-' for stdin), told apart line by line:
+  MQTT      "<time> <hostname>/<topic> <payload>", e.g. recorded with
+              mosquitto_sub -h broker -v -F '%U %t %p' -t '+/hvac_state' \\
+                -t '+/fan_state' -t '+/action' -t '+/outdoor_temperature' >> hvac.rec
+            hvac_state (idle/heat1/heat2/cool1/cool2) and fan_state come
+            from sendMQTTData(); from firmware without them the heating/
+            cooling action is used, so there is no stage 2 or fan data
+  logs      serial captures of the HVAC log lines with a time in front, e.g.
+            "pio device monitor -f time" or a logger that adds ISO or Unix
+            time: "[HVAC] idle -> heat1 (heat_call): ..." transitions and
+            the debug "Relay states: ... fan=1 ..." lines. The device is the
+            file name (or --device); times without a date need --date and
+            roll over at midnight
+Time is Unix seconds or ISO 8601; days are local time (TZ).
+
+Files are read in large chunks and only the lines of interest are picked out
+by one regular expression, so memory does not grow with the input and files
+with every topic recorded are skipped through at disk speed. Every device's
+files must be given in time order.
+
+Usage:
+  python3 hvac_runtime.py hvac.rec
+  python3 hvac_runtime.py --csv daily.csv hvac-2024.rec.gz hvac-2025.rec.gz
+  python3 hvac_runtime.py --device shop --date 2025-01-14 shop-serial.log
+  python3 hvac_runtime.py --short-run 8 --base 18 --from 2025-01-01 --to 2025-02-01 hvac.rec
+"""
+
+import argparse
+import concurrent.futures
+import datetime
+import gzip
+import os
+import re
+import sys
+import time
+import zlib
+
+CHUNK = 16 << 20
+SNIFF = 1 << 20              # Bytes looked at to tell a recording from a log
+CHANNELS = ('heat', 'heat2', 'cool', 'cool2', 'fan')
+CALLS = ('heat', 'cool')
+STATES = {                   # HvacEngine::stateName() -> (call, stage 2)
+    b'idle': (None, False),
+    b'heat1': ('heat', False),
+    b'heat2': ('heat', True),
+    b'cool1': ('cool', False),
+    b'cool2': ('cool', True),
+}
+ACTION_STATES = {b'heating': b'heat1', b'cooling': b'cool1', b'idle': b'idle', b'off': b'idle'}
+
+TIME = rb'(\d{9,10}(?:\.\d+)?|\d{4}-\d\d-\d\d[T ]\d\d:\d\d:\d\d(?:[.,]\d+)?(?:Z|[+-]\d\d:?\d\d)?|\d\d:\d\d:\d\d(?:\.\d+)?)'
+MQTT_RE = re.compile(rb'^(\S+) ([^\s/]+)/(hvac_state|fan_state|action|outdoor_temperature) (\S*)', re.M)
+LOG_RE = re.compile(rb'^\[?' + TIME + rb'\]?\s[^\n]*?(?:\[HVAC\] \w+ -> (\w+) \(|Relay states: [^\n]*?fan=(\d))',
+                    re.M)
+TIME_RE = re.compile(rb'\[?' + TIME + rb'\b')
+
+
+# ============================================================================
+# INPUT
+# ============================================================================
+
+def open_input(path):
+    if path == '-':
+        return sys.stdin.buffer
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rb')
+    return open(path, 'rb')
+
+
+def read_chunks(stream):
+    """Blocks of whole lines."""
+    rest = b''
+    while True:
+        data = stream.read(CHUNK)
+        if not data:
+            break
+        data = rest + data
+        cut = data.rfind(b'\n') + 1
+        if cut == 0:
+            rest = data
+            continue
+        rest = data[cut:]
+        yield data[:cut]
+    if rest:
+        yield rest + b'\n'
+
+
+class Clock:
+    """Turns the timestamps of one input into Unix time."""
+
+    def __init__(self, date):
+        self.date = date            # datetime.date for time-only stamps
+        self.last_time_only = None
+
+    def parse(self, text):
+        try:
+            return float(text)
+        except ValueError:
+            pass
+        text = text.decode('ascii')
+        if len(text) <= 15 and text[2:3] == ':':
+            return self.time_only(text)
+        stamp = datetime.datetime.fromisoformat(text.replace(',', '.').replace('Z', '+00:00'))
+        return stamp.timestamp()
+
+    def time_only(self, text):
+        if self.date is None:
+            raise ValueError('"%s" has no date - pass --date' % text)
+        clock = datetime.time.fromisoformat(text)
+        if self.last_time_only is not None and clock < self.last_time_only:
+            self.date += datetime.timedelta(days=1)
+        self.last_time_only = clock
+        return datetime.datetime.combine(self.date, clock).timestamp()
+
+
+# ============================================================================
+# ANALYSIS
+# ============================================================================
+
+class Day:
+    __slots__ = ('label', 'start', 'end', 'observed', 'run', 'starts', 'hour_starts', 'short', 'escalations',
+                 'hdh', 'cdh', 'outdoor_seconds')
+
+    def __init__(self, t):
+        day = datetime.date.fromtimestamp(t)
+        self.label = day.isoformat()
+        self.start = time.mktime(day.timetuple())
+        self.end = time.mktime((day + datetime.timedelta(days=1)).timetuple())
+        self.observed = 0.0
+        self.run = dict.fromkeys(CHANNELS, 0.0)
+        self.starts = dict.fromkeys(CHANNELS, 0)
+        self.hour_starts = {'heat': [0] * 24, 'cool': [0] * 24}
+        self.short = {'heat': 0, 'cool': 0}
+        self.escalations = {'heat': 0, 'cool': 0}
+        self.hdh = 0.0
+        self.cdh = 0.0
+        self.outdoor_seconds = 0.0
+
+    def row(self, device):
+        r = {'device': device, 'day': self.label, 'hours': self.observed / 3600.0}
+        for channel in CHANNELS:
+            r[channel + '_h'] = self.run[channel] / 3600.0
+            r[channel + '_starts'] = self.starts[channel]
+        for call in CALLS:
+            r[call + '_duty'] = 100.0 * self.run[call] / self.observed if self.observed else 0.0
+            r[call + '_max_per_h'] = max(self.hour_starts[call])
+            r[call + '_short'] = self.short[call]
+            r[call + '_esc'] = self.escalations[call]
+        r['outdoor_h'] = self.outdoor_seconds / 3600.0
+        r['hdh'] = self.hdh
+        r['cdh'] = self.cdh
+        r['heat_per_100dh'] = 100.0 * r['heat_h'] / self.hdh if self.hdh >= 1.0 else None
+        r['cool_per_100dh'] = 100.0 * r['cool_h'] / self.cdh if self.cdh >= 1.0 else None
+        return r
+
+
+class Device:
+    """One thermostat's state. Time is accounted when something ends - a run, an outdoor reading, the input."""
+
+    def __init__(self, name, analysis):
+        self.name = name
+        self.analysis = analysis
+        self.first = None           # First event
+        self.last = None            # Latest event
+        self.until = None           # End of the last input this device was in
+        self.days = []              # Day records in time order
+        self.current = None         # The one most events land in
+        self.call = None            # 'heat', 'cool' or None
+        self.stage2 = False
+        self.on = {}                # channel -> start of the current run
+        self.outdoor = None         # (value, since)
+        self.staged = False         # hvac_state or [HVAC] lines seen: ignore action
+
+    def seen(self, t):
+        """Note an event's time; False for one older than the last (inputs out of order)."""
+        if self.last is None:
+            self.first = t
+        elif t < self.last:
+            self.analysis.out_of_order += 1
+            return False
+        self.last = t
+        return True
+
+    def day(self, t):
+        """Day record containing t."""
+        day = self.current
+        if day is not None and day.start <= t < day.end:
+            return day
+        days = self.days
+        for day in reversed(days):
+            if day.start <= t < day.end:
+                return day
+            if day.end <= t:
+                break
+        day = Day(t)
+        days.append(day)
+        days.sort(key=lambda d: d.start)
+        self.current = days[-1]
+        return day
+
+    def spans(self, t0, t1):
+        """(day, seconds) pieces of [t0, t1)."""
+        while t0 < t1:
+            day = self.day(t0)
+            end = min(t1, day.end)
+            yield day, end - t0
+            t0 = end
+
+    def begin(self, channel, t):
+        self.on[channel] = t
+        day = self.day(t)
+        day.starts[channel] += 1
+        if channel in day.hour_starts:
+            day.hour_starts[channel][min(23, int((t - day.start) // 3600))] += 1
+
+    def stop(self, channel, t):
+        started = self.on.pop(channel, None)
+        if started is None:
+            return
+        day = self.day(t)
+        if day.start <= started:
+            day.run[channel] += t - started
+        else:
+            for piece, seconds in self.spans(started, t):
+                piece.run[channel] += seconds
+        if channel in CALLS and t - started < self.analysis.short_run:
+            day.short[channel] += 1
+
+    def state(self, name, t):
+        wanted = STATES.get(name)
+        if wanted is None or not self.seen(t):
+            return
+        call, stage2 = wanted
+        if call != self.call:
+            if self.call is not None:
+                if self.stage2:
+                    self.stop(self.call + '2', t)
+                self.stop(self.call, t)
+                self.stage2 = False
+            if call is not None:
+                self.begin(call, t)
+            self.call = call
+        if call is not None and stage2 != self.stage2:
+            if stage2:
+                self.begin(call + '2', t)
+                if self.on[call] < t:
+                    self.day(t).escalations[call] += 1
+            else:
+                self.stop(call + '2', t)
+            self.stage2 = stage2
+
+    def fan(self, on, t):
+        if not self.seen(t):
+            return
+        if on and 'fan' not in self.on:
+            self.begin('fan', t)
+        elif not on:
+            self.stop('fan', t)
+
+    def outdoor_temperature(self, value, t):
+        if not self.seen(t):
+            return
+        self.close_outdoor(t)
+        try:
+            self.outdoor = (float(value), t)
+        except ValueError:
+            self.outdoor = None
+
+    def close_outdoor(self, t):
+        if self.outdoor is None:
+            return
+        value, since = self.outdoor
+        base = self.analysis.base
+        for day, seconds in self.spans(since, t):
+            day.outdoor_seconds += seconds
+            if value < base:
+                day.hdh += (base - value) * seconds / 3600.0
+            else:
+                day.cdh += (value - base) * seconds / 3600.0
+
+    def finish(self):
+        """Close what is still running at the end of the input and return the day rows."""
+        if self.first is None:
+            return []
+        until = max(self.until or self.last, self.last)
+        for channel in list(self.on):
+            self.stop(channel, until)
+        self.close_outdoor(until)
+        for day, seconds in self.spans(self.first, until):
+            day.observed += seconds
+        return [day.row(self.name) for day in self.days if day.observed > 0]
+
+
+class Analysis:
+    def __init__(self, base, short_run, start, end, share=(0, 1)):
+        self.base = base
+        self.short_run = short_run
+        self.start = start
+        self.end = end
+        self.share = share          # (index, count): the devices this process handles
+        self.devices = {}
+        self.skipped = set()
+        self.lines = 0
+        self.events = 0
+        self.bytes = 0
+        self.out_of_order = 0
+
+    def device(self, name):
+        """Device record, None when another process handles it."""
+        device = self.devices.get(name)
+        if device is None:
+            if name in self.skipped:
+                return None
+            index, count = self.share
+            if zlib.crc32(name) % count != index:
+                self.skipped.add(name)
+                return None
+            device = self.devices[name] = Device(name.decode('utf-8', 'replace'), self)
+        return device
+
+    def feed(self, stream, clock, log_device):
+        """Apply one input's events; the format is decided from its first lines."""
+        seen, last_line, last_event = set(), b'', None
+        handler = None
+        for chunk in read_chunks(stream):
+            self.bytes += len(chunk)
+            self.lines += chunk.count(b'\n')
+            if handler is None:
+                mqtt = MQTT_RE.search(chunk, 0, SNIFF) is not None
+                handler = self.feed_mqtt if mqtt else self.feed_log
+            last_event = handler(chunk, clock, seen, log_device) or last_event
+            tail = chunk.rstrip(b'\n')
+            last_line = tail[tail.rfind(b'\n') + 1:] or last_line
+        # The recording ran until its last line, whatever that line was
+        until = last_event
+        m = TIME_RE.match(last_line)
+        if m and until is not None:
+            try:
+                until = max(until, min(clock.parse(m.group(1)), self.end))
+            except ValueError:
+                pass
+        for device in seen:
+            device.until = until if device.until is None else max(device.until, until)
+
+    def feed_mqtt(self, chunk, clock, seen, log_device):
+        start, end, devices, parse = self.start, self.end, self.devices, clock.parse
+        t = None
+        events = MQTT_RE.findall(chunk)
+        for stamp, host, topic, value in events:
+            try:
+                t = float(stamp)
+            except ValueError:
+                t = parse(stamp)
+            if t < start or t >= end:
+                continue
+            device = devices.get(host) or self.device(host)
+            if device is None:
+                continue
+            seen.add(device)
+            if topic == b'hvac_state':
+                device.staged = True
+                device.state(value, t)
+            elif topic == b'fan_state':
+                device.fan(value == b'on', t)
+            elif topic == b'action':
+                if not device.staged:
+                    device.state(ACTION_STATES.get(value), t)
+            else:
+                device.outdoor_temperature(value, t)
+        self.events += len(events)
+        return t
+
+    def feed_log(self, chunk, clock, seen, log_device):
+        start, end = self.start, self.end
+        device = self.device(log_device.encode('utf-8'))
+        t = None
+        events = LOG_RE.findall(chunk)
+        if device is None:
+            self.events += len(events)
+            return None
+        seen.add(device)
+        for stamp, to, fan in events:
+            t = clock.parse(stamp)
+            if t < start or t >= end:
+                continue
+            if to:
+                device.staged = True
+                device.state(to, t)
+            else:
+                device.fan(fan == b'1', t)
+        self.events += len(events)
+        return t
+
+    def finish(self):
+        rows = []
+        for device in self.devices.values():
+            rows.extend(device.finish())
+        rows.sort(key=lambda r: (r['device'], r['day']))
+        return rows
+
+
+def analyze(options, share):
+    """Run the inputs for one share of the devices (a process of --jobs)."""
+    paths, device_name, date, base, short_run, start, end = options
+    analysis = Analysis(base, short_run, start, end, share)
+    for path in paths:
+        name = device_name or ('stdin' if path == '-' else os.path.basename(path).split('.')[0])
+        stream = open_input(path)
+        try:
+            analysis.feed(stream, Clock(date), name)
+        except (OSError, ValueError, EOFError) as e:
+            raise type(e)('%s: %s' % (path, e))
+        finally:
+            if stream is not sys.stdin.buffer:
+                stream.close()
+    return {'rows': analysis.finish(), 'staged': {d.name: d.staged for d in analysis.devices.values()},
+            'lines': analysis.lines, 'bytes': analysis.bytes, 'events': analysis.events,
+            'out_of_order': analysis.out_of_order}
+
+
+# ============================================================================
+# REPORT
+# ============================================================================
+
+COLUMNS = (
+    # header, key, format
+    ('DAY', 'day', '%-10s'),
+    ('HOURS', 'hours', '%5.1f'),
+    ('HEAT h', 'heat_h', '%6.2f'),
+    ('DUTY', 'heat_duty', '%4.0f%%'),
+    ('STARTS', 'heat_starts', '%6d'),
+    ('MAX/h', 'heat_max_per_h', '%5d'),
+    ('SHORT', 'heat_short', '%5d'),
+    ('STG2 h', 'heat2_h', '%6.2f'),
+    ('ESC', 'heat_esc', '%4d'),
+    ('COOL h', 'cool_h', '%6.2f'),
+    ('DUTY', 'cool_duty', '%4.0f%%'),
+    ('STARTS', 'cool_starts', '%6d'),
+    ('MAX/h', 'cool_max_per_h', '%5d'),
+    ('SHORT', 'cool_short', '%5d'),
+    ('STG2 h', 'cool2_h', '%6.2f'),
+    ('ESC', 'cool_esc', '%4d'),
+    ('FAN h', 'fan_h', '%6.2f'),
+    ('HDH', 'hdh', '%6.0f'),
+    ('CDH', 'cdh', '%6.0f'),
+    ('H/100', 'heat_per_100dh', '%5.1f'),
+    ('C/100', 'cool_per_100dh', '%5.1f'),
+)
+CSV_KEYS = ('device', 'day', 'hours') + tuple(
+    '%s_%s' % (c, k) for c in CHANNELS for k in ('h', 'starts')) + tuple(
+    '%s_%s' % (c, k) for c in ('heat', 'cool') for k in ('duty', 'max_per_h', 'short', 'esc')) + (
+    'outdoor_h', 'hdh', 'cdh', 'heat_per_100dh', 'cool_per_100dh')
+
+
+def total_row(rows):
+    total = {'day': 'total', 'hours': sum(r['hours'] for r in rows)}
+    for key in rows[0]:
+        if key.endswith(('_h', '_starts', '_short', '_esc')) or key in ('hdh', 'cdh'):
+            total[key] = sum(r[key] for r in rows)
+    for call in ('heat', 'cool'):
+        total[call + '_duty'] = 100.0 * total[call + '_h'] / total['hours'] if total['hours'] else 0.0
+        total[call + '_max_per_h'] = max(r[call + '_max_per_h'] for r in rows)
+    total['heat_per_100dh'] = 100.0 * total['heat_h'] / total['hdh'] if total['hdh'] >= 1.0 else None
+    total['cool_per_100dh'] = 100.0 * total['cool_h'] / total['cdh'] if total['cdh'] >= 1.0 else None
+    return total
+
+
+def format_row(r):
+    cells = []
+    for header, key, fmt in COLUMNS:
+        width = max(len(header), len(fmt % 0) if key != 'day' else 10)
+        value = r.get(key)
+        cells.append(('%*s' % (width, '-')) if value is None else (fmt % value).rjust(width))
+    return ' '.join(cells)
+
+
+def print_report(rows, staged, base):
+    header = ' '.join(h.rjust(max(len(h), len(f % 0) if k != 'day' else 10)) if k != 'day' else '%-10s' % h
+                      for h, k, f in COLUMNS)
+    for name in sorted(staged):
+        device_rows = [r for r in rows if r['device'] == name]
+        if not device_rows:
+            continue
+        notes = []
+        if not staged[name]:
+            notes.append('from action only: no stage 2 or fan data')
+        if not any(r['outdoor_h'] for r in device_rows):
+            notes.append('no outdoor temperature: no degree-hours')
+        print('\n%s%s' % (name, ' (%s)' % '; '.join(notes) if notes else ''))
+        print(header)
+        for r in device_rows:
+            print(format_row(r))
+        if len(device_rows) > 1:
+            print(format_row(total_row(device_rows)))
+    print('\nDUTY = run time / recorded time; MAX/h = most starts in a clock hour; SHORT = runs under the '
+          '--short-run limit;\nESC = stage 1 -> stage 2 escalations; HDH/CDH = degree-hours from base %g; '
+          'H/100, C/100 = run hours per 100 degree-hours' % base)
+
+
+def write_csv(path, rows):
+    with open(path, 'w') as f:
+        f.write(','.join(CSV_KEYS) + '\n')
+        for r in rows:
+            values = []
+            for key in CSV_KEYS:
+                value = r[key]
+                values.append('' if value is None else value if isinstance(value, str) else
+                              str(value) if isinstance(value, int) else '%.4f' % value)
+            f.write(','.join(values) + '\n')
+
+
+def parse_time(text):
+    if text.replace('.', '', 1).isdigit():
+        return float(text)
+    return datetime.datetime.fromisoformat(text).timestamp()
+
+
+# ============================================================================
+def main():
+    parser = argparse.ArgumentParser(description='HVAC runtime, starts and stage 2 analytics from recorded telemetry')
+    parser.add_argument('inputs', nargs='+', help="MQTT recordings or serial logs (.gz allowed, '-' for stdin)")
+    parser.add_argument('--device', help='Device name for log lines (default: the file name)')
+    parser.add_argument('--date', help='Date (YYYY-MM-DD) of the first line of logs stamped with the time only')
+    parser.add_argument('--short-run', type=float, default=10.0,
+                        help='Heat/cool runs shorter than this many minutes are short cycles (default 10)')
+    parser.add_argument('--base', type=float, default=65.0,
+                        help='Degree-hour base in the recorded unit (default 65, use 18 for Celsius)')
+    parser.add_argument('--from', dest='start', help='Ignore events before this (ISO date/time or Unix time)')
+    parser.add_argument('--to', dest='end', help='Ignore events from this time on')
+    parser.add_argument('--csv', help='Write the per-day rows to this CSV file')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1,
+                        help='Processes, each taking a share of the devices (default: CPU count)')
+    args = parser.parse_args()
+
+    try:
+        date = datetime.date.fromisoformat(args.date) if args.date else None
+        start = parse_time(args.start) if args.start else float('-inf')
+        end = parse_time(args.end) if args.end else float('inf')
+    except ValueError as e:
+        parser.error(str(e))
+    if start >= end:
+        parser.error('--from must be before --to')
+
+    jobs = 1 if '-' in args.inputs else max(1, args.jobs)
+    options = (args.inputs, args.device, date, args.base, args.short_run * 60.0, start, end)
+    started = time.perf_counter()
+    try:
+        if jobs == 1:
+            results = [analyze(options, (0, 1))]
+        else:
+            with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as pool:
+                results = list(pool.map(analyze, [options] * jobs, [(i, jobs) for i in range(jobs)]))
+    except (OSError, ValueError, EOFError) as e:
+        print('Error: %s' % e)
+        return 1
+    elapsed = time.perf_counter() - started
+    rows = sorted((r for result in results for r in result['rows']), key=lambda r: (r['device'], r['day']))
+    staged = {}
+    for result in results:
+        staged.update(result['staged'])
+    lines, size, events = (results[0][key] for key in ('lines', 'bytes', 'events'))
+
+    print('%d lines (%.1f MB), %d events, %d devices, %d device-days in %.2f s (%.0f MB/s, %d process%s)' % (
+        lines, size / 1e6, events, len(staged), len(rows), elapsed, size / 1e6 / max(elapsed, 1e-6), jobs,
+        '' if jobs == 1 else 'es'))
+    out_of_order = sum(result['out_of_order'] for result in results)
+    if out_of_order:
+        print('warning: %d events older than the device\'s previous one were skipped - give each device\'s files '
+              'in time order' % out_of_order)
+    if not rows:
+        print('No HVAC state found - record hvac_state/fan_state/action or the [HVAC] log lines')
+        return 1
+    print_report(rows, staged, args.base)
+    if args.csv:
+        write_csv(args.csv, rows)
+        print('Wrote %s' % args.csv)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
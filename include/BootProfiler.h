@@ -0,0 +1,106 @@
+/*
+ * BootProfiler - Timestamped startup phases for Simple Thermostat
+ * Copyright (c) 2025 Jonn Taylor
+ *
+ * setup() starts the slow, independent parts of startup (radar handshake,
+ * filesystem mount, WiFi association) on their own tasks or in the WiFi
+ * stack, so phases overlap. Each phase records when it started and how long
+ * it took, measured from power-up (esp_timer, which includes the bootloader),
+ * and the core it ran on. Milestones such as "relays" are phases of zero
+ * length.
+ *
+ * Phases may begin/end on any task. Each finished phase is logged as
+ *   [BOOT] radar        +   412 ms   1873 ms  core 1
+ * and the table is served at /api/boot.
+ *
+ * Fixed capacity, no heap allocation.
+ */
+
+#ifndef BOOT_PROFILER_H
+#define BOOT_PROFILER_H
+
+#include <Arduino.h>
+#include "esp_timer.h"
+#include "Log.h"
+
+#define BOOT_PROFILER_MAX_PHASES 16
+
+struct BootPhase {
+    const char* name;
+    uint32_t startMs;       // Since power-up
+    uint32_t durationMs;    // Valid once done
+    uint8_t core;           // Core the phase started on
+    bool done;
+};
+
+class BootProfiler {
+public:
+    BootProfiler() : phaseCount(0) {
+        portMUX_INITIALIZE(&lock);
+    }
+
+    static uint32_t nowMs() {
+        return (uint32_t)(esp_timer_get_time() / 1000);
+    }
+
+    // Start a phase; returns its id for end(), or -1 if the table is full
+    int begin(const char* name) {
+        int id = -1;
+        portENTER_CRITICAL(&lock);
+        if (phaseCount < BOOT_PROFILER_MAX_PHASES) {
+            id = phaseCount++;
+            BootPhase& phase = phases[id];
+            phase.name = name;
+            phase.startMs = nowMs();
+            phase.durationMs = 0;
+            phase.core = (uint8_t)xPortGetCoreID();
+            phase.done = false;
+        }
+        portEXIT_CRITICAL(&lock);
+        return id;
+    }
+
+    void end(int id) {
+        if (id < 0 || id >= phaseCount) return;
+        BootPhase snapshot;
+        portENTER_CRITICAL(&lock);
+        BootPhase& phase = phases[id];
+        bool first = !phase.done;
+        if (first) {
+            phase.durationMs = nowMs() - phase.startMs;
+            phase.done = true;
+        }
+        snapshot = phase;
+        portEXIT_CRITICAL(&lock);
+        if (first) {
+            LOG_I(SYSTEM, "[BOOT] %-12s +%6lu ms %6lu ms  core %u\n", snapshot.name,
+                          (unsigned long)snapshot.startMs, (unsigned long)snapshot.durationMs, snapshot.core);
+        }
+    }
+
+    // Zero-length phase marking a point in startup (first call only)
+    void mark(const char* name) {
+        for (int i = 0; i < phaseCount; i++) {
+            if (strcmp(phases[i].name, name) == 0) return;
+        }
+        end(begin(name));
+    }
+
+    int count() const { return phaseCount; }
+    const BootPhase& phase(int id) const { return phases[id]; }
+
+    // Start of a named phase, 0 if it has not happened
+    uint32_t startOf(const char* name) const {
+        for (int i = 0; i < phaseCount; i++) {
+            if (strcmp(phases[i].name, name) == 0) return phases[i].startMs;
+        }
+        return 0;
+    }
+
+private:
+    BootPhase phases[BOOT_PROFILER_MAX_PHASES];
+    volatile int phaseCount;
+    portMUX_TYPE lock;
+};
+
+#endif // BOOT_PROFILER_H
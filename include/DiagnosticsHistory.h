@@ -0,0 +1,113 @@
+/*
+ * DiagnosticsHistory.h - Runtime diagnostics time series for Simple Thermostat
+ *
+ * Keeps a ring buffer of periodic runtime samples (taken from
+ * logRuntimeDiagnostics every 30 seconds):
+ * - Heap free / largest free block / minimum free and allocated/free block counts
+ * - Stack high-water marks for the loop, sensor and display tasks
+ * - Per-task CPU usage from FreeRTOS run-time stats (uxTaskGetSystemState),
+ *   in percent of one core: on the dual-core S3 the columns add up to 200%.
+ *   A build without run-time stats (configGENERATE_RUN_TIME_STATS) and the
+ *   first sample report DIAG_CPU_UNAVAILABLE, shown as -1 in the CSV
+ * - MQTT and HTTP request counters for the sample interval
+ *
+ * Served by /api/diag as CSV (default) or packed little-endian binary
+ * (?format=bin) for diag_monitor.py.
+ */
+
+#ifndef DIAGNOSTICS_HISTORY_H
+#define DIAGNOSTICS_HISTORY_H
+
+#include <Arduino.h>
+
+// Forward declaration for debugLog from Main-Thermostat.cpp
+extern void debugLog(const char* format, ...);
+
+#define DIAG_HISTORY_SAMPLES   120   // 1 hour at one sample per 30 seconds
+#define DIAG_BINARY_MAGIC      0x47414944UL // "DIAG"
+#define DIAG_BINARY_VERSION    1
+#define DIAG_CPU_UNAVAILABLE   0xFF  // cpu[] value when there is no run-time stats reading
+
+// Tasks with their own CPU column
+enum DiagTask {
+    DIAG_TASK_LOOP = 0,
+    DIAG_TASK_SENSOR,
+    DIAG_TASK_DISPLAY,
+    DIAG_TASK_ASYNC_TCP,
+    DIAG_TASK_IDLE0,
+    DIAG_TASK_IDLE1,
+    DIAG_TASK_OTHER,
+    DIAG_TASK_COUNT
+};
+
+// One sample - packed so the binary endpoint is a straight copy
+struct __attribute__((packed)) DiagSample {
+    uint32_t uptimeSec;         // Seconds since boot
+    uint32_t heapFree;          // Free 8-bit capable heap
+    uint32_t heapLargest;       // Largest free block (fragmentation indicator)
+    uint32_t heapMinFree;       // Lowest free heap since boot
+    uint16_t heapAllocBlocks;   // Allocated heap blocks
+    uint16_t heapFreeBlocks;    // Free heap blocks
+    uint16_t stackLoop;         // Stack high-water marks (words)
+    uint16_t stackSensor;
+    uint16_t stackDisplay;
+    uint8_t cpu[DIAG_TASK_COUNT]; // CPU % of one core per DiagTask over the interval (sum 100 x cores)
+    uint16_t mqttRx;            // MQTT messages received this interval
+    uint16_t mqttPublishes;     // sendMQTTData() passes this interval
+    uint16_t mqttReconnects;    // MQTT (re)connect attempts this interval
+    uint16_t httpRequests;      // HTTP requests this interval
+};
+
+// Header in front of the binary dump
+struct __attribute__((packed)) DiagBinaryHeader {
+    uint32_t magic;
+    uint8_t version;
+    uint8_t taskCount;
+    uint16_t sampleSize;
+    uint16_t sampleCount;
+    uint16_t intervalSec;
+};
+
+class DiagnosticsHistory {
+public:
+    DiagnosticsHistory();
+
+    // Tasks to report individually (NULL handles are skipped)
+    void setTasks(TaskHandle_t loopTask, TaskHandle_t sensorTask, TaskHandle_t displayTask);
+    void setInterval(uint16_t intervalSec) { _intervalSec = intervalSec; }
+
+    // Counters - cheap enough to call from any task
+    void countMqttRx() { _mqttRx++; }
+    void countMqttPublish() { _mqttPublishes++; }
+    void countMqttReconnect() { _mqttReconnects++; }
+    void countHttpRequest() { _httpRequests++; }
+
+    // Take a sample and push it into the ring (returns the new sample)
+    const DiagSample& sample();
+
+    int getCount() const { return _count; }
+    const DiagSample& getSample(int i) const; // 0 = oldest
+
+    // Stream the history for the web endpoint (oldest sample first)
+    void writeCSV(Print& out) const;
+    size_t writeBinary(Print& out) const;
+
+private:
+    void sampleCpu(DiagSample& s);
+
+    DiagSample _samples[DIAG_HISTORY_SAMPLES];
+    int _head;
+    int _count;
+    uint16_t _intervalSec;
+
+    TaskHandle_t _tasks[DIAG_TASK_COUNT];
+    uint32_t _lastTaskRuntime[DIAG_TASK_COUNT];
+    uint32_t _lastTotalRuntime;
+
+    volatile uint16_t _mqttRx;
+    volatile uint16_t _mqttPublishes;
+    volatile uint16_t _mqttReconnects;
+    volatile uint16_t _httpRequests;
+};
+
+#endif // DIAGNOSTICS_HISTORY_H
@@ -0,0 +1,153 @@
+/*
+ * HistoryCodec - Delta/varint time-series records for Simple Thermostat
+ * Copyright (c) 2025 Jonn Taylor
+ *
+ * Temperature, humidity, hydronic temperature and relay runtime are kept at
+ * three fixed intervals (tiers): 1 minute, 15 minutes and 1 hour. The 1 minute
+ * samples are averaged from the live readings, the coarser tiers are rolled up
+ * from the 1 minute samples (HistoryAccumulator).
+ *
+ * Each tier is a series of files, one per fileSpan, that start with a 16-byte
+ * header followed by one record per interval:
+ *   flags     bit 0-4  runtime present for heat1, heat2, cool1, cool2, fan
+ *             bit 5    temperature + humidity present
+ *             bit 6    skip count present
+ *             bit 7    hydronic temperature present
+ *   [skip]    varint - intervals with no data before this record
+ *   [temp]    zigzag varint - 0.1 C change since the previous record
+ *   [hum]     zigzag varint - 0.1 % change
+ *   [hyd]     zigzag varint - 0.1 C change since the previous hydronic value
+ *   [runtime] varint seconds, one per set runtime bit
+ * A record's time is implied by its position, so a steady idle minute costs 3
+ * bytes. Deltas start from 0 in every file so each file decodes on its own.
+ *
+ * No Arduino dependencies so the same code can be exercised on the host (see
+ * history_client.py, which decodes the /api/history stream).
+ */
+
+#ifndef HISTORY_CODEC_H
+#define HISTORY_CODEC_H
+
+#include <stddef.h>
+#include <stdint.h>
+
+#define HISTORY_MAGIC        0x31545348UL  // "HST1"
+#define HISTORY_VERSION      1
+#define HISTORY_HEADER_SIZE  16
+#define HISTORY_MAX_RECORD   32            // Longest possible record (flags, skip, 3 values, 5 runtimes)
+#define HISTORY_RELAYS       5             // Runtime columns, HVAC_RELAY_* bit order
+#define HISTORY_NO_VALUE     INT16_MIN     // Missing temperature/humidity/hydronic value
+
+#define HISTORY_FLAG_CLIMATE  0x20
+#define HISTORY_FLAG_SKIP     0x40
+#define HISTORY_FLAG_HYDRONIC 0x80
+
+enum HistoryTier : uint8_t {
+    HISTORY_1M,
+    HISTORY_15M,
+    HISTORY_1H,
+    HISTORY_TIER_COUNT
+};
+
+struct HistoryTierInfo {
+    const char* name;
+    uint32_t interval;     // Seconds per record
+    uint32_t fileSpan;     // Seconds per file (a multiple of interval)
+    uint32_t retention;    // Files older than this are deleted
+};
+
+extern const HistoryTierInfo HISTORY_TIERS[HISTORY_TIER_COUNT];
+
+// One interval of history
+struct HistorySample {
+    uint32_t time;                       // Start of the interval (Unix time, UTC)
+    int16_t temp10;                      // 0.1 C, HISTORY_NO_VALUE = no reading
+    int16_t humidity10;                  // 0.1 %
+    int16_t hydronic10;                  // 0.1 C, HISTORY_NO_VALUE = hydronic heating off
+    uint16_t runtime[HISTORY_RELAYS];    // Seconds each relay was on during the interval
+};
+
+// Averages readings (or finer samples) over one interval
+class HistoryAccumulator {
+public:
+    HistoryAccumulator();
+
+    void reset(uint32_t slot);
+    // Live reading held for ms milliseconds; NAN values are skipped
+    void addReading(float tempC, float humidity, float hydronicC, uint8_t relays, uint32_t ms);
+    // Finer-tier sample (rollups)
+    void addSample(const HistorySample& sample);
+    // Average/total for the interval; false when nothing was added
+    bool finish(HistorySample& out) const;
+
+    uint32_t slot() const { return _slot; }
+    bool empty() const { return _count == 0; }
+
+private:
+    uint32_t _slot;
+    uint32_t _count;
+    int32_t _tempSum;
+    int32_t _humiditySum;
+    int32_t _hydronicSum;
+    uint32_t _tempCount;
+    uint32_t _hydronicCount;
+    uint32_t _runtimeMs[HISTORY_RELAYS];
+};
+
+// Delta state carried from one record to the next within a file
+struct HistoryDeltaState {
+    uint32_t index;        // Next interval slot in the file
+    int16_t temp10;
+    int16_t humidity10;
+    int16_t hydronic10;
+};
+
+class HistoryEncoder {
+public:
+    HistoryEncoder();
+
+    // Start a new, empty file; the header is written to out (HISTORY_HEADER_SIZE bytes)
+    void begin(HistoryTier tier, uint32_t fileStart, uint8_t* header);
+    // Continue after the records already in a file (state from HistoryDecoder)
+    void resume(HistoryTier tier, uint32_t fileStart, const HistoryDeltaState& state);
+    // Encode one sample; 0 when it is not after the last slot or not in this file
+    size_t encode(const HistorySample& sample, uint8_t* out);
+    // Forget the file (after a failed write); the next sample must begin()/resume() again
+    void end() { _active = false; }
+
+    bool active() const { return _active; }
+    uint32_t fileStart() const { return _fileStart; }
+    uint32_t nextTime() const;
+
+private:
+    bool _active;
+    HistoryTier _tier;
+    uint32_t _fileStart;
+    HistoryDeltaState _state;
+};
+
+class HistoryDecoder {
+public:
+    HistoryDecoder();
+
+    // Parse a file header; false if it is not a history file
+    bool begin(const uint8_t* header);
+    // Decode one record: bytes used, 0 if data holds no complete record, -1 if corrupt
+    int next(const uint8_t* data, size_t len, HistorySample& out);
+
+    HistoryTier tier() const { return _tier; }
+    uint32_t fileStart() const { return _fileStart; }
+    uint32_t interval() const { return _interval; }
+    const HistoryDeltaState& state() const { return _state; }
+
+private:
+    HistoryTier _tier;
+    uint32_t _fileStart;
+    uint32_t _interval;
+    HistoryDeltaState _state;
+};
+
+// Start of the file holding the record for time t
+uint32_t historyFileStart(HistoryTier tier, uint32_t t);
+
+#endif // HISTORY_CODEC_H
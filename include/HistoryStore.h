@@ -0,0 +1,139 @@
+/*
+ * HistoryStore.h - Flash-backed temperature/humidity/runtime history for Simple Thermostat
+ *
+ * Turns the live readings into 1 minute, 15 minute and 1 hour records
+ * (HistoryCodec.h) and keeps them in LittleFS on the "spiffs" data partition:
+ *   /history/<tier>/<file start>.bin     e.g. /history/1m/1760832000.bin
+ * Records are held in a per-tier write-back cache and appended to flash every
+ * HISTORY_FLUSH_MS (10 minutes), or every HISTORY_FLUSH_MS_PSRAM (1 hour) with
+ * a larger cache in PSRAM on boards that have it, so flash sees a few writes
+ * an hour instead of one a minute. Queries include the cached records.
+ *
+ * After a reboot the current files are scanned to continue their deltas and
+ * the unfinished 15 minute / 1 hour intervals are rebuilt from the 1 minute
+ * file. Old files are deleted by tier retention, and early (oldest 1 minute
+ * files first) when the partition passes HISTORY_FS_HIGH_WATER percent.
+ *
+ * HistoryQuery streams a time range for /api/history as the stored files
+ * (binary, for history_client.py) or decoded CSV rows.
+ */
+
+#ifndef HISTORY_STORE_H
+#define HISTORY_STORE_H
+
+#include <Arduino.h>
+#include <FS.h>
+#include "HistoryCodec.h"
+
+// Forward declaration for debugLog from Main-Thermostat.cpp
+extern void debugLog(const char* format, ...);
+
+#define HISTORY_DIR                "/history"
+#define HISTORY_FLUSH_MS           600000UL    // Write-back period, internal RAM cache
+#define HISTORY_FLUSH_MS_PSRAM     3600000UL   // Write-back period, PSRAM cache
+#define HISTORY_CACHE_BYTES        1024        // Cache per tier, internal RAM (~2 h of 1 minute records)
+#define HISTORY_CACHE_BYTES_PSRAM  16384       // Cache per tier, PSRAM
+#define HISTORY_FS_HIGH_WATER      85          // Percent of the partition used before early pruning
+#define HISTORY_MIN_TIME           1700000000UL // Readings before the clock is set are ignored
+
+class HistoryStore {
+public:
+    HistoryStore();
+
+    // Mount LittleFS and allocate the caches (coldMalloc, so PSRAM when present)
+    bool begin();
+
+    // One live reading held for ms milliseconds (relays = HVAC_RELAY_* bits); NAN = no value
+    void addReading(uint32_t now, float tempC, float humidity, float hydronicC, uint8_t relays, uint32_t ms);
+    // Write every cached record to flash (before a restart)
+    void flush();
+
+    bool mounted() const { return _mounted; }
+    bool usesPsram() const { return _psram; }
+    size_t usedBytes() const;
+    size_t totalBytes() const;
+
+    // Finest tier that covers [from, to) without too many records
+    static HistoryTier tierFor(uint32_t from, uint32_t to);
+
+private:
+    friend class HistoryQuery;
+
+    struct TierState {
+        HistoryEncoder encoder;
+        HistoryAccumulator accumulator;
+        uint8_t* cache;
+        size_t cacheLen;
+    };
+
+    void start(uint32_t now);
+    void completeMinute(const HistorySample& sample);
+    void appendSample(HistoryTier tier, const HistorySample& sample);
+    void openFile(HistoryTier tier, uint32_t fileStart, bool replay);
+    void flushTier(HistoryTier tier);
+    void flushLocked();
+    void prune(uint32_t now);
+    bool oldestFile(HistoryTier tier, uint32_t& fileStart, int& count) const;
+    // Oldest and newest file of a tier, on flash or only in the cache yet; false if there are none
+    bool fileRange(HistoryTier tier, uint32_t& first, uint32_t& last);
+    static void filePath(HistoryTier tier, uint32_t fileStart, char* path, size_t size);
+
+    // Open a file of a query and copy its cached records; false if neither exists
+    bool snapshot(HistoryTier tier, uint32_t fileStart, File& file, size_t& fileSize,
+                  uint8_t*& cached, size_t& cachedLen);
+
+    TierState _tiers[HISTORY_TIER_COUNT];
+    SemaphoreHandle_t _lock;
+    size_t _cacheBytes;
+    uint32_t _flushMs;
+    uint32_t _lastFlush;
+    uint32_t _lastTime;
+    bool _mounted;
+    bool _started;
+    bool _psram;
+};
+
+// One /api/history response, read a chunk at a time from the web server
+class HistoryQuery {
+public:
+    HistoryQuery(HistoryStore& store, HistoryTier tier, uint32_t from, uint32_t to, bool csv);
+    ~HistoryQuery();
+
+    // Next part of the response; 0 when done
+    size_t read(uint8_t* buffer, size_t maxLen);
+
+private:
+    bool openSegment();
+    void closeSegment();
+    size_t readSegment(uint8_t* buffer, size_t len);
+    bool nextRow();
+
+    HistoryStore& _store;
+    HistoryTier _tier;
+    uint32_t _from;
+    uint32_t _to;
+    bool _csv;
+    bool _done;
+    uint32_t _nextFile;          // Start of the next file to open
+    uint32_t _lastFile;          // Newest file when the query started
+
+    // Current segment: file bytes up to the snapshot size, then the cached records
+    bool _open;
+    File _file;
+    size_t _fileLeft;
+    uint8_t* _cached;
+    size_t _cachedLen;
+    size_t _cachedPos;
+    uint8_t _prefix[4];          // Binary: segment length
+    size_t _prefixPos;
+
+    // CSV: decode window and the row being sent
+    HistoryDecoder _decoder;
+    uint8_t _window[128];
+    size_t _windowLen;
+    char _row[96];
+    size_t _rowLen;
+    size_t _rowPos;
+};
+
+#endif // HISTORY_STORE_H
@@ -0,0 +1,153 @@
+/*
+ * HvacEngine - Table-driven relay state machine for ESP32-S3 Simple Thermostat
+ * Copyright (c) 2025 Jonn Taylor
+ *
+ * Replaces the String-compared mode checks and the stage/fan/shower logic that
+ * was spread across activateHeating(), activateCooling(), turnOffAllRelays()
+ * and handleFanControl(). Each controlRelays() tick:
+ * 1. classify() turns the inputs into one event (heat call, satisfied,
+ *    stage 2 call, ...) using the same hysteresis rules as before
+ * 2. HVAC_TRANSITIONS[state][event] gives the next state and the guard that
+ *    must pass before it is taken; a failed guard just keeps the state, the
+ *    event comes back on a later tick
+ * 3. relays() maps the state onto relay bits
+ *
+ * Guards are what keep the relays from chattering:
+ * - MIN_OFF   idle -> running only after minOffMs idle (compressor restart delay)
+ * - MIN_ON    running -> idle on temperature only after minOnMs running
+ * - STAGE1    stage 2 only after stage1MinRuntimeMs in stage 1 (and only when enabled)
+ * - STAGE2    stage 2 drops back only after stage2MinRuntimeMs
+ * User commands and interlocks (mode off/changed, shower mode, hydronic
+ * lockout) force the relays off immediately; the restart delay still applies.
+ *
+ * No Arduino dependencies so the same code runs on the host (see
+ * hvac_properties.py, which checks the guarantees above on random input).
+ */
+
+#ifndef HVAC_ENGINE_H
+#define HVAC_ENGINE_H
+
+#include <stdint.h>
+
+// Relay bits (same order as the /events relays bitmask)
+#define HVAC_RELAY_HEAT1  0x01
+#define HVAC_RELAY_HEAT2  0x02   // Stage 2 heat, or the reversing valve
+#define HVAC_RELAY_COOL1  0x04
+#define HVAC_RELAY_COOL2  0x08
+#define HVAC_RELAY_FAN    0x10
+#define HVAC_RELAY_ALL    0x1F
+
+enum HvacMode : uint8_t {
+    HVAC_MODE_OFF,
+    HVAC_MODE_HEAT,
+    HVAC_MODE_COOL,
+    HVAC_MODE_AUTO
+};
+
+enum HvacFanMode : uint8_t {
+    HVAC_FAN_AUTO,
+    HVAC_FAN_ON,
+    HVAC_FAN_CYCLE     // Fan belongs to controlFanSchedule() while idle
+};
+
+enum HvacState : uint8_t {
+    HVAC_IDLE,
+    HVAC_HEAT_STAGE1,
+    HVAC_HEAT_STAGE2,
+    HVAC_COOL_STAGE1,
+    HVAC_COOL_STAGE2,
+    HVAC_STATE_COUNT
+};
+
+enum HvacEvent : uint8_t {
+    HVAC_EV_HOLD,          // Inside the hysteresis band - nothing to do
+    HVAC_EV_HEAT_CALL,     // Below the heat-on threshold
+    HVAC_EV_COOL_CALL,     // Above the cool-on threshold
+    HVAC_EV_STAGE2_CALL,   // Running and more than stage2Delta from the setpoint
+    HVAC_EV_STAGE2_CLEAR,  // Running and back within half of stage2Delta
+    HVAC_EV_SATISFIED,     // Setpoint reached
+    HVAC_EV_FORCE_OFF,     // Mode off/changed or heat inhibited
+    HVAC_EVENT_COUNT
+};
+
+enum HvacGuard : uint8_t {
+    HVAC_GUARD_NONE,
+    HVAC_GUARD_MIN_OFF,
+    HVAC_GUARD_MIN_ON,
+    HVAC_GUARD_STAGE1,
+    HVAC_GUARD_STAGE2
+};
+
+struct HvacConfig {
+    uint32_t minOnMs;             // Shortest run ended by temperature
+    uint32_t minOffMs;            // Shortest idle time before any restart
+    uint32_t stage1MinRuntimeMs;  // Stage 1 time before stage 2 may start
+    uint32_t stage2MinRuntimeMs;  // Stage 2 time before it may drop back
+    bool stage2HeatEnabled;
+    bool stage2CoolEnabled;
+    bool reversingValve;          // Heat pump: HEAT2 is the valve, energized for heat, no stage 2
+    bool fanRelayNeeded;          // We drive the fan during heat/cool (otherwise the HVAC does)
+};
+
+struct HvacInputs {
+    HvacMode mode;
+    HvacFanMode fanMode;
+    float temp;                   // NAN = no reading, hold the current state
+    float setHeat;
+    float setCool;
+    float setAuto;
+    float swing;                  // Heat/cool mode hysteresis
+    float autoSwing;              // Auto mode deadband half-width
+    float stage2Delta;
+    bool heatInhibited;           // Shower mode or hydronic lockout
+};
+
+struct HvacTransition {
+    HvacState to;
+    HvacGuard guard;
+};
+
+class HvacEngine {
+public:
+    HvacEngine();
+
+    void reset();
+
+    // One control tick; true when the state or the relay bits changed
+    bool update(const HvacInputs& in, const HvacConfig& config, uint32_t now);
+
+    HvacState state() const { return _state; }
+    HvacEvent lastEvent() const { return _event; }
+    HvacGuard heldBy() const { return _heldBy; }        // Guard blocking the last transition, NONE if none
+    uint8_t relays() const { return _relays; }
+    uint8_t ownedRelays() const { return _owned; }      // Bits the engine drives (fan excluded while cycle mode idles)
+    bool heating() const { return _state == HVAC_HEAT_STAGE1 || _state == HVAC_HEAT_STAGE2; }
+    bool cooling() const { return _state == HVAC_COOL_STAGE1 || _state == HVAC_COOL_STAGE2; }
+    bool running() const { return _state != HVAC_IDLE; }
+    uint32_t cycles() const { return _cycles; }
+
+    static HvacMode modeFromString(const char* mode);
+    static HvacFanMode fanModeFromString(const char* fanMode);
+    static const char* stateName(HvacState state);
+    static const char* eventName(HvacEvent event);
+    static const char* guardName(HvacGuard guard);
+
+private:
+    HvacEvent classify(const HvacInputs& in, const HvacConfig& config) const;
+    bool guardPasses(HvacGuard guard, const HvacConfig& config, uint32_t now) const;
+    void enter(HvacState state, uint32_t now);
+    uint8_t relaysFor(const HvacInputs& in, const HvacConfig& config) const;
+
+    HvacState _state;
+    HvacEvent _event;
+    HvacGuard _heldBy;
+    uint8_t _relays;
+    uint8_t _owned;
+    bool _hasRun;                 // No restart delay before the first run after boot
+    uint32_t _stateSince;         // When the current state was entered
+    uint32_t _runSince;           // When the current run left idle
+    uint32_t _offSince;           // When the last run ended
+    uint32_t _cycles;
+};
+
+#endif // HVAC_ENGINE_H
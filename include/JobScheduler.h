@@ -0,0 +1,210 @@
+/*
+ * JobScheduler - Periodic job scheduler for the main loop
+ * Copyright (c) 2025 Jonn Taylor
+ *
+ * Replaces the pile of "static unsigned long lastXxxTime" checks in loop()
+ * with named jobs kept in a min-heap ordered by next deadline:
+ * - Jobs that are due in the same pass run in priority order (high first)
+ * - Optional jitter spreads jobs with equal periods (e.g. MQTT publish vs diagnostics);
+ *   it is drawn per run on top of an unjittered cadence, so it never accumulates
+ * - Per-job run count, average/max run time and worst lateness for diagnostics
+ * - msUntilNext() lets loop() sleep until the next deadline instead of spinning
+ *
+ * Fixed capacity, no heap allocation after construction.
+ */
+
+#ifndef JOB_SCHEDULER_H
+#define JOB_SCHEDULER_H
+
+#include <Arduino.h>
+
+#define JOB_SCHEDULER_MAX_JOBS 20
+
+// Job priorities (higher runs first when several jobs are due together)
+#define JOB_PRIORITY_LOW     0
+#define JOB_PRIORITY_NORMAL  1
+#define JOB_PRIORITY_HIGH    2
+
+typedef void (*JobFunction)();
+
+struct SchedulerJob {
+    const char* name;
+    JobFunction function;
+    uint32_t intervalMs;
+    uint32_t jitterMs;
+    uint8_t priority;
+    uint32_t baseRunMs;    // Deadline on the unjittered cadence
+    uint32_t nextRunMs;    // baseRunMs plus this run's jitter
+    // Run-time accounting
+    uint32_t runCount;
+    uint64_t totalRunUs;
+    uint32_t maxRunUs;
+    uint32_t maxLateMs;
+};
+
+class JobScheduler {
+public:
+    JobScheduler() : jobCount(0), heapSize(0) {}
+
+    // Register a job; first run happens after initialDelayMs. Returns job id or -1 if full.
+    int addJob(const char* name, JobFunction function, uint32_t intervalMs,
+               uint8_t priority = JOB_PRIORITY_NORMAL, uint32_t jitterMs = 0,
+               uint32_t initialDelayMs = 0) {
+        if (jobCount >= JOB_SCHEDULER_MAX_JOBS) return -1;
+        int id = jobCount++;
+        SchedulerJob& job = jobs[id];
+        job.name = name;
+        job.function = function;
+        job.intervalMs = intervalMs;
+        job.jitterMs = jitterMs;
+        job.priority = priority;
+        job.baseRunMs = millis() + initialDelayMs;
+        job.nextRunMs = job.baseRunMs;
+        job.runCount = 0;
+        job.totalRunUs = 0;
+        job.maxRunUs = 0;
+        job.maxLateMs = 0;
+        heapPush(id);
+        return id;
+    }
+
+    // Push a job's next run a full interval out from now (e.g. after an out-of-band run)
+    void postpone(int id) {
+        if (id < 0 || id >= jobCount) return;
+        jobs[id].baseRunMs = millis() + jobs[id].intervalMs;
+        jobs[id].nextRunMs = jobs[id].baseRunMs;
+        rebuildHeap();
+    }
+
+    // Make a job due on the next runDue() pass
+    void trigger(int id) {
+        if (id < 0 || id >= jobCount) return;
+        jobs[id].baseRunMs = millis();
+        jobs[id].nextRunMs = jobs[id].baseRunMs;
+        rebuildHeap();
+    }
+
+    // Run every job whose deadline has passed; returns number of jobs run
+    int runDue() {
+        uint32_t now = millis();
+        int due[JOB_SCHEDULER_MAX_JOBS];
+        int dueCount = 0;
+
+        while (heapSize > 0 && (int32_t)(now - jobs[heap[0]].nextRunMs) >= 0) {
+            due[dueCount++] = heapPop();
+        }
+
+        // Priority order among the due jobs, earliest deadline first within a priority
+        for (int i = 1; i < dueCount; i++) {
+            int id = due[i];
+            int j = i;
+            while (j > 0 && runsBefore(id, due[j - 1])) {
+                due[j] = due[j - 1];
+                j--;
+            }
+            due[j] = id;
+        }
+
+        for (int i = 0; i < dueCount; i++) {
+            SchedulerJob& job = jobs[due[i]];
+            uint32_t startMs = millis();
+            uint32_t lateMs = startMs - job.nextRunMs;
+            if (lateMs > job.maxLateMs) job.maxLateMs = lateMs;
+
+            uint32_t startUs = micros();
+            job.function();
+            uint32_t elapsedUs = micros() - startUs;
+
+            job.runCount++;
+            job.totalRunUs += elapsedUs;
+            if (elapsedUs > job.maxRunUs) job.maxRunUs = elapsedUs;
+
+            // Stay on the original cadence unless we fell more than a period behind
+            job.baseRunMs += job.intervalMs;
+            uint32_t after = millis();
+            if ((int32_t)(after - job.baseRunMs) > 0) job.baseRunMs = after + job.intervalMs;
+            job.nextRunMs = job.baseRunMs;
+            if (job.jitterMs > 0) job.nextRunMs += random(job.jitterMs + 1);
+            heapPush(due[i]);
+        }
+        return dueCount;
+    }
+
+    // Milliseconds until the earliest deadline (0 if something is already due)
+    uint32_t msUntilNext() const {
+        if (heapSize == 0) return UINT32_MAX;
+        int32_t remaining = (int32_t)(jobs[heap[0]].nextRunMs - millis());
+        return remaining > 0 ? (uint32_t)remaining : 0;
+    }
+
+    int getJobCount() const { return jobCount; }
+    const SchedulerJob& getJob(int id) const { return jobs[id]; }
+
+    // Clear accounting counters (called after each diagnostics report)
+    void resetStats() {
+        for (int i = 0; i < jobCount; i++) {
+            jobs[i].runCount = 0;
+            jobs[i].totalRunUs = 0;
+            jobs[i].maxRunUs = 0;
+            jobs[i].maxLateMs = 0;
+        }
+    }
+
+private:
+    bool runsBefore(int a, int b) const {
+        if (jobs[a].priority != jobs[b].priority) return jobs[a].priority > jobs[b].priority;
+        return (int32_t)(jobs[a].nextRunMs - jobs[b].nextRunMs) < 0;
+    }
+
+    bool earlier(int a, int b) const {
+        return (int32_t)(jobs[a].nextRunMs - jobs[b].nextRunMs) < 0;
+    }
+
+    void heapPush(int id) {
+        int i = heapSize++;
+        heap[i] = id;
+        while (i > 0) {
+            int parent = (i - 1) / 2;
+            if (!earlier(heap[i], heap[parent])) break;
+            swap(i, parent);
+            i = parent;
+        }
+    }
+
+    int heapPop() {
+        int top = heap[0];
+        heap[0] = heap[--heapSize];
+        siftDown(0);
+        return top;
+    }
+
+    void siftDown(int i) {
+        while (true) {
+            int left = 2 * i + 1;
+            int right = left + 1;
+            int smallest = i;
+            if (left < heapSize && earlier(heap[left], heap[smallest])) smallest = left;
+            if (right < heapSize && earlier(heap[right], heap[smallest])) smallest = right;
+            if (smallest == i) break;
+            swap(i, smallest);
+            i = smallest;
+        }
+    }
+
+    void rebuildHeap() {
+        for (int i = heapSize / 2 - 1; i >= 0; i--) siftDown(i);
+    }
+
+    void swap(int a, int b) {
+        int tmp = heap[a];
+        heap[a] = heap[b];
+        heap[b] = tmp;
+    }
+
+    SchedulerJob jobs[JOB_SCHEDULER_MAX_JOBS];
+    int heap[JOB_SCHEDULER_MAX_JOBS];
+    int jobCount;
+    int heapSize;
+};
+
+#endif // JOB_SCHEDULER_H
@@ -0,0 +1,94 @@
+/*
+ * LD2410Parser - Ring-buffered LD2410 radar frame parser for Simple Thermostat
+ * Copyright (c) 2025 Jonn Taylor
+ *
+ * Replaces polling MyLD2410::check() from the loop. That path has to drain
+ * the UART down to ~30 bytes first because the library's readFrame() copies
+ * into a 64-byte buffer without bounds checks, which silently throws away
+ * presence frames.
+ *
+ * The radar task reads UART bytes straight into this ring (writeSpace() /
+ * commit()) and next() decodes frames in place:
+ * - Data frames:  F4 F3 F2 F1 | len (LE16) | type AA ... 55 00 | F8 F7 F6 F5
+ * - Ack frames:   FD FC FB FA | len (LE16) | ...               | 04 03 02 01 (skipped)
+ * - Anything that does not line up (bad length, missing footer or payload
+ *   markers) drops one byte and the scan resyncs on the next header
+ * - When the ring is full new bytes are refused and counted, so a burst
+ *   costs frames but never corrupts memory
+ *
+ * No Arduino dependencies so the parser can be benchmarked on the host
+ * (see ld2410_stream.py).
+ */
+
+#ifndef LD2410_PARSER_H
+#define LD2410_PARSER_H
+
+#include <stddef.h>
+#include <stdint.h>
+
+#define LD2410_RING_SIZE         512   // Power of two; ~20 ms of UART data at 256000 baud
+#define LD2410_MAX_PAYLOAD       64    // Largest valid payload (engineering frames are 35 bytes)
+#define LD2410_FRAME_OVERHEAD    10    // Header + length + footer
+
+// Target state bits in a data frame
+#define LD2410_TARGET_MOVING     0x01
+#define LD2410_TARGET_STATIONARY 0x02
+
+// One decoded data frame (basic and engineering mode share these fields)
+struct LD2410Frame {
+    uint8_t targetState;         // LD2410_TARGET_* bits, 0 = nobody
+    uint16_t movingDistance;     // cm
+    uint8_t movingSignal;        // 0-100
+    uint16_t stationaryDistance; // cm
+    uint8_t stationarySignal;    // 0-100
+    uint16_t detectionDistance;  // cm
+    bool engineering;            // Engineering mode frame (per-gate data not decoded)
+
+    bool presence() const { return targetState != 0; }
+    bool moving() const { return (targetState & LD2410_TARGET_MOVING) != 0; }
+    bool stationary() const { return (targetState & LD2410_TARGET_STATIONARY) != 0; }
+};
+
+struct LD2410ParserStats {
+    uint32_t frames;          // Data frames decoded
+    uint32_t ackFrames;       // Command acknowledgements skipped
+    uint32_t resyncBytes;     // Bytes discarded while looking for a header
+    uint32_t badFrames;       // Headers whose frame failed validation
+    uint32_t overflowBytes;   // Bytes refused because the ring was full
+};
+
+class LD2410Parser {
+public:
+    LD2410Parser();
+
+    void reset();
+
+    // Copy bytes in (host tools); returns how many fit
+    size_t feed(const uint8_t* data, size_t len);
+
+    // Zero-copy fill: contiguous free space at the write position, then commit() what was written
+    uint8_t* writeSpace(size_t& contiguous);
+    void commit(size_t len);
+    void countOverflow(size_t len) { _stats.overflowBytes += len; }
+
+    // Decode the next data frame; false when more bytes are needed
+    bool next(LD2410Frame& frame);
+
+    size_t buffered() const { return (size_t)(_head - _tail); }
+    size_t freeSpace() const { return LD2410_RING_SIZE - buffered(); }
+    const LD2410ParserStats& stats() const { return _stats; }
+
+private:
+    uint8_t peek(size_t offset) const { return _ring[(_tail + offset) & (LD2410_RING_SIZE - 1)]; }
+    uint16_t peek16(size_t offset) const { return (uint16_t)(peek(offset) | (peek(offset + 1) << 8)); }
+    bool matches(size_t offset, const uint8_t* pattern) const;
+    void skip(size_t len) { _tail += (uint32_t)len; }
+    void decode(LD2410Frame& frame) const;
+
+    uint8_t _ring[LD2410_RING_SIZE];
+    uint32_t _head;                  // Free-running write index
+    uint32_t _tail;                  // Free-running read index
+    LD2410ParserStats _stats;
+};
+
+#endif // LD2410_PARSER_H
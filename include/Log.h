@@ -0,0 +1,99 @@
+/*
+ * Log - Leveled, categorized logging for ESP32-S3 Simple Thermostat
+ * Copyright (c) 2025 Jonn Taylor
+ *
+ * LOG_E / LOG_W / LOG_I / LOG_D / LOG_V(category, format, ...) take the same
+ * printf-style arguments as debugLog(), which stays the single sink (serial
+ * port plus the /api/debug ring):
+ *
+ *   LOG_D(DISPLAY, "[DEBUG] getLocalTime took %lu ms\n", ms);
+ *
+ * A disabled line costs nothing past the check:
+ * - Levels above LOG_LEVEL_MAX (build flag, default LOG_LEVEL_DEBUG) compile
+ *   out - the condition is a constant and the call is dropped
+ * - Otherwise the category's runtime level is compared first, so there is no
+ *   vsnprintf, no Serial write and no ring-buffer copy unless it is enabled
+ * Arguments are not evaluated when the line is disabled.
+ *
+ * Runtime levels start at LOG_LEVEL_DEFAULT (info) and are changed with
+ * logApplySetting() - "debug" for every category, or "mqtt=debug,sensor=warn" -
+ * from /api/log or <hostname>/log_level/set; Main-Thermostat keeps them in NVS.
+ *
+ * convert_debuglog_to_log.py retags bare debugLog() calls from their [TAG]
+ * prefixes.
+ *
+ * No Arduino dependencies.
+ */
+
+#ifndef LOG_H
+#define LOG_H
+
+#include <stddef.h>
+#include <stdint.h>
+
+// Sink from Main-Thermostat.cpp
+extern void debugLog(const char* format, ...);
+
+#define LOG_LEVEL_NONE     0
+#define LOG_LEVEL_ERROR    1
+#define LOG_LEVEL_WARN     2
+#define LOG_LEVEL_INFO     3
+#define LOG_LEVEL_DEBUG    4
+#define LOG_LEVEL_VERBOSE  5
+
+// Highest level compiled in (e.g. -DLOG_LEVEL_MAX=LOG_LEVEL_INFO for a quiet build)
+#ifndef LOG_LEVEL_MAX
+#define LOG_LEVEL_MAX      LOG_LEVEL_DEBUG
+#endif
+
+// Runtime level of every category until it is changed
+#ifndef LOG_LEVEL_DEFAULT
+#define LOG_LEVEL_DEFAULT  LOG_LEVEL_INFO
+#endif
+
+enum LogCategory : uint8_t {
+    LOG_CAT_SYSTEM = 0,   // Boot, settings, memory, diagnostics
+    LOG_CAT_SENSOR,       // Temperature/humidity/pressure and DS18B20
+    LOG_CAT_HVAC,         // Relays, fan, stages, lockouts, shower mode
+    LOG_CAT_SCHEDULE,
+    LOG_CAT_DISPLAY,      // TFT, touch, sleep/wake
+    LOG_CAT_MOTION,       // LD2410 radar
+    LOG_CAT_WIFI,
+    LOG_CAT_MQTT,         // Broker connection and Home Assistant
+    LOG_CAT_WEB,          // HTTP server and /events
+    LOG_CAT_WEATHER,
+    LOG_CAT_OTA,
+    LOG_CAT_HISTORY,
+    LOG_CAT_COUNT
+};
+
+// Current runtime level per category (read by the macros, written by logApplySetting)
+extern volatile uint8_t logLevels[LOG_CAT_COUNT];
+
+#define LOG_ENABLED(cat, level) \
+    ((level) <= LOG_LEVEL_MAX && logLevels[LOG_CAT_##cat] >= (level))
+
+#define LOG_AT(cat, level, ...) \
+    do { if (LOG_ENABLED(cat, level)) debugLog(__VA_ARGS__); } while (0)
+
+#define LOG_E(cat, ...)  LOG_AT(cat, LOG_LEVEL_ERROR, __VA_ARGS__)
+#define LOG_W(cat, ...)  LOG_AT(cat, LOG_LEVEL_WARN, __VA_ARGS__)
+#define LOG_I(cat, ...)  LOG_AT(cat, LOG_LEVEL_INFO, __VA_ARGS__)
+#define LOG_D(cat, ...)  LOG_AT(cat, LOG_LEVEL_DEBUG, __VA_ARGS__)
+#define LOG_V(cat, ...)  LOG_AT(cat, LOG_LEVEL_VERBOSE, __VA_ARGS__)
+
+// Lower-case names used by /api/log and MQTT ("mqtt", "debug")
+const char* logCategoryName(int category);
+const char* logLevelName(int level);
+// -1 if unknown; levels also accept 0-5
+int logCategoryFromName(const char* name);
+int logLevelFromName(const char* name);
+
+// Apply "level" (every category) and/or "category=level" items separated by
+// commas or spaces. Nothing changes unless every item is valid.
+bool logApplySetting(const char* setting);
+
+// Current levels as "system=info,sensor=info,..." (accepted by logApplySetting)
+size_t logFormatLevels(char* out, size_t size);
+
+#endif // LOG_H
@@ -0,0 +1,54 @@
+/*
+ * MemoryPolicy.h - Placement of large buffers for Simple Thermostat
+ *
+ * Internal RAM is kept for WiFi, lwIP/TCP, task stacks and the hot paths.
+ * Large buffers that are touched rarely (the debug log ring, big JSON
+ * documents, full-screen sprites, the history write-back cache) are "cold"
+ * and go through coldMalloc(), which puts them in PSRAM on boards built with
+ * BOARD_HAS_PSRAM (esp32-s3-wroom-1-n32r16v) when PSRAM is found at boot,
+ * and falls back to the normal heap everywhere else.
+ *
+ * Buffer sizes scale with the board through boardBufferSize(): the internal
+ * RAM size is what the N8/N16 boards have always used, the PSRAM size is a
+ * larger one that only makes sense off the internal heap.
+ */
+
+#ifndef MEMORY_POLICY_H
+#define MEMORY_POLICY_H
+
+#include <Arduino.h>
+#include <ArduinoJson.h>
+
+// Forward declaration for debugLog from Main-Thermostat.cpp
+extern void debugLog(const char* format, ...);
+
+#define DEBUG_LOG_BYTES           32768     // /api/debug log ring, internal RAM
+#define DEBUG_LOG_BYTES_PSRAM     131072    // /api/debug log ring, PSRAM
+
+// Detect PSRAM; call once at the start of setup() before any cold allocation
+void memoryPolicyBegin();
+// True when cold buffers are going to PSRAM
+bool psramAvailable();
+// Free PSRAM bytes (0 without PSRAM)
+size_t psramFreeBytes();
+
+// Large, rarely touched buffers: PSRAM when available, otherwise the normal heap.
+// Release with free().
+void* coldMalloc(size_t size);
+void* coldCalloc(size_t count, size_t size);
+void* coldRealloc(void* ptr, size_t size);
+
+// Pick the internal RAM or PSRAM size of a buffer for this board
+size_t boardBufferSize(size_t internalSize, size_t psramSize);
+
+// ArduinoJson allocator for large documents: JsonDocument doc(&coldJsonAllocator);
+class ColdJsonAllocator : public ArduinoJson::Allocator {
+public:
+    void* allocate(size_t size) override { return coldMalloc(size); }
+    void deallocate(void* ptr) override { free(ptr); }
+    void* reallocate(void* ptr, size_t newSize) override { return coldRealloc(ptr, newSize); }
+};
+
+extern ColdJsonAllocator coldJsonAllocator;
+
+#endif // MEMORY_POLICY_H
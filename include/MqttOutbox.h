@@ -0,0 +1,93 @@
+/*
+ * MqttOutbox - Bounded, coalescing outbound MQTT queue for Simple Thermostat
+ * Copyright (c) 2025 Jonn Taylor
+ *
+ * Every publish in the firmware goes through mqttPublish(), which only puts
+ * the message in this outbox; the MQTT task sends it when the broker is
+ * reachable. While the broker is down the outbox keeps the latest value per
+ * topic:
+ * - Publishing to a topic that is already queued replaces its payload in
+ *   place (last value wins, queue position kept)
+ * - The outbox is bounded by slot count and total bytes; when a new topic
+ *   does not fit, the oldest non-retained message is dropped first (alerts,
+ *   motion edges), then the oldest retained one
+ * - A session's republish (~90 discovery configs of ~400 bytes plus ~20
+ *   state topics) is larger than both limits, so loop() queues it in
+ *   passes that stop at the first message hasRoom() rejects instead of
+ *   evicting, and starts the next pass once the outbox has drained
+ * - take() hands the oldest message to the sender without copying;
+ *   restore() puts it back if the publish failed, unless a newer value for
+ *   the same topic arrived in the meantime
+ *
+ * Not thread-safe - the firmware wraps it in mqttOutboxMutex. No Arduino
+ * dependencies so the same code can be exercised on the host (see
+ * mqtt_faults.py).
+ */
+
+#ifndef MQTT_OUTBOX_H
+#define MQTT_OUTBOX_H
+
+#include <stddef.h>
+#include <stdint.h>
+
+#define MQTT_OUTBOX_SLOTS      64      // Distinct topics held while offline (fewer than a session's republish)
+#define MQTT_OUTBOX_MAX_BYTES  24576   // Topic + payload bytes held while offline
+
+// One queued message; topic and payload share one heap block
+struct MqttMessage {
+    char* data;            // "topic\0payload\0", NULL = empty slot
+    const char* payload;   // Points into data
+    uint16_t size;         // Bytes allocated for data
+    bool retained;
+    uint32_t order;        // Insertion order (oldest is sent first)
+
+    const char* topic() const { return data; }
+};
+
+struct MqttOutboxStats {
+    uint32_t queued;       // put() calls accepted as new topics
+    uint32_t coalesced;    // put() calls that replaced a queued payload
+    uint32_t dropped;      // Messages evicted or refused because the outbox was full
+    uint16_t peakCount;    // Most messages held at once
+    uint32_t peakBytes;    // Most bytes held at once
+};
+
+class MqttOutbox {
+public:
+    MqttOutbox();
+    ~MqttOutbox();
+
+    // Queue (or replace) the message for a topic; false if it could not be stored
+    bool put(const char* topic, const char* payload, bool retained);
+
+    // True if put() of this topic and payload length would not evict anything
+    bool hasRoom(const char* topic, size_t payloadLen) const;
+
+    // Move the oldest message out; free it with release() or hand it back with restore()
+    bool take(MqttMessage& message);
+    void restore(MqttMessage& message);
+    static void release(MqttMessage& message);
+
+    void clear();
+
+    size_t count() const { return _count; }
+    size_t bytes() const { return _bytes; }
+    bool empty() const { return _count == 0; }
+    const MqttOutboxStats& stats() const { return _stats; }
+
+private:
+    int find(const char* topic) const;
+    int freeSlot() const;
+    int oldest(bool nonRetainedOnly) const;
+    void drop(int slot);
+    bool makeRoom(size_t size);
+    void store(int slot, MqttMessage& message);
+
+    MqttMessage _slots[MQTT_OUTBOX_SLOTS];
+    size_t _count;
+    size_t _bytes;
+    uint32_t _nextOrder;
+    MqttOutboxStats _stats;
+};
+
+#endif // MQTT_OUTBOX_H
@@ -0,0 +1,202 @@
+/*
+ * ScheduleEngine - Compiled weekly schedule for ESP32-S3 Simple Thermostat
+ * Copyright (c) 2025 Jonn Taylor
+ *
+ * Compiles the 7-day schedule into a sorted weekly transition table so the
+ * main loop only has to look at the clock once per transition instead of
+ * recomputing today's day/night window on every check.
+ *
+ * Period selection (same rule checkSchedule always used for day/night):
+ * - The active period is the one with the latest start time <= now
+ * - Before the first start of the day, the latest period of that day applies
+ *   (this is what makes cross-midnight day/night schedules work)
+ * - Equal start times resolve to the later period (night wins over day)
+ * - Day and night always take part; extra periods only when active
+ * - Disabled days produce a "hold" entry that leaves the current period alone
+ *
+ * No Arduino dependencies so the same code can be exercised on the host
+ * (see schedule_reference.py).
+ */
+
+#ifndef SCHEDULE_ENGINE_H
+#define SCHEDULE_ENGINE_H
+
+#include <stdint.h>
+#include <time.h>
+
+// Period indexes within a day (extra periods follow night)
+#define SCHEDULE_PERIOD_DAY      0
+#define SCHEDULE_PERIOD_NIGHT    1
+#define SCHEDULE_EXTRA_PERIODS   4
+#define SCHEDULE_MAX_PERIODS     (2 + SCHEDULE_EXTRA_PERIODS)
+#define SCHEDULE_PERIOD_HOLD     -1   // Day disabled - keep whatever period is active
+
+#define SCHEDULE_MINUTES_PER_DAY  1440
+#define SCHEDULE_MINUTES_PER_WEEK 10080
+
+// Schedule system structures
+struct SchedulePeriod {
+    int hour;        // 0-23
+    int minute;      // 0-59
+    float heatTemp;  // Target heating temperature
+    float coolTemp;  // Target cooling temperature
+    float autoTemp;  // Target auto mode temperature
+    bool active;     // Whether this period is enabled
+};
+
+struct DaySchedule {
+    SchedulePeriod day;    // Day period (default 6:00 AM)
+    SchedulePeriod night;  // Night period (default 10:00 PM)
+    bool enabled;          // Whether scheduling is enabled for this day
+    SchedulePeriod extra[SCHEDULE_EXTRA_PERIODS]; // Optional additional periods ("period3".."period6"), inactive by default
+};
+
+// One entry of the compiled weekly table
+struct ScheduleTransition {
+    uint16_t weekMinute;   // Minutes since Sunday 00:00 (0-10079)
+    uint8_t dayOfWeek;     // 0 = Sunday, 1 = Monday, ..., 6 = Saturday
+    int8_t periodIndex;    // SCHEDULE_PERIOD_* index or SCHEDULE_PERIOD_HOLD
+};
+
+class ScheduleEngine {
+public:
+    ScheduleEngine() : transitionCount(0), dirty(true), nextEvaluation(0), lastEvaluation(0) {}
+
+    // Mark the compiled table and next-transition time as stale
+    void invalidate() { dirty = true; }
+    bool isDirty() const { return dirty; }
+
+    // True when the schedule must be re-evaluated at wall-clock time 'now'
+    bool isDue(time_t now) const {
+        return dirty || now >= nextEvaluation || now < lastEvaluation;
+    }
+
+    // Remember when the schedule was evaluated and when it next needs to be
+    void setNextEvaluation(time_t now, time_t next) {
+        lastEvaluation = now;
+        nextEvaluation = next;
+    }
+    time_t getNextEvaluation() const { return nextEvaluation; }
+
+    static SchedulePeriod* getPeriod(DaySchedule& day, int index) {
+        if (index == SCHEDULE_PERIOD_DAY) return &day.day;
+        if (index == SCHEDULE_PERIOD_NIGHT) return &day.night;
+        if (index >= 2 && index < SCHEDULE_MAX_PERIODS) return &day.extra[index - 2];
+        return nullptr;
+    }
+
+    static const SchedulePeriod* getPeriod(const DaySchedule& day, int index) {
+        return getPeriod(const_cast<DaySchedule&>(day), index);
+    }
+
+    // Label published as activePeriod ("day", "night", "period3".."period6")
+    static const char* periodLabel(int index) {
+        static const char* const labels[SCHEDULE_MAX_PERIODS] = {
+            "day", "night", "period3", "period4", "period5", "period6"
+        };
+        if (index < 0 || index >= SCHEDULE_MAX_PERIODS) return "manual";
+        return labels[index];
+    }
+
+    // Reverse of periodLabel(), -1 if the name is not a schedule period
+    static int periodIndexFromLabel(const char* label) {
+        for (int i = 0; i < SCHEDULE_MAX_PERIODS; i++) {
+            const char* a = periodLabel(i);
+            const char* b = label;
+            while (*a && *a == *b) { a++; b++; }
+            if (*a == '\0' && *b == '\0') return i;
+        }
+        return -1;
+    }
+
+    // Build the sorted weekly transition table from the 7-day schedule
+    void compile(const DaySchedule week[7]) {
+        transitionCount = 0;
+
+        for (int dow = 0; dow < 7; dow++) {
+            uint16_t dayBase = dow * SCHEDULE_MINUTES_PER_DAY;
+
+            if (!week[dow].enabled) {
+                addTransition(dayBase, dow, SCHEDULE_PERIOD_HOLD);
+                continue;
+            }
+
+            // Participating periods sorted by start minute; ties keep the
+            // higher index last so it wins (matches the old night-wins rule)
+            int order[SCHEDULE_MAX_PERIODS];
+            int starts[SCHEDULE_MAX_PERIODS];
+            int n = 0;
+            for (int p = 0; p < SCHEDULE_MAX_PERIODS; p++) {
+                const SchedulePeriod* period = getPeriod(week[dow], p);
+                if (p >= 2 && !period->active) continue;
+                int start = period->hour * 60 + period->minute;
+                if (start < 0) start = 0;
+                if (start >= SCHEDULE_MINUTES_PER_DAY) start = SCHEDULE_MINUTES_PER_DAY - 1;
+                int j = n;
+                while (j > 0 && starts[j - 1] > start) {
+                    order[j] = order[j - 1];
+                    starts[j] = starts[j - 1];
+                    j--;
+                }
+                order[j] = p;
+                starts[j] = start;
+                n++;
+            }
+
+            // Period in effect at 00:00: last one starting at midnight,
+            // otherwise the latest period of the day carries over
+            int midnightPeriod = order[n - 1];
+            for (int i = 0; i < n && starts[i] <= 0; i++) midnightPeriod = order[i];
+            addTransition(dayBase, dow, midnightPeriod);
+
+            for (int i = 0; i < n; i++) {
+                if (starts[i] <= 0) continue;
+                if (i + 1 < n && starts[i + 1] == starts[i]) continue; // Later period with same start wins
+                addTransition(dayBase + starts[i], dow, order[i]);
+            }
+        }
+
+        dirty = false;
+    }
+
+    // Entry in effect at the given minute of the week
+    const ScheduleTransition& lookup(uint16_t weekMinute) const {
+        int lo = 0;
+        int hi = transitionCount - 1;
+        while (lo < hi) {
+            int mid = (lo + hi + 1) / 2;
+            if (transitions[mid].weekMinute <= weekMinute) lo = mid;
+            else hi = mid - 1;
+        }
+        return transitions[lo];
+    }
+
+    // Minutes from weekMinute until the next entry (wraps around Saturday night)
+    uint16_t minutesUntilNext(uint16_t weekMinute) const {
+        const ScheduleTransition& current = lookup(weekMinute);
+        int index = &current - transitions;
+        if (index + 1 < transitionCount) {
+            return transitions[index + 1].weekMinute - weekMinute;
+        }
+        return SCHEDULE_MINUTES_PER_WEEK - weekMinute + transitions[0].weekMinute;
+    }
+
+    int getTransitionCount() const { return transitionCount; }
+    const ScheduleTransition& getTransition(int i) const { return transitions[i]; }
+
+private:
+    void addTransition(uint16_t weekMinute, int dow, int periodIndex) {
+        ScheduleTransition& t = transitions[transitionCount++];
+        t.weekMinute = weekMinute;
+        t.dayOfWeek = dow;
+        t.periodIndex = periodIndex;
+    }
+
+    ScheduleTransition transitions[7 * (SCHEDULE_MAX_PERIODS + 1)];
+    int transitionCount;
+    bool dirty;
+    time_t nextEvaluation;
+    time_t lastEvaluation;
+};
+
+#endif // SCHEDULE_ENGINE_H
@@ -0,0 +1,139 @@
+/*
+ * SensorFilter - Multi-sample filter pipeline for ESP32-S3 Simple Thermostat
+ * Copyright (c) 2025 Jonn Taylor
+ *
+ * Every reading goes through three stages over fixed rings of recent samples:
+ * 1. Hampel outlier rejection - a reading further than hampelK scaled MADs
+ *    (median absolute deviation) from the median of the raw window is
+ *    replaced by that median, so one bad I2C read never reaches controlRelays()
+ * 2. Median of the last `window` cleaned values
+ * 3. Exponential moving average of that median
+ * The raw window always keeps the real readings, so a genuine step change
+ * stops counting as an outlier once it fills half the window. The MAD is
+ * floored at minDeviation so a perfectly steady signal does not turn every
+ * small change into an "outlier".
+ *
+ * Each measured value has its own SensorFilterConfig (window, threshold,
+ * smoothing). No Arduino dependencies so the same code can be exercised on
+ * the host (see filter_replay.py, which ports this file line by line;
+ * --filter-check compiles this header and compares the two).
+ */
+
+#ifndef SENSOR_FILTER_H
+#define SENSOR_FILTER_H
+
+#include <math.h>
+#include <stdint.h>
+#include <string.h>
+
+#define SENSOR_FILTER_MAX_WINDOW 9
+#define SENSOR_FILTER_MAD_SCALE  1.4826f  // MAD -> standard deviation for normal noise
+
+struct SensorFilterConfig {
+    uint8_t window;        // Samples in the median/Hampel window (1 = stage off, max SENSOR_FILTER_MAX_WINDOW)
+    float hampelK;         // Outlier threshold in scaled MADs (0 = no rejection)
+    float minDeviation;    // Floor for the scaled MAD, in the reading's units
+    float emaAlpha;        // EMA weight of the new median (1.0 = no smoothing)
+};
+
+class SensorFilter {
+public:
+    SensorFilter(const SensorFilterConfig& config) { configure(config); }
+
+    void configure(const SensorFilterConfig& config) {
+        _config = config;
+        if (_config.window < 1) _config.window = 1;
+        if (_config.window > SENSOR_FILTER_MAX_WINDOW) _config.window = SENSOR_FILTER_MAX_WINDOW;
+        reset();
+    }
+
+    void reset() {
+        _count = 0;
+        _head = 0;
+        _output = NAN;
+        _rejected = 0;
+    }
+
+    // Start from a known value (window and EMA filled with it)
+    void seed(float value) {
+        reset();
+        for (int i = 0; i < _config.window; i++) {
+            _raw[i] = value;
+            _cleaned[i] = value;
+        }
+        _count = _config.window;
+        _output = value;
+    }
+
+    // Feed one raw reading, returns the filtered value. NAN readings are ignored.
+    float update(float value) {
+        if (isnan(value)) return _output;
+
+        int slot = _head;
+        _head = (_head + 1) % _config.window;
+        if (_count < _config.window) _count++;
+
+        _raw[slot] = value;
+        if (_count >= 3 && _config.hampelK > 0) {
+            float median = windowMedian(_raw);
+            float mad = windowMad(_raw, median) * SENSOR_FILTER_MAD_SCALE;
+            if (mad < _config.minDeviation) mad = _config.minDeviation;
+            if (fabsf(value - median) > _config.hampelK * mad) {
+                value = median;
+                _rejected++;
+            }
+        }
+        _cleaned[slot] = value;
+
+        float median = windowMedian(_cleaned);
+        if (isnan(_output)) {
+            _output = median;
+        } else {
+            _output = _config.emaAlpha * median + (1.0f - _config.emaAlpha) * _output;
+        }
+        return _output;
+    }
+
+    float value() const { return _output; }
+    uint32_t rejectedCount() const { return _rejected; }
+    const SensorFilterConfig& config() const { return _config; }
+
+private:
+    static float medianOf(float* values, int n) {
+        // Insertion sort - n is at most SENSOR_FILTER_MAX_WINDOW
+        for (int i = 1; i < n; i++) {
+            float v = values[i];
+            int j = i - 1;
+            while (j >= 0 && values[j] > v) {
+                values[j + 1] = values[j];
+                j--;
+            }
+            values[j + 1] = v;
+        }
+        return (n % 2) ? values[n / 2] : 0.5f * (values[n / 2 - 1] + values[n / 2]);
+    }
+
+    float windowMedian(const float* ring) const {
+        float sorted[SENSOR_FILTER_MAX_WINDOW];
+        memcpy(sorted, ring, _count * sizeof(float));
+        return medianOf(sorted, _count);
+    }
+
+    float windowMad(const float* ring, float median) const {
+        float deviations[SENSOR_FILTER_MAX_WINDOW];
+        for (int i = 0; i < _count; i++) {
+            deviations[i] = fabsf(ring[i] - median);
+        }
+        return medianOf(deviations, _count);
+    }
+
+    SensorFilterConfig _config;
+    float _raw[SENSOR_FILTER_MAX_WINDOW];      // Readings as received (Hampel reference)
+    float _cleaned[SENSOR_FILTER_MAX_WINDOW];  // Readings after outlier replacement
+    int _count;
+    int _head;
+    float _output;
+    uint32_t _rejected;
+};
+
+#endif // SENSOR_FILTER_H
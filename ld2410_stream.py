@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+Generate LD2410 radar byte streams and benchmark the frame parser
+(include/LD2410Parser.h, src/LD2410Parser.cpp) on the host.
+
+Scenarios:
+  clean    back-to-back basic and engineering data frames with acks mixed in
+  corrupt  noise between frames, flipped bits, truncated frames, fake headers
+  bursty   a clean stream delivered in bursts larger than the parser ring
+           with decoding only after each burst (models a stalled task)
+
+For every scenario the stream is decoded by the C++ parser (compiled with
+--cxx into a temporary harness) and by a Python port of it, and the script
+reports throughput, frame loss (intact frames in the stream that were not
+decoded) and altered frames (decoded values that were never sent). The
+LD2410 protocol has no checksum, so a bit flip inside the target data of an
+otherwise well-formed frame (or a splice after lost bytes that happens to
+line up) cannot be detected. The clean scenario must decode exactly.
+--python-only skips the C++ build.
+
+Usage:
+  python3 ld2410_stream.py
+  python3 ld2410_stream.py --frames 50000 --scenario corrupt
+  python3 ld2410_stream.py --write-stream radar.bin --scenario bursty
+  python3 ld2410_stream.py --python-only
+"""
+
+import argparse
+import os
+import random
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+
+RING_SIZE = 512            # LD2410_RING_SIZE
+MAX_PAYLOAD = 64           # LD2410_MAX_PAYLOAD
+DATA_HEADER = b'\xf4\xf3\xf2\xf1'
+DATA_FOOTER = b'\xf8\xf7\xf6\xf5'
+ACK_HEADER = b'\xfd\xfc\xfb\xfa'
+ACK_FOOTER = b'\x04\x03\x02\x01'
+SCENARIOS = ('clean', 'corrupt', 'bursty')
+
+HARNESS = r'''
+#include "LD2410Parser.h"
+#include <chrono>
+#include <stdio.h>
+#include <stdlib.h>
+#include <vector>
+
+int main(int argc, char** argv) {
+    FILE* f = fopen(argv[1], "rb");
+    std::vector<unsigned char> data;
+    int c;
+    while ((c = fgetc(f)) != EOF) data.push_back((unsigned char)c);
+    fclose(f);
+    std::vector<size_t> chunks;
+    FILE* cf = fopen(argv[2], "r");
+    unsigned long n;
+    while (fscanf(cf, "%lu", &n) == 1) chunks.push_back(n);
+    fclose(cf);
+    int repeat = atoi(argv[3]);
+
+    LD2410Parser parser;
+    LD2410Frame frame;
+    auto start = std::chrono::steady_clock::now();
+    for (int r = 0; r < repeat; r++) {
+        parser.reset();
+        size_t offset = 0;
+        for (size_t i = 0; i < chunks.size(); i++) {
+            parser.feed(&data[offset], chunks[i]);
+            offset += chunks[i];
+            while (parser.next(frame)) {
+                if (r == 0) {
+                    printf("F %u %u %u %u %u %u %u\n", frame.targetState, frame.movingDistance, frame.movingSignal,
+                           frame.stationaryDistance, frame.stationarySignal, frame.detectionDistance,
+                           frame.engineering ? 1 : 0);
+                }
+            }
+        }
+    }
+    double seconds = std::chrono::duration<double>(std::chrono::steady_clock::now() - start).count();
+    const LD2410ParserStats& s = parser.stats();
+    printf("S %u %u %u %u %u %.9f\n", s.frames, s.ackFrames, s.resyncBytes, s.badFrames, s.overflowBytes,
+           seconds / repeat);
+    return 0;
+}
+'''
+
+
+# ============================================================================
+# STREAM GENERATION
+# ============================================================================
+
+def data_frame(fields, engineering=False):
+    state, moving_dist, moving_signal, stationary_dist, stationary_signal, detection_dist = fields
+    target = struct.pack('<BHBHBH', state, moving_dist, moving_signal, stationary_dist, stationary_signal,
+                         detection_dist)
+    if engineering:
+        gates = bytes([8, 8]) + bytes(random.randrange(101) for _ in range(18)) + b'\x00\x00'
+        payload = b'\x01\xaa' + target + gates + b'\x55\x00'
+    else:
+        payload = b'\x02\xaa' + target + b'\x55\x00'
+    return DATA_HEADER + struct.pack('<H', len(payload)) + payload + DATA_FOOTER
+
+
+def ack_frame():
+    payload = b'\x61\x01\x00\x00' + bytes(random.randrange(256) for _ in range(6))
+    return ACK_HEADER + struct.pack('<H', len(payload)) + payload + ACK_FOOTER
+
+
+def random_fields(rng):
+    state = rng.choice((0, 1, 2, 3))
+    return (state, rng.randrange(1, 600), rng.randrange(101), rng.randrange(1, 600), rng.randrange(101),
+            rng.randrange(1, 600))
+
+
+def generate(scenario, frames, seed):
+    """Return (stream bytes, [expected intact frame tuples], [chunk sizes])."""
+    rng = random.Random(seed)
+    random.seed(seed)
+    out = bytearray()
+    expected = []
+    for _ in range(frames):
+        fields = random_fields(rng)
+        engineering = rng.random() < 0.2
+        frame = bytearray(data_frame(fields, engineering))
+        intact = True
+        if scenario == 'corrupt':
+            roll = rng.random()
+            if roll < 0.05:
+                out += bytes(rng.randrange(256) for _ in range(rng.randrange(1, 40)))   # line noise
+            elif roll < 0.08:
+                frame[rng.randrange(len(frame))] ^= 1 << rng.randrange(8)              # bit flip
+                intact = False
+            elif roll < 0.10:
+                frame = frame[:rng.randrange(4, len(frame))]                         # truncated
+                intact = False
+            elif roll < 0.12:
+                out += DATA_HEADER + bytes(rng.randrange(256) for _ in range(rng.randrange(2, 20)))  # fake header
+        if rng.random() < 0.02:
+            out += ack_frame()
+        out += frame
+        if intact:
+            expected.append(fields + (1 if engineering else 0,))
+
+    chunks = []
+    remaining = len(out)
+    while remaining:
+        if scenario == 'bursty':
+            size = rng.choice((rng.randrange(1, 64), rng.randrange(RING_SIZE, 4 * RING_SIZE)))
+        else:
+            size = rng.randrange(1, 128)   # UART FIFO / event sized reads
+        size = min(size, remaining)
+        chunks.append(size)
+        remaining -= size
+    return bytes(out), expected, chunks
+
+
+# ============================================================================
+# PYTHON PORT OF LD2410Parser
+# ============================================================================
+
+class Parser:
+    def __init__(self):
+        self.ring = bytearray(RING_SIZE)
+        self.head = 0
+        self.tail = 0
+        self.stats = {'frames': 0, 'acks': 0, 'resync': 0, 'bad': 0, 'overflow': 0}
+
+    def buffered(self):
+        return self.head - self.tail
+
+    def feed(self, data):
+        space = RING_SIZE - self.buffered()
+        accepted = min(space, len(data))
+        for i in range(accepted):
+            self.ring[(self.head + i) & (RING_SIZE - 1)] = data[i]
+        self.head += accepted
+        self.stats['overflow'] += len(data) - accepted
+
+    def peek(self, offset):
+        return self.ring[(self.tail + offset) & (RING_SIZE - 1)]
+
+    def peek16(self, offset):
+        return self.peek(offset) | (self.peek(offset + 1) << 8)
+
+    def matches(self, offset, pattern):
+        return all(self.peek(offset + i) == pattern[i] for i in range(4))
+
+    def next(self):
+        while self.buffered() >= 4:
+            is_data = self.matches(0, DATA_HEADER)
+            is_ack = not is_data and self.matches(0, ACK_HEADER)
+            if not is_data and not is_ack:
+                self.tail += 1
+                self.stats['resync'] += 1
+                continue
+            if self.buffered() < 6:
+                return None
+            length = self.peek16(4)
+            if length < 2 or length > MAX_PAYLOAD:
+                self.tail += 1
+                self.stats['bad'] += 1
+                continue
+            if self.buffered() < length + 10:
+                return None
+            if not self.matches(6 + length, DATA_FOOTER if is_data else ACK_FOOTER):
+                self.tail += 1
+                self.stats['bad'] += 1
+                continue
+            if is_ack:
+                self.tail += length + 10
+                self.stats['acks'] += 1
+                continue
+            kind = self.peek(6)
+            if (length < 13 or kind not in (1, 2) or self.peek(7) != 0xAA or
+                    self.peek(6 + length - 2) != 0x55 or self.peek(6 + length - 1) != 0x00):
+                self.tail += 1
+                self.stats['bad'] += 1
+                continue
+            frame = (self.peek(8) & 3, self.peek16(9), self.peek(11), self.peek16(12), self.peek(14),
+                     self.peek16(15), 1 if kind == 1 else 0)
+            self.tail += length + 10
+            self.stats['frames'] += 1
+            return frame
+        return None
+
+
+def run_python(stream, chunks):
+    parser = Parser()
+    frames = []
+    offset = 0
+    start = time.perf_counter()
+    for size in chunks:
+        parser.feed(stream[offset:offset + size])
+        offset += size
+        while True:
+            frame = parser.next()
+            if frame is None:
+                break
+            frames.append(frame)
+    return frames, parser.stats, time.perf_counter() - start
+
+
+# ============================================================================
+# C++ HARNESS
+# ============================================================================
+
+def build_harness(cxx, project_dir, work_dir):
+    source = os.path.join(work_dir, 'harness.cpp')
+    binary = os.path.join(work_dir, 'harness')
+    with open(source, 'w') as f:
+        f.write(HARNESS)
+    subprocess.run([cxx, '-O2', '-std=c++11', '-I', os.path.join(project_dir, 'include'), source,
+                    os.path.join(project_dir, 'src', 'LD2410Parser.cpp'), '-o', binary], check=True)
+    return binary
+
+
+def run_cpp(binary, stream, chunks, repeat, work_dir):
+    stream_path = os.path.join(work_dir, 'stream.bin')
+    chunk_path = os.path.join(work_dir, 'chunks.txt')
+    with open(stream_path, 'wb') as f:
+        f.write(stream)
+    with open(chunk_path, 'w') as f:
+        f.write('\n'.join(str(c) for c in chunks))
+    output = subprocess.run([binary, stream_path, chunk_path, str(repeat)], check=True,
+                            capture_output=True, text=True).stdout
+    frames = []
+    stats = {}
+    for line in output.splitlines():
+        parts = line.split()
+        if parts[0] == 'F':
+            frames.append(tuple(int(p) for p in parts[1:]))
+        elif parts[0] == 'S':
+            stats = dict(zip(('frames', 'acks', 'resync', 'bad', 'overflow'), (int(p) for p in parts[1:6])))
+            seconds = float(parts[6])
+    return frames, stats, seconds
+
+
+def compare(expected, decoded):
+    """In-order match of decoded frames against the intact frames that were sent."""
+    matched = 0
+    altered = 0
+    i = 0
+    for frame in decoded:
+        j = i
+        while j < len(expected) and expected[j] != frame:
+            j += 1
+        if j < len(expected):
+            matched += 1
+            i = j + 1
+        else:
+            altered += 1
+    return len(expected) - matched, altered
+
+
+def report(label, stream, expected, frames, stats, seconds):
+    lost, altered = compare(expected, frames)
+    mb_per_s = len(stream) / seconds / 1e6 if seconds else float('inf')
+    print('  %-7s %9d frames %7d lost (%5.2f%%) %5d altered  %8.2f MB/s  resync %d bad %d overflow %d' % (
+        label, len(frames), lost, 100.0 * lost / max(1, len(expected)), altered, mb_per_s,
+        stats['resync'], stats['bad'], stats['overflow']))
+    return lost, altered
+
+
+def main():
+    parser = argparse.ArgumentParser(description='LD2410 stream generator and parser benchmark')
+    parser.add_argument('--scenario', choices=SCENARIOS + ('all',), default='all')
+    parser.add_argument('--frames', type=int, default=20000, help='Data frames per scenario (default 20000)')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=20, help='C++ benchmark repetitions (default 20)')
+    parser.add_argument('--cxx', default=os.environ.get('CXX', 'c++'), help='Host C++ compiler (default c++)')
+    parser.add_argument('--python-only', action='store_true', help='Skip the C++ harness')
+    parser.add_argument('--write-stream', metavar='FILE', help='Also write the (last) generated stream to FILE')
+    parser.add_argument('--project-dir', default=os.path.dirname(os.path.abspath(__file__)))
+    args = parser.parse_args()
+
+    scenarios = SCENARIOS if args.scenario == 'all' else (args.scenario,)
+    work_dir = tempfile.mkdtemp(prefix='ld2410_')
+    failed = False
+    try:
+        binary = None
+        if not args.python_only:
+            if shutil.which(args.cxx) is None:
+                print('%s not found - running the Python port only' % args.cxx)
+            else:
+                binary = build_harness(args.cxx, args.project_dir, work_dir)
+
+        for scenario in scenarios:
+            stream, expected, chunks = generate(scenario, args.frames, args.seed)
+            print('\n%s: %d bytes, %d intact frames, %d reads (largest %d)' % (
+                scenario, len(stream), len(expected), len(chunks), max(chunks)))
+            frames, stats, seconds = run_python(stream, chunks)
+            py_result = report('python', stream, expected, frames, stats, seconds)
+            if binary:
+                cpp_frames, cpp_stats, cpp_seconds = run_cpp(binary, stream, chunks, args.repeat, work_dir)
+                report('c++', stream, expected, cpp_frames, cpp_stats, cpp_seconds)
+                if cpp_frames != frames:
+                    print('  MISMATCH: C++ and Python parsers decoded different frames')
+                    failed = True
+            if scenario == 'clean' and any(py_result):
+                print('  FAIL: clean stream not decoded exactly')
+                failed = True
+            if args.write_stream:
+                with open(args.write_stream, 'wb') as f:
+                    f.write(stream)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
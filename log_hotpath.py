@@ -0,0 +1,559 @@
+#!/usr/bin/env python3
+"""
+Find the logging calls that sit in hot paths and estimate how fast they fill
+the /api/debug ring (DEBUG_LOG_BYTES, 32 KB in internal RAM).
+
+Builds a rough call graph of src/*.cpp (function definitions and the calls
+in their bodies, member calls resolved through the declared type of the
+object) and walks it from the periodic entry points:
+  - every FreeRTOS task created with xTaskCreate*() whose body waits with
+    vTaskDelay/vTaskDelayUntil/ulTaskNotifyTake (sensorTaskFunction 5 s,
+    displayUpdateTaskFunction 50 ms, mqttTaskFunction, radarTaskFunction)
+  - loop() itself (LOOP_MAX_IDLE_MS) and each job registered with
+    loopJobs.addJob() at its own interval ("loop:relays" -> jobControlRelays)
+Each function gets the highest call rate it can be reached with, so
+controlRelays() is charged for both the sensor task and the relays job.
+
+Every LOG_x(), bare debugLog() and addToDebugBuffer() call reached this way
+is one call-site row: its rate (calls per second), the message size (format
+string with typical widths for %d, %.1f, %s ..., capped at debugLog's 255
+bytes) and bytes per second into the ring. Lines switched off by the runtime
+levels (--levels, same format as /api/log, default info) or above the
+compiled LOG_LEVEL_MAX (--max) are left out unless --all is given.
+
+Lines are graded by the if/else/switch/while branches on the way to them
+(a branch that latches - "if (pressed && !held) { held = true; ...}" - counts
+as two, since it fires once per change):
+  steady       no branch - what the ring takes every pass on a quiet system
+  one branch   one condition holding every pass (a sensor that keeps
+               failing, a state that keeps toggling)
+  upper bound  every reachable line on every pass
+A "now - lastX > 500" guard or an early "< INTERVAL) return" caps the rate.
+Seconds of history = ring size / bytes per second. Serial.print calls outside
+debugLog() go to the serial port only and are listed separately.
+
+Periods that cannot be read from the code (a flag-triggered update, a
+variable interval) can be set with --period ROOT=MS, and any function can be
+added as a root with --root NAME=MS.
+
+Usage:
+  python3 log_hotpath.py
+  python3 log_hotpath.py --levels debug --top 40
+  python3 log_hotpath.py --levels info,display=debug --psram
+  python3 log_hotpath.py --period displayUpdateTaskFunction=500 --root controlRelays=1000
+"""
+
+import argparse
+import glob
+import os
+import re
+import sys
+
+from convert_debuglog_to_log import CATEGORIES, FUNCTION_RE, LEVELS, LITERAL_RE, line_of, model_apply
+
+DEBUGLOG_BUFFER = 256           # char buffer[256] in debugLog()
+LOOP_PERIOD = 'LOOP_MAX_IDLE_MS'
+RING_BYTES = 'DEBUG_LOG_BYTES'
+RING_BYTES_PSRAM = 'DEBUG_LOG_BYTES_PSRAM'
+MACRO_LEVELS = {'LOG_E': 1, 'LOG_W': 2, 'LOG_I': 3, 'LOG_D': 4, 'LOG_V': 5}
+STEADY, BRANCH, ANY = 0, 1, 2        # Branches passed on the way to a line
+DEPTHS = 3
+
+# Typical printed width per conversion (thermostat values are short numbers)
+CONVERSION_BYTES = {'d': 3, 'i': 3, 'u': 3, 'o': 3, 'x': 4, 'X': 4, 'c': 1, 's': 12, 'p': 10,
+                    'f': 6, 'F': 6, 'e': 10, 'E': 10, 'g': 5, 'G': 5}
+LONG_BYTES = 7                  # %lu / %ld: millis(), heap sizes
+
+BLANK_RE = re.compile(r'//[^\n]*|/\*.*?\*/|"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\'|^[ \t]*#(?:[^\n]*\\\n)*[^\n]*',
+                      re.S | re.M)
+CALL_RE = re.compile(r'(\.|->|::)?\s*\b([A-Za-z_]\w*)\s*\(')
+SITE_RE = re.compile(r'\b(LOG_[EWIDV])\s*\(\s*(\w+)\s*,|\b(debugLog|addToDebugBuffer)\s*\(|\bSerial\.(print(?:ln|f)?)\s*\(')
+TASK_RE = re.compile(r'\bxTaskCreate(?:PinnedToCore)?\s*\(\s*(\w+)\s*,')
+JOB_RE = re.compile(r'\.addJob\s*\(\s*"([^"]+)"\s*,\s*(\w+)\s*,\s*([^,)]+)')
+WAIT_RE = re.compile(r'\b(?:vTaskDelayUntil\s*\([^,]+,|vTaskDelay\s*\(|ulTaskNotifyTake\s*\([^,]+,)'
+                     r'\s*(?:pdMS_TO_TICKS\s*\(([^;]*?)\)|([^;]*?)/\s*portTICK_PERIOD_MS)\s*\)\s*;')
+CONSTANT_RE = re.compile(r'#define\s+([A-Za-z_]\w*)\s+\(?(\d+)[UL]*\)?|\b([A-Za-z_]\w*)\s*=\s*(\d+)[UL]*\s*;')
+DECLARATION_RE = re.compile(r'\b([A-Z]\w*)\s*[*&]?\s+(\w+)\s*(?:;|=|\(|\[)')
+CONVERSION_RE = re.compile(r'%%|%[-+ #0]*(\d+|\*)?(?:\.(\d+|\*))?(hh|h|ll|l|z|j|t|L)?([diouxXfFeEgGcsp])')
+# "now - lastX > 500": the block runs at most every 500 ms
+THROTTLE_RE = re.compile(r'-\s*[\w.\[\]>-]+?\s*\)?\s*>=?\s*\(?\s*([A-Za-z_]\w*|\d+)')
+# "if (now - lastX < INTERVAL) return;" at the top of a function
+EARLY_RETURN_RE = re.compile(r'\bif\s*\([^;{}]*-\s*[\w.\[\]>-]+\s*\)?\s*<\s*([A-Za-z_]\w*|\d+)\s*\)\s*\{?\s*return\b')
+CONDITIONAL_RE = re.compile(r'(?:else\b|if\b|switch\b|while\b|case\b|default\b|catch\b)')
+FOREVER_RE = re.compile(r'(?:for\s*\(\s*;\s*;\s*\)|while\s*\(\s*(?:true|1)\s*\))\s*$')
+LOOP_RE = re.compile(r'(?:for|do)\b')
+LAMBDA_RE = re.compile(r'\]\s*\([^()]*\)\s*(?:mutable\s*)?(?:->\s*[\w:]+\s*)?$')
+KEYWORDS = {'if', 'for', 'while', 'switch', 'return', 'sizeof', 'catch', 'case', 'do', 'else', 'new', 'delete'}
+
+
+# ============================================================================
+# SOURCE MODEL
+# ============================================================================
+
+def blank(source):
+    """Comments, literals and preprocessor lines replaced by spaces (offsets and newlines kept)."""
+    return BLANK_RE.sub(lambda m: re.sub(r'[^\n]', ' ', m.group(0)), source)
+
+
+def read_constants(paths):
+    """NAME -> int for '#define NAME 123' and 'NAME = 123;' (first definition wins)."""
+    constants = {}
+    for path in paths:
+        with open(path) as f:
+            for match in CONSTANT_RE.finditer(f.read()):
+                name, value = (match.group(1), match.group(2)) if match.group(1) else (match.group(3), match.group(4))
+                constants.setdefault(name, int(value))
+    return constants
+
+
+def resolve_ms(expression, constants):
+    """Smallest positive number or known constant in an expression, None if there is none."""
+    values = []
+    for token in re.findall(r'[A-Za-z_]\w*|\d+', expression):
+        value = int(token) if token.isdigit() else constants.get(token)
+        if value:
+            values.append(value)
+    return min(values) if values else None
+
+
+def match_brace(code, open_pos):
+    depth = 0
+    for pos in range(open_pos, len(code)):
+        if code[pos] == '{':
+            depth += 1
+        elif code[pos] == '}':
+            depth -= 1
+            if depth == 0:
+                return pos
+    return len(code)
+
+
+def statement_start(code, pos, floor):
+    """Start of the statement containing pos (the ';' in "for (;;)" does not end one)."""
+    depth = 0
+    while pos > floor:
+        pos -= 1
+        char = code[pos]
+        if char == ')':
+            depth += 1
+        elif char == '(':
+            depth -= 1
+        elif depth <= 0 and char in ';{}':
+            return pos + 1
+    return floor
+
+
+def blocks_of(code, start, end):
+    """(open, close, header) of every brace block inside a function body."""
+    blocks, stack = [], []
+    for pos in range(start, end):
+        if code[pos] == '{':
+            stack.append((pos, code[statement_start(code, pos, start):pos].strip()))
+        elif code[pos] == '}' and stack:
+            open_pos, header = stack.pop()
+            blocks.append((open_pos, pos, header))
+    return blocks
+
+
+class Function:
+    def __init__(self, path, source, code, name, start, end):
+        self.path = path
+        self.source = source
+        self.code = code
+        self.name = name
+        self.short = name.split('::')[-1]
+        self.owner = name.split('::')[0] if '::' in name else None
+        self.start = start
+        self.end = end
+        self.blocks = blocks_of(code, start, end)
+        self.cap = None                 # Calls per second from an early-return guard
+        self.calls = []                 # (offset, callee, conditions, cap)
+        self.sites = []                 # Log call sites
+
+    def context(self, pos, constants):
+        """(conditions, cap in calls/s, in a loop) for a position in the body."""
+        conditions = 0
+        in_loop = False
+        cap = None
+        headers = [header for open_pos, close, header in self.blocks if open_pos < pos < close]
+        statement = self.code[statement_start(self.code, pos, self.start):pos].strip()
+        if CONDITIONAL_RE.match(statement):
+            headers.append(statement)
+        for header in headers:
+            header = header.lstrip('} ')
+            if CONDITIONAL_RE.match(header) or LAMBDA_RE.search(header):
+                conditions += DEPTHS - 1 if self.latches(header, pos) else 1
+                for guard in THROTTLE_RE.findall(header):
+                    ms = resolve_ms(guard, constants)
+                    if ms:
+                        cap = min(cap, 1000.0 / ms) if cap else 1000.0 / ms
+            elif LOOP_RE.match(header) and not FOREVER_RE.match(header):
+                in_loop = True
+        return conditions, cap, in_loop
+
+    def latches(self, header, pos):
+        """True for "if (pressed && !latched) { latched = true; ... }": once per change, not per pass."""
+        close = min((c for o, c, h in self.blocks if h == header and o < pos < c), default=None)
+        names = set(re.findall(r'[A-Za-z_]\w*', header)) - KEYWORDS
+        if close is None or not names:
+            return False
+        body = self.code[self.code.rfind('{', self.start, pos):close]
+        return re.search(r'\b(?:%s)\s*=(?!=)' % '|'.join(sorted(names)), body) is not None
+
+    def forever(self):
+        """(open, close) of the body's for (;;) / while (true) block, None if it has none."""
+        for open_pos, close, header in self.blocks:
+            if FOREVER_RE.match(header):
+                return open_pos, close
+        return None
+
+
+def message_bytes(text):
+    """Estimated bytes written to the ring for a format string."""
+    if text is None:
+        return CONVERSION_BYTES['s']
+    literal = re.sub(r'\\(?:x[0-9a-fA-F]{1,2}|[0-7]{1,3}|.)', 'e', text)
+    size = 0
+    pos = 0
+    for match in CONVERSION_RE.finditer(literal):
+        size += len(literal[pos:match.start()].encode('utf-8'))
+        pos = match.end()
+        if match.group(0) == '%%':
+            size += 1
+            continue
+        width, precision, length, conversion = match.groups()
+        if conversion in 'fFeEgG' and precision and precision.isdigit():
+            estimate = 4 + int(precision)
+        elif length in ('l', 'll', 'z', 'j') and conversion in 'diouxX':
+            estimate = LONG_BYTES
+        else:
+            estimate = CONVERSION_BYTES[conversion]
+        if width and width.isdigit():
+            estimate = max(estimate, int(width))
+        size += estimate
+    size += len(literal[pos:].encode('utf-8'))
+    return min(size, DEBUGLOG_BUFFER - 1)
+
+
+def parse_file(path, constants):
+    with open(path) as f:
+        source = f.read()
+    code = blank(source)
+    functions = []
+    end = 0
+    for match in FUNCTION_RE.finditer(code):
+        if match.start() < end:
+            continue                    # Nested (lambdas, calls that look like definitions)
+        open_pos = code.find('{', match.start(1))
+        if open_pos < 0 or code[match.end(1):open_pos].count(';'):
+            continue
+        end = match_brace(code, open_pos)
+        functions.append(Function(path, source, code, match.group(1), open_pos, end))
+
+    for function in functions:
+        body = code[function.start:function.end]
+        early = EARLY_RETURN_RE.search(body)
+        if early:
+            ms = resolve_ms(early.group(1), constants)
+            function.cap = 1000.0 / ms if ms else None
+        for match in SITE_RE.finditer(code, function.start, function.end):
+            macro, category, sink, serial = match.groups()
+            if function.short == 'debugLog' and serial:
+                continue                # The sink itself
+            texts = []
+            pos = match.end()
+            while True:
+                literal = LITERAL_RE.match(source, pos)
+                if not literal:
+                    break
+                texts.append(literal.group(1))
+                pos = literal.end()
+            conditions, cap, in_loop = function.context(match.start(), constants)
+            function.sites.append({
+                'function': function, 'offset': match.start(), 'line': line_of(source, match.start()),
+                'call': macro or sink or 'Serial.' + serial,
+                'level': MACRO_LEVELS.get(macro), 'category': category,
+                'text': ''.join(texts) if texts else None,
+                'bytes': message_bytes(''.join(texts) if texts else None),
+                'ring': serial is None, 'conditions': conditions, 'cap': cap, 'loop': in_loop})
+    return source, code, functions
+
+
+# ============================================================================
+# CALL GRAPH
+# ============================================================================
+
+def link(files, constants):
+    """Resolve the calls in every body to defined functions."""
+    functions = [f for _, _, fs in files for f in fs]
+    by_short = {}
+    for function in functions:
+        by_short.setdefault(function.short, []).append(function)
+    classes = {f.owner for f in functions if f.owner}
+    types = {}
+    for source, code, _ in files:
+        for cls, name in DECLARATION_RE.findall(code):
+            if cls in classes:
+                types.setdefault(name, cls)
+
+    for function in functions:
+        code = function.code
+        for match in CALL_RE.finditer(code, function.start, function.end):
+            access, name = match.groups()
+            if name in KEYWORDS or name not in by_short or SITE_RE.match(code, match.start(2)):
+                continue
+            if access in ('.', '->'):
+                obj = re.search(r'(\w+)\s*(?:\.|->)\s*$', code[max(0, match.start() - 40):match.start() + 2])
+                owner = types.get(obj.group(1)) if obj else None
+                callees = [f for f in by_short[name] if owner and f.owner == owner]
+            elif access == '::':
+                continue                # Qualified names are resolved by the member rule
+            else:
+                callees = [f for f in by_short[name] if f.owner is None or f.owner == function.owner]
+            if not callees:
+                continue
+            conditions, cap, _ = function.context(match.start(2), constants)
+            for callee in callees:
+                if callee is not function:
+                    function.calls.append((match.start(2), callee, conditions, cap))
+    return functions
+
+
+def find_roots(files, functions, constants, overrides, extra):
+    """(name, function, period ms, (open, close) of the periodic part or None) of every entry point."""
+    by_name = {}
+    for function in functions:
+        by_name.setdefault(function.short, function)
+    roots = []
+    for source, code, _ in files:
+        for name in TASK_RE.findall(code):
+            task = by_name.get(name)
+            window = task.forever() if task else None
+            if window is None:
+                continue                # One-shot task (bootRadarTask, restart)
+            periods = []
+            for match in WAIT_RE.finditer(code, window[0], window[1]):
+                ms = resolve_ms(match.group(1) or match.group(2), constants)
+                if ms:
+                    periods.append((task.context(match.start(), constants)[0], ms))
+            steady = [ms for conditions, ms in periods if conditions == 0]
+            if periods:
+                roots.append((name, task, min(steady or [ms for _, ms in periods]), window))
+        for job, name, interval in JOB_RE.findall(source):
+            ms = resolve_ms(interval, constants)
+            if name in by_name and ms:
+                roots.append(('loop:' + job, by_name[name], ms, None))
+    if 'loop' in by_name and constants.get(LOOP_PERIOD):
+        roots.append(('loop', by_name['loop'], constants[LOOP_PERIOD], None))
+    for name, ms in extra:
+        if name not in by_name:
+            raise SystemExit('--root: no function named %s' % name)
+        roots.append((name, by_name[name], ms, None))
+    roots = [(name, function, overrides.get(name, ms), window) for name, function, ms, window in roots]
+    unused = set(overrides) - {root[0] for root in roots}
+    if unused:
+        raise SystemExit('--period: no root named %s' % ', '.join(sorted(unused)))
+    return roots
+
+
+def inside(window, pos):
+    return window is None or window[0] < pos < window[1]
+
+
+def propagate(root, period_ms, window):
+    """{(function, branches): calls/s} - the highest rate each function is reached with
+    through that many if/else/switch/while branches (DEPTHS - 1 means that many or more)."""
+    start = 1000.0 / period_ms
+    if root.cap:
+        start = min(start, root.cap)
+    rates = {(root, 0): start}
+    pending = [(root, 0)]
+    while pending:
+        function, depth = pending.pop()
+        rate = rates[(function, depth)]
+        for pos, callee, conditions, cap in function.calls:
+            if function is root and not inside(window, pos):
+                continue
+            callee_rate = min(x for x in (rate, cap, callee.cap) if x is not None)
+            key = (callee, min(DEPTHS - 1, depth + conditions))
+            if callee_rate > rates.get(key, 0.0):
+                rates[key] = callee_rate
+                pending.append(key)
+    return rates
+
+
+def site_rates(site, rates, root, window):
+    """Calls/s of one site under one root, indexed by STEADY / BRANCH / ANY."""
+    function = site['function']
+    if function is root and not inside(window, site['offset']):
+        return [0.0] * DEPTHS
+    result = []
+    for limit in range(DEPTHS):
+        rate = max([rates.get((function, depth), 0.0) for depth in range(DEPTHS)
+                    if min(DEPTHS - 1, depth + site['conditions']) <= limit] or [0.0])
+        result.append(min(rate, site['cap']) if site['cap'] is not None else rate)
+    return result
+
+
+def enabled(site, levels, max_level):
+    if site['level'] is None:
+        return True
+    return site['level'] <= max_level and site['level'] <= levels[CATEGORIES.index(site['category'])]
+
+
+# ============================================================================
+# REPORT
+# ============================================================================
+
+def describe(row):
+    flags = []
+    if row['rates'][STEADY]:
+        flags.append('every pass')
+    elif row['rates'][BRANCH]:
+        flags.append('1 branch')
+    else:
+        flags.append('2+ branches')
+    if row['cap'] is not None:
+        flags.append('every %d ms' % round(1000.0 / row['cap']))
+    if row['loop']:
+        flags.append('in a loop')
+    if not row['on']:
+        flags.append('off')
+    return ', '.join(flags)
+
+
+def history(ring, rate):
+    if rate <= 0:
+        return 'never wraps'
+    seconds = ring / rate
+    if seconds >= 3600:
+        return '%.1f h' % (seconds / 3600)
+    if seconds >= 120:
+        return '%.1f min' % (seconds / 60)
+    return '%.0f s' % seconds
+
+
+def bytes_per_second(rows, which, root=None):
+    if root is None:
+        return sum(row['rates'][which] * row['bytes'] for row in rows if row['on'])
+    return sum(row['roots'][root][which] * row['bytes'] for row in rows if row['on'] and root in row['roots'])
+
+
+def print_report(roots, rows, serial_rows, function_rates, ring, ring_name, levels, top):
+    print('Ring: %d bytes (%s); levels %s' % (ring, ring_name, ','.join(
+        '%s=%s' % (c.lower(), LEVELS[l]) for c, l in zip(CATEGORIES, levels))))
+    print()
+    print('%-26s %9s %6s %10s %10s %12s %12s' % ('root', 'period', 'sites', 'steady B/s', 'branch B/s',
+                                                  'steady hist', 'branch hist'))
+    for name, _, period, _ in sorted(roots, key=lambda r: (-bytes_per_second(rows, BRANCH, r[0]),
+                                                           -bytes_per_second(rows, STEADY, r[0]), r[0])):
+        sites = sum(1 for row in rows if row['on'] and any(row['roots'].get(name, [0.0])))
+        steady = bytes_per_second(rows, STEADY, name)
+        branch = bytes_per_second(rows, BRANCH, name)
+        print('%-26s %6d ms %6d %10.1f %10.1f %12s %12s' % (name, period, sites, steady, branch,
+                                                         history(ring, steady), history(ring, branch)))
+
+    print()
+    print('Hot functions (calls/s: steady, one branch)')
+    ranked = sorted(function_rates.items(), key=lambda item: (-item[1][0][BRANCH], -item[1][0][STEADY],
+                                                              item[0].name))
+    for function, (rates, names) in ranked[:top]:
+        print('  %-32s %7.2f %7.2f  %s' % (function.name, rates[STEADY], rates[BRANCH], ', '.join(sorted(names))))
+
+    print()
+    print('Call sites by bytes/s into the ring')
+    print('%10s %10s %8s %5s  %-7s %-9s %-32s %s' % ('steady B/s', 'branch B/s', 'calls/s', 'bytes', 'level',
+                                                     'category', 'location', 'message'))
+    ranked = sorted(rows, key=lambda r: (-r['rates'][BRANCH] * r['bytes'], -r['rates'][ANY] * r['bytes'],
+                                         r['path'], r['line']))
+    for row in ranked[:top]:
+        text = (row['text'] or '<not a literal>').replace('\\n', ' ').strip()
+        rate = next(r for r in row['rates'] if r)
+        print('%10.1f %10.1f %8.2f %5d  %-7s %-9s %-32s %s  [%s]' % (
+            row['rates'][STEADY] * row['bytes'], row['rates'][BRANCH] * row['bytes'], rate,
+            row['bytes'], LEVELS[row['level']] if row['level'] else '-',
+            (row['category'] or row['call']).lower(), '%s:%d' % (row['path'], row['line']), text[:44],
+            describe(row)))
+
+    if serial_rows:
+        print()
+        print('Serial only (not in the ring)')
+        for row in sorted(serial_rows, key=lambda r: (-r['rates'][ANY] * r['bytes'], r['path'], r['line'])):
+            print('%10.1f B/s  %s:%d %s(%s)' % (row['rates'][ANY] * row['bytes'], row['path'], row['line'],
+                                               row['call'], (row['text'] or '').replace('\\n', ' ').strip()[:44]))
+
+    print()
+    print('%d call site(s) reachable, %d enabled' % (len(rows), sum(1 for row in rows if row['on'])))
+    for which, label in ((STEADY, 'Steady'), (BRANCH, 'One branch'), (ANY, 'Upper bound')):
+        rate = bytes_per_second(rows, which)
+        print('%-12s %9.1f B/s -> the ring holds %s' % (label + ':', rate, history(ring, rate)))
+
+
+def parse_pairs(values, option):
+    pairs = []
+    for value in values:
+        name, _, ms = value.partition('=')
+        if not name or not ms.isdigit() or int(ms) == 0:
+            raise SystemExit('%s expects NAME=MS, got %r' % (option, value))
+        pairs.append((name, int(ms)))
+    return pairs
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Rank hot-path logging calls by bytes/s into the debug ring')
+    parser.add_argument('files', nargs='*', help='Sources to scan (default src/*.cpp)')
+    parser.add_argument('--levels', default='info', help='Runtime levels, as for /api/log (default info)')
+    parser.add_argument('--max', default='debug', choices=LEVELS[1:], help='Compiled LOG_LEVEL_MAX (default debug)')
+    parser.add_argument('--psram', action='store_true', help='Use the PSRAM ring size (DEBUG_LOG_BYTES_PSRAM)')
+    parser.add_argument('--ring', type=int, help='Ring size in bytes (default DEBUG_LOG_BYTES)')
+    parser.add_argument('--period', action='append', default=[], metavar='ROOT=MS',
+                        help='Override the period of a root (e.g. displayUpdateTaskFunction=500)')
+    parser.add_argument('--root', action='append', default=[], metavar='NAME=MS',
+                        help='Also walk from this function at this period')
+    parser.add_argument('--top', type=int, default=25, help='Rows per table (default 25)')
+    parser.add_argument('--all', action='store_true', help='Also list call sites switched off by the levels')
+    parser.add_argument('--project-dir', default=os.path.dirname(os.path.abspath(__file__)))
+    args = parser.parse_args()
+
+    ok, levels = model_apply([LEVELS.index('info')] * len(CATEGORIES), args.levels)
+    if not ok:
+        parser.error('--levels: %r is not a valid setting' % args.levels)
+    ring_name = RING_BYTES_PSRAM if args.psram else RING_BYTES
+    paths = args.files or sorted(glob.glob(os.path.join(args.project_dir, 'src', '*.cpp')))
+    headers = sorted(glob.glob(os.path.join(args.project_dir, 'include', '*.h')))
+    constants = read_constants(paths + headers)
+    ring = args.ring or constants.get(ring_name)
+    if not ring:
+        parser.error('%s not found in include/ - pass --ring' % ring_name)
+    if args.ring:
+        ring_name = '--ring'
+
+    files = [parse_file(path, constants) for path in paths]
+    functions = link(files, constants)
+    roots = find_roots(files, functions, constants, dict(parse_pairs(args.period, '--period')),
+                       parse_pairs(args.root, '--root'))
+
+    rows = {}
+    function_rates = {}
+    for name, root, period, window in roots:
+        rates = propagate(root, period, window)
+        for function in {function for function, _ in rates}:
+            reached = [max([rates.get((function, depth), 0.0) for depth in range(limit + 1)])
+                       for limit in range(DEPTHS)]
+            totals, names = function_rates.get(function, ([0.0] * DEPTHS, set()))
+            function_rates[function] = ([t + r for t, r in zip(totals, reached)], names | {name})
+            for site in function.sites:
+                row = rows.setdefault(id(site), dict(site, path=os.path.relpath(function.path), roots={},
+                                                     on=enabled(site, levels, LEVELS.index(args.max))))
+                row['roots'][name] = site_rates(site, rates, root, window)
+    for row in rows.values():
+        row['rates'] = [sum(rates[which] for rates in row['roots'].values()) for which in range(DEPTHS)]
+
+    ring_rows = [row for row in rows.values() if row['ring'] and any(row['rates']) and (row['on'] or args.all)]
+    serial_rows = [row for row in rows.values() if not row['ring'] and any(row['rates'])]
+    print_report(roots, ring_rows, serial_rows, function_rates, ring, ring_name, levels, args.top)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
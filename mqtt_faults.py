@@ -0,0 +1,695 @@
+#!/usr/bin/env python3
+"""
+Run a fault-injecting MQTT broker for a thermostat and measure how the device
+copes while its broker is unreachable.
+
+The broker is a minimal MQTT 3.1.1 server (CONNECT, PUBLISH, SUBSCRIBE,
+PINGREQ, DISCONNECT - what PubSubClient uses) that walks through a schedule of
+fault phases:
+  up         normal broker
+  refuse     listener closed, sessions killed (connection refused)
+  blackhole  connections accepted but never answered - no CONNACK, no
+             PINGRESP (the case that used to stall loop() for the socket
+             timeout on every reconnect attempt)
+  drop       every connection is reset as soon as it is accepted
+  stall      sessions are accepted and subscribed, then the broker stops
+             reading at the first PUBLISH and keeps the socket open - a slow
+             or half-open broker whose TCP window fills during the session's
+             republish (the case that used to hold loop() while it waited for
+             room in the outbox)
+Point the thermostat's MQTT server at this machine first (the address to use
+is printed at start). While the schedule runs /api/state?live=1 is polled for
+system.loopMaxMs (longest loop() pass in the last second), mqttConnected,
+mqttQueued and mqttDropped. --nudge posts setpoint changes to /control during
+each outage so there is something to queue; only the last value should arrive
+after the broker comes back.
+
+In a stall phase the session is never answered again, so the device also sees
+its keep-alive expire and reconnects (and republishes) into another stalled
+session.
+
+Per phase the report shows loop latency, connection attempts (the backoff)
+and the outbox; for each recovery the reconnect delay, the flushed burst and
+whether the nudged setpoint arrived. Exits 1 if loopMaxMs went over
+--max-loop-ms during an outage, the device never reconnected, or the nudged
+value was lost.
+
+--outbox-check needs no device: it compiles the outbox (include/MqttOutbox.h,
+src/MqttOutbox.cpp) with --cxx into a small harness and compares it against a
+Python model of the same rules over random offline/online publish streams.
+
+Usage:
+  python3 mqtt_faults.py thermostat.local
+  python3 mqtt_faults.py --schedule up:30,blackhole:90,up:60 --nudge 70 thermostat.local
+  python3 mqtt_faults.py --port 1884 --max-loop-ms 100 192.168.1.50
+  python3 mqtt_faults.py --outbox-check --rounds 500
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import socket
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+
+from sse_loadtest import read_headers, split_host
+
+FAULT_MODES = ('up', 'refuse', 'blackhole', 'drop', 'stall')
+DEFAULT_SCHEDULE = 'up:30,blackhole:60,up:45,refuse:60,up:45,drop:45,up:45,stall:60,up:45'
+STALL_RCVBUF = 4096         # Receive buffer of a stalled session, so the device's send buffer fills quickly
+
+CONNECT, CONNACK, PUBLISH, PUBACK = 1, 2, 3, 4
+SUBSCRIBE, SUBACK, PINGREQ, PINGRESP, DISCONNECT = 8, 9, 12, 13, 14
+
+OUTBOX_SLOTS = 64           # MQTT_OUTBOX_SLOTS
+OUTBOX_MAX_BYTES = 24576    # MQTT_OUTBOX_MAX_BYTES
+
+HARNESS = r'''
+#include "MqttOutbox.h"
+#include <stdio.h>
+#include <string.h>
+
+static void print(const MqttMessage& m) {
+    printf("M %d %s %s\n", m.retained ? 1 : 0, m.topic(), m.payload);
+}
+
+int main() {
+    static char line[8192], topic[256], payload[4096];
+    MqttOutbox outbox;
+    MqttMessage held;
+    held.data = NULL;
+    while (fgets(line, sizeof(line), stdin)) {
+        MqttMessage m;
+        int retained;
+        switch (line[0]) {
+            case 'P':   // put
+                if (sscanf(line + 2, "%d %255s %4095s", &retained, topic, payload) == 3) {
+                    outbox.put(topic, payload, retained != 0);
+                }
+                break;
+            case 'T':   // take and publish
+                if (outbox.take(m)) { print(m); MqttOutbox::release(m); } else puts("E");
+                break;
+            case 'H':   // would a put evict?
+                if (sscanf(line + 2, "%255s %4095s", topic, payload) == 2) {
+                    puts(outbox.hasRoom(topic, strlen(payload)) ? "H 1" : "H 0");
+                }
+                break;
+            case 'O':   // take, publish in flight
+                if (!held.data && outbox.take(held)) print(held); else puts("E");
+                break;
+            case 'R':   // in-flight publish failed
+                if (held.data) outbox.restore(held);
+                break;
+            case 'D': { // reconnect: drain everything
+                printf("C %u %u\n", (unsigned)outbox.count(), (unsigned)outbox.bytes());
+                while (outbox.take(m)) { print(m); MqttOutbox::release(m); }
+                const MqttOutboxStats& s = outbox.stats();
+                printf("S %u %u %u %u %u\n", s.queued, s.coalesced, s.dropped, s.peakCount, s.peakBytes);
+                break;
+            }
+        }
+    }
+    if (held.data) MqttOutbox::release(held);
+    fflush(stdout);
+    return 0;
+}
+'''
+
+
+# ============================================================================
+# BROKER
+# ============================================================================
+
+def encode_packet(first_byte, body=b''):
+    length = len(body)
+    header = bytearray([first_byte])
+    while True:
+        byte = length % 128
+        length //= 128
+        header.append(byte | 0x80 if length else byte)
+        if not length:
+            return bytes(header) + body
+
+
+async def read_packet(reader):
+    first = (await reader.readexactly(1))[0]
+    length, multiplier = 0, 1
+    while True:
+        byte = (await reader.readexactly(1))[0]
+        length += (byte & 0x7F) * multiplier
+        if not byte & 0x80:
+            break
+        multiplier *= 128
+    body = await reader.readexactly(length) if length else b''
+    return first >> 4, first & 0x0F, body
+
+
+def read_string(body, pos):
+    length = struct.unpack_from('>H', body, pos)[0]
+    return body[pos + 2:pos + 2 + length].decode('utf-8', 'replace'), pos + 2 + length
+
+
+class Session:
+    def __init__(self, writer, frozen):
+        self.writer = writer
+        self.frozen = frozen       # Blackholed: read everything, answer nothing
+        self.client_id = None
+
+
+class FaultBroker:
+    def __init__(self, bind, port):
+        self.bind = bind
+        self.port = port
+        self.mode = 'up'
+        self.server = None
+        self.sessions = set()
+        self.attempts = []         # (time, mode) for every TCP connection that reached us
+        self.connacks = []         # Times a session was accepted
+        self.received = []         # (time, topic, payload, retained)
+        self.resume = asyncio.Event()  # Releases stalled sessions when the stall phase ends
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle, self.bind, self.port)
+
+    async def stop(self):
+        self.kill_sessions()
+        await asyncio.sleep(0.1)   # Let the session handlers see the reset and finish
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+
+    def kill_sessions(self):
+        for session in list(self.sessions):
+            session.writer.transport.abort()
+        self.sessions.clear()
+
+    async def set_mode(self, mode):
+        if self.mode == 'stall' and mode != 'stall':
+            # The device still thinks these sessions are up; reset them so it reconnects
+            self.resume.set()
+            self.kill_sessions()
+            self.resume = asyncio.Event()
+        self.mode = mode
+        if mode == 'refuse':
+            await self.stop()
+            return
+        if self.server is None:
+            await self.start()
+        if mode == 'drop':
+            self.kill_sessions()
+        elif mode == 'blackhole':
+            for session in self.sessions:
+                session.frozen = True
+
+    async def handle(self, reader, writer):
+        self.attempts.append((time.monotonic(), self.mode))
+        if self.mode == 'drop':
+            writer.transport.abort()
+            return
+        session = Session(writer, self.mode == 'blackhole')
+        self.sessions.add(session)
+        if self.mode == 'stall':
+            sock = writer.get_extra_info('socket')
+            if sock is not None:
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, STALL_RCVBUF)
+        try:
+            while True:
+                ptype, flags, body = await read_packet(reader)
+                if session.frozen:
+                    continue
+                if ptype == PUBLISH and self.mode == 'stall':
+                    # Stop reading; what the device sends piles up in the socket buffers
+                    await self.resume.wait()
+                    break
+                if ptype == CONNECT:
+                    # Protocol name, level, flags, keep-alive, then the client id
+                    _, pos = read_string(body, 0)
+                    session.client_id, _ = read_string(body, pos + 4)
+                    writer.write(encode_packet(CONNACK << 4, b'\x00\x00'))
+                    self.connacks.append(time.monotonic())
+                elif ptype == PUBLISH:
+                    topic, pos = read_string(body, 0)
+                    qos = (flags >> 1) & 0x03
+                    if qos:
+                        writer.write(encode_packet(PUBACK << 4, body[pos:pos + 2]))
+                        pos += 2
+                    self.received.append((time.monotonic(), topic, body[pos:].decode('utf-8', 'replace'),
+                                          bool(flags & 0x01)))
+                elif ptype == SUBSCRIBE:
+                    packet_id = body[:2]
+                    pos, granted = 2, b''
+                    while pos < len(body):
+                        _, pos = read_string(body, pos)
+                        pos += 1
+                        granted += b'\x00'
+                    writer.write(encode_packet(SUBACK << 4, packet_id + granted))
+                elif ptype == PINGREQ:
+                    writer.write(encode_packet(PINGRESP << 4))
+                elif ptype == DISCONNECT:
+                    break
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.sessions.discard(session)
+            writer.close()
+
+
+# ============================================================================
+# DEVICE
+# ============================================================================
+
+async def http_request(name, port, method, path, body=None, timeout=5.0):
+    reader, writer = await asyncio.wait_for(asyncio.open_connection(name, port), timeout)
+    try:
+        request = '%s %s HTTP/1.1\r\nHost: %s\r\nConnection: close\r\n' % (method, path, name)
+        if body is not None:
+            request += 'Content-Type: application/x-www-form-urlencoded\r\nContent-Length: %d\r\n' % len(body)
+        writer.write((request + '\r\n' + (body or '')).encode())
+        await writer.drain()
+        code, _ = await asyncio.wait_for(read_headers(reader), timeout)
+        return code, await asyncio.wait_for(reader.read(), timeout)
+    finally:
+        writer.close()
+
+
+async def poll_device(name, port, interval, samples, stop):
+    while not stop.is_set():
+        started = time.monotonic()
+        try:
+            code, body = await http_request(name, port, 'GET', '/api/state?live=1')
+            state = json.loads(body) if code == 200 else None
+        except (OSError, asyncio.TimeoutError, ValueError):
+            state = None
+        sample = {'t': started, 'ok': state is not None}
+        if state is not None:
+            system = state.get('system', {})
+            sample.update({
+                'hostname': state.get('hostname'),
+                'mode': state.get('status', {}).get('mode'),
+                'loop_ms': system.get('loopMaxMs'),
+                'connected': system.get('mqttConnected'),
+                'queued': system.get('mqttQueued'),
+                'dropped': system.get('mqttDropped'),
+            })
+        samples.append(sample)
+        try:
+            await asyncio.wait_for(stop.wait(), max(0.0, interval - (time.monotonic() - started)))
+        except asyncio.TimeoutError:
+            pass
+
+
+async def nudge_setpoint(name, port, samples, value, nudges, stop):
+    """Post alternating setpoints for the current mode, always ending on value."""
+    state = next((s for s in reversed(samples) if s['ok']), None)
+    param = {'heat': 'setTempHeat', 'cool': 'setTempCool', 'auto': 'setTempAuto'}.get(state and state['mode'])
+    if param is None:
+        print('[FAULT] thermostat mode is %s - no setpoint to nudge' % (state and state['mode']))
+        return
+    step = 0
+    while True:
+        done = stop.is_set()
+        target = value if done or step % 2 else value + 1.0
+        try:
+            code, _ = await http_request(name, port, 'POST', '/control', '%s=%.1f' % (param, target))
+            if code == 200:
+                nudges.append((time.monotonic(), target))
+        except (OSError, asyncio.TimeoutError):
+            pass
+        if done:
+            return
+        step += 1
+        try:
+            await asyncio.wait_for(stop.wait(), 2.0)
+        except asyncio.TimeoutError:
+            pass
+
+
+def local_address(name):
+    """Address of this machine on the route to the device."""
+    probe = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        probe.connect((socket.gethostbyname(name), 80))
+        return probe.getsockname()[0]
+    except OSError:
+        return '127.0.0.1'
+    finally:
+        probe.close()
+
+
+def parse_schedule(text):
+    schedule = []
+    for item in text.split(','):
+        mode, _, seconds = item.strip().partition(':')
+        if mode not in FAULT_MODES or not seconds:
+            raise ValueError('bad phase %r (want mode:seconds, mode one of %s)' % (item, ', '.join(FAULT_MODES)))
+        schedule.append((mode, float(seconds)))
+    return schedule
+
+
+async def run_faults(name, port, args):
+    broker = FaultBroker(args.bind, args.port)
+    await broker.start()
+    samples, nudges, phases = [], [], []
+    stop = asyncio.Event()
+    poller = asyncio.ensure_future(poll_device(name, port, args.interval, samples, stop))
+    try:
+        for mode, seconds in args.schedule:
+            await broker.set_mode(mode)
+            phase = {'mode': mode, 'start': time.monotonic()}
+            print('[FAULT] %-9s for %ds' % (mode, seconds))
+            nudge_stop = asyncio.Event()
+            nudger = None
+            if args.nudge is not None and mode != 'up':
+                nudger = asyncio.ensure_future(nudge_setpoint(name, port, samples, args.nudge, nudges, nudge_stop))
+            await asyncio.sleep(seconds)
+            if nudger:
+                nudge_stop.set()
+                await nudger
+            phase['end'] = time.monotonic()
+            phases.append(phase)
+    finally:
+        stop.set()
+        await poller
+        await broker.stop()
+    return broker, samples, nudges, phases
+
+
+# ============================================================================
+# REPORT
+# ============================================================================
+
+def in_phase(items, phase, key=lambda item: item[0]):
+    return [item for item in items if phase['start'] <= key(item) < phase['end']]
+
+
+def target_topic(samples):
+    hostname = next((s['hostname'] for s in samples if s['ok'] and s['hostname']), None)
+    return hostname + '/target_temperature' if hostname else None
+
+
+def report(broker, samples, nudges, phases, args):
+    ok = True
+    baseline = None
+    topic = target_topic(samples)
+    print('\n%-9s %6s %9s %9s %8s %7s %7s %8s' % (
+        'phase', 'secs', 'loop max', 'loop p50', 'attempts', 'queued', 'dropped', 'http err'))
+    for i, phase in enumerate(phases):
+        seen = [s for s in in_phase(samples, phase, key=lambda s: s['t']) if s['ok'] and s['loop_ms'] is not None]
+        loops = sorted(s['loop_ms'] for s in seen)
+        failed = len(in_phase(samples, phase, key=lambda s: s['t'])) - len(seen)
+        attempts = in_phase(broker.attempts, phase)
+        loop_max = loops[-1] if loops else None
+        dropped = (seen[-1]['dropped'] - seen[0]['dropped']) if seen else 0
+        print('%-9s %6.0f %9s %9s %8d %7s %7d %8d' % (
+            phase['mode'], phase['end'] - phase['start'],
+            '%d ms' % loop_max if loops else '-', '%d ms' % loops[len(loops) // 2] if loops else '-',
+            len(attempts), max(s['queued'] for s in seen) if seen else '-', dropped, failed))
+        if phase['mode'] == 'up' and i == 0 and loops:
+            baseline = loops[len(loops) // 2]
+        if phase['mode'] != 'up':
+            if loop_max is not None and loop_max > args.max_loop_ms:
+                print('  FAIL loop() pass took %d ms during %s (limit %d ms)' % (loop_max, phase['mode'], args.max_loop_ms))
+                ok = False
+            gaps = [b[0] - a[0] for a, b in zip(attempts, attempts[1:])]
+            if gaps:
+                print('  reconnect attempts every %.1f-%.1f s' % (min(gaps), max(gaps)))
+        elif i > 0 and phases[i - 1]['mode'] != 'up':
+            ok = report_recovery(broker, samples, nudges, phases[i - 1], phase, topic, args) and ok
+    if baseline is not None:
+        print('\nHealthy loop p50 %d ms' % baseline)
+    return ok
+
+
+def report_recovery(broker, samples, nudges, outage, phase, topic, args):
+    connacks = in_phase(broker.connacks, phase, key=lambda t: t)
+    if not connacks:
+        print('  FAIL device did not reconnect within %.0f s' % (phase['end'] - phase['start']))
+        return False
+    reconnected = connacks[0]
+    burst = [m for m in broker.received if reconnected <= m[0] < reconnected + args.flush_window]
+    topics = {}
+    for _, name, _, _ in burst:
+        topics[name] = topics.get(name, 0) + 1
+    empty = next((s['t'] for s in samples if s['ok'] and s['t'] >= reconnected and s['queued'] == 0), None)
+    print('  reconnected after %.1f s; %d messages on %d topics in the first %.0f s (max %d per topic)' % (
+        reconnected - phase['start'], len(burst), len(topics), args.flush_window, max(topics.values()) if topics else 0))
+    if empty is not None:
+        print('  outbox empty %.1f s after reconnect' % (empty - reconnected))
+
+    sent = in_phase(nudges, outage)
+    if not sent or topic is None:
+        return True
+    expected = '%.1f' % sent[-1][1]
+    values = [m[2] for m in broker.received if m[1] == topic and m[0] >= reconnected and m[0] < phase['end']]
+    if not values or values[-1] != expected:
+        print('  FAIL %d setpoint changes during the outage; %s ended at %s, expected %s' % (
+            len(sent), topic, values[-1] if values else 'nothing', expected))
+        return False
+    print('  %d setpoint changes during the outage -> %d target_temperature publishes, last %s' % (
+        len(sent), len(values), expected))
+    return True
+
+
+# ============================================================================
+# OUTBOX CHECK
+# ============================================================================
+
+class OutboxModel:
+    """Python copy of MqttOutbox's rules."""
+
+    def __init__(self):
+        self.slots = {}            # topic -> [order, payload, retained]
+        self.bytes = 0
+        self.next_order = 0
+        self.held = None
+        self.stats = {'queued': 0, 'coalesced': 0, 'dropped': 0, 'peak_count': 0, 'peak_bytes': 0}
+
+    @staticmethod
+    def size(topic, payload):
+        return len(topic) + len(payload) + 2
+
+    def oldest(self, non_retained_only):
+        candidates = [(v[0], t) for t, v in self.slots.items() if not (non_retained_only and v[2])]
+        return min(candidates)[1] if candidates else None
+
+    def remove(self, topic):
+        order, payload, retained = self.slots.pop(topic)
+        self.bytes -= self.size(topic, payload)
+        return order, payload, retained
+
+    def make_room(self, size):
+        while self.slots and (len(self.slots) >= OUTBOX_SLOTS or self.bytes + size > OUTBOX_MAX_BYTES):
+            victim = self.oldest(True) or self.oldest(False)
+            self.remove(victim)
+            self.stats['dropped'] += 1
+        return self.bytes + size <= OUTBOX_MAX_BYTES
+
+    def store(self, topic, order, payload, retained):
+        self.slots[topic] = [order, payload, retained]
+        self.bytes += self.size(topic, payload)
+        self.stats['peak_count'] = max(self.stats['peak_count'], len(self.slots))
+        self.stats['peak_bytes'] = max(self.stats['peak_bytes'], self.bytes)
+
+    def has_room(self, topic, payload):
+        count, used = len(self.slots), self.bytes
+        if topic in self.slots:
+            count -= 1
+            used -= self.size(topic, self.slots[topic][1])
+        return count < OUTBOX_SLOTS and used + self.size(topic, payload) <= OUTBOX_MAX_BYTES
+
+    def put(self, topic, payload, retained):
+        size = self.size(topic, payload)
+        if size > OUTBOX_MAX_BYTES:
+            self.stats['dropped'] += 1
+            return
+        if topic in self.slots:
+            order = self.remove(topic)[0]
+            self.stats['coalesced'] += 1
+        else:
+            order = self.next_order
+            self.next_order += 1
+            self.stats['queued'] += 1
+        if not self.make_room(size):
+            self.stats['dropped'] += 1
+            return
+        self.store(topic, order, payload, retained)
+
+    def take(self):
+        topic = self.oldest(False)
+        if topic is None:
+            return None
+        order, payload, retained = self.remove(topic)
+        return topic, order, payload, retained
+
+    def restore(self, message):
+        topic, order, payload, retained = message
+        if topic in self.slots:
+            return
+        if not self.make_room(self.size(topic, payload)):
+            self.stats['dropped'] += 1
+            return
+        self.store(topic, order, payload, retained)
+
+    def run(self, ops):
+        out = []
+        line = lambda m: 'M %d %s %s' % (m[3], m[0], m[2])
+        for op in ops:
+            if op[0] == 'P':
+                self.put(op[2], op[3], op[1])
+            elif op[0] == 'H':
+                out.append('H %d' % self.has_room(op[1], op[2]))
+            elif op[0] == 'T':
+                message = self.take()
+                out.append(line(message) if message else 'E')
+            elif op[0] == 'O':
+                message = None if self.held else self.take()
+                out.append(line(message) if message else 'E')
+                if message:
+                    self.held = message
+            elif op[0] == 'R' and self.held:
+                self.restore(self.held)
+                self.held = None
+            elif op[0] == 'D':
+                out.append('C %d %d' % (len(self.slots), self.bytes))
+                while True:
+                    message = self.take()
+                    if not message:
+                        break
+                    out.append(line(message))
+                s = self.stats
+                out.append('S %d %d %d %d %d' % (s['queued'], s['coalesced'], s['dropped'], s['peak_count'], s['peak_bytes']))
+        return out
+
+
+def generate_ops(seed):
+    """One offline/online stream shaped like the firmware's publishes."""
+    rng = random.Random(seed)
+    state_topics = ['thermostat/%s' % n for n in range(rng.randint(10, 40))]
+    event_topics = ['thermostat/motion', 'thermostat/alert', 'thermostat/event%d' % rng.randint(0, 3)]
+    discovery_topics = ['homeassistant/sensor/t/c%d/config' % n for n in range(rng.randint(0, 60))]
+    payload = lambda lo, hi: ''.join(rng.choice('0123456789abcdef.{}":') for _ in range(rng.randint(lo, hi)))
+    ops = []
+    online = rng.random() < 0.5
+    for _ in range(rng.randint(20, 200)):
+        if rng.random() < 0.1:
+            online = not online
+            if online and rng.random() < 0.5:
+                for t in discovery_topics:
+                    p = payload(200, 1500)
+                    ops += [('H', t, p), ('P', 1, t, p)]
+        for topic in rng.sample(state_topics, rng.randint(1, len(state_topics))):
+            ops.append(('P', 1, topic, payload(1, 12)))
+        if rng.random() < 0.3:
+            ops.append(('P', 0, rng.choice(event_topics), payload(1, 64)))
+        if online:
+            for _ in range(rng.randint(0, 12)):
+                if rng.random() < 0.1:
+                    ops += [('O',), ('P', 1, rng.choice(state_topics), payload(1, 12)), ('R',)]
+                else:
+                    ops.append(('T',))
+        elif rng.random() < 0.2:
+            ops += [('O',), ('R',)]
+    ops.append(('D',))
+    return ops
+
+
+def format_ops(ops):
+    return ''.join(' '.join(str(p) for p in op) + '\n' for op in ops)
+
+
+def build_harness(cxx, project_dir, work_dir):
+    source = os.path.join(work_dir, 'harness.cpp')
+    binary = os.path.join(work_dir, 'harness')
+    with open(source, 'w') as f:
+        f.write(HARNESS)
+    subprocess.run([cxx, '-O2', '-std=c++11', '-Wall', '-I', os.path.join(project_dir, 'include'), source,
+                    os.path.join(project_dir, 'src', 'MqttOutbox.cpp'), '-o', binary], check=True)
+    return binary
+
+
+def outbox_check(args):
+    if shutil.which(args.cxx) is None:
+        print('Error: %s not found' % args.cxx)
+        return 1
+    work_dir = tempfile.mkdtemp(prefix='mqtt_')
+    try:
+        binary = build_harness(args.cxx, args.project_dir, work_dir)
+        totals = {'queued': 0, 'coalesced': 0, 'dropped': 0}
+        peak = 0
+        puts = 0
+        failed = 0
+        for seed in range(args.seed, args.seed + args.rounds):
+            ops = generate_ops(seed)
+            model = OutboxModel()
+            expected = model.run(ops)
+            actual = subprocess.run([binary], input=format_ops(ops), stdout=subprocess.PIPE,
+                                    text=True, check=True).stdout.splitlines()
+            puts += sum(1 for op in ops if op[0] == 'P')
+            for key in totals:
+                totals[key] += model.stats[key]
+            peak = max(peak, model.stats['peak_bytes'])
+            if actual != expected:
+                failed += 1
+                line = next(i for i, (a, e) in enumerate(zip(actual + [''] * len(expected), expected)) if a != e)
+                got = actual[line] if line < len(actual) else ''
+                print('FAIL seed %d output line %d: got %r, expected %r' % (seed, line, got[:60], expected[line][:60]))
+        print('%d rounds, %d publishes: %d queued, %d coalesced, %d dropped; peak %d bytes' % (
+            args.rounds, puts, totals['queued'], totals['coalesced'], totals['dropped'], peak))
+        if failed:
+            print('%d rounds FAILED' % failed)
+            return 1
+        print('outbox matches the model')
+        return 0
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fault-injecting MQTT broker for thermostat outage testing')
+    parser.add_argument('host', nargs='?', help='Device hostname/IP (optionally host:port)')
+    parser.add_argument('--schedule', default=DEFAULT_SCHEDULE,
+                        help='Comma-separated mode:seconds phases (default %s)' % DEFAULT_SCHEDULE)
+    parser.add_argument('--bind', default='0.0.0.0', help='Broker listen address (default 0.0.0.0)')
+    parser.add_argument('--port', type=int, default=1883, help='Broker port (default 1883)')
+    parser.add_argument('--interval', type=float, default=0.5, help='Seconds between /api/state polls')
+    parser.add_argument('--nudge', type=float, metavar='TEMP',
+                        help='Post setpoint changes during outages, ending on TEMP (may trigger a schedule override)')
+    parser.add_argument('--max-loop-ms', type=int, default=250, help='Fail if loopMaxMs exceeds this during an outage')
+    parser.add_argument('--flush-window', type=float, default=5.0, help='Seconds after reconnect counted as the flush')
+    parser.add_argument('--outbox-check', action='store_true', help='Compare the compiled outbox with the model instead')
+    parser.add_argument('--rounds', type=int, default=200, help='Random streams for --outbox-check (default 200)')
+    parser.add_argument('--seed', type=int, default=1, help='First --outbox-check seed')
+    parser.add_argument('--cxx', default=os.environ.get('CXX', 'c++'), help='Host C++ compiler (default c++)')
+    parser.add_argument('--project-dir', default=os.path.dirname(os.path.abspath(__file__)))
+    args = parser.parse_args()
+
+    if args.outbox_check:
+        return outbox_check(args)
+    if not args.host:
+        parser.error('host is required unless --outbox-check is given')
+    try:
+        args.schedule = parse_schedule(args.schedule)
+    except ValueError as e:
+        parser.error(str(e))
+    name, port = split_host(args.host)
+
+    print('[FAULT] broker on %s:%d - set the thermostat MQTT server to %s, port %d' % (
+        args.bind, args.port, local_address(name), args.port))
+    broker, samples, nudges, phases = asyncio.run(run_faults(name, port, args))
+    if not any(s['ok'] for s in samples):
+        print('No /api/state?live=1 responses from %s' % args.host)
+        return 1
+    return 0 if report(broker, samples, nudges, phases, args) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
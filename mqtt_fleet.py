@@ -0,0 +1,1120 @@
+#!/usr/bin/env python3
+"""
+Emulate a fleet of thermostats on a real MQTT broker and measure the load it
+puts on the broker and on Home Assistant.
+
+Every simulated device is an asyncio MQTT 3.1.1 client that follows the
+firmware's MQTT path (src/Main-Thermostat.cpp):
+  - connects as its hostname, subscribes to the eight <hostname>/.../set
+    topics and on every new session publishes the discovery set of
+    publishHomeAssistantDiscovery() (climate, availability, schedule switch,
+    and per day a sensor, an enabled switch and for day and night
+    heat/cool/auto numbers, a time text and an active switch; motion,
+    pressure and shower entities on the devices that have them), then a full
+    sendMQTTData()
+  - runs sendMQTTData() every mqtt_data job interval: changed temperature,
+    humidity, pressure, setpoint, mode, fan mode, action, HVAC state, fan
+    relay and motion, plus schedule_enabled, active_period, the seven
+    schedule/<day> documents and availability every time. The room
+    temperature drifts so current_* changes
+  - handles mode/set, fan_mode/set, target_temperature/set (setpoint of the
+    current mode; starts a schedule override), schedule_enabled/set and
+    schedule/set (Monday=0 day, day/night period, hour/minute/heat/cool/auto/
+    active/enabled) up to LOOP_MAX_IDLE_MS after arrival, as loop() does with
+    the inbox, and answers with the immediate sendMQTTData() feedback
+  - on a lost connection retries at once, then with the firmware's backoff
+    (2 s doubling to 60 s, +/-25% jitter). Publishes made while offline go
+    into an outbox with MqttOutbox's rules (mqtt_faults.OutboxModel) and are
+    flushed ahead of the next session's republish
+The backoff, socket timeout, loop idle and mqtt_data interval are read from
+the firmware source when it is present.
+
+An observer connection plays Home Assistant: it subscribes to
+homeassistant/# and each device's topics and sends the commands. For each
+fleet size the run is:
+  boot      devices connect, spread over --ramp seconds; time from the first
+            CONNACK until the observer has every device's discovery and state
+  steady    --duration seconds: messages/s the devices publish and the
+            observer receives (mean and busiest second), while
+            --command-rate commands/s go to random devices. Latency is from
+            the observer's publish until the changed state arrives back
+            (mode, target_temperature or schedule/<day>); no answer within
+            --command-timeout counts as lost
+  restart   the broker restarts; the discovery storm lasts from the broker
+            accepting connections again until the observer has every
+            device's full republish (reconnect spread, messages, peak rate)
+The broker is a private mosquitto on 127.0.0.1:--port, started for each
+fleet size and restarted by stopping and starting it, or an existing broker
+with --broker, restarted by --restart-cmd (no restart phase without it).
+Retained discovery left on an existing broker is cleared at the end unless
+--keep-retained. The harness's own event-loop lag is reported: when it
+grows, the numbers measure this process rather than the broker.
+
+Usage:
+  python3 mqtt_fleet.py                                   # 10, 100 and 1000 devices, private mosquitto
+  python3 mqtt_fleet.py --devices 50 --duration 120 --command-rate 10
+  python3 mqtt_fleet.py --broker 192.168.1.20 --username ha --password secret \\
+      --restart-cmd "ssh ha-host systemctl restart mosquitto"
+  python3 mqtt_fleet.py --devices 10,100 --json fleet.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+
+from log_hotpath import JOB_RE, read_constants, resolve_ms
+from mqtt_faults import (CONNACK, CONNECT, PINGREQ, PUBLISH, SUBSCRIBE, OutboxModel, encode_packet, read_packet,
+                         read_string)
+
+try:
+    import resource
+except ImportError:         # Windows
+    resource = None
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_SIZES = '10,100,1000'
+DISCOVERY_PREFIX = 'homeassistant'
+MODEL = 'ESP32-S3 Simple Thermostat'       # PROJECT_NAME_SHORT
+KEEPALIVE_S = 15                            # PubSubClient MQTT_KEEPALIVE
+SUBSCRIBE_BATCH = 100                       # Topics per observer SUBSCRIBE packet
+RECONNECT_POLL = 0.05                       # Observer and broker-up polling (seconds)
+
+# Firmware defaults, replaced by the values in src/Main-Thermostat.cpp when it is found
+TIMING = {
+    'MQTT_BACKOFF_MIN_MS': 2000,
+    'MQTT_BACKOFF_MAX_MS': 60000,
+    'MQTT_SOCKET_TIMEOUT_S': 5,
+    'LOOP_MAX_IDLE_MS': 20,
+    'mqtt_data': 10000,                     # loopJobs "mqtt_data" interval
+}
+
+DAY_NAMES = ('Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday')   # weekSchedule order
+PERIODS = (('day', 'Day', 'day_period'), ('night', 'Night', 'night_period'))
+TEMP_KEYS = ('heat', 'cool', 'auto')
+MODES = ('off', 'heat', 'cool', 'auto')
+FAN_MODES = ('auto', 'on', 'cycle')
+SET_TOPICS = ('target_temperature/set', 'mode/set', 'fan_mode/set', 'shower_mode/set', 'schedule_enabled/set',
+              'schedule_override/set', 'schedule/set', 'log_level/set')
+FEATURES = {'ld2410': 0.5, 'bme280': 0.3, 'shower': 0.3}       # Share of the fleet with each (--mix)
+COMMANDS = ('mode', 'target_temperature', 'schedule')
+
+
+# ============================================================================
+# MQTT CLIENT
+# ============================================================================
+
+def mqtt_string(text):
+    data = text.encode('utf-8')
+    return struct.pack('>H', len(data)) + data
+
+
+class MqttClient:
+    """Just enough MQTT 3.1.1 for PubSubClient's traffic: QoS 0 publish/subscribe and keepalive."""
+
+    def __init__(self, client_id, on_message):
+        self.client_id = client_id
+        self.on_message = on_message
+        self.reader = None
+        self.writer = None
+        self.next_id = 1
+
+    async def connect(self, host, port, timeout, username=None, password=None):
+        try:
+            self.reader, self.writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+            flags = 0x02 | (0x80 if username else 0) | (0x40 if username and password else 0)
+            body = mqtt_string('MQTT') + bytes([4, flags]) + struct.pack('>H', KEEPALIVE_S) + mqtt_string(self.client_id)
+            if username:
+                body += mqtt_string(username) + (mqtt_string(password) if password else b'')
+            self.writer.write(encode_packet(CONNECT << 4, body))
+            ptype, _, reply = await asyncio.wait_for(read_packet(self.reader), timeout)
+            if ptype == CONNACK and len(reply) == 2 and reply[1] == 0:
+                return True
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+            pass
+        self.close()
+        return False
+
+    def publish(self, topic, payload, retained=False):
+        """Queue a QoS 0 publish; returns its size on the wire."""
+        body = mqtt_string(topic) + payload.encode('utf-8')
+        packet = encode_packet((PUBLISH << 4) | (1 if retained else 0), body)
+        self.writer.write(packet)
+        return len(packet)
+
+    def subscribe(self, topics):
+        for start in range(0, len(topics), SUBSCRIBE_BATCH):
+            body = struct.pack('>H', self.next_id) + b''.join(mqtt_string(t) + b'\x00'
+                                                              for t in topics[start:start + SUBSCRIBE_BATCH])
+            self.next_id = self.next_id % 65535 + 1
+            self.writer.write(encode_packet((SUBSCRIBE << 4) | 0x02, body))
+
+    async def drain(self):
+        try:
+            await self.writer.drain()
+        except (OSError, AttributeError):
+            pass
+
+    async def run(self):
+        """Read until the connection drops, sending PINGREQ every keepalive."""
+        pinger = asyncio.ensure_future(self.ping())
+        try:
+            while True:
+                ptype, flags, body = await read_packet(self.reader)
+                if ptype == PUBLISH:
+                    topic, pos = read_string(body, 0)
+                    if (flags >> 1) & 0x03:
+                        pos += 2
+                    self.on_message(topic, body[pos:].decode('utf-8', 'replace'), bool(flags & 0x01))
+        except (asyncio.IncompleteReadError, OSError):
+            pass
+        finally:
+            pinger.cancel()
+            self.close()
+
+    async def ping(self):
+        while True:
+            await asyncio.sleep(KEEPALIVE_S)
+            self.writer.write(encode_packet(PINGREQ << 4))
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.transport.abort()
+            self.writer = None
+
+    @property
+    def connected(self):
+        return self.writer is not None
+
+
+# ============================================================================
+# DEVICE
+# ============================================================================
+
+def default_week():
+    """weekSchedule[] defaults, Sunday first."""
+    return [{'enabled': True,
+             'day': {'hour': 6, 'minute': 0, 'heat': 72.0, 'cool': 76.0, 'auto': 74.0, 'active': True},
+             'night': {'hour': 22, 'minute': 0, 'heat': 68.0, 'cool': 78.0, 'auto': 73.0, 'active': True}}
+            for _ in DAY_NAMES]
+
+
+def dumps(doc):
+    return json.dumps(doc, separators=(',', ':'), ensure_ascii=False)
+
+
+class Device:
+    def __init__(self, fleet, hostname, features, rng):
+        self.fleet = fleet
+        self.hostname = hostname
+        self.features = features
+        self.rng = rng
+        self.mode = rng.choice(MODES[1:])
+        self.fan_mode = 'auto'
+        self.setpoints = {'heat': 72.0, 'cool': 76.0, 'auto': 74.0}
+        self.temp = round(rng.uniform(66.0, 76.0), 1)
+        self.humidity = round(rng.uniform(30.0, 55.0), 1)
+        self.pressure = rng.uniform(1005.0, 1025.0)
+        self.motion = False
+        self.shower = False
+        self.week = default_week()
+        self.schedule_enabled = rng.random() < 0.5
+        self.override = False
+        self.cache = {}             # mqttLast* - cleared by resetMQTTDataCache()
+        self.statics = {}           # Function statics in sendMQTTData() - never cleared
+        self.outbox = OutboxModel()
+        self.conn = None
+        self.device_id = '%012x' % rng.getrandbits(48)
+        self.connacks = []
+        self.attempts = 0
+        self.session_at = None      # Last session start
+        self.pending = set()        # Topics of that session's republish not yet seen by the observer
+        self.done_at = None         # When the observer saw the last of them
+        self.retained = set()       # Retained topics published (cleared on external brokers)
+
+    # ---------------------------------------------------------------- publish
+    def publish(self, topic, payload, retained=False):
+        if retained:
+            self.retained.add(topic)
+        if self.conn is not None and self.conn.connected:
+            size = self.conn.publish(topic, payload, retained)
+            self.fleet.sent += 1
+            self.fleet.sent_bytes += size
+        else:
+            self.outbox.put(topic, payload, retained)
+
+    def device_block(self, manufacturer='TDC', sw_version=True):
+        block = {'identifiers': [self.hostname], 'name': self.hostname, 'model': MODEL, 'manufacturer': manufacturer}
+        if sw_version:
+            block['sw_version'] = self.fleet.sw_version
+        return block
+
+    def discovery_messages(self):
+        """publishHomeAssistantDiscovery()"""
+        h, prefix = self.hostname, self.fleet.discovery_prefix
+        messages = []
+
+        def add(topic, doc, retained=True):
+            messages.append((topic, dumps(doc) if isinstance(doc, dict) else doc, retained))
+
+        add('%s/climate/%s/config' % (prefix, h), {
+            'name': '', 'unique_id': self.device_id,
+            'current_temperature_topic': h + '/current_temperature', 'current_humidity_topic': h + '/current_humidity',
+            'temperature_command_topic': h + '/target_temperature/set', 'temperature_state_topic': h + '/target_temperature',
+            'mode_command_topic': h + '/mode/set', 'mode_state_topic': h + '/mode',
+            'fan_mode_command_topic': h + '/fan_mode/set', 'fan_mode_state_topic': h + '/fan_mode',
+            'action_topic': h + '/action', 'availability_topic': h + '/availability',
+            'min_temp': 50, 'max_temp': 90, 'temp_step': 0.5, 'precision': 0.1,
+            'modes': list(MODES), 'fan_modes': list(FAN_MODES), 'device': self.device_block()})
+        add(h + '/availability', 'online')
+        if 'ld2410' in self.features:
+            add('%s/binary_sensor/%s_motion/config' % (prefix, h), {
+                'name': h + ' Motion', 'device_class': 'motion', 'state_topic': h + '/motion_detected',
+                'payload_on': 'true', 'payload_off': 'false', 'unique_id': h + '_motion',
+                'device': self.device_block('Custom', False)})
+        if 'bme280' in self.features:
+            add('%s/sensor/%s_pressure/config' % (prefix, h), {
+                'name': 'Barometric Pressure', 'device_class': 'pressure', 'state_topic': h + '/barometric_pressure',
+                'unit_of_measurement': 'inHg', 'unique_id': h + '_pressure', 'state_class': 'measurement',
+                'device': self.device_block()})
+        shower_topic = '%s/switch/%s_shower_mode/config' % (prefix, h)
+        if 'shower' in self.features:
+            add(shower_topic, {
+                'name': 'Shower Mode', 'state_topic': h + '/shower_mode', 'command_topic': h + '/shower_mode/set',
+                'payload_on': 'ON', 'payload_off': 'OFF', 'state_on': 'ON', 'state_off': 'OFF',
+                'unique_id': h + '_shower_mode', 'icon': 'mdi:shower', 'device': self.device_block()})
+        else:
+            add(shower_topic, '')
+        add('%s/switch/%s_schedule_enabled/config' % (prefix, h), {
+            'name': 'Schedule Enabled', 'state_topic': h + '/schedule_enabled',
+            'command_topic': h + '/schedule_enabled/set', 'payload_on': 'on', 'payload_off': 'off',
+            'state_on': 'on', 'state_off': 'off', 'unique_id': h + '_schedule_enabled', 'icon': 'mdi:calendar-clock',
+            'device': self.device_block()})
+
+        for day, name in enumerate(DAY_NAMES):
+            lower = name.lower()
+            state = '%s/schedule/%s' % (h, lower)
+            mqtt_day = (day + 6) % 7
+            base = '%s_schedule_%s' % (h, lower)
+            add('%s/sensor/%s/config' % (prefix, base), {
+                'name': 'Schedule ' + name, 'state_topic': state, 'value_template': '{{ value_json.day_name }}',
+                'json_attributes_topic': state, 'unique_id': base, 'icon': 'mdi:calendar-clock',
+                'device': self.device_block()})
+            add('%s/switch/%s_enabled/config' % (prefix, base), {
+                'name': 'Schedule %s Enabled' % name, 'state_topic': state,
+                'value_template': "{{ 'ON' if value_json.day_enabled else 'OFF' }}", 'command_topic': h + '/schedule/set',
+                'command_template': '{"day":%d,"enabled": {{ \'true\' if value == \'ON\' else \'false\' }} }' % mqtt_day,
+                'payload_on': 'ON', 'payload_off': 'OFF', 'unique_id': base + '_enabled', 'icon': 'mdi:toggle-switch',
+                'device': self.device_block()})
+            for period, period_name, key in PERIODS:
+                for temp in TEMP_KEYS:
+                    add('%s/number/%s_%s_%s/config' % (prefix, base, period, temp), {
+                        'name': 'Schedule %s %s %s' % (name, period_name, temp.capitalize()), 'state_topic': state,
+                        'value_template': '{{ value_json.%s.%s }}' % (key, temp), 'command_topic': h + '/schedule/set',
+                        'command_template': '{"day":%d,"period":"%s","%s":{{ value }}}' % (mqtt_day, period, temp),
+                        'min': 45, 'max': 90, 'step': 0.5, 'unit_of_measurement': '°F',
+                        'unique_id': '%s_%s_%s' % (base, period, temp), 'mode': 'box', 'device': self.device_block()})
+                add('%s/text/%s_%s_time/config' % (prefix, base, period), {
+                    'name': 'Schedule %s %s Time' % (name, period_name), 'state_topic': state,
+                    'value_template': '{{ value_json.%s.time }}' % key, 'command_topic': h + '/schedule/set',
+                    'command_template': ('{"day":%d,"period":"%s","hour": {{ value.split(\':\')[0] | int }},'
+                                         '"minute": {{ value.split(\':\')[1] | int }} }') % (mqtt_day, period),
+                    'pattern': '^([01]\\d|2[0-3]):[0-5]\\d$', 'unique_id': '%s_%s_time' % (base, period),
+                    'icon': 'mdi:clock-time-four-outline', 'device': self.device_block()})
+                add('%s/switch/%s_%s_active/config' % (prefix, base, period), {
+                    'name': 'Schedule %s %s Active' % (name, period_name), 'state_topic': state,
+                    'value_template': "{{ 'ON' if value_json.%s.active else 'OFF' }}" % key,
+                    'command_topic': h + '/schedule/set',
+                    'command_template': ('{"day":%d,"period":"%s","active": {{ \'true\' if value == \'ON\' '
+                                         'else \'false\' }} }') % (mqtt_day, period),
+                    'payload_on': 'ON', 'payload_off': 'OFF', 'unique_id': '%s_%s_active' % (base, period),
+                    'icon': 'mdi:power', 'device': self.device_block()})
+        return messages
+
+    def action(self):
+        if self.mode == 'off':
+            return 'off'
+        target = self.setpoints[self.mode]
+        if self.mode in ('heat', 'auto') and self.temp < target - 0.5:
+            return 'heating'
+        if self.mode in ('cool', 'auto') and self.temp > target + 0.5:
+            return 'cooling'
+        return 'idle'
+
+    def active_period(self):
+        if not self.schedule_enabled:
+            return 'manual'
+        hour = time.localtime().tm_hour
+        today = self.week[(time.localtime().tm_wday + 1) % 7]
+        return 'day' if today['day']['hour'] <= hour < today['night']['hour'] else 'night'
+
+    def schedule_doc(self, day, today):
+        schedule = self.week[day]
+        doc = {'day_index': (day + 6) % 7, 'day_name': DAY_NAMES[day], 'is_today': day == today,
+               'schedule_enabled': self.schedule_enabled, 'day_enabled': schedule['enabled']}
+        for period, _, key in PERIODS:
+            p = schedule[period]
+            doc[key] = {'time': '%d:%02d' % (p['hour'], p['minute']), 'heat': p['heat'], 'cool': p['cool'],
+                        'auto': p['auto'], 'active': p['active']}
+        return dumps(doc)
+
+    def changed(self, store, key, value):
+        if store.get(key) == value:
+            return False
+        store[key] = value
+        return True
+
+    def data_messages(self):
+        """sendMQTTData()"""
+        h, out = self.hostname, []
+        if self.changed(self.cache, 'temp', self.temp):
+            out.append((h + '/current_temperature', '%.1f' % self.temp, True))
+        if self.changed(self.cache, 'humidity', self.humidity):
+            out.append((h + '/current_humidity', '%.1f' % self.humidity, True))
+        if 'bme280' in self.features and self.changed(self.statics, 'pressure', self.pressure):
+            out.append((h + '/barometric_pressure', '%.2f' % (self.pressure / 33.8639), True))
+        if self.mode in self.setpoints and self.changed(self.cache, 'set_' + self.mode, self.setpoints[self.mode]):
+            out.append((h + '/target_temperature', '%.1f' % self.setpoints[self.mode], True))
+        if self.changed(self.cache, 'mode', self.mode):
+            out.append((h + '/mode', self.mode, True))
+        if self.changed(self.cache, 'fan_mode', self.fan_mode):
+            out.append((h + '/fan_mode', self.fan_mode, True))
+        if self.changed(self.cache, 'action', self.action()):
+            out.append((h + '/action', self.cache['action'], True))
+        state = {'heating': 'heat1', 'cooling': 'cool1'}.get(self.cache['action'], 'idle')
+        if self.changed(self.cache, 'hvac_state', state):
+            out.append((h + '/hvac_state', state, True))
+        fan = state != 'idle' or (self.mode != 'off' and self.fan_mode == 'on')
+        if self.changed(self.cache, 'fan_state', fan):
+            out.append((h + '/fan_state', 'on' if fan else 'off', True))
+        if 'ld2410' in self.features and self.statics.get('motion', False) != self.motion:
+            self.statics['motion'] = self.motion
+            out.append((h + '/motion_detected', 'true' if self.motion else 'false', False))
+        if 'shower' in self.features and self.statics.get('shower', False) != self.shower:
+            self.statics['shower'] = self.shower
+            out.append((h + '/shower_mode', 'ON' if self.shower else 'OFF', True))
+        out.append((h + '/schedule_enabled', 'on' if self.schedule_enabled else 'off', True))
+        out.append((h + '/active_period', self.active_period(), False))
+        if self.override:
+            out.append((h + '/schedule_override', 'active', False))
+        today = time.localtime().tm_wday     # Monday=0, compared with the Sunday-first index as the firmware does
+        for day, name in enumerate(DAY_NAMES):
+            out.append(('%s/schedule/%s' % (h, name.lower()), self.schedule_doc(day, today), False))
+        out.append((h + '/availability', 'online', True))
+        return out
+
+    def send_data(self):
+        for message in self.data_messages():
+            self.publish(*message)
+
+    def session_start(self):
+        """Outbox flush, then discovery and a full republish (mqttSessionStarted in loop())."""
+        while True:
+            message = self.outbox.take()
+            if message is None:
+                break
+            topic, _, payload, retained = message
+            self.publish(topic, payload, retained)
+        self.cache.clear()
+        messages = self.discovery_messages() + self.data_messages()
+        self.session_at = time.monotonic()
+        self.pending = {topic for topic, _, _ in messages}
+        self.done_at = None
+        for message in messages:
+            self.publish(*message)
+
+    # ---------------------------------------------------------------- inbound
+    def on_message(self, topic, payload, retained):
+        # mqttCallback() queues the message; loop() handles it within one idle period
+        self.fleet.loop.call_later(self.rng.uniform(0, self.fleet.timing['LOOP_MAX_IDLE_MS'] / 1000.0),
+                                   self.handle, topic, payload)
+
+    def handle(self, topic, payload):
+        """handleMQTTMessage()"""
+        command = topic[len(self.hostname) + 1:]
+        settings_changed = False
+        if command == 'mode/set':
+            if payload != self.mode:
+                self.mode = payload
+                settings_changed = True
+        elif command == 'fan_mode/set':
+            if payload != self.fan_mode:
+                self.fan_mode = payload
+                settings_changed = True
+        elif command == 'target_temperature/set':
+            try:
+                value = float(payload)
+            except ValueError:
+                value = 0.0         # String::toFloat()
+            if self.mode in self.setpoints and value != self.setpoints[self.mode]:
+                self.setpoints[self.mode] = value
+                settings_changed = True
+                if self.schedule_enabled and not self.override:
+                    self.override = True
+        elif command == 'schedule_enabled/set':
+            enabled = payload in ('ON', 'on', '1')
+            if enabled != self.schedule_enabled:
+                self.schedule_enabled = enabled
+                if not enabled:
+                    self.override = False
+                self.send_data()
+        elif command == 'schedule/set':
+            if self.apply_schedule(payload):
+                self.send_data()
+        else:
+            self.fleet.ignored += 1
+        if settings_changed:
+            self.send_data()    # mqttFeedbackNeeded
+
+    def apply_schedule(self, payload):
+        try:
+            doc = json.loads(payload)
+        except ValueError:
+            return False
+        mqtt_day, period = doc.get('day', -1), doc.get('period', '')
+        if not isinstance(mqtt_day, int) or not 0 <= mqtt_day < 7 or period not in ('day', 'night'):
+            return False
+        schedule = self.week[(mqtt_day + 1) % 7]
+        target, changed = schedule[period], False
+        checks = {'hour': lambda v: 0 <= v <= 23, 'minute': lambda v: 0 <= v <= 59}
+        for key in ('hour', 'minute', 'heat', 'cool', 'auto', 'active'):
+            if key in doc and checks.get(key, lambda v: True)(doc[key]) and doc[key] != target[key]:
+                target[key] = doc[key]
+                changed = True
+        if 'enabled' in doc and doc['enabled'] != schedule['enabled']:
+            schedule['enabled'] = doc['enabled']
+            changed = True
+        return changed
+
+    # ---------------------------------------------------------------- tasks
+    def drift(self):
+        if self.rng.random() < 0.6:
+            self.temp = round(self.temp + self.rng.choice((-0.2, -0.1, 0.1, 0.2)), 1)
+        if self.rng.random() < 0.4:
+            self.humidity = round(min(90.0, max(10.0, self.humidity + self.rng.choice((-0.5, 0.5)))), 1)
+        self.pressure += self.rng.uniform(-0.05, 0.05)
+        if self.rng.random() < 0.2:
+            self.motion = not self.motion
+
+    async def data_job(self, stop):
+        interval = self.fleet.timing['mqtt_data'] / 1000.0
+        await wait(stop, self.rng.uniform(0, interval))
+        while not stop.is_set():
+            self.drift()
+            self.send_data()
+            if self.conn is not None:
+                await self.conn.drain()
+            await wait(stop, interval)
+
+    async def run(self, stop):
+        """mqttTaskFunction(): connect, back off, run the session."""
+        fleet, timing = self.fleet, self.fleet.timing
+        backoff, retry = timing['MQTT_BACKOFF_MIN_MS'], 0
+        job = asyncio.ensure_future(self.data_job(stop))
+        while not stop.is_set():
+            if retry:
+                await wait(stop, retry / 1000.0)
+                if stop.is_set():
+                    break
+            self.attempts += 1
+            conn = MqttClient(self.hostname, self.on_message)
+            if not await conn.connect(fleet.host, fleet.port, timing['MQTT_SOCKET_TIMEOUT_S'],
+                                      fleet.username, fleet.password):
+                retry = backoff - backoff / 4 + self.rng.uniform(0, backoff / 2)
+                backoff = min(backoff * 2, timing['MQTT_BACKOFF_MAX_MS'])
+                continue
+            backoff, retry = timing['MQTT_BACKOFF_MIN_MS'], 0
+            self.connacks.append(time.monotonic())
+            self.conn = conn
+            conn.subscribe(['%s/%s' % (self.hostname, t) for t in SET_TOPICS])
+            self.session_start()
+            await conn.drain()
+            await conn.run()
+            self.conn = None
+        job.cancel()
+        if self.conn is not None:
+            self.conn.close()
+
+
+async def wait(stop, seconds):
+    try:
+        await asyncio.wait_for(stop.wait(), max(0.0, seconds))
+    except asyncio.TimeoutError:
+        pass
+
+
+# ============================================================================
+# OBSERVER (Home Assistant)
+# ============================================================================
+
+class Command:
+    def __init__(self, device, kind, topic, payload, expect_topic, matches):
+        self.device = device
+        self.kind = kind
+        self.topic = topic
+        self.payload = payload
+        self.expect_topic = expect_topic
+        self.matches = matches
+        self.sent_at = None
+
+
+class Observer:
+    def __init__(self, fleet):
+        self.fleet = fleet
+        self.conn = None
+        self.received = 0
+        self.received_bytes = 0
+        self.retained = 0
+        self.subscribed_at = None
+        self.commands = {}          # hostname -> Command in flight
+        self.latencies = {kind: [] for kind in COMMANDS}
+        self.lost = {kind: 0 for kind in COMMANDS}
+
+    def host_of(self, topic):
+        parts = topic.split('/')
+        if parts[0] == self.fleet.discovery_prefix and len(parts) == 4:
+            return parts[2].split('_')[0]
+        return parts[0]
+
+    def on_message(self, topic, payload, retained):
+        if topic.endswith('/set'):
+            return                  # Our own commands
+        now = time.monotonic()
+        self.received += 1
+        self.received_bytes += len(topic) + len(payload) + 4
+        device = self.fleet.devices.get(self.host_of(topic))
+        if device is None:
+            return
+        if retained:
+            # Stored copy sent on (re)subscribing: it belongs to the burst only when the device's
+            # session started before the observer was back, otherwise it is left over from an earlier one
+            self.retained += 1
+            if device.session_at is None or device.session_at > self.subscribed_at:
+                return
+        if topic in device.pending:
+            device.pending.discard(topic)
+            if not device.pending:
+                device.done_at = now
+        command = self.commands.get(device.hostname)
+        if command and topic == command.expect_topic and command.matches(payload):
+            del self.commands[device.hostname]
+            self.latencies[command.kind].append((now - command.sent_at) * 1000.0)
+
+    async def run(self, stop):
+        fleet = self.fleet
+        while not stop.is_set():
+            conn = MqttClient('mqtt-fleet-observer-%d' % os.getpid(), self.on_message)
+            if not await conn.connect(fleet.host, fleet.port, 2.0, fleet.username, fleet.password):
+                await wait(stop, RECONNECT_POLL)
+                continue
+            topics = ['%s/#' % fleet.discovery_prefix] + ['%s/#' % h for h in fleet.devices]
+            self.subscribed_at = time.monotonic()
+            conn.subscribe(topics)
+            self.conn = conn
+            await conn.run()
+            self.conn = None
+
+    def build_command(self, device, kind):
+        rng, h = self.fleet.rng, device.hostname
+        if kind == 'mode':
+            value = rng.choice([m for m in MODES[1:] if m != device.mode])
+            return Command(device, kind, h + '/mode/set', value, h + '/mode', lambda p: p == value)
+        if kind == 'target_temperature':
+            if device.mode not in device.setpoints:
+                return None
+            current = device.setpoints[device.mode]
+            value = rng.choice([v / 2.0 for v in range(120, 161) if v / 2.0 != current])
+            return Command(device, kind, h + '/target_temperature/set', '%.1f' % value, h + '/target_temperature',
+                           lambda p: abs(float(p) - value) < 0.05)
+        mqtt_day, (period, _, key) = rng.randrange(7), rng.choice(PERIODS)
+        day = (mqtt_day + 1) % 7
+        current = device.week[day][period]['heat']
+        value = rng.choice([v / 2.0 for v in range(120, 161) if v / 2.0 != current])
+
+        def matches(payload):
+            try:
+                return abs(json.loads(payload)[key]['heat'] - value) < 0.05
+            except (ValueError, KeyError, TypeError):
+                return False
+        payload = json.dumps({'day': mqtt_day, 'period': period, 'heat': value})
+        return Command(device, kind, h + '/schedule/set', payload, '%s/schedule/%s' % (h, DAY_NAMES[day].lower()), matches)
+
+    async def send_commands(self, rate, timeout, stop):
+        rng, sent, kinds = self.fleet.rng, 0, list(COMMANDS)
+        while not stop.is_set():
+            now = time.monotonic()
+            for hostname, command in list(self.commands.items()):
+                if now - command.sent_at > timeout:
+                    del self.commands[hostname]
+                    self.lost[command.kind] += 1
+            idle = [d for d in self.fleet.devices.values() if d.hostname not in self.commands and d.conn is not None]
+            if self.conn is not None and idle:
+                command = self.build_command(rng.choice(idle), kinds[sent % len(kinds)])
+                if command is not None:
+                    command.sent_at = time.monotonic()
+                    self.commands[command.device.hostname] = command
+                    self.conn.publish(command.topic, command.payload)
+                    sent += 1
+            await wait(stop, 1.0 / rate)
+        await asyncio.sleep(min(timeout, 2.0))      # Answers still on the way
+        for command in self.commands.values():
+            self.lost[command.kind] += 1
+        self.commands.clear()
+        return sent
+
+    async def clear_retained(self, topics):
+        if self.conn is None:
+            return
+        for topic in sorted(topics):
+            self.conn.publish(topic, '', True)
+        await self.conn.drain()
+
+
+# ============================================================================
+# BROKER
+# ============================================================================
+
+async def broker_accepting(host, port, timeout):
+    """Seconds until a TCP connect succeeds, None on timeout."""
+    start = time.monotonic()
+    while time.monotonic() - start < timeout:
+        try:
+            _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), 1.0)
+            writer.transport.abort()
+            return time.monotonic()
+        except (OSError, asyncio.TimeoutError):
+            await asyncio.sleep(RECONNECT_POLL)
+    return None
+
+
+class Mosquitto:
+    """Private broker on 127.0.0.1 for one fleet size; restarted by stopping and starting the process."""
+    restartable = True
+    cleans_up = True            # Retained topics go with the process
+
+    def __init__(self, binary, port, work_dir):
+        self.binary = binary
+        self.port = port
+        self.conf = os.path.join(work_dir, 'mosquitto.conf')
+        self.log = os.path.join(work_dir, 'mosquitto.log')
+        self.proc = None
+        with open(self.conf, 'w') as f:
+            f.write('listener %d 127.0.0.1\nallow_anonymous true\npersistence false\n'
+                    'log_dest file %s\nlog_type error\nlog_type warning\n' % (port, self.log))
+
+    def describe(self):
+        return 'private mosquitto on 127.0.0.1:%d' % self.port
+
+    async def start(self):
+        self.proc = await asyncio.create_subprocess_exec(self.binary, '-c', self.conf, stdin=subprocess.DEVNULL,
+                                                         stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        up = await broker_accepting('127.0.0.1', self.port, 10.0)
+        if up is None:
+            raise RuntimeError('%s did not start on port %d (see %s)' % (self.binary, self.port, self.log))
+        return up
+
+    async def stop(self):
+        if self.proc and self.proc.returncode is None:
+            self.proc.terminate()
+            await self.proc.wait()
+        self.proc = None
+
+    async def restart(self):
+        await self.stop()
+        return await self.start()
+
+
+class ExternalBroker:
+    cleans_up = False
+
+    def __init__(self, host, port, restart_cmd):
+        self.host = host
+        self.port = port
+        self.restart_cmd = restart_cmd
+        self.restartable = bool(restart_cmd)
+
+    def describe(self):
+        return 'broker %s:%d' % (self.host, self.port)
+
+    async def start(self):
+        up = await broker_accepting(self.host, self.port, 10.0)
+        if up is None:
+            raise RuntimeError('no broker accepting connections on %s:%d' % (self.host, self.port))
+        return up
+
+    async def stop(self):
+        pass
+
+    async def restart(self):
+        proc = await asyncio.create_subprocess_shell(self.restart_cmd)
+        if await proc.wait() != 0:
+            raise RuntimeError('restart command failed: %s' % self.restart_cmd)
+        return await self.start()
+
+
+# ============================================================================
+# RUN
+# ============================================================================
+
+class Fleet:
+    def __init__(self, args, count, timing, seed):
+        self.host, self.port = args.host, args.port
+        self.username, self.password = args.username, args.password
+        self.discovery_prefix = DISCOVERY_PREFIX
+        self.timing = timing
+        self.sw_version = args.sw_version
+        self.rng = random.Random(seed)
+        self.loop = asyncio.get_running_loop()
+        self.sent = 0
+        self.sent_bytes = 0
+        self.ignored = 0
+        self.devices = {}
+        for i in range(1, count + 1):
+            rng = random.Random('%d-%d' % (seed, i))
+            hostname = '%s-%04d' % (args.prefix, i)
+            features = {name for name, share in args.mix.items() if rng.random() < share}
+            self.devices[hostname] = Device(self, hostname, features, rng)
+
+
+class Ticker:
+    """Per-second totals of the fleet and observer counters, and event-loop lag."""
+
+    def __init__(self, fleet, observer):
+        self.fleet = fleet
+        self.observer = observer
+        self.samples = []       # (time, sent, sent_bytes, received, received_bytes)
+        self.lags = []          # (time, ms)
+
+    async def run(self, stop):
+        while not stop.is_set():
+            due = time.monotonic() + 1.0
+            await wait(stop, 1.0)
+            now = time.monotonic()
+            self.lags.append((now, max(0.0, (now - due) * 1000.0)))
+            self.sample(now)
+
+    def sample(self, now=None):
+        f, o = self.fleet, self.observer
+        self.samples.append((now or time.monotonic(), f.sent, f.sent_bytes, o.received, o.received_bytes))
+
+    def window(self, start, end):
+        """Counter deltas and per-second peaks between two times."""
+        inside = sorted(s for s in self.samples if start <= s[0] <= end)
+        if len(inside) < 2:
+            return None
+        first, last = inside[0], inside[-1]
+        seconds = max(last[0] - first[0], 1e-6)
+        # Phase-boundary samples make short steps; rates over those would be noise
+        steps = [(a, b) for a, b in zip(inside, inside[1:]) if b[0] - a[0] >= 0.5] or [(first, last)]
+        peak = lambda i: max((b[i] - a[i]) / max(b[0] - a[0], 1e-6) for a, b in steps)
+        return {'seconds': seconds,
+                'sent': last[1] - first[1], 'sent_bytes': last[2] - first[2],
+                'received': last[3] - first[3], 'received_bytes': last[4] - first[4],
+                'sent_rate': (last[1] - first[1]) / seconds, 'sent_peak': peak(1),
+                'received_rate': (last[3] - first[3]) / seconds, 'received_peak': peak(3),
+                'sent_kbps': (last[2] - first[2]) / seconds / 1024.0}
+
+    def lag(self, start, end):
+        values = sorted(ms for t, ms in self.lags if start <= t <= end)
+        return {'max': values[-1], 'p95': percentile(values, 0.95)} if values else None
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+
+async def wait_burst(devices, since, timeout):
+    """Time the observer had every device's republish from a session started after `since`, None on timeout."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if all(d.session_at is not None and d.session_at >= since and d.done_at is not None for d in devices):
+            return max(d.done_at for d in devices)
+        await asyncio.sleep(0.1)
+    return None
+
+
+async def run_size(args, count, timing, broker):
+    fleet = Fleet(args, count, timing, args.seed)
+    devices = list(fleet.devices.values())
+    observer = Observer(fleet)
+    ticker = Ticker(fleet, observer)
+    stop, fleet_stop = asyncio.Event(), asyncio.Event()
+    result = {'devices': count, 'broker': broker.describe()}
+    print('\n== %d devices (%s) ==' % (count, broker.describe()))
+
+    await broker.start()
+    tasks = [asyncio.ensure_future(observer.run(stop)), asyncio.ensure_future(ticker.run(stop))]
+    while observer.conn is None:
+        await asyncio.sleep(RECONNECT_POLL)
+    ticker.sample()
+
+    # Boot: devices power up over --ramp seconds
+    boot_start = time.monotonic()
+    ticker.sample(boot_start)
+    for i, device in enumerate(devices):
+        delay = args.ramp * i / count
+        tasks.append(asyncio.ensure_future(start_later(device, delay, fleet_stop)))
+    done = await wait_burst(devices, boot_start, args.storm_timeout)
+    ticker.sample()
+    first = min((d.connacks[0] for d in devices if d.connacks), default=None)
+    boot = ticker.window(boot_start, time.monotonic())
+    if done is None or first is None:
+        missing = sum(1 for d in devices if d.done_at is None)
+        print('boot      %d of %d devices incomplete after %.0f s' % (missing, count, args.storm_timeout))
+        result['boot'] = None
+    else:
+        result['boot'] = {'seconds': done - first, 'connect_spread': max(d.connacks[0] for d in devices) - first,
+                          'messages': boot['received'] if boot else None}
+        print('boot      %d connected over %.1f s; discovery and state complete %.2f s after the first CONNACK '
+              '(%s messages)' % (count, result['boot']['connect_spread'], result['boot']['seconds'],
+                                 result['boot']['messages']))
+
+    # Steady state with commands
+    await asyncio.sleep(1.0)
+    steady_start = time.monotonic()
+    ticker.sample(steady_start)
+    command_stop = asyncio.Event()
+    commander = asyncio.ensure_future(observer.send_commands(args.command_rate, args.command_timeout, command_stop))
+    await asyncio.sleep(args.duration)
+    steady_end = time.monotonic()
+    ticker.sample(steady_end)
+    command_stop.set()
+    sent_commands = await commander
+    steady = ticker.window(steady_start, steady_end)
+    result['steady'] = steady
+    if steady:
+        print('steady    %.0f s: devices -> broker %.1f msg/s (peak %.0f), %.1f KB/s; broker -> observer %.1f msg/s '
+              '(peak %.0f), %.1f%% delivered' % (
+                  steady['seconds'], steady['sent_rate'], steady['sent_peak'], steady['sent_kbps'],
+                  steady['received_rate'], steady['received_peak'],
+                  100.0 * steady['received'] / steady['sent'] if steady['sent'] else 100.0))
+    result['commands'] = report_commands(observer, sent_commands)
+
+    # Broker restart: discovery storm
+    if broker.restartable:
+        restart_at = time.monotonic()
+        up = await broker.restart()
+        ticker.sample(up)
+        done = await wait_burst(devices, up, args.storm_timeout)
+        storm_end = time.monotonic()
+        ticker.sample(storm_end)
+        reconnects = [min(t for t in d.connacks if t >= up) for d in devices if any(t >= up for t in d.connacks)]
+        storm = ticker.window(up, storm_end)
+        if done is None:
+            missing = sum(1 for d in devices if d.session_at is None or d.session_at < up or d.done_at is None)
+            print('restart   %d of %d devices not republished %.0f s after the broker came back' % (
+                missing, count, args.storm_timeout))
+            result['storm'] = None
+        else:
+            result['storm'] = {'down': up - restart_at, 'seconds': done - up,
+                               'reconnect_first': min(reconnects) - up, 'reconnect_last': max(reconnects) - up,
+                               'messages': storm['received'] if storm else None,
+                               'peak': storm['received_peak'] if storm else None}
+            s = result['storm']
+            print('restart   broker back after %.2f s; reconnects %.1f-%.1f s later; storm %.2f s, %s messages, '
+                  'peak %s msg/s' % (s['down'], s['reconnect_first'], s['reconnect_last'], s['seconds'],
+                                     s['messages'], '%.0f' % s['peak'] if s['peak'] is not None else '-'))
+    else:
+        result['storm'] = None
+        print('restart   skipped (--restart-cmd not given for an existing broker)')
+
+    lag = ticker.lag(boot_start, time.monotonic())
+    result['lag'] = lag
+    if lag:
+        print('harness   event loop lag max %.0f ms, p95 %.0f ms%s' % (
+            lag['max'], lag['p95'], ' - results limited by this process' if lag['p95'] > 100 else ''))
+    if fleet.ignored:
+        print('          %d commands on topics the simulator does not act on' % fleet.ignored)
+
+    fleet_stop.set()
+    for device in devices:
+        if device.conn is not None:
+            device.conn.close()
+    await asyncio.gather(*tasks[2:], return_exceptions=True)
+    if not broker.cleans_up and not args.keep_retained:
+        retained = set().union(*(d.retained for d in devices))
+        await observer.clear_retained(retained)
+        print('cleanup   cleared %d retained topics' % len(retained))
+    stop.set()
+    if observer.conn is not None:
+        observer.conn.close()
+    await asyncio.gather(*tasks[:2], return_exceptions=True)
+    await broker.stop()
+    return result
+
+
+async def start_later(device, delay, stop):
+    await wait(stop, delay)
+    if not stop.is_set():
+        await device.run(stop)
+
+
+def report_commands(observer, sent):
+    result = {'sent': sent, 'lost': sum(observer.lost.values())}
+    parts = []
+    for kind in COMMANDS:
+        values = observer.latencies[kind]
+        result[kind] = {'answered': len(values), 'lost': observer.lost[kind], 'p50': percentile(values, 0.5),
+                        'p95': percentile(values, 0.95), 'p99': percentile(values, 0.99),
+                        'max': max(values) if values else None}
+        if values:
+            parts.append('%s p50 %.0f / p95 %.0f / p99 %.0f ms' % (
+                kind, result[kind]['p50'], result[kind]['p95'], result[kind]['p99']))
+    print('commands  %d sent, %d lost; %s' % (sent, result['lost'], '; '.join(parts) or 'none answered'))
+    every = [v for kind in COMMANDS for v in observer.latencies[kind]]
+    result['p50'], result['p95'], result['p99'] = (percentile(every, q) for q in (0.5, 0.95, 0.99))
+    return result
+
+
+def print_summary(results):
+    print('\n%7s %8s %6s %7s %7s %8s %9s %7s %7s %7s %5s %8s' % (
+        'devices', 'msg/s', 'peak', 'KB/s', 'boot s', 'storm s', 'storm msg', 'cmd p50', 'p95', 'p99', 'lost',
+        'lag p95'))
+    fmt = lambda value, spec: spec % value if value is not None else '-'
+    for r in results:
+        steady, boot, storm, commands, lag = r['steady'] or {}, r['boot'] or {}, r['storm'] or {}, r['commands'], r['lag'] or {}
+        print('%7d %8s %6s %7s %7s %8s %9s %7s %7s %7s %5d %8s' % (
+            r['devices'], fmt(steady.get('sent_rate'), '%.1f'), fmt(steady.get('sent_peak'), '%.0f'),
+            fmt(steady.get('sent_kbps'), '%.1f'), fmt(boot.get('seconds'), '%.2f'), fmt(storm.get('seconds'), '%.2f'),
+            fmt(storm.get('messages'), '%d'), fmt(commands['p50'], '%.0f ms'), fmt(commands['p95'], '%.0f ms'),
+            fmt(commands['p99'], '%.0f ms'), commands['lost'], fmt(lag.get('p95'), '%.0f ms')))
+
+
+def firmware_timing(project_dir):
+    """TIMING with the values found in src/Main-Thermostat.cpp."""
+    timing = dict(TIMING)
+    path = os.path.join(project_dir, 'src', 'Main-Thermostat.cpp')
+    if not os.path.exists(path):
+        print('[FLEET] %s not found, using built-in firmware timing' % path)
+        return timing
+    constants = read_constants([path])
+    for name in ('MQTT_BACKOFF_MIN_MS', 'MQTT_BACKOFF_MAX_MS', 'MQTT_SOCKET_TIMEOUT_S', 'LOOP_MAX_IDLE_MS'):
+        if name in constants:
+            timing[name] = constants[name]
+    with open(path) as f:
+        for name, _, interval in JOB_RE.findall(f.read()):
+            if name == 'mqtt_data':
+                timing['mqtt_data'] = resolve_ms(interval, constants) or timing['mqtt_data']
+    return timing
+
+
+def raise_fd_limit(needed):
+    if resource is None:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft >= needed:
+        return
+    limit = needed if hard == resource.RLIM_INFINITY else min(needed, hard)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (limit, hard))
+    if limit < needed:
+        print('[FLEET] open file limit is %d (hard), %d needed - raise it with ulimit -n' % (hard, needed))
+
+
+def parse_mix(text):
+    mix = dict(FEATURES)
+    for item in filter(None, text.split(',')):
+        name, _, share = item.partition('=')
+        if name not in FEATURES:
+            raise ValueError('unknown feature %s (one of %s)' % (name, ', '.join(FEATURES)))
+        mix[name] = float(share)
+    return mix
+
+
+async def run_all(args, sizes, timing):
+    results = []
+    work_dir = tempfile.mkdtemp(prefix='mqtt_fleet_')
+    try:
+        for count in sizes:
+            if args.broker:
+                broker = ExternalBroker(args.host, args.port, args.restart_cmd)
+            else:
+                broker = Mosquitto(args.mosquitto, args.port, work_dir)
+            try:
+                results.append(await run_size(args, count, timing, broker))
+            finally:
+                await broker.stop()
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Simulated thermostat fleet against an MQTT broker')
+    parser.add_argument('--devices', default=DEFAULT_SIZES, help='Fleet sizes to run, comma-separated (default %s)'
+                        % DEFAULT_SIZES)
+    parser.add_argument('--broker', help='Existing broker host[:port] instead of a private mosquitto')
+    parser.add_argument('--restart-cmd', help='Shell command that restarts --broker (enables the restart phase)')
+    parser.add_argument('--username', help='MQTT username for --broker')
+    parser.add_argument('--password', help='MQTT password for --broker')
+    parser.add_argument('--keep-retained', action='store_true', help='Leave the discovery topics on --broker')
+    parser.add_argument('--mosquitto', default='mosquitto', help='Broker binary for the private broker')
+    parser.add_argument('--port', type=int, default=18830, help='Private broker port (default 18830)')
+    parser.add_argument('--duration', type=float, default=60.0, help='Steady-state seconds per size (default 60)')
+    parser.add_argument('--ramp', type=float, default=5.0, help='Spread device power-up over this many seconds')
+    parser.add_argument('--command-rate', type=float, default=5.0, help='Commands per second (default 5)')
+    parser.add_argument('--command-timeout', type=float, default=5.0, help='Seconds before a command counts as lost')
+    parser.add_argument('--storm-timeout', type=float, default=180.0,
+                        help='Give up on a boot/restart republish after this many seconds (default 180)')
+    parser.add_argument('--mix', default='', help='Feature shares, e.g. ld2410=1,bme280=0,shower=0.5 (default %s)'
+                        % ','.join('%s=%g' % item for item in FEATURES.items()))
+    parser.add_argument('--prefix', default='Sim-Thermostat', help='Hostname prefix (default Sim-Thermostat)')
+    parser.add_argument('--sw-version', default='1.4.001', help='sw_version in the discovery device block')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', help='Save the results')
+    parser.add_argument('--project-dir', default=PROJECT_DIR, help='Firmware tree to read the MQTT timing from')
+    args = parser.parse_args()
+
+    try:
+        sizes = [int(n) for n in args.devices.split(',') if n.strip()]
+        args.mix = parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+    if not sizes or min(sizes) < 1:
+        parser.error('--devices needs positive fleet sizes')
+    if not all(c.isalnum() or c == '-' for c in args.prefix):
+        parser.error('--prefix may only contain letters, digits and dashes')
+    if args.command_rate <= 0:
+        parser.error('--command-rate must be positive')
+    if args.broker:
+        args.host, _, port = args.broker.partition(':')
+        args.port = int(port) if port else 1883
+    else:
+        args.host = '127.0.0.1'
+        binary = shutil.which(args.mosquitto)
+        if binary is None:
+            print('mosquitto not found - install it or point --broker at an existing broker')
+            return 1
+        args.mosquitto = binary
+        if args.username or args.restart_cmd:
+            parser.error('--username/--restart-cmd are for --broker')
+
+    timing = firmware_timing(args.project_dir)
+    print('[FLEET] backoff %d-%d ms, mqtt_data every %d ms, loop idle <= %d ms' % (
+        timing['MQTT_BACKOFF_MIN_MS'], timing['MQTT_BACKOFF_MAX_MS'], timing['mqtt_data'], timing['LOOP_MAX_IDLE_MS']))
+    raise_fd_limit(max(sizes) * (1 if args.broker else 2) + 256)
+
+    try:
+        results = asyncio.run(run_all(args, sizes, timing))
+    except RuntimeError as e:
+        print('Error: %s' % e)
+        return 1
+    print_summary(results)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    failed = any(r['boot'] is None or (r['storm'] is None and (not args.broker or args.restart_cmd)) for r in results)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Push firmware to a fleet of thermostats over the /update OTA endpoint.
+
+For every device:
+  1. GET /version to learn the module variant (N8/N16/N32) and OTA slot size
+  2. Pick firmware/<variant>/build_<latest>/firmware.bin (or --store / --image-dir / --image)
+  3. Stream it as multipart/form-data with X-Firmware-SHA256 and X-Firmware-Size
+     headers; the device hashes the image while flashing and aborts before
+     switching partitions if the SHA-256 does not match
+  4. Retry failed uploads with backoff, then wait for the device to come back
+     running the uploaded image: its /version full_version ("1.4.001 (Oct 19
+     2026 10:21:28)") has to be one the image can report, from the version,
+     __DATE__ and __TIME__ strings found in it. A device that boots the old
+     firmware again (rejected image, rollback) is reported as failed
+
+Uploads run concurrently (--parallel) and the summary reports per-device
+throughput and totals.
+
+Usage:
+  python3 ota_upload.py thermostat1.local thermostat2.local
+  python3 ota_upload.py --hosts-file fleet.txt --parallel 8
+  python3 ota_upload.py --image firmware/N16/build_20260124-102128/firmware.bin shop-thermostat.local
+  python3 ota_upload.py --dry-run --hosts-file fleet.txt
+"""
+
+import argparse
+import concurrent.futures
+import glob
+import hashlib
+import http.client
+import json
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+
+VARIANTS = ('N8', 'N16', 'N32')
+CHUNK_SIZE = 16 * 1024
+
+# Strings the firmware's full_version is built from (sw_version, __DATE__, __TIME__), NUL-terminated in .rodata
+VERSION_RE = re.compile(rb'(?<=\0)(\d+\.\d+\.\d+)\0')
+DATE_RE = re.compile(rb'(?<=\0)((?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec) [ 123]\d \d{4})\0')
+TIME_RE = re.compile(rb'(?<=\0)([0-2]\d:[0-5]\d:[0-5]\d)\0')
+
+print_lock = threading.Lock()
+
+
+def log(host, message):
+    with print_lock:
+        print('[OTA] %-24s %s' % (host, message), flush=True)
+
+
+def split_host(host):
+    host = host.replace('http://', '').rstrip('/')
+    if ':' in host:
+        name, port = host.rsplit(':', 1)
+        return name, int(port)
+    return host, 80
+
+
+def get_version(host, timeout):
+    name, port = split_host(host)
+    conn = http.client.HTTPConnection(name, port, timeout=timeout)
+    try:
+        conn.request('GET', '/version')
+        response = conn.getresponse()
+        if response.status != 200:
+            raise RuntimeError('/version returned HTTP %d' % response.status)
+        return json.loads(response.read().decode())
+    finally:
+        conn.close()
+
+
+def latest_image(firmware_dir, variant):
+    builds = sorted(glob.glob(os.path.join(firmware_dir, variant, 'build_*', 'firmware.bin')))
+    return builds[-1] if builds else None
+
+
+def store_image(store_dir, variant):
+    """Latest firmware.bin for a variant from the build_orchestrator.py manifest."""
+    manifest_path = os.path.join(store_dir, 'manifest.json')
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    build_id = manifest.get('latest', {}).get(variant)
+    for entry in reversed(manifest.get('builds', [])):
+        if entry['id'] == build_id and entry['variant'] == variant:
+            sha = entry['files']['firmware.bin']['sha256']
+            return os.path.join(store_dir, 'objects', sha[:2], sha)
+    return None
+
+
+class Image:
+    """Firmware file loaded once and shared between uploads."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.data = f.read()
+        self.size = len(self.data)
+        self.sha256 = hashlib.sha256(self.data).hexdigest()
+        if not self.data or self.data[0] != 0xE9:
+            raise ValueError('%s does not look like an ESP32 app image' % path)
+        self.full_versions = build_stamps(self.data)
+
+
+def build_stamps(data):
+    """Every /version full_version the image could report; None if it has no build stamp."""
+    versions = {m.decode() for m in VERSION_RE.findall(data)}
+    dates = {m.decode() for m in DATE_RE.findall(data)}
+    times = {m.decode() for m in TIME_RE.findall(data)}
+    if not (versions and dates and times):
+        return None
+    return {'%s (%s %s)' % (v, d, t) for v in versions for d in dates for t in times}
+
+
+class ImageCache:
+    def __init__(self):
+        self._images = {}
+        self._lock = threading.Lock()
+
+    def get(self, path):
+        with self._lock:
+            if path not in self._images:
+                self._images[path] = Image(path)
+            return self._images[path]
+
+
+def upload(host, image, timeout):
+    """Stream one multipart upload; returns (seconds, response text)."""
+    name, port = split_host(host)
+    boundary = uuid.uuid4().hex
+    head = ('--%s\r\nContent-Disposition: form-data; name="update"; filename="firmware.bin"\r\n'
+            'Content-Type: application/octet-stream\r\n\r\n' % boundary).encode()
+    tail = ('\r\n--%s--\r\n' % boundary).encode()
+
+    conn = http.client.HTTPConnection(name, port, timeout=timeout)
+    start = time.monotonic()
+    try:
+        conn.putrequest('POST', '/update')
+        conn.putheader('Content-Type', 'multipart/form-data; boundary=%s' % boundary)
+        conn.putheader('Content-Length', str(len(head) + image.size + len(tail)))
+        conn.putheader('X-Firmware-SHA256', image.sha256)
+        conn.putheader('X-Firmware-Size', str(image.size))
+        conn.endheaders()
+        conn.send(head)
+        view = memoryview(image.data)
+        for offset in range(0, image.size, CHUNK_SIZE):
+            conn.send(view[offset:offset + CHUNK_SIZE])
+        conn.send(tail)
+        response = conn.getresponse()
+        text = response.read().decode(errors='replace').strip()
+        elapsed = time.monotonic() - start
+        if response.status != 200:
+            raise RuntimeError('HTTP %d: %s' % (response.status, text))
+        return elapsed, text
+    finally:
+        conn.close()
+
+
+def wait_for_reboot(host, timeout, expected_versions=None):
+    """Poll /version until the device answers running one of expected_versions (full_version;
+    None = any); returns (seconds waited, /version)."""
+    start = time.monotonic()
+    seen = None
+    time.sleep(3)
+    while time.monotonic() - start < timeout:
+        try:
+            info = get_version(host, 3)
+            if expected_versions is None or info.get('full_version') in expected_versions:
+                return time.monotonic() - start, info
+            seen = info
+        except Exception:
+            pass
+        time.sleep(2)
+    if seen is not None:
+        raise RuntimeError('device still answers with %s, not the uploaded image' % seen.get('full_version'))
+    raise RuntimeError('device did not come back within %ds' % timeout)
+
+
+def update_device(host, args, cache):
+    result = {'host': host, 'ok': False, 'attempts': 0}
+    try:
+        info = get_version(host, args.timeout)
+    except Exception as e:
+        result['error'] = 'unreachable: %s' % e
+        log(host, result['error'])
+        return result
+
+    variant = args.variant or info.get('variant')
+    result['variant'] = variant
+    result['from_version'] = info.get('full_version') or info.get('version')
+    if args.image:
+        path = args.image
+    else:
+        if variant not in VARIANTS:
+            result['error'] = 'unknown variant %r (old firmware? use --variant)' % variant
+            log(host, result['error'])
+            return result
+        source = args.store or args.image_dir
+        path = store_image(args.store, variant) if args.store else latest_image(args.image_dir, variant)
+        if not path:
+            result['error'] = 'no firmware.bin for %s under %s' % (variant, source)
+            log(host, result['error'])
+            return result
+
+    image = cache.get(path)
+    result['image'] = path
+    result['size'] = image.size
+    ota_space = info.get('ota_space')
+    if ota_space and image.size > ota_space:
+        result['error'] = 'image %d bytes exceeds OTA slot %d bytes' % (image.size, ota_space)
+        log(host, result['error'])
+        return result
+
+    log(host, '%s %s -> %s (%d bytes, sha256 %s...)' % (
+        variant, info.get('version', '?'), os.path.relpath(path), image.size, image.sha256[:12]))
+    if args.dry_run:
+        result['ok'] = True
+        return result
+
+    for attempt in range(1, args.retries + 2):
+        result['attempts'] = attempt
+        try:
+            elapsed, text = upload(host, image, args.timeout)
+            result['seconds'] = elapsed
+            result['kbps'] = image.size / 1024.0 / elapsed if elapsed else 0.0
+            log(host, 'uploaded in %.1fs (%.1f KB/s): %s' % (elapsed, result['kbps'], text))
+            break
+        except Exception as e:
+            result['error'] = str(e)
+            log(host, 'attempt %d failed: %s' % (attempt, e))
+            if 'mismatch' in str(e).lower() or attempt > args.retries:
+                return result
+            time.sleep(args.backoff * (2 ** (attempt - 1)))
+
+    if args.no_wait:
+        result['ok'] = True
+        return result
+    if image.full_versions is None:
+        log(host, 'no build stamp found in %s - the running version is not checked' % os.path.relpath(path))
+    try:
+        waited, new_info = wait_for_reboot(host, args.reboot_timeout, image.full_versions)
+        result['to_version'] = new_info.get('full_version')
+        result['reboot_seconds'] = waited
+        result['ok'] = True
+        result.pop('error', None)
+        log(host, 'back online after %.0fs running %s' % (waited, new_info.get('full_version')))
+    except Exception as e:
+        result['error'] = str(e)
+        log(host, str(e))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Concurrent OTA updater for Simple Thermostat devices')
+    parser.add_argument('hosts', nargs='*', help='Device hostnames/IPs (optionally host:port)')
+    parser.add_argument('--hosts-file', help='File with one host per line')
+    parser.add_argument('--image-dir', default='firmware', help='Organized firmware directory (default: firmware)')
+    parser.add_argument('--store', nargs='?', const='firmware/store',
+                        help='Use the latest build from the build_orchestrator.py store (default firmware/store)')
+    parser.add_argument('--image', help='Upload this firmware.bin to every device')
+    parser.add_argument('--variant', choices=VARIANTS, help='Override the variant reported by /version')
+    parser.add_argument('--parallel', type=int, default=4, help='Concurrent uploads (default 4)')
+    parser.add_argument('--retries', type=int, default=2, help='Retries per device after a failed upload')
+    parser.add_argument('--backoff', type=float, default=5.0, help='Initial retry delay in seconds')
+    parser.add_argument('--timeout', type=float, default=120.0, help='HTTP timeout in seconds')
+    parser.add_argument('--reboot-timeout', type=float, default=90.0, help='Seconds to wait for a device to return')
+    parser.add_argument('--no-wait', action='store_true', help='Do not wait for devices to reboot')
+    parser.add_argument('--dry-run', action='store_true', help='Resolve images and check sizes only')
+    args = parser.parse_args()
+
+    hosts = list(args.hosts)
+    if args.hosts_file:
+        with open(args.hosts_file) as f:
+            hosts += [line.strip() for line in f if line.strip() and not line.startswith('#')]
+    if not hosts:
+        parser.error('no hosts given')
+
+    cache = ImageCache()
+    start = time.monotonic()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=args.parallel) as pool:
+        results = list(pool.map(lambda h: update_device(h, args, cache), hosts))
+    total = time.monotonic() - start
+
+    print()
+    print('%-24s %-5s %-4s %9s %8s %9s %s' % ('HOST', 'VAR', 'OK', 'BYTES', 'SECS', 'KB/s', 'DETAIL'))
+    uploaded = 0
+    for r in results:
+        detail = r.get('error') or '%s -> %s' % (r.get('from_version', '?'), r.get('to_version', '-'))
+        print('%-24s %-5s %-4s %9s %8s %9s %s' % (
+            r['host'], r.get('variant', '?'), 'yes' if r['ok'] else 'NO',
+            r.get('size', '-'), '%.1f' % r['seconds'] if 'seconds' in r else '-',
+            '%.1f' % r['kbps'] if 'kbps' in r else '-', detail))
+        if 'seconds' in r:
+            uploaded += r['size']
+    ok = sum(1 for r in results if r['ok'])
+    print('\n%d/%d devices updated in %.1fs, %.1f KB/s aggregate' % (
+        ok, len(results), total, uploaded / 1024.0 / total if total else 0.0))
+    return 0 if ok == len(results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
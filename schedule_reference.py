@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+Reference model for the compiled schedule engine (include/ScheduleEngine.h).
+
+Runs randomized week schedules through two models and checks they agree:
+  - legacy: a line-by-line port of the old checkSchedule(), evaluated every minute
+  - engine: ScheduleEngine itself, compiled with --cxx into a small harness
+    (compile(), lookup(), minutesUntilNext(), isDue()) and driven the way
+    checkSchedule() drives it - only evaluated when the next transition is
+    due, an override expires or the schedule changes
+
+Cross-midnight schedules (night before day), equal day/night times, disabled
+days, inactive periods, temporary overrides and live schedule edits are all
+part of the fuzzing. Schedules with extra periods (period3..period6) are
+checked against a brute-force "latest start <= now" model instead, since the
+legacy code only knew day and night.
+
+Usage:
+  python3 schedule_reference.py
+  python3 schedule_reference.py 1000 7
+  python3 schedule_reference.py --cxx clang++ 200
+"""
+
+import argparse
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+
+MINUTES_PER_DAY = 1440
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+EXTRA_PERIODS = 4
+MAX_PERIODS = 2 + EXTRA_PERIODS
+HOLD = -1
+LABELS = ['day', 'night', 'period3', 'period4', 'period5', 'period6']
+
+HARNESS = r'''
+#include "ScheduleEngine.h"
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+
+int main() {
+    static char line[1024];
+    static DaySchedule week[7];
+    ScheduleEngine engine;
+    memset(week, 0, sizeof(week));
+    while (fgets(line, sizeof(line), stdin)) {
+        char* p = line + 1;
+        switch (line[0]) {
+            case 'W':   // week: per day enabled, then hour minute active for each period
+                for (int d = 0; d < 7; d++) {
+                    week[d].enabled = strtol(p, &p, 10) != 0;
+                    for (int i = 0; i < SCHEDULE_MAX_PERIODS; i++) {
+                        SchedulePeriod* period = ScheduleEngine::getPeriod(week[d], i);
+                        period->hour = (int)strtol(p, &p, 10);
+                        period->minute = (int)strtol(p, &p, 10);
+                        period->active = strtol(p, &p, 10) != 0;
+                    }
+                }
+                break;
+            case 'R':   // new case
+                engine = ScheduleEngine();
+                break;
+            case 'I':   // schedule edited
+                engine.invalidate();
+                break;
+            case 'N': { // first minute in [from, to) at which isDue(), -1 if none
+                long from = strtol(p, &p, 10);
+                long to = strtol(p, &p, 10);
+                long due = -1;
+                for (long m = from; m < to && due < 0; m++) {
+                    if (engine.isDue((time_t)m)) due = m;
+                }
+                printf("%ld\n", due);
+                break;
+            }
+            case 'E': { // evaluate as checkSchedule() does, with time_t in minutes
+                long now = strtol(p, &p, 10);
+                if (engine.isDirty()) engine.compile(week);
+                uint16_t weekMinute = (uint16_t)(now % SCHEDULE_MINUTES_PER_WEEK);
+                const ScheduleTransition& t = engine.lookup(weekMinute);
+                engine.setNextEvaluation((time_t)now, (time_t)(now + engine.minutesUntilNext(weekMinute)));
+                printf("%d %d\n", t.dayOfWeek, t.periodIndex);
+                break;
+            }
+        }
+        fflush(stdout);
+    }
+    return 0;
+}
+'''
+
+
+def random_period(active_bias=0.8):
+    return {
+        'hour': random.randint(0, 23),
+        'minute': random.choice([0, 0, 15, 30, 45, random.randint(0, 59)]),
+        'heat': round(random.uniform(60, 75), 1),
+        'cool': round(random.uniform(72, 82), 1),
+        'auto': round(random.uniform(68, 78), 1),
+        'active': random.random() < active_bias,
+    }
+
+
+def random_week(extra=False):
+    week = []
+    for _ in range(7):
+        day = random_period()
+        night = random_period()
+        shape = random.random()
+        if shape < 0.15:
+            # Equal start times (night wins)
+            night['hour'], night['minute'] = day['hour'], day['minute']
+        elif shape < 0.25:
+            # Midnight boundaries
+            random.choice([day, night])['hour'] = 0
+            random.choice([day, night])['minute'] = 0
+        extras = []
+        for _ in range(EXTRA_PERIODS):
+            p = random_period(active_bias=0.5 if extra else 0.0)
+            extras.append(p)
+        week.append({
+            'enabled': random.random() < 0.85,
+            'periods': [day, night] + extras,
+        })
+    return week
+
+
+def period_start(period):
+    start = period['hour'] * 60 + period['minute']
+    return min(max(start, 0), MINUTES_PER_DAY - 1)
+
+
+class State:
+    def __init__(self):
+        self.active_period = 'manual'
+        self.override = False
+        self.override_end = 0
+        self.applied = []
+
+    def apply(self, minute, dow, index):
+        self.applied.append((minute, dow, index))
+
+
+def legacy_check(week, state, minute):
+    """Port of the old checkSchedule() (two periods, current weekday only)."""
+    dow = (minute // MINUTES_PER_DAY) % 7
+    current = minute % MINUTES_PER_DAY
+    override_expired = False
+    if state.override and state.override_end > 0 and minute >= state.override_end:
+        state.override = False
+        state.override_end = 0
+        override_expired = True
+    if state.override:
+        return
+    today = week[dow]
+    if not today['enabled']:
+        return
+    day, night = today['periods'][0], today['periods'][1]
+    day_minutes = day['hour'] * 60 + day['minute']
+    night_minutes = night['hour'] * 60 + night['minute']
+    if day_minutes <= night_minutes:
+        is_day = day_minutes <= current < night_minutes
+    else:
+        is_day = current >= day_minutes or current < night_minutes
+    new_period = 'day' if is_day else 'night'
+    if override_expired or new_period != state.active_period:
+        state.active_period = new_period
+        period = day if is_day else night
+        if period['active']:
+            state.apply(minute, dow, 0 if is_day else 1)
+
+
+def generalized_check(week, state, minute):
+    """Brute force for N periods: latest start <= now, else latest of the day."""
+    dow = (minute // MINUTES_PER_DAY) % 7
+    current = minute % MINUTES_PER_DAY
+    override_expired = False
+    if state.override and state.override_end > 0 and minute >= state.override_end:
+        state.override = False
+        state.override_end = 0
+        override_expired = True
+    if state.override:
+        return
+    today = week[dow]
+    if not today['enabled']:
+        return
+    candidates = [(period_start(p), i) for i, p in enumerate(today['periods'])
+                  if i < 2 or p['active']]
+    before = [c for c in candidates if c[0] <= current]
+    pool = before if before else candidates
+    best = max(pool, key=lambda c: (c[0], c[1]))[1]
+    label = LABELS[best]
+    if override_expired or label != state.active_period:
+        state.active_period = label
+        if today['periods'][best]['active']:
+            state.apply(minute, dow, best)
+
+
+class Engine:
+    """checkSchedule()'s override handling around the compiled ScheduleEngine in the harness."""
+
+    def __init__(self, harness, week, horizon):
+        self.harness = harness
+        self.week = week
+        self.horizon = horizon      # End of the simulated run
+        self.due_at = None          # Cached answer of the last 'N' query
+        self.evaluations = 0
+        self.send('R')
+        self.edited()
+
+    def send(self, line, reply=False):
+        self.harness.stdin.write(line + '\n')
+        self.harness.stdin.flush()
+        return self.harness.stdout.readline().split() if reply else None
+
+    def edited(self):
+        """Hand the (edited) week to the harness and invalidate, as the web/MQTT handlers do."""
+        self.send('W' + ''.join(' %d %s' % (d['enabled'], ' '.join(
+            '%d %d %d' % (p['hour'], p['minute'], p['active']) for p in d['periods'])) for d in self.week))
+        self.invalidate()
+
+    def invalidate(self):
+        self.send('I')
+        self.due_at = None
+
+    def due(self, state, minute):
+        if state.override:
+            return state.override_end > 0 and minute >= state.override_end
+        # isDue() only changes on I/E, so one scan answers every minute until then
+        if self.due_at is None:
+            self.due_at = int(self.send('N %d %d' % (minute, self.horizon), reply=True)[0])
+        return 0 <= self.due_at <= minute
+
+    def check(self, state, minute):
+        override_expired = False
+        if state.override and state.override_end > 0 and minute >= state.override_end:
+            state.override = False
+            state.override_end = 0
+            override_expired = True
+        if state.override:
+            return
+        if not override_expired and not self.due(state, minute):
+            return
+        self.evaluations += 1
+        dow, index = (int(v) for v in self.send('E %d' % minute, reply=True))
+        self.due_at = None
+        if index == HOLD:
+            return
+        label = LABELS[index]
+        if override_expired or label != state.active_period:
+            state.active_period = label
+            if self.week[dow]['periods'][index]['active']:
+                state.apply(minute, dow, index)
+
+
+def run_case(harness, extra, weeks=3):
+    """Simulate a few weeks minute by minute; returns a mismatch string or (None, evaluations)."""
+    week = random_week(extra)
+    reference_week = [dict(d, periods=[dict(p) for p in d['periods']]) for d in week]
+    reference = State()
+    engine_state = State()
+    check = generalized_check if extra else legacy_check
+
+    start = random.randint(0, MINUTES_PER_WEEK - 1)
+    engine = Engine(harness, week, start + weeks * MINUTES_PER_WEEK)
+    for minute in range(start, start + weeks * MINUTES_PER_WEEK):
+        event = random.random()
+        if event < 0.0005:
+            # Temporary (or permanent) override from a button press / MQTT
+            end = minute + random.choice([0, 120, random.randint(1, 600)])
+            for s in (reference, engine_state):
+                if not s.override:
+                    s.override = True
+                    s.override_end = end
+        elif event < 0.0008:
+            # Override resumed
+            for s in (reference, engine_state):
+                s.override = False
+                s.override_end = 0
+            engine.invalidate()
+        elif event < 0.0010:
+            # Live schedule edit over MQTT/web
+            dow = random.randint(0, 6)
+            index = random.randint(0, MAX_PERIODS - 1 if extra else 1)
+            replacement = random_period(active_bias=0.7)
+            enabled = random.random() < 0.85
+            for w in (week, reference_week):
+                w[dow]['periods'][index] = dict(replacement)
+                w[dow]['enabled'] = enabled
+            engine.edited()
+
+        check(reference_week, reference, minute)
+        if engine.due(engine_state, minute):
+            engine.check(engine_state, minute)
+
+        if reference.active_period != engine_state.active_period:
+            return 'minute %d: period %s != %s' % (minute, reference.active_period,
+                                                   engine_state.active_period)
+    if reference.applied != engine_state.applied:
+        return 'applied %s != %s' % (reference.applied[:5], engine_state.applied[:5])
+    return None, engine.evaluations
+
+
+def build_harness(cxx, project_dir, work_dir):
+    source = os.path.join(work_dir, 'harness.cpp')
+    binary = os.path.join(work_dir, 'harness')
+    with open(source, 'w') as f:
+        f.write(HARNESS)
+    subprocess.run([cxx, '-O2', '-std=c++11', '-Wall', '-I', os.path.join(project_dir, 'include'),
+                    source, '-o', binary], check=True)
+    return binary
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fuzz the compiled schedule engine against the reference models')
+    parser.add_argument('iterations', nargs='?', type=int, default=200, help='Random cases (default 200)')
+    parser.add_argument('seed', nargs='?', type=int, default=1, help='Random seed (default 1)')
+    parser.add_argument('--cxx', default=os.environ.get('CXX', 'c++'), help='Host C++ compiler (default c++)')
+    parser.add_argument('--project-dir', default=os.path.dirname(os.path.abspath(__file__)))
+    args = parser.parse_args()
+    if shutil.which(args.cxx) is None:
+        print('Error: %s not found' % args.cxx)
+        return 1
+    random.seed(args.seed)
+
+    work_dir = tempfile.mkdtemp(prefix='schedule_')
+    harness = None
+    try:
+        harness = subprocess.Popen([build_harness(args.cxx, args.project_dir, work_dir)],
+                                   stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+        failures = 0
+        evaluations = 0
+        for i in range(args.iterations):
+            extra = i % 2 == 1
+            result = run_case(harness, extra)
+            if isinstance(result, str):
+                failures += 1
+                print('Case %d (%s): %s' % (i, 'extra periods' if extra else 'legacy', result))
+            else:
+                evaluations += result[1]
+    finally:
+        if harness:
+            harness.stdin.close()
+            harness.wait()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    minutes = args.iterations * 3 * MINUTES_PER_WEEK
+    print('%d cases, %d failures' % (args.iterations, failures))
+    print('Engine evaluations: %d over %d simulated minutes (legacy checks every minute)'
+          % (evaluations, minutes))
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
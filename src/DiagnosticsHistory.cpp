@@ -0,0 +1,161 @@
+/*
+ * DiagnosticsHistory.cpp - Runtime diagnostics time series implementation
+ */
+
+#include "DiagnosticsHistory.h"
+#include "Log.h"
+#include "esp_heap_caps.h"
+#include "freertos/task.h"
+
+// Room for every task on the system (loop, sensor, display, async_tcp, WiFi, LwIP, timers, idle...)
+#define DIAG_MAX_SYSTEM_TASKS 32
+
+static TaskStatus_t diagTaskStatus[DIAG_MAX_SYSTEM_TASKS];
+
+DiagnosticsHistory::DiagnosticsHistory() {
+    _head = 0;
+    _count = 0;
+    _intervalSec = 30;
+    for (int i = 0; i < DIAG_TASK_COUNT; i++) {
+        _tasks[i] = NULL;
+        _lastTaskRuntime[i] = 0;
+    }
+    _lastTotalRuntime = 0;
+    _mqttRx = 0;
+    _mqttPublishes = 0;
+    _mqttReconnects = 0;
+    _httpRequests = 0;
+}
+
+void DiagnosticsHistory::setTasks(TaskHandle_t loopTask, TaskHandle_t sensorTask, TaskHandle_t displayTask) {
+    _tasks[DIAG_TASK_LOOP] = loopTask;
+    _tasks[DIAG_TASK_SENSOR] = sensorTask;
+    _tasks[DIAG_TASK_DISPLAY] = displayTask;
+    _tasks[DIAG_TASK_ASYNC_TCP] = xTaskGetHandle("async_tcp");
+    _tasks[DIAG_TASK_IDLE0] = xTaskGetIdleTaskHandleForCPU(0);
+    _tasks[DIAG_TASK_IDLE1] = xTaskGetIdleTaskHandleForCPU(1);
+#if !((configUSE_TRACE_FACILITY == 1) && (configGENERATE_RUN_TIME_STATS == 1))
+    LOG_W(SYSTEM, "[DIAG] FreeRTOS run-time stats are not enabled in this build - cpu_* columns report -1\n");
+#endif
+}
+
+const DiagSample& DiagnosticsHistory::sample() {
+    DiagSample& s = _samples[_head];
+    memset(&s, 0, sizeof(s));
+
+    s.uptimeSec = millis() / 1000;
+
+    multi_heap_info_t info;
+    heap_caps_get_info(&info, MALLOC_CAP_INTERNAL | MALLOC_CAP_8BIT); // Internal RAM, not PSRAM
+    s.heapFree = info.total_free_bytes;
+    s.heapLargest = info.largest_free_block;
+    s.heapMinFree = info.minimum_free_bytes;
+    s.heapAllocBlocks = info.allocated_blocks > 0xFFFF ? 0xFFFF : info.allocated_blocks;
+    s.heapFreeBlocks = info.free_blocks > 0xFFFF ? 0xFFFF : info.free_blocks;
+
+    s.stackLoop = _tasks[DIAG_TASK_LOOP] ? uxTaskGetStackHighWaterMark(_tasks[DIAG_TASK_LOOP]) : 0;
+    s.stackSensor = _tasks[DIAG_TASK_SENSOR] ? uxTaskGetStackHighWaterMark(_tasks[DIAG_TASK_SENSOR]) : 0;
+    s.stackDisplay = _tasks[DIAG_TASK_DISPLAY] ? uxTaskGetStackHighWaterMark(_tasks[DIAG_TASK_DISPLAY]) : 0;
+
+    memset(s.cpu, DIAG_CPU_UNAVAILABLE, sizeof(s.cpu));
+    sampleCpu(s);
+
+    // Interval counters (reset after each sample)
+    s.mqttRx = _mqttRx;
+    s.mqttPublishes = _mqttPublishes;
+    s.mqttReconnects = _mqttReconnects;
+    s.httpRequests = _httpRequests;
+    _mqttRx = 0;
+    _mqttPublishes = 0;
+    _mqttReconnects = 0;
+    _httpRequests = 0;
+
+    _head = (_head + 1) % DIAG_HISTORY_SAMPLES;
+    if (_count < DIAG_HISTORY_SAMPLES) _count++;
+    return s;
+}
+
+void DiagnosticsHistory::sampleCpu(DiagSample& s) {
+#if (configUSE_TRACE_FACILITY == 1) && (configGENERATE_RUN_TIME_STATS == 1)
+    // async_tcp is created when the web server starts handling connections
+    if (_tasks[DIAG_TASK_ASYNC_TCP] == NULL) {
+        _tasks[DIAG_TASK_ASYNC_TCP] = xTaskGetHandle("async_tcp");
+    }
+
+    uint32_t totalRuntime = 0;
+    UBaseType_t taskCount = uxTaskGetSystemState(diagTaskStatus, DIAG_MAX_SYSTEM_TASKS, &totalRuntime);
+    if (taskCount == 0) return; // More tasks than slots - skip this sample
+
+    uint32_t runtime[DIAG_TASK_COUNT] = {0};
+    for (UBaseType_t i = 0; i < taskCount; i++) {
+        int slot = DIAG_TASK_OTHER;
+        for (int t = 0; t < DIAG_TASK_OTHER; t++) {
+            if (_tasks[t] != NULL && diagTaskStatus[i].xHandle == _tasks[t]) {
+                slot = t;
+                break;
+            }
+        }
+        runtime[slot] += diagTaskStatus[i].ulRunTimeCounter;
+    }
+
+    uint32_t totalDelta = totalRuntime - _lastTotalRuntime;
+    if (_lastTotalRuntime != 0 && totalDelta > 0) {
+        for (int t = 0; t < DIAG_TASK_COUNT; t++) {
+            uint32_t delta = runtime[t] - _lastTaskRuntime[t];
+            uint32_t pct = (uint32_t)(((uint64_t)delta * 100) / totalDelta);
+            s.cpu[t] = pct >= DIAG_CPU_UNAVAILABLE ? DIAG_CPU_UNAVAILABLE - 1 : pct;
+        }
+    }
+
+    for (int t = 0; t < DIAG_TASK_COUNT; t++) _lastTaskRuntime[t] = runtime[t];
+    _lastTotalRuntime = totalRuntime;
+#endif
+}
+
+const DiagSample& DiagnosticsHistory::getSample(int i) const {
+    int index = (_head - _count + i + DIAG_HISTORY_SAMPLES) % DIAG_HISTORY_SAMPLES;
+    return _samples[index];
+}
+
+void DiagnosticsHistory::writeCSV(Print& out) const {
+    out.print("uptime_s,heap_free,heap_largest,heap_min_free,alloc_blocks,free_blocks,"
+              "stack_loop,stack_sensor,stack_display,"
+              "cpu_loop,cpu_sensor,cpu_display,cpu_async_tcp,cpu_idle0,cpu_idle1,cpu_other,"
+              "mqtt_rx,mqtt_publishes,mqtt_reconnects,http_requests\n");
+
+    char line[160];
+    for (int i = 0; i < _count; i++) {
+        const DiagSample& s = getSample(i);
+        int cpu[DIAG_TASK_COUNT];
+        for (int t = 0; t < DIAG_TASK_COUNT; t++) {
+            cpu[t] = s.cpu[t] == DIAG_CPU_UNAVAILABLE ? -1 : s.cpu[t];
+        }
+        snprintf(line, sizeof(line),
+                 "%lu,%lu,%lu,%lu,%u,%u,%u,%u,%u,%d,%d,%d,%d,%d,%d,%d,%u,%u,%u,%u\n",
+                 (unsigned long)s.uptimeSec, (unsigned long)s.heapFree,
+                 (unsigned long)s.heapLargest, (unsigned long)s.heapMinFree,
+                 s.heapAllocBlocks, s.heapFreeBlocks,
+                 s.stackLoop, s.stackSensor, s.stackDisplay,
+                 cpu[DIAG_TASK_LOOP], cpu[DIAG_TASK_SENSOR], cpu[DIAG_TASK_DISPLAY],
+                 cpu[DIAG_TASK_ASYNC_TCP], cpu[DIAG_TASK_IDLE0], cpu[DIAG_TASK_IDLE1],
+                 cpu[DIAG_TASK_OTHER],
+                 s.mqttRx, s.mqttPublishes, s.mqttReconnects, s.httpRequests);
+        out.print(line);
+    }
+}
+
+size_t DiagnosticsHistory::writeBinary(Print& out) const {
+    DiagBinaryHeader header;
+    header.magic = DIAG_BINARY_MAGIC;
+    header.version = DIAG_BINARY_VERSION;
+    header.taskCount = DIAG_TASK_COUNT;
+    header.sampleSize = sizeof(DiagSample);
+    header.sampleCount = _count;
+    header.intervalSec = _intervalSec;
+
+    size_t written = out.write((const uint8_t*)&header, sizeof(header));
+    for (int i = 0; i < _count; i++) {
+        written += out.write((const uint8_t*)&getSample(i), sizeof(DiagSample));
+    }
+    return written;
+}
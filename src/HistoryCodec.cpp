@@ -0,0 +1,258 @@
+/*
+ * HistoryCodec.cpp - Delta/varint time-series records implementation
+ */
+
+#include "HistoryCodec.h"
+#include <math.h>
+#include <string.h>
+
+const HistoryTierInfo HISTORY_TIERS[HISTORY_TIER_COUNT] = {
+    {"1m",  60,   86400,   31 * 86400UL},     // Day files, kept a month
+    {"15m", 900,  604800,  371 * 86400UL},    // Week files, kept a year
+    {"1h",  3600, 2592000, 1830 * 86400UL},   // 30-day files, kept five years
+};
+
+uint32_t historyFileStart(HistoryTier tier, uint32_t t) {
+    return t - t % HISTORY_TIERS[tier].fileSpan;
+}
+
+static size_t putVarint(uint8_t* out, uint32_t value) {
+    size_t n = 0;
+    while (value >= 0x80) {
+        out[n++] = (uint8_t)(value | 0x80);
+        value >>= 7;
+    }
+    out[n++] = (uint8_t)value;
+    return n;
+}
+
+// Bytes used, 0 if incomplete, -1 if longer than a uint32 varint can be
+static int getVarint(const uint8_t* data, size_t len, uint32_t& value) {
+    value = 0;
+    for (size_t i = 0; i < 5; i++) {
+        if (i >= len) return 0;
+        value |= (uint32_t)(data[i] & 0x7F) << (7 * i);
+        if (!(data[i] & 0x80)) return (int)i + 1;
+    }
+    return -1;
+}
+
+static uint32_t zigzag(int32_t v) {
+    return ((uint32_t)v << 1) ^ (uint32_t)(v >> 31);
+}
+
+static int32_t unzigzag(uint32_t v) {
+    return (int32_t)(v >> 1) ^ -(int32_t)(v & 1);
+}
+
+static int16_t toTenths(float value) {
+    return (int16_t)lroundf(value * 10.0f);
+}
+
+// ============================================================================
+// ACCUMULATOR
+// ============================================================================
+
+HistoryAccumulator::HistoryAccumulator() {
+    reset(0);
+}
+
+void HistoryAccumulator::reset(uint32_t slot) {
+    _slot = slot;
+    _count = 0;
+    _tempSum = 0;
+    _humiditySum = 0;
+    _hydronicSum = 0;
+    _tempCount = 0;
+    _hydronicCount = 0;
+    memset(_runtimeMs, 0, sizeof(_runtimeMs));
+}
+
+void HistoryAccumulator::addReading(float tempC, float humidity, float hydronicC, uint8_t relays, uint32_t ms) {
+    _count++;
+    if (!isnan(tempC) && !isnan(humidity)) {
+        _tempSum += toTenths(tempC);
+        _humiditySum += toTenths(humidity);
+        _tempCount++;
+    }
+    if (!isnan(hydronicC)) {
+        _hydronicSum += toTenths(hydronicC);
+        _hydronicCount++;
+    }
+    for (int i = 0; i < HISTORY_RELAYS; i++) {
+        if (relays & (1 << i)) _runtimeMs[i] += ms;
+    }
+}
+
+void HistoryAccumulator::addSample(const HistorySample& sample) {
+    _count++;
+    if (sample.temp10 != HISTORY_NO_VALUE) {
+        _tempSum += sample.temp10;
+        _humiditySum += sample.humidity10;
+        _tempCount++;
+    }
+    if (sample.hydronic10 != HISTORY_NO_VALUE) {
+        _hydronicSum += sample.hydronic10;
+        _hydronicCount++;
+    }
+    for (int i = 0; i < HISTORY_RELAYS; i++) {
+        _runtimeMs[i] += sample.runtime[i] * 1000UL;
+    }
+}
+
+bool HistoryAccumulator::finish(HistorySample& out) const {
+    if (_count == 0) return false;
+    out.time = _slot;
+    out.temp10 = _tempCount ? (int16_t)lroundf((float)_tempSum / _tempCount) : HISTORY_NO_VALUE;
+    out.humidity10 = _tempCount ? (int16_t)lroundf((float)_humiditySum / _tempCount) : HISTORY_NO_VALUE;
+    out.hydronic10 = _hydronicCount ? (int16_t)lroundf((float)_hydronicSum / _hydronicCount) : HISTORY_NO_VALUE;
+    for (int i = 0; i < HISTORY_RELAYS; i++) {
+        uint32_t seconds = (_runtimeMs[i] + 500) / 1000;
+        out.runtime[i] = seconds > 0xFFFF ? 0xFFFF : (uint16_t)seconds;
+    }
+    return true;
+}
+
+// ============================================================================
+// ENCODER
+// ============================================================================
+
+HistoryEncoder::HistoryEncoder() {
+    _active = false;
+    _tier = HISTORY_1M;
+    _fileStart = 0;
+    memset(&_state, 0, sizeof(_state));
+}
+
+void HistoryEncoder::begin(HistoryTier tier, uint32_t fileStart, uint8_t* header) {
+    HistoryDeltaState empty = {0, 0, 0, 0};
+    resume(tier, fileStart, empty);
+
+    uint32_t magic = HISTORY_MAGIC;
+    uint32_t interval = HISTORY_TIERS[tier].interval;
+    memset(header, 0, HISTORY_HEADER_SIZE);
+    memcpy(header, &magic, 4);
+    header[4] = HISTORY_VERSION;
+    header[5] = tier;
+    memcpy(header + 8, &fileStart, 4);
+    memcpy(header + 12, &interval, 4);
+}
+
+void HistoryEncoder::resume(HistoryTier tier, uint32_t fileStart, const HistoryDeltaState& state) {
+    _active = true;
+    _tier = tier;
+    _fileStart = fileStart;
+    _state = state;
+}
+
+uint32_t HistoryEncoder::nextTime() const {
+    return _fileStart + _state.index * HISTORY_TIERS[_tier].interval;
+}
+
+size_t HistoryEncoder::encode(const HistorySample& sample, uint8_t* out) {
+    const HistoryTierInfo& info = HISTORY_TIERS[_tier];
+    if (!_active || sample.time < nextTime() || sample.time - _fileStart >= info.fileSpan) return 0;
+
+    uint32_t index = (sample.time - _fileStart) / info.interval;
+    uint32_t skip = index - _state.index;
+    uint8_t flags = 0;
+    uint16_t runtime[HISTORY_RELAYS];
+    for (int i = 0; i < HISTORY_RELAYS; i++) {
+        // Readings that straddle the interval edge can add up to a little more than the interval
+        runtime[i] = sample.runtime[i] > info.interval ? (uint16_t)info.interval : sample.runtime[i];
+        if (runtime[i]) flags |= 1 << i;
+    }
+    if (sample.temp10 != HISTORY_NO_VALUE && sample.humidity10 != HISTORY_NO_VALUE) flags |= HISTORY_FLAG_CLIMATE;
+    if (skip) flags |= HISTORY_FLAG_SKIP;
+    if (sample.hydronic10 != HISTORY_NO_VALUE) flags |= HISTORY_FLAG_HYDRONIC;
+
+    size_t n = 0;
+    out[n++] = flags;
+    if (skip) n += putVarint(out + n, skip);
+    if (flags & HISTORY_FLAG_CLIMATE) {
+        n += putVarint(out + n, zigzag(sample.temp10 - _state.temp10));
+        n += putVarint(out + n, zigzag(sample.humidity10 - _state.humidity10));
+        _state.temp10 = sample.temp10;
+        _state.humidity10 = sample.humidity10;
+    }
+    if (flags & HISTORY_FLAG_HYDRONIC) {
+        n += putVarint(out + n, zigzag(sample.hydronic10 - _state.hydronic10));
+        _state.hydronic10 = sample.hydronic10;
+    }
+    for (int i = 0; i < HISTORY_RELAYS; i++) {
+        if (runtime[i]) n += putVarint(out + n, runtime[i]);
+    }
+    _state.index = index + 1;
+    return n;
+}
+
+// ============================================================================
+// DECODER
+// ============================================================================
+
+HistoryDecoder::HistoryDecoder() {
+    _tier = HISTORY_1M;
+    _fileStart = 0;
+    _interval = 0;
+    memset(&_state, 0, sizeof(_state));
+}
+
+bool HistoryDecoder::begin(const uint8_t* header) {
+    uint32_t magic;
+    memcpy(&magic, header, 4);
+    if (magic != HISTORY_MAGIC || header[4] != HISTORY_VERSION || header[5] >= HISTORY_TIER_COUNT) return false;
+    _tier = (HistoryTier)header[5];
+    memcpy(&_fileStart, header + 8, 4);
+    memcpy(&_interval, header + 12, 4);
+    memset(&_state, 0, sizeof(_state));
+    return _interval == HISTORY_TIERS[_tier].interval;
+}
+
+int HistoryDecoder::next(const uint8_t* data, size_t len, HistorySample& out) {
+    if (len == 0) return 0;
+    uint8_t flags = data[0];
+    size_t n = 1;
+    uint32_t value;
+    int used;
+
+    uint32_t skip = 0;
+    if (flags & HISTORY_FLAG_SKIP) {
+        if ((used = getVarint(data + n, len - n, skip)) <= 0) return used;
+        n += used;
+    }
+    HistoryDeltaState state = _state;
+    out.temp10 = HISTORY_NO_VALUE;
+    out.humidity10 = HISTORY_NO_VALUE;
+    out.hydronic10 = HISTORY_NO_VALUE;
+    if (flags & HISTORY_FLAG_CLIMATE) {
+        if ((used = getVarint(data + n, len - n, value)) <= 0) return used;
+        n += used;
+        state.temp10 = (int16_t)(state.temp10 + unzigzag(value));
+        if ((used = getVarint(data + n, len - n, value)) <= 0) return used;
+        n += used;
+        state.humidity10 = (int16_t)(state.humidity10 + unzigzag(value));
+        out.temp10 = state.temp10;
+        out.humidity10 = state.humidity10;
+    }
+    if (flags & HISTORY_FLAG_HYDRONIC) {
+        if ((used = getVarint(data + n, len - n, value)) <= 0) return used;
+        n += used;
+        state.hydronic10 = (int16_t)(state.hydronic10 + unzigzag(value));
+        out.hydronic10 = state.hydronic10;
+    }
+    for (int i = 0; i < HISTORY_RELAYS; i++) {
+        out.runtime[i] = 0;
+        if (!(flags & (1 << i))) continue;
+        if ((used = getVarint(data + n, len - n, value)) <= 0) return used;
+        n += used;
+        if (value > _interval) return -1;
+        out.runtime[i] = (uint16_t)value;
+    }
+
+    if (skip >= HISTORY_TIERS[_tier].fileSpan / _interval - state.index) return -1;
+    state.index += skip;
+    out.time = _fileStart + state.index * _interval;
+    state.index++;
+    _state = state;
+    return (int)n;
+}
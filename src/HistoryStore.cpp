@@ -0,0 +1,477 @@
+/*
+ * HistoryStore.cpp - Flash-backed history implementation
+ */
+
+#include "HistoryStore.h"
+#include "MemoryPolicy.h"
+#include "Log.h"
+#include <LittleFS.h>
+#include <sys/stat.h>
+
+#define HISTORY_MOUNT_POINT "/littlefs"
+
+// stat() instead of LittleFS.exists(), which logs an error for every missing file
+static bool fileExists(const char* path) {
+    char full[64];
+    snprintf(full, sizeof(full), HISTORY_MOUNT_POINT "%s", path);
+    struct stat st;
+    return stat(full, &st) == 0;
+}
+
+HistoryStore::HistoryStore() {
+    for (int t = 0; t < HISTORY_TIER_COUNT; t++) {
+        _tiers[t].cache = NULL;
+        _tiers[t].cacheLen = 0;
+    }
+    _lock = NULL;
+    _cacheBytes = HISTORY_CACHE_BYTES;
+    _flushMs = HISTORY_FLUSH_MS;
+    _lastFlush = 0;
+    _lastTime = 0;
+    _mounted = false;
+    _started = false;
+    _psram = false;
+}
+
+bool HistoryStore::begin() {
+    _psram = psramAvailable();
+    _cacheBytes = boardBufferSize(HISTORY_CACHE_BYTES, HISTORY_CACHE_BYTES_PSRAM);
+    _flushMs = _psram ? HISTORY_FLUSH_MS_PSRAM : HISTORY_FLUSH_MS;
+    if (!_lock) _lock = xSemaphoreCreateMutex();
+
+    // Formats the partition on first use
+    if (!LittleFS.begin(true)) {
+        LOG_E(HISTORY, "[HISTORY] LittleFS mount failed - history disabled\n");
+        return false;
+    }
+    LittleFS.mkdir(HISTORY_DIR);
+    for (int t = 0; t < HISTORY_TIER_COUNT; t++) {
+        char dir[32];
+        snprintf(dir, sizeof(dir), HISTORY_DIR "/%s", HISTORY_TIERS[t].name);
+        LittleFS.mkdir(dir);
+        _tiers[t].cache = (uint8_t*)coldMalloc(_cacheBytes);
+        if (!_tiers[t].cache) {
+            LOG_E(HISTORY, "[HISTORY] No memory for the %s cache - history disabled\n", HISTORY_TIERS[t].name);
+            for (int i = 0; i < t; i++) {
+                free(_tiers[i].cache);
+                _tiers[i].cache = NULL;
+            }
+            return false;
+        }
+    }
+    _lastFlush = millis();
+    _mounted = true;
+    LOG_I(HISTORY, "[HISTORY] LittleFS %u of %u KB used, %u byte cache per tier in %s, flush every %lu min\n",
+                   (unsigned)(usedBytes() / 1024), (unsigned)(totalBytes() / 1024), (unsigned)_cacheBytes,
+                   _psram ? "PSRAM" : "RAM", (unsigned long)(_flushMs / 60000));
+    return true;
+}
+
+size_t HistoryStore::usedBytes() const {
+    return _mounted ? LittleFS.usedBytes() : 0;
+}
+
+size_t HistoryStore::totalBytes() const {
+    return _mounted ? LittleFS.totalBytes() : 0;
+}
+
+HistoryTier HistoryStore::tierFor(uint32_t from, uint32_t to) {
+    uint32_t span = to > from ? to - from : 0;
+    if (span <= 14 * 86400UL) return HISTORY_1M;     // <= ~20k records
+    if (span <= 180 * 86400UL) return HISTORY_15M;   // <= ~17k records
+    return HISTORY_1H;
+}
+
+void HistoryStore::filePath(HistoryTier tier, uint32_t fileStart, char* path, size_t size) {
+    snprintf(path, size, HISTORY_DIR "/%s/%lu.bin", HISTORY_TIERS[tier].name, (unsigned long)fileStart);
+}
+
+// ============================================================================
+// RECORDING
+// ============================================================================
+
+void HistoryStore::addReading(uint32_t now, float tempC, float humidity, float hydronicC, uint8_t relays, uint32_t ms) {
+    if (!_mounted || now < HISTORY_MIN_TIME) return;
+    xSemaphoreTake(_lock, portMAX_DELAY);
+    if (!_started) start(now);
+    _lastTime = now;
+
+    HistoryAccumulator& minute = _tiers[HISTORY_1M].accumulator;
+    uint32_t slot = now - now % HISTORY_TIERS[HISTORY_1M].interval;
+    if (slot != minute.slot()) {
+        HistorySample sample;
+        // A clock step backwards just drops the partial minute
+        if (slot > minute.slot() && minute.finish(sample)) completeMinute(sample);
+        minute.reset(slot);
+    }
+    minute.addReading(tempC, humidity, hydronicC, relays, ms);
+
+    if (millis() - _lastFlush >= _flushMs) flushLocked();
+    xSemaphoreGive(_lock);
+}
+
+void HistoryStore::start(uint32_t now) {
+    for (int t = 0; t < HISTORY_TIER_COUNT; t++) {
+        _tiers[t].accumulator.reset(now - now % HISTORY_TIERS[t].interval);
+    }
+    // Continue today's file and rebuild the unfinished 15 minute / 1 hour intervals from it
+    openFile(HISTORY_1M, historyFileStart(HISTORY_1M, now), true);
+    _started = true;
+}
+
+void HistoryStore::completeMinute(const HistorySample& sample) {
+    appendSample(HISTORY_1M, sample);
+    for (int t = HISTORY_15M; t < HISTORY_TIER_COUNT; t++) {
+        HistoryAccumulator& rollup = _tiers[t].accumulator;
+        uint32_t slot = sample.time - sample.time % HISTORY_TIERS[t].interval;
+        if (slot != rollup.slot()) {
+            HistorySample finished;
+            if (slot > rollup.slot() && rollup.finish(finished)) appendSample((HistoryTier)t, finished);
+            rollup.reset(slot);
+        }
+        rollup.addSample(sample);
+    }
+}
+
+void HistoryStore::appendSample(HistoryTier tier, const HistorySample& sample) {
+    TierState& ts = _tiers[tier];
+    uint32_t fileStart = historyFileStart(tier, sample.time);
+    if (!ts.encoder.active() || ts.encoder.fileStart() != fileStart) {
+        if (ts.encoder.active() && fileStart < ts.encoder.fileStart()) return; // Clock stepped back a file
+        flushTier(tier);
+        openFile(tier, fileStart, false);
+    }
+    if (ts.cacheLen + HISTORY_MAX_RECORD > _cacheBytes) flushTier(tier);
+    ts.cacheLen += ts.encoder.encode(sample, ts.cache + ts.cacheLen);
+}
+
+// Point the tier's encoder at a file: continue after its records, or start it in the cache
+void HistoryStore::openFile(HistoryTier tier, uint32_t fileStart, bool replay) {
+    TierState& ts = _tiers[tier];
+    char path[48];
+    filePath(tier, fileStart, path, sizeof(path));
+    ts.cacheLen = 0;
+
+    if (fileExists(path)) {
+        File file = LittleFS.open(path, FILE_READ);
+        HistoryDecoder decoder;
+        uint8_t buf[256];
+        bool ok = file && file.read(buf, HISTORY_HEADER_SIZE) == HISTORY_HEADER_SIZE && decoder.begin(buf) &&
+                  decoder.tier() == tier && decoder.fileStart() == fileStart;
+        size_t len = 0;
+        while (ok) {
+            size_t got = file.read(buf + len, sizeof(buf) - len);
+            len += got;
+            if (len == 0) break;
+            size_t pos = 0;
+            int used = 0;
+            HistorySample sample;
+            while (pos < len && (used = decoder.next(buf + pos, len - pos, sample)) > 0) {
+                pos += used;
+                for (int t = HISTORY_15M; replay && t < HISTORY_TIER_COUNT; t++) {
+                    if (sample.time >= _tiers[t].accumulator.slot()) _tiers[t].accumulator.addSample(sample);
+                }
+            }
+            if (used < 0 || (got == 0 && pos < len)) ok = false; // Corrupt or cut short
+            memmove(buf, buf + pos, len - pos);
+            len -= pos;
+        }
+        if (file) file.close();
+        if (ok) {
+            ts.encoder.resume(tier, fileStart, decoder.state());
+            return;
+        }
+        LOG_W(HISTORY, "[HISTORY] %s is damaged - starting it again\n", path);
+        LittleFS.remove(path);
+    }
+    ts.encoder.begin(tier, fileStart, ts.cache);
+    ts.cacheLen = HISTORY_HEADER_SIZE;
+}
+
+// ============================================================================
+// FLUSH AND PRUNE
+// ============================================================================
+
+void HistoryStore::flush() {
+    if (!_mounted) return;
+    xSemaphoreTake(_lock, portMAX_DELAY);
+    flushLocked();
+    xSemaphoreGive(_lock);
+}
+
+void HistoryStore::flushLocked() {
+    if (_lastTime) prune(_lastTime);
+    for (int t = 0; t < HISTORY_TIER_COUNT; t++) {
+        flushTier((HistoryTier)t);
+    }
+    _lastFlush = millis();
+}
+
+void HistoryStore::flushTier(HistoryTier tier) {
+    TierState& ts = _tiers[tier];
+    if (ts.cacheLen == 0) return;
+    char path[48];
+    filePath(tier, ts.encoder.fileStart(), path, sizeof(path));
+    File file = LittleFS.open(path, FILE_APPEND);
+    size_t written = file ? file.write(ts.cache, ts.cacheLen) : 0;
+    if (file) file.close();
+    if (written != ts.cacheLen) {
+        // The file may now end mid-record; openFile() checks it on the next sample
+        LOG_E(HISTORY, "[HISTORY] Writing %s failed (%u of %u bytes)\n", path, (unsigned)written, (unsigned)ts.cacheLen);
+        ts.encoder.end();
+    }
+    ts.cacheLen = 0;
+}
+
+bool HistoryStore::oldestFile(HistoryTier tier, uint32_t& fileStart, int& count) const {
+    char dirPath[32];
+    snprintf(dirPath, sizeof(dirPath), HISTORY_DIR "/%s", HISTORY_TIERS[tier].name);
+    count = 0;
+    File dir = LittleFS.open(dirPath);
+    if (!dir || !dir.isDirectory()) return false;
+    for (File entry = dir.openNextFile(); entry; entry = dir.openNextFile()) {
+        uint32_t start = strtoul(entry.name(), NULL, 10);
+        if (count++ == 0 || start < fileStart) fileStart = start;
+    }
+    return count > 0;
+}
+
+bool HistoryStore::fileRange(HistoryTier tier, uint32_t& first, uint32_t& last) {
+    if (!_mounted) return false;
+    char dirPath[32];
+    snprintf(dirPath, sizeof(dirPath), HISTORY_DIR "/%s", HISTORY_TIERS[tier].name);
+    int count = 0;
+    xSemaphoreTake(_lock, portMAX_DELAY);
+    File dir = LittleFS.open(dirPath);
+    if (dir && dir.isDirectory()) {
+        for (File entry = dir.openNextFile(); entry; entry = dir.openNextFile()) {
+            uint32_t start = strtoul(entry.name(), NULL, 10);
+            if (count++ == 0 || start < first) first = start;
+            if (count == 1 || start > last) last = start;
+        }
+    }
+    const TierState& ts = _tiers[tier];
+    if (ts.cacheLen > 0) {
+        uint32_t start = ts.encoder.fileStart();
+        if (count++ == 0 || start < first) first = start;
+        if (count == 1 || start > last) last = start;
+    }
+    xSemaphoreGive(_lock);
+    return count > 0;
+}
+
+void HistoryStore::prune(uint32_t now) {
+    char path[48];
+    uint32_t fileStart;
+    int count;
+    for (int t = 0; t < HISTORY_TIER_COUNT; t++) {
+        const HistoryTierInfo& info = HISTORY_TIERS[t];
+        while (oldestFile((HistoryTier)t, fileStart, count) && fileStart + info.fileSpan + info.retention <= now) {
+            filePath((HistoryTier)t, fileStart, path, sizeof(path));
+            LOG_I(HISTORY, "[HISTORY] Removing %s (older than %lu days)\n", path, (unsigned long)(info.retention / 86400));
+            if (!LittleFS.remove(path)) break;
+        }
+    }
+    // Partition nearly full: drop the oldest fine-grained files first, keeping each tier's current file
+    while (usedBytes() * 100 > totalBytes() * HISTORY_FS_HIGH_WATER) {
+        bool removed = false;
+        for (int t = 0; t < HISTORY_TIER_COUNT && !removed; t++) {
+            if (oldestFile((HistoryTier)t, fileStart, count) && count > 1) {
+                filePath((HistoryTier)t, fileStart, path, sizeof(path));
+                LOG_I(HISTORY, "[HISTORY] Filesystem %u%% full - removing %s\n",
+                               (unsigned)(usedBytes() * 100 / totalBytes()), path);
+                removed = LittleFS.remove(path);
+            }
+        }
+        if (!removed) break;
+    }
+}
+
+// ============================================================================
+// QUERIES
+// ============================================================================
+
+bool HistoryStore::snapshot(HistoryTier tier, uint32_t fileStart, File& file, size_t& fileSize,
+                            uint8_t*& cached, size_t& cachedLen) {
+    fileSize = 0;
+    cached = NULL;
+    cachedLen = 0;
+    if (!_mounted) return false;
+    char path[48];
+    filePath(tier, fileStart, path, sizeof(path));
+
+    xSemaphoreTake(_lock, portMAX_DELAY);
+    if (fileExists(path)) {
+        file = LittleFS.open(path, FILE_READ);
+        if (file) fileSize = file.size();
+    }
+    // Records still in the write-back cache continue the file's deltas
+    const TierState& ts = _tiers[tier];
+    if (ts.cacheLen > 0 && ts.encoder.fileStart() == fileStart) {
+        cached = (uint8_t*)coldMalloc(ts.cacheLen);
+        if (cached) {
+            memcpy(cached, ts.cache, ts.cacheLen);
+            cachedLen = ts.cacheLen;
+        }
+    }
+    xSemaphoreGive(_lock);
+    return fileSize + cachedLen > 0;
+}
+
+HistoryQuery::HistoryQuery(HistoryStore& store, HistoryTier tier, uint32_t from, uint32_t to, bool csv)
+    : _store(store) {
+    _tier = tier;
+    _from = from;
+    _to = to;
+    _csv = csv;
+    _done = false;
+    // Start at the oldest file rather than probing every file span from `from` (from=0 would be
+    // ~20000 days of stat() calls under the store lock, on the async_tcp task)
+    uint32_t first = 0, last = 0;
+    if (!store.fileRange(tier, first, last)) _done = true;
+    _nextFile = historyFileStart(tier, from);
+    if (_nextFile < first) _nextFile = first;
+    _lastFile = last;
+    _open = false;
+    _fileLeft = 0;
+    _cached = NULL;
+    _cachedLen = 0;
+    _cachedPos = 0;
+    _prefixPos = sizeof(_prefix);
+    _windowLen = 0;
+    _rowPos = 0;
+    _rowLen = csv ? snprintf(_row, sizeof(_row), "time,temp_c,humidity,hydronic_c,heat1_s,heat2_s,cool1_s,cool2_s,fan_s\n") : 0;
+}
+
+HistoryQuery::~HistoryQuery() {
+    closeSegment();
+}
+
+size_t HistoryQuery::read(uint8_t* buffer, size_t maxLen) {
+    size_t n = 0;
+    while (n < maxLen) {
+        if (_csv) {
+            if (_rowPos == _rowLen && !nextRow()) break;
+            size_t take = _rowLen - _rowPos < maxLen - n ? _rowLen - _rowPos : maxLen - n;
+            memcpy(buffer + n, _row + _rowPos, take);
+            _rowPos += take;
+            n += take;
+            continue;
+        }
+        // Binary: each file as stored (header + records + cached records), after its length
+        if (!_open && !openSegment()) break;
+        if (_prefixPos < sizeof(_prefix)) {
+            buffer[n++] = _prefix[_prefixPos++];
+            continue;
+        }
+        size_t got = readSegment(buffer + n, maxLen - n);
+        if (got == 0) closeSegment();
+        n += got;
+    }
+    return n;
+}
+
+bool HistoryQuery::openSegment() {
+    closeSegment();
+    while (!_done && _nextFile < _to && _nextFile <= _lastFile) {
+        uint32_t fileStart = _nextFile;
+        _nextFile += HISTORY_TIERS[_tier].fileSpan;
+        size_t fileSize;
+        if (!_store.snapshot(_tier, fileStart, _file, fileSize, _cached, _cachedLen)) {
+            closeSegment();
+            continue;
+        }
+        _open = true;
+        _fileLeft = fileSize;
+        _cachedPos = 0;
+        uint32_t total = fileSize + _cachedLen;
+        memcpy(_prefix, &total, sizeof(_prefix));
+        _prefixPos = 0;
+        if (_csv) {
+            uint8_t header[HISTORY_HEADER_SIZE];
+            _windowLen = 0;
+            if (readSegment(header, sizeof(header)) != sizeof(header) || !_decoder.begin(header)) {
+                closeSegment();
+                continue;
+            }
+        }
+        return true;
+    }
+    _done = true;
+    return false;
+}
+
+void HistoryQuery::closeSegment() {
+    if (_file) _file.close();
+    free(_cached);
+    _cached = NULL;
+    _cachedLen = 0;
+    _fileLeft = 0;
+    _open = false;
+}
+
+size_t HistoryQuery::readSegment(uint8_t* buffer, size_t len) {
+    size_t n = 0;
+    if (_fileLeft > 0) {
+        size_t want = len < _fileLeft ? len : _fileLeft;
+        n = _file.read(buffer, want);
+        if (n < want) {
+            // File went away (pruned) - the promised segment length can't be met, end the response
+            LOG_E(HISTORY, "[HISTORY] Query read failed\n");
+            _done = true;
+            _fileLeft = 0;
+            _cachedPos = _cachedLen;
+            return n;
+        }
+        _fileLeft -= n;
+    }
+    if (n < len && _cachedPos < _cachedLen) {
+        size_t take = _cachedLen - _cachedPos < len - n ? _cachedLen - _cachedPos : len - n;
+        memcpy(buffer + n, _cached + _cachedPos, take);
+        _cachedPos += take;
+        n += take;
+    }
+    return n;
+}
+
+static void formatTenths(char* out, size_t size, int16_t value) {
+    if (value == HISTORY_NO_VALUE) {
+        out[0] = '\0';
+    } else {
+        snprintf(out, size, "%.1f", value / 10.0f);
+    }
+}
+
+bool HistoryQuery::nextRow() {
+    _rowPos = 0;
+    _rowLen = 0;
+    for (;;) {
+        if (!_open && !openSegment()) return false;
+        if (_windowLen < HISTORY_MAX_RECORD) {
+            _windowLen += readSegment(_window + _windowLen, sizeof(_window) - _windowLen);
+        }
+        HistorySample s;
+        int used = _decoder.next(_window, _windowLen, s);
+        if (used <= 0) {
+            // End of the file (or a damaged record) - carry on with the next one
+            closeSegment();
+            _windowLen = 0;
+            continue;
+        }
+        memmove(_window, _window + used, _windowLen - used);
+        _windowLen -= used;
+        if (s.time < _from) continue;
+        if (s.time >= _to) {
+            closeSegment();
+            _done = true;
+            return false;
+        }
+        char temp[8], humidity[8], hydronic[8];
+        formatTenths(temp, sizeof(temp), s.temp10);
+        formatTenths(humidity, sizeof(humidity), s.humidity10);
+        formatTenths(hydronic, sizeof(hydronic), s.hydronic10);
+        _rowLen = snprintf(_row, sizeof(_row), "%lu,%s,%s,%s,%u,%u,%u,%u,%u\n", (unsigned long)s.time,
+                           temp, humidity, hydronic, s.runtime[0], s.runtime[1], s.runtime[2], s.runtime[3], s.runtime[4]);
+        return true;
+    }
+}
@@ -0,0 +1,185 @@
+/*
+ * HvacEngine.cpp - Table-driven relay state machine implementation
+ */
+
+#include "HvacEngine.h"
+#include <math.h>
+#include <string.h>
+
+#define STAY(s) {s, HVAC_GUARD_NONE}
+
+// Next state and guard for every state/event pair. Entries that point back at
+// their own state are "no transition".
+static const HvacTransition HVAC_TRANSITIONS[HVAC_STATE_COUNT][HVAC_EVENT_COUNT] = {
+    // HOLD                    HEAT_CALL                            COOL_CALL                            STAGE2_CALL                          STAGE2_CLEAR                         SATISFIED                      FORCE_OFF
+    { STAY(HVAC_IDLE),        {HVAC_HEAT_STAGE1, HVAC_GUARD_MIN_OFF}, {HVAC_COOL_STAGE1, HVAC_GUARD_MIN_OFF}, STAY(HVAC_IDLE),                     STAY(HVAC_IDLE),                     STAY(HVAC_IDLE),               STAY(HVAC_IDLE) },
+    { STAY(HVAC_HEAT_STAGE1), STAY(HVAC_HEAT_STAGE1),              STAY(HVAC_HEAT_STAGE1),              {HVAC_HEAT_STAGE2, HVAC_GUARD_STAGE1}, STAY(HVAC_HEAT_STAGE1),              {HVAC_IDLE, HVAC_GUARD_MIN_ON}, {HVAC_IDLE, HVAC_GUARD_NONE} },
+    { STAY(HVAC_HEAT_STAGE2), STAY(HVAC_HEAT_STAGE2),              STAY(HVAC_HEAT_STAGE2),              STAY(HVAC_HEAT_STAGE2),              {HVAC_HEAT_STAGE1, HVAC_GUARD_STAGE2}, {HVAC_IDLE, HVAC_GUARD_MIN_ON}, {HVAC_IDLE, HVAC_GUARD_NONE} },
+    { STAY(HVAC_COOL_STAGE1), STAY(HVAC_COOL_STAGE1),              STAY(HVAC_COOL_STAGE1),              {HVAC_COOL_STAGE2, HVAC_GUARD_STAGE1}, STAY(HVAC_COOL_STAGE1),              {HVAC_IDLE, HVAC_GUARD_MIN_ON}, {HVAC_IDLE, HVAC_GUARD_NONE} },
+    { STAY(HVAC_COOL_STAGE2), STAY(HVAC_COOL_STAGE2),              STAY(HVAC_COOL_STAGE2),              STAY(HVAC_COOL_STAGE2),              {HVAC_COOL_STAGE1, HVAC_GUARD_STAGE2}, {HVAC_IDLE, HVAC_GUARD_MIN_ON}, {HVAC_IDLE, HVAC_GUARD_NONE} },
+};
+
+HvacEngine::HvacEngine() {
+    reset();
+}
+
+void HvacEngine::reset() {
+    _state = HVAC_IDLE;
+    _event = HVAC_EV_HOLD;
+    _heldBy = HVAC_GUARD_NONE;
+    _relays = 0;
+    _owned = HVAC_RELAY_ALL;
+    _hasRun = false;
+    _stateSince = 0;
+    _runSince = 0;
+    _offSince = 0;
+    _cycles = 0;
+}
+
+bool HvacEngine::update(const HvacInputs& in, const HvacConfig& config, uint32_t now) {
+    HvacState previous = _state;
+    uint8_t previousRelays = _relays;
+
+    _event = classify(in, config);
+    const HvacTransition& t = HVAC_TRANSITIONS[_state][_event];
+    _heldBy = HVAC_GUARD_NONE;
+    if (t.to != _state) {
+        if (guardPasses(t.guard, config, now)) {
+            enter(t.to, now);
+        } else {
+            _heldBy = t.guard;
+        }
+    }
+
+    _relays = relaysFor(in, config);
+    _owned = (in.fanMode == HVAC_FAN_CYCLE && _state == HVAC_IDLE) ? (HVAC_RELAY_ALL & ~HVAC_RELAY_FAN) : HVAC_RELAY_ALL;
+    return _state != previous || _relays != previousRelays;
+}
+
+HvacEvent HvacEngine::classify(const HvacInputs& in, const HvacConfig& config) const {
+    bool autoMode = in.mode == HVAC_MODE_AUTO;
+    bool heatAllowed = (in.mode == HVAC_MODE_HEAT || autoMode) && !in.heatInhibited;
+    bool coolAllowed = in.mode == HVAC_MODE_COOL || autoMode;
+
+    if (heating()) {
+        if (!heatAllowed) return HVAC_EV_FORCE_OFF;
+        if (isnan(in.temp)) return HVAC_EV_HOLD;
+        float setpoint = autoMode ? in.setAuto : in.setHeat;
+        float offAt = autoMode ? in.setAuto - in.autoSwing : in.setHeat;
+        bool stage2Allowed = config.stage2HeatEnabled && !config.reversingValve;
+        if (in.temp >= offAt) return HVAC_EV_SATISFIED;
+        if (!stage2Allowed) return _state == HVAC_HEAT_STAGE2 ? HVAC_EV_STAGE2_CLEAR : HVAC_EV_HOLD;
+        if (in.temp < setpoint - in.stage2Delta) return HVAC_EV_STAGE2_CALL;
+        if (in.temp >= setpoint - in.stage2Delta * 0.5f) return HVAC_EV_STAGE2_CLEAR;
+        return HVAC_EV_HOLD;
+    }
+
+    if (cooling()) {
+        if (!coolAllowed) return HVAC_EV_FORCE_OFF;
+        if (isnan(in.temp)) return HVAC_EV_HOLD;
+        float setpoint = autoMode ? in.setAuto : in.setCool;
+        bool satisfied = autoMode ? in.temp <= in.setAuto + in.autoSwing : in.temp < in.setCool;
+        bool stage2Allowed = config.stage2CoolEnabled && !config.reversingValve;
+        if (satisfied) return HVAC_EV_SATISFIED;
+        if (!stage2Allowed) return _state == HVAC_COOL_STAGE2 ? HVAC_EV_STAGE2_CLEAR : HVAC_EV_HOLD;
+        if (in.temp > setpoint + in.stage2Delta) return HVAC_EV_STAGE2_CALL;
+        if (in.temp <= setpoint + in.stage2Delta * 0.5f) return HVAC_EV_STAGE2_CLEAR;
+        return HVAC_EV_HOLD;
+    }
+
+    if (isnan(in.temp)) return HVAC_EV_HOLD;
+    if (heatAllowed && in.temp < (autoMode ? in.setAuto - in.autoSwing : in.setHeat - in.swing)) {
+        return HVAC_EV_HEAT_CALL;
+    }
+    if (coolAllowed && in.temp > (autoMode ? in.setAuto + in.autoSwing : in.setCool + in.swing)) {
+        return HVAC_EV_COOL_CALL;
+    }
+    return HVAC_EV_HOLD;
+}
+
+bool HvacEngine::guardPasses(HvacGuard guard, const HvacConfig& config, uint32_t now) const {
+    // Unsigned differences stay correct across the millis() wrap
+    switch (guard) {
+        case HVAC_GUARD_MIN_OFF:
+            return !_hasRun || now - _offSince >= config.minOffMs;
+        case HVAC_GUARD_MIN_ON:
+            return now - _runSince >= config.minOnMs;
+        case HVAC_GUARD_STAGE1:
+            return now - _stateSince >= config.stage1MinRuntimeMs;
+        case HVAC_GUARD_STAGE2:
+            return now - _stateSince >= config.stage2MinRuntimeMs;
+        default:
+            return true;
+    }
+}
+
+void HvacEngine::enter(HvacState state, uint32_t now) {
+    if (_state == HVAC_IDLE) {
+        _runSince = now;
+        _cycles++;
+    } else if (state == HVAC_IDLE) {
+        _offSince = now;
+        _hasRun = true;
+    }
+    _state = state;
+    _stateSince = now;
+}
+
+uint8_t HvacEngine::relaysFor(const HvacInputs& in, const HvacConfig& config) const {
+    uint8_t relays = 0;
+    switch (_state) {
+        case HVAC_HEAT_STAGE1:
+            relays = HVAC_RELAY_HEAT1 | (config.reversingValve ? HVAC_RELAY_HEAT2 : 0);
+            break;
+        case HVAC_HEAT_STAGE2:
+            relays = HVAC_RELAY_HEAT1 | HVAC_RELAY_HEAT2;
+            break;
+        case HVAC_COOL_STAGE1:
+            relays = HVAC_RELAY_COOL1;
+            break;
+        case HVAC_COOL_STAGE2:
+            relays = HVAC_RELAY_COOL1 | HVAC_RELAY_COOL2;
+            break;
+        default:
+            break;
+    }
+    // Manual "on" always wins; otherwise we only run the fan with heat/cool when the HVAC needs us to
+    if (in.fanMode == HVAC_FAN_ON || (running() && config.fanRelayNeeded)) {
+        relays |= HVAC_RELAY_FAN;
+    }
+    return relays;
+}
+
+HvacMode HvacEngine::modeFromString(const char* mode) {
+    if (strcmp(mode, "heat") == 0) return HVAC_MODE_HEAT;
+    if (strcmp(mode, "cool") == 0) return HVAC_MODE_COOL;
+    if (strcmp(mode, "auto") == 0) return HVAC_MODE_AUTO;
+    return HVAC_MODE_OFF;
+}
+
+HvacFanMode HvacEngine::fanModeFromString(const char* fanMode) {
+    if (strcmp(fanMode, "on") == 0) return HVAC_FAN_ON;
+    if (strcmp(fanMode, "cycle") == 0) return HVAC_FAN_CYCLE;
+    return HVAC_FAN_AUTO;
+}
+
+const char* HvacEngine::stateName(HvacState state) {
+    static const char* const NAMES[HVAC_STATE_COUNT] = {"idle", "heat1", "heat2", "cool1", "cool2"};
+    return state < HVAC_STATE_COUNT ? NAMES[state] : "?";
+}
+
+const char* HvacEngine::eventName(HvacEvent event) {
+    static const char* const NAMES[HVAC_EVENT_COUNT] = {
+        "hold", "heat call", "cool call", "stage 2 call", "stage 2 clear", "satisfied", "force off"};
+    return event < HVAC_EVENT_COUNT ? NAMES[event] : "?";
+}
+
+const char* HvacEngine::guardName(HvacGuard guard) {
+    switch (guard) {
+        case HVAC_GUARD_MIN_OFF: return "min off time";
+        case HVAC_GUARD_MIN_ON: return "min on time";
+        case HVAC_GUARD_STAGE1: return "stage 1 runtime";
+        case HVAC_GUARD_STAGE2: return "stage 2 runtime";
+        default: return "none";
+    }
+}
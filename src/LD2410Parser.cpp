@@ -0,0 +1,111 @@
+/*
+ * LD2410Parser.cpp - Ring-buffered LD2410 radar frame parser implementation
+ */
+
+#include "LD2410Parser.h"
+#include <string.h>
+
+static const uint8_t DATA_HEADER[4] = {0xF4, 0xF3, 0xF2, 0xF1};
+static const uint8_t DATA_FOOTER[4] = {0xF8, 0xF7, 0xF6, 0xF5};
+static const uint8_t ACK_HEADER[4] = {0xFD, 0xFC, 0xFB, 0xFA};
+static const uint8_t ACK_FOOTER[4] = {0x04, 0x03, 0x02, 0x01};
+
+LD2410Parser::LD2410Parser() {
+    reset();
+}
+
+void LD2410Parser::reset() {
+    _head = 0;
+    _tail = 0;
+    memset(&_stats, 0, sizeof(_stats));
+}
+
+size_t LD2410Parser::feed(const uint8_t* data, size_t len) {
+    size_t accepted = 0;
+    while (accepted < len) {
+        size_t contiguous;
+        uint8_t* dest = writeSpace(contiguous);
+        if (contiguous == 0) break;
+        size_t n = len - accepted < contiguous ? len - accepted : contiguous;
+        memcpy(dest, data + accepted, n);
+        commit(n);
+        accepted += n;
+    }
+    countOverflow(len - accepted);
+    return accepted;
+}
+
+uint8_t* LD2410Parser::writeSpace(size_t& contiguous) {
+    size_t index = _head & (LD2410_RING_SIZE - 1);
+    size_t toEnd = LD2410_RING_SIZE - index;
+    size_t space = freeSpace();
+    contiguous = space < toEnd ? space : toEnd;
+    return &_ring[index];
+}
+
+void LD2410Parser::commit(size_t len) {
+    _head += (uint32_t)len;
+}
+
+bool LD2410Parser::matches(size_t offset, const uint8_t* pattern) const {
+    for (size_t i = 0; i < 4; i++) {
+        if (peek(offset + i) != pattern[i]) return false;
+    }
+    return true;
+}
+
+bool LD2410Parser::next(LD2410Frame& frame) {
+    while (buffered() >= 4) {
+        bool isData = matches(0, DATA_HEADER);
+        bool isAck = !isData && matches(0, ACK_HEADER);
+        if (!isData && !isAck) {
+            skip(1);
+            _stats.resyncBytes++;
+            continue;
+        }
+
+        if (buffered() < 6) return false;
+        size_t len = peek16(4);
+        if (len < 2 || len > LD2410_MAX_PAYLOAD) {
+            skip(1);
+            _stats.badFrames++;
+            continue;
+        }
+        if (buffered() < len + LD2410_FRAME_OVERHEAD) return false;
+
+        if (!matches(6 + len, isData ? DATA_FOOTER : ACK_FOOTER)) {
+            skip(1);
+            _stats.badFrames++;
+            continue;
+        }
+        if (isAck) {
+            skip(len + LD2410_FRAME_OVERHEAD);
+            _stats.ackFrames++;
+            continue;
+        }
+
+        // Payload: type, 0xAA, target data..., 0x55, 0x00 (the protocol has no real checksum)
+        uint8_t type = peek(6);
+        if (len < 13 || (type != 0x01 && type != 0x02) || peek(7) != 0xAA ||
+            peek(6 + len - 2) != 0x55 || peek(6 + len - 1) != 0x00) {
+            skip(1);
+            _stats.badFrames++;
+            continue;
+        }
+        decode(frame);
+        skip(len + LD2410_FRAME_OVERHEAD);
+        _stats.frames++;
+        return true;
+    }
+    return false;
+}
+
+void LD2410Parser::decode(LD2410Frame& frame) const {
+    frame.engineering = peek(6) == 0x01;
+    frame.targetState = peek(8) & (LD2410_TARGET_MOVING | LD2410_TARGET_STATIONARY);
+    frame.movingDistance = peek16(9);
+    frame.movingSignal = peek(11);
+    frame.stationaryDistance = peek16(12);
+    frame.stationarySignal = peek(14);
+    frame.detectionDistance = peek16(15);
+}
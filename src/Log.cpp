@@ -0,0 +1,111 @@
+/*
+ * Log.cpp - Leveled, categorized logging implementation
+ */
+
+#include "Log.h"
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <strings.h>
+
+static const char* const LOG_CATEGORY_NAMES[LOG_CAT_COUNT] = {
+    "system", "sensor", "hvac", "schedule", "display", "motion",
+    "wifi", "mqtt", "web", "weather", "ota", "history",
+};
+
+static const char* const LOG_LEVEL_NAMES[] = {
+    "none", "error", "warn", "info", "debug", "verbose",
+};
+
+volatile uint8_t logLevels[LOG_CAT_COUNT] = {
+    LOG_LEVEL_DEFAULT,  // system
+    LOG_LEVEL_DEFAULT,  // sensor
+    LOG_LEVEL_DEFAULT,  // hvac
+    LOG_LEVEL_DEFAULT,  // schedule
+    LOG_LEVEL_DEFAULT,  // display
+    LOG_LEVEL_DEFAULT,  // motion
+    LOG_LEVEL_DEFAULT,  // wifi
+    LOG_LEVEL_DEFAULT,  // mqtt
+    LOG_LEVEL_DEFAULT,  // web
+    LOG_LEVEL_DEFAULT,  // weather
+    LOG_LEVEL_DEFAULT,  // ota
+    LOG_LEVEL_DEFAULT,  // history
+};
+
+const char* logCategoryName(int category) {
+    return category >= 0 && category < LOG_CAT_COUNT ? LOG_CATEGORY_NAMES[category] : "?";
+}
+
+const char* logLevelName(int level) {
+    return level >= LOG_LEVEL_NONE && level <= LOG_LEVEL_VERBOSE ? LOG_LEVEL_NAMES[level] : "?";
+}
+
+int logCategoryFromName(const char* name) {
+    for (int i = 0; i < LOG_CAT_COUNT; i++) {
+        if (strcasecmp(name, LOG_CATEGORY_NAMES[i]) == 0) return i;
+    }
+    return -1;
+}
+
+int logLevelFromName(const char* name) {
+    if (name[0] >= '0' && name[0] <= '0' + LOG_LEVEL_VERBOSE && name[1] == '\0') return name[0] - '0';
+    for (int i = LOG_LEVEL_NONE; i <= LOG_LEVEL_VERBOSE; i++) {
+        if (strcasecmp(name, LOG_LEVEL_NAMES[i]) == 0) return i;
+    }
+    if (strcasecmp(name, "warning") == 0) return LOG_LEVEL_WARN;
+    return -1;
+}
+
+bool logApplySetting(const char* setting) {
+    uint8_t levels[LOG_CAT_COUNT];
+    for (int i = 0; i < LOG_CAT_COUNT; i++) levels[i] = logLevels[i];
+
+    char item[32];
+    int items = 0;
+    const char* p = setting;
+    while (*p) {
+        size_t len = strcspn(p, ", \t\r\n");
+        if (len == 0) {
+            p++;
+            continue;
+        }
+        if (len >= sizeof(item)) return false;
+        memcpy(item, p, len);
+        item[len] = '\0';
+        p += len;
+        items++;
+
+        char* equals = strchr(item, '=');
+        const char* levelName = equals ? equals + 1 : item;
+        int level = logLevelFromName(levelName);
+        if (level < 0) return false;
+        if (equals == NULL) {
+            for (int i = 0; i < LOG_CAT_COUNT; i++) levels[i] = level;
+            continue;
+        }
+        *equals = '\0';
+        if (strcasecmp(item, "all") == 0) {
+            for (int i = 0; i < LOG_CAT_COUNT; i++) levels[i] = level;
+            continue;
+        }
+        int category = logCategoryFromName(item);
+        if (category < 0) return false;
+        levels[category] = level;
+    }
+    if (items == 0) return false;
+
+    for (int i = 0; i < LOG_CAT_COUNT; i++) logLevels[i] = levels[i];
+    return true;
+}
+
+size_t logFormatLevels(char* out, size_t size) {
+    size_t n = 0;
+    if (size) out[0] = '\0';
+    for (int i = 0; i < LOG_CAT_COUNT; i++) {
+        int written = snprintf(out + n, size > n ? size - n : 0, "%s%s=%s", i ? "," : "",
+                               LOG_CATEGORY_NAMES[i], logLevelName(logLevels[i]));
+        if (written < 0) break;
+        n += written;
+    }
+    return n;
+}
@@ -41,15 +41,26 @@
 #include <time.h>
 #include <ArduinoJson.h> // Include the ArduinoJson library
 #include <OneWire.h>
-#include <MyLD2410.h> // LD2410 radar library
-#include "WebInterface.h"
+#include <MyLD2410.h> // LD2410 radar library (setup/configuration only)
+#include "WebAssets.h" // Gzipped pages generated from web/ by web_assets.py
 #include "WebPages.h"
 #include <DallasTemperature.h>
 #include <Update.h> // For OTA firmware update
+#include "mbedtls/sha256.h" // OTA image integrity check
 #include "esp_heap_caps.h" // Heap diagnostics
 #include "Weather.h" // Weather integration module
 #include "HardwarePins.h" // Hardware pin definitions
 #include "SettingsUI.h"
+#include "JobScheduler.h" // Periodic job scheduler for loop()
+#include "DiagnosticsHistory.h" // Runtime diagnostics time series
+#include "SensorFilter.h" // Outlier rejection / median / EMA for sensor readings
+#include "LD2410Parser.h" // Ring-buffered LD2410 frame parser for the radar task
+#include "HvacEngine.h" // Table-driven relay state machine used by controlRelays()
+#include "MqttOutbox.h" // Coalescing outbound MQTT queue drained by the MQTT task
+#include "HistoryStore.h" // LittleFS temperature/humidity/runtime history for /api/history
+#include "MemoryPolicy.h" // PSRAM placement of large, rarely touched buffers
+#include "BootProfiler.h" // Timestamped startup phases (/api/boot)
+#include "Log.h" // Leveled, categorized logging (LOG_E..LOG_V), runtime levels via /api/log and MQTT
 
 // Version control information
 const String sw_version = "1.4.001"; // Software version
@@ -125,10 +136,23 @@ unsigned long lastWakeTime = 0; // Last time display woke from sleep
 MyLD2410 radar(Serial2);
 bool motionDetected = false;
 unsigned long lastMotionTime = 0;
-bool ld2410Connected = false;
+volatile bool ld2410Connected = false; // Set by bootRadarTask once the radar task is running
 bool motionWakeEnabled = true; // Disable until sensor configuration verified working (disabled due to false positives)
 unsigned long lastSleepTime = 0; // Last time display went to sleep
-unsigned long radarDataTimestamp = 0; // Timestamp when radar data was last updated by readMotionSensor()
+unsigned long radarDataTimestamp = 0; // Timestamp of the last frame decoded by radarTaskFunction()
+
+// Radar frames are parsed by their own task, woken by Serial2.onReceive(). It keeps the latest
+// frame in radarFrame (radarSensorMutex) and queues presence changes for readMotionSensor().
+struct PresenceEdge {
+    bool present;                // New presence state
+    LD2410Frame frame;           // Frame that caused the change
+    unsigned long timeMs;        // millis() when it was decoded
+};
+LD2410Parser radarParser;                 // Owned by radarTaskFunction
+LD2410Frame radarFrame = {};              // Latest decoded frame
+QueueHandle_t presenceEdgeQueue = NULL;   // PresenceEdge items, radar task -> loop
+TaskHandle_t radarTask = NULL;
+volatile uint32_t presenceEdgesDropped = 0; // Edges lost because the queue was full
 const unsigned long MOTION_WAKE_COOLDOWN = 5000; // Don't wake from motion for 5 seconds after sleep
 const unsigned long MOTION_WAKE_DEBOUNCE = 2000; // Require 2 seconds of sustained motion to filter brief blips
 const int MOTION_WAKE_MAX_DISTANCE = 100; // Only wake on motion within 100cm (close range only)
@@ -151,9 +175,9 @@ Weather weather; // Weather object
 // Hybrid staging settings
 unsigned long stage1MinRuntime = 300; // Default minimum runtime for first stage in seconds (5 minutes)
 float stage2TempDelta = 2.0; // Default temperature delta for second stage activation
-unsigned long stage1StartTime = 0; // Time when stage 1 was activated
-unsigned long stage2StartTime = 0; // Time when stage 2 was activated (for min runtime tracking)
 const unsigned long STAGE2_MIN_RUNTIME = 60000; // Minimum 60 seconds before stage 2 can deactivate
+const unsigned long HVAC_MIN_ON_TIME = 180000; // Shortest heat/cool run ended by temperature (3 minutes)
+const unsigned long HVAC_MIN_OFF_TIME = 300000; // Idle time before heat/cool may restart (5 minute compressor delay)
 bool stage1Active = false; // Flag to track if stage 1 is active
 bool stage2Active = false; // Flag to track if stage 2 is active
 bool stage2HeatingEnabled = false; // Enable/disable 2nd stage heating
@@ -162,9 +186,58 @@ bool reversingValveEnabled = false; // Enable reversing valve (heat pump) - mutu
 
 // Globals
 AsyncWebServer server(80);
+AsyncEventSource events("/events"); // Server-Sent Events push of live state (see jobPushState)
 TFT_eSPI tft = TFT_eSPI();
+TFT_eSprite* frameSprite = NULL; // Full-screen back buffer, only created in PSRAM (see beginFrame)
+bool frameSpriteTried = false;   // Creation attempted (no retries after a failure)
 WiFiClient espClient;
-PubSubClient mqttClient(espClient); // Initialize the MQTT client
+PubSubClient mqttClient(espClient); // Initialize the MQTT client (only used by the MQTT task)
+
+// MQTT connection manager (see mqttTaskFunction)
+// The MQTT task owns mqttClient: it connects with exponential backoff, keeps the session alive
+// and drains mqttOutbox. Everything else publishes through mqttPublish(), which only queues
+// (latest payload per topic wins while the broker is down). Received messages are copied into
+// mqttInboxQueue and handled on the loop, where the settings live.
+struct MqttInbound {
+    char* data;                  // "topic\0payload\0" in one heap block
+    unsigned int length;         // Payload length
+};
+const unsigned long MQTT_BACKOFF_MIN_MS = 2000;   // First retry after a failed connect
+const unsigned long MQTT_BACKOFF_MAX_MS = 60000;  // Retry interval cap while the broker stays down
+const int MQTT_SOCKET_TIMEOUT_S = 5;              // TCP connect / CONNACK wait (only blocks the MQTT task)
+const int MQTT_FLUSH_BATCH = 8;                   // Queued messages sent per task wake
+MqttOutbox mqttOutbox;                            // Pending publishes (mqttOutboxMutex)
+SemaphoreHandle_t mqttOutboxMutex = NULL;
+QueueHandle_t mqttInboxQueue = NULL;              // MqttInbound items, MQTT task -> loop
+TaskHandle_t mqttTask = NULL;
+volatile bool mqttConnected = false;              // Broker session up (set by the MQTT task)
+volatile bool mqttSessionStarted = false;         // New session - loop republishes discovery and state
+// A session's republish (~90 discovery configs plus the state topics) is larger than the outbox.
+// loop() runs it in passes (runMQTTRepublish) that queue only what fits without evicting; the
+// next pass starts once the MQTT task has drained the outbox and skips what is already queued.
+enum MqttRepublishPhase { MQTT_REPUBLISH_IDLE, MQTT_REPUBLISH_DISCOVERY, MQTT_REPUBLISH_STATE };
+MqttRepublishPhase mqttRepublishPhase = MQTT_REPUBLISH_IDLE;
+TaskHandle_t mqttRepublishTask = NULL;            // Task running a republish pass (mqttPublish() never evicts for it)
+uint16_t mqttRepublishQueued = 0;                 // Discovery publishes queued by earlier passes
+uint16_t mqttRepublishSeen = 0;                   // Discovery publishes made in this pass
+bool mqttRepublishFull = false;                   // This pass ran out of outbox room
+volatile uint32_t mqttInboxDropped = 0;           // Received messages lost because the queue was full
+
+// Broker settings as the MQTT task sees them. mqttServer/mqttUsername/mqttPassword/hostname are
+// Strings edited by the web handlers and the keyboard; publishMQTTConfig() copies them here under
+// mqttConfigMutex and the MQTT task takes its own copy (mqttTaskConfig) before each connect.
+struct MqttConfig {
+    char server[64];
+    int port;
+    char username[64];
+    char password[64];
+    char clientId[33];           // hostname - also the topic prefix
+};
+MqttConfig mqttConfig;                            // Latest published settings (mqttConfigMutex)
+SemaphoreHandle_t mqttConfigMutex = NULL;
+volatile uint32_t mqttConfigVersion = 0;          // Bumped when the published settings change (mqttConfigMutex)
+MqttConfig mqttTaskConfig;                        // MQTT task's copy - setServer() keeps a pointer into it
+uint32_t mqttTaskConfigVersion = 0;               // Version the MQTT task is connected with
 Preferences preferences; // Preferences instance
 String inputText = "";
 bool isEnteringSSID = true;
@@ -258,6 +331,7 @@ bool coolingOn = false;
 bool fanOn = false;
 String thermostatMode = "off"; // Default thermostat mode
 String fanMode = "auto"; // Default fan mode
+HvacEngine hvacEngine; // Relay state machine; thermostatMode/fanMode are mapped to its enums each tick
 
 // 7-Day Scheduling System (structures defined in WebPages.h)
 DaySchedule weekSchedule[7] = {
@@ -281,7 +355,8 @@ bool scheduleEnabled = false;        // Master schedule enable/disable
 bool scheduleOverride = false;       // Temporary override active
 const unsigned long scheduleOverrideDuration = 120; // Override duration in minutes (2 hours)
 unsigned long overrideEndTime = 0;   // When override expires (0 = permanent)
-String activePeriod = "manual";      // Current active period: "day", "night", "manual"
+String activePeriod = "manual";      // Current active period: "day", "night", "period3".."period6", "manual"
+ScheduleEngine scheduleEngine;       // Compiled weekly transition table (rebuilt when the schedule changes)
 bool scheduleUpdatedFlag = false;    // Flag to indicate schedule needs to be saved
 
 // AHT20 sensor calibration offsets
@@ -308,18 +383,44 @@ bool forceFullDisplayRefresh = false;
 float previousHydronicTemp = 0.0;
 bool ds18b20SensorPresent = false;
 
+// Sensor conversions run asynchronously: startSensorConversions() kicks off the DS18B20 and BME680
+// measurements together, the sensor task sleeps (without holding i2cMutex) until the later one is
+// done, then collects both. 0 means no conversion in flight.
+const unsigned long SENSOR_CYCLE_MS = 5000;   // Sensor task period
+unsigned long ds18b20ReadyAt = 0;             // millis() when the pending DS18B20 conversion completes
+unsigned long bme680ReadyAt = 0;              // millis() when the pending BME680 measurement completes
+
 // Function prototypes
 void setupWiFi();
 void controlRelays(float currentTemp);
 void handleWebRequests();
+void sendWebAsset(AsyncWebServerRequest *request, const WebAsset* asset);
+void sendColdBuffer(AsyncWebServerRequest *request, const char* contentType, char* body, size_t len);
+void sendStateJson(AsyncWebServerRequest *request, bool liveOnly);
+void sendLogLevels(AsyncWebServerRequest *request);
+void buildLiveState(JsonDocument& doc);
+void jobPushState();
+void jobHistory();
+void bootRadarTask(void *parameter);
+void bootStorageTask(void *parameter);
+void onWiFiGotIP(WiFiEvent_t event, WiFiEventInfo_t info);
 void updateDisplay(float currentTemp, float currentHumidity);
 void saveSettings();
 void loadSettings();
+bool setLogLevels(const char* setting);
+void publishMQTTConfig();
 void setupMQTT();
-void reconnectMQTT();
+bool reconnectMQTT();
+void mqttTaskFunction(void *parameter);
+void flushMQTTOutbox();
+void runMQTTRepublish();
+bool mqttPublish(const char* topic, const char* payload, bool retained = false);
+void handleMQTTMessage(char* topic, byte* payload, unsigned int length);
 float convertCtoF(float celsius);
 void controlFanSchedule();
 void saveWiFiSettings();
+TFT_eSPI& beginFrame();
+void endFrame();
 void drawKeyboard(bool isUpperCaseKeyboard);
 void handleKeyPress(int row, int col);
 void drawButtons();
@@ -338,8 +439,9 @@ void readLightSensor();
 void updateDisplayBrightness();
 
 // Schedule function prototypes
+bool scheduleCheckDue();
 void checkSchedule();
-void applySchedule(int dayOfWeek, bool isDayPeriod);
+void applySchedule(int dayOfWeek, int periodIndex);
 void saveScheduleSettings();
 void loadScheduleSettings();
 String getCurrentPeriod();
@@ -353,6 +455,7 @@ void sleepDisplay();
 bool testLD2410Connection();
 bool configureLD2410Sensitivity();
 void readMotionSensor();
+void radarTaskFunction(void *parameter);
 void updateStatusLEDs();
 void setHeatLED(bool state);
 void setCoolLED(bool state);
@@ -360,15 +463,19 @@ void setFanLED(bool state);
 void buzzerBeep(int duration = 125);
 void buzzerStartupTone();
 void publishHomeAssistantDiscovery();
-void turnOffAllRelays();
-void activateHeating();
-void activateCooling();
-void handleFanControl();
+HvacConfig hvacConfig();
+void updateHydronicLockout();
+void applyHvacOutputs(HvacState previous);
+uint8_t readRelayPins();
 
 // Sensor abstraction function prototypes
 SensorType detectSensor();
+SensorType startSensor();
 bool initializeSensor(SensorType sensor);
 bool readTemperatureHumidity(float &temp, float &humidity, float &pressure);
+unsigned long startSensorConversions();
+void waitForConversion(unsigned long readyAt);
+void readHydronicTemperature();
 
 // Option C - Centralized Display Update System
 void displayUpdateTaskFunction(void* parameter);
@@ -385,6 +492,8 @@ SemaphoreHandle_t nvsSaveMutex = NULL; // Protect NVS/preferences save operation
 
 // Diagnostics
 void logRuntimeDiagnostics();
+void setupLoopJobs();
+void scheduleRestart(uint32_t delayMs, const char* reason);
 
 // Display indicator states (managed centrally)
 struct DisplayIndicators {
@@ -401,6 +510,7 @@ uint16_t calibrationData[5] = { 300, 3700, 300, 3700, 7 }; // Example calibratio
 
 float currentTemp = 0.0;
 float currentHumidity = 0.0;
+volatile bool sensorReadingValid = false;    // currentTemp/currentHumidity come from a recent good read
 bool isUpperCaseKeyboard = true;
 float previousTemp = 0.0;
 float previousHumidity = 0.0;
@@ -417,13 +527,22 @@ float mqttLastSetTempAuto = 0.0;
 String mqttLastThermostatMode = "";
 String mqttLastFanMode = "";
 String mqttLastAction = "";
-
-// Temperature and humidity filtering (exponential moving average)
-float filteredTemp = 0.0;              // EMA-filtered temperature
-float filteredHumidity = 0.0;          // EMA-filtered humidity
-const float tempEMAAlpha = 0.1;        // Temperature smoothing factor (0.1 = 10% new, 90% previous)
-const float humidityEMAAlpha = 0.15;   // Humidity smoothing factor (0.15 = 15% new, 85% previous)
-bool firstSensorReading = true;        // Flag to initialize filters on first read
+String mqttLastHvacState = "";
+int mqttLastFanState = -1;
+float mqttLastOutdoorTemp = 0.0;
+
+// Sensor filtering: Hampel outlier rejection -> median -> EMA (see SensorFilter.h)
+// Filters see raw readings in Celsius, before calibration offsets and unit conversion,
+// so changing either setting does not look like a jump in the data.
+//                                                  window, hampelK, minDeviation, emaAlpha
+const SensorFilterConfig TEMP_FILTER_CONFIG           = {5, 3.0, 0.1, 0.1};   // 0.1 = 10% new, 90% previous
+const SensorFilterConfig HUMIDITY_FILTER_CONFIG       = {5, 3.0, 0.5, 0.15};  // 0.15 = 15% new, 85% previous
+const SensorFilterConfig DHT11_TEMP_FILTER_CONFIG     = {7, 3.0, 0.5, 0.1};   // DHT11 reads whole degrees and is noisier
+const SensorFilterConfig DHT11_HUMIDITY_FILTER_CONFIG = {7, 3.0, 1.0, 0.15};
+const SensorFilterConfig HYDRONIC_FILTER_CONFIG       = {3, 3.0, 0.25, 1.0};  // No EMA lag on the hydronic interlock
+SensorFilter tempFilter(TEMP_FILTER_CONFIG);
+SensorFilter humidityFilter(HUMIDITY_FILTER_CONFIG);
+SensorFilter hydronicFilter(HYDRONIC_FILTER_CONFIG);
 
 // OTA progress tracking (server-side fallback)
 volatile size_t otaBytesWritten = 0;      // Bytes written so far during current OTA
@@ -433,59 +552,98 @@ volatile bool otaRebooting = false;       // Set after successful end before reb
 volatile bool systemRebootInProgress = false; // Prevent multiple reboot requests
 unsigned long otaStartTime = 0;           // millis() when OTA began
 unsigned long otaLastUpdateLog = 0;       // For throttled serial logging
+mbedtls_sha256_context otaSha256Ctx;      // SHA-256 of the image, updated as chunks stream in
+String otaExpectedSha256 = "";            // From X-Firmware-SHA256 header or ?sha256= (empty = not checked)
+char otaComputedSha256[65] = "";          // Hex digest of the last upload
+bool otaHashMismatch = false;             // Image rejected before Update.end() because the hash differed
+
+// Main loop periodic jobs (registered in setupLoopJobs)
+JobScheduler loopJobs;                    // Min-heap of named periodic jobs
+int mqttDataJobId = -1;                   // Postponed after immediate MQTT feedback
+const uint32_t LOOP_MAX_IDLE_MS = 20;     // Upper bound on loop sleep so touch and MQTT stay responsive
+uint32_t loopIdleMs = 0;                  // Time loop() spent sleeping since last diagnostics report
+uint32_t loopIdleWindowStart = 0;         // millis() when the idle accounting window started
+uint32_t loopPassMaxMs = 0;               // Longest loop() pass in the current second
+uint32_t loopPassWindowStart = 0;         // millis() when that second started
+uint32_t loopLatencyMs = 0;               // Longest loop() pass in the last full second (/api/state system.loopMaxMs)
+DiagnosticsHistory diagHistory;           // Ring buffer of runtime samples served at /api/diag
+HistoryStore history;                     // 1 min / 15 min / 1 h history in LittleFS (/api/history)
+unsigned long lastHistoryReading = 0;     // millis() of the last reading fed to the history
+BootProfiler bootProfiler;                // Startup phase timings, logged as they finish and served at /api/boot
+volatile int bootNetworkPhase = -1;       // "network" phase, open until the first WiFi connection
+bool ntpStarted = false;                  // configTime() called (first WiFi connection)
+const uint32_t SPLASH_MIN_MS = 1500;      // Startup screen time; radar/storage/network boot meanwhile
+
+// Live state push over /events (Server-Sent Events)
+// The sensor task and controlRelays() only set statePushPending; jobPushState() on the loop
+// compares against the last pushed snapshot and sends just the changed fields. Every event
+// carries a sequence id so a browser that misses a delta (queue overflow) resyncs from /api/state.
+struct PushSnapshot {
+    int16_t temp10;                       // Values at the 0.1 resolution the UI shows
+    int16_t humidity10;
+    int16_t hydronic10;
+    uint8_t relays;                       // Bit per relay: heat1, heat2, cool1, cool2, fan
+    String mode;
+    String fanMode;
+};
+const unsigned long STATE_PUSH_KEYFRAME_MS = 60000; // Full state every minute (weather, uptime, heap)
+volatile bool statePushPending = false;   // Set by the sensor task / controlRelays when something may have changed
+uint32_t statePushSeq = 0;                // Id of the last event sent
+PushSnapshot lastPushSnapshot;            // What the clients currently show
+unsigned long lastStateKeyframe = 0;      // millis() of the last full-state broadcast
+PushSnapshot takePushSnapshot();
 
 // Sensor reading task (runs on core 1)
 void sensorTaskFunction(void *parameter) {
     unsigned long lastSensorError = 0;
     const unsigned long SENSOR_ERROR_COOLDOWN = 30000; // 30 second cooldown between reinits
+    TickType_t lastWake = xTaskGetTickCount();
     
     for (;;) {
-        // Read sensor every 60 seconds to minimize processing load
         float tempReading, humidityReading, pressureReading;
         
-        // Try to read sensor using abstraction layer
+        // Start the slow conversions first so they overlap each other and the fast reads below
+        startSensorConversions();
+        
+        // Try to read sensor using abstraction layer (BME680 collects its pending measurement)
         bool readSuccess = readTemperatureHumidity(tempReading, humidityReading, pressureReading);
         
         if (!readSuccess) {
-            debugLog("[SENSOR] Read failed!\n");
+            LOG_E(SENSOR, "[SENSOR] Read failed!\n");
             
             // Try to reinitialize if cooldown has passed
             unsigned long now = millis();
             if (now - lastSensorError > SENSOR_ERROR_COOLDOWN) {
-                debugLog("[SENSOR] Attempting %s reinit...\n", sensorName.c_str());
+                LOG_I(SENSOR, "[SENSOR] Attempting %s reinit...\n", sensorName.c_str());
                 if (initializeSensor(activeSensor)) {
-                    debugLog("[SENSOR] %s reinitialized successfully\n", sensorName.c_str());
+                    LOG_I(SENSOR, "[SENSOR] %s reinitialized successfully\n", sensorName.c_str());
                 } else {
-                    debugLog("[SENSOR] %s reinit failed\n", sensorName.c_str());
+                    LOG_E(SENSOR, "[SENSOR] %s reinit failed\n", sensorName.c_str());
                 }
                 lastSensorError = now;
             }
+            readHydronicTemperature(); // Don't leave the DS18B20 conversion pending
+            sensorReadingValid = false;
             vTaskDelay(pdMS_TO_TICKS(60000));
+            lastWake = xTaskGetTickCount();
             continue;
         }
         
-        // Apply calibration offsets
-        float calibratedTemp = getCalibratedTemperature(tempReading);
-        float calibratedHumidity = getCalibratedHumidity(humidityReading);
-        
-        float newTemp = useFahrenheit ? (calibratedTemp * 9.0 / 5.0 + 32.0) : calibratedTemp;
-        float newHumidity = calibratedHumidity;
-        
         // Update globals if valid
-        if (!isnan(newTemp) && !isnan(newHumidity)) {
-            // Apply exponential moving average filtering for smoother readings
-            if (firstSensorReading) {
-                filteredTemp = newTemp;
-                filteredHumidity = newHumidity;
-                firstSensorReading = false;
-            } else {
-                // EMA filter: smoothed_value = alpha * new_value + (1 - alpha) * previous_value
-                filteredTemp = (tempEMAAlpha * newTemp) + ((1.0 - tempEMAAlpha) * filteredTemp);
-                filteredHumidity = (humidityEMAAlpha * newHumidity) + ((1.0 - humidityEMAAlpha) * filteredHumidity);
+        if (!isnan(tempReading) && !isnan(humidityReading)) {
+            // Filter the raw readings (a single bad read is replaced by the window median),
+            // then apply calibration offsets and unit conversion
+            uint32_t rejectedBefore = tempFilter.rejectedCount() + humidityFilter.rejectedCount();
+            float calibratedTemp = getCalibratedTemperature(tempFilter.update(tempReading));
+            float calibratedHumidity = getCalibratedHumidity(humidityFilter.update(humidityReading));
+            if (tempFilter.rejectedCount() + humidityFilter.rejectedCount() != rejectedBefore) {
+                LOG_I(SENSOR, "[SENSOR] Outlier rejected (raw %.2fC, %.1f%%)\n", tempReading, humidityReading);
             }
             
-            currentTemp = filteredTemp;
-            currentHumidity = filteredHumidity;
+            currentTemp = useFahrenheit ? (calibratedTemp * 9.0 / 5.0 + 32.0) : calibratedTemp;
+            currentHumidity = calibratedHumidity;
+            sensorReadingValid = true;
+            statePushPending = true;
             
             // Update pressure if BME280/BME680 sensor and valid reading
             if ((activeSensor == SENSOR_BME280 || activeSensor == SENSOR_BME680) && !isnan(pressureReading)) {
@@ -494,29 +652,19 @@ void sensorTaskFunction(void *parameter) {
         }
         
         // Read DS18B20 hydronic temperature sensor if present
-        if (ds18b20SensorPresent) {
-            ds18b20.requestTemperatures();
-            float hydTempC = ds18b20.getTempCByIndex(0);
-            if (hydTempC != DEVICE_DISCONNECTED_C && hydTempC != -127.0 && !isnan(hydTempC)) {
-                // Valid reading - convert to Fahrenheit if needed
-                hydronicTemp = useFahrenheit ? (hydTempC * 9.0 / 5.0 + 32.0) : hydTempC;
-            } else {
-                // Invalid reading - keep last valid reading, don't update
-                debugLog("[WARNING] DS18B20 sensor reading failed or disconnected\n");
-            }
-        }
+        readHydronicTemperature();
         
-        // Control HVAC relays
+        // Control HVAC relays with the readings just collected
         controlRelays(currentTemp);
         
-        // 5 second delay for responsive control while minimizing CPU load
-        vTaskDelay(5000 / portTICK_PERIOD_MS);
+        // Fixed 5 second cadence: conversion time no longer stretches the cycle
+        vTaskDelayUntil(&lastWake, pdMS_TO_TICKS(SENSOR_CYCLE_MS));
     }
 }
 
 // Option C: Centralized Display Update Task
 void displayUpdateTaskFunction(void* parameter) {
-    debugLog("DISPLAY_TASK: Starting centralized display update task\n");
+    LOG_I(DISPLAY, "DISPLAY_TASK: Starting centralized display update task\n");
     
     for (;;) {
         // Check if display update is required or if enough time has passed
@@ -529,9 +677,9 @@ void displayUpdateTaskFunction(void* parameter) {
             
             if (updateNeeded) {
                 if (displayUpdateRequired) {
-                    debugLog("[DISPLAY_TASK] Flag-triggered update\n");
+                    LOG_D(DISPLAY, "[DISPLAY_TASK] Flag-triggered update\n");
                 } else {
-                    debugLog("[DISPLAY_TASK] Timer-triggered update\n");
+                    LOG_D(DISPLAY, "[DISPLAY_TASK] Timer-triggered update\n");
                 }
                 displayUpdateRequired = false;  // Clear the flag
                 displayIndicators.lastUpdate = currentTime;
@@ -551,7 +699,7 @@ void displayUpdateTaskFunction(void* parameter) {
 
 // Update display indicators based on current system state
 void updateDisplayIndicators() {
-    debugLog("DISPLAY_UPDATE: Refreshing display indicators\n");
+    LOG_D(DISPLAY, "DISPLAY_UPDATE: Refreshing display indicators\n");
     
     // Take mutex to read system state safely
     if (xSemaphoreTake(displayUpdateMutex, pdMS_TO_TICKS(50)) == pdTRUE) {
@@ -573,20 +721,15 @@ void updateDisplayIndicators() {
         setCoolLED(coolingOn);  
         setFanLED(fanOn);
         
-        debugLog("DISPLAY_UPDATE: Heat=");
-        Serial.print(displayIndicators.heatIndicator ? "ON" : "OFF");
-        debugLog(", Cool=");
-        Serial.print(displayIndicators.coolIndicator ? "ON" : "OFF");
-        debugLog(", Fan=");
-        Serial.print(displayIndicators.fanIndicator ? "ON" : "OFF");
-        debugLog(", Auto=");
-        Serial.print(displayIndicators.autoIndicator ? "ON" : "OFF");
-        debugLog(", Stage1=");
-        Serial.print(displayIndicators.stage1Indicator ? "ON" : "OFF");
-        debugLog(", Stage2=");
-        Serial.println(displayIndicators.stage2Indicator ? "ON" : "OFF");
+        LOG_D(DISPLAY, "DISPLAY_UPDATE: Heat=%s, Cool=%s, Fan=%s, Auto=%s, Stage1=%s, Stage2=%s\n",
+                       displayIndicators.heatIndicator ? "ON" : "OFF",
+                       displayIndicators.coolIndicator ? "ON" : "OFF",
+                       displayIndicators.fanIndicator ? "ON" : "OFF",
+                       displayIndicators.autoIndicator ? "ON" : "OFF",
+                       displayIndicators.stage1Indicator ? "ON" : "OFF",
+                       displayIndicators.stage2Indicator ? "ON" : "OFF");
     } else {
-        debugLog("DISPLAY_UPDATE: Failed to take mutex, skipping update\n");
+        LOG_W(DISPLAY, "DISPLAY_UPDATE: Failed to take mutex, skipping update\n");
     }
 }
 
@@ -595,9 +738,9 @@ void setDisplayUpdateFlag() {
     if (xSemaphoreTake(displayUpdateMutex, pdMS_TO_TICKS(10)) == pdTRUE) {
         displayUpdateRequired = true;
         xSemaphoreGive(displayUpdateMutex);
-        debugLog("[DISPLAY_FLAG_SET] Display update requested from controlRelays\n");
+        LOG_D(DISPLAY, "[DISPLAY_FLAG_SET] Display update requested from controlRelays\n");
     } else {
-        debugLog("[DISPLAY_FLAG_FAILED] Could not acquire mutex\n");
+        LOG_W(DISPLAY, "[DISPLAY_FLAG_FAILED] Could not acquire mutex\n");
     }
 }
 
@@ -607,48 +750,48 @@ void setDisplayUpdateFlag() {
 
 // Auto-detect which sensor is connected
 SensorType detectSensor() {
-    debugLog("[SENSOR] Starting sensor auto-detection...\n");
+    LOG_I(SENSOR, "[SENSOR] Starting sensor auto-detection...\n");
     
     // Initialize I2C bus first
     Wire.begin(I2C_SDA_PIN, I2C_SCL_PIN);
     delay(100);
     
     // Try BME680 first (has more features)
-    debugLog("[SENSOR] Checking for BME680 at I2C address 0x76...\n");
+    LOG_I(SENSOR, "[SENSOR] Checking for BME680 at I2C address 0x76...\n");
     if (bme680.begin(0x76)) {
-        debugLog("[SENSOR] BME680 detected at address 0x76!\n");
+        LOG_I(SENSOR, "[SENSOR] BME680 detected at address 0x76!\n");
         return SENSOR_BME680;
     }
     
-    debugLog("[SENSOR] Checking for BME680 at I2C address 0x77...\n");
+    LOG_I(SENSOR, "[SENSOR] Checking for BME680 at I2C address 0x77...\n");
     if (bme680.begin(0x77)) {
-        debugLog("[SENSOR] BME680 detected at address 0x77!\n");
+        LOG_I(SENSOR, "[SENSOR] BME680 detected at address 0x77!\n");
         return SENSOR_BME680;
     }
     
     // Try AHT20 (I2C address 0x38)
-    debugLog("[SENSOR] Checking for AHT20 at I2C address 0x38...\n");
+    LOG_I(SENSOR, "[SENSOR] Checking for AHT20 at I2C address 0x38...\n");
     if (aht.begin()) {
-        debugLog("[SENSOR] AHT20 detected!\n");
+        LOG_I(SENSOR, "[SENSOR] AHT20 detected!\n");
         return SENSOR_AHT20;
     }
     
     // Try BME280 (I2C addresses 0x76 or 0x77)
-    debugLog("[SENSOR] Checking for BME280 at I2C address 0x76...\n");
+    LOG_I(SENSOR, "[SENSOR] Checking for BME280 at I2C address 0x76...\n");
     if (bme.begin(0x76)) {
-        debugLog("[SENSOR] BME280 detected at address 0x76!\n");
+        LOG_I(SENSOR, "[SENSOR] BME280 detected at address 0x76!\n");
         return SENSOR_BME280;
     }
     
-    debugLog("[SENSOR] Checking for BME280 at I2C address 0x77...\n");
+    LOG_I(SENSOR, "[SENSOR] Checking for BME280 at I2C address 0x77...\n");
     if (bme.begin(0x77)) {
-        debugLog("[SENSOR] BME280 detected at address 0x77!\n");
+        LOG_I(SENSOR, "[SENSOR] BME280 detected at address 0x77!\n");
         return SENSOR_BME280;
     }
     
     // No I2C sensor found, try DHT11 on GPIO35
-    debugLog("[SENSOR] No I2C sensors found, trying DHT11...\n");
-    debugLog("[SENSOR] Disabling I2C, switching GPIO35 to DHT11 mode...\n");
+    LOG_I(SENSOR, "[SENSOR] No I2C sensors found, trying DHT11...\n");
+    LOG_I(SENSOR, "[SENSOR] Disabling I2C, switching GPIO35 to DHT11 mode...\n");
     Wire.end();
     pinMode(I2C_SCL_PIN, INPUT_PULLUP); // Configure GPIO35 as regular GPIO
     dht.begin();
@@ -659,31 +802,31 @@ SensorType detectSensor() {
     float testHum = dht.readHumidity();
     
     if (!isnan(testTemp) && !isnan(testHum)) {
-        debugLog("[SENSOR] DHT11 detected!\n");
+        LOG_I(SENSOR, "[SENSOR] DHT11 detected!\n");
         return SENSOR_DHT11;
     }
     
-    debugLog("[SENSOR] ERROR: No temperature/humidity sensor detected!\n");
+    LOG_E(SENSOR, "[SENSOR] ERROR: No temperature/humidity sensor detected!\n");
     return SENSOR_NONE;
 }
 
 // Initialize the detected sensor
 bool initializeSensor(SensorType sensor) {
-    debugLog("[SENSOR] Initializing %s sensor...\n", 
-                  sensor == SENSOR_AHT20 ? "AHT20" : 
-                  sensor == SENSOR_DHT11 ? "DHT11" : 
-                  sensor == SENSOR_BME280 ? "BME280" :
-                  sensor == SENSOR_BME680 ? "BME680" : "NONE");
+    LOG_I(SENSOR, "[SENSOR] Initializing %s sensor...\n", 
+                       sensor == SENSOR_AHT20 ? "AHT20" : 
+                       sensor == SENSOR_DHT11 ? "DHT11" : 
+                       sensor == SENSOR_BME280 ? "BME280" :
+                       sensor == SENSOR_BME680 ? "BME680" : "NONE");
     
     switch(sensor) {
         case SENSOR_AHT20:
             Wire.begin(I2C_SDA_PIN, I2C_SCL_PIN);
             if (aht.begin()) {
-                debugLog("[SENSOR] AHT20 initialized successfully\n");
+                LOG_I(SENSOR, "[SENSOR] AHT20 initialized successfully\n");
                 sensorName = "AHT20";
                 return true;
             }
-            debugLog("[SENSOR] AHT20 initialization failed\n");
+            LOG_E(SENSOR, "[SENSOR] AHT20 initialization failed\n");
             return false;
             
         case SENSOR_DHT11:
@@ -691,7 +834,7 @@ bool initializeSensor(SensorType sensor) {
             pinMode(I2C_SCL_PIN, INPUT_PULLUP);
             dht.begin();
             delay(2000);
-            debugLog("[SENSOR] DHT11 initialized successfully\n");
+            LOG_I(SENSOR, "[SENSOR] DHT11 initialized successfully\n");
             sensorName = "DHT11";
             return true;
             
@@ -705,11 +848,11 @@ bool initializeSensor(SensorType sensor) {
                                Adafruit_BME280::SAMPLING_X1,  // humidity
                                Adafruit_BME280::FILTER_X16,
                                Adafruit_BME280::STANDBY_MS_500);
-                debugLog("[SENSOR] BME280 initialized successfully\n");
+                LOG_I(SENSOR, "[SENSOR] BME280 initialized successfully\n");
                 sensorName = "BME280";
                 return true;
             }
-            debugLog("[SENSOR] BME280 initialization failed\n");
+            LOG_E(SENSOR, "[SENSOR] BME280 initialization failed\n");
             return false;
             
         case SENSOR_BME680:
@@ -721,11 +864,11 @@ bool initializeSensor(SensorType sensor) {
                 bme680.setPressureOversampling(BME680_OS_4X);
                 bme680.setIIRFilterSize(BME680_FILTER_SIZE_3);
                 bme680.setGasHeater(320, 150); // 320°C heater temp, 150ms heating duration
-                debugLog("[SENSOR] BME680 initialized successfully\n");
+                LOG_I(SENSOR, "[SENSOR] BME680 initialized successfully\n");
                 sensorName = "BME680";
                 return true;
             }
-            debugLog("[SENSOR] BME680 initialization failed\n");
+            LOG_E(SENSOR, "[SENSOR] BME680 initialization failed\n");
             return false;
     }
 }
@@ -780,11 +923,22 @@ bool readTemperatureHumidity(float &temp, float &humidity, float &pressure) {
         }
         
         case SENSOR_BME680: {
+            // No measurement in flight (setup, reinit) - start one and wait for it here
+            if (bme680ReadyAt == 0) {
+                startSensorConversions();
+            }
+            if (bme680ReadyAt == 0) {
+                return false;
+            }
+            waitForConversion(bme680ReadyAt);
+            bme680ReadyAt = 0;
+            
             if (i2cMutex == NULL || xSemaphoreTake(i2cMutex, pdMS_TO_TICKS(100)) != pdTRUE) {
                 return false;
             }
             
-            if (bme680.performReading()) {
+            // Conversion time has already elapsed, so endReading() only fetches the results
+            if (bme680.endReading()) {
                 temp = bme680.temperature;
                 humidity = bme680.humidity;
                 pressure = bme680.pressure / 100.0F; // Convert Pa to hPa
@@ -813,6 +967,55 @@ bool readTemperatureHumidity(float &temp, float &humidity, float &pressure) {
     }
 }
 
+// Start the slow conversions (DS18B20 up to 750 ms, BME680 oversampling + 150 ms gas heater) so they
+// run in parallel. Returns the millis() at which the last one completes, or 0 if nothing started.
+unsigned long startSensorConversions() {
+    unsigned long readyAt = 0;
+    
+    if (activeSensor == SENSOR_BME680 && bme680ReadyAt == 0) {
+        if (i2cMutex != NULL && xSemaphoreTake(i2cMutex, pdMS_TO_TICKS(100)) == pdTRUE) {
+            bme680ReadyAt = bme680.beginReading(); // Returns completion time, 0 on failure
+            xSemaphoreGive(i2cMutex);
+        }
+        readyAt = bme680ReadyAt;
+    }
+    
+    if (ds18b20SensorPresent && ds18b20ReadyAt == 0) {
+        ds18b20.requestTemperatures(); // Returns immediately (setWaitForConversion(false))
+        ds18b20ReadyAt = millis() + ds18b20.millisToWaitForConversion(ds18b20.getResolution());
+    }
+    if (ds18b20ReadyAt != 0 && (readyAt == 0 || (long)(ds18b20ReadyAt - readyAt) > 0)) {
+        readyAt = ds18b20ReadyAt;
+    }
+    return readyAt;
+}
+
+// Sleep until a conversion started by startSensorConversions() is complete
+void waitForConversion(unsigned long readyAt) {
+    long remaining = (long)(readyAt - millis());
+    if (readyAt != 0 && remaining > 0) {
+        vTaskDelay(pdMS_TO_TICKS(remaining));
+    }
+}
+
+// Collect the DS18B20 hydronic temperature started by startSensorConversions()
+void readHydronicTemperature() {
+    if (!ds18b20SensorPresent || ds18b20ReadyAt == 0) return;
+    
+    waitForConversion(ds18b20ReadyAt);
+    ds18b20ReadyAt = 0;
+    float hydTempC = ds18b20.getTempCByIndex(0);
+    if (hydTempC != DEVICE_DISCONNECTED_C && hydTempC != -127.0 && !isnan(hydTempC)) {
+        // Valid reading - filter, then convert to Fahrenheit if needed
+        hydTempC = hydronicFilter.update(hydTempC);
+        hydronicTemp = useFahrenheit ? (hydTempC * 9.0 / 5.0 + 32.0) : hydTempC;
+        statePushPending = true;
+    } else {
+        // Invalid reading - keep last valid reading, don't update
+        LOG_W(SENSOR, "[WARNING] DS18B20 sensor reading failed or disconnected\n");
+    }
+}
+
 // =============================================================================
 // SCHEDULING SYSTEM FUNCTIONS
 // =============================================================================
@@ -833,30 +1036,22 @@ String getCurrentPeriod() {
     return activePeriod;
 }
 
+// True when checkSchedule() has work to do: the compiled table is stale, the
+// next transition time has been reached, or a temporary override just ran out
+bool scheduleCheckDue() {
+    if (!scheduleEnabled) return false;
+    if (scheduleOverride) {
+        return overrideEndTime > 0 && millis() >= overrideEndTime;
+    }
+    return scheduleEngine.isDue(time(nullptr));
+}
+
 // Check if we need to apply a scheduled temperature change
+// Evaluates the compiled weekly transition table and records when the next
+// transition happens, so calls in between return without touching the clock.
 void checkSchedule() {
     if (!scheduleEnabled) return;
     
-    // Ensure timezone is applied
-    tzset();
-    
-    // Get current time
-    time_t now;
-    struct tm timeinfo;
-    time(&now);
-    localtime_r(&now, &timeinfo);
-    
-    int currentHour = timeinfo.tm_hour;
-    int currentMinute = timeinfo.tm_min;
-    int currentDayOfWeek = timeinfo.tm_wday;
-    
-    // Debug: Log current time and schedule status
-    static unsigned long lastDebugLog = 0;
-    if (millis() - lastDebugLog > 60000) { // Log every 60 seconds
-        debugLog("SCHEDULE DEBUG: Current time: %02d:%02d (day %d), TZ: %s, Period: %s\n", 
-                 currentHour, currentMinute, currentDayOfWeek, timeZone.c_str(), activePeriod.c_str());
-        lastDebugLog = millis();
-    }
     bool overrideExpired = false;
     
     // Check if override has expired
@@ -864,63 +1059,62 @@ void checkSchedule() {
         scheduleOverride = false;
         overrideEndTime = 0;
         overrideExpired = true;
-        debugLog("SCHEDULE: Override expired, resuming schedule\n");
+        LOG_I(SCHEDULE, "SCHEDULE: Override expired, resuming schedule\n");
     }
     
     // Skip if override is active
     if (scheduleOverride) return;
     
-    // Skip if this day is not enabled
-    if (!weekSchedule[currentDayOfWeek].enabled) return;
+    time_t now = time(nullptr);
+    if (!overrideExpired && !scheduleEngine.isDue(now)) return;
     
-    DaySchedule& today = weekSchedule[currentDayOfWeek];
+    if (scheduleEngine.isDirty()) {
+        scheduleEngine.compile(weekSchedule);
+        LOG_I(SCHEDULE, "SCHEDULE: Compiled %d weekly transitions\n", scheduleEngine.getTransitionCount());
+    }
     
-    // Convert current time to minutes for easier comparison
-    int currentMinutes = currentHour * 60 + currentMinute;
-    int dayMinutes = today.day.hour * 60 + today.day.minute;
-    int nightMinutes = today.night.hour * 60 + today.night.minute;
+    // Ensure timezone is applied
+    tzset();
     
-    // Determine which period we should be in
-    String newPeriod = "manual";
-    bool shouldApplyDaySchedule = false;
-    bool shouldApplyNightSchedule = false;
+    struct tm timeinfo;
+    localtime_r(&now, &timeinfo);
     
-    if (dayMinutes <= nightMinutes) {
-        // Normal case: day < night (e.g., 6:00 AM - 10:00 PM)
-        if (currentMinutes >= dayMinutes && currentMinutes < nightMinutes) {
-            newPeriod = "day";
-            shouldApplyDaySchedule = true;
-        } else {
-            newPeriod = "night";
-            shouldApplyNightSchedule = true;
-        }
-    } else {
-        // Cross-midnight case: night < day (e.g., 10:00 PM - 6:00 AM next day)
-        if (currentMinutes >= dayMinutes || currentMinutes < nightMinutes) {
-            newPeriod = "day";
-            shouldApplyDaySchedule = true;
-        } else {
-            newPeriod = "night";
-            shouldApplyNightSchedule = true;
-        }
-    }
+    uint16_t weekMinute = timeinfo.tm_wday * SCHEDULE_MINUTES_PER_DAY + timeinfo.tm_hour * 60 + timeinfo.tm_min;
+    const ScheduleTransition& current = scheduleEngine.lookup(weekMinute);
+    
+    // Next transition in local time; mktime() normalizes across days and DST changes
+    struct tm nextInfo = timeinfo;
+    nextInfo.tm_min += scheduleEngine.minutesUntilNext(weekMinute);
+    nextInfo.tm_sec = 0;
+    nextInfo.tm_isdst = -1;
+    time_t nextTransition = mktime(&nextInfo);
+    if (nextTransition <= now) nextTransition = now + 60; // Clock not set yet or DST gap - retry shortly
+    scheduleEngine.setNextEvaluation(now, nextTransition);
+    
+    LOG_D(SCHEDULE, "SCHEDULE: Evaluated at %02d:%02d (day %d), TZ: %s, Period: %s, next transition in %ld s\n",
+                    timeinfo.tm_hour, timeinfo.tm_min, timeinfo.tm_wday, timeZone.c_str(), activePeriod.c_str(),
+                    (long)(nextTransition - now));
+    
+    // Skip if this day is not enabled
+    if (current.periodIndex == SCHEDULE_PERIOD_HOLD) return;
+    
+    const char* newPeriod = ScheduleEngine::periodLabel(current.periodIndex);
     
     // Apply schedule if period changed or an override just ended
-    bool shouldApplySchedule = overrideExpired || (newPeriod != activePeriod);
+    bool shouldApplySchedule = overrideExpired || (activePeriod != newPeriod);
     if (shouldApplySchedule) {
         activePeriod = newPeriod;
-        if (shouldApplyDaySchedule && today.day.active) {
-            applySchedule(currentDayOfWeek, true);
-        } else if (shouldApplyNightSchedule && today.night.active) {
-            applySchedule(currentDayOfWeek, false);
+        if (ScheduleEngine::getPeriod(weekSchedule[current.dayOfWeek], current.periodIndex)->active) {
+            applySchedule(current.dayOfWeek, current.periodIndex);
         }
     }
 }
 
 // Apply scheduled temperatures
-void applySchedule(int dayOfWeek, bool isDayPeriod) {
-    DaySchedule& schedule = weekSchedule[dayOfWeek];
-    SchedulePeriod& period = isDayPeriod ? schedule.day : schedule.night;
+void applySchedule(int dayOfWeek, int periodIndex) {
+    SchedulePeriod* periodPtr = ScheduleEngine::getPeriod(weekSchedule[dayOfWeek], periodIndex);
+    if (periodPtr == nullptr) return;
+    SchedulePeriod& period = *periodPtr;
     
     if (!period.active) return;
     
@@ -929,15 +1123,15 @@ void applySchedule(int dayOfWeek, bool isDayPeriod) {
     setTempCool = period.coolTemp;
     setTempAuto = period.autoTemp;
     
-    debugLog("SCHEDULE: Applied %s schedule for day %d - Heat: %.1f°F, Cool: %.1f°F, Auto: %.1f°F\n", 
-                  isDayPeriod ? "day" : "night", dayOfWeek, setTempHeat, setTempCool, setTempAuto);
+    LOG_I(SCHEDULE, "SCHEDULE: Applied %s schedule for day %d - Heat: %.1f°F, Cool: %.1f°F, Auto: %.1f°F\n", 
+                         ScheduleEngine::periodLabel(periodIndex), dayOfWeek, setTempHeat, setTempCool, setTempAuto);
     
     // Save settings and update MQTT
     saveSettings();
-    if (mqttEnabled && mqttClient.connected()) {
-        mqttClient.publish("thermostat/setTempHeat", String(setTempHeat).c_str(), true);
-        mqttClient.publish("thermostat/setTempCool", String(setTempCool).c_str(), true);
-        mqttClient.publish("thermostat/activePeriod", activePeriod.c_str(), false);
+    if (mqttEnabled) {
+        mqttPublish("thermostat/setTempHeat", String(setTempHeat).c_str(), true);
+        mqttPublish("thermostat/setTempCool", String(setTempCool).c_str(), true);
+        mqttPublish("thermostat/activePeriod", activePeriod.c_str(), false);
     }
     
     // Request display update
@@ -946,13 +1140,16 @@ void applySchedule(int dayOfWeek, bool isDayPeriod) {
 
 // Save schedule settings to preferences
 void saveScheduleSettings() {
+    // Any saved change (schedule, enable, override) means the next transition must be recomputed
+    scheduleEngine.invalidate();
+    
     // Acquire mutex for atomic save operation (dual-core safety)
     if (nvsSaveMutex == NULL || xSemaphoreTake(nvsSaveMutex, pdMS_TO_TICKS(5000)) != pdTRUE) {
-        debugLog("ERROR: saveScheduleSettings() timed out waiting for NVS mutex\n");
+        LOG_E(SCHEDULE, "ERROR: saveScheduleSettings() timed out waiting for NVS mutex\n");
         return;
     }
     
-    debugLog("SCHEDULE: Starting atomic save operation...\n");
+    LOG_I(SCHEDULE, "SCHEDULE: Starting atomic save operation...\n");
     unsigned long saveStartTime = millis();
     
     preferences.putBool("schedEnabled", scheduleEnabled);
@@ -981,6 +1178,9 @@ void saveScheduleSettings() {
         preferences.putFloat((dayPrefix + "n_cool").c_str(), weekSchedule[day].night.coolTemp);
         preferences.putFloat((dayPrefix + "n_auto").c_str(), weekSchedule[day].night.autoTemp);
         preferences.putBool((dayPrefix + "n_active").c_str(), weekSchedule[day].night.active);
+        
+        // Extra periods (period3..period6) stored as one blob per day to keep NVS entry count down
+        preferences.putBytes((dayPrefix + "extra").c_str(), weekSchedule[day].extra, sizeof(weekSchedule[day].extra));
     }
     
     // Verify critical schedule settings were saved
@@ -989,14 +1189,14 @@ void saveScheduleSettings() {
     
     if (verifySched != scheduleEnabled) {
         verifySuccess = false;
-        debugLog("ERROR: Schedule verification FAILED—save may not have persisted!\n");
+        LOG_E(SCHEDULE, "ERROR: Schedule verification FAILED—save may not have persisted!\n");
     } else {
-        debugLog("SCHEDULE: Verification SUCCESS—schedule data confirmed in NVS\n");
+        LOG_I(SCHEDULE, "SCHEDULE: Verification SUCCESS—schedule data confirmed in NVS\n");
     }
     
     unsigned long saveDuration = millis() - saveStartTime;
-    debugLog("SCHEDULE: Atomic save completed in %lu ms (status=%s)\n", 
-             saveDuration, verifySuccess ? "OK" : "FAILED");
+    LOG_I(SCHEDULE, "SCHEDULE: Atomic save completed in %lu ms (status=%s)\n", 
+                    saveDuration, verifySuccess ? "OK" : "FAILED");
     
     // Release mutex
     xSemaphoreGive(nvsSaveMutex);
@@ -1012,7 +1212,7 @@ void loadScheduleSettings() {
     // If override was active before reboot, clear it since overrideEndTime is stale
     // (millis() resets to 0 after each reboot, making the stored endTime unreliable)
     if (scheduleOverride && overrideEndTime > 0) {
-        debugLog("SCHEDULE: Clearing stale override from previous boot\n");
+        LOG_I(SCHEDULE, "SCHEDULE: Clearing stale override from previous boot\n");
         scheduleOverride = false;
         overrideEndTime = 0;
     }
@@ -1020,7 +1220,7 @@ void loadScheduleSettings() {
     // Check if schedule data exists, if not initialize defaults silently
     bool scheduleExists = preferences.isKey("day0_d_heat");
     if (!scheduleExists) {
-        debugLog("SCHEDULE: First boot detected, initializing default schedule data...\n");
+        LOG_I(SCHEDULE, "SCHEDULE: First boot detected, initializing default schedule data...\n");
         saveScheduleSettings(); // Save the compiled-in defaults to NVS
         return; // Skip the individual loading since we just saved defaults
     }
@@ -1046,35 +1246,46 @@ void loadScheduleSettings() {
         weekSchedule[day].night.coolTemp = preferences.getFloat((dayPrefix + "n_cool").c_str(), 78.0);
         weekSchedule[day].night.autoTemp = preferences.getFloat((dayPrefix + "n_auto").c_str(), 73.0);
         weekSchedule[day].night.active = preferences.getBool((dayPrefix + "n_active").c_str(), true);
+        
+        // Extra periods default to inactive when not stored (or stored with a different layout)
+        String extraKey = dayPrefix + "extra";
+        if (preferences.getBytesLength(extraKey.c_str()) == sizeof(weekSchedule[day].extra)) {
+            preferences.getBytes(extraKey.c_str(), weekSchedule[day].extra, sizeof(weekSchedule[day].extra));
+        } else {
+            memset(weekSchedule[day].extra, 0, sizeof(weekSchedule[day].extra));
+        }
     }
     
-    debugLog("SCHEDULE: Settings loaded - Enabled: %s, Override: %s, Active Period: %s\n",
-                  scheduleEnabled ? "YES" : "NO", 
-                  scheduleOverride ? "YES" : "NO",
-                  activePeriod.c_str());
+    scheduleEngine.invalidate();
+    
+    LOG_I(SCHEDULE, "SCHEDULE: Settings loaded - Enabled: %s, Override: %s, Active Period: %s\n",
+                         scheduleEnabled ? "YES" : "NO", 
+                         scheduleOverride ? "YES" : "NO",
+                         activePeriod.c_str());
 }
 
 // =============================================================================
 // DEBUG LOG BUFFER - For web-based serial output viewing
 // =============================================================================
-const int DEBUG_BUFFER_SIZE = 32768;  // 32KB circular buffer for more history
-char debugBuffer[DEBUG_BUFFER_SIZE];
+// Allocated in setup() with coldMalloc: 32KB in internal RAM, 128KB in PSRAM on the N32R16V
+int debugBufferSize = 0;
+char* debugBuffer = NULL;
 int debugBufferIndex = 0;
 bool debugBufferWrapped = false;  // Track if buffer has wrapped around
 SemaphoreHandle_t debugBufferMutex = NULL;
 
 void addToDebugBuffer(const char* message) {
-    if (debugBufferMutex == NULL || xSemaphoreTake(debugBufferMutex, pdMS_TO_TICKS(10)) != pdTRUE) {
-        return;  // Can't acquire mutex, skip
+    if (debugBuffer == NULL || debugBufferMutex == NULL || xSemaphoreTake(debugBufferMutex, pdMS_TO_TICKS(10)) != pdTRUE) {
+        return;  // No buffer or can't acquire mutex, skip
     }
     
     int len = strlen(message);
-    if (len > DEBUG_BUFFER_SIZE) len = DEBUG_BUFFER_SIZE;
+    if (len > debugBufferSize) len = debugBufferSize;
     
     // Write to circular buffer
     for (int i = 0; i < len; i++) {
         debugBuffer[debugBufferIndex] = message[i];
-        debugBufferIndex = (debugBufferIndex + 1) % DEBUG_BUFFER_SIZE;
+        debugBufferIndex = (debugBufferIndex + 1) % debugBufferSize;
         if (debugBufferIndex == 0) {
             debugBufferWrapped = true;  // We've wrapped around
         }
@@ -1083,33 +1294,39 @@ void addToDebugBuffer(const char* message) {
     xSemaphoreGive(debugBufferMutex);
 }
 
-String getDebugLog() {
-    String result = "";
-    if (debugBufferMutex == NULL || xSemaphoreTake(debugBufferMutex, pdMS_TO_TICKS(50)) != pdTRUE) {
-        return result;
+// Copy of the buffer contents in order, NUL-terminated, from coldMalloc (caller frees); NULL if unavailable
+char* snapshotDebugLog(size_t& len) {
+    len = 0;
+    if (debugBuffer == NULL || debugBufferMutex == NULL) {
+        return NULL;
+    }
+    char* copy = (char*)coldMalloc(debugBufferSize + 1);
+    if (copy == NULL) {
+        return NULL;
+    }
+    if (xSemaphoreTake(debugBufferMutex, pdMS_TO_TICKS(50)) != pdTRUE) {
+        free(copy);
+        return NULL;
     }
     
-    // Return the buffer contents in order
-    result.reserve(DEBUG_BUFFER_SIZE + 100);
-    
-    // If buffer has wrapped, start from debugBufferIndex (oldest data)
-    // Otherwise start from 0 (buffer not full yet)
-    int startIdx = debugBufferWrapped ? debugBufferIndex : 0;
-    int endIdx = debugBufferIndex;
-    
-    for (int i = 0; i < DEBUG_BUFFER_SIZE; i++) {
-        int idx = (startIdx + i) % DEBUG_BUFFER_SIZE;
-        result += debugBuffer[idx];
-        if (idx == endIdx && !debugBufferWrapped) {
-            break;  // Stop if we haven't wrapped and reached current index
-        }
+    // If buffer has wrapped, the oldest data starts at debugBufferIndex
+    // Otherwise it runs from 0 to debugBufferIndex (buffer not full yet)
+    if (debugBufferWrapped) {
+        size_t tail = debugBufferSize - debugBufferIndex;
+        memcpy(copy, debugBuffer + debugBufferIndex, tail);
+        memcpy(copy + tail, debugBuffer, debugBufferIndex);
+        len = debugBufferSize;
+    } else {
+        memcpy(copy, debugBuffer, debugBufferIndex);
+        len = debugBufferIndex;
     }
+    copy[len] = '\0';
     
     xSemaphoreGive(debugBufferMutex);
-    return result;
+    return copy;
 }
 
-// Unified logging function for both Serial and debug buffer
+// Log sink for the LOG_x macros (Log.h): serial port and debug buffer
 void debugLog(const char* format, ...) {
     char buffer[256];
     va_list args;
@@ -1123,18 +1340,27 @@ void debugLog(const char* format, ...) {
 void setup()
 {
     Serial.begin(115200);
+    int setupPhase = bootProfiler.begin("setup");
+    int phase = bootProfiler.begin("settings");
+    
+    // Decide where large buffers go before allocating any
+    memoryPolicyBegin();
     
     // Initialize debug buffer with zeros and mutex
-    memset(debugBuffer, 0, DEBUG_BUFFER_SIZE);
+    debugBufferSize = boardBufferSize(DEBUG_LOG_BYTES, DEBUG_LOG_BYTES_PSRAM);
+    debugBuffer = (char*)coldCalloc(1, debugBufferSize);
+    if (debugBuffer == NULL) {
+        LOG_E(SYSTEM, "ERROR: Failed to allocate %d byte debug buffer!\n", debugBufferSize);
+    }
     debugBufferIndex = 0;
     debugBufferWrapped = false;
     
     // Initialize debug buffer mutex
     debugBufferMutex = xSemaphoreCreateMutex();
     if (debugBufferMutex == NULL) {
-        debugLog("ERROR: Failed to create debug buffer mutex!\n");
+        LOG_E(SYSTEM, "ERROR: Failed to create debug buffer mutex!\n");
     } else {
-        debugLog("Debug buffer mutex created successfully\n");
+        LOG_I(SYSTEM, "Debug buffer mutex created successfully\n");
         // Add initial message to buffer
         addToDebugBuffer("=== DEBUG BUFFER INITIALIZED ===\n");
     }
@@ -1145,7 +1371,7 @@ void setup()
     // Create NVS save semaphore for dual-core safety
     nvsSaveMutex = xSemaphoreCreateMutex();
     if (nvsSaveMutex == NULL) {
-        debugLog("ERROR: Failed to create NVS save mutex!\n");
+        LOG_E(SYSTEM, "ERROR: Failed to create NVS save mutex!\n");
     }
     
     loadSettings();
@@ -1153,102 +1379,32 @@ void setup()
 
     
     // Print version information at startup
-    debugLog("\n");
-    debugLog("========================================\n");
-    Serial.println(PROJECT_NAME_SHORT);
-    debugLog("Version: ");
-    Serial.println(sw_version);
-    debugLog("Build Date: ");
-    Serial.println(build_date);
-    debugLog("Build Time: ");
-    Serial.println(build_time);
-    debugLog("Hostname: ");
-    Serial.println(hostname);
-    debugLog("========================================\n");
-    debugLog("\n");
-    
-    // Initialize the DHT11 sensor
-    // Initialize TFT backlight with PWM (GPIO 14)
-    ledcSetup(PWM_CHANNEL, PWM_FREQ, PWM_RESOLUTION);
-    ledcAttachPin(TFT_BACKLIGHT_PIN, PWM_CHANNEL);
-    // Start at full brightness
-    setBrightness(MAX_BRIGHTNESS);
-    filteredBrightness = MAX_BRIGHTNESS; // Initialize EMA filter
-    
-    // Initialize light sensor pin
-    pinMode(LIGHT_SENSOR_PIN, INPUT);
-    
-    // Initialize LD2410 motion sensor with pulldown to prevent floating
-    pinMode(LD2410_MOTION_PIN, INPUT_PULLDOWN);
-    // NOTE: Arduino Serial2.begin uses (baud, config, RX_pin, TX_pin) order
-    // LD2410 TX (data out) connects to ESP32 RX (pin 15)
-    // LD2410 RX (data in) connects to ESP32 TX (pin 16)
-    Serial2.begin(256000, SERIAL_8N1, LD2410_RX_PIN, LD2410_TX_PIN);  // RX=15, TX=16
-    delay(500); // Give sensor time to stabilize
-    
-    // Test LD2410 connection
-    ld2410Connected = testLD2410Connection();
-    if (ld2410Connected) {
-        debugLog("LD2410: Motion sensor connected successfully\n");
-        // Configure with conservative settings matching original hardware
-        configureLD2410Sensitivity();
-    } else {
-        debugLog("LD2410: Motion sensor not detected - display control via touch only\n");
-    }
-    
-    // Create I2C mutex BEFORE initializing I2C bus and devices
-    i2cMutex = xSemaphoreCreateMutex();
-    if (i2cMutex == NULL) {
-        debugLog("ERROR: Failed to create I2C mutex!\n");
-    } else {
-        debugLog("I2C mutex created successfully\n");
-    }
-    
-    // Auto-detect and initialize temperature/humidity sensor
-    activeSensor = detectSensor();
-    if (activeSensor != SENSOR_NONE) {
-        if (!initializeSensor(activeSensor)) {
-            debugLog("ERROR: Sensor initialization failed!\n");
-            activeSensor = SENSOR_NONE;
-            sensorName = "None";
-        } else {
-            debugLog("SUCCESS: %s sensor ready\n", sensorName.c_str());
-        }
-    } else {
-        debugLog("ERROR: No temperature/humidity sensor detected!\n");
-    }
-
-    // Initialize the TFT display
-    tft.init();
-    tft.setRotation(1); // Set the rotation of the display as needed
-    tft.fillScreen(COLOR_BACKGROUND);
-    tft.setTextColor(COLOR_TEXT, COLOR_BACKGROUND);
-    tft.setTextSize(3);  // Increased size from 2 to 3
-    tft.setCursor(15, 40);  // Better centered for display
-    tft.println(PROJECT_NAME_SHORT);
-    tft.setTextSize(2);  // Increased from 1 to 2 for better readability
-    tft.setCursor(20, 110);  // Centered version info
-    tft.println("Version: " + sw_version);
-    tft.setCursor(25, 135);  // Centered build info
-    tft.println("Build: " + build_date);
-    tft.setCursor(40, 155);  // Centered build time
-    tft.println("Time: " + build_time);
-    tft.println();
-    tft.setTextSize(2);
-    delay(5000); // Allow time to read startup info
-    tft.setCursor(60, 180);  // Center loading message
-    tft.println("Loading Settings...");
-
-    // Calibrate touch screen
-    calibrateTouchScreen();
-
-    // Initialize relay pins
+    LOG_I(SYSTEM, "\n");
+    LOG_I(SYSTEM, "========================================\n");
+    LOG_I(SYSTEM, "%s\n", PROJECT_NAME_SHORT);
+    LOG_I(SYSTEM, "Version: %s\n", sw_version.c_str());
+    LOG_I(SYSTEM, "Build Date: %s\n", build_date.c_str());
+    LOG_I(SYSTEM, "Build Time: %s\n", build_time.c_str());
+    LOG_I(SYSTEM, "Hostname: %s\n", hostname.c_str());
+    LOG_I(SYSTEM, "========================================\n");
+    LOG_I(SYSTEM, "\n");
+    bootProfiler.end(phase);
+    
+    // Outputs first: relays are held off from here until the HVAC engine takes over
+    phase = bootProfiler.begin("outputs");
     pinMode(HEAT_RELAY_1_PIN, OUTPUT);
     pinMode(HEAT_RELAY_2_PIN, OUTPUT);
     pinMode(COOL_RELAY_1_PIN, OUTPUT);
     pinMode(COOL_RELAY_2_PIN, OUTPUT);
     pinMode(FAN_RELAY_PIN, OUTPUT);
 
+    // Ensure all relays are off during bootup
+    digitalWrite(HEAT_RELAY_1_PIN, LOW);
+    digitalWrite(HEAT_RELAY_2_PIN, LOW);
+    digitalWrite(COOL_RELAY_1_PIN, LOW);
+    digitalWrite(COOL_RELAY_2_PIN, LOW);
+    digitalWrite(FAN_RELAY_PIN, LOW);
+
     // Initialize LED pins with PWM for dimmed operation
     ledcSetup(PWM_CHANNEL_HEAT, PWM_FREQ, PWM_RESOLUTION);
     ledcSetup(PWM_CHANNEL_COOL, PWM_FREQ, PWM_RESOLUTION);
@@ -1261,13 +1417,6 @@ void setup()
     ledcSetup(PWM_CHANNEL_BUZZER, 4000, PWM_RESOLUTION); // 4kHz for buzzer
     ledcAttachPin(BUZZER_PIN, PWM_CHANNEL_BUZZER);
 
-    // Ensure all relays are off during bootup
-    digitalWrite(HEAT_RELAY_1_PIN, LOW);
-    digitalWrite(HEAT_RELAY_2_PIN, LOW);
-    digitalWrite(COOL_RELAY_1_PIN, LOW);
-    digitalWrite(COOL_RELAY_2_PIN, LOW);
-    digitalWrite(FAN_RELAY_PIN, LOW);
-
     // Ensure all LEDs are off during bootup
     ledcWrite(PWM_CHANNEL_HEAT, 0);
     ledcWrite(PWM_CHANNEL_COOL, 0);
@@ -1275,165 +1424,90 @@ void setup()
 
     // Ensure buzzer is off during bootup
     ledcWrite(PWM_CHANNEL_BUZZER, 0);
-
-    // Initialize WiFi in station mode to set up TCP/IP stack
-    // This must be done before any WiFi operations (even WiFi.status() calls in loop)
-    WiFi.mode(WIFI_STA);
     
-    // Load WiFi credentials but don't force connection
-    wifiSSID = preferences.getString("wifiSSID", "");
-    wifiPassword = preferences.getString("wifiPassword", "");
+    // Initialize TFT backlight with PWM (GPIO 14)
+    ledcSetup(PWM_CHANNEL, PWM_FREQ, PWM_RESOLUTION);
+    ledcAttachPin(TFT_BACKLIGHT_PIN, PWM_CHANNEL);
+    // Start at full brightness
+    setBrightness(MAX_BRIGHTNESS);
+    filteredBrightness = MAX_BRIGHTNESS; // Initialize EMA filter
     
-    // Set hostname using ESP-IDF method (Arduino WiFi.setHostname has bugs)
-    esp_netif_t* sta_netif = esp_netif_get_handle_from_ifkey("WIFI_STA_DEF");
-    if (sta_netif != nullptr) {
-        esp_err_t err = esp_netif_set_hostname(sta_netif, hostname.c_str());
-        if (err != ESP_OK) {
-            debugLog("[WIFI] Failed to set hostname: %d\n", err);
-        } else {
-            debugLog("[WIFI] Hostname set to: %s\n", hostname.c_str());
-        }
-    }
-    WiFi.config(INADDR_NONE, INADDR_NONE, INADDR_NONE); // Force DHCP to send hostname
+    // Initialize light sensor pin
+    pinMode(LIGHT_SENSOR_PIN, INPUT);
     
-    // Clear the "Loading Settings..." message
-    tft.fillScreen(COLOR_BACKGROUND);
+    // Initialize LD2410 motion sensor with pulldown to prevent floating
+    pinMode(LD2410_MOTION_PIN, INPUT_PULLDOWN);
+    bootProfiler.end(phase);
     
-    // Setup WiFi if credentials exist, but don't block if it fails
-    bool wifiConnected = false;
-    if (wifiSSID != "" && wifiPassword != "")
-    {
-        WiFi.begin(wifiSSID.c_str(), wifiPassword.c_str());
-        unsigned long startAttemptTime = millis();
-        
-        // Only try to connect for 5 seconds, allowing operation without WiFi
-        debugLog("Attempting to connect to WiFi...\n");
-        while (WiFi.status() != WL_CONNECTED && millis() - startAttemptTime < 5000)
-        {
-            delay(500);
-            debugLog(".");
-        }
-        
-        if (WiFi.status() == WL_CONNECTED)
-        {
-            debugLog("\nConnected to WiFi\n");
-            debugLog("IP Address: ");
-            Serial.println(WiFi.localIP());
-            wifiConnected = true;
-            
-            // Only start web server and MQTT if connected
-            handleWebRequests();
-            server.begin();
-            
-            if (mqttEnabled)
-            {
-                setupMQTT();
-                reconnectMQTT();
-            }
-            
-            // Initialize weather module
-            weather.begin();
-            weather.setUseFahrenheit(useFahrenheit);
-            weather.setSource((WeatherSource)weatherSource);
-            weather.setOpenWeatherMapConfig(owmApiKey, owmCity, owmState, owmCountry);
-            weather.setHomeAssistantConfig(haUrl, haToken, haEntityId);
-            weather.setUpdateInterval(weatherUpdateInterval * 60000); // Convert minutes to milliseconds
-            debugLog("Weather module initialized\n");
-            debugLog("Weather Source: %d (0=Disabled, 1=OpenWeatherMap, 2=HomeAssistant)\n", weatherSource);
-            debugLog("Weather Update Interval: %d minutes\n", weatherUpdateInterval);
-            if (weatherSource == 1) {
-                debugLog("OpenWeatherMap: City=%s, State=%s, Country=%s, API Key=%s\n", 
-                             owmCity.c_str(), owmState.c_str(), owmCountry.c_str(), 
-                             owmApiKey.length() > 0 ? "[SET]" : "[NOT SET]");
-            } else if (weatherSource == 2) {
-                debugLog("Home Assistant: URL=%s, Entity=%s, Token=%s\n",
-                             haUrl.c_str(), haEntityId.c_str(),
-                             haToken.length() > 0 ? "[SET]" : "[NOT SET]");
-            }
-            
-            // Fetch initial weather data
-            if (weatherSource != 0) {
-                debugLog("Fetching initial weather data...\n");
-                bool success = weather.update();
-                debugLog("Initial weather fetch: %s\n", success ? "SUCCESS" : "FAILED");
-                if (!success) {
-                    debugLog("Weather error: %s\n", weather.getLastError().c_str());
-                }
-            }
-        }
-        else
-        {
-            debugLog("\nFailed to connect to WiFi. Will operate offline.\n");
-        }
-    }
-    else
-    {
-        debugLog("No WiFi credentials found. Operating in offline mode.\n");
+    // Every mutex exists before the first task that uses it is started
+    i2cMutex = xSemaphoreCreateMutex();
+    displayUpdateMutex = xSemaphoreCreateMutex();
+    controlRelaysMutex = xSemaphoreCreateMutex();
+    radarSensorMutex = xSemaphoreCreateMutex();
+    mqttOutboxMutex = xSemaphoreCreateMutex();
+    mqttConfigMutex = xSemaphoreCreateMutex();
+    if (i2cMutex == NULL || displayUpdateMutex == NULL || controlRelaysMutex == NULL ||
+        radarSensorMutex == NULL || mqttOutboxMutex == NULL || mqttConfigMutex == NULL) {
+        LOG_E(SYSTEM, "ERROR: Failed to create a mutex!\n");
     }
+    publishMQTTConfig(); // Broker settings loaded from NVS
     
-    lastInteractionTime = millis();
-
-    // Initialize buttons
-    drawButtons();
-
-    // Initialize time from NTP server only if WiFi is connected
-    if (wifiConnected)
-    {
-        configTime(0, 0, "pool.ntp.org", "time.nist.gov");
-        setenv("TZ", timeZone.c_str(), 1);
-        tzset();
+    // Temperature/humidity sensor (type cached in NVS), first reading and DS18B20
+    phase = bootProfiler.begin("sensor");
+    activeSensor = startSensor();
+    if (activeSensor != SENSOR_NONE) {
+        LOG_I(SENSOR, "SUCCESS: %s sensor ready\n", sensorName.c_str());
+        if (activeSensor == SENSOR_DHT11) {
+            tempFilter.configure(DHT11_TEMP_FILTER_CONFIG);
+            humidityFilter.configure(DHT11_HUMIDITY_FILTER_CONFIG);
+        }
+    } else {
+        LOG_E(SENSOR, "ERROR: No temperature/humidity sensor detected!\n");
+        sensorName = "None";
     }
 
-    // Read initial temperature and humidity
-    // Read initial temperature and humidity from AHT20
     // Get initial sensor reading to initialize temperature and humidity values
     float tempReading, humidityReading, pressureReading;
     if (readTemperatureHumidity(tempReading, humidityReading, pressureReading)) {
+        // Start the filters from the first reading
+        tempFilter.seed(tempReading);
+        humidityFilter.seed(humidityReading);
         float calibratedTemp = getCalibratedTemperature(tempReading);
         float calibratedHumidity = getCalibratedHumidity(humidityReading);
         currentTemp = useFahrenheit ? (calibratedTemp * 9.0 / 5.0 + 32.0) : calibratedTemp;
         currentHumidity = calibratedHumidity;
+        sensorReadingValid = true;
         
         // Store pressure if BME280 detected
         if (activeSensor == SENSOR_BME280 && !isnan(pressureReading)) {
             currentPressure = pressureReading;
-            debugLog("Initial pressure reading: %.1f hPa\n", currentPressure);
+            LOG_I(SENSOR, "Initial pressure reading: %.1f hPa\n", currentPressure);
         }
         
-        debugLog("Initial readings - Temp: %.1f, Humidity: %.1f%%\n", currentTemp, currentHumidity);
+        LOG_I(SENSOR, "Initial readings - Temp: %.1f, Humidity: %.1f%%\n", currentTemp, currentHumidity);
     } else {
-        debugLog("WARNING: Failed to get initial sensor reading\n");
+        LOG_W(SENSOR, "WARNING: Failed to get initial sensor reading\n");
         // Use fallback values
         currentTemp = 72.0;
         currentHumidity = 50.0;
     }
-    
-    // Initialize filters with first reading
-    filteredTemp = currentTemp;
-    filteredHumidity = currentHumidity;
-    firstSensorReading = false;
-
-    // Initial display update
-    updateDisplay(currentTemp, currentHumidity);
 
-    // Initialize display sleep timing
-    lastInteractionTime = millis();
-
-    // Initialize the DS18B20 sensor
+    // Initialize the DS18B20 sensor - presence from the bus search, no blocking conversion
     ds18b20.begin();
+    ds18b20SensorPresent = ds18b20.getDeviceCount() > 0;
     
-    // Check if DS18B20 sensor is present
-    ds18b20.requestTemperatures();
-    float tempC = ds18b20.getTempCByIndex(0);
-    ds18b20SensorPresent = (tempC != DEVICE_DISCONNECTED_C && tempC != -127.0);
+    // From here on requestTemperatures() only starts a conversion; the sensor task collects it
+    ds18b20.setWaitForConversion(false);
     
     if (ds18b20SensorPresent) {
-        debugLog("DS18B20 sensor detected\n");
+        LOG_I(SENSOR, "DS18B20 sensor detected\n");
     } else {
-        debugLog("DS18B20 sensor NOT detected\n");
+        LOG_I(SENSOR, "DS18B20 sensor NOT detected\n");
     }
+    bootProfiler.end(phase);
     
-    // Create sensor task on core 1
+    // Sensor task on core 1 - its first pass runs controlRelays(), so the HVAC engine is
+    // in charge of the relays before the display, radar or network are up
     xTaskCreatePinnedToCore(
         sensorTaskFunction,  // Task function
         "SensorTask",       // Name
@@ -1444,30 +1518,129 @@ void setup()
         1                  // Core 1
     );
     
-    // Option C: Create display update mutex and task on core 0
-    displayUpdateMutex = xSemaphoreCreateMutex();
-    if (displayUpdateMutex == NULL) {
-        debugLog("ERROR: Failed to create display update mutex!\n");
-    } else {
-        debugLog("Display update mutex created successfully\n");
+    // LD2410 handshake (500 ms settle, then several configuration round trips) on its own task
+    // NOTE: Arduino Serial2.begin uses (baud, config, RX_pin, TX_pin) order
+    // LD2410 TX (data out) connects to ESP32 RX (pin 15)
+    // LD2410 RX (data in) connects to ESP32 TX (pin 16)
+    Serial2.setRxBufferSize(1024); // Room for bursts while the radar task is busy (default 256)
+    Serial2.begin(256000, SERIAL_8N1, LD2410_RX_PIN, LD2410_TX_PIN);  // RX=15, TX=16
+    xTaskCreatePinnedToCore(bootRadarTask, "BootRadar", 4096, NULL, 1, NULL, 1);
+    
+    // History in LittleFS (formats the data partition on first boot) on its own task
+    xTaskCreatePinnedToCore(bootStorageTask, "BootStorage", 4096, NULL, 1, NULL, 0);
+    
+    // Network: association and DHCP run in the WiFi stack; onWiFiGotIP() starts NTP
+    phase = bootProfiler.begin("wifi_init");
+    
+    // Initialize WiFi in station mode to set up TCP/IP stack
+    // This must be done before any WiFi operations (even WiFi.status() calls in loop)
+    WiFi.mode(WIFI_STA);
+    WiFi.onEvent(onWiFiGotIP, ARDUINO_EVENT_WIFI_STA_GOT_IP);
+    
+    // Load WiFi credentials but don't force connection
+    wifiSSID = preferences.getString("wifiSSID", "");
+    wifiPassword = preferences.getString("wifiPassword", "");
+    
+    // Set hostname using ESP-IDF method (Arduino WiFi.setHostname has bugs)
+    esp_netif_t* sta_netif = esp_netif_get_handle_from_ifkey("WIFI_STA_DEF");
+    if (sta_netif != nullptr) {
+        esp_err_t err = esp_netif_set_hostname(sta_netif, hostname.c_str());
+        if (err != ESP_OK) {
+            LOG_W(WIFI, "[WIFI] Failed to set hostname: %d\n", err);
+        } else {
+            LOG_I(WIFI, "[WIFI] Hostname set to: %s\n", hostname.c_str());
+        }
     }
+    WiFi.config(INADDR_NONE, INADDR_NONE, INADDR_NONE); // Force DHCP to send hostname
     
-    // Create controlRelays mutex for thread-safe relay control
-    controlRelaysMutex = xSemaphoreCreateMutex();
-    if (controlRelaysMutex == NULL) {
-        debugLog("ERROR: Failed to create controlRelays mutex!\n");
-    } else {
-        debugLog("Control relays mutex created successfully\n");
+    // Local time rules don't need the network; NTP sets the clock once connected
+    setenv("TZ", timeZone.c_str(), 1);
+    tzset();
+    
+    // Connect in the background; the device operates offline until (and unless) it succeeds
+    if (wifiSSID != "" && wifiPassword != "")
+    {
+        LOG_I(WIFI, "Attempting to connect to WiFi...\n");
+        bootNetworkPhase = bootProfiler.begin("network");
+        WiFi.begin(wifiSSID.c_str(), wifiPassword.c_str());
     }
+    else
+    {
+        LOG_I(WIFI, "No WiFi credentials found. Operating in offline mode.\n");
+    }
+    
+    // The web server listens on any address, so it is ready the moment WiFi connects
+    handleWebRequests();
+    server.begin();
+    
+    // Initialize weather module (jobWeather makes the first fetch once WiFi is up)
+    weather.begin();
+    weather.setUseFahrenheit(useFahrenheit);
+    weather.setSource((WeatherSource)weatherSource);
+    weather.setOpenWeatherMapConfig(owmApiKey, owmCity, owmState, owmCountry);
+    weather.setHomeAssistantConfig(haUrl, haToken, haEntityId);
+    weather.setUpdateInterval(weatherUpdateInterval * 60000); // Convert minutes to milliseconds
+    LOG_I(WEATHER, "Weather module initialized\n");
+    LOG_I(WEATHER, "Weather Source: %d (0=Disabled, 1=OpenWeatherMap, 2=HomeAssistant)\n", weatherSource);
+    LOG_I(WEATHER, "Weather Update Interval: %d minutes\n", weatherUpdateInterval);
+    if (weatherSource == 1) {
+        LOG_I(WEATHER, "OpenWeatherMap: City=%s, State=%s, Country=%s, API Key=%s\n", 
+                           owmCity.c_str(), owmState.c_str(), owmCountry.c_str(), 
+                           owmApiKey.length() > 0 ? "[SET]" : "[NOT SET]");
+    } else if (weatherSource == 2) {
+        LOG_I(SYSTEM, "Home Assistant: URL=%s, Entity=%s, Token=%s\n",
+                          haUrl.c_str(), haEntityId.c_str(),
+                          haToken.length() > 0 ? "[SET]" : "[NOT SET]");
+    }
+    bootProfiler.end(phase);
+
+    // Display: the splash stays up while the radar, storage and network phases run
+    phase = bootProfiler.begin("display");
+    tft.init();
+    tft.setRotation(1); // Set the rotation of the display as needed
+    tft.fillScreen(COLOR_BACKGROUND);
+    tft.setTextColor(COLOR_TEXT, COLOR_BACKGROUND);
+    tft.setTextSize(3);  // Increased size from 2 to 3
+    tft.setCursor(15, 40);  // Better centered for display
+    tft.println(PROJECT_NAME_SHORT);
+    tft.setTextSize(2);  // Increased from 1 to 2 for better readability
+    tft.setCursor(20, 110);  // Centered version info
+    tft.println("Version: " + sw_version);
+    tft.setCursor(25, 135);  // Centered build info
+    tft.println("Build: " + build_date);
+    tft.setCursor(40, 155);  // Centered build time
+    tft.println("Time: " + build_time);
+    tft.println();
+    tft.setTextSize(2);
+    tft.setCursor(60, 180);  // Center loading message
+    tft.println("Loading Settings...");
+    uint32_t splashShown = millis();
+
+    // Calibrate touch screen
+    calibrateTouchScreen();
     
-    // Create radar sensor mutex for thread-safe sensor access
-    radarSensorMutex = xSemaphoreCreateMutex();
-    if (radarSensorMutex == NULL) {
-        debugLog("ERROR: Failed to create radar sensor mutex!\n");
-    } else {
-        debugLog("Radar sensor mutex created successfully\n");
+    // Allow time to read startup info (other phases carry on meanwhile)
+    uint32_t splashElapsed = millis() - splashShown;
+    if (splashElapsed < SPLASH_MIN_MS) {
+        delay(SPLASH_MIN_MS - splashElapsed);
     }
     
+    // Clear the "Loading Settings..." message
+    tft.fillScreen(COLOR_BACKGROUND);
+    
+    lastInteractionTime = millis();
+
+    // Initialize buttons
+    drawButtons();
+    
+    // Initial display update
+    updateDisplay(currentTemp, currentHumidity);
+
+    // Initialize display sleep timing
+    lastInteractionTime = millis();
+    bootProfiler.end(phase);
+    
+    // Option C: Display update task on core 0
     xTaskCreatePinnedToCore(
         displayUpdateTaskFunction,  // Task function
         "DisplayUpdateTask",       // Name
@@ -1478,11 +1651,28 @@ void setup()
         0                         // Core 0 (same as main display operations)
     );
     
-    debugLog("Dual-core thermostat with centralized display updates setup complete\n");
-    debugLog("[BOOT] Setup complete - System ready\n");
-    debugLog("[BOOT] Debug console available at /debug\n");
-    debugLog("[BOOT] System Version %s\n", sw_version.c_str());
-    debugLog("[BOOT] Hostname: %s\n", hostname.c_str());
+    // MQTT connection manager on core 0 - connect() can block for seconds on a dead broker
+    mqttInboxQueue = xQueueCreate(8, sizeof(MqttInbound));
+    xTaskCreatePinnedToCore(
+        mqttTaskFunction,         // Task function
+        "MqttTask",              // Name
+        6144,                     // Stack size
+        NULL,                     // Parameters
+        1,                        // Priority
+        &mqttTask,                // Task handle
+        0                         // Core 0 (with the WiFi stack)
+    );
+    
+    LOG_I(DISPLAY, "Dual-core thermostat with centralized display updates setup complete\n");
+    LOG_I(SYSTEM, "[BOOT] Setup complete - System ready\n");
+    LOG_I(SYSTEM, "[BOOT] Debug console available at /debug\n");
+    LOG_I(SYSTEM, "[BOOT] System Version %s\n", sw_version.c_str());
+    LOG_I(SYSTEM, "[BOOT] Hostname: %s\n", hostname.c_str());
+    
+    // Register periodic loop() work (setup() runs on the loop task)
+    diagHistory.setTasks(xTaskGetCurrentTaskHandle(), sensorTask, displayUpdateTask);
+    setupLoopJobs();
+    bootProfiler.end(setupPhase);
     
     // Play startup tone to indicate setup is complete
     buzzerStartupTone();
@@ -1490,18 +1680,91 @@ void setup()
     
 }
 
+// Boot task: LD2410 connection test and configuration, then hand the UART to the radar task
+void bootRadarTask(void *parameter) {
+    int phase = bootProfiler.begin("radar");
+    vTaskDelay(pdMS_TO_TICKS(500)); // Give sensor time to stabilize
+    
+    // Test LD2410 connection (configures it with conservative settings when found)
+    if (testLD2410Connection()) {
+        LOG_I(MOTION, "LD2410: Motion sensor connected successfully\n");
+        
+        // Radar frames are parsed on their own task from here on (MyLD2410 was only needed for configuration)
+        presenceEdgeQueue = xQueueCreate(8, sizeof(PresenceEdge));
+        xTaskCreatePinnedToCore(
+            radarTaskFunction,  // Task function
+            "RadarTask",       // Name
+            3072,              // Stack size
+            NULL,              // Parameters
+            2,                 // Priority (above the sensor task - UART must not back up)
+            &radarTask,        // Task handle
+            1                  // Core 1
+        );
+        Serial2.onReceive([]() {
+            if (radarTask != NULL) xTaskNotifyGive(radarTask);
+        });
+        ld2410Connected = true; // Last, so readMotionSensor() sees the queue
+    } else {
+        LOG_I(MOTION, "LD2410: Motion sensor not detected - display control via touch only\n");
+    }
+    bootProfiler.end(phase);
+    vTaskDelete(NULL);
+}
+
+// Boot task: mount LittleFS and open the history
+void bootStorageTask(void *parameter) {
+    int phase = bootProfiler.begin("storage");
+    history.begin();
+    bootProfiler.end(phase);
+    vTaskDelete(NULL);
+}
+
+// Every connection (WiFi stack event task): log it, and start NTP the first time
+void onWiFiGotIP(WiFiEvent_t event, WiFiEventInfo_t info) {
+    LOG_I(WIFI, "[WIFI] Connected, IP %s\n", WiFi.localIP().toString().c_str());
+    if (bootNetworkPhase >= 0) {
+        bootProfiler.end(bootNetworkPhase);
+        bootNetworkPhase = -1;
+    }
+    if (!ntpStarted) {
+        ntpStarted = true;
+        configTime(0, 0, "pool.ntp.org", "time.nist.gov");
+        setenv("TZ", timeZone.c_str(), 1); // configTime() replaces TZ
+        tzset();
+    }
+}
+
+// Initialize the temperature/humidity sensor. The type found by the last full probe is
+// kept in NVS, so a normal boot initializes it directly; detectSensor() only probes on
+// first boot or when the cached sensor no longer answers.
+SensorType startSensor() {
+    uint8_t cached = preferences.getUChar("sensorType", SENSOR_NONE);
+    if (cached > SENSOR_NONE && cached <= SENSOR_BME680) {
+        float tempReading, humidityReading, pressureReading;
+        activeSensor = (SensorType)cached; // readTemperatureHumidity() reads the active sensor
+        if (initializeSensor(activeSensor) && readTemperatureHumidity(tempReading, humidityReading, pressureReading)) {
+            LOG_I(SENSOR, "[SENSOR] Using cached sensor type: %s\n", sensorName.c_str());
+            return activeSensor;
+        }
+        LOG_I(SENSOR, "[SENSOR] Cached sensor type %u not responding - probing\n", cached);
+        activeSensor = SENSOR_NONE;
+    }
+    
+    SensorType found = detectSensor();
+    if (found != SENSOR_NONE && !initializeSensor(found)) {
+        LOG_E(SENSOR, "ERROR: Sensor initialization failed!\n");
+        found = SENSOR_NONE;
+    }
+    if (found != SENSOR_NONE && found != cached) {
+        preferences.putUChar("sensorType", found);
+    }
+    return found;
+}
+
 void loop()
 {
-    static unsigned long lastWiFiAttemptTime = 0;
-    static unsigned long lastMQTTAttemptTime = 0;
-    static unsigned long lastDisplayUpdateTime = 0;
-    static unsigned long lastSensorReadTime = 0;
-    static unsigned long lastFanScheduleTime = 0;
-    static unsigned long lastMQTTDataTime = 0;
-    static unsigned long lastScheduleCheckTime = 0;
-    static unsigned long lastDiagLogTime = 0;
-    const unsigned long sensorReadInterval = 2000;    // Read sensors every 2 seconds
-
+    uint32_t loopPassStart = millis();
+    
     // Check boot button for factory reset
     bool currentBootButtonState = digitalRead(BOOT_BUTTON) == LOW; // Boot button is active LOW
     
@@ -1510,20 +1773,20 @@ void loop()
     {
         bootButtonPressed = true;
         bootButtonPressStart = millis();
-        debugLog("Boot button pressed, holding for factory reset...\n");
+        LOG_I(SYSTEM, "Boot button pressed, holding for factory reset...\n");
     }
     
     // Detect boot button release
     if (!currentBootButtonState && bootButtonPressed)
     {
         bootButtonPressed = false;
-        debugLog("Boot button released\n");
+        LOG_I(SYSTEM, "Boot button released\n");
     }
     
     // Check if boot button has been held long enough for factory reset
     if (bootButtonPressed && (millis() - bootButtonPressStart > FACTORY_RESET_PRESS_TIME))
     {
-        debugLog("Factory reset triggered by boot button!\n");
+        LOG_I(SYSTEM, "Factory reset triggered by boot button!\n");
         
         // Show reset message on display
         tft.fillScreen(COLOR_BACKGROUND);
@@ -1564,10 +1827,7 @@ void loop()
         
         unsigned long currentTime = millis();
         if (currentTime - lastTouchDebug > 500) {
-            char touchMsg[64];
-            snprintf(touchMsg, sizeof(touchMsg), "[TOUCH] X=%u Y=%u DZ=%d\n", x, y, TOUCH_DEADZONE);
-            Serial.print(touchMsg);
-            addToDebugBuffer(touchMsg);
+            LOG_D(DISPLAY, "[TOUCH] X=%u Y=%u DZ=%d\n", x, y, TOUCH_DEADZONE);
             lastTouchDebug = currentTime;
         }
         
@@ -1576,10 +1836,7 @@ void loop()
             // Touch is outside valid area - ignore it (but log it occasionally)
             static unsigned long lastDeadzoneLog = 0;
             if (currentTime - lastDeadzoneLog > 2000) {
-                char dzMsg[64];
-                snprintf(dzMsg, sizeof(dzMsg), "[FILTERED] X=%u Y=%u (deadzone)\n", x, y);
-                Serial.print(dzMsg);
-                addToDebugBuffer(dzMsg);
+                LOG_D(DISPLAY, "[FILTERED] X=%u Y=%u (deadzone)\n", x, y);
                 lastDeadzoneLog = currentTime;
             }
         } else {
@@ -1618,155 +1875,291 @@ void loop()
         return;
     }
 
-    // The rest of the loop function only runs when NOT in WiFi/setup/settings modes
-    // Sensor reading now handled by background task on core 1
+    // The rest of the loop function only runs when NOT in WiFi/setup/settings modes
+    // Sensor reading is owned by sensorTaskFunction on core 1; everything periodic
+    // here is a job in loopJobs (see setupLoopJobs)
+
+    if (mqttEnabled)
+    {
+        // Messages received by the MQTT task
+        MqttInbound inbound;
+        while (xQueueReceive(mqttInboxQueue, &inbound, 0) == pdTRUE) {
+            handleMQTTMessage(inbound.data, (byte*)inbound.data + strlen(inbound.data) + 1, inbound.length);
+            free(inbound.data);
+        }
+        
+        // New broker session: announce discovery and republish everything, a pass at a time
+        if (mqttSessionStarted) {
+            mqttSessionStarted = false;
+            mqttRepublishPhase = MQTT_REPUBLISH_DISCOVERY;
+            mqttRepublishQueued = 0;
+        }
+        if (mqttRepublishPhase != MQTT_REPUBLISH_IDLE) {
+            runMQTTRepublish();
+        }
+        
+        // Send MQTT feedback immediately if settings changed via MQTT
+        if (mqttFeedbackNeeded) {
+            LOG_I(MQTT, "[MQTT] Sending immediate feedback for settings change\n");
+            sendMQTTData();
+            mqttFeedbackNeeded = false;
+            loopJobs.postpone(mqttDataJobId);
+        }
+    }
+
+    loopJobs.runDue();
+
+    // Longest pass per second - what a stalled job costs touch and display response
+    uint32_t passMs = millis() - loopPassStart;
+    if (passMs > loopPassMaxMs) loopPassMaxMs = passMs;
+    if (millis() - loopPassWindowStart >= 1000) {
+        loopLatencyMs = loopPassMaxMs;
+        loopPassMaxMs = 0;
+        loopPassWindowStart = millis();
+    }
+
+    // Sleep until the next job deadline instead of spinning (bounded for touch/MQTT polling)
+    uint32_t idleMs = loopJobs.msUntilNext();
+    if (idleMs > LOOP_MAX_IDLE_MS) idleMs = LOOP_MAX_IDLE_MS;
+    if (idleMs > 0) {
+        vTaskDelay(pdMS_TO_TICKS(idleMs));
+        loopIdleMs += idleMs;
+    }
+
+    // LEDs are updated from state-changing functions (controlRelays when the HVAC engine changes state)
+    // No need for frequent polling - only update when state actually changes
+}
+
+// =============================================================================
+// MAIN LOOP JOBS
+// =============================================================================
 
-    // Control fan based on schedule - only check every 30 seconds
-    if (currentTime - lastFanScheduleTime > 30000) {
-        controlFanSchedule();
-        lastFanScheduleTime = currentTime;
-    }
+// Control fan based on schedule
+void jobFanSchedule() {
+    controlFanSchedule();
+}
 
-    // Check temperature schedule - only check every 60 seconds
-    if (currentTime - lastScheduleCheckTime > 60000) {
+// Temperature schedule - only does work when the next transition is due or the schedule changed
+void jobScheduleCheck() {
+    if (scheduleCheckDue()) {
         checkSchedule();
-        lastScheduleCheckTime = currentTime;
     }
-    
-    // Update weather data if enabled and connected to WiFi
-    static unsigned long lastWeatherDebug = 0;
+}
+
+// Update weather data if enabled and connected to WiFi (Weather enforces its own refresh interval)
+void jobWeather() {
     if (weatherSource != 0 && WiFi.status() == WL_CONNECTED) {
-        bool updated = weather.update(); // Will only update if interval has passed
-        
-        // Debug weather status every 60 seconds
-        if (millis() - lastWeatherDebug > 60000) {
-            debugLog("WEATHER: Source=%d, Valid=%d, Temp=%.1f, Condition=%s, Error=%s\n",
-                         weatherSource,
-                         weather.isDataValid(),
-                         weather.getData().temperature,
-                         weather.getData().condition.c_str(),
-                         weather.getLastError().c_str());
-            lastWeatherDebug = millis();
-        }
+        weather.update();
     }
+}
 
-    // Update display brightness based on light sensor - check every 1 second
-    updateDisplayBrightness();
-
-    // Check motion sensor every 100ms
-    static unsigned long lastMotionCheck = 0;
-    if (millis() - lastMotionCheck > 100) {
-        lastMotionCheck = millis();
-        readMotionSensor();
+void jobWeatherStatus() {
+    if (weatherSource != 0 && WiFi.status() == WL_CONNECTED) {
+        LOG_D(WEATHER, "WEATHER: Source=%d, Valid=%d, Temp=%.1f, Condition=%s, Error=%s\n",
+                           weatherSource,
+                           weather.isDataValid(),
+                           weather.getData().temperature,
+                           weather.getData().condition.c_str(),
+                           weather.getLastError().c_str());
     }
+}
 
-    // Debug LD2410 status every 30 seconds
-    static unsigned long lastLD2410Status = 0;
-    if (millis() - lastLD2410Status > 30000) {
-        lastLD2410Status = millis();
-        if (ld2410Connected) {
-            debugLog("LD2410: Status - Connected: %s, Motion: %s, Last motion: %lu ms ago\\n",
-                          ld2410Connected ? "YES" : "NO",
-                          motionDetected ? "ACTIVE" : "INACTIVE",
-                          millis() - lastMotionTime);
-        } else {
-            debugLog("LD2410: Status - Sensor not detected, display control via touch only\n");
-        }
+// Debug LD2410 status
+void jobLD2410Status() {
+    if (ld2410Connected) {
+        LOG_D(MOTION, "LD2410: Status - Connected: %s, Motion: %s, Last motion: %lu ms ago\n",
+                           ld2410Connected ? "YES" : "NO",
+                           motionDetected ? "ACTIVE" : "INACTIVE",
+                           millis() - lastMotionTime);
+    } else {
+        LOG_D(MOTION, "LD2410: Status - Sensor not detected, display control via touch only\n");
     }
+}
 
-    // Check if display should go to sleep due to inactivity
-    checkDisplaySleep();
-    
-    // Periodic debug output to buffer every 5 seconds
-    static unsigned long lastDebugOutput = 0;
-    if (currentTime - lastDebugOutput > 5000) {
-        lastDebugOutput = currentTime;
-        char dbgMsg[128];
-        snprintf(dbgMsg, sizeof(dbgMsg), 
-                 "[DEBUG] Temp=%.1f H=%.1f Sleep=%d SleepTime=%lu\n",
-                 currentTemp, currentHumidity, displayIsAsleep, 
-                 currentTime - lastInteractionTime);
-        Serial.print(dbgMsg);
-        addToDebugBuffer(dbgMsg);
-    }
-    // Periodic display updates - now called from main loop for thread safety with TFT library
-    if (currentTime - lastDisplayUpdateTime > displayUpdateInterval)
-    {
-        updateDisplay(currentTemp, currentHumidity);
-        lastDisplayUpdateTime = currentTime;
-    }
+// Periodic debug output to buffer
+void jobDebugOutput() {
+    LOG_D(DISPLAY, "[DEBUG] Temp=%.1f H=%.1f Sleep=%d SleepTime=%lu\n",
+                   currentTemp, currentHumidity, displayIsAsleep, 
+                   millis() - lastInteractionTime);
+}
 
-    // Attempt to connect to WiFi if not connected - check every 30 seconds
-    if (WiFi.status() != WL_CONNECTED && currentTime - lastWiFiAttemptTime > 30000)
-    {
+// Periodic display updates - run from the loop task for thread safety with TFT library
+void jobDisplayUpdate() {
+    updateDisplay(currentTemp, currentHumidity);
+}
+
+// Attempt to connect to WiFi if not connected
+void jobWiFiReconnect() {
+    if (WiFi.status() != WL_CONNECTED) {
         connectToWiFi();
-        lastWiFiAttemptTime = currentTime;
     }
-    
-    if (mqttEnabled)
-    {
-        // Attempt to reconnect to MQTT if not connected and WiFi is connected - check every 15 seconds
-        if (WiFi.status() == WL_CONNECTED && !mqttClient.connected() && currentTime - lastMQTTAttemptTime > 15000)
-        {
-            reconnectMQTT();
-            lastMQTTAttemptTime = currentTime;
-        }
-        mqttClient.loop();
-        
-        // Send MQTT feedback immediately if settings changed via MQTT
-        if (mqttFeedbackNeeded && mqttClient.connected()) {
-            debugLog("[MQTT] Sending immediate feedback for settings change\n");
-            sendMQTTData();
-            mqttFeedbackNeeded = false;
-            lastMQTTDataTime = currentTime;
-        }
-        
-        // Send MQTT data only every 10 seconds instead of every loop
-        if (currentTime - lastMQTTDataTime > 10000) {
-            sendMQTTData();
-            lastMQTTDataTime = currentTime;
-        }
+}
+
+void jobMQTTData() {
+    if (mqttEnabled) {
+        sendMQTTData();
     }
-    else
-    {
-        if (mqttClient.connected())
-        {
-            mqttClient.disconnect();
-        }
+}
+
+// Feed the history once a second; it is stored in Celsius whatever the display unit
+void jobHistory() {
+    unsigned long now = millis();
+    uint32_t heldMs = lastHistoryReading ? now - lastHistoryReading : 1000;
+    lastHistoryReading = now;
+
+    float tempC = NAN;
+    float humidity = NAN;
+    if (sensorReadingValid) {
+        tempC = useFahrenheit ? (currentTemp - 32.0f) * 5.0f / 9.0f : currentTemp;
+        humidity = currentHumidity;
     }
+    float hydronicC = NAN;
+    if (hydronicHeatingEnabled) {
+        hydronicC = useFahrenheit ? (hydronicTemp - 32.0f) * 5.0f / 9.0f : hydronicTemp;
+    }
+    history.addReading((uint32_t)time(nullptr), tempC, humidity, hydronicC, readRelayPins(), heldMs);
+}
 
-    // Control relays more frequently for immediate response to setting changes
-    static unsigned long lastRelayControlTime = 0;
-    if (currentTime - lastRelayControlTime > 1000) { // Control relays every 1 second
-        controlRelays(currentTemp);
-        lastRelayControlTime = currentTime;
+// Control relays frequently for immediate response to setting changes
+void jobControlRelays() {
+    controlRelays(currentTemp);
+}
+
+// Push changed live values to /events clients (keyframe every STATE_PUSH_KEYFRAME_MS)
+void jobPushState() {
+    if (events.count() == 0) {
+        statePushPending = false;
+        return;
     }
 
-    // Periodic diagnostics: heap and stack watermarks
-    if (currentTime - lastDiagLogTime > 30000) { // every 30 seconds
-        logRuntimeDiagnostics();
-        lastDiagLogTime = currentTime;
+    unsigned long now = millis();
+    if (now - lastStateKeyframe >= STATE_PUSH_KEYFRAME_MS) {
+        DynamicJsonDocument doc(1536);
+        buildLiveState(doc);
+        String json;
+        serializeJson(doc, json);
+        events.send(json.c_str(), "state", statePushSeq);
+        lastStateKeyframe = now;
+        lastPushSnapshot = takePushSnapshot();
+        statePushPending = false;
+        return;
     }
 
-    // LEDs are updated from state-changing functions (activateHeating, activateCooling, turnOffAllRelays)
-    // No need for frequent polling - only update when state actually changes
+    if (!statePushPending) return;
+    statePushPending = false;
+
+    PushSnapshot snap = takePushSnapshot();
+    StaticJsonDocument<384> doc;
+    JsonObject status = doc.createNestedObject("status");
+    if (snap.temp10 != lastPushSnapshot.temp10) status["temp"] = serialized(String(snap.temp10 / 10.0, 1));
+    if (snap.humidity10 != lastPushSnapshot.humidity10) status["humidity"] = serialized(String(snap.humidity10 / 10.0, 1));
+    if (snap.hydronic10 != lastPushSnapshot.hydronic10) status["hydronicTemp"] = serialized(String(snap.hydronic10 / 10.0, 1));
+    if (snap.mode != lastPushSnapshot.mode) status["mode"] = snap.mode;
+    if (snap.fanMode != lastPushSnapshot.fanMode) status["fanMode"] = snap.fanMode;
+    if (snap.relays != lastPushSnapshot.relays) {
+        JsonObject relays = status.createNestedObject("relays");
+        relays["heat1"] = (snap.relays & 0x01) != 0;
+        relays["heat2"] = (snap.relays & 0x02) != 0;
+        relays["cool1"] = (snap.relays & 0x04) != 0;
+        relays["cool2"] = (snap.relays & 0x08) != 0;
+        relays["fan"] = (snap.relays & 0x10) != 0;
+    }
+    if (status.size() == 0) return; // Nothing the UI can see has changed
+
+    char json[384];
+    serializeJson(doc, json, sizeof(json));
+    events.send(json, "delta", ++statePushSeq);
+    lastPushSnapshot = snap;
+}
+
+// Register the periodic work done by loop(). Equal-period jobs get a little
+// jitter so they don't all land in the same pass.
+void setupLoopJobs() {
+    loopJobs.addJob("relays", jobControlRelays, 1000, JOB_PRIORITY_HIGH);
+    loopJobs.addJob("state_push", jobPushState, 250, JOB_PRIORITY_NORMAL);
+    loopJobs.addJob("motion", readMotionSensor, 100, JOB_PRIORITY_HIGH);
+    loopJobs.addJob("disp_sleep", checkDisplaySleep, 100, JOB_PRIORITY_NORMAL);
+    loopJobs.addJob("display", jobDisplayUpdate, displayUpdateInterval, JOB_PRIORITY_NORMAL);
+    loopJobs.addJob("brightness", updateDisplayBrightness, BRIGHTNESS_UPDATE_INTERVAL, JOB_PRIORITY_LOW);
+    loopJobs.addJob("schedule", jobScheduleCheck, 1000, JOB_PRIORITY_NORMAL);
+    loopJobs.addJob("fan_sched", jobFanSchedule, 30000, JOB_PRIORITY_NORMAL);
+    mqttDataJobId = loopJobs.addJob("mqtt_data", jobMQTTData, 10000, JOB_PRIORITY_NORMAL, 250);
+    loopJobs.addJob("wifi_conn", jobWiFiReconnect, 30000, JOB_PRIORITY_LOW, 500, 30000);
+    loopJobs.addJob("weather", jobWeather, 1000, JOB_PRIORITY_LOW);
+    loopJobs.addJob("weather_log", jobWeatherStatus, 60000, JOB_PRIORITY_LOW, 1000, 60000);
+    loopJobs.addJob("ld2410_log", jobLD2410Status, 30000, JOB_PRIORITY_LOW, 1000, 30000);
+    loopJobs.addJob("debug_out", jobDebugOutput, 5000, JOB_PRIORITY_LOW, 100, 5000);
+    loopJobs.addJob("diagnostics", logRuntimeDiagnostics, 30000, JOB_PRIORITY_LOW, 1000, 30000);
+    loopJobs.addJob("history", jobHistory, 1000, JOB_PRIORITY_LOW);
+    loopIdleWindowStart = millis();
+}
+
+// Restart from a short-lived task so web/MQTT callbacks can return and flush their responses
+void scheduleRestart(uint32_t delayMs, const char* reason) {
+    static uint32_t restartDelayMs;
+    restartDelayMs = delayMs;
+    LOG_I(SYSTEM, "[BOOT] Restart scheduled in %lu ms (%s)\n", (unsigned long)delayMs, reason);
+    xTaskCreate([](void*) {
+        vTaskDelay(pdMS_TO_TICKS(restartDelayMs));
+        history.flush(); // Keep the records still in the write-back cache
+        LOG_I(SYSTEM, "[BOOT] Restarting now...\n");
+        ESP.restart();
+    }, "deferred_restart", 4096, nullptr, 1, nullptr);
 }
 
 void logRuntimeDiagnostics() {
-    size_t free8 = heap_caps_get_free_size(MALLOC_CAP_8BIT);
-    size_t largest8 = heap_caps_get_largest_free_block(MALLOC_CAP_8BIT);
-    size_t minFree8 = heap_caps_get_minimum_free_size(MALLOC_CAP_8BIT);
+    const DiagSample& sample = diagHistory.sample();
+    
+    // Internal RAM only - PSRAM would hide how much is left for WiFi/TCP
+    size_t free8 = heap_caps_get_free_size(MALLOC_CAP_INTERNAL | MALLOC_CAP_8BIT);
+    size_t largest8 = heap_caps_get_largest_free_block(MALLOC_CAP_INTERNAL | MALLOC_CAP_8BIT);
+    size_t minFree8 = heap_caps_get_minimum_free_size(MALLOC_CAP_INTERNAL | MALLOC_CAP_8BIT);
 
     UBaseType_t mainWatermark = uxTaskGetStackHighWaterMark(NULL);
     UBaseType_t sensorWatermark = sensorTask ? uxTaskGetStackHighWaterMark(sensorTask) : 0;
     UBaseType_t displayWatermark = displayUpdateTask ? uxTaskGetStackHighWaterMark(displayUpdateTask) : 0;
 
-    debugLog("[DIAG] Heap: free=%uB, largest=%uB, min_free=%uB\n",
-                  (unsigned)free8, (unsigned)largest8, (unsigned)minFree8);
-    debugLog("[DIAG] Stack HWM (words): main=%lu, sensor=%lu, display=%lu\n",
-                  (unsigned long)mainWatermark,
-                  (unsigned long)sensorWatermark,
-                  (unsigned long)displayWatermark);
+    LOG_I(SYSTEM, "[DIAG] Heap: free=%uB, largest=%uB, min_free=%uB\n",
+                       (unsigned)free8, (unsigned)largest8, (unsigned)minFree8);
+    if (psramAvailable()) {
+        LOG_I(SYSTEM, "[DIAG] PSRAM: free=%uB, largest=%uB\n",
+                           (unsigned)psramFreeBytes(), (unsigned)heap_caps_get_largest_free_block(MALLOC_CAP_SPIRAM));
+    }
+    LOG_I(SYSTEM, "[DIAG] Stack HWM (words): main=%lu, sensor=%lu, display=%lu\n",
+                       (unsigned long)mainWatermark,
+                       (unsigned long)sensorWatermark,
+                       (unsigned long)displayWatermark);
+    // -1 = no run-time stats reading yet (same as the diagnostics CSV)
+    int cpu[DIAG_TASK_COUNT];
+    for (int t = 0; t < DIAG_TASK_COUNT; t++) {
+        cpu[t] = sample.cpu[t] == DIAG_CPU_UNAVAILABLE ? -1 : sample.cpu[t];
+    }
+    LOG_I(SYSTEM, "[DIAG] Heap blocks: alloc=%u, free=%u | CPU%%: loop=%d, sensor=%d, display=%d, tcp=%d, idle0=%d, idle1=%d\n",
+                       sample.heapAllocBlocks, sample.heapFreeBlocks,
+                       cpu[DIAG_TASK_LOOP], cpu[DIAG_TASK_SENSOR], cpu[DIAG_TASK_DISPLAY],
+                       cpu[DIAG_TASK_ASYNC_TCP], cpu[DIAG_TASK_IDLE0], cpu[DIAG_TASK_IDLE1]);
+    LOG_I(SYSTEM, "[DIAG] Requests: mqtt_rx=%u, mqtt_publishes=%u, mqtt_reconnects=%u, http=%u\n",
+                       sample.mqttRx, sample.mqttPublishes, sample.mqttReconnects, sample.httpRequests);
+
+    // Loop job timings since the previous report
+    uint32_t now = millis();
+    uint32_t windowMs = now - loopIdleWindowStart;
+    LOG_I(SYSTEM, "[DIAG] Loop idle: %lu%% of %lums\n",
+                       windowMs > 0 ? (unsigned long)((uint64_t)loopIdleMs * 100 / windowMs) : 0UL,
+                       (unsigned long)windowMs);
+    for (int i = 0; i < loopJobs.getJobCount(); i++) {
+        const SchedulerJob& job = loopJobs.getJob(i);
+        if (job.runCount == 0) continue;
+        LOG_I(SYSTEM, "[DIAG] Job %-11s runs=%lu avg=%luus max=%luus late_max=%lums\n",
+                           job.name,
+                           (unsigned long)job.runCount,
+                           (unsigned long)(job.totalRunUs / job.runCount),
+                           (unsigned long)job.maxRunUs,
+                           (unsigned long)job.maxLateMs);
+    }
+    loopJobs.resetStats();
+    loopIdleMs = 0;
+    loopIdleWindowStart = now;
 }
 
 void setupWiFi()
@@ -1786,25 +2179,24 @@ void setupWiFi()
         while (WiFi.status() != WL_CONNECTED && millis() - startAttemptTime < 10000)
         {
             delay(1000);
-            debugLog("Connecting to WiFi...\n");
+            LOG_I(WIFI, "Connecting to WiFi...\n");
         }
 
         if (WiFi.status() == WL_CONNECTED)
         {
-            debugLog("Connected to WiFi\n");
-            debugLog("IP Address: ");
-            Serial.println(WiFi.localIP());
+            LOG_I(WIFI, "Connected to WiFi\n");
+            LOG_I(WIFI, "IP Address: %s\n", WiFi.localIP().toString().c_str());
         }
         else
         {
-            debugLog("Failed to connect to WiFi\n");
+            LOG_W(WIFI, "Failed to connect to WiFi\n");
             enterWiFiCredentials();
         }
     }
     else
     {
         // No WiFi credentials found, prompt user to enter them via touch screen
-        debugLog("No WiFi credentials found. Please enter them via the touch screen.\n");
+        LOG_I(WIFI, "No WiFi credentials found. Please enter them via the touch screen.\n");
         enterWiFiCredentials();
     }
 }
@@ -1813,10 +2205,7 @@ void connectToWiFi()
 {
     if (wifiSSID != "" && wifiPassword != "")
     {
-        debugLog("Connecting to WiFi with SSID: ");
-        Serial.println(wifiSSID);
-        debugLog("Password: ");
-        Serial.println(wifiPassword);
+        LOG_I(WIFI, "Connecting to WiFi with SSID: %s\n", wifiSSID.c_str());
 
         WiFi.begin(wifiSSID.c_str(), wifiPassword.c_str());
         unsigned long startAttemptTime = millis();
@@ -1825,18 +2214,17 @@ void connectToWiFi()
         while (WiFi.status() != WL_CONNECTED && millis() - startAttemptTime < 10000)
         {
             delay(1000);
-            debugLog("Connecting to WiFi...\n");
+            LOG_I(WIFI, "Connecting to WiFi...\n");
         }
 
         if (WiFi.status() == WL_CONNECTED)
         {
-            debugLog("Connected to WiFi\n");
-            debugLog("IP Address: ");
-            Serial.println(WiFi.localIP());
+            LOG_I(WIFI, "Connected to WiFi\n");
+            LOG_I(WIFI, "IP Address: %s\n", WiFi.localIP().toString().c_str());
         }
         else
         {
-            debugLog("Failed to connect to WiFi\n");
+            LOG_W(WIFI, "Failed to connect to WiFi\n");
             // Don't enter WiFi credentials mode here, just return
             // This allows the device to keep operating without WiFi
         }
@@ -1844,7 +2232,7 @@ void connectToWiFi()
     else
     {
         // Having no credentials is fine - don't trigger WiFi setup automatically
-        debugLog("No WiFi credentials found. Device operating in offline mode.\n");
+        LOG_I(WIFI, "No WiFi credentials found. Device operating in offline mode.\n");
         // Note: User can press the WiFi button on the display to configure WiFi if desired
     }
 }
@@ -1874,53 +2262,85 @@ void enterWiFiCredentials()
         static unsigned long lastStatusPrint = 0;
         unsigned long currentTime = millis();
         if (currentTime - lastStatusPrint > 5000) {
-            debugLog("Waiting for WiFi credentials...\n");
+            LOG_I(WIFI, "Waiting for WiFi credentials...\n");
             lastStatusPrint = currentTime;
         }
     }
 }
 
+// Full-screen back buffer for screens that are redrawn whole. The 150KB sprite only
+// fits in PSRAM, so without it drawing goes straight to the display as before.
+TFT_eSPI& beginFrame()
+{
+    if (!frameSpriteTried) {
+        frameSpriteTried = true;
+        if (psramAvailable()) {
+            frameSprite = new TFT_eSprite(&tft);
+            frameSprite->setColorDepth(16);
+            if (frameSprite->createSprite(tft.width(), tft.height()) == NULL) {
+                LOG_W(SYSTEM, "[MEM] Full-screen sprite allocation failed - drawing direct\n");
+                delete frameSprite;
+                frameSprite = NULL;
+            }
+        }
+    }
+    if (frameSprite) {
+        return *frameSprite;
+    }
+    return tft;
+}
+
+void endFrame()
+{
+    if (frameSprite) {
+        frameSprite->pushSprite(0, 0);
+    }
+}
+
 void drawKeyboard(bool isUpperCaseKeyboard)
 {
+    // Drawn off-screen and pushed in one go when there is a PSRAM frame buffer (no flash on SHIFT)
+    TFT_eSPI& gfx = beginFrame();
+    
     // Clear the entire screen first to prevent any overlapping elements
-    tft.fillScreen(COLOR_BACKGROUND);
+    gfx.fillScreen(COLOR_BACKGROUND);
     
     // Draw header with better styling
-    tft.setTextColor(COLOR_TEXT, COLOR_BACKGROUND);
-    tft.setTextSize(2);
-    tft.setCursor(10, 10);
+    gfx.setTextColor(COLOR_TEXT, COLOR_BACKGROUND);
+    gfx.setTextSize(2);
+    gfx.setCursor(10, 10);
     const char* header = "Enter SSID:";
     if (keyboardMode == KB_WIFI_PASS) {
         header = "Enter Password:";
     } else if (keyboardMode == KB_HOSTNAME) {
         header = "Enter Hostname:";
     }
-    tft.println(header);
+    gfx.println(header);
 
     // Back button to exit to main/settings
     int backX = 250, backY = 5, backW = 60, backH = 25;
-    tft.fillRect(backX, backY, backW, backH, COLOR_WARNING);
-    tft.drawRect(backX, backY, backW, backH, COLOR_TEXT);
-    tft.setTextColor(TFT_BLACK, COLOR_WARNING);
-    tft.setTextSize(1);
-    tft.setCursor(backX + 10, backY + 9);
-    tft.print("Back");
-    tft.setTextColor(COLOR_TEXT, COLOR_BACKGROUND);
-    tft.setTextSize(2);
+    gfx.fillRect(backX, backY, backW, backH, COLOR_WARNING);
+    gfx.drawRect(backX, backY, backW, backH, COLOR_TEXT);
+    gfx.setTextColor(TFT_BLACK, COLOR_WARNING);
+    gfx.setTextSize(1);
+    gfx.setCursor(backX + 10, backY + 9);
+    gfx.print("Back");
+    gfx.setTextColor(COLOR_TEXT, COLOR_BACKGROUND);
+    gfx.setTextSize(2);
     
     // Draw input text area with border
-    tft.drawRect(5, 35, 310, 30, COLOR_TEXT);
-    tft.fillRect(6, 36, 308, 28, COLOR_BACKGROUND);
-    tft.setTextColor(COLOR_TEXT, COLOR_BACKGROUND);
-    tft.setTextSize(2);
-    tft.setCursor(10, 42);
-    tft.println(inputText);
+    gfx.drawRect(5, 35, 310, 30, COLOR_TEXT);
+    gfx.fillRect(6, 36, 308, 28, COLOR_BACKGROUND);
+    gfx.setTextColor(COLOR_TEXT, COLOR_BACKGROUND);
+    gfx.setTextSize(2);
+    gfx.setCursor(10, 42);
+    gfx.println(inputText);
 
     // Select keyboard layout
     const char* (*keys)[10] = isUpperCaseKeyboard ? KEYBOARD_UPPER : KEYBOARD_LOWER;
 
     // Draw keyboard with improved styling
-    tft.setTextSize(1);
+    gfx.setTextSize(1);
     for (int row = 0; row < 5; row++)
     {
         for (int col = 0; col < 10; col++)
@@ -1944,24 +2364,25 @@ void drawKeyboard(bool isUpperCaseKeyboard)
             }
             
             // Draw key background
-            tft.fillRect(x, y, KEY_WIDTH, KEY_HEIGHT, keyColor);
-            tft.drawRect(x, y, KEY_WIDTH, KEY_HEIGHT, COLOR_TEXT);
+            gfx.fillRect(x, y, KEY_WIDTH, KEY_HEIGHT, keyColor);
+            gfx.drawRect(x, y, KEY_WIDTH, KEY_HEIGHT, COLOR_TEXT);
             
             // Draw key label - center the text
-            tft.setTextColor(textColor);
+            gfx.setTextColor(textColor);
             int textWidth = strlen(keyLabel) * 6; // Approximate width
             int textX = x + (KEY_WIDTH - textWidth) / 2;
             int textY = y + (KEY_HEIGHT - 8) / 2;
-            tft.setCursor(textX, textY);
+            gfx.setCursor(textX, textY);
             
             // Special display for space key
             if (strcmp(keyLabel, "SPC") == 0) {
-                tft.print("SPACE");
+                gfx.print("SPACE");
             } else {
-                tft.print(keyLabel);
+                gfx.print(keyLabel);
             }
         }
     }
+    endFrame();
 }
 
 void handleKeyPress(int row, int col)
@@ -2054,7 +2475,7 @@ void handleKeyPress(int row, int col)
                     tft.setCursor(30 + (dots * 12), 160);
                     tft.print(".");
                     dots = (dots + 1) % 20;
-                    debugLog("Connecting to WiFi...\n");
+                    LOG_I(WIFI, "Connecting to WiFi...\n");
                 }
 
                 if (WiFi.status() == WL_CONNECTED)
@@ -2066,9 +2487,8 @@ void handleKeyPress(int row, int col)
                     tft.setTextColor(COLOR_TEXT, COLOR_BACKGROUND);
                     tft.setCursor(30, 130);
                     tft.println("Restarting...");
-                    debugLog("Connected to WiFi\n");
-                    debugLog("IP Address: ");
-                    Serial.println(WiFi.localIP());
+                    LOG_I(WIFI, "Connected to WiFi\n");
+                    LOG_I(SYSTEM, "IP Address: %s\n", WiFi.localIP().toString().c_str());
                     delay(2000);
                     ESP.restart();
                 }
@@ -2081,7 +2501,7 @@ void handleKeyPress(int row, int col)
                     tft.setTextColor(COLOR_TEXT, COLOR_BACKGROUND);
                     tft.setCursor(30, 130);
                     tft.println("Touch to retry");
-                    debugLog("Failed to connect to WiFi\n");
+                    LOG_W(WIFI, "Failed to connect to WiFi\n");
                     delay(3000);
                     // Reset and return to keyboard
                     inputText = "";
@@ -2211,14 +2631,14 @@ void handleButtonPress(uint16_t x, uint16_t y)
     }
     
     // Shower mode toggle - touch the set temp area (center display)
-    debugLog("[DEBUG] Touch: x=%d, y=%d, showerModeEnabled=%d\n", x, y, showerModeEnabled);
+    LOG_D(DISPLAY, "[DEBUG] Touch: x=%d, y=%d, showerModeEnabled=%d\n", x, y, showerModeEnabled);
     if (showerModeEnabled && x > 60 && x < 260 && y > 100 && y < 140) {
         showerModeActive = !showerModeActive;
         if (showerModeActive) {
             showerModeStartTime = millis();
-            debugLog("[SHOWER MODE] Activated - duration %d minutes\n", showerModeDuration);
+            LOG_I(HVAC, "[SHOWER MODE] Activated - duration %d minutes\n", showerModeDuration);
         } else {
-            debugLog("[SHOWER MODE] Deactivated\n");
+            LOG_I(HVAC, "[SHOWER MODE] Deactivated\n");
         }
         updateDisplay(currentTemp, currentHumidity);
         sendMQTTData();
@@ -2241,7 +2661,7 @@ void handleButtonPress(uint16_t x, uint16_t y)
         if (scheduleEnabled && !scheduleOverride) {
             scheduleOverride = true;
             overrideEndTime = millis() + (scheduleOverrideDuration * 60000UL);
-            debugLog("SCHEDULE: Override enabled due to manual temperature adjustment\n");
+            LOG_I(SCHEDULE, "SCHEDULE: Override enabled due to manual temperature adjustment\n");
         }
         
         if (thermostatMode == "heat")
@@ -2252,9 +2672,9 @@ void handleButtonPress(uint16_t x, uint16_t y)
             if (thermostatMode == "auto" && setTempCool - setTempHeat < tempDifferential)
             {
                 setTempCool = setTempHeat + tempDifferential;
-                if (!handlingMQTTMessage) mqttClient.publish("thermostat/setTempCool", String(setTempCool).c_str(), true);
+                if (!handlingMQTTMessage) mqttPublish("thermostat/setTempCool", String(setTempCool).c_str(), true);
             }
-            if (!handlingMQTTMessage) mqttClient.publish("thermostat/setTempHeat", String(setTempHeat).c_str(), true);
+            if (!handlingMQTTMessage) mqttPublish("thermostat/setTempHeat", String(setTempHeat).c_str(), true);
         }
         else if (thermostatMode == "cool")
         {
@@ -2264,16 +2684,16 @@ void handleButtonPress(uint16_t x, uint16_t y)
             if (thermostatMode == "auto" && setTempCool - setTempHeat < tempDifferential)
             {
                 setTempHeat = setTempCool - tempDifferential;
-                if (!handlingMQTTMessage) mqttClient.publish("thermostat/setTempHeat", String(setTempHeat).c_str(), true);
+                if (!handlingMQTTMessage) mqttPublish("thermostat/setTempHeat", String(setTempHeat).c_str(), true);
             }
-            if (!handlingMQTTMessage) mqttClient.publish("thermostat/setTempCool", String(setTempCool).c_str(), true);
+            if (!handlingMQTTMessage) mqttPublish("thermostat/setTempCool", String(setTempCool).c_str(), true);
         }
         else if (thermostatMode == "auto")
         {
             setTempAuto += 0.5;
             if (setTempAuto > 95) setTempAuto = 95;
             if (setTempAuto < 50) setTempAuto = 50;
-            if (!handlingMQTTMessage) mqttClient.publish("thermostat/setTempAuto", String(setTempAuto).c_str(), true);
+            if (!handlingMQTTMessage) mqttPublish("thermostat/setTempAuto", String(setTempAuto).c_str(), true);
         }
         // Single atomic save of all settings (including schedule override if set above)
         saveSettings();
@@ -2287,7 +2707,7 @@ void handleButtonPress(uint16_t x, uint16_t y)
         if (scheduleEnabled && !scheduleOverride) {
             scheduleOverride = true;
             overrideEndTime = millis() + (scheduleOverrideDuration * 60000UL);
-            debugLog("SCHEDULE: Override enabled due to manual temperature adjustment\n");
+            LOG_I(SCHEDULE, "SCHEDULE: Override enabled due to manual temperature adjustment\n");
         }
         
         if (thermostatMode == "heat")
@@ -2298,9 +2718,9 @@ void handleButtonPress(uint16_t x, uint16_t y)
             if (thermostatMode == "auto" && setTempCool - setTempHeat < tempDifferential)
             {
                 setTempCool = setTempHeat + tempDifferential;
-                if (!handlingMQTTMessage) mqttClient.publish("thermostat/setTempCool", String(setTempCool).c_str(), true);
+                if (!handlingMQTTMessage) mqttPublish("thermostat/setTempCool", String(setTempCool).c_str(), true);
             }
-            if (!handlingMQTTMessage) mqttClient.publish("thermostat/setTempHeat", String(setTempHeat).c_str(), true);
+            if (!handlingMQTTMessage) mqttPublish("thermostat/setTempHeat", String(setTempHeat).c_str(), true);
         }
         else if (thermostatMode == "cool")
         {
@@ -2310,16 +2730,16 @@ void handleButtonPress(uint16_t x, uint16_t y)
             if (thermostatMode == "auto" && setTempCool - setTempHeat < tempDifferential)
             {
                 setTempHeat = setTempCool - tempDifferential;
-                if (!handlingMQTTMessage) mqttClient.publish("thermostat/setTempHeat", String(setTempHeat).c_str(), true);
+                if (!handlingMQTTMessage) mqttPublish("thermostat/setTempHeat", String(setTempHeat).c_str(), true);
             }
-            if (!handlingMQTTMessage) mqttClient.publish("thermostat/setTempCool", String(setTempCool).c_str(), true);
+            if (!handlingMQTTMessage) mqttPublish("thermostat/setTempCool", String(setTempCool).c_str(), true);
         }
         else if (thermostatMode == "auto")
         {
             setTempAuto -= 0.5;
             if (setTempAuto > 95) setTempAuto = 95;
             if (setTempAuto < 50) setTempAuto = 50;
-            if (!handlingMQTTMessage) mqttClient.publish("thermostat/setTempAuto", String(setTempAuto).c_str(), true);
+            if (!handlingMQTTMessage) mqttPublish("thermostat/setTempAuto", String(setTempAuto).c_str(), true);
         }
         // Single atomic save of all settings (including schedule override if set above)
         saveSettings();
@@ -2340,7 +2760,7 @@ void handleButtonPress(uint16_t x, uint16_t y)
         else
             thermostatMode = "auto";
         
-        debugLog("[DEBUG] Mode switched: %s -> %s\n", oldMode.c_str(), thermostatMode.c_str());
+        LOG_D(HVAC, "[DEBUG] Mode switched: %s -> %s\n", oldMode.c_str(), thermostatMode.c_str());
 
         saveSettings();
         sendMQTTData();
@@ -2361,7 +2781,7 @@ void handleButtonPress(uint16_t x, uint16_t y)
         else
             fanMode = "auto";
 
-        debugLog("[FAN] Fan mode changed: %s -> %s\n", oldMode.c_str(), fanMode.c_str());
+        LOG_I(HVAC, "[FAN] Fan mode changed: %s -> %s\n", oldMode.c_str(), fanMode.c_str());
         saveSettings();
         sendMQTTData();
         // Immediately update relays to reflect fan mode change
@@ -2371,81 +2791,250 @@ void handleButtonPress(uint16_t x, uint16_t y)
     }
 }
 
+// Hand the broker settings to the MQTT task (call on the task that changed the Strings;
+// saveSettings() does). The task reconnects when they differ from the ones it is using.
+void publishMQTTConfig()
+{
+    if (mqttConfigMutex == NULL) {
+        return;
+    }
+    MqttConfig config;
+    memset(&config, 0, sizeof(config));
+    strlcpy(config.server, mqttServer.c_str(), sizeof(config.server));
+    config.port = mqttPort;
+    strlcpy(config.username, mqttUsername.c_str(), sizeof(config.username));
+    strlcpy(config.password, mqttPassword.c_str(), sizeof(config.password));
+    strlcpy(config.clientId, hostname.c_str(), sizeof(config.clientId));
+    
+    xSemaphoreTake(mqttConfigMutex, portMAX_DELAY);
+    bool changed = memcmp(&config, &mqttConfig, sizeof(config)) != 0;
+    if (changed) {
+        mqttConfig = config;
+        mqttConfigVersion++;
+    }
+    xSemaphoreGive(mqttConfigMutex);
+    if (changed && mqttTask != NULL) {
+        xTaskNotifyGive(mqttTask);
+    }
+}
+
+// Take the latest broker settings and configure the client (MQTT task only)
 void setupMQTT()
 {
-    mqttClient.setServer(mqttServer.c_str(), mqttPort);
+    xSemaphoreTake(mqttConfigMutex, portMAX_DELAY);
+    mqttTaskConfig = mqttConfig;
+    mqttTaskConfigVersion = mqttConfigVersion;
+    xSemaphoreGive(mqttConfigMutex);
+    
+    mqttClient.setServer(mqttTaskConfig.server, mqttTaskConfig.port);
     mqttClient.setBufferSize(1024); // Ensure buffer size is sufficient for large payloads
     mqttClient.setCallback(mqttCallback);
+    mqttClient.setSocketTimeout(MQTT_SOCKET_TIMEOUT_S); // CONNACK / packet read wait
+    espClient.setTimeout(MQTT_SOCKET_TIMEOUT_S);        // TCP connect wait to an unreachable broker
 }
 
-void reconnectMQTT()
+// One connection attempt (MQTT task only). The caller handles backoff and the republish.
+bool reconnectMQTT()
 {
-    // Non-blocking approach - only try once per function call
-    if (!mqttClient.connected())
-    {
-        debugLog("Attempting MQTT connection to server: ");
-        Serial.print(mqttServer);
-        debugLog(" port: ");
-        Serial.print(mqttPort);
-        debugLog(" username: ");
-        Serial.print(mqttUsername);
+    diagHistory.countMqttReconnect();
+    const MqttConfig& config = mqttTaskConfig;
+    if (mqttClient.connect(config.clientId, config.username, config.password)) {
+        LOG_I(MQTT, "[MQTT] Connected to %s:%d as %s\n", config.server, config.port, config.username);
+
+        // Subscribe to necessary topics
+        String prefix = config.clientId;
+        String tempSetTopic = prefix + "/target_temperature/set";
+        String modeSetTopic = prefix + "/mode/set";
+        String fanModeSetTopic = prefix + "/fan_mode/set";
+        String showerModeSetTopic = prefix + "/shower_mode/set";
+        String scheduleEnabledSetTopic = prefix + "/schedule_enabled/set";
+        String scheduleOverrideSetTopic = prefix + "/schedule_override/set";
+        String scheduleSetTopic = prefix + "/schedule/set";
+        String logLevelSetTopic = prefix + "/log_level/set";
+        mqttClient.subscribe(tempSetTopic.c_str());
+        mqttClient.subscribe(modeSetTopic.c_str());
+        mqttClient.subscribe(fanModeSetTopic.c_str());
+        mqttClient.subscribe(showerModeSetTopic.c_str());
+        mqttClient.subscribe(scheduleEnabledSetTopic.c_str());
+        mqttClient.subscribe(scheduleOverrideSetTopic.c_str());
+        mqttClient.subscribe(scheduleSetTopic.c_str());
+        mqttClient.subscribe(logLevelSetTopic.c_str());
+        return true;
+    }
+
+    int mqttState = mqttClient.state();
+    
+    // Provide human-readable error messages
+    const char* reason;
+    switch(mqttState) {
+        case -4: reason = "MQTT_CONNECTION_TIMEOUT"; break;
+        case -3: reason = "MQTT_CONNECTION_LOST"; break;
+        case -2: reason = "MQTT_CONNECT_FAILED"; break;
+        case -1: reason = "MQTT_DISCONNECTED"; break;
+        case 1: reason = "MQTT_CONNECT_BAD_PROTOCOL"; break;
+        case 2: reason = "MQTT_CONNECT_BAD_CLIENT_ID"; break;
+        case 3: reason = "MQTT_CONNECT_UNAVAILABLE"; break;
+        case 4: reason = "MQTT_CONNECT_BAD_CREDENTIALS"; break;
+        case 5: reason = "MQTT_CONNECT_UNAUTHORIZED"; break;
+        default: reason = "UNKNOWN ERROR"; break;
+    }
+    
+    LOG_E(MQTT, "[MQTT] Connection to %s:%d as %s failed, rc=%d (%s)\n",
+                config.server, config.port, config.username, mqttState, reason);
+    return false;
+}
+
+// MQTT connection manager (core 0, next to the WiFi stack). A broker that is down or
+// unreachable only ever stalls this task; loop() keeps running and publishes pile up
+// (coalesced) in mqttOutbox until the next session.
+void mqttTaskFunction(void *parameter)
+{
+    unsigned long backoff = MQTT_BACKOFF_MIN_MS;
+    unsigned long retryDelay = 0;
+    unsigned long lastAttempt = 0;
+    
+    for (;;) {
+        if (!mqttEnabled || WiFi.status() != WL_CONNECTED) {
+            if (mqttClient.connected()) {
+                mqttClient.disconnect();
+            }
+            mqttConnected = false;
+            backoff = MQTT_BACKOFF_MIN_MS;
+            retryDelay = 0;
+            ulTaskNotifyTake(pdTRUE, pdMS_TO_TICKS(1000));
+            continue;
+        }
         
-        if (mqttClient.connect(hostname.c_str(), mqttUsername.c_str(), mqttPassword.c_str())) {
-            debugLog(" - Connected successfully\n");
-
-            // Subscribe to necessary topics
-            String tempSetTopic = hostname + "/target_temperature/set";
-            String modeSetTopic = hostname + "/mode/set";
-            String fanModeSetTopic = hostname + "/fan_mode/set";
-            String showerModeSetTopic = hostname + "/shower_mode/set";
-            String scheduleEnabledSetTopic = hostname + "/schedule_enabled/set";
-            String scheduleOverrideSetTopic = hostname + "/schedule_override/set";
-            String scheduleSetTopic = hostname + "/schedule/set";
-            mqttClient.subscribe(tempSetTopic.c_str());
-            mqttClient.subscribe(modeSetTopic.c_str());
-            mqttClient.subscribe(fanModeSetTopic.c_str());
-            mqttClient.subscribe(showerModeSetTopic.c_str());
-            mqttClient.subscribe(scheduleEnabledSetTopic.c_str());
-            mqttClient.subscribe(scheduleOverrideSetTopic.c_str());
-            mqttClient.subscribe(scheduleSetTopic.c_str());
-
-            // Publish Home Assistant discovery messages
-            publishHomeAssistantDiscovery();
-            
-            // Reset MQTT data cache so all values get republished
-            resetMQTTDataCache();
-            
-            // Immediately publish current state so Home Assistant doesn't show "unknown"
-            sendMQTTData();
+        if (!mqttClient.connected()) {
+            if (mqttConnected) {
+                mqttConnected = false;
+                LOG_I(MQTT, "[MQTT] Connection lost (rc=%d), reconnecting\n", mqttClient.state());
+                backoff = MQTT_BACKOFF_MIN_MS;
+                retryDelay = 0;
+            }
+            if (millis() - lastAttempt >= retryDelay) {
+                lastAttempt = millis();
+                setupMQTT(); // Picks up broker settings saved from the web UI
+                if (reconnectMQTT()) {
+                    mqttConnected = true;
+                    mqttSessionStarted = true;
+                    backoff = MQTT_BACKOFF_MIN_MS;
+                } else {
+                    // Exponential backoff with +/-25% jitter so a fleet does not retry in lockstep
+                    retryDelay = backoff - backoff / 4 + esp_random() % (backoff / 2 + 1);
+                    backoff = min(backoff * 2, MQTT_BACKOFF_MAX_MS);
+                    LOG_I(MQTT, "[MQTT] Next attempt in %lu ms (%u queued)\n", retryDelay, (unsigned)mqttOutbox.count());
+                }
+            }
+        } else if (mqttConfigVersion != mqttTaskConfigVersion) {
+            // Broker settings changed - connect again with the new ones
+            LOG_I(MQTT, "[MQTT] Broker settings changed, reconnecting\n");
+            mqttClient.disconnect();
+            mqttConnected = false;
+            backoff = MQTT_BACKOFF_MIN_MS;
+            retryDelay = 0;
+        } else {
+            mqttClient.loop();
+            flushMQTTOutbox();
         }
-        else
-        {
-            int mqttState = mqttClient.state();
-            debugLog(" - Connection failed, rc=");
-            Serial.print(mqttState);
-            debugLog(" (");
-            
-            // Provide human-readable error messages
-            switch(mqttState) {
-                case -4: debugLog("MQTT_CONNECTION_TIMEOUT"); break;
-                case -3: debugLog("MQTT_CONNECTION_LOST"); break;
-                case -2: debugLog("MQTT_CONNECT_FAILED"); break;
-                case -1: debugLog("MQTT_DISCONNECTED"); break;
-                case 1: debugLog("MQTT_CONNECT_BAD_PROTOCOL"); break;
-                case 2: debugLog("MQTT_CONNECT_BAD_CLIENT_ID"); break;
-                case 3: debugLog("MQTT_CONNECT_UNAVAILABLE"); break;
-                case 4: debugLog("MQTT_CONNECT_BAD_CREDENTIALS"); break;
-                case 5: debugLog("MQTT_CONNECT_UNAUTHORIZED"); break;
-                default: debugLog("UNKNOWN ERROR"); break;
+        
+        // Woken early by mqttPublish(); the timeout keeps the keepalive and inbound polling going
+        ulTaskNotifyTake(pdTRUE, pdMS_TO_TICKS(mqttConnected ? 50 : 250));
+    }
+}
+
+// Send up to MQTT_FLUSH_BATCH queued messages (MQTT task only)
+void flushMQTTOutbox()
+{
+    for (int i = 0; i < MQTT_FLUSH_BATCH; i++) {
+        MqttMessage message;
+        xSemaphoreTake(mqttOutboxMutex, portMAX_DELAY);
+        bool pending = mqttOutbox.take(message);
+        xSemaphoreGive(mqttOutboxMutex);
+        if (!pending) {
+            return;
+        }
+        
+        if (!mqttClient.publish(message.topic(), message.payload, message.retained)) {
+            if (mqttClient.connected()) {
+                // Still connected, so it can never be sent (larger than the client buffer)
+                LOG_E(MQTT, "[MQTT] Dropping %s (%u bytes) - publish refused\n", message.topic(), message.size);
+                MqttOutbox::release(message);
+                continue;
             }
-            
-            debugLog(")\n");
-            debugLog("Server: ");
-            Serial.print(mqttServer);
-            debugLog(", Port: ");
-            Serial.println(mqttPort);
+            xSemaphoreTake(mqttOutboxMutex, portMAX_DELAY);
+            mqttOutbox.restore(message);
+            xSemaphoreGive(mqttOutboxMutex);
+            return;
         }
+        MqttOutbox::release(message);
+    }
+    // Batch used up - come straight back for the rest
+    xTaskNotifyGive(xTaskGetCurrentTaskHandle());
+}
+
+// One pass of a session's republish (loop only). Discovery goes first and may take several
+// passes; the state topics (resetMQTTDataCache + sendMQTTData, about 20) fit in one. A pass
+// only starts on an empty outbox, so a slow or stalled broker just holds the republish back.
+void runMQTTRepublish()
+{
+    if (!mqttConnected) {
+        return; // The next session starts over
+    }
+    xSemaphoreTake(mqttOutboxMutex, portMAX_DELAY);
+    bool drained = mqttOutbox.empty();
+    xSemaphoreGive(mqttOutboxMutex);
+    if (!drained) {
+        return;
+    }
+    
+    if (mqttRepublishPhase == MQTT_REPUBLISH_STATE) {
+        mqttRepublishPhase = MQTT_REPUBLISH_IDLE;
+        resetMQTTDataCache();
+        sendMQTTData();
+        loopJobs.postpone(mqttDataJobId);
+        return;
+    }
+    
+    mqttRepublishSeen = 0;
+    mqttRepublishFull = false;
+    mqttRepublishTask = xTaskGetCurrentTaskHandle();
+    publishHomeAssistantDiscovery();
+    mqttRepublishTask = NULL;
+    if (!mqttRepublishFull) {
+        LOG_I(MQTT, "[MQTT] Discovery republished (%u messages)\n", (unsigned)mqttRepublishQueued);
+        mqttRepublishPhase = MQTT_REPUBLISH_STATE;
+    }
+}
+
+// Queue a publish for the MQTT task (safe from any task). While the broker is down the
+// outbox keeps the latest payload per topic and sends it after reconnecting. Never waits:
+// during a republish pass a publish that does not fit is left for the next pass.
+bool mqttPublish(const char* topic, const char* payload, bool retained)
+{
+    if (!mqttEnabled || mqttOutboxMutex == NULL) {
+        return false;
+    }
+    bool republish = mqttRepublishTask != NULL && xTaskGetCurrentTaskHandle() == mqttRepublishTask;
+    if (republish && (mqttRepublishSeen++ < mqttRepublishQueued || mqttRepublishFull)) {
+        return true; // Queued by an earlier pass, or left for the next one
+    }
+    xSemaphoreTake(mqttOutboxMutex, portMAX_DELAY);
+    if (republish && !mqttOutbox.empty() && !mqttOutbox.hasRoom(topic, strlen(payload))) {
+        // Evicting would drop this session's own discovery configs - stop the pass here
+        xSemaphoreGive(mqttOutboxMutex);
+        mqttRepublishFull = true;
+        return true;
     }
+    bool queued = mqttOutbox.put(topic, payload, retained);
+    if (republish) {
+        mqttRepublishQueued++;
+    }
+    xSemaphoreGive(mqttOutboxMutex);
+    if (mqttTask != NULL) {
+        xTaskNotifyGive(mqttTask);
+    }
+    return queued;
 }
 
 void publishHomeAssistantDiscovery()
@@ -2497,15 +3086,14 @@ void publishHomeAssistantDiscovery()
         device["sw_version"] = sw_version;
 
         serializeJson(doc, buffer);
-        mqttClient.publish(configTopic.c_str(), buffer, true);
+        mqttPublish(configTopic.c_str(), buffer, true);
 
         // Publish availability message
         String availabilityTopic = hostname + "/availability";
-        mqttClient.publish(availabilityTopic.c_str(), "online", true);
+        mqttPublish(availabilityTopic.c_str(), "online", true);
 
         // Debug log for payload
-        debugLog("Published Home Assistant discovery payload:\n");
-        Serial.println(buffer);
+        LOG_D(MQTT, "Published Home Assistant discovery payload:\n%s\n", buffer);
 
         // Publish motion sensor discovery if LD2410 is connected
         if (ld2410Connected) {
@@ -2528,9 +3116,9 @@ void publishHomeAssistantDiscovery()
             
             char motionBuffer[512];
             serializeJson(motionDoc, motionBuffer);
-            mqttClient.publish(motionConfigTopic.c_str(), motionBuffer, true);
+            mqttPublish(motionConfigTopic.c_str(), motionBuffer, true);
             
-            debugLog("Published LD2410 motion sensor discovery to Home Assistant\n");
+            LOG_I(MQTT, "Published LD2410 motion sensor discovery to Home Assistant\n");
         }
         
         // Publish barometric pressure sensor discovery if BME280 is active
@@ -2555,9 +3143,9 @@ void publishHomeAssistantDiscovery()
             
             char pressureBuffer[512];
             serializeJson(pressureDoc, pressureBuffer);
-            mqttClient.publish(pressureConfigTopic.c_str(), pressureBuffer, true);
+            mqttPublish(pressureConfigTopic.c_str(), pressureBuffer, true);
             
-            debugLog("Published BME280 pressure sensor discovery to Home Assistant\n");
+            LOG_I(MQTT, "Published BME280 pressure sensor discovery to Home Assistant\n");
         }
         
         // Publish shower mode switch discovery if feature is enabled
@@ -2585,14 +3173,14 @@ void publishHomeAssistantDiscovery()
             
             char showerBuffer[512];
             serializeJson(showerDoc, showerBuffer);
-            mqttClient.publish(showerConfigTopic.c_str(), showerBuffer, true);
+            mqttPublish(showerConfigTopic.c_str(), showerBuffer, true);
             
-            debugLog("Published Shower Mode switch discovery to Home Assistant\n");
+            LOG_I(MQTT, "Published Shower Mode switch discovery to Home Assistant\n");
         } else {
             // If disabled, remove the switch entity from HA by sending empty retained config
             String showerConfigTopic = "homeassistant/switch/" + hostname + "_shower_mode/config";
-            mqttClient.publish(showerConfigTopic.c_str(), "", true);
-            debugLog("Removed Shower Mode switch discovery from Home Assistant (disabled)\n");
+            mqttPublish(showerConfigTopic.c_str(), "", true);
+            LOG_I(MQTT, "Removed Shower Mode switch discovery from Home Assistant (disabled)\n");
         }
         
         // Publish schedule enabled switch discovery
@@ -2619,9 +3207,9 @@ void publishHomeAssistantDiscovery()
         
         char scheduleBuffer[512];
         serializeJson(scheduleDoc, scheduleBuffer);
-        mqttClient.publish(scheduleConfigTopic.c_str(), scheduleBuffer, true);
+        mqttPublish(scheduleConfigTopic.c_str(), scheduleBuffer, true);
         
-        debugLog("Published Schedule Enabled switch discovery to Home Assistant\n");
+        LOG_I(MQTT, "Published Schedule Enabled switch discovery to Home Assistant\n");
         
         // Publish schedule data sensors and controls for each day/period
         // dayNames order matches weekSchedule array: 0=Sunday, 1=Monday, ..., 6=Saturday
@@ -2634,6 +3222,7 @@ void publishHomeAssistantDiscovery()
             String dayLower = String(dayNames[day]);
             dayLower.toLowerCase();
             String scheduleStateTopic = hostname + "/schedule/" + dayLower;
+            int mqttDay = (day + 6) % 7; // schedule/set numbers days from Monday=0
 
             // Sensor with full JSON attributes
             {
@@ -2656,7 +3245,7 @@ void publishHomeAssistantDiscovery()
                 
                 char scheduleDataBuffer[512];
                 serializeJson(scheduleDataDoc, scheduleDataBuffer);
-                mqttClient.publish(scheduleDataConfigTopic.c_str(), scheduleDataBuffer, true);
+                mqttPublish(scheduleDataConfigTopic.c_str(), scheduleDataBuffer, true);
             }
 
             // Day enabled switch
@@ -2668,7 +3257,7 @@ void publishHomeAssistantDiscovery()
                 dayEnableDoc["state_topic"] = scheduleStateTopic;
                 dayEnableDoc["value_template"] = "{{ 'ON' if value_json.day_enabled else 'OFF' }}";
                 dayEnableDoc["command_topic"] = hostname + "/schedule/set";
-                dayEnableDoc["command_template"] = String("{\"day\":") + day + ",\"enabled\": {{ 'true' if value == 'ON' else 'false' }} }";
+                dayEnableDoc["command_template"] = String("{\"day\":") + mqttDay + ",\"enabled\": {{ 'true' if value == 'ON' else 'false' }} }";
                 dayEnableDoc["payload_on"] = "ON";
                 dayEnableDoc["payload_off"] = "OFF";
                 dayEnableDoc["unique_id"] = hostname + "_schedule_" + dayLower + "_enabled";
@@ -2683,7 +3272,7 @@ void publishHomeAssistantDiscovery()
                 
                 char buf[512];
                 serializeJson(dayEnableDoc, buf);
-                mqttClient.publish(configTopic.c_str(), buf, true);
+                mqttPublish(configTopic.c_str(), buf, true);
             }
 
             // Per-period controls
@@ -2703,7 +3292,7 @@ void publishHomeAssistantDiscovery()
                     numDoc["state_topic"] = scheduleStateTopic;
                     numDoc["value_template"] = String("{{ value_json.") + periodKey + "." + tempKeys[t] + " }}";
                     numDoc["command_topic"] = hostname + "/schedule/set";
-                    numDoc["command_template"] = String("{\"day\":") + day + ",\"period\":\"" + periodId + "\",\"" + tempKeys[t] + "\":{{ value }}}";
+                    numDoc["command_template"] = String("{\"day\":") + mqttDay + ",\"period\":\"" + periodId + "\",\"" + tempKeys[t] + "\":{{ value }}}";
                     numDoc["min"] = 45; // reasonable bounds
                     numDoc["max"] = 90;
                     numDoc["step"] = 0.5;
@@ -2720,7 +3309,7 @@ void publishHomeAssistantDiscovery()
                     
                     char buf[512];
                     serializeJson(numDoc, buf);
-                    mqttClient.publish(configTopic.c_str(), buf, true);
+                    mqttPublish(configTopic.c_str(), buf, true);
                 }
 
                 // Time text entity (HH:MM)
@@ -2732,7 +3321,7 @@ void publishHomeAssistantDiscovery()
                     timeDoc["state_topic"] = scheduleStateTopic;
                     timeDoc["value_template"] = String("{{ value_json.") + periodKey + ".time }}";
                     timeDoc["command_topic"] = hostname + "/schedule/set";
-                    timeDoc["command_template"] = String("{\"day\":") + day + ",\"period\":\"" + periodId + "\",\"hour\": {{ value.split(':')[0] | int }},\"minute\": {{ value.split(':')[1] | int }} }";
+                    timeDoc["command_template"] = String("{\"day\":") + mqttDay + ",\"period\":\"" + periodId + "\",\"hour\": {{ value.split(':')[0] | int }},\"minute\": {{ value.split(':')[1] | int }} }";
                     timeDoc["pattern"] = "^([01]\\d|2[0-3]):[0-5]\\d$";
                     timeDoc["unique_id"] = hostname + "_schedule_" + dayLower + "_" + periodId + "_time";
                     timeDoc["icon"] = "mdi:clock-time-four-outline";
@@ -2746,7 +3335,7 @@ void publishHomeAssistantDiscovery()
                     
                     char buf[512];
                     serializeJson(timeDoc, buf);
-                    mqttClient.publish(configTopic.c_str(), buf, true);
+                    mqttPublish(configTopic.c_str(), buf, true);
                 }
 
                 // Active switch
@@ -2758,7 +3347,7 @@ void publishHomeAssistantDiscovery()
                     activeDoc["state_topic"] = scheduleStateTopic;
                     activeDoc["value_template"] = String("{{ 'ON' if value_json.") + periodKey + ".active else 'OFF' }}";
                     activeDoc["command_topic"] = hostname + "/schedule/set";
-                    activeDoc["command_template"] = String("{\"day\":") + day + ",\"period\":\"" + periodId + "\",\"active\": {{ 'true' if value == 'ON' else 'false' }} }";
+                    activeDoc["command_template"] = String("{\"day\":") + mqttDay + ",\"period\":\"" + periodId + "\",\"active\": {{ 'true' if value == 'ON' else 'false' }} }";
                     activeDoc["payload_on"] = "ON";
                     activeDoc["payload_off"] = "OFF";
                     activeDoc["unique_id"] = hostname + "_schedule_" + dayLower + "_" + periodId + "_active";
@@ -2773,27 +3362,27 @@ void publishHomeAssistantDiscovery()
                     
                     char buf[512];
                     serializeJson(activeDoc, buf);
-                    mqttClient.publish(configTopic.c_str(), buf, true);
+                    mqttPublish(configTopic.c_str(), buf, true);
                 }
             }
         }
         
-        debugLog("Published Schedule Data sensors and controls (7 days) discovery to Home Assistant\n");
+        LOG_I(MQTT, "Published Schedule Data sensors and controls (7 days) discovery to Home Assistant\n");
     }
     else
     {
         // Remove all entities by publishing empty payloads
         String configTopic = "homeassistant/climate/" + hostname + "/config";
         String availabilityTopic = hostname + "/availability";
-        mqttClient.publish(configTopic.c_str(), "");
-        mqttClient.publish(availabilityTopic.c_str(), "offline", true);
+        mqttPublish(configTopic.c_str(), "");
+        mqttPublish(availabilityTopic.c_str(), "offline", true);
     }
 }
 
 // Reset MQTT data cache to force republish all values
 void resetMQTTDataCache()
 {
-    debugLog("[MQTT] Resetting data cache - all values will be republished\n");
+    LOG_I(MQTT, "[MQTT] Resetting data cache - all values will be republished\n");
     mqttLastTemp = 0.0;
     mqttLastHumidity = 0.0;
     mqttLastSetTempHeat = 0.0;
@@ -2802,9 +3391,35 @@ void resetMQTTDataCache()
     mqttLastThermostatMode = "";
     mqttLastFanMode = "";
     mqttLastAction = "";
+    mqttLastHvacState = "";
+    mqttLastFanState = -1;
+    mqttLastOutdoorTemp = 0.0;
 }
 
+// Runs on the MQTT task inside mqttClient.loop(): copy the message for the loop to handle
 void mqttCallback(char* topic, byte* payload, unsigned int length)
+{
+    diagHistory.countMqttRx();
+    
+    size_t topicLength = strlen(topic);
+    MqttInbound inbound;
+    inbound.data = (char*)malloc(topicLength + length + 2);
+    if (inbound.data == NULL) {
+        mqttInboxDropped++;
+        return;
+    }
+    memcpy(inbound.data, topic, topicLength + 1);
+    memcpy(inbound.data + topicLength + 1, payload, length);
+    inbound.data[topicLength + 1 + length] = '\0';
+    inbound.length = length;
+    if (xQueueSend(mqttInboxQueue, &inbound, 0) != pdTRUE) {
+        free(inbound.data);
+        mqttInboxDropped++;
+        LOG_I(MQTT, "[MQTT] Inbound queue full, dropped message on %s\n", topic);
+    }
+}
+
+void handleMQTTMessage(char* topic, byte* payload, unsigned int length)
 {
     String message;
     for (unsigned int i = 0; i < length; i++)
@@ -2812,10 +3427,7 @@ void mqttCallback(char* topic, byte* payload, unsigned int length)
         message += (char)payload[i];
     }
 
-    debugLog("Message arrived [");
-    Serial.print(topic);
-    debugLog("] ");
-    Serial.println(message);
+    LOG_D(MQTT, "Message arrived [%s] %s\n", topic, message.c_str());
 
     // Set flag to indicate we're handling an MQTT message to prevent publish loops
     handlingMQTTMessage = true;
@@ -2830,14 +3442,14 @@ void mqttCallback(char* topic, byte* payload, unsigned int length)
     String scheduleEnabledSetTopic = hostname + "/schedule_enabled/set";
     String scheduleOverrideSetTopic = hostname + "/schedule_override/set";
     String scheduleSetTopic = hostname + "/schedule/set";
+    String logLevelSetTopic = hostname + "/log_level/set";
 
     if (String(topic) == modeSetTopic)
     {
         if (message != thermostatMode)
         {
             thermostatMode = message;
-            debugLog("Updated thermostat mode to: ");
-            Serial.println(thermostatMode);
+            LOG_I(MQTT, "Updated thermostat mode to: %s\n", thermostatMode.c_str());
             settingsNeedSaving = true;
             controlRelays(currentTemp); // Apply changes to relays
             setDisplayUpdateFlag(); // Option C: Request display update
@@ -2848,8 +3460,7 @@ void mqttCallback(char* topic, byte* payload, unsigned int length)
         if (message != fanMode)
         {
             fanMode = message;
-            debugLog("Updated fan mode to: ");
-            Serial.println(fanMode);
+            LOG_I(MQTT, "Updated fan mode to: %s\n", fanMode.c_str());
             settingsNeedSaving = true;
             controlRelays(currentTemp); // Apply changes to relays
         }
@@ -2861,24 +3472,21 @@ void mqttCallback(char* topic, byte* payload, unsigned int length)
         if (thermostatMode == "heat" && newTargetTemp != setTempHeat)
         {
             setTempHeat = newTargetTemp;
-            debugLog("Updated heating target temperature to: ");
-            Serial.println(setTempHeat);
+            LOG_I(MQTT, "Updated heating target temperature to: %.2f\n", setTempHeat);
             settingsNeedSaving = true;
             tempChanged = true;
         }
         else if (thermostatMode == "cool" && newTargetTemp != setTempCool)
         {
             setTempCool = newTargetTemp;
-            debugLog("Updated cooling target temperature to: ");
-            Serial.println(setTempCool);
+            LOG_I(MQTT, "Updated cooling target temperature to: %.2f\n", setTempCool);
             settingsNeedSaving = true;
             tempChanged = true;
         }
         else if (thermostatMode == "auto" && newTargetTemp != setTempAuto)
         {
             setTempAuto = newTargetTemp;
-            debugLog("Updated auto target temperature to: ");
-            Serial.println(setTempAuto);
+            LOG_I(MQTT, "Updated auto target temperature to: %.2f\n", setTempAuto);
             settingsNeedSaving = true;
             tempChanged = true;
         }
@@ -2887,7 +3495,7 @@ void mqttCallback(char* topic, byte* payload, unsigned int length)
         if (tempChanged && scheduleEnabled && !scheduleOverride) {
             scheduleOverride = true;
             overrideEndTime = millis() + (scheduleOverrideDuration * 60000UL);
-            debugLog("SCHEDULE: MQTT temperature change triggered override\n");
+            LOG_I(SCHEDULE, "SCHEDULE: MQTT temperature change triggered override\n");
             scheduleNeedsSaving = true;
         }
         controlRelays(currentTemp); // Apply changes to relays
@@ -2900,14 +3508,14 @@ void mqttCallback(char* topic, byte* payload, unsigned int length)
                 if (!showerModeActive) {
                     showerModeActive = true;
                     showerModeStartTime = millis();
-                    debugLog("[SHOWER MODE] Activated via MQTT\n");
+                    LOG_I(HVAC, "[SHOWER MODE] Activated via MQTT\n");
                     updateDisplay(currentTemp, currentHumidity);
                     sendMQTTData(); // Publish state back to HA
                 }
             } else if (message == "OFF" || message == "off") {
                 if (showerModeActive) {
                     showerModeActive = false;
-                    debugLog("[SHOWER MODE] Deactivated via MQTT\n");
+                    LOG_I(HVAC, "[SHOWER MODE] Deactivated via MQTT\n");
                     updateDisplay(currentTemp, currentHumidity);
                     sendMQTTData(); // Publish state back to HA
                 }
@@ -2919,7 +3527,7 @@ void mqttCallback(char* topic, byte* payload, unsigned int length)
         bool newScheduleEnabled = (message == "ON" || message == "on" || message == "1");
         if (newScheduleEnabled != scheduleEnabled) {
             scheduleEnabled = newScheduleEnabled;
-            debugLog("SCHEDULE: Via MQTT, enabled=%s\n", scheduleEnabled ? "true" : "false");
+            LOG_I(SCHEDULE, "SCHEDULE: Via MQTT, enabled=%s\n", scheduleEnabled ? "true" : "false");
             if (!scheduleEnabled) {
                 // Disable override when schedule is disabled
                 scheduleOverride = false;
@@ -2937,7 +3545,7 @@ void mqttCallback(char* topic, byte* payload, unsigned int length)
                 if (scheduleOverride) {
                     scheduleOverride = false;
                     overrideEndTime = 0;
-                    debugLog("SCHEDULE: Via MQTT, override resumed (schedule active)\n");
+                    LOG_I(SCHEDULE, "SCHEDULE: Via MQTT, override resumed (schedule active)\n");
                     scheduleNeedsSaving = true;
                     sendMQTTData();
                 }
@@ -2945,7 +3553,7 @@ void mqttCallback(char* topic, byte* payload, unsigned int length)
                 if (!scheduleOverride) {
                     scheduleOverride = true;
                     overrideEndTime = millis() + (scheduleOverrideDuration * 60000UL);
-                    debugLog("SCHEDULE: Via MQTT, override activated (temporary - 2 hours)\n");
+                    LOG_I(SCHEDULE, "SCHEDULE: Via MQTT, override activated (temporary - 2 hours)\n");
                     scheduleNeedsSaving = true;
                     sendMQTTData();
                 }
@@ -2953,7 +3561,7 @@ void mqttCallback(char* topic, byte* payload, unsigned int length)
                 if (!scheduleOverride) {
                     scheduleOverride = true;
                     overrideEndTime = 0; // Permanent until manually disabled
-                    debugLog("SCHEDULE: Via MQTT, override activated (permanent)\n");
+                    LOG_I(SCHEDULE, "SCHEDULE: Via MQTT, override activated (permanent)\n");
                     scheduleNeedsSaving = true;
                     sendMQTTData();
                 }
@@ -2964,6 +3572,7 @@ void mqttCallback(char* topic, byte* payload, unsigned int length)
     {
         // Parse JSON schedule update
         // Format: {"day": 0, "period": "day", "hour": 6, "minute": 30, "heat": 72.0, "cool": 78.0, "auto": 74.0, "active": true}
+        // "period" is "day", "night" or one of the extra periods "period3".."period6"
         // Note: MQTT day format is 0=Monday through 6=Sunday
         // Array format is 0=Sunday through 6=Saturday
         // Convert MQTT day (Monday=0) to array index (Sunday=0): add 1 and mod 7
@@ -2973,11 +3582,12 @@ void mqttCallback(char* topic, byte* payload, unsigned int length)
         if (!error) {
             int mqttDay = doc["day"] | -1;
             String period = doc["period"] | "";
+            int periodIndex = ScheduleEngine::periodIndexFromLabel(period.c_str());
             
-            if (mqttDay >= 0 && mqttDay < 7 && (period == "day" || period == "night")) {
+            if (mqttDay >= 0 && mqttDay < 7 && periodIndex >= 0) {
                 // Convert MQTT day (0=Monday) to array index (0=Sunday)
                 int day = (mqttDay + 1) % 7;
-                SchedulePeriod* targetPeriod = (period == "day") ? &weekSchedule[day].day : &weekSchedule[day].night;
+                SchedulePeriod* targetPeriod = ScheduleEngine::getPeriod(weekSchedule[day], periodIndex);
                 
                 bool changed = false;
                 
@@ -3039,7 +3649,7 @@ void mqttCallback(char* topic, byte* payload, unsigned int length)
                 
                 if (changed) {
                     scheduleNeedsSaving = true;
-                    debugLog("SCHEDULE: Via MQTT, updated day %d (array index %d) %s period\n", mqttDay, day, period.c_str());
+                    LOG_I(SCHEDULE, "SCHEDULE: Via MQTT, updated day %d (array index %d) %s period\n", mqttDay, day, period.c_str());
                     
                     // If schedule is enabled and not overridden, reapply to take effect immediately
                     if (scheduleEnabled && !scheduleOverride) {
@@ -3051,8 +3661,7 @@ void mqttCallback(char* topic, byte* payload, unsigned int length)
                         
                         if (currentDay == day) {
                             // Current day was modified, reapply schedule
-                            bool isDayPeriod = (period == "day");
-                            applySchedule(day, isDayPeriod);
+                            applySchedule(day, periodIndex);
                             updateDisplay(currentTemp, currentHumidity);
                         }
                     }
@@ -3060,16 +3669,25 @@ void mqttCallback(char* topic, byte* payload, unsigned int length)
                     sendMQTTData(); // Publish updated schedule state
                 }
             } else {
-                debugLog("SCHEDULE: Invalid MQTT schedule update - day=%d, period=%s\n", mqttDay, period.c_str());
+                LOG_W(SCHEDULE, "SCHEDULE: Invalid MQTT schedule update - day=%d, period=%s\n", mqttDay, period.c_str());
             }
         } else {
-            debugLog("SCHEDULE: Failed to parse MQTT schedule JSON\n");
+            LOG_W(SCHEDULE, "SCHEDULE: Failed to parse MQTT schedule JSON\n");
         }
     }
+    else if (String(topic) == logLevelSetTopic)
+    {
+        // "debug" for every category or "mqtt=debug,sensor=warn"; the result is published to <hostname>/log_level
+        setLogLevels(message.c_str());
+        char levels[192];
+        logFormatLevels(levels, sizeof(levels));
+        String logLevelTopic = hostname + "/log_level";
+        mqttPublish(logLevelTopic.c_str(), levels, true);
+    }
 
     // Save settings to flash if they were changed
     if (settingsNeedSaving) {
-        debugLog("Saving settings changed via MQTT\n");
+        LOG_I(MQTT, "Saving settings changed via MQTT\n");
         saveSettings();
         // Update display immediately when settings change via MQTT
         updateDisplay(currentTemp, currentHumidity);
@@ -3079,7 +3697,7 @@ void mqttCallback(char* topic, byte* payload, unsigned int length)
     }
 
     if (scheduleNeedsSaving) {
-        debugLog("Saving schedule settings changed via MQTT\n");
+        LOG_I(MQTT, "Saving schedule settings changed via MQTT\n");
         saveScheduleSettings();
     }
 
@@ -3089,15 +3707,17 @@ void mqttCallback(char* topic, byte* payload, unsigned int length)
 
 void sendMQTTData()
 {
-    if (mqttClient.connected())
+    if (mqttEnabled)
     {
+        diagHistory.countMqttPublish();
+        
         // Publish current temperature
         if (!isnan(currentTemp) && currentTemp != mqttLastTemp)
         {
             String currentTempTopic = hostname + "/current_temperature";
             char tempStr[10];
             snprintf(tempStr, sizeof(tempStr), "%.1f", currentTemp);
-            mqttClient.publish(currentTempTopic.c_str(), tempStr, true);
+            mqttPublish(currentTempTopic.c_str(), tempStr, true);
             mqttLastTemp = currentTemp;
         }
 
@@ -3105,7 +3725,7 @@ void sendMQTTData()
         if (!isnan(currentHumidity) && currentHumidity != mqttLastHumidity)
         {
             String currentHumidityTopic = hostname + "/current_humidity";
-            mqttClient.publish(currentHumidityTopic.c_str(), String(currentHumidity, 1).c_str(), true);
+            mqttPublish(currentHumidityTopic.c_str(), String(currentHumidity, 1).c_str(), true);
             mqttLastHumidity = currentHumidity;
         }
         
@@ -3117,7 +3737,7 @@ void sendMQTTData()
             {
                 String pressureTopic = hostname + "/barometric_pressure";
                 float pressureInHg = currentPressure / 33.8639; // Convert hPa to inHg
-                mqttClient.publish(pressureTopic.c_str(), String(pressureInHg, 2).c_str(), true);
+                mqttPublish(pressureTopic.c_str(), String(pressureInHg, 2).c_str(), true);
                 lastPressure = currentPressure;
             }
         }
@@ -3131,14 +3751,14 @@ void sendMQTTData()
             if (currentGasResistance != lastGasResistance)
             {
                 String gasTopic = hostname + "/gas_resistance";
-                mqttClient.publish(gasTopic.c_str(), String(currentGasResistance, 1).c_str(), true);
+                mqttPublish(gasTopic.c_str(), String(currentGasResistance, 1).c_str(), true);
                 lastGasResistance = currentGasResistance;
             }
             
             if (currentAirQuality != lastAirQuality)
             {
                 String aqTopic = hostname + "/air_quality_index";
-                mqttClient.publish(aqTopic.c_str(), String((int)currentAirQuality).c_str(), true);
+                mqttPublish(aqTopic.c_str(), String((int)currentAirQuality).c_str(), true);
                 lastAirQuality = currentAirQuality;
             }
         }
@@ -3147,19 +3767,19 @@ void sendMQTTData()
         if (thermostatMode == "heat" && setTempHeat != mqttLastSetTempHeat)
         {
             String targetTempTopic = hostname + "/target_temperature";
-            mqttClient.publish(targetTempTopic.c_str(), String(setTempHeat, 1).c_str(), true);
+            mqttPublish(targetTempTopic.c_str(), String(setTempHeat, 1).c_str(), true);
             mqttLastSetTempHeat = setTempHeat;
         }
         else if (thermostatMode == "cool" && setTempCool != mqttLastSetTempCool)
         {
             String targetTempTopic = hostname + "/target_temperature";
-            mqttClient.publish(targetTempTopic.c_str(), String(setTempCool, 1).c_str(), true);
+            mqttPublish(targetTempTopic.c_str(), String(setTempCool, 1).c_str(), true);
             mqttLastSetTempCool = setTempCool;
         }
         else if (thermostatMode == "auto" && setTempAuto != mqttLastSetTempAuto)
         {
             String targetTempTopic = hostname + "/target_temperature";
-            mqttClient.publish(targetTempTopic.c_str(), String(setTempAuto, 1).c_str(), true);
+            mqttPublish(targetTempTopic.c_str(), String(setTempAuto, 1).c_str(), true);
             mqttLastSetTempAuto = setTempAuto;
         }
 
@@ -3167,7 +3787,7 @@ void sendMQTTData()
         if (thermostatMode != mqttLastThermostatMode)
         {
             String modeTopic = hostname + "/mode";
-            mqttClient.publish(modeTopic.c_str(), thermostatMode.c_str(), true);
+            mqttPublish(modeTopic.c_str(), thermostatMode.c_str(), true);
             mqttLastThermostatMode = thermostatMode;
         }
 
@@ -3175,7 +3795,7 @@ void sendMQTTData()
         if (fanMode != mqttLastFanMode)
         {
             String fanModeTopic = hostname + "/fan_mode";
-            mqttClient.publish(fanModeTopic.c_str(), fanMode.c_str(), true);
+            mqttPublish(fanModeTopic.c_str(), fanMode.c_str(), true);
             mqttLastFanMode = fanMode;
         }
 
@@ -3192,29 +3812,49 @@ void sendMQTTData()
         }
         if (currentAction != mqttLastAction) {
             String actionTopic = hostname + "/action";
-            mqttClient.publish(actionTopic.c_str(), currentAction.c_str(), true);
+            mqttPublish(actionTopic.c_str(), currentAction.c_str(), true);
             mqttLastAction = currentAction;
         }
 
+        // Publish the engine state (stage) and fan relay so runtime, starts and stage 2 use can be recorded
+        String hvacState = HvacEngine::stateName(hvacEngine.state());
+        if (hvacState != mqttLastHvacState) {
+            String hvacStateTopic = hostname + "/hvac_state";
+            mqttPublish(hvacStateTopic.c_str(), hvacState.c_str(), true);
+            mqttLastHvacState = hvacState;
+        }
+        if ((int)fanOn != mqttLastFanState) {
+            String fanStateTopic = hostname + "/fan_state";
+            mqttPublish(fanStateTopic.c_str(), fanOn ? "on" : "off", true);
+            mqttLastFanState = fanOn;
+        }
+
+        // Publish outdoor temperature from the weather source (degree-hours for runtime analytics)
+        if (weatherSource != 0 && weather.isDataValid() && weather.getData().temperature != mqttLastOutdoorTemp) {
+            String outdoorTopic = hostname + "/outdoor_temperature";
+            mqttPublish(outdoorTopic.c_str(), String(weather.getData().temperature, 1).c_str(), true);
+            mqttLastOutdoorTemp = weather.getData().temperature;
+        }
+
         // Publish hydronic temperature if hydronic heating is enabled
         if (hydronicHeatingEnabled)
         {
             String hydronicTempTopic = hostname + "/hydronic_temperature";
-            mqttClient.publish(hydronicTempTopic.c_str(), String(hydronicTemp, 1).c_str(), true);
+            mqttPublish(hydronicTempTopic.c_str(), String(hydronicTemp, 1).c_str(), true);
         }
 
         // Monitor hydronic boiler water temperature and send alerts
-        debugLog("[DEBUG] Hydronic Alert Check: enabled=%s, temp=%.1f, tempValid=%s\n",
-                     hydronicHeatingEnabled ? "YES" : "NO", 
-                     hydronicTemp,
-                     !isnan(hydronicTemp) ? "YES" : "NO");
+        LOG_D(HVAC, "[DEBUG] Hydronic Alert Check: enabled=%s, temp=%.1f, tempValid=%s\n",
+                        hydronicHeatingEnabled ? "YES" : "NO", 
+                        hydronicTemp,
+                        !isnan(hydronicTemp) ? "YES" : "NO");
                      
         if (hydronicHeatingEnabled && !isnan(hydronicTemp))
         {
-            debugLog("[DEBUG] Hydronic Logic: temp=%.1f < threshold=%.1f? %s, alertSent=%s\n",
-                         hydronicTemp, hydronicTempLow,
-                         (hydronicTemp < hydronicTempLow) ? "YES" : "NO",
-                         hydronicLowTempAlertSent ? "YES" : "NO");
+            LOG_D(HVAC, "[DEBUG] Hydronic Logic: temp=%.1f < threshold=%.1f? %s, alertSent=%s\n",
+                            hydronicTemp, hydronicTempLow,
+                            (hydronicTemp < hydronicTempLow) ? "YES" : "NO",
+                            hydronicLowTempAlertSent ? "YES" : "NO");
             
             // Check if temperature dropped below setpoint and we haven't sent alert yet
             if (hydronicTemp < hydronicTempLow && !hydronicLowTempAlertSent)
@@ -3222,25 +3862,25 @@ void sendMQTTData()
                 // Send alert to Home Assistant
                 String alertTopic = hostname + "/hydronic_alert";
                 String alertMessage = "ALERT: Boiler water temperature (" + String(hydronicTemp, 1) + "°F) is below setpoint (" + String(hydronicTempLow, 1) + "°F)";
-                mqttClient.publish(alertTopic.c_str(), alertMessage.c_str(), false);
+                mqttPublish(alertTopic.c_str(), alertMessage.c_str(), false);
                 
                 // Also send to Home Assistant notification service
                 String haTopic = "homeassistant/notify/thermostat_alerts";
                 String haMessage = "{\"title\":\"Boiler Alert\",\"message\":\"" + alertMessage + "\"}";
-                mqttClient.publish(haTopic.c_str(), haMessage.c_str(), false);
+                mqttPublish(haTopic.c_str(), haMessage.c_str(), false);
                 
                 // Set flag to prevent duplicate alerts
                 hydronicLowTempAlertSent = true;
                 preferences.putBool("hydAlertSent", hydronicLowTempAlertSent);
-                debugLog("MQTT: Hydronic low temperature alert sent\n");
+                LOG_I(MQTT, "MQTT: Hydronic low temperature alert sent\n");
             }
             // Reset alert flag only when temperature recovers above HIGH threshold (hysteresis)
             else if (hydronicTemp >= hydronicTempHigh && hydronicLowTempAlertSent)
             {
                 hydronicLowTempAlertSent = false;
                 preferences.putBool("hydAlertSent", hydronicLowTempAlertSent);
-                debugLog("MQTT: Hydronic temperature recovered to %.1f°F (above %.1f°F) - alert reset\n", 
-                             hydronicTemp, hydronicTempHigh);
+                LOG_I(MQTT, "MQTT: Hydronic temperature recovered to %.1f°F (above %.1f°F) - alert reset\n", 
+                                hydronicTemp, hydronicTempHigh);
             }
         }
 
@@ -3249,7 +3889,7 @@ void sendMQTTData()
             static bool lastMotionDetected = false;
             if (motionDetected != lastMotionDetected) {
                 String motionTopic = hostname + "/motion_detected";
-                mqttClient.publish(motionTopic.c_str(), motionDetected ? "true" : "false", false);
+                mqttPublish(motionTopic.c_str(), motionDetected ? "true" : "false", false);
                 lastMotionDetected = motionDetected;
             }
         }
@@ -3260,7 +3900,7 @@ void sendMQTTData()
             static int lastMinutesRemaining = -1;
             if (showerModeActive != lastShowerModeActive) {
                 String showerModeTopic = hostname + "/shower_mode";
-                mqttClient.publish(showerModeTopic.c_str(), showerModeActive ? "ON" : "OFF", true);
+                mqttPublish(showerModeTopic.c_str(), showerModeActive ? "ON" : "OFF", true);
                 lastShowerModeActive = showerModeActive;
             }
             // Publish remaining time if active
@@ -3270,7 +3910,7 @@ void sendMQTTData()
                 if (minutesRemaining < 0) minutesRemaining = 0;
                 if (minutesRemaining != lastMinutesRemaining) {
                     String showerTimeRemainingTopic = hostname + "/shower_time_remaining";
-                    mqttClient.publish(showerTimeRemainingTopic.c_str(), String(minutesRemaining).c_str(), false);
+                    mqttPublish(showerTimeRemainingTopic.c_str(), String(minutesRemaining).c_str(), false);
                     lastMinutesRemaining = minutesRemaining;
                 }
             } else if (lastMinutesRemaining >= 0) {
@@ -3281,14 +3921,14 @@ void sendMQTTData()
 
         // Publish schedule status
         String scheduleEnabledTopic = hostname + "/schedule_enabled";
-        mqttClient.publish(scheduleEnabledTopic.c_str(), scheduleEnabled ? "on" : "off", true);
+        mqttPublish(scheduleEnabledTopic.c_str(), scheduleEnabled ? "on" : "off", true);
         
         String activePeriodTopic = hostname + "/active_period";
-        mqttClient.publish(activePeriodTopic.c_str(), activePeriod.c_str(), false);
+        mqttPublish(activePeriodTopic.c_str(), activePeriod.c_str(), false);
         
         if (scheduleOverride) {
             String overrideTopic = hostname + "/schedule_override";
-            mqttClient.publish(overrideTopic.c_str(), "active", false);
+            mqttPublish(overrideTopic.c_str(), "active", false);
         }
         
         // Publish detailed schedule data for all 7 days (for monitoring/debugging)
@@ -3338,559 +3978,196 @@ void sendMQTTData()
             char schedBuffer[512];
             serializeJson(schedDoc, schedBuffer);
             String scheduleDataTopic = hostname + "/schedule/" + String(topicDayNames[day]);
-            mqttClient.publish(scheduleDataTopic.c_str(), schedBuffer, false);
+            mqttPublish(scheduleDataTopic.c_str(), schedBuffer, false);
         }
 
         // Publish availability
         String availabilityTopic = hostname + "/availability";
-        mqttClient.publish(availabilityTopic.c_str(), "online", true);
+        mqttPublish(availabilityTopic.c_str(), "online", true);
     }
 }
-
-void controlRelays(float currentTemp)
-{
-    // Take mutex to prevent concurrent access from multiple cores
-    if (xSemaphoreTake(controlRelaysMutex, pdMS_TO_TICKS(100)) != pdTRUE) {
-        debugLog("[WARNING] controlRelays: Failed to acquire mutex, skipping this call\n");
-        return;
-    }
-    
-    // Check if shower mode is active and has expired
-    if (showerModeActive) {
-        unsigned long elapsed = millis() - showerModeStartTime;
-        unsigned long remaining = (showerModeDuration * 60000UL) - elapsed;
-        
-        // Buzzer alert for last 5 seconds (one beep per second)
-        static unsigned long lastBuzzTime = 0;
-        if (remaining <= 5000 && remaining > 0) {
-            int secondsRemaining = (remaining / 1000) + 1;
-            unsigned long currentSecond = 5 - secondsRemaining;
-            if (currentSecond != lastBuzzTime) {
-                buzzerBeep(100);
-                lastBuzzTime = currentSecond;
-                debugLog("[SHOWER MODE] Alert beep - %d seconds remaining\n", secondsRemaining);
-            }
-        } else if (remaining > 5000) {
-            lastBuzzTime = 0; // Reset for next countdown
-        }
-        
-        if (elapsed >= (showerModeDuration * 60000UL)) {
-            showerModeActive = false;
-            lastBuzzTime = 0; // Reset buzzer tracking
-            debugLog("[SHOWER MODE] Timer expired, resuming normal operation\n");
-        }
-    }
-    
-    // Debug entry
-    debugLog("[DEBUG] controlRelays ENTRY: mode=%s, temp=%.1f, heatingOn=%d, coolingOn=%d, showerMode=%d\n", 
-                 thermostatMode.c_str(), currentTemp, heatingOn, coolingOn, showerModeActive);
-    
-    // Track previous states to only print debug info on changes
-    static bool prevHeatingOn = false;
-    static bool prevCoolingOn = false;
-    static bool prevFanOn = false;
-    static String prevThermostatMode = "";
-    static float prevTemp = 0.0;
-    
-    // Check if temperature reading is valid
-    if (isnan(currentTemp)) {
-        debugLog("WARNING: Invalid temperature reading, skipping relay control\n");
-        return;
-    }
-    
-    // Store current states before any changes
-    bool currentHeatingOn = heatingOn;
-    bool currentCoolingOn = coolingOn;
-    bool currentFanOn = fanOn;
-
-    if (thermostatMode == "off")
-    {
-        debugLog("[DEBUG] In OFF mode - turning off heating and cooling relays\n");
-        // Turn off heating and cooling relays, but don't turn off fan
-        // This allows the fan to operate in "on" or "cycle" mode even when thermostat is off
-        digitalWrite(HEAT_RELAY_1_PIN, LOW);
-        digitalWrite(HEAT_RELAY_2_PIN, LOW);
-        digitalWrite(COOL_RELAY_1_PIN, LOW);
-        digitalWrite(COOL_RELAY_2_PIN, LOW);
-        heatingOn = false;
-        coolingOn = false;
-        stage1Active = false;
-        stage2Active = false;
-        
-        // Handle fan separately based on fanMode
-        if (fanMode == "on") {
-            if (!fanOn) {
-                digitalWrite(FAN_RELAY_PIN, HIGH);
-                fanOn = true;
-                debugLog("Fan on while thermostat is off\n");
-            }
-        }
-        else if (fanMode == "auto") {
-            digitalWrite(FAN_RELAY_PIN, LOW);
-            fanOn = false;
-        }
-        // Note: "cycle" fan mode is handled by controlFanSchedule()
-        updateStatusLEDs(); // Update LED status
-        
-        xSemaphoreGive(controlRelaysMutex);
-        return;
-    }
-
-    // Rest of the thermostat logic for heat, cool, and auto modes
-    if (thermostatMode == "heat")
-    {
-        debugLog("[DEBUG] In HEAT mode: temp=%.1f, setpoint=%.1f, swing=%.1f\n", 
-                     currentTemp, setTempHeat, tempSwing);
-        
-        // Turn off cooling relays when entering heat mode
-        if (coolingOn) {
-            debugLog("[DEBUG] Turning off cooling relays in heat mode\n");
-            digitalWrite(COOL_RELAY_1_PIN, LOW);
-            digitalWrite(COOL_RELAY_2_PIN, LOW);
-            coolingOn = false;
-            // Reset staging flags to allow heating to start fresh
-            stage1Active = false;
-            stage2Active = false;
-        }
-        
-        // Block heating if shower mode is active
-        if (showerModeActive) {
-            if (heatingOn) {
-                debugLog("[SHOWER MODE] Blocking heating - turning off\n");
-                digitalWrite(HEAT_RELAY_1_PIN, LOW);
-                digitalWrite(HEAT_RELAY_2_PIN, LOW);
-                heatingOn = false;
-                stage1Active = false;
-                stage2Active = false;
-            }
-        }
-        // Only activate heating if below setpoint - swing
-        else {
-            debugLog("[DEBUG] Heat check: %.1f < %.1f? %s\n", 
-                         currentTemp, (setTempHeat - tempSwing), 
-                         (currentTemp < (setTempHeat - tempSwing)) ? "YES" : "NO");
-            if (currentTemp < (setTempHeat - tempSwing))
-            {
-                // Only call activateHeating if not already heating
-                if (!heatingOn) {
-                    debugLog("[HVAC] HEAT ACTIVATED: %.1f < %.1f (setpoint-swing)\n", 
-                             currentTemp, (setTempHeat - tempSwing));
-                    activateHeating();
-                }
-            }
-            // Only turn off if above setpoint (hysteresis)
-            else if (currentTemp >= setTempHeat)
-            {
-                if (heatingOn || coolingOn || fanOn) {
-                    debugLog("[HVAC] HEAT DEACTIVATED: %.1f >= %.1f (setpoint)\n", 
-                             currentTemp, setTempHeat);
-                }
-                turnOffAllRelays();
-            }
-            // Otherwise maintain current state (hysteresis band)
-        }
-    }
-    else if (thermostatMode == "cool")
-    {
-        debugLog("[DEBUG] In COOL mode: temp=%.1f, setpoint=%.1f, swing=%.1f\n", 
-                     currentTemp, setTempCool, tempSwing);
-        
-        // Turn off heating relays when entering cool mode
-        if (heatingOn) {
-            debugLog("[DEBUG] Turning off heating relays in cool mode\n");
-            digitalWrite(HEAT_RELAY_1_PIN, LOW);
-            digitalWrite(HEAT_RELAY_2_PIN, LOW);
-            heatingOn = false;
-            // Reset staging flags to allow cooling to start fresh
-            stage1Active = false;
-            stage2Active = false;
-        }
-        
-        // Only activate cooling if above setpoint + swing
-        debugLog("[DEBUG] Cool check: %.1f > %.1f? %s\n", 
-                     currentTemp, (setTempCool + tempSwing), 
-                     (currentTemp > (setTempCool + tempSwing)) ? "YES" : "NO");
-        if (currentTemp > (setTempCool + tempSwing))
-        {
-            // Only call activateCooling if not already cooling
-            if (!coolingOn) {
-                debugLog("[HVAC] COOL ACTIVATED: %.1f > %.1f (setpoint+swing)\n", 
-                         currentTemp, (setTempCool + tempSwing));
-                activateCooling();
-            }
-        }
-        // Only turn off if below setpoint (hysteresis)
-        else if (currentTemp < setTempCool)
-        {
-            if (heatingOn || coolingOn || fanOn) {
-                debugLog("[HVAC] COOL DEACTIVATED: %.1f < %.1f (setpoint)\n", 
-                         currentTemp, setTempCool);
-            }
-            turnOffAllRelays();
-        }
-        // Otherwise maintain current state (hysteresis band between setpoint and setpoint+swing)
+
+void controlRelays(float currentTemp)
+{
+    // Take mutex to prevent concurrent access from multiple cores
+    if (xSemaphoreTake(controlRelaysMutex, pdMS_TO_TICKS(100)) != pdTRUE) {
+        LOG_W(HVAC, "[WARNING] controlRelays: Failed to acquire mutex, skipping this call\n");
+        return;
     }
-    else if (thermostatMode == "auto")
-    {
-        debugLog("[DEBUG] In AUTO mode: temp=%.1f, setpoint=%.1f, autoSwing=%.1f\n", 
-                     currentTemp, setTempAuto, autoTempSwing);
+    
+    // First pass after power-up: the HVAC engine owns the relays from here on
+    static bool relaysControlled = false;
+    if (!relaysControlled) {
+        relaysControlled = true;
+        bootProfiler.mark("relays");
+    }
+    
+    // Check if shower mode is active and has expired
+    if (showerModeActive) {
+        unsigned long elapsed = millis() - showerModeStartTime;
+        unsigned long remaining = (showerModeDuration * 60000UL) - elapsed;
         
-        if (currentTemp < (setTempAuto - autoTempSwing))
-        {
-            debugLog("[DEBUG] Auto heating check: %.1f < %.1f? YES\n", 
-                         currentTemp, (setTempAuto - autoTempSwing));
-            if (!heatingOn) {
-                debugLog("Auto mode activating heating: current %.1f < auto_setpoint-swing %.1f\n", 
-                             currentTemp, (setTempAuto - autoTempSwing));
+        // Buzzer alert for last 5 seconds (one beep per second)
+        static unsigned long lastBuzzTime = 0;
+        if (remaining <= 5000 && remaining > 0) {
+            int secondsRemaining = (remaining / 1000) + 1;
+            unsigned long currentSecond = 5 - secondsRemaining;
+            if (currentSecond != lastBuzzTime) {
+                buzzerBeep(100);
+                lastBuzzTime = currentSecond;
+                LOG_I(HVAC, "[SHOWER MODE] Alert beep - %d seconds remaining\n", secondsRemaining);
             }
-            activateHeating();
+        } else if (remaining > 5000) {
+            lastBuzzTime = 0; // Reset for next countdown
         }
-        else if (currentTemp > (setTempAuto + autoTempSwing))
-        {
-            debugLog("[DEBUG] Auto cooling check: %.1f > %.1f? YES\n", 
-                         currentTemp, (setTempAuto + autoTempSwing));
-            if (!coolingOn) {
-                debugLog("Auto mode activating cooling: current %.1f > auto_setpoint+swing %.1f\n", 
-                             currentTemp, (setTempAuto + autoTempSwing));
-            }
-            activateCooling();
+        
+        if (elapsed >= (showerModeDuration * 60000UL)) {
+            showerModeActive = false;
+            lastBuzzTime = 0; // Reset buzzer tracking
+            LOG_I(HVAC, "[SHOWER MODE] Timer expired, resuming normal operation\n");
         }
-        else
-        {
-            debugLog("[DEBUG] Auto deadband check: %.1f between %.1f and %.1f\n", 
-                         currentTemp, (setTempAuto - autoTempSwing), (setTempAuto + autoTempSwing));
-            if (heatingOn || coolingOn) {
-                debugLog("Auto mode temperature in deadband, turning off: %.1f is between %.1f and %.1f\n", 
-                             currentTemp, (setTempAuto - autoTempSwing), (setTempAuto + autoTempSwing));
-            }
-            turnOffAllRelays();
+    }
+    
+    // Check if temperature reading is valid
+    if (isnan(currentTemp)) {
+        LOG_W(HVAC, "WARNING: Invalid temperature reading, skipping relay control\n");
+        xSemaphoreGive(controlRelaysMutex);
+        return;
+    }
+    
+    // Track previous states to only print debug info on changes
+    static HvacMode prevMode = HVAC_MODE_OFF;
+    static HvacGuard prevHeldBy = HVAC_GUARD_NONE;
+    static float prevTemp = 0.0;
+    
+    updateHydronicLockout();
+    
+    // Map the settings Strings onto the engine's enums once per tick
+    HvacInputs inputs;
+    inputs.mode = HvacEngine::modeFromString(thermostatMode.c_str());
+    inputs.fanMode = HvacEngine::fanModeFromString(fanMode.c_str());
+    inputs.temp = currentTemp;
+    inputs.setHeat = setTempHeat;
+    inputs.setCool = setTempCool;
+    inputs.setAuto = setTempAuto;
+    inputs.swing = tempSwing;
+    inputs.autoSwing = autoTempSwing;
+    inputs.stage2Delta = stage2TempDelta;
+    inputs.heatInhibited = showerModeActive || (hydronicHeatingEnabled && !isnan(hydronicTemp) && hydronicLockout);
+    
+    HvacState previous = hvacEngine.state();
+    bool stateChanged = hvacEngine.update(inputs, hvacConfig(), millis());
+    
+    if (hvacEngine.state() != previous) {
+        LOG_I(HVAC, "[HVAC] %s -> %s (%s): temp=%.1f, mode=%s\n",
+                    HvacEngine::stateName(previous), HvacEngine::stateName(hvacEngine.state()),
+                    HvacEngine::eventName(hvacEngine.lastEvent()), currentTemp, thermostatMode.c_str());
+    }
+    if (hvacEngine.heldBy() != prevHeldBy) {
+        if (hvacEngine.heldBy() != HVAC_GUARD_NONE) {
+            LOG_I(HVAC, "[HVAC] %s held in %s by %s\n", HvacEngine::eventName(hvacEngine.lastEvent()),
+                        HvacEngine::stateName(hvacEngine.state()), HvacEngine::guardName(hvacEngine.heldBy()));
         }
+        prevHeldBy = hvacEngine.heldBy();
     }
-
-    // Make sure fan control is applied
-    handleFanControl();
     
-    // Detect any state or mode changes to trigger display/LED updates
-    bool stateChanged = (heatingOn != prevHeatingOn || coolingOn != prevCoolingOn || fanOn != prevFanOn);
-    bool modeChanged = (thermostatMode != prevThermostatMode);
+    // Always reconcile the pins (cheap, only differing pins are written) so manual
+    // /set_* overrides and the fan schedule hand-off cannot leave them out of step
+    applyHvacOutputs(previous);
+    
+    bool modeChanged = (inputs.mode != prevMode);
     
     // Only print debug info when there are changes
     if (stateChanged || modeChanged || abs(currentTemp - prevTemp) > 0.5) {
-        debugLog("controlRelays: mode=%s, temp=%.1f, setHeat=%.1f, setCool=%.1f, setAuto=%.1f, swing=%.1f\n", 
-                     thermostatMode.c_str(), currentTemp, setTempHeat, setTempCool, setTempAuto, tempSwing);
-        debugLog("Relay states: heating=%d, cooling=%d, fan=%d\n", heatingOn, coolingOn, fanOn);
+        LOG_D(HVAC, "controlRelays: mode=%s, temp=%.1f, setHeat=%.1f, setCool=%.1f, setAuto=%.1f, swing=%.1f\n", 
+                        thermostatMode.c_str(), currentTemp, setTempHeat, setTempCool, setTempAuto, tempSwing);
+        LOG_D(HVAC, "Relay states: heating=%d, cooling=%d, fan=%d, stage1=%d, stage2=%d\n",
+                        heatingOn, coolingOn, fanOn, stage1Active, stage2Active);
         
         // CONSOLIDATED UPDATE: Update LEDs and display when relay state or mode changes
         updateStatusLEDs();
         setDisplayUpdateFlag();
         
-        // Update previous states
-        prevHeatingOn = heatingOn;
-        prevCoolingOn = coolingOn;
-        prevFanOn = fanOn;
-        prevThermostatMode = thermostatMode;
+        prevMode = inputs.mode;
         prevTemp = currentTemp;
     }
     
-    // Debug: Verify actual relay pin states
-    bool actualHeat1 = digitalRead(HEAT_RELAY_1_PIN) == HIGH;
-    bool actualHeat2 = digitalRead(HEAT_RELAY_2_PIN) == HIGH;
-    bool actualCool1 = digitalRead(COOL_RELAY_1_PIN) == HIGH;
-    bool actualCool2 = digitalRead(COOL_RELAY_2_PIN) == HIGH;
-    bool actualFan = digitalRead(FAN_RELAY_PIN) == HIGH;
-    
-    debugLog("[DEBUG] controlRelays EXIT: RelayPins H1=%d H2=%d C1=%d C2=%d F=%d | Flags heat=%d cool=%d fan=%d stage1=%d stage2=%d\n", 
-                 actualHeat1, actualHeat2, actualCool1, actualCool2, actualFan, 
-                 heatingOn, coolingOn, fanOn, stage1Active, stage2Active);
-    
+    statePushPending = true;
     xSemaphoreGive(controlRelaysMutex);
 }
 
-void turnOffAllRelays()
+// Engine settings from the current globals (the staging settings can change from the web UI at any time)
+HvacConfig hvacConfig()
 {
-    debugLog("[DEBUG] turnOffAllRelays() - Turning off heating/cooling relays\n");
-    digitalWrite(HEAT_RELAY_1_PIN, LOW);
-    digitalWrite(HEAT_RELAY_2_PIN, LOW);
-    digitalWrite(COOL_RELAY_1_PIN, LOW);
-    digitalWrite(COOL_RELAY_2_PIN, LOW);
-    heatingOn = false;
-    coolingOn = false;
-    stage1Active = false; // Reset stage 1 active flag
-    stage2Active = false; // Reset stage 2 active flag
-    
-    // Handle fan based on fanMode setting
-    if (fanMode == "on") {
-        // Keep fan running in "on" mode
-        if (!fanOn) {
-            digitalWrite(FAN_RELAY_PIN, HIGH);
-            fanOn = true;
-            debugLog("[DEBUG] turnOffAllRelays() - Keeping fan ON (fanMode=on)\n");
-        }
-    } else if (fanMode == "auto") {
-        // Turn off fan in auto mode when heating/cooling stops
-        if (fanRelayNeeded) {
-            // Only control fan if fanRelayNeeded is true
-            digitalWrite(FAN_RELAY_PIN, LOW);
-            fanOn = false;
-            debugLog("[DEBUG] turnOffAllRelays() - Turning fan OFF (fanMode=auto)\n");
-        }
-    }
-    // Note: "cycle" mode is handled by controlFanSchedule(), don't interfere
-    
-    debugLog("[DEBUG] turnOffAllRelays() COMPLETE: heatingOn=%d, coolingOn=%d, fanOn=%d, fanMode=%s\n", 
-                 heatingOn, coolingOn, fanOn, fanMode.c_str());
-    updateStatusLEDs(); // Update LED status
-    setDisplayUpdateFlag(); // Option C: Request display update
+    HvacConfig config;
+    config.minOnMs = HVAC_MIN_ON_TIME;
+    config.minOffMs = HVAC_MIN_OFF_TIME;
+    config.stage1MinRuntimeMs = stage1MinRuntime * 1000UL;
+    config.stage2MinRuntimeMs = STAGE2_MIN_RUNTIME;
+    config.stage2HeatEnabled = stage2HeatingEnabled;
+    config.stage2CoolEnabled = stage2CoolingEnabled;
+    config.reversingValve = reversingValveEnabled;
+    config.fanRelayNeeded = fanRelayNeeded;
+    return config;
 }
 
-void activateHeating() {
-    debugLog("[DEBUG] activateHeating() ENTRY: stage1Active=%d, stage2Active=%d\n", stage1Active, stage2Active);
-    
-    // Hydronic boiler safety interlock - prevent heating if boiler water is too cold
-    if (hydronicHeatingEnabled && !isnan(hydronicTemp)) {
-        debugLog("[DEBUG] Hydronic Safety Check: temp=%.1f, low=%.1f, high=%.1f, lockout=%d\n", 
-                     hydronicTemp, hydronicTempLow, hydronicTempHigh, hydronicLockout);
-        
-        // Manage lockout state with hysteresis
-        // Lockout activates at low threshold, clears at high threshold
-        if (hydronicTemp < hydronicTempLow && !hydronicLockout) {
-            hydronicLockout = true;
-            debugLog("[LOCKOUT] Hydronic lockout ACTIVATED - temp %.1f°F below %.1f°F\n", 
-                         hydronicTemp, hydronicTempLow);
-        } else if (hydronicTemp >= hydronicTempHigh && hydronicLockout) {
-            hydronicLockout = false;
-            debugLog("[LOCKOUT] Hydronic lockout CLEARED - temp %.1f°F reached %.1f°F\n", 
-                         hydronicTemp, hydronicTempHigh);
-        }
-        
-        // If in lockout state, prevent heating
-        if (hydronicLockout) {
-            debugLog("[LOCKOUT] Hydronic lockout active - waiting for temp to reach %.1f°F (currently %.1f°F)\n", 
-                         hydronicTempHigh, hydronicTemp);
-            
-            // Turn off heating relays
-            digitalWrite(HEAT_RELAY_1_PIN, LOW);
-            digitalWrite(HEAT_RELAY_2_PIN, LOW);
-            heatingOn = false;
-            stage1Active = false;
-            stage2Active = false;
-            
-            // Keep fan running if needed (to circulate existing warm air)
-            if (fanMode == "on" || fanMode == "cycle") {
-                if (!fanOn) {
-                    debugLog("[LOCKOUT] Keeping fan on for air circulation\n");
-                    digitalWrite(FAN_RELAY_PIN, HIGH);
-                    fanOn = true;
-                }
-            }
-            
-            updateStatusLEDs();
-            setDisplayUpdateFlag();
-            return; // Exit - no heating allowed
-        }
-        
-        debugLog("[LOCKOUT] Hydronic water temp %.1f°F OK - heating allowed\n", hydronicTemp);
+// Hydronic boiler safety interlock - lockout activates at the low threshold, clears at the high one
+void updateHydronicLockout()
+{
+    if (!hydronicHeatingEnabled || isnan(hydronicTemp)) {
+        return;
     }
-
-    // Default heating behavior with hybrid staging
-    heatingOn = true;
-    coolingOn = false;
-    
-    // Turn off cooling relays when activating heating
-    digitalWrite(COOL_RELAY_1_PIN, LOW);
-    digitalWrite(COOL_RELAY_2_PIN, LOW);
-    
-    // Check if stage 1 is not active yet
-    if (!stage1Active) {
-        debugLog("[HVAC] Stage 1 HEATING activated\n");
-        digitalWrite(HEAT_RELAY_1_PIN, HIGH); // Activate stage 1
-        stage1Active = true;
-        stage1StartTime = millis(); // Record the start time
-        stage2Active = false; // Ensure stage 2 is off initially
-        
-        // Wake display when HVAC activates
-        if (displayIsAsleep) {
-            wakeDisplay();
-            debugLog("[DISPLAY] Woke from sleep - heating activated\n");
-        }
-    }
-    
-    // Handle reversing valve or stage 2 heating (mutually exclusive)
-    if (reversingValveEnabled) {
-        // Reversing valve mode: energize valve immediately when heating
-        if (!stage2Active) {
-            debugLog("[HVAC] Reversing valve energized for HEAT mode\n");
-            digitalWrite(HEAT_RELAY_2_PIN, HIGH);
-            stage2Active = true; // Use stage2Active flag to track valve state
-        }
-    }
-    // Check if it's time to activate stage 2 based on hybrid approach
-    else if (!stage2Active && 
-             ((millis() - stage1StartTime) / 1000 >= stage1MinRuntime) && // Minimum run time before stage 2 allowed
-             (currentTemp < setTempHeat - stage2TempDelta) && // Simplified: just use delta, no swing subtraction
-             stage2HeatingEnabled) { // Check if stage 2 heating is enabled
-        debugLog("[HVAC] Stage 2 HEATING activated (temp %.1f < setpoint %.1f - delta %.1f)\n", 
-                 currentTemp, setTempHeat, stage2TempDelta);
-        digitalWrite(HEAT_RELAY_2_PIN, HIGH); // Activate stage 2
-        stage2Active = true;
-        stage2StartTime = millis(); // Record when stage 2 started
-    }
-    // Stage 2 DEACTIVATION: When temperature recovers sufficiently while stage 1 continues
-    else if (stage2Active && !reversingValveEnabled &&
-             ((millis() - stage2StartTime) >= STAGE2_MIN_RUNTIME) && // Must run minimum time before deactivation
-             (currentTemp >= setTempHeat - (stage2TempDelta * 0.5))) { // Deactivate at half-delta for hysteresis
-        debugLog("[HVAC] Stage 2 HEATING deactivated (temp %.1f >= setpoint %.1f - half-delta %.1f, runtime %.1fs)\n", 
-                 currentTemp, setTempHeat, (stage2TempDelta * 0.5), (millis() - stage2StartTime) / 1000.0);
-        digitalWrite(HEAT_RELAY_2_PIN, LOW); // Deactivate stage 2
-        stage2Active = false;
-    }
-    
-    // Control fan based on fanRelayNeeded setting
-    // BUT: Never override manual "on" mode - user takes priority
-    if (fanMode == "on") {
-        // User has manually set fan to always on - respect that
-        if (!fanOn) {
-            debugLog("[HVAC] FAN turned ON (manual mode)\n");
-            digitalWrite(FAN_RELAY_PIN, HIGH);
-            fanOn = true;
-            debugLog("Fan activated with heat (manual 'on' mode)\n");
-        }
-    } else if (fanRelayNeeded) {
-        if (!fanOn) {
-            digitalWrite(FAN_RELAY_PIN, HIGH);
-            fanOn = true;
-            debugLog("Fan activated with heat\n");
-        }
-    } else {
-        // HVAC controls its own fan, turn ours off
-        if (fanOn) {
-            digitalWrite(FAN_RELAY_PIN, LOW);
-            fanOn = false;
-            debugLog("Fan turned off during heat - HVAC controls fan\n");
-        }
+    if (hydronicTemp < hydronicTempLow && !hydronicLockout) {
+        hydronicLockout = true;
+        LOG_I(HVAC, "[LOCKOUT] Hydronic lockout ACTIVATED - temp %.1f°F below %.1f°F\n", 
+                        hydronicTemp, hydronicTempLow);
+    } else if (hydronicTemp >= hydronicTempHigh && hydronicLockout) {
+        hydronicLockout = false;
+        LOG_I(HVAC, "[LOCKOUT] Hydronic lockout CLEARED - temp %.1f°F reached %.1f°F\n", 
+                        hydronicTemp, hydronicTempHigh);
     }
-    updateStatusLEDs(); // Update LED status
-    setDisplayUpdateFlag(); // Option C: Request display update
 }
 
-void activateCooling()
+// Current relay pins as HVAC_RELAY_* bits
+uint8_t readRelayPins()
 {
-    debugLog("[DEBUG] activateCooling() ENTRY: stage1Active=%d, stage2Active=%d\n", stage1Active, stage2Active);
-    
-    // Default cooling behavior with hybrid staging
-    coolingOn = true;
-    heatingOn = false;
-    
-    // Turn off heating relays when activating cooling
-    digitalWrite(HEAT_RELAY_1_PIN, LOW);
-    
-    // Handle reversing valve: de-energize for cooling mode
-    if (reversingValveEnabled) {
-        debugLog("[HVAC] Reversing valve de-energized for COOL mode\n");
-        digitalWrite(HEAT_RELAY_2_PIN, LOW);
-        stage2Active = false;
-    } else {
-        digitalWrite(HEAT_RELAY_2_PIN, LOW);
-    }
-    
-    // Check if stage 1 is not active yet
-    if (!stage1Active) {
-        debugLog("[DEBUG] Activating cooling stage 1 relay\n");
-        digitalWrite(COOL_RELAY_1_PIN, HIGH); // Activate stage 1
-        stage1Active = true;
-        stage1StartTime = millis(); // Record the start time
-        stage2Active = false; // Ensure stage 2 is off initially
-        debugLog("[DEBUG] Stage 1 cooling activated - relay pin %d set HIGH\n", COOL_RELAY_1_PIN);
-        
-        // Wake display when HVAC activates
-        if (displayIsAsleep) {
-            wakeDisplay();
-            debugLog("[DISPLAY] Woke from sleep - cooling activated\n");
-        }
-    } else {
-        debugLog("[DEBUG] Cooling stage 1 already active (stage1Active=%d)\n", stage1Active);
-    }
-    
-    // Only activate stage 2 cooling if NOT using reversing valve
-    if (!reversingValveEnabled && !stage2Active && 
-            ((millis() - stage1StartTime) / 1000 >= stage1MinRuntime) && // Minimum run time before stage 2 allowed
-            (currentTemp > setTempCool + stage2TempDelta) && // Simplified: just use delta, no swing addition
-            stage2CoolingEnabled) { // Check if stage 2 cooling is enabled
-        debugLog("[HVAC] Stage 2 COOLING activated (temp %.1f > setpoint %.1f + delta %.1f)\n", 
-                 currentTemp, setTempCool, stage2TempDelta);
-        digitalWrite(COOL_RELAY_2_PIN, HIGH); // Activate stage 2
-        stage2Active = true;
-        stage2StartTime = millis(); // Record when stage 2 started
-    }
-    // Stage 2 DEACTIVATION: When temperature recovers sufficiently while stage 1 continues
-    else if (stage2Active && !reversingValveEnabled &&
-             ((millis() - stage2StartTime) >= STAGE2_MIN_RUNTIME) && // Must run minimum time before deactivation
-             (currentTemp <= setTempCool + (stage2TempDelta * 0.5))) { // Deactivate at half-delta for hysteresis
-        debugLog("[HVAC] Stage 2 COOLING deactivated (temp %.1f <= setpoint %.1f + half-delta %.1f, runtime %.1fs)\n", 
-                 currentTemp, setTempCool, (stage2TempDelta * 0.5), (millis() - stage2StartTime) / 1000.0);
-        digitalWrite(COOL_RELAY_2_PIN, LOW); // Deactivate stage 2
-        stage2Active = false;
-    }
-    
-    // Control fan based on fanRelayNeeded setting
-    // BUT: Never override manual "on" mode - user takes priority
-    if (fanMode == "on") {
-        // User has manually set fan to always on - respect that
-        if (!fanOn) {
-            digitalWrite(FAN_RELAY_PIN, HIGH);
-            fanOn = true;
-            debugLog("Fan activated with cooling (manual 'on' mode)\n");
-        }
-    } else if (fanRelayNeeded) {
-        if (!fanOn) {
-            digitalWrite(FAN_RELAY_PIN, HIGH);
-            fanOn = true;
-            debugLog("Fan activated with cooling\n");
-        }
-    } else {
-        // HVAC controls its own fan, turn ours off
-        if (fanOn) {
-            digitalWrite(FAN_RELAY_PIN, LOW);
-            fanOn = false;
-            debugLog("Fan turned off during cool - HVAC controls fan\n");
-        }
-    }
-    updateStatusLEDs(); // Update LED status
-    setDisplayUpdateFlag(); // Option C: Request display update
+    return (digitalRead(HEAT_RELAY_1_PIN) == HIGH ? HVAC_RELAY_HEAT1 : 0) |
+           (digitalRead(HEAT_RELAY_2_PIN) == HIGH ? HVAC_RELAY_HEAT2 : 0) |
+           (digitalRead(COOL_RELAY_1_PIN) == HIGH ? HVAC_RELAY_COOL1 : 0) |
+           (digitalRead(COOL_RELAY_2_PIN) == HIGH ? HVAC_RELAY_COOL2 : 0) |
+           (digitalRead(FAN_RELAY_PIN) == HIGH ? HVAC_RELAY_FAN : 0);
 }
 
-void handleFanControl()
+// Drive the relay pins the engine owns and mirror its state into the flags the display/MQTT use
+void applyHvacOutputs(HvacState previous)
 {
-    bool newFanState = fanOn;  // Default: keep current state
-    
-    if (fanMode == "on")
-    {
-        newFanState = true;  // Always on
-    }
-    else if (fanMode == "auto")
-    {
-        // Auto mode: fan only runs with heating/cooling if fanRelayNeeded is true
-        // If fanRelayNeeded is false, HVAC controls the fan
-        if (fanRelayNeeded) {
-            newFanState = (heatingOn || coolingOn);
-        } else {
-            newFanState = false;  // Don't control fan - HVAC system controls it
+    static const uint8_t RELAY_PINS[] = {HEAT_RELAY_1_PIN, HEAT_RELAY_2_PIN, COOL_RELAY_1_PIN, COOL_RELAY_2_PIN, FAN_RELAY_PIN};
+    
+    uint8_t wanted = hvacEngine.relays();
+    uint8_t changed = (wanted ^ readRelayPins()) & hvacEngine.ownedRelays();
+    // Break before make: everything switching off goes first
+    for (int pass = 0; pass < 2 && changed; pass++) {
+        for (int i = 0; i < 5; i++) {
+            uint8_t bit = 1 << i;
+            if ((changed & bit) && ((wanted & bit) != 0) == (pass == 1)) {
+                digitalWrite(RELAY_PINS[i], pass == 1 ? HIGH : LOW);
+            }
         }
     }
-    else if (fanMode == "cycle")
-    {
-        // Cycle mode: handled by controlFanSchedule(), don't override here
-        return;
-    }
     
-    // Only write GPIO if state actually changed (state guard)
-    if (newFanState != fanOn) {
-        digitalWrite(FAN_RELAY_PIN, newFanState ? HIGH : LOW);
-        fanOn = newFanState;
-        debugLog("[FAN] Fan state changed via handleFanControl: %s\n", fanOn ? "ON" : "OFF");
+    heatingOn = hvacEngine.heating();
+    coolingOn = hvacEngine.cooling();
+    stage1Active = hvacEngine.running();
+    stage2Active = (wanted & (HVAC_RELAY_HEAT2 | HVAC_RELAY_COOL2)) != 0; // Reversing valve shows as stage 2, as before
+    if (hvacEngine.ownedRelays() & HVAC_RELAY_FAN) {
+        fanOn = (wanted & HVAC_RELAY_FAN) != 0;
     }
     
-    setDisplayUpdateFlag(); // Option C: Request display update
+    // Wake display when HVAC activates
+    if (previous == HVAC_IDLE && hvacEngine.running() && displayIsAsleep) {
+        wakeDisplay();
+        LOG_I(DISPLAY, "[DISPLAY] Woke from sleep - %s activated\n", heatingOn ? "heating" : "cooling");
+    }
 }
 
 void controlFanSchedule()
@@ -3904,7 +4181,7 @@ void controlFanSchedule()
             if (!fanRelayNeeded && fanOn) {
                 digitalWrite(FAN_RELAY_PIN, LOW);
                 fanOn = false;
-                debugLog("[FAN SCHEDULE] Stopping fan - heating/cooling active, fanRelayNeeded=false\n");
+                LOG_I(HVAC, "[FAN SCHEDULE] Stopping fan - heating/cooling active, fanRelayNeeded=false\n");
             }
             return;
         }
@@ -3916,7 +4193,7 @@ void controlFanSchedule()
         // If an hour has passed, reset the cycle
         if (elapsedTime >= SECONDS_PER_HOUR)
         {
-            debugLog("[FAN SCHEDULE] Hour elapsed, resetting fan cycle\n");
+            LOG_I(HVAC, "[FAN SCHEDULE] Hour elapsed, resetting fan cycle\n");
             lastFanRunTime = currentTime;
             hourElapsed = 0;
         }
@@ -3942,10 +4219,11 @@ void controlFanSchedule()
         if (shouldRun != fanOn) {
             digitalWrite(FAN_RELAY_PIN, shouldRun ? HIGH : LOW);
             fanOn = shouldRun;
-            debugLog("[FAN SCHEDULE] Cycle mode: increment %lu/%lu (%lu/%lu min), fan %s\n", 
-                         currentIncrement, totalIncrements, 
-                         currentIncrement * 5, fanMinutesPerHour,
-                         fanOn ? "ON" : "OFF");
+            statePushPending = true;
+            LOG_I(HVAC, "[FAN SCHEDULE] Cycle mode: increment %lu/%lu (%lu/%lu min), fan %s\n", 
+                            currentIncrement, totalIncrements, 
+                            currentIncrement * 5, fanMinutesPerHour,
+                            fanOn ? "ON" : "OFF");
         }
         
         updateStatusLEDs(); // Update LED status
@@ -3953,59 +4231,239 @@ void controlFanSchedule()
     // Retain auto mode for backward compatibility
     else if (fanMode == "auto")
     {
-        // No scheduled fan running in auto mode - handled by handleFanControl()
+        // No scheduled fan running in auto mode - the HVAC engine drives the fan
+    }
+}
+
+// Serve a generated page/asset: 304 when the browser already has this ETag, otherwise the gzip bytes straight from flash
+void sendWebAsset(AsyncWebServerRequest *request, const WebAsset* asset)
+{
+    if (request->hasHeader("If-None-Match") && request->header("If-None-Match") == asset->etag) {
+        AsyncWebServerResponse *response = request->beginResponse(304);
+        response->addHeader("ETag", asset->etag);
+        response->addHeader("Cache-Control", asset->cacheControl);
+        request->send(response);
+        return;
+    }
+    AsyncWebServerResponse *response = request->beginResponse(200, asset->contentType, asset->data, asset->length);
+    response->addHeader("Content-Encoding", "gzip");
+    response->addHeader("ETag", asset->etag);
+    response->addHeader("Cache-Control", asset->cacheControl);
+    request->send(response);
+}
+
+// Send a body allocated with coldMalloc, freed once the response has been sent
+void sendColdBuffer(AsyncWebServerRequest *request, const char* contentType, char* body, size_t len)
+{
+    std::shared_ptr<char> owner(body, free);
+    AsyncWebServerResponse *response = request->beginResponse(contentType, len,
+        [owner, len](uint8_t *buffer, size_t maxLen, size_t index) -> size_t {
+            size_t take = len - index < maxLen ? len - index : maxLen;
+            memcpy(buffer, owner.get() + index, take);
+            return take;
+        });
+    response->addHeader("Cache-Control", "no-store");
+    request->send(response);
+}
+
+// Runtime log level per category and the highest level compiled in - /api/log
+void sendLogLevels(AsyncWebServerRequest *request)
+{
+    DynamicJsonDocument doc(768);
+    doc["compiled"] = logLevelName(LOG_LEVEL_MAX);
+    JsonObject levels = doc.createNestedObject("levels");
+    for (int i = 0; i < LOG_CAT_COUNT; i++) {
+        levels[logCategoryName(i)] = logLevelName(logLevels[i]);
+    }
+    String json;
+    serializeJson(doc, json);
+    request->send(200, "application/json", json);
+}
+
+// Values shown on the status and system tabs - /api/state?live=1 and the /events keyframe
+void buildLiveState(JsonDocument& doc)
+{
+    doc["version"] = version_info;
+    doc["hostname"] = hostname;
+
+    JsonObject status = doc.createNestedObject("status");
+    status["temp"] = serialized(String(currentTemp, 1));
+    status["humidity"] = serialized(String(currentHumidity, 1));
+    status["unit"] = useFahrenheit ? "F" : "C";
+    status["mode"] = thermostatMode;
+    status["fanMode"] = fanMode;
+    status["hydronicEnabled"] = hydronicHeatingEnabled;
+    status["hydronicTemp"] = serialized(String(hydronicTemp, 1));
+
+    JsonObject relays = status.createNestedObject("relays");
+    relays["heat1"] = digitalRead(HEAT_RELAY_1_PIN) == HIGH;
+    relays["heat2"] = digitalRead(HEAT_RELAY_2_PIN) == HIGH;
+    relays["cool1"] = digitalRead(COOL_RELAY_1_PIN) == HIGH;
+    relays["cool2"] = digitalRead(COOL_RELAY_2_PIN) == HIGH;
+    relays["fan"] = digitalRead(FAN_RELAY_PIN) == HIGH;
+    relays["reversingValve"] = reversingValveEnabled;
+    relays["stage2Heat"] = stage2HeatingEnabled;
+    relays["stage2Cool"] = stage2CoolingEnabled;
+
+    WeatherData weatherData = weather.getData();
+    JsonObject weatherObj = status.createNestedObject("weather");
+    weatherObj["valid"] = weatherSource != 0 && weatherData.valid;
+    weatherObj["temp"] = serialized(String(weatherData.temperature, 1));
+    weatherObj["description"] = weatherData.description;
+    weatherObj["high"] = serialized(String(weatherData.tempHigh, 0));
+    weatherObj["low"] = serialized(String(weatherData.tempLow, 0));
+
+    JsonObject system = doc.createNestedObject("system");
+    system["wifiNetwork"] = wifiSSID;
+    system["ip"] = WiFi.localIP().toString();
+    system["mac"] = WiFi.macAddress();
+    system["freeHeap"] = ESP.getFreeHeap();
+    system["psramFree"] = psramFreeBytes(); // 0 without PSRAM
+    system["uptime"] = formatUptime(millis());
+    system["flashMB"] = ESP.getFlashChipSize() / 1024 / 1024;
+    system["chip"] = ESP.getChipModel();
+    system["cpuMHz"] = ESP.getCpuFreqMHz();
+    system["loopMaxMs"] = loopLatencyMs;
+    system["mqttConnected"] = (bool)mqttConnected;
+    system["mqttQueued"] = mqttOutbox.count();
+    system["mqttDropped"] = mqttOutbox.stats().dropped;
+}
+
+PushSnapshot takePushSnapshot()
+{
+    PushSnapshot snap;
+    snap.temp10 = (int16_t)lroundf(currentTemp * 10.0f);
+    snap.humidity10 = (int16_t)lroundf(currentHumidity * 10.0f);
+    snap.hydronic10 = (int16_t)lroundf(hydronicTemp * 10.0f);
+    snap.relays = readRelayPins();
+    snap.mode = thermostatMode;
+    snap.fanMode = fanMode;
+    return snap;
+}
+
+// Dynamic values for the static pages. Floats go out pre-rounded like the old server-rendered page.
+void sendStateJson(AsyncWebServerRequest *request, bool liveOnly)
+{
+    DynamicJsonDocument doc(liveOnly ? 1536 : 6144);
+    buildLiveState(doc);
+
+    if (!liveOnly) {
+        // Keys match the form field names posted to /set
+        JsonObject settings = doc.createNestedObject("settings");
+        settings["thermostatMode"] = thermostatMode;
+        settings["fanMode"] = fanMode;
+        settings["setTempHeat"] = serialized(String(setTempHeat, 1));
+        settings["setTempCool"] = serialized(String(setTempCool, 1));
+        settings["setTempAuto"] = serialized(String(setTempAuto, 1));
+        settings["tempSwing"] = serialized(String(tempSwing, 1));
+        settings["autoTempSwing"] = serialized(String(autoTempSwing, 1));
+        settings["fanRelayNeeded"] = fanRelayNeeded;
+        settings["useFahrenheit"] = useFahrenheit;
+        settings["stage1MinRuntime"] = stage1MinRuntime;
+        settings["stage2TempDelta"] = serialized(String(stage2TempDelta, 1));
+        settings["fanMinutesPerHour"] = fanMinutesPerHour;
+        settings["showerModeEnabled"] = showerModeEnabled;
+        settings["showerModeDuration"] = showerModeDuration;
+        settings["stage2HeatingEnabled"] = stage2HeatingEnabled;
+        settings["reversingValveEnabled"] = reversingValveEnabled;
+        settings["stage2CoolingEnabled"] = stage2CoolingEnabled;
+        settings["hydronicHeatingEnabled"] = hydronicHeatingEnabled;
+        settings["hydronicTempLow"] = serialized(String(hydronicTempLow, 1));
+        settings["hydronicTempHigh"] = serialized(String(hydronicTempHigh, 1));
+        settings["wifiSSID"] = wifiSSID;
+        settings["wifiPassword"] = wifiPassword;
+        settings["hostname"] = hostname;
+        settings["timeZone"] = timeZone;
+        settings["use24HourClock"] = use24HourClock;
+        settings["mqttEnabled"] = mqttEnabled;
+        settings["mqttServer"] = mqttServer;
+        settings["mqttPort"] = mqttPort;
+        settings["mqttUsername"] = mqttUsername;
+        settings["mqttPassword"] = mqttPassword;
+        settings["tempOffset"] = serialized(String(tempOffset, 1));
+        settings["humidityOffset"] = serialized(String(humidityOffset, 1));
+        settings["currentBrightness"] = currentBrightness;
+        settings["displaySleepEnabled"] = displaySleepEnabled;
+        settings["displaySleepTimeout"] = displaySleepTimeout / 60000;
+        settings["weatherSource"] = weatherSource;
+        settings["owmApiKey"] = owmApiKey;
+        settings["owmCity"] = owmCity;
+        settings["owmState"] = owmState;
+        settings["owmCountry"] = owmCountry;
+        settings["haUrl"] = haUrl;
+        settings["haToken"] = haToken;
+        settings["haEntityId"] = haEntityId;
+        settings["weatherUpdateInterval"] = weatherUpdateInterval;
+
+        JsonObject schedule = doc.createNestedObject("schedule");
+        schedule["enabled"] = scheduleEnabled;
+        schedule["override"] = scheduleOverride;
+        schedule["activePeriod"] = activePeriod;
+        JsonArray days = schedule.createNestedArray("days");
+        char timeBuf[6];
+        for (int day = 0; day < 7; day++) {
+            JsonObject dayObj = days.createNestedObject();
+            dayObj["enabled"] = weekSchedule[day].enabled;
+            const SchedulePeriod* periods[2] = { &weekSchedule[day].day, &weekSchedule[day].night };
+            const char* names[2] = { "day", "night" };
+            for (int p = 0; p < 2; p++) {
+                JsonObject period = dayObj.createNestedObject(names[p]);
+                snprintf(timeBuf, sizeof(timeBuf), "%02d:%02d", periods[p]->hour, periods[p]->minute);
+                period["time"] = timeBuf;
+                period["heat"] = serialized(String(periods[p]->heatTemp, 1));
+                period["cool"] = serialized(String(periods[p]->coolTemp, 1));
+                period["auto"] = serialized(String(periods[p]->autoTemp, 1));
+            }
+        }
     }
+
+    AsyncResponseStream *response = request->beginResponseStream("application/json");
+    response->addHeader("Cache-Control", "no-store");
+    serializeJson(doc, *response);
+    request->send(response);
 }
 
 void handleWebRequests()
 {
-    server.on("/", HTTP_GET, [](AsyncWebServerRequest *request)
-    {
-        String html = generateStatusPage(currentTemp, currentHumidity, hydronicTemp, 
-                                       thermostatMode, fanMode, version_info, hostname, 
-                                       useFahrenheit, hydronicHeatingEnabled,
-                                       HEAT_RELAY_1_PIN, HEAT_RELAY_2_PIN, COOL_RELAY_1_PIN, 
-                                       COOL_RELAY_2_PIN, FAN_RELAY_PIN,
-                                       setTempHeat, setTempCool, setTempAuto,
-                                       tempSwing, autoTempSwing,
-                                       fanRelayNeeded, stage1MinRuntime, 
-                                       stage2TempDelta, fanMinutesPerHour,
-                                       showerModeEnabled, showerModeDuration,
-                                       stage2HeatingEnabled, stage2CoolingEnabled,
-                                       reversingValveEnabled,
-                                       hydronicTempLow, hydronicTempHigh,
-                                       wifiSSID, wifiPassword, timeZone,
-                                       use24HourClock, mqttEnabled, mqttServer,
-                                       mqttPort, mqttUsername, mqttPassword,
-                                       tempOffset, humidityOffset, currentBrightness,
-                                       displaySleepEnabled, displaySleepTimeout,
-                                       weekSchedule, scheduleEnabled, activePeriod,
-                                       scheduleOverride,
-                                       weatherSource, owmApiKey, owmCity, owmState, owmCountry,
-                                       haUrl, haToken, haEntityId, weatherUpdateInterval,
-                                       weather.getData());
-        request->send(200, "text/html", html);
+    // Count every HTTP request for the diagnostics history
+    server.addMiddleware([](AsyncWebServerRequest *request, ArMiddlewareNext next) {
+        diagHistory.countHttpRequest();
+        next();
     });
+    
+    // Static pages, CSS and JS - gzipped in flash, cached by ETag
+    for (size_t i = 0; i < WEB_ASSET_COUNT; i++) {
+        const WebAsset* asset = &WEB_ASSETS[i];
+        server.on(asset->path, HTTP_GET, [asset](AsyncWebServerRequest *request) {
+            sendWebAsset(request, asset);
+        });
+    }
 
+    // Legacy settings page - same app, opened on the Settings tab
     server.on("/settings", HTTP_GET, [](AsyncWebServerRequest *request)
     {
-        String html = generateSettingsPage(thermostatMode, fanMode, setTempHeat, setTempCool, setTempAuto, 
-                                          tempSwing, autoTempSwing, fanRelayNeeded, useFahrenheit, mqttEnabled, 
-                                          stage1MinRuntime, stage2TempDelta, stage2HeatingEnabled, stage2CoolingEnabled,
-                                          reversingValveEnabled,
-                                          hydronicHeatingEnabled, hydronicTempLow, hydronicTempHigh, fanMinutesPerHour,
-                                          showerModeEnabled, showerModeDuration,
-                                          mqttServer, mqttPort, mqttUsername, mqttPassword, wifiSSID, wifiPassword,
-                                          hostname, use24HourClock, timeZone, tempOffset, humidityOffset, displaySleepEnabled,
-                                          displaySleepTimeout);
-        request->send(200, "text/html", html);
+        sendWebAsset(request, findWebAsset("/"));
     });
 
-    server.on("/confirm_restore", HTTP_GET, [](AsyncWebServerRequest *request)
-              {
-        String html = generateFactoryResetPage();
-        request->send(200, "text/html", html);
+    // Everything the pages display (?live=1 for just the status/system values)
+    server.on("/api/state", HTTP_GET, [](AsyncWebServerRequest *request)
+    {
+        sendStateJson(request, request->hasParam("live"));
+    });
+
+    // Live updates: a full "state" keyframe on connect, then "delta" events from jobPushState().
+    // Each client queues at most SSE_MAX_QUEUED_MESSAGES events (platformio.ini); a slow client
+    // drops messages instead of growing the heap and resyncs when it sees a gap in the ids.
+    events.onConnect([](AsyncEventSourceClient *client)
+    {
+        DynamicJsonDocument doc(1536);
+        buildLiveState(doc);
+        String json;
+        serializeJson(doc, json);
+        client->send(json.c_str(), "state", statePushSeq, 5000);
+        LOG_I(WEB, "[SSE] Client connected (%u total)\n", (unsigned)events.count());
     });
+    server.addHandler(&events);
 
     server.on("/restore_defaults", HTTP_POST, [](AsyncWebServerRequest *request)
               {
@@ -4038,7 +4496,7 @@ void handleWebRequests()
         if (tempChanged && scheduleEnabled && !scheduleOverride) {
             scheduleOverride = true;
             overrideEndTime = millis() + (scheduleOverrideDuration * 60000UL);
-            debugLog("SCHEDULE: Web /set temperature change triggered override\n");
+            LOG_I(SCHEDULE, "SCHEDULE: Web /set temperature change triggered override\n");
             saveScheduleSettings();
         }
         if (request->hasParam("tempSwing", true)) {
@@ -4115,6 +4573,7 @@ void handleWebRequests()
             timeZone = request->getParam("timeZone", true)->value();
             setenv("TZ", timeZone.c_str(), 1);
             tzset();
+            scheduleEngine.invalidate(); // Local transition times moved
         }
         if (request->hasParam("thermostatMode", true)) {
             thermostatMode = request->getParam("thermostatMode", true)->value();
@@ -4140,7 +4599,7 @@ void handleWebRequests()
         }
         // Mutual exclusion: cannot have both stage2 heating and reversing valve
         if (stage2HeatingEnabled && reversingValveEnabled) {
-            debugLog("[WARNING] Both stage2HeatingEnabled and reversingValveEnabled set - disabling stage2HeatingEnabled\n");
+            LOG_W(WEB, "[WARNING] Both stage2HeatingEnabled and reversingValveEnabled set - disabling stage2HeatingEnabled\n");
             stage2HeatingEnabled = false;
         }
         if (request->hasParam("stage2CoolingEnabled", true)) {
@@ -4215,9 +4674,9 @@ void handleWebRequests()
         
         // Reconfigure weather module if weather settings were provided
         if (request->hasParam("weatherSource", true)) {
-            debugLog("WEATHER CONFIG: Reconfiguring weather module from web interface\n");
-            debugLog("  Source: %d\n", weatherSource);
-            debugLog("  Update Interval: %d minutes\n", weatherUpdateInterval);
+            LOG_I(WEATHER, "WEATHER CONFIG: Reconfiguring weather module from web interface\n");
+            LOG_I(WEATHER, "  Source: %d\n", weatherSource);
+            LOG_I(WEATHER, "  Update Interval: %d minutes\n", weatherUpdateInterval);
             
             weather.setUseFahrenheit(useFahrenheit);
             weather.setSource((WeatherSource)weatherSource);
@@ -4226,9 +4685,9 @@ void handleWebRequests()
             weather.setUpdateInterval(weatherUpdateInterval * 60000);
             
             bool success = weather.update(); // Force immediate update
-            debugLog("WEATHER CONFIG: Immediate update %s\n", success ? "SUCCESS" : "FAILED");
+            LOG_I(WEATHER, "WEATHER CONFIG: Immediate update %s\n", success ? "SUCCESS" : "FAILED");
             if (!success) {
-                debugLog("WEATHER CONFIG: Error: %s\n", weather.getLastError().c_str());
+                LOG_E(WEATHER, "WEATHER CONFIG: Error: %s\n", weather.getLastError().c_str());
             }
         }
         
@@ -4303,6 +4762,10 @@ void handleWebRequests()
         response += "\"build_date\": \"" + build_date + "\",";
         response += "\"build_time\": \"" + build_time + "\",";
         response += "\"full_version\": \"" + version_info + "\",";
+        // Module variant (N8/N16/N32) and OTA slot size so fleet tools pick the right image
+        uint32_t flashMB = ESP.getFlashChipSize() / (1024 * 1024);
+        response += "\"variant\": \"N" + String(flashMB) + "\",";
+        response += "\"ota_space\": " + String(ESP.getFreeSketchSpace()) + ",";
         response += "\"hostname\": \"" + hostname + "\"}";
         request->send(200, "application/json", response); });
 
@@ -4332,7 +4795,7 @@ void handleWebRequests()
         if (tempChanged && scheduleEnabled && !scheduleOverride) {
             scheduleOverride = true;
             overrideEndTime = millis() + (scheduleOverrideDuration * 60000UL);
-            debugLog("SCHEDULE: Web /control temperature change triggered override\n");
+            LOG_I(SCHEDULE, "SCHEDULE: Web /control temperature change triggered override\n");
             saveScheduleSettings();
         }
         if (request->hasParam("tempSwing", true)) {
@@ -4359,7 +4822,7 @@ void handleWebRequests()
         }
         
         systemRebootInProgress = true;
-        debugLog("[REBOOT] Reboot requested via web interface\n");
+        LOG_I(SYSTEM, "[REBOOT] Reboot requested via web interface\n");
         
         // Send simple JSON response and close connection
         AsyncWebServerResponse *response = request->beginResponse(200, "application/json", 
@@ -4368,10 +4831,7 @@ void handleWebRequests()
         request->send(response);
         
         // Defer reboot to a short FreeRTOS task to let the response flush
-        xTaskCreate([](void*) {
-            vTaskDelay(pdMS_TO_TICKS(500));
-            ESP.restart();
-        }, "web_reboot", 2048, nullptr, 1, nullptr);
+        scheduleRestart(500, "web reboot");
     });
 
     // OTA status JSON for client-side fallback progress polling
@@ -4398,50 +4858,78 @@ void handleWebRequests()
             otaInProgress = false;
             if (updateSuccess) {
                 otaRebooting = true;
-                debugLog("[OTA] Update SUCCESS - sending response and scheduling reboot...\n");
+                LOG_I(OTA, "[OTA] Update SUCCESS - sending response and scheduling reboot...\n");
                 // Send response immediately so client gets it before connection drops
-                AsyncWebServerResponse *response = request->beginResponse(200, "text/plain", "Update successful! Rebooting...");
+                AsyncWebServerResponse *response = request->beginResponse(200, "text/plain", 
+                    String("Update successful! Rebooting... sha256=") + otaComputedSha256);
                 response->addHeader("Connection", "close");
+                response->addHeader("X-Firmware-SHA256", otaComputedSha256);
                 request->send(response);
-                // Longer delay to ensure response is fully transmitted before reboot
-                delay(1500);
-                debugLog("[OTA] Rebooting now...\n");
-                ESP.restart();
+                // Reboot from a separate task so the async TCP task is not blocked while the response flushes
+                scheduleRestart(1500, "OTA update");
             } else {
                 otaRebooting = false;
                 String error = "Update failed: ";
-                if (Update.getError() == UPDATE_ERROR_SIZE) error += "File too large";
+                if (otaHashMismatch) error += "SHA-256 mismatch (expected " + otaExpectedSha256 + ", got " + String(otaComputedSha256) + ")";
+                else if (Update.getError() == UPDATE_ERROR_SIZE) error += "File too large";
                 else if (Update.getError() == UPDATE_ERROR_SPACE) error += "Not enough space";
                 else if (Update.getError() == UPDATE_ERROR_MD5) error += "MD5 check failed";
                 else if (Update.getError() == UPDATE_ERROR_MAGIC_BYTE) error += "Invalid firmware file";
                 else error += "Error code " + String(Update.getError());
-                debugLog("[OTA] Update FAILED: %s\n", error.c_str());
+                LOG_E(OTA, "[OTA] Update FAILED: %s\n", error.c_str());
                 request->send(500, "text/plain", error);
             }
         },
         [](AsyncWebServerRequest *request, String filename, size_t index, uint8_t *data, size_t len, bool final) {
             if (!index) {
-                debugLog("\n[OTA] Starting firmware update...\n");
-                debugLog("[OTA] Filename: %s\n", filename.c_str());
-                debugLog("[OTA] Free space: %u bytes\n", ESP.getFreeSketchSpace());
+                LOG_I(OTA, "\n[OTA] Starting firmware update...\n");
+                LOG_I(OTA, "[OTA] Filename: %s\n", filename.c_str());
+                LOG_I(OTA, "[OTA] Free space: %u bytes\n", ESP.getFreeSketchSpace());
                 otaBytesWritten = 0;
                 otaTotalSize = request->contentLength(); // Capture total upload size
-                debugLog("[OTA] Total size: %u bytes\n", (unsigned)otaTotalSize);
+                LOG_I(OTA, "[OTA] Total size: %u bytes\n", (unsigned)otaTotalSize);
                 otaInProgress = true;
                 otaRebooting = false;
                 otaStartTime = millis();
                 otaLastUpdateLog = otaStartTime;
-                if (!Update.begin(UPDATE_SIZE_UNKNOWN)) {
-                    debugLog("[OTA] Update.begin() failed: %s\n", Update.errorString());
+                
+                // Optional integrity/size info from the uploader (ota_upload.py sends both)
+                otaHashMismatch = false;
+                otaComputedSha256[0] = '\0';
+                otaExpectedSha256 = "";
+                if (request->hasHeader("X-Firmware-SHA256")) {
+                    otaExpectedSha256 = request->header("X-Firmware-SHA256");
+                } else if (request->hasParam("sha256")) {
+                    otaExpectedSha256 = request->getParam("sha256")->value();
+                }
+                otaExpectedSha256.toLowerCase();
+                size_t imageSize = UPDATE_SIZE_UNKNOWN;
+                if (request->hasHeader("X-Firmware-Size")) {
+                    imageSize = request->header("X-Firmware-Size").toInt();
+                    LOG_I(OTA, "[OTA] Image size: %u bytes\n", (unsigned)imageSize);
+                }
+                LOG_I(OTA, "[OTA] Expected SHA-256: %s\n", otaExpectedSha256.length() ? otaExpectedSha256.c_str() : "(not provided)");
+                
+                mbedtls_sha256_init(&otaSha256Ctx);
+                mbedtls_sha256_starts_ret(&otaSha256Ctx, 0);
+                
+                if (!Update.begin(imageSize)) {
+                    LOG_E(OTA, "[OTA] Update.begin() failed: %s\n", Update.errorString());
+                    mbedtls_sha256_free(&otaSha256Ctx);
                     otaInProgress = false;
                     return;
                 }
-                Update.setMD5("");
+            }
+            // Update aborted (begin or write failed) - drop the rest of the upload
+            if (!otaInProgress) {
+                return;
             }
             if (len) {
+                mbedtls_sha256_update_ret(&otaSha256Ctx, data, len);
                 size_t written = Update.write(data, len);
                 if (written != len) {
-                    debugLog("[OTA] Write error: expected %u bytes, wrote %u bytes\n", len, written);
+                    LOG_E(OTA, "[OTA] Write error: expected %u bytes, wrote %u bytes\n", len, written);
+                    mbedtls_sha256_free(&otaSha256Ctx);
                     otaInProgress = false;
                     return;
                 }
@@ -4449,16 +4937,29 @@ void handleWebRequests()
                 unsigned long now = millis();
                 if (now - otaLastUpdateLog > 1000) { // Update every second for smoother progress
                     int pct = otaTotalSize > 0 ? (otaBytesWritten * 100) / otaTotalSize : 0;
-                    debugLog("[OTA] Flash write: %u / %u bytes (%d%%)\n", 
-                                  (unsigned)otaBytesWritten, (unsigned)otaTotalSize, pct);
+                    LOG_I(OTA, "[OTA] Flash write: %u / %u bytes (%d%%)\n", 
+                                    (unsigned)otaBytesWritten, (unsigned)otaTotalSize, pct);
                     otaLastUpdateLog = now;
                 }
             }
             if (final) {
-                if (Update.end(true)) {
-                    debugLog("[OTA] Update complete! Total bytes: %u\n", (unsigned)(index + len));
+                uint8_t digest[32];
+                mbedtls_sha256_finish_ret(&otaSha256Ctx, digest);
+                mbedtls_sha256_free(&otaSha256Ctx);
+                for (int i = 0; i < 32; i++) {
+                    snprintf(otaComputedSha256 + i * 2, 3, "%02x", digest[i]);
+                }
+                LOG_I(OTA, "[OTA] Image SHA-256: %s\n", otaComputedSha256);
+                
+                // Reject before Update.end() so the boot partition is never switched to a bad image
+                if (otaExpectedSha256.length() > 0 && otaExpectedSha256 != otaComputedSha256) {
+                    otaHashMismatch = true;
+                    Update.abort();
+                    LOG_E(OTA, "[OTA] SHA-256 mismatch - update aborted\n");
+                } else if (Update.end(true)) {
+                    LOG_I(OTA, "[OTA] Update complete! Total bytes: %u\n", (unsigned)(index + len));
                 } else {
-                    debugLog("[OTA] Update.end() failed: %s\n", Update.errorString());
+                    LOG_E(OTA, "[OTA] Update.end() failed: %s\n", Update.errorString());
                 }
             }
         }
@@ -4573,7 +5074,7 @@ void handleWebRequests()
         if (settingsChanged) {
             // Call saveScheduleSettings() directly—no need for flag since new saveSettings() consolidates schedule saves
             saveScheduleSettings();
-            debugLog("SCHEDULE: Settings updated via web interface (atomic save)\n");
+            LOG_I(SCHEDULE, "SCHEDULE: Settings updated via web interface (atomic save)\n");
             request->send(200, "application/json", "{\"status\":\"success\",\"message\":\"Schedule settings saved successfully!\"}");
         } else {
             request->send(200, "application/json", "{\"status\":\"success\",\"message\":\"No changes detected\"}");
@@ -4588,21 +5089,127 @@ void handleWebRequests()
     
     // Debug log endpoint - returns JSON with recent serial output
     server.on("/api/debug", HTTP_GET, [](AsyncWebServerRequest *request) {
-        String logOutput = getDebugLog();
+        size_t logLen;
+        char* logOutput = snapshotDebugLog(logLen);
+        if (logOutput == NULL) {
+            request->send(503, "text/plain", "Debug log unavailable");
+            return;
+        }
         
-        // Use ArduinoJson for proper JSON serialization
-        DynamicJsonDocument doc(40960);  // 40KB for 32KB buffer + overhead
-        doc["log"] = logOutput;
+        // Use ArduinoJson for proper JSON serialization; the document and body are cold buffers
+        JsonDocument doc(&coldJsonAllocator);
+        doc["log"] = logOutput;  // char* is copied into the document
+        free(logOutput);
         
+        size_t len = measureJson(doc);
+        char* json = (char*)coldMalloc(len + 1);
+        if (json == NULL) {
+            request->send(503, "text/plain", "Out of memory");
+            return;
+        }
+        serializeJson(doc, json, len + 1);
+        sendColdBuffer(request, "application/json", json, len);
+    });
+    
+    // Diagnostics history - CSV by default, packed binary with ?format=bin (see diag_monitor.py)
+    server.on("/api/diag", HTTP_GET, [](AsyncWebServerRequest *request) {
+        bool binary = request->hasParam("format") && request->getParam("format")->value() == "bin";
+        AsyncResponseStream *response = request->beginResponseStream(binary ? "application/octet-stream" : "text/csv");
+        response->addHeader("Cache-Control", "no-store");
+        if (binary) {
+            diagHistory.writeBinary(*response);
+        } else {
+            diagHistory.writeCSV(*response);
+        }
+        request->send(response);
+    });
+    
+    // Startup phase timings (ms since power-up); a phase still running has done=false
+    server.on("/api/boot", HTTP_GET, [](AsyncWebServerRequest *request) {
+        DynamicJsonDocument doc(1536);
+        doc["sensor"] = sensorName;
+        JsonArray phases = doc.createNestedArray("phases");
+        for (int i = 0; i < bootProfiler.count(); i++) {
+            const BootPhase& phase = bootProfiler.phase(i);
+            JsonObject item = phases.createNestedObject();
+            item["name"] = phase.name;
+            item["startMs"] = phase.startMs;
+            item["ms"] = phase.done ? phase.durationMs : BootProfiler::nowMs() - phase.startMs;
+            item["core"] = phase.core;
+            item["done"] = phase.done;
+        }
         String json;
         serializeJson(doc, json);
         request->send(200, "application/json", json);
     });
     
+    // Runtime log levels per category; POST set="debug" or "mqtt=debug,sensor=warn" (kept in NVS)
+    server.on("/api/log", HTTP_GET, [](AsyncWebServerRequest *request) {
+        sendLogLevels(request);
+    });
+    
+    server.on("/api/log", HTTP_POST, [](AsyncWebServerRequest *request) {
+        if (!request->hasParam("set", true)) {
+            request->send(400, "text/plain", "Missing set parameter");
+            return;
+        }
+        if (!setLogLevels(request->getParam("set", true)->value().c_str())) {
+            request->send(400, "text/plain", "set must be <level> or <category>=<level>,... (levels: none, error, warn, info, debug, verbose)");
+            return;
+        }
+        sendLogLevels(request);
+    });
+    
+    // Temperature/humidity/runtime history: from/to (Unix time, default the last day),
+    // res=1m|15m|1h|auto, format=csv (default) or bin (stored files, see history_client.py)
+    server.on("/api/history", HTTP_GET, [](AsyncWebServerRequest *request) {
+        uint32_t now = time(nullptr);
+        if (!history.mounted() || now < HISTORY_MIN_TIME) {
+            request->send(503, "text/plain", "History unavailable (no filesystem or clock not set)");
+            return;
+        }
+        uint32_t to = request->hasParam("to") ? strtoul(request->getParam("to")->value().c_str(), NULL, 10) : now + 1;
+        uint32_t from = request->hasParam("from") ? strtoul(request->getParam("from")->value().c_str(), NULL, 10) : to - 86400;
+        if (from >= to) {
+            request->send(400, "text/plain", "from must be before to");
+            return;
+        }
+        HistoryTier tier = HistoryStore::tierFor(from, to);
+        if (request->hasParam("res") && request->getParam("res")->value() != "auto") {
+            String res = request->getParam("res")->value();
+            int found = -1;
+            for (int t = 0; t < HISTORY_TIER_COUNT; t++) {
+                if (res == HISTORY_TIERS[t].name) found = t;
+            }
+            if (found < 0) {
+                request->send(400, "text/plain", "res must be 1m, 15m, 1h or auto");
+                return;
+            }
+            tier = (HistoryTier)found;
+        }
+        bool binary = request->hasParam("format") && request->getParam("format")->value() == "bin";
+
+        // Streamed a file at a time from the async_tcp task; the query owns its open file
+        std::shared_ptr<HistoryQuery> query = std::make_shared<HistoryQuery>(history, tier, from, to, !binary);
+        AsyncWebServerResponse *response = request->beginChunkedResponse(
+            binary ? "application/octet-stream" : "text/csv",
+            [query](uint8_t *buffer, size_t maxLen, size_t index) -> size_t {
+                return query->read(buffer, maxLen);
+            });
+        response->addHeader("Cache-Control", "no-store");
+        response->addHeader("X-History-Resolution", HISTORY_TIERS[tier].name);
+        request->send(response);
+    });
+    
     // Debug plain text endpoint (simpler, easier to debug)
     server.on("/api/debug/plain", HTTP_GET, [](AsyncWebServerRequest *request) {
-        String logOutput = getDebugLog();
-        request->send(200, "text/plain", logOutput);
+        size_t logLen;
+        char* logOutput = snapshotDebugLog(logLen);
+        if (logOutput == NULL) {
+            request->send(503, "text/plain", "Debug log unavailable");
+            return;
+        }
+        sendColdBuffer(request, "text/plain", logOutput, logLen);
     });
     
     // Debug HTML page
@@ -4696,16 +5303,16 @@ void updateDisplay(float currentTemp, float currentHumidity)
     }
     
     unsigned long displayStart = millis();
-    debugLog("[DEBUG] updateDisplay start at %lu\n", displayStart);
+    LOG_D(DISPLAY, "[DEBUG] updateDisplay start at %lu\n", displayStart);
     
     // Get current time - skip if no WiFi to avoid 5-second delay
     unsigned long beforeTime = millis();
-    debugLog("[DEBUG] About to call getLocalTime\n");
+    LOG_D(DISPLAY, "[DEBUG] About to call getLocalTime\n");
     struct tm timeinfo;
     if (WiFi.status() == WL_CONNECTED && getLocalTime(&timeinfo))
     {
         unsigned long afterTime = millis();
-        debugLog("[DEBUG] getLocalTime took %lu ms\n", afterTime - beforeTime);
+        LOG_D(DISPLAY, "[DEBUG] getLocalTime took %lu ms\n", afterTime - beforeTime);
         // Build formatted time string: "10:40 Mon Dec 1 2025"
         char timePart[8];
         if (use24HourClock) {
@@ -4747,10 +5354,10 @@ void updateDisplay(float currentTemp, float currentHumidity)
         }
         
         unsigned long afterTimeOps = millis();
-        debugLog("[DEBUG] Time operations took %lu ms\n", afterTimeOps - beforeTime);
+        LOG_D(DISPLAY, "[DEBUG] Time operations took %lu ms\n", afterTimeOps - beforeTime);
     } else {
         unsigned long afterFailedTime = millis();
-        debugLog("[DEBUG] getLocalTime failed, took %lu ms\n", afterFailedTime - beforeTime);
+        LOG_D(DISPLAY, "[DEBUG] getLocalTime failed, took %lu ms\n", afterFailedTime - beforeTime);
     }
     
     // Display weather if enabled and data is valid
@@ -4760,22 +5367,22 @@ void updateDisplay(float currentTemp, float currentHumidity)
     }
     if (weatherSource != 0 && weather.isDataValid()) {
         if (!lastWeatherDisplayState) {
-            debugLog("WEATHER DISPLAY: Showing weather on TFT\n");
+            LOG_I(WEATHER, "WEATHER DISPLAY: Showing weather on TFT\n");
             WeatherData data = weather.getData();
-            debugLog("  Temp: %.1f, Condition: %s\n", data.temperature, data.condition.c_str());
+            LOG_I(WEATHER, "  Temp: %.1f, Condition: %s\n", data.temperature, data.condition.c_str());
             lastWeatherDisplayState = true;
         }
         weather.displayOnTFT(tft, 5, 25, useFahrenheit);
     } else if (weatherSource != 0) {
         if (lastWeatherDisplayState) {
-            debugLog("WEATHER DISPLAY: Clearing (source=%d, valid=%d)\n", 
-                         weatherSource, weather.isDataValid());
+            LOG_I(WEATHER, "WEATHER DISPLAY: Clearing (source=%d, valid=%d)\n", 
+                               weatherSource, weather.isDataValid());
             lastWeatherDisplayState = false;
         }
         // Clear weather area if weather is enabled but data invalid
         tft.fillRect(5, 25, 110, 40, COLOR_BACKGROUND);
     } else if (lastWeatherDisplayState) {
-        debugLog("WEATHER DISPLAY: Weather disabled, clearing display\n");
+        LOG_I(WEATHER, "WEATHER DISPLAY: Weather disabled, clearing display\n");
         tft.fillRect(5, 25, 110, 40, COLOR_BACKGROUND);
         lastWeatherDisplayState = false;
     }
@@ -5068,11 +5675,11 @@ void saveSettings()
 {
     // Acquire mutex for atomic save operation (dual-core safety)
     if (nvsSaveMutex == NULL || xSemaphoreTake(nvsSaveMutex, pdMS_TO_TICKS(5000)) != pdTRUE) {
-        debugLog("ERROR: saveSettings() timed out waiting for NVS mutex\n");
+        LOG_E(SYSTEM, "ERROR: saveSettings() timed out waiting for NVS mutex\n");
         return;
     }
     
-    debugLog("SETTINGS: Starting atomic save operation...\n");
+    LOG_I(SYSTEM, "SETTINGS: Starting atomic save operation...\n");
     unsigned long saveStartTime = millis();
     
     // Save all settings to NVS
@@ -5150,6 +5757,9 @@ void saveSettings()
         preferences.putFloat((dayPrefix + "n_cool").c_str(), weekSchedule[day].night.coolTemp);
         preferences.putFloat((dayPrefix + "n_auto").c_str(), weekSchedule[day].night.autoTemp);
         preferences.putBool((dayPrefix + "n_active").c_str(), weekSchedule[day].night.active);
+        
+        // Extra periods (period3..period6) stored as one blob per day to keep NVS entry count down
+        preferences.putBytes((dayPrefix + "extra").c_str(), weekSchedule[day].extra, sizeof(weekSchedule[day].extra));
     }
     
     // Clear flag since we're saving schedule here
@@ -5163,25 +5773,57 @@ void saveSettings()
     
     if (verifySetHeat != setTempHeat || verifySetCool != setTempCool || verifySched != scheduleEnabled) {
         verifySuccess = false;
-        debugLog("ERROR: Settings verification FAILED—save may not have persisted!\n");
-        debugLog("  setHeat: saved=%.1f, verify=%.1f\n", setTempHeat, verifySetHeat);
-        debugLog("  setCool: saved=%.1f, verify=%.1f\n", setTempCool, verifySetCool);
-        debugLog("  schedEnabled: saved=%d, verify=%d\n", scheduleEnabled, verifySched);
+        LOG_E(SYSTEM, "ERROR: Settings verification FAILED—save may not have persisted!\n");
+        LOG_E(SYSTEM, "  setHeat: saved=%.1f, verify=%.1f\n", setTempHeat, verifySetHeat);
+        LOG_E(SYSTEM, "  setCool: saved=%.1f, verify=%.1f\n", setTempCool, verifySetCool);
+        LOG_E(SYSTEM, "  schedEnabled: saved=%d, verify=%d\n", scheduleEnabled, verifySched);
     } else {
-        debugLog("SETTINGS: Verification SUCCESS—all critical values confirmed in NVS\n");
+        LOG_I(SYSTEM, "SETTINGS: Verification SUCCESS—all critical values confirmed in NVS\n");
     }
     
     unsigned long saveDuration = millis() - saveStartTime;
-    debugLog("SETTINGS: Atomic save completed in %lu ms (status=%s)\n", 
-             saveDuration, verifySuccess ? "OK" : "FAILED");
+    LOG_I(SYSTEM, "SETTINGS: Atomic save completed in %lu ms (status=%s)\n", 
+                  saveDuration, verifySuccess ? "OK" : "FAILED");
     
     // Release mutex
     xSemaphoreGive(nvsSaveMutex);
+    
+    publishMQTTConfig();
 }
 
 
+// Apply a runtime log level setting from /api/log or MQTT and keep it in NVS
+bool setLogLevels(const char* setting)
+{
+    if (!logApplySetting(setting)) {
+        LOG_W(SYSTEM, "[LOG] Invalid log level setting: %s\n", setting);
+        return false;
+    }
+    
+    char levels[192];
+    logFormatLevels(levels, sizeof(levels));
+    LOG_I(SYSTEM, "[LOG] Levels: %s\n", levels);
+    
+    if (nvsSaveMutex == NULL || xSemaphoreTake(nvsSaveMutex, pdMS_TO_TICKS(5000)) != pdTRUE) {
+        LOG_E(SYSTEM, "ERROR: setLogLevels() timed out waiting for NVS mutex\n");
+        return true;
+    }
+    uint8_t saved[LOG_CAT_COUNT];
+    for (int i = 0; i < LOG_CAT_COUNT; i++) saved[i] = logLevels[i];
+    preferences.putBytes("logLevels", saved, LOG_CAT_COUNT);
+    xSemaphoreGive(nvsSaveMutex);
+    return true;
+}
+
 void loadSettings()
 {
+    // Log levels first so the rest of startup logs at the saved levels
+    if (preferences.getBytesLength("logLevels") == LOG_CAT_COUNT) {
+        uint8_t levels[LOG_CAT_COUNT];
+        preferences.getBytes("logLevels", levels, LOG_CAT_COUNT);
+        for (int i = 0; i < LOG_CAT_COUNT; i++) logLevels[i] = levels[i];
+    }
+    
     setTempHeat = preferences.getFloat("setHeat", 72.0);
     setTempCool = preferences.getFloat("setCool", 76.0);
     setTempAuto = preferences.getFloat("setAuto", 74.0);
@@ -5235,51 +5877,51 @@ void loadSettings()
     showerModeDuration = preferences.getInt("showerDur", 30);
     
     // Debug print to confirm settings are loaded
-    debugLog("Loading settings:\n");
-    debugLog("setTempHeat: "); Serial.println(setTempHeat);
-    debugLog("setTempCool: "); Serial.println(setTempCool);
-    debugLog("setTempAuto: "); Serial.println(setTempAuto);
-    debugLog("tempSwing: "); Serial.println(tempSwing);
-    debugLog("autoTempSwing: "); Serial.println(autoTempSwing);
-    debugLog("fanRelayNeeded: "); Serial.println(fanRelayNeeded);
-    debugLog("useFahrenheit: "); Serial.println(useFahrenheit);
-    debugLog("mqttEnabled: "); Serial.println(mqttEnabled);
-    debugLog("fanMinutesPerHour: "); Serial.println(fanMinutesPerHour);
-    debugLog("mqttServer: "); Serial.println(mqttServer);
-    debugLog("mqttPort: "); Serial.println(mqttPort);
-    debugLog("mqttUsername: "); Serial.println(mqttUsername);
-    debugLog("mqttPassword: "); Serial.println(mqttPassword);
-    debugLog("wifiSSID: "); Serial.println(wifiSSID);
-    debugLog("wifiPassword: "); Serial.println(wifiPassword);
-    debugLog("thermostatMode: "); Serial.println(thermostatMode);
-    debugLog("fanMode: "); Serial.println(fanMode);
-    debugLog("timeZone: "); Serial.println(timeZone);
-    debugLog("use24HourClock: "); Serial.println(use24HourClock);
-    debugLog("hydronicHeatingEnabled: "); Serial.println(hydronicHeatingEnabled);
-    debugLog("hydronicTempLow: "); Serial.println(hydronicTempLow);
-    debugLog("hydronicTempHigh: "); Serial.println(hydronicTempHigh);
-    debugLog("hydronicLowTempAlertSent: "); Serial.println(hydronicLowTempAlertSent);
-    debugLog("hostname: "); Serial.println(hostname);
-    debugLog("stage1MinRuntime: "); Serial.println(stage1MinRuntime);
-    debugLog("stage2TempDelta: "); Serial.println(stage2TempDelta);
-    debugLog("stage2HeatingEnabled: "); Serial.println(stage2HeatingEnabled);
-    debugLog("stage2CoolingEnabled: "); Serial.println(stage2CoolingEnabled);
-    debugLog("tempOffset: "); Serial.println(tempOffset);
-    debugLog("humidityOffset: "); Serial.println(humidityOffset);
-    debugLog("displaySleepEnabled: "); Serial.println(displaySleepEnabled);
-    debugLog("displaySleepTimeout: "); Serial.println(displaySleepTimeout);
-    debugLog("weatherSource: "); Serial.println(weatherSource);
-    debugLog("owmApiKey: "); Serial.println(owmApiKey.length() > 0 ? "[SET]" : "[NOT SET]");
-    debugLog("owmCity: "); Serial.println(owmCity);
-    debugLog("owmState: "); Serial.println(owmState);
-    debugLog("owmCountry: "); Serial.println(owmCountry);
-    debugLog("haUrl: "); Serial.println(haUrl);
-    debugLog("haToken: "); Serial.println(haToken.length() > 0 ? "[SET]" : "[NOT SET]");
-    debugLog("haEntityId: "); Serial.println(haEntityId);
-    debugLog("weatherUpdateInterval: "); Serial.println(weatherUpdateInterval);
+    LOG_I(SYSTEM, "Loading settings:\n");
+    LOG_D(SYSTEM, "setTempHeat: %.2f\n", setTempHeat);
+    LOG_D(SYSTEM, "setTempCool: %.2f\n", setTempCool);
+    LOG_D(SYSTEM, "setTempAuto: %.2f\n", setTempAuto);
+    LOG_D(SYSTEM, "tempSwing: %.2f\n", tempSwing);
+    LOG_D(SYSTEM, "autoTempSwing: %.2f\n", autoTempSwing);
+    LOG_D(SYSTEM, "fanRelayNeeded: %d\n", fanRelayNeeded);
+    LOG_D(SYSTEM, "useFahrenheit: %d\n", useFahrenheit);
+    LOG_D(SYSTEM, "mqttEnabled: %d\n", mqttEnabled);
+    LOG_D(SYSTEM, "fanMinutesPerHour: %d\n", fanMinutesPerHour);
+    LOG_D(SYSTEM, "mqttServer: %s\n", mqttServer.c_str());
+    LOG_D(SYSTEM, "mqttPort: %d\n", mqttPort);
+    LOG_D(SYSTEM, "mqttUsername: %s\n", mqttUsername.c_str());
+    LOG_D(SYSTEM, "mqttPassword: %s\n", mqttPassword.length() > 0 ? "[SET]" : "[NOT SET]");
+    LOG_D(SYSTEM, "wifiSSID: %s\n", wifiSSID.c_str());
+    LOG_D(SYSTEM, "wifiPassword: %s\n", wifiPassword.length() > 0 ? "[SET]" : "[NOT SET]");
+    LOG_D(SYSTEM, "thermostatMode: %s\n", thermostatMode.c_str());
+    LOG_D(SYSTEM, "fanMode: %s\n", fanMode.c_str());
+    LOG_D(SYSTEM, "timeZone: %s\n", timeZone.c_str());
+    LOG_D(SYSTEM, "use24HourClock: %d\n", use24HourClock);
+    LOG_D(SYSTEM, "hydronicHeatingEnabled: %d\n", hydronicHeatingEnabled);
+    LOG_D(SYSTEM, "hydronicTempLow: %.2f\n", hydronicTempLow);
+    LOG_D(SYSTEM, "hydronicTempHigh: %.2f\n", hydronicTempHigh);
+    LOG_D(SYSTEM, "hydronicLowTempAlertSent: %d\n", hydronicLowTempAlertSent);
+    LOG_D(SYSTEM, "hostname: %s\n", hostname.c_str());
+    LOG_D(SYSTEM, "stage1MinRuntime: %lu\n", stage1MinRuntime);
+    LOG_D(SYSTEM, "stage2TempDelta: %.2f\n", stage2TempDelta);
+    LOG_D(SYSTEM, "stage2HeatingEnabled: %d\n", stage2HeatingEnabled);
+    LOG_D(SYSTEM, "stage2CoolingEnabled: %d\n", stage2CoolingEnabled);
+    LOG_D(SYSTEM, "tempOffset: %.2f\n", tempOffset);
+    LOG_D(SYSTEM, "humidityOffset: %.2f\n", humidityOffset);
+    LOG_D(SYSTEM, "displaySleepEnabled: %d\n", displaySleepEnabled);
+    LOG_D(SYSTEM, "displaySleepTimeout: %lu\n", displaySleepTimeout);
+    LOG_D(SYSTEM, "weatherSource: %d\n", weatherSource);
+    LOG_D(SYSTEM, "owmApiKey: %s\n", owmApiKey.length() > 0 ? "[SET]" : "[NOT SET]");
+    LOG_D(SYSTEM, "owmCity: %s\n", owmCity.c_str());
+    LOG_D(SYSTEM, "owmState: %s\n", owmState.c_str());
+    LOG_D(SYSTEM, "owmCountry: %s\n", owmCountry.c_str());
+    LOG_D(SYSTEM, "haUrl: %s\n", haUrl.c_str());
+    LOG_D(SYSTEM, "haToken: %s\n", haToken.length() > 0 ? "[SET]" : "[NOT SET]");
+    LOG_D(SYSTEM, "haEntityId: %s\n", haEntityId.c_str());
+    LOG_D(SYSTEM, "weatherUpdateInterval: %d\n", weatherUpdateInterval);
 
     // Debug print to confirm settings are loaded
-    debugLog("Settings loaded.");
+    LOG_I(SYSTEM, "Settings loaded.\n");
 }
 
 float convertCtoF(float celsius)
@@ -5308,11 +5950,11 @@ void calibrateTouchScreen()
 
     if (calDataOK && tft.getTouchRaw(&calData[0], &calData[1]))
     {
-        debugLog("Touch screen calibration data loaded from Preferences\n");
+        LOG_I(DISPLAY, "Touch screen calibration data loaded from Preferences\n");
     }
     else
     {
-        debugLog("Calibrating touch screen...\n");
+        LOG_I(DISPLAY, "Calibrating touch screen...\n");
         tft.fillScreen(COLOR_BACKGROUND);
         tft.setCursor(20, 0);
         tft.setTextFont(2);
@@ -5377,23 +6019,8 @@ void handleKeyboardTouch(uint16_t x, uint16_t y, bool isUpperCaseKeyboard)
             if (x >= expandedX && x <= expandedX + expandedWidth &&
                 y >= expandedY && y <= expandedY + expandedHeight)
             {
-                debugLog("Touch at (");
-                Serial.print(x);
-                debugLog(",");
-                Serial.print(y);
-                debugLog(") -> Key[");
-                Serial.print(row);
-                debugLog(",");
-                Serial.print(col);
-                debugLog("] KeyArea(");
-                Serial.print(keyX);
-                debugLog(",");
-                Serial.print(keyY);
-                debugLog(" ");
-                Serial.print(KEY_WIDTH);
-                debugLog("x");
-                Serial.print(KEY_HEIGHT);
-                debugLog(")\n");
+                LOG_D(DISPLAY, "Touch at (%u,%u) -> Key[%d,%d] KeyArea(%d,%d %dx%d)\n",
+                               x, y, row, col, keyX, keyY, KEY_WIDTH, KEY_HEIGHT);
                 
                 // Process the key press
                 handleKeyPress(row, col);
@@ -5526,9 +6153,9 @@ void checkDisplaySleep() {
     static unsigned long lastFilterLog = 0;
     
     if (currentTime - lastDebugTime > 30000) {
-        debugLog("[SLEEP_DEBUG] Enabled: %s, Time: %lu / Timeout: %lu, Asleep: %d\n",
-                      displaySleepEnabled ? "YES" : "NO",
-                      currentTime - lastInteractionTime, displaySleepTimeout, displayIsAsleep);
+        LOG_D(DISPLAY, "[SLEEP_DEBUG] Enabled: %s, Time: %lu / Timeout: %lu, Asleep: %d\n",
+                            displaySleepEnabled ? "YES" : "NO",
+                            currentTime - lastInteractionTime, displaySleepTimeout, displayIsAsleep);
         lastDebugTime = currentTime;
     }
     
@@ -5545,13 +6172,13 @@ void checkDisplaySleep() {
             return; // Still in cooldown
         }
         
-        // Use sensor data already updated by readMotionSensor() - NO radar.check() call here
+        // Use the latest frame decoded by the radar task
         // But ONLY use data that's fresh (recently updated)
         unsigned long dataAge = currentTime - radarDataTimestamp;
         if (dataAge > RADAR_DATA_MAX_AGE) {
             // Data is stale, skip this check
             if (firstMotionTime > 0) {
-                debugLog("[MOTION_WAKE] Data too old (%lums), resetting tracker\n", dataAge);
+                LOG_I(MOTION, "[MOTION_WAKE] Data too old (%lums), resetting tracker\n", dataAge);
                 firstMotionTime = 0;
             }
             return;
@@ -5562,13 +6189,14 @@ void checkDisplaySleep() {
             return; // Can't get mutex, skip this check
         }
         
+        LD2410Frame frame = radarFrame;
+        xSemaphoreGive(radarSensorMutex); // Release mutex immediately after copying
+        
         // Check for valid moving target using cached data
         bool validMotion = false;
-        if (radar.movingTargetDetected()) {
-            unsigned long distance = radar.movingTargetDistance();
-            int signal = radar.movingTargetSignal();
-            
-            xSemaphoreGive(radarSensorMutex); // Release mutex immediately after reading
+        if (frame.moving()) {
+            unsigned long distance = frame.movingDistance;
+            int signal = frame.movingSignal;
             
             // Validate distance and signal
             if (distance > 0 && distance < MOTION_WAKE_MAX_DISTANCE && 
@@ -5578,13 +6206,13 @@ void checkDisplaySleep() {
                 // Start or continue tracking
                 if (firstMotionTime == 0) {
                     firstMotionTime = currentTime;
-                    debugLog("[MOTION_WAKE] Started tracking: %lucm, signal %d\n", distance, signal);
+                    LOG_I(MOTION, "[MOTION_WAKE] Started tracking: %lucm, signal %d\n", distance, signal);
                 } else {
                     // Check if sustained long enough
                     unsigned long duration = currentTime - firstMotionTime;
                     if (duration >= MOTION_WAKE_DEBOUNCE) {
-                        debugLog("[MOTION_WAKE] Sustained %lums: %lucm, signal %d - WAKING\n", 
-                                      duration, distance, signal);
+                        LOG_I(MOTION, "[MOTION_WAKE] Sustained %lums: %lucm, signal %d - WAKING\n", 
+                                           duration, distance, signal);
                         firstMotionTime = 0;
                         wakeDisplay();
                         return;
@@ -5593,19 +6221,17 @@ void checkDisplaySleep() {
             } else {
                 // Log why motion was filtered
                 if (currentTime - lastFilterLog > 2000) {
-                    debugLog("[MOTION_WAKE] Filtered: %lucm (max %d), signal %d (range %d-%d)\n",
-                                  distance, MOTION_WAKE_MAX_DISTANCE, signal, 
-                                  MOTION_WAKE_MIN_SIGNAL, MOTION_WAKE_MAX_SIGNAL);
+                    LOG_I(MOTION, "[MOTION_WAKE] Filtered: %lucm (max %d), signal %d (range %d-%d)\n",
+                                       distance, MOTION_WAKE_MAX_DISTANCE, signal, 
+                                       MOTION_WAKE_MIN_SIGNAL, MOTION_WAKE_MAX_SIGNAL);
                     lastFilterLog = currentTime;
                 }
             }
-        } else {
-            xSemaphoreGive(radarSensorMutex); // Release mutex if no moving target
         }
         
         // Reset if motion stopped or invalid
         if (!validMotion && firstMotionTime > 0) {
-            debugLog("[MOTION_WAKE] Motion lost - resetting tracker\n");
+            LOG_I(MOTION, "[MOTION_WAKE] Motion lost - resetting tracker\n");
             firstMotionTime = 0;
         }
     } else {
@@ -5619,7 +6245,7 @@ void checkDisplaySleep() {
     
     // Check if display should go to sleep
     if (!displayIsAsleep && (timeSinceInteraction > displaySleepTimeout)) {
-        debugLog("[SLEEP] Display going to sleep after %lu ms\n", timeSinceInteraction);
+        LOG_I(DISPLAY, "[SLEEP] Display going to sleep after %lu ms\n", timeSinceInteraction);
         sleepDisplay();
     }
 }
@@ -5629,7 +6255,7 @@ void wakeDisplay() {
         displayIsAsleep = false;
         lastWakeTime = millis();
         lastInteractionTime = millis();
-        debugLog("[DISPLAY] Woke from sleep\n");
+        LOG_I(DISPLAY, "[DISPLAY] Woke from sleep\n");
         
         // Just restore the backlight
         updateDisplayBrightness();
@@ -5640,7 +6266,7 @@ void sleepDisplay() {
     if (!displayIsAsleep) {
         displayIsAsleep = true;
         lastSleepTime = millis(); // Record sleep time for motion wake cooldown
-        debugLog("[DISPLAY] Going to sleep (inactive for %lu ms)\n", millis() - lastInteractionTime);
+        LOG_I(DISPLAY, "[DISPLAY] Going to sleep (inactive for %lu ms)\n", millis() - lastInteractionTime);
         // Turn off backlight completely (bypass MIN_BRIGHTNESS constraint)
         currentBrightness = 0;
         ledcWrite(PWM_CHANNEL, 0);
@@ -5663,14 +6289,14 @@ bool waitForLD2410Response(unsigned long timeoutMs) {
 
 // Configure LD2410 using raw UART commands (bypasses library initialization)
 bool configureLD2410ViaRawUART() {
-    debugLog("LD2410: Configuring via raw UART commands...\n");
+    LOG_I(MOTION, "LD2410: Configuring via raw UART commands...\n");
     
     // Clear buffer
     while (Serial2.available()) Serial2.read();
     delay(100);
     
     // Enter config mode
-    debugLog("  Entering config mode...\n");
+    LOG_I(MOTION, "  Entering config mode...\n");
     uint8_t enableConfig[] = {0xFD, 0xFC, 0xFB, 0xFA, 0x04, 0x00, 
                                0xFF, 0x00, 0x01, 0x00, 
                                0x04, 0x03, 0x02, 0x01};
@@ -5678,16 +6304,16 @@ bool configureLD2410ViaRawUART() {
     delay(200);
     
     if (waitForLD2410Response(200)) {
-        debugLog("    ✓ Config mode enabled\n");
+        LOG_I(MOTION, "    ✓ Config mode enabled\n");
         // Clear the response
         while (Serial2.available()) Serial2.read();
     } else {
-        debugLog("    ✗ No config mode response\n");
+        LOG_I(MOTION, "    ✗ No config mode response\n");
         return false;
     }
     
     // Set max distance: 4 gates = 3 meters, 5 second timeout
-    debugLog("  Setting max distance (4 gates = 3m, 5s timeout)...\n");
+    LOG_I(MOTION, "  Setting max distance (4 gates = 3m, 5s timeout)...\n");
     uint8_t setMaxDist[] = {0xFD, 0xFC, 0xFB, 0xFA, 0x14, 0x00, 
                              0x60, 0x00, 0x00, 0x00, 
                              0x04, 0x00, 0x00, 0x00, // Max motion gate
@@ -5698,14 +6324,14 @@ bool configureLD2410ViaRawUART() {
     delay(200);
     
     if (waitForLD2410Response(200)) {
-        debugLog("    ✓ Max distance set\n");
+        LOG_I(MOTION, "    ✓ Max distance set\n");
         while (Serial2.available()) Serial2.read();
     } else {
-        debugLog("    ✗ No max distance response\n");
+        LOG_I(MOTION, "    ✗ No max distance response\n");
     }
     
     // Set sensitivity for each gate (reduce false positives)
-    debugLog("  Setting sensitivity per gate (Motion=30, Static=20)...\n");
+    LOG_I(MOTION, "  Setting sensitivity per gate (Motion=30, Static=20)...\n");
     for (uint8_t gate = 0; gate <= 4; gate++) {
         uint8_t setSensitivity[] = {0xFD, 0xFC, 0xFB, 0xFA, 0x14, 0x00,
                                      0x64, 0x00, 0x00, 0x00,
@@ -5717,37 +6343,37 @@ bool configureLD2410ViaRawUART() {
         delay(100);
         
         if (waitForLD2410Response(100)) {
-            debugLog("    ✓ Gate %d configured\n", gate);
+            LOG_I(MOTION, "    ✓ Gate %d configured\n", gate);
             while (Serial2.available()) Serial2.read();
         }
     }
     
     // Exit config mode
-    debugLog("  Exiting config mode...\n");
+    LOG_I(MOTION, "  Exiting config mode...\n");
     uint8_t endConfig[] = {0xFD, 0xFC, 0xFB, 0xFA, 0x02, 0x00, 
                             0xFE, 0x00, 
                             0x04, 0x03, 0x02, 0x01};
     Serial2.write(endConfig, sizeof(endConfig));
     delay(500);
     
-    debugLog("LD2410: Raw UART configuration complete\n");
+    LOG_I(MOTION, "LD2410: Raw UART configuration complete\n");
     return true;
 }
 
 bool configureLD2410Sensitivity() {
-    debugLog("LD2410: Configuring sensor sensitivity...\n");
+    LOG_I(MOTION, "LD2410: Configuring sensor sensitivity...\n");
     
     // Enter configuration mode
     if (!radar.configMode()) {
-        debugLog("  ✗ Failed to enter config mode\n");
+        LOG_W(MOTION, "  ✗ Failed to enter config mode\n");
         return false;
     }
     
     // Read current configuration
     radar.requestParameters();
-    debugLog("  Current configuration:\n");
-    debugLog("    Max range: %lu cm\n", radar.getRange_cm());
-    debugLog("    No-one window: %d seconds\n", radar.getNoOneWindow());
+    LOG_I(MOTION, "  Current configuration:\n");
+    LOG_I(MOTION, "    Max range: %lu cm\n", radar.getRange_cm());
+    LOG_I(MOTION, "    No-one window: %d seconds\n", radar.getNoOneWindow());
     
     // Set conservative parameters to reduce false positives:
     // - Max gate 4 (~3 meters)
@@ -5765,52 +6391,52 @@ bool configureLD2410Sensitivity() {
         stationaryThresholds.values[i] = (i <= 4) ? 20 : 10;  // Gates 0-4: 20, 5-8: 10
     }
     
-    debugLog("  Setting gate parameters...\n");
+    LOG_I(MOTION, "  Setting gate parameters...\n");
     if (!radar.setGateParameters(movingThresholds, stationaryThresholds, 5)) {
-        debugLog("  ✗ Failed to set gate parameters\n");
+        LOG_W(MOTION, "  ✗ Failed to set gate parameters\n");
         radar.configMode(false);
         return false;
     }
-    debugLog("    ✓ Gate parameters set\n");
+    LOG_I(MOTION, "    ✓ Gate parameters set\n");
     
     // Exit configuration mode
     radar.configMode(false);
     
-    debugLog("LD2410: Configuration complete\n");
+    LOG_I(MOTION, "LD2410: Configuration complete\n");
     return true;
 }
 
 bool testLD2410Connection() {
-    debugLog("LD2410: Testing motion sensor with MyLD2410 library...\n");
-    debugLog("LD2410: UART Debug Info:\n");
-    debugLog("  RX Pin: %d, TX Pin: %d, Baud: 256000\n", LD2410_RX_PIN, LD2410_TX_PIN);
-    debugLog("  Serial2 available: %d bytes\n", Serial2.available());
+    LOG_I(MOTION, "LD2410: Testing motion sensor with MyLD2410 library...\n");
+    LOG_I(MOTION, "LD2410: UART Debug Info:\n");
+    LOG_I(MOTION, "  RX Pin: %d, TX Pin: %d, Baud: 256000\n", LD2410_RX_PIN, LD2410_TX_PIN);
+    LOG_I(MOTION, "  Serial2 available: %d bytes\n", Serial2.available());
     
     // MyLD2410 library handles continuous stream naturally via check() method
-    debugLog("  Initializing with MyLD2410 library...\n");
+    LOG_I(MOTION, "  Initializing with MyLD2410 library...\n");
     
     if (radar.begin()) {
-        debugLog("LD2410: ✓ Library initialized!\n");
+        LOG_I(MOTION, "LD2410: ✓ Library initialized!\n");
         
         // Request configuration mode to read firmware
         radar.configMode();
-        debugLog("  Firmware: %s\n", radar.getFirmware().c_str());
-        debugLog("  Protocol version: %lu\n", radar.getVersion());
+        LOG_I(MOTION, "  Firmware: %s\n", radar.getFirmware().c_str());
+        LOG_I(MOTION, "  Protocol version: %lu\n", radar.getVersion());
         radar.configMode(false);
         
         // Configure sensor to reduce false positives
         if (configureLD2410Sensitivity()) {
-            debugLog("LD2410: ✓ Sensor configured successfully\n");
+            LOG_I(MOTION, "LD2410: ✓ Sensor configured successfully\n");
         } else {
-            debugLog("LD2410: ✗ Warning - configuration may have failed\n");
+            LOG_W(MOTION, "LD2410: ✗ Warning - configuration may have failed\n");
         }
         
         return true;
     } else {
-        debugLog("LD2410: ✗ Library initialization failed\n");
+        LOG_E(MOTION, "LD2410: ✗ Library initialization failed\n");
         
         // Check digital pin as fallback
-        debugLog("  Checking digital OUT pin as fallback...\n");
+        LOG_I(MOTION, "  Checking digital OUT pin as fallback...\n");
         pinMode(LD2410_MOTION_PIN, INPUT_PULLDOWN);
         delay(100);
         
@@ -5820,118 +6446,119 @@ bool testLD2410Connection() {
             delay(10);
         }
         
-        debugLog("  Digital pin readings: %d %d %d %d %d\n", 
-                      readings[0], readings[1], readings[2], readings[3], readings[4]);
+        LOG_I(MOTION, "  Digital pin readings: %d %d %d %d %d\n", 
+                           readings[0], readings[1], readings[2], readings[3], readings[4]);
         
-        debugLog("  WARNING: Using digital OUT pin only\n");
+        LOG_W(MOTION, "  WARNING: Using digital OUT pin only\n");
         return false;
     }
 }
 
-void readMotionSensor() {
-    if (!ld2410Connected) return;
-    
-    // Acquire mutex for thread-safe radar access
-    if (radarSensorMutex == NULL || xSemaphoreTake(radarSensorMutex, pdMS_TO_TICKS(10)) != pdTRUE) {
-        return; // Can't get mutex, skip this read
-    }
+// Radar task: read UART bytes straight into the parser ring, decode every complete frame,
+// publish the latest one and queue presence changes. Woken by Serial2.onReceive().
+void radarTaskFunction(void *parameter) {
+    bool lastPresence = false;
+    LD2410Frame frame;
     
-    // Guard against calling into library with an empty/partial UART buffer
-    // Some LD2410 frames can be larger; ensure at least a minimal header is present
-    int uartAvail = Serial2.available();
-    if (uartAvail <= 0) {
-        xSemaphoreGive(radarSensorMutex);
-        return;
-    }
-    // If very few bytes are available, skip processing to avoid misaligned reads
-    if (uartAvail < 8) {
-        xSemaphoreGive(radarSensorMutex);
-        return;
-    }
-    // CRITICAL: MyLD2410 library has buffer overflow bug in readFrame()
-    // inBuf is only 64 bytes (LD2410_BUFFER_SIZE=0x40) but readFrame() doesn't check bounds
-    // If Serial2 buffer has >64 bytes, readFrame() will write past inBuf causing heap corruption
-    // Drain buffer to safe level before calling radar.check()
-    if (uartAvail > 60) {
-        // Leave only ~30 bytes (typical frame size) to prevent overflow
-        int toDrain = uartAvail - 30;
-        while (toDrain-- > 0 && Serial2.available() > 0) {
-            (void)Serial2.read();
-        }
-        // Re-check minimal availability after draining
-        if (Serial2.available() < 8) {
-            xSemaphoreGive(radarSensorMutex);
-            return;
+    for (;;) {
+        // The timeout only matters if a notification is missed; frames arrive ~10 times a second
+        ulTaskNotifyTake(pdTRUE, pdMS_TO_TICKS(200));
+        
+        int available;
+        while ((available = Serial2.available()) > 0) {
+            size_t space;
+            uint8_t* dest = radarParser.writeSpace(space);
+            if (space == 0) {
+                // Only possible if the ring holds nothing but an unfinished frame - drop the input
+                while (Serial2.available() > 0) {
+                    (void)Serial2.read();
+                    radarParser.countOverflow(1);
+                }
+                break;
+            }
+            size_t count = Serial2.read(dest, (size_t)available < space ? (size_t)available : space);
+            radarParser.commit(count);
+            
+            while (radarParser.next(frame)) {
+                if (radarSensorMutex != NULL && xSemaphoreTake(radarSensorMutex, pdMS_TO_TICKS(10)) == pdTRUE) {
+                    radarFrame = frame;
+                    radarDataTimestamp = millis();
+                    xSemaphoreGive(radarSensorMutex);
+                }
+                if (frame.presence() != lastPresence) {
+                    PresenceEdge edge = { frame.presence(), frame, millis() };
+                    if (xQueueSend(presenceEdgeQueue, &edge, 0) != pdTRUE) {
+                        presenceEdgesDropped++;
+                    }
+                    lastPresence = frame.presence();
+                }
+            }
         }
     }
+}
 
-    // Check for new data using MyLD2410 library
-    // check() returns DATA when a data frame is received
-    radar.check();
-    
-    // Update timestamp to indicate fresh data
-    radarDataTimestamp = millis();
-    
-    // Check for presence using library's built-in detection
-    bool currentPresence = radar.presenceDetected();
+// Loop job: act on presence changes queued by the radar task
+void readMotionSensor() {
+    if (!ld2410Connected || presenceEdgeQueue == NULL) return;
     
-    // Debug presence state changes with detailed information
-    static bool lastPresenceState = false;
     static unsigned long lastPresenceChangeTime = 0;
-    
-    if (currentPresence != lastPresenceState) {
-        unsigned long now = millis();
-        debugLog("LD2410: Presence %s after %lu ms\n", 
-                      currentPresence ? "DETECTED" : "CLEARED",
-                      now - lastPresenceChangeTime);
+    PresenceEdge edge;
+    while (xQueueReceive(presenceEdgeQueue, &edge, 0) == pdTRUE) {
+        LOG_I(MOTION, "LD2410: Presence %s after %lu ms\n", 
+                           edge.present ? "DETECTED" : "CLEARED",
+                           edge.timeMs - lastPresenceChangeTime);
+        lastPresenceChangeTime = edge.timeMs;
+        
+        if (!edge.present) continue;
         
         // Show what type of target was detected
-        if (currentPresence) {
-            if (radar.movingTargetDetected()) {
-                debugLog("  Moving target at %lu cm (signal: %d)\n",
-                              radar.movingTargetDistance(),
-                              radar.movingTargetSignal());
-            }
-            if (radar.stationaryTargetDetected()) {
-                debugLog("  Stationary target at %lu cm (signal: %d)\n",
-                              radar.stationaryTargetDistance(),
-                              radar.stationaryTargetSignal());
-            }
+        if (edge.frame.moving()) {
+            LOG_I(MOTION, "  Moving target at %u cm (signal: %u)\n",
+                               edge.frame.movingDistance, edge.frame.movingSignal);
+        }
+        if (edge.frame.stationary()) {
+            LOG_I(MOTION, "  Stationary target at %u cm (signal: %u)\n",
+                               edge.frame.stationaryDistance, edge.frame.stationarySignal);
+        }
+        
+        // Wake display on NEW presence detection (state change from NO to YES)
+        // Only wake if MOVING target detected with valid distance/signal to filter false positives
+        // Only if motion wake is enabled and display is asleep
+        if (motionWakeEnabled && displayIsAsleep && edge.frame.moving()) {
+            unsigned long distance = edge.frame.movingDistance;
+            int signal = edge.frame.movingSignal;
             
-            // Wake display on NEW presence detection (state change from NO to YES)
-            // Only wake if MOVING target detected with valid distance/signal to filter false positives
-            // Only if motion wake is enabled and display is asleep
-            if (motionWakeEnabled && displayIsAsleep && radar.movingTargetDetected()) {
-                unsigned long distance = radar.movingTargetDistance();
-                int signal = radar.movingTargetSignal();
-                
-                // Apply same filters as sustained motion wake
-                if (distance > 0 && distance < MOTION_WAKE_MAX_DISTANCE && 
-                    signal >= MOTION_WAKE_MIN_SIGNAL && signal <= MOTION_WAKE_MAX_SIGNAL) {
-                    debugLog("LD2410: Waking display - NEW moving target: %lucm, signal %d\n", distance, signal);
-                    wakeDisplay();
-                } else {
-                    debugLog("LD2410: Filtered NEW moving target: %lucm (max %d), signal %d (range %d-%d)\n",
-                                  distance, MOTION_WAKE_MAX_DISTANCE, signal, 
-                                  MOTION_WAKE_MIN_SIGNAL, MOTION_WAKE_MAX_SIGNAL);
-                }
+            // Apply same filters as sustained motion wake
+            if (distance > 0 && distance < MOTION_WAKE_MAX_DISTANCE && 
+                signal >= MOTION_WAKE_MIN_SIGNAL && signal <= MOTION_WAKE_MAX_SIGNAL) {
+                LOG_I(MOTION, "LD2410: Waking display - NEW moving target: %lucm, signal %d\n", distance, signal);
+                wakeDisplay();
+            } else {
+                LOG_I(MOTION, "LD2410: Filtered NEW moving target: %lucm (max %d), signal %d (range %d-%d)\n",
+                                   distance, MOTION_WAKE_MAX_DISTANCE, signal, 
+                                   MOTION_WAKE_MIN_SIGNAL, MOTION_WAKE_MAX_SIGNAL);
             }
         }
-        
-        lastPresenceState = currentPresence;
-        lastPresenceChangeTime = now;
     }
     
+    // Current state from the latest frame
+    if (radarSensorMutex == NULL || xSemaphoreTake(radarSensorMutex, pdMS_TO_TICKS(10)) != pdTRUE) {
+        return;
+    }
+    LD2410Frame frame = radarFrame;
+    xSemaphoreGive(radarSensorMutex);
+    bool currentPresence = frame.presence();
+    
     if (currentPresence) {
         if (!motionDetected) {
-            debugLog("LD2410: Presence activated - starting presence timer\n");
+            LOG_I(MOTION, "LD2410: Presence activated - starting presence timer\n");
         }
         motionDetected = true;
         lastMotionTime = millis();
     } else {
         // Presence cleared by sensor's internal timeout (configured in no-one window parameter)
         if (motionDetected) {
-            debugLog("LD2410: Presence timeout - clearing motion flag\n");
+            LOG_I(MOTION, "LD2410: Presence timeout - clearing motion flag\n");
             motionDetected = false;
         }
     }
@@ -5940,27 +6567,26 @@ void readMotionSensor() {
     static unsigned long lastDebugTime = 0;
     if (millis() - lastDebugTime > 10000) {
         lastDebugTime = millis();
-        debugLog("LD2410: Presence=%s, Motion Flag=%s, Age=%lu ms\n",
-                      currentPresence ? "YES" : "NO",
-                      motionDetected ? "ACTIVE" : "INACTIVE",
-                      millis() - lastMotionTime);
+        const LD2410ParserStats& stats = radarParser.stats();
+        LOG_D(MOTION, "LD2410: Presence=%s, Motion Flag=%s, Age=%lu ms\n",
+                           currentPresence ? "YES" : "NO",
+                           motionDetected ? "ACTIVE" : "INACTIVE",
+                           millis() - lastMotionTime);
+        LOG_D(MOTION, "  Parser: %lu frames, %lu bad, %lu resync bytes, %lu overflow bytes, %lu edges dropped\n",
+                           (unsigned long)stats.frames, (unsigned long)stats.badFrames,
+                           (unsigned long)stats.resyncBytes, (unsigned long)stats.overflowBytes,
+                           (unsigned long)presenceEdgesDropped);
         
         // Show target details if present
         if (currentPresence) {
-            if (radar.movingTargetDetected()) {
-                debugLog("  Moving: %lucm @ signal %d\n",
-                              radar.movingTargetDistance(),
-                              radar.movingTargetSignal());
+            if (frame.moving()) {
+                LOG_D(MOTION, "  Moving: %ucm @ signal %u\n", frame.movingDistance, frame.movingSignal);
             }
-            if (radar.stationaryTargetDetected()) {
-                debugLog("  Stationary: %lucm @ signal %d\n",
-                              radar.stationaryTargetDistance(),
-                              radar.stationaryTargetSignal());
+            if (frame.stationary()) {
+                LOG_D(MOTION, "  Stationary: %ucm @ signal %u\n", frame.stationaryDistance, frame.stationarySignal);
             }
         }
     }
-    
-    xSemaphoreGive(radarSensorMutex); // Release mutex
 }
 
 // LED control functions
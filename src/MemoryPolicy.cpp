@@ -0,0 +1,61 @@
+/*
+ * MemoryPolicy.cpp - Placement of large buffers implementation
+ */
+
+#include "MemoryPolicy.h"
+#include "esp_heap_caps.h"
+#include "Log.h"
+
+#define COLD_CAPS (MALLOC_CAP_SPIRAM | MALLOC_CAP_8BIT)
+
+ColdJsonAllocator coldJsonAllocator;
+
+static bool psramPresent = false;
+
+void memoryPolicyBegin() {
+#ifdef BOARD_HAS_PSRAM
+    psramPresent = psramFound();
+    if (psramPresent) {
+        LOG_I(SYSTEM, "[MEM] PSRAM %u KB free - large buffers go to PSRAM\n", (unsigned)(psramFreeBytes() / 1024));
+    } else {
+        LOG_I(SYSTEM, "[MEM] Built for PSRAM but none found - large buffers use internal RAM\n");
+    }
+#endif
+}
+
+bool psramAvailable() {
+    return psramPresent;
+}
+
+size_t psramFreeBytes() {
+    return psramPresent ? heap_caps_get_free_size(MALLOC_CAP_SPIRAM) : 0;
+}
+
+void* coldMalloc(size_t size) {
+    if (psramPresent) {
+        void* ptr = heap_caps_malloc(size, COLD_CAPS);
+        if (ptr) return ptr;
+    }
+    return malloc(size);
+}
+
+void* coldCalloc(size_t count, size_t size) {
+    if (psramPresent) {
+        void* ptr = heap_caps_calloc(count, size, COLD_CAPS);
+        if (ptr) return ptr;
+    }
+    return calloc(count, size);
+}
+
+void* coldRealloc(void* ptr, size_t size) {
+    if (psramPresent) {
+        // Moves a block that had to fall back to internal RAM out to PSRAM
+        void* moved = heap_caps_realloc(ptr, size, COLD_CAPS);
+        if (moved) return moved;
+    }
+    return realloc(ptr, size);
+}
+
+size_t boardBufferSize(size_t internalSize, size_t psramSize) {
+    return psramPresent ? psramSize : internalSize;
+}
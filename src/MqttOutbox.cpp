@@ -0,0 +1,158 @@
+/*
+ * MqttOutbox.cpp - Bounded, coalescing outbound MQTT queue implementation
+ */
+
+#include "MqttOutbox.h"
+#include <stdlib.h>
+#include <string.h>
+
+MqttOutbox::MqttOutbox() {
+    memset(_slots, 0, sizeof(_slots));
+    _count = 0;
+    _bytes = 0;
+    _nextOrder = 0;
+    memset(&_stats, 0, sizeof(_stats));
+}
+
+MqttOutbox::~MqttOutbox() {
+    clear();
+}
+
+void MqttOutbox::clear() {
+    for (int i = 0; i < MQTT_OUTBOX_SLOTS; i++) {
+        if (_slots[i].data) release(_slots[i]);
+    }
+    _count = 0;
+    _bytes = 0;
+}
+
+bool MqttOutbox::put(const char* topic, const char* payload, bool retained) {
+    size_t topicLen = strlen(topic);
+    size_t payloadLen = strlen(payload);
+    size_t size = topicLen + payloadLen + 2;
+    if (size > MQTT_OUTBOX_MAX_BYTES || size > UINT16_MAX) {
+        _stats.dropped++;
+        return false;
+    }
+
+    MqttMessage message;
+    message.data = (char*)malloc(size);
+    if (!message.data) {
+        _stats.dropped++;
+        return false;
+    }
+    memcpy(message.data, topic, topicLen + 1);
+    memcpy(message.data + topicLen + 1, payload, payloadLen + 1);
+    message.payload = message.data + topicLen + 1;
+    message.size = (uint16_t)size;
+    message.retained = retained;
+
+    // Last value wins: replace the queued message for this topic, keeping its place in line
+    int slot = find(topic);
+    if (slot >= 0) {
+        message.order = _slots[slot].order;
+        drop(slot);
+        _stats.coalesced++;
+    } else {
+        message.order = _nextOrder++;
+        _stats.queued++;
+    }
+
+    if (!makeRoom(size)) {
+        free(message.data);
+        _stats.dropped++;
+        return false;
+    }
+    store(freeSlot(), message);
+    return true;
+}
+
+bool MqttOutbox::hasRoom(const char* topic, size_t payloadLen) const {
+    size_t size = strlen(topic) + payloadLen + 2;
+    size_t count = _count;
+    size_t bytes = _bytes;
+    int slot = find(topic);
+    if (slot >= 0) {
+        count--;
+        bytes -= _slots[slot].size;
+    }
+    return count < MQTT_OUTBOX_SLOTS && bytes + size <= MQTT_OUTBOX_MAX_BYTES;
+}
+
+bool MqttOutbox::take(MqttMessage& message) {
+    int slot = oldest(false);
+    if (slot < 0) return false;
+    message = _slots[slot];
+    _slots[slot].data = NULL;
+    _count--;
+    _bytes -= message.size;
+    return true;
+}
+
+void MqttOutbox::restore(MqttMessage& message) {
+    // A newer value queued while this one was out wins
+    if (find(message.topic()) >= 0) {
+        release(message);
+        return;
+    }
+    if (!makeRoom(message.size)) {
+        _stats.dropped++;
+        release(message);
+        return;
+    }
+    store(freeSlot(), message);
+    message.data = NULL;
+}
+
+void MqttOutbox::release(MqttMessage& message) {
+    free(message.data);
+    message.data = NULL;
+    message.payload = NULL;
+}
+
+int MqttOutbox::find(const char* topic) const {
+    for (int i = 0; i < MQTT_OUTBOX_SLOTS; i++) {
+        if (_slots[i].data && strcmp(_slots[i].data, topic) == 0) return i;
+    }
+    return -1;
+}
+
+int MqttOutbox::freeSlot() const {
+    for (int i = 0; i < MQTT_OUTBOX_SLOTS; i++) {
+        if (!_slots[i].data) return i;
+    }
+    return -1;
+}
+
+int MqttOutbox::oldest(bool nonRetainedOnly) const {
+    int best = -1;
+    for (int i = 0; i < MQTT_OUTBOX_SLOTS; i++) {
+        if (!_slots[i].data || (nonRetainedOnly && _slots[i].retained)) continue;
+        if (best < 0 || _slots[i].order < _slots[best].order) best = i;
+    }
+    return best;
+}
+
+void MqttOutbox::drop(int slot) {
+    _count--;
+    _bytes -= _slots[slot].size;
+    release(_slots[slot]);
+}
+
+bool MqttOutbox::makeRoom(size_t size) {
+    while (_count > 0 && (_count >= MQTT_OUTBOX_SLOTS || _bytes + size > MQTT_OUTBOX_MAX_BYTES)) {
+        int victim = oldest(true);
+        if (victim < 0) victim = oldest(false);
+        drop(victim);
+        _stats.dropped++;
+    }
+    return _bytes + size <= MQTT_OUTBOX_MAX_BYTES;
+}
+
+void MqttOutbox::store(int slot, MqttMessage& message) {
+    _slots[slot] = message;
+    _count++;
+    _bytes += message.size;
+    if (_count > _stats.peakCount) _stats.peakCount = (uint16_t)_count;
+    if (_bytes > _stats.peakBytes) _stats.peakBytes = (uint32_t)_bytes;
+}
@@ -3,6 +3,7 @@
  */
 
 #include "Weather.h"
+#include "Log.h"
 
 // Color definitions (matching main thermostat colors)
 #define COLOR_BACKGROUND   0x1082
@@ -19,23 +20,23 @@ Weather::Weather() {
 }
 
 void Weather::begin() {
-    debugLog("[Weather] begin() called - initializing weather module\n");
+    LOG_I(WEATHER, "[Weather] begin() called - initializing weather module\n");
     _data.valid = false;
     _lastError = "";
-    debugLog("[Weather] Source: %d, Update interval: %lu ms\n", _source, _updateInterval);
+    LOG_I(WEATHER, "[Weather] Source: %d, Update interval: %lu ms\n", _source, _updateInterval);
 }
 
 void Weather::setSource(WeatherSource source) {
-    debugLog("[Weather] setSource() called - changing from %d to %d\n", _source, source);
+    LOG_I(WEATHER, "[Weather] setSource() called - changing from %d to %d\n", _source, source);
     _source = source;
 }
 
 void Weather::setOpenWeatherMapConfig(String apiKey, String city, String state, String countryCode) {
-    debugLog("[Weather] setOpenWeatherMapConfig() - City: %s, State: %s, Country: %s, API Key: %s\n", 
-                  city.c_str(), 
-                  state.c_str(),
-                  countryCode.c_str(), 
-                  apiKey.isEmpty() ? "[NOT SET]" : "[SET]");
+    LOG_I(WEATHER, "[Weather] setOpenWeatherMapConfig() - City: %s, State: %s, Country: %s, API Key: %s\n", 
+                        city.c_str(), 
+                        state.c_str(),
+                        countryCode.c_str(), 
+                        apiKey.isEmpty() ? "[NOT SET]" : "[SET]");
     _owmApiKey = apiKey;
     _owmCity = city;
     _owmState = state;
@@ -43,10 +44,10 @@ void Weather::setOpenWeatherMapConfig(String apiKey, String city, String state,
 }
 
 void Weather::setHomeAssistantConfig(String haUrl, String haToken, String entityId) {
-    debugLog("[Weather] setHomeAssistantConfig() - URL: %s, Entity: %s, Token: %s\n", 
-                  haUrl.c_str(), 
-                  entityId.c_str(), 
-                  haToken.isEmpty() ? "[NOT SET]" : "[SET]");
+    LOG_I(WEATHER, "[Weather] setHomeAssistantConfig() - URL: %s, Entity: %s, Token: %s\n", 
+                        haUrl.c_str(), 
+                        entityId.c_str(), 
+                        haToken.isEmpty() ? "[NOT SET]" : "[SET]");
     _haUrl = haUrl;
     _haToken = haToken;
     _haEntityId = entityId;
@@ -70,32 +71,32 @@ bool Weather::update() {
         return _data.valid;
     }
     
-    debugLog("[Weather] update() - starting update (source: %d, forced: %d)\n", _source, _forceNextUpdate);
+    LOG_D(WEATHER, "[Weather] update() - starting update (source: %d, forced: %d)\n", _source, _forceNextUpdate);
     _forceNextUpdate = false; // Clear force flag after first use
     _lastUpdateAttempt = currentTime;
     
     if (_source == WEATHER_DISABLED) {
-        debugLog("[Weather] update() - weather source is DISABLED\n");
+        LOG_I(WEATHER, "[Weather] update() - weather source is DISABLED\n");
         _lastError = "Weather disabled";
         return false;
     }
     
     bool success = false;
     if (_source == WEATHER_OPENWEATHERMAP) {
-        debugLog("[Weather] update() - calling updateFromOpenWeatherMap()\n");
+        LOG_D(WEATHER, "[Weather] update() - calling updateFromOpenWeatherMap()\n");
         success = updateFromOpenWeatherMap();
     } else if (_source == WEATHER_HOMEASSISTANT) {
-        debugLog("[Weather] update() - calling updateFromHomeAssistant()\n");
+        LOG_D(WEATHER, "[Weather] update() - calling updateFromHomeAssistant()\n");
         success = updateFromHomeAssistant();
     } else {
-        debugLog("[Weather] update() - UNKNOWN source: %d\n", _source);
+        LOG_I(WEATHER, "[Weather] update() - UNKNOWN source: %d\n", _source);
     }
     
     if (success) {
         _data.lastUpdate = currentTime;
-        debugLog("[Weather] update() - SUCCESS\n");
+        LOG_I(WEATHER, "[Weather] update() - SUCCESS\n");
     } else {
-        debugLog("[Weather] update() - FAILED: %s\n", _lastError.c_str());
+        LOG_E(WEATHER, "[Weather] update() - FAILED: %s\n", _lastError.c_str());
     }
     
     return success;
@@ -107,13 +108,13 @@ void Weather::forceUpdate() {
 }
 
 bool Weather::updateFromOpenWeatherMap() {
-    debugLog("[Weather] updateFromOpenWeatherMap() - starting\n");
+    LOG_D(WEATHER, "[Weather] updateFromOpenWeatherMap() - starting\n");
     
     if (_owmApiKey.isEmpty() || _owmCity.isEmpty()) {
         _lastError = "OpenWeatherMap not configured";
-        debugLog("[Weather] OWM - Config error: API Key %s, City %s\n",
-                      _owmApiKey.isEmpty() ? "EMPTY" : "OK",
-                      _owmCity.isEmpty() ? "EMPTY" : "OK");
+        LOG_E(WEATHER, "[Weather] OWM - Config error: API Key %s, City %s\n",
+                            _owmApiKey.isEmpty() ? "EMPTY" : "OK",
+                            _owmCity.isEmpty() ? "EMPTY" : "OK");
         return false;
     }
     
@@ -138,23 +139,23 @@ bool Weather::updateFromOpenWeatherMap() {
     
     url += "&appid=" + _owmApiKey + "&units=" + units;
     
-    Serial.println("[Weather] OWM - URL: " + url);
+    LOG_D(WEATHER, "[Weather] OWM - URL: %s\n", url.c_str());
     
     http.begin(url);
     http.setTimeout(5000);
-    debugLog("[Weather] OWM - Sending HTTP GET request...\n");
+    LOG_D(WEATHER, "[Weather] OWM - Sending HTTP GET request...\n");
     int httpCode = http.GET();
-    debugLog("[Weather] OWM - HTTP response code: %d\n", httpCode);
+    LOG_D(WEATHER, "[Weather] OWM - HTTP response code: %d\n", httpCode);
     
     if (httpCode != 200) {
         _lastError = "HTTP error: " + String(httpCode);
-        debugLog("[Weather] OWM - HTTP FAILED: %d\n", httpCode);
+        LOG_E(WEATHER, "[Weather] OWM - HTTP FAILED: %d\n", httpCode);
         http.end();
         return false;
     }
     
     String payload = http.getString();
-    debugLog("[Weather] OWM - Received payload length: %d bytes\n", payload.length());
+    LOG_D(WEATHER, "[Weather] OWM - Received payload length: %d bytes\n", payload.length());
     http.end();
     
     // Parse JSON response
@@ -163,14 +164,14 @@ bool Weather::updateFromOpenWeatherMap() {
     
     if (error) {
         _lastError = "JSON parse error: " + String(error.c_str());
-        debugLog("[Weather] OWM - JSON parse FAILED: %s\n", error.c_str());
-        Serial.println("[Weather] OWM - Payload: " + payload);
+        LOG_E(WEATHER, "[Weather] OWM - JSON parse FAILED: %s\n", error.c_str());
+        LOG_D(WEATHER, "[Weather] OWM - Payload: %s\n", payload.c_str());
         return false;
     }
-    debugLog("[Weather] OWM - JSON parsed successfully\n");
+    LOG_D(WEATHER, "[Weather] OWM - JSON parsed successfully\n");
     
     // Extract weather data
-    debugLog("[Weather] OWM - Extracting weather data from JSON...\n");
+    LOG_D(WEATHER, "[Weather] OWM - Extracting weather data from JSON...\n");
     _data.temperature = doc["main"]["temp"];
     _data.tempHigh = doc["main"]["temp_max"];
     _data.tempLow = doc["main"]["temp_min"];
@@ -183,52 +184,52 @@ bool Weather::updateFromOpenWeatherMap() {
     _data.valid = true;
     _lastError = "";
     
-    debugLog("[Weather] OWM - SUCCESS: Temp=%.1f%s, High=%.1f, Low=%.1f, Condition=%s, Humidity=%d%%\n", 
-                  _data.temperature, 
-                  _useFahrenheit ? "F" : "C",
-                  _data.tempHigh,
-                  _data.tempLow,
-                  _data.condition.c_str(),
-                  _data.humidity);
+    LOG_I(WEATHER, "[Weather] OWM - SUCCESS: Temp=%.1f%s, High=%.1f, Low=%.1f, Condition=%s, Humidity=%d%%\n", 
+                        _data.temperature, 
+                        _useFahrenheit ? "F" : "C",
+                        _data.tempHigh,
+                        _data.tempLow,
+                        _data.condition.c_str(),
+                        _data.humidity);
     
     return true;
 }
 
 bool Weather::updateFromHomeAssistant() {
-    debugLog("[Weather] updateFromHomeAssistant() - starting\n");
+    LOG_D(WEATHER, "[Weather] updateFromHomeAssistant() - starting\n");
     
     if (_haUrl.isEmpty() || _haToken.isEmpty() || _haEntityId.isEmpty()) {
         _lastError = "Home Assistant not configured";
-        debugLog("[Weather] HA - Config error: URL %s, Token %s, Entity %s\n",
-                      _haUrl.isEmpty() ? "EMPTY" : "OK",
-                      _haToken.isEmpty() ? "EMPTY" : "OK",
-                      _haEntityId.isEmpty() ? "EMPTY" : "OK");
+        LOG_E(WEATHER, "[Weather] HA - Config error: URL %s, Token %s, Entity %s\n",
+                            _haUrl.isEmpty() ? "EMPTY" : "OK",
+                            _haToken.isEmpty() ? "EMPTY" : "OK",
+                            _haEntityId.isEmpty() ? "EMPTY" : "OK");
         return false;
     }
     
     HTTPClient http;
     String url = _haUrl + "/api/states/" + _haEntityId;
     
-    Serial.println("[Weather] HA - URL: " + url);
+    LOG_D(WEATHER, "[Weather] HA - URL: %s\n", url.c_str());
     
     http.begin(url);
     http.setTimeout(5000);
     http.addHeader("Authorization", "Bearer " + _haToken);
     http.addHeader("Content-Type", "application/json");
-    debugLog("[Weather] HA - Headers set, sending HTTP GET request...\n");
+    LOG_D(WEATHER, "[Weather] HA - Headers set, sending HTTP GET request...\n");
     
     int httpCode = http.GET();
-    debugLog("[Weather] HA - HTTP response code: %d\n", httpCode);
+    LOG_D(WEATHER, "[Weather] HA - HTTP response code: %d\n", httpCode);
     
     if (httpCode != 200) {
         _lastError = "HTTP error: " + String(httpCode);
-        debugLog("[Weather] HA - HTTP FAILED: %d\n", httpCode);
+        LOG_E(WEATHER, "[Weather] HA - HTTP FAILED: %d\n", httpCode);
         http.end();
         return false;
     }
     
     String payload = http.getString();
-    debugLog("[Weather] HA - Received payload length: %d bytes\n", payload.length());
+    LOG_D(WEATHER, "[Weather] HA - Received payload length: %d bytes\n", payload.length());
     http.end();
     
     // Parse JSON response
@@ -237,28 +238,28 @@ bool Weather::updateFromHomeAssistant() {
     
     if (error) {
         _lastError = "JSON parse error: " + String(error.c_str());
-        debugLog("[Weather] HA - JSON parse FAILED: %s\n", error.c_str());
-        Serial.println("[Weather] HA - Payload: " + payload);
+        LOG_E(WEATHER, "[Weather] HA - JSON parse FAILED: %s\n", error.c_str());
+        LOG_D(WEATHER, "[Weather] HA - Payload: %s\n", payload.c_str());
         return false;
     }
-    debugLog("[Weather] HA - JSON parsed successfully\n");
+    LOG_D(WEATHER, "[Weather] HA - JSON parsed successfully\n");
     
     // Extract weather data from Home Assistant entity
-    debugLog("[Weather] HA - Extracting weather data from JSON...\n");
+    LOG_D(WEATHER, "[Weather] HA - Extracting weather data from JSON...\n");
     _data.temperature = doc["attributes"]["temperature"];
     _data.humidity = doc["attributes"]["humidity"];
     _data.condition = doc["state"].as<String>();
     
     // Optional attributes (may not be present)
     if (doc["attributes"].containsKey("forecast")) {
-        debugLog("[Weather] HA - Forecast data found\n");
+        LOG_D(WEATHER, "[Weather] HA - Forecast data found\n");
         JsonArray forecast = doc["attributes"]["forecast"];
         if (forecast.size() > 0) {
             _data.tempHigh = forecast[0]["temperature"];
             _data.tempLow = forecast[0]["templow"];
         }
     } else {
-        debugLog("[Weather] HA - No forecast data available\n");
+        LOG_I(WEATHER, "[Weather] HA - No forecast data available\n");
     }
     
     if (doc["attributes"].containsKey("wind_speed")) {
@@ -269,11 +270,11 @@ bool Weather::updateFromHomeAssistant() {
     _data.valid = true;
     _lastError = "";
     
-    debugLog("[Weather] HA - SUCCESS: Temp=%.1f%s, Condition=%s, Humidity=%d%%\n", 
-                  _data.temperature, 
-                  _useFahrenheit ? "F" : "C",
-                  _data.condition.c_str(),
-                  _data.humidity);
+    LOG_I(WEATHER, "[Weather] HA - SUCCESS: Temp=%.1f%s, Condition=%s, Humidity=%d%%\n", 
+                        _data.temperature, 
+                        _useFahrenheit ? "F" : "C",
+                        _data.condition.c_str(),
+                        _data.humidity);
     
     return true;
 }
@@ -436,10 +437,10 @@ void Weather::drawWeatherIcon(TFT_eSPI &tft, int x, int y, String condition) {
 }
 
 void Weather::displayOnTFT(TFT_eSPI &tft, int x, int y, bool useFahrenheit) {
-    debugLog("[Weather] displayOnTFT() - called at position (%d, %d), data valid: %d\n", x, y, _data.valid);
+    LOG_D(WEATHER, "[Weather] displayOnTFT() - called at position (%d, %d), data valid: %d\n", x, y, _data.valid);
     
     if (!_data.valid) {
-        debugLog("[Weather] displayOnTFT() - data not valid, skipping display\n");
+        LOG_D(WEATHER, "[Weather] displayOnTFT() - data not valid, skipping display\n");
         return;
     }
     
@@ -459,10 +460,10 @@ void Weather::displayOnTFT(TFT_eSPI &tft, int x, int y, bool useFahrenheit) {
     prevUnitsF = useFahrenheit;
     prevX = x; prevY = y;
 
-    debugLog("[Weather] displayOnTFT() - Redraw: Temp=%.1f%s, Cond=%s\n",
-                  _data.temperature,
-                  useFahrenheit ? "F" : "C",
-                  _data.condition.c_str());
+    LOG_D(WEATHER, "[Weather] displayOnTFT() - Redraw: Temp=%.1f%s, Cond=%s\n",
+                        _data.temperature,
+                        useFahrenheit ? "F" : "C",
+                        _data.condition.c_str());
     
     // Clear the display area (wider to fit temp + icon + hi/lo)
     tft.fillRect(x, y, 160, 40, COLOR_BACKGROUND);
@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+"""
+Open many concurrent live-status clients against a thermostat and report what
+each one costs the device.
+
+Every client is an asyncio connection that either holds the /events
+Server-Sent Events stream open (--mode sse, the web UI default) or polls
+/api/state?live=1 every --poll-interval seconds (--mode poll, the fallback).
+The device's /api/diag history (see diag_monitor.py) is read before the
+clients connect and again at the end; the change in free heap, largest free
+block and async_tcp/loop CPU divided by the client count is the per-client
+cost. Diagnostics are sampled every 30 s, so runs shorter than about a minute
+may not contain a loaded sample.
+
+--stub starts a host-side stand-in for the firmware push path on 127.0.0.1
+instead (keyframe on connect, deltas from a fake sensor, bounded per-client
+queue that drops on overflow) and measures it with tracemalloc and
+process_time - useful for comparing push strategies without hardware.
+
+Usage:
+  python3 sse_loadtest.py thermostat.local
+  python3 sse_loadtest.py --clients 50 --duration 120 thermostat.local
+  python3 sse_loadtest.py --mode poll --clients 20 192.168.1.50
+  python3 sse_loadtest.py --stub --clients 50 --duration 20
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+import tracemalloc
+
+from diag_monitor import decode, fetch
+
+STUB_QUEUE_LIMIT = 8        # Matches -DSSE_MAX_QUEUED_MESSAGES in platformio.ini
+STUB_KEYFRAME_SEC = 60
+
+
+def split_host(host):
+    host = host.replace('http://', '').rstrip('/')
+    if ':' in host:
+        name, port = host.rsplit(':', 1)
+        return name, int(port)
+    return host, 80
+
+
+class ClientStats:
+    def __init__(self):
+        self.connected = False
+        self.events = 0
+        self.keyframes = 0
+        self.deltas = 0
+        self.gaps = 0
+        self.bytes = 0
+        self.requests = 0
+        self.errors = 0
+        self.last_id = None
+
+
+# ============================================================================
+# CLIENTS
+# ============================================================================
+
+async def read_headers(reader):
+    status = await reader.readline()
+    if not status:
+        raise ConnectionError('connection closed')
+    code = int(status.split()[1])
+    headers = {}
+    while True:
+        line = (await reader.readline()).decode('latin-1').strip()
+        if not line:
+            return code, headers
+        key, _, value = line.partition(':')
+        headers[key.strip().lower()] = value.strip()
+
+
+async def sse_client(name, port, stats, stop):
+    reader, writer = await asyncio.open_connection(name, port)
+    try:
+        writer.write(('GET /events HTTP/1.1\r\nHost: %s\r\nAccept: text/event-stream\r\n'
+                      'Cache-Control: no-cache\r\n\r\n' % name).encode())
+        await writer.drain()
+        code, _ = await read_headers(reader)
+        if code != 200:
+            raise ConnectionError('/events returned HTTP %d' % code)
+        stats.connected = True
+        event = {}
+        while not stop.is_set():
+            line = await reader.readline()
+            if not line:
+                raise ConnectionError('stream closed')
+            stats.bytes += len(line)
+            line = line.decode('utf-8', 'replace').rstrip('\r\n')
+            if line:
+                key, _, value = line.partition(':')
+                event[key] = value.lstrip()
+                continue
+            if 'data' in event:
+                stats.events += 1
+                event_id = int(event['id']) if event.get('id', '').isdigit() else None
+                if event.get('event') == 'state':
+                    stats.keyframes += 1
+                elif event.get('event') == 'delta':
+                    stats.deltas += 1
+                    if stats.last_id is not None and event_id != stats.last_id + 1:
+                        stats.gaps += 1
+                stats.last_id = event_id
+            event = {}
+    finally:
+        stats.connected = False
+        writer.close()
+
+
+async def poll_client(name, port, interval, stats, stop):
+    while not stop.is_set():
+        reader, writer = await asyncio.open_connection(name, port)
+        try:
+            writer.write(('GET /api/state?live=1 HTTP/1.1\r\nHost: %s\r\nConnection: close\r\n\r\n'
+                          % name).encode())
+            await writer.drain()
+            code, _ = await read_headers(reader)
+            body = await reader.read()
+            stats.bytes += len(body)
+            stats.requests += 1
+            if code != 200:
+                stats.errors += 1
+        finally:
+            writer.close()
+        try:
+            await asyncio.wait_for(stop.wait(), interval)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def run_client(mode, name, port, args, stats, stop):
+    # Stagger connects so the device is not hit with N simultaneous handshakes
+    await asyncio.sleep(random.uniform(0, args.ramp))
+    while not stop.is_set():
+        try:
+            if mode == 'sse':
+                await sse_client(name, port, stats, stop)
+            else:
+                await poll_client(name, port, args.poll_interval, stats, stop)
+        except (OSError, ConnectionError, ValueError, IndexError):
+            stats.errors += 1
+            await asyncio.sleep(1.0)
+
+
+async def run_clients(name, port, args):
+    stop = asyncio.Event()
+    stats = [ClientStats() for _ in range(args.clients)]
+    tasks = [asyncio.ensure_future(run_client(args.mode, name, port, args, s, stop)) for s in stats]
+    start = time.monotonic()
+    while time.monotonic() - start < args.duration:
+        await asyncio.sleep(1.0)
+        if args.verbose:
+            print('[LOAD] %3.0fs connected %d/%d events %d requests %d errors %d' % (
+                time.monotonic() - start, sum(s.connected for s in stats), len(stats),
+                sum(s.events for s in stats), sum(s.requests for s in stats), sum(s.errors for s in stats)))
+    stop.set()
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return stats, time.monotonic() - start
+
+
+# ============================================================================
+# HOST STUB
+# Same push rules as jobPushState()/events.onConnect in the firmware.
+# ============================================================================
+
+class StubServer:
+    def __init__(self, delta_interval):
+        self.delta_interval = delta_interval
+        self.queues = set()
+        self.seq = 0
+        self.dropped = 0
+        self.state = {
+            'version': 'stub', 'hostname': 'stub',
+            'status': {'temp': 70.0, 'humidity': 45.0, 'unit': 'F', 'mode': 'heat', 'fanMode': 'auto',
+                       'hydronicEnabled': False, 'hydronicTemp': 0.0,
+                       'relays': {'heat1': False, 'heat2': False, 'cool1': False, 'cool2': False, 'fan': False,
+                                  'reversingValve': False, 'stage2Heat': False, 'stage2Cool': False},
+                       'weather': {'valid': False, 'temp': 0.0, 'description': '', 'high': 0, 'low': 0}},
+            'system': {'wifiNetwork': 'stub', 'ip': '127.0.0.1', 'mac': '00:00:00:00:00:00',
+                       'freeHeap': 0, 'uptime': '0m', 'flashMB': 16, 'chip': 'host', 'cpuMHz': 0},
+        }
+
+    @staticmethod
+    def format_event(event, data, event_id):
+        return ('id: %d\nevent: %s\ndata: %s\n\n' % (event_id, event, data)).encode()
+
+    def broadcast(self, message):
+        for queue in self.queues:
+            if queue.qsize() >= STUB_QUEUE_LIMIT:
+                self.dropped += 1
+            else:
+                queue.put_nowait(message)
+
+    async def producer(self):
+        last_keyframe = time.monotonic()
+        while True:
+            await asyncio.sleep(self.delta_interval)
+            if not self.queues:
+                continue
+            if time.monotonic() - last_keyframe >= STUB_KEYFRAME_SEC:
+                self.broadcast(self.format_event('state', json.dumps(self.state, separators=(',', ':')), self.seq))
+                last_keyframe = time.monotonic()
+                continue
+            status = self.state['status']
+            delta = {'temp': round(status['temp'] + random.choice((-0.1, 0.1)), 1)}
+            if random.random() < 0.1:
+                delta['relays'] = {'heat1': not status['relays']['heat1']}
+                status['relays']['heat1'] = delta['relays']['heat1']
+            status['temp'] = delta['temp']
+            self.seq += 1
+            self.broadcast(self.format_event('delta', json.dumps({'status': delta}, separators=(',', ':')), self.seq))
+
+    async def handle(self, reader, writer):
+        try:
+            request = await reader.readline()
+            while (await reader.readline()).strip():
+                pass
+            path = request.split()[1].decode() if request else ''
+            if path.startswith('/api/state'):
+                body = json.dumps(self.state, separators=(',', ':')).encode()
+                writer.write(b'HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n'
+                             b'Content-Length: %d\r\nConnection: close\r\n\r\n' % len(body) + body)
+                await writer.drain()
+                return
+            if path != '/events':
+                writer.write(b'HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\nConnection: close\r\n\r\n')
+                await writer.drain()
+                return
+            writer.write(b'HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nCache-Control: no-cache\r\n\r\n')
+            writer.write(b'retry: 5000\n')
+            writer.write(self.format_event('state', json.dumps(self.state, separators=(',', ':')), self.seq))
+            queue = asyncio.Queue()
+            self.queues.add(queue)
+            try:
+                while True:
+                    writer.write(await queue.get())
+                    await writer.drain()
+            finally:
+                self.queues.discard(queue)
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+
+async def run_stub(args):
+    stub = StubServer(args.stub_delta_interval)
+    server = await asyncio.start_server(stub.handle, '127.0.0.1', 0)
+    port = server.sockets[0].getsockname()[1]
+    producer = asyncio.ensure_future(stub.producer())
+
+    tracemalloc.start()
+    # Baseline: server idle with no clients
+    base_mem = tracemalloc.get_traced_memory()[0]
+    base_cpu = time.process_time()
+    await asyncio.sleep(1.0)
+    idle_cpu = time.process_time() - base_cpu
+
+    stats, elapsed = await run_clients('127.0.0.1', port, args)
+    # Clients share this process, so both figures include the client side and are upper bounds
+    peak_mem = tracemalloc.get_traced_memory()[1]
+    cpu = time.process_time() - base_cpu - idle_cpu
+    tracemalloc.stop()
+
+    producer.cancel()
+    server.close()
+    await server.wait_closed()
+    return stats, elapsed, {
+        'port': port,
+        'peak_bytes': peak_mem - base_mem,
+        'cpu_seconds': cpu,
+        'dropped': stub.dropped,
+        'events_sent': stub.seq,
+    }
+
+
+# ============================================================================
+# DEVICE DIAGNOSTICS
+# ============================================================================
+
+def diag_snapshot(host, timeout):
+    try:
+        interval, samples = decode(fetch(host, timeout))
+        return samples
+    except Exception as e:
+        print('[LOAD] /api/diag unavailable: %s' % e)
+        return []
+
+
+def average(samples, key):
+    values = [key(s) for s in samples]
+    return sum(values) / len(values) if values else 0.0
+
+
+def device_cost(before, after, clients):
+    """Per-client heap and CPU from diagnostics samples taken before and during the run."""
+    if not before or not after:
+        return None
+    baseline = before[-3:]
+    seen = {s['uptime_s'] for s in before}
+    loaded = [s for s in after if s['uptime_s'] not in seen]
+    if not loaded:
+        return None
+    cpu = lambda task: (average(loaded, lambda s: s['cpu'][task]) -
+                        average(baseline, lambda s: s['cpu'][task])) / clients
+    # None when the firmware has no FreeRTOS run-time stats
+    cpu_known = all(s['cpu'][t] is not None for s in baseline + loaded for t in ('async_tcp', 'loop'))
+    return {
+        'samples': len(loaded),
+        'heap_free': (average(baseline, lambda s: s['heap_free']) - average(loaded, lambda s: s['heap_free'])) / clients,
+        'heap_largest': (average(baseline, lambda s: s['heap_largest']) -
+                         average(loaded, lambda s: s['heap_largest'])) / clients,
+        'heap_min_free': min(s['heap_min_free'] for s in loaded),
+        'cpu_async_tcp': cpu('async_tcp') if cpu_known else None,
+        'cpu_loop': cpu('loop') if cpu_known else None,
+    }
+
+
+def print_clients(stats, elapsed, mode):
+    connected = sum(1 for s in stats if s.events or s.requests)
+    total_bytes = sum(s.bytes for s in stats)
+    print('\n%d/%d clients received data over %.0fs (%s)' % (connected, len(stats), elapsed, mode))
+    if mode == 'sse':
+        print('  events      %d (%d keyframes, %d deltas)' % (
+            sum(s.events for s in stats), sum(s.keyframes for s in stats), sum(s.deltas for s in stats)))
+        print('  id gaps     %d (messages dropped by the bounded queue)' % sum(s.gaps for s in stats))
+    else:
+        print('  requests    %d' % sum(s.requests for s in stats))
+    print('  bytes       %d total, %.1f B/s per client' % (total_bytes, total_bytes / elapsed / len(stats)))
+    print('  errors      %d' % sum(s.errors for s in stats))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Concurrent SSE/polling load generator for the thermostat web UI')
+    parser.add_argument('host', nargs='?', help='Device hostname/IP (optionally host:port)')
+    parser.add_argument('--clients', type=int, default=50, help='Concurrent clients (default 50)')
+    parser.add_argument('--duration', type=float, default=90.0, help='Seconds to hold the load (default 90)')
+    parser.add_argument('--mode', choices=('sse', 'poll'), default='sse', help='Client behaviour (default sse)')
+    parser.add_argument('--poll-interval', type=float, default=10.0, help='Seconds between polls in poll mode')
+    parser.add_argument('--ramp', type=float, default=5.0, help='Spread client connects over this many seconds')
+    parser.add_argument('--timeout', type=float, default=10.0, help='HTTP timeout for /api/diag')
+    parser.add_argument('--stub', action='store_true', help='Run against an in-process host stub instead of a device')
+    parser.add_argument('--stub-delta-interval', type=float, default=0.25,
+                        help='Seconds between stub delta events (default 0.25, the push job period)')
+    parser.add_argument('-v', '--verbose', action='store_true', help='Print progress every second')
+    args = parser.parse_args()
+
+    if args.clients < 1:
+        parser.error('--clients must be at least 1')
+
+    if args.stub:
+        stats, elapsed, stub = asyncio.run(run_stub(args))
+        print_clients(stats, elapsed, args.mode)
+        print('\nStub on 127.0.0.1:%d: %d delta events, %d dropped on full queues' % (
+            stub['port'], stub['events_sent'], stub['dropped']))
+        print('  peak heap   %d bytes, %.0f bytes per client' % (stub['peak_bytes'], stub['peak_bytes'] / args.clients))
+        print('  CPU         %.2fs process time, %.2f ms per client-second' % (
+            stub['cpu_seconds'], stub['cpu_seconds'] * 1000.0 / args.clients / elapsed))
+        return 0
+
+    if not args.host:
+        parser.error('host is required unless --stub is given')
+    name, port = split_host(args.host)
+
+    before = diag_snapshot(args.host, args.timeout)
+    stats, elapsed = asyncio.run(run_clients(name, port, args))
+    after = diag_snapshot(args.host, args.timeout)
+    print_clients(stats, elapsed, args.mode)
+
+    cost = device_cost(before, after, args.clients)
+    if cost is None:
+        print('\nNo diagnostics sample taken under load - run for at least 60s')
+        return 1
+    print('\nDevice cost per client (%d loaded samples):' % cost['samples'])
+    print('  free heap      %8.0f bytes' % cost['heap_free'])
+    print('  largest block  %8.0f bytes' % cost['heap_largest'])
+    for name, key in (('async_tcp CPU', 'cpu_async_tcp'), ('loop CPU', 'cpu_loop')):
+        if cost[key] is None:
+            print('  %-14s      n/a (no run-time stats in this build)' % name)
+        else:
+            print('  %-14s %8.2f %% of one core' % (name, cost[key]))
+    print('  heap low-water %8d bytes during run' % cost['heap_min_free'])
+    return 0 if all(s.errors == 0 for s in stats) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
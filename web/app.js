@@ -0,0 +1,652 @@
+let currentTab = 'status';
+let updateInterval;
+let eventSource = null;
+let liveState = null;
+let eventSeq = 0;
+
+const DAY_NAMES = ['Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday'];
+
+function showTab(tabName) {
+    // Hide all tab contents
+    const contents = document.querySelectorAll('.tab-content');
+    contents.forEach(content => {
+        content.classList.remove('active');
+        content.classList.remove('fade-in');
+    });
+
+    // Remove active class from all tabs
+    const tabs = document.querySelectorAll('.nav-tab');
+    tabs.forEach(tab => tab.classList.remove('active'));
+
+    // Show selected tab content
+    const selectedContent = document.getElementById(tabName + '-content');
+    if (selectedContent) {
+        selectedContent.classList.add('active');
+        selectedContent.classList.add('fade-in');
+    }
+
+    // Add active class to selected tab
+    const selectedTab = document.querySelector('.nav-tab[data-tab="' + tabName + '"]');
+    if (selectedTab) {
+        selectedTab.classList.add('active');
+    }
+
+    currentTab = tabName;
+
+    // Handle auto-refresh for status tab
+    if (tabName === 'status') {
+        refreshStatus();
+        startAutoRefresh();
+    } else {
+        stopAutoRefresh();
+    }
+}
+
+// Live status arrives over Server-Sent Events (/events): a full "state" event on
+// connect and every minute, "delta" events with just the changed fields in
+// between. Event ids are sequential, so a gap means the device dropped a message
+// for this client and we fetch the full live state instead. Browsers without
+// EventSource, or a stream the device refused, fall back to 10 second polling.
+function startAutoRefresh() {
+    stopAutoRefresh();
+    if (!window.EventSource) {
+        startPolling();
+        return;
+    }
+    eventSource = new EventSource('/events');
+    eventSource.addEventListener('state', event => {
+        liveState = JSON.parse(event.data);
+        eventSeq = parseInt(event.lastEventId, 10) || 0;
+        applyStatus(liveState);
+    });
+    eventSource.addEventListener('delta', event => {
+        const seq = parseInt(event.lastEventId, 10);
+        if (!liveState || seq !== eventSeq + 1) {
+            eventSeq = seq;
+            refreshStatus();
+            return;
+        }
+        eventSeq = seq;
+        mergeState(liveState, JSON.parse(event.data));
+        applyStatus(liveState);
+    });
+    eventSource.onerror = () => {
+        // The browser reconnects on its own (and gets a fresh keyframe) unless the stream was closed for good
+        if (eventSource.readyState === EventSource.CLOSED) {
+            eventSource = null;
+            startPolling();
+        }
+    };
+}
+
+function startPolling() {
+    updateInterval = setInterval(() => {
+        if (currentTab === 'status') {
+            refreshStatus();
+        }
+    }, 10000);
+}
+
+function stopAutoRefresh() {
+    if (eventSource) {
+        eventSource.close();
+        eventSource = null;
+    }
+    if (updateInterval) {
+        clearInterval(updateInterval);
+        updateInterval = null;
+    }
+}
+
+function mergeState(target, delta) {
+    Object.keys(delta).forEach(key => {
+        if (delta[key] !== null && typeof delta[key] === 'object' && typeof target[key] === 'object') {
+            mergeState(target[key], delta[key]);
+        } else {
+            target[key] = delta[key];
+        }
+    });
+}
+
+// ============================================================================
+// STATE BINDING
+// The page itself is a static (gzipped, cached) document; every device value
+// comes from /api/state. ?live=1 (and the /events stream) carry only the status
+// and system values so live updates never touch forms the user may be editing.
+// ============================================================================
+
+function bind(name, value) {
+    document.querySelectorAll('[data-bind="' + name + '"]').forEach(el => {
+        el.textContent = value;
+    });
+}
+
+function fillForm(form, values) {
+    if (!form) return;
+    Object.keys(values).forEach(name => {
+        const field = form.elements[name];
+        if (!field) return;
+        if (field.type === 'checkbox') {
+            field.checked = !!values[name];
+        } else {
+            field.value = values[name];
+        }
+    });
+}
+
+function relayRow(label, on, onText, offText) {
+    return "<div class='relay-status" + (on ? " active" : "") + "'>" +
+        "<span>" + label + "</span><span class='status-indicator " + (on ? "status-on" : "status-off") + "'>" +
+        (on ? onText : offText) + "</span></div>";
+}
+
+function applyStatus(state) {
+    const status = state.status;
+    bind('version', state.version);
+    bind('hostname', state.hostname);
+    bind('unit', status.unit);
+    bind('temp', status.temp.toFixed(1));
+    bind('humidity', status.humidity.toFixed(1));
+    bind('mode', status.mode);
+    bind('fanMode', status.fanMode);
+
+    const indicator = document.getElementById('mode-indicator');
+    indicator.className = 'status-indicator ' +
+        (status.mode === 'off' ? 'status-off' : status.mode === 'auto' ? 'status-auto' : 'status-on');
+
+    document.getElementById('hydronic-card').style.display = status.hydronicEnabled ? 'block' : 'none';
+    bind('hydronicTemp', status.hydronicTemp.toFixed(1));
+
+    const weather = status.weather;
+    document.getElementById('weather-card').style.display = weather.valid ? 'block' : 'none';
+    if (weather.valid) {
+        bind('weatherTemp', weather.temp.toFixed(1));
+        bind('weatherDescription', weather.description);
+        bind('weatherHigh', weather.high.toFixed(0));
+        bind('weatherLow', weather.low.toFixed(0));
+        document.getElementById('weather-range').style.display = (weather.high !== 0 || weather.low !== 0) ? 'block' : 'none';
+    }
+
+    // Heat Stage 2 OR Reversing Valve based on configuration; Cool Stage 2 only if enabled
+    const relays = status.relays;
+    let html = relayRow('Heat Stage 1', relays.heat1, 'ON', 'OFF');
+    if (relays.reversingValve) {
+        html += relayRow('Reversing Valve', relays.heat2, 'HEAT', 'COOL');
+    } else if (relays.stage2Heat) {
+        html += relayRow('Heat Stage 2', relays.heat2, 'ON', 'OFF');
+    }
+    html += relayRow('Cool Stage 1', relays.cool1, 'ON', 'OFF');
+    if (relays.stage2Cool) {
+        html += relayRow('Cool Stage 2', relays.cool2, 'ON', 'OFF');
+    }
+    html += relayRow('Fan', relays.fan, 'ON', 'OFF');
+    document.getElementById('relay-list').innerHTML = html;
+
+    const system = state.system;
+    bind('wifiNetwork', system.wifiNetwork);
+    bind('ip', system.ip);
+    bind('mac', system.mac);
+    bind('freeHeap', system.freeHeap);
+    bind('uptime', system.uptime);
+    bind('flashMB', system.flashMB);
+    bind('chip', system.chip);
+    bind('cpuMHz', system.cpuMHz);
+}
+
+function periodInputs(prefix, period, disabled) {
+    const off = disabled ? ' disabled' : '';
+    return "<div class='schedule-cell'><input type='time' name='" + prefix + "_time' value='" + period.time +
+        "' class='form-input time-input'" + off + "></div>" +
+        "<div class='schedule-cell'><div class='temp-inputs'>" +
+        "<label class='temp-label'>Heat:</label><input type='number' name='" + prefix + "_heat' value='" + period.heat.toFixed(1) +
+        "' step='0.5' min='40' max='90' class='form-input temp-input'" + off + ">" +
+        "<label class='temp-label'>Cool:</label><input type='number' name='" + prefix + "_cool' value='" + period.cool.toFixed(1) +
+        "' step='0.5' min='50' max='95' class='form-input temp-input'" + off + ">" +
+        "<label class='temp-label'>Auto:</label><input type='number' name='" + prefix + "_auto' value='" + period.auto.toFixed(1) +
+        "' step='0.5' min='45' max='90' class='form-input temp-input'" + off + ">" +
+        "</div></div>";
+}
+
+function applySchedule(schedule) {
+    const form = document.getElementById('schedule-form');
+    form.elements['scheduleEnabled'].checked = schedule.enabled;
+    form.elements['scheduleOverride'].value = schedule.override ? 'temporary' : 'resume';
+
+    let statusText = 'Schedule Disabled';
+    if (schedule.enabled) {
+        statusText = 'Schedule Active - ' + schedule.activePeriod + (schedule.override ? ' (Override Active)' : '');
+    }
+    bind('scheduleStatus', statusText);
+
+    const table = document.getElementById('schedule-table');
+    table.querySelectorAll('.schedule-row:not(.schedule-header)').forEach(row => row.remove());
+    schedule.days.forEach((day, index) => {
+        const prefix = 'day' + index + '_';
+        const row = document.createElement('div');
+        row.className = 'schedule-row';
+        row.innerHTML = "<div class='schedule-cell'><strong>" + DAY_NAMES[index] + "</strong></div>" +
+            "<div class='schedule-cell'><label class='toggle-switch small'><input type='checkbox' name='" + prefix + "enabled'" +
+            (day.enabled ? " checked" : "") + "><span class='toggle-slider'></span></label></div>" +
+            periodInputs(prefix + 'day', day.day, !day.enabled) +
+            periodInputs(prefix + 'night', day.night, !day.enabled);
+        // Enabling a day makes its inputs editable right away
+        row.querySelector("input[type='checkbox']").addEventListener('change', function() {
+            const enabled = this.checked;
+            row.querySelectorAll('.form-input').forEach(input => input.disabled = !enabled);
+        });
+        table.appendChild(row);
+    });
+}
+
+function applyState(state) {
+    applyStatus(state);
+    fillForm(document.getElementById('settings-form'), state.settings);
+    fillForm(document.getElementById('weather-form'), state.settings);
+    updateWeatherFields(String(state.settings.weatherSource));
+    applySchedule(state.schedule);
+}
+
+function loadState() {
+    return fetch('/api/state', {cache: 'no-store'})
+        .then(response => response.json())
+        .then(applyState)
+        .catch(error => showAlert('Error loading thermostat state: ' + error.message, 'error'));
+}
+
+function refreshStatus() {
+    fetch('/api/state?live=1', {cache: 'no-store'})
+        .then(response => response.json())
+        .then(state => {
+            liveState = state;
+            applyStatus(state);
+        })
+        .catch(() => {});
+}
+
+function confirmAction(actionName, actionUrl) {
+    if (confirm("Are you sure you want to " + actionName + "?")) {
+        window.location.href = actionUrl;
+    }
+}
+
+function showAlert(message, type) {
+    if (typeof type === 'undefined') type = 'success';
+    const alertDiv = document.createElement('div');
+    alertDiv.className = 'alert alert-' + type;
+    alertDiv.textContent = message;
+
+    const container = document.querySelector('.container');
+    container.insertBefore(alertDiv, container.firstChild);
+
+    setTimeout(() => {
+        alertDiv.remove();
+    }, 5000);
+}
+
+function handleSettingsSubmit(event) {
+    event.preventDefault();
+
+    const form = event.target;
+    const formData = new FormData(form);
+    const submitBtn = form.querySelector('input[type="submit"]');
+
+    // Show loading state
+    const originalValue = submitBtn.value;
+    submitBtn.value = 'Saving...';
+    submitBtn.disabled = true;
+
+    fetch('/set', {
+        method: 'POST',
+        body: formData
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.status === 'success') {
+            showAlert(data.message, 'success');
+            // Reload the values the device actually stored
+            setTimeout(loadState, 2000);
+        } else {
+            showAlert('Error saving settings: ' + (data.message || 'Unknown error'), 'error');
+        }
+    })
+    .catch(error => {
+        showAlert('Error saving settings: ' + error.message, 'error');
+    })
+    .finally(() => {
+        // Restore button state
+        submitBtn.value = originalValue;
+        submitBtn.disabled = false;
+    });
+
+    return false;
+}
+
+function handleScheduleSubmit(event) {
+    event.preventDefault();
+
+    const form = event.target;
+    const formData = new FormData(form);
+    const submitBtn = form.querySelector('button[type="submit"]');
+    const statusDiv = document.getElementById('schedule-status');
+
+    // Show loading state
+    const originalText = submitBtn.textContent;
+    submitBtn.textContent = 'Saving...';
+    submitBtn.disabled = true;
+
+    fetch('/schedule_set', {
+        method: 'POST',
+        body: formData
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.status === 'success') {
+            statusDiv.style.display = 'block';
+            statusDiv.style.backgroundColor = '#E8F5E9';
+            statusDiv.style.color = '#2E7D32';
+            statusDiv.textContent = '✓ ' + data.message;
+            setTimeout(() => {
+                statusDiv.style.display = 'none';
+            }, 5000);
+        } else {
+            statusDiv.style.display = 'block';
+            statusDiv.style.backgroundColor = '#FFEBEE';
+            statusDiv.style.color = '#C62828';
+            statusDiv.textContent = '✗ Error: ' + (data.message || 'Unknown error');
+        }
+    })
+    .catch(error => {
+        statusDiv.style.display = 'block';
+        statusDiv.style.backgroundColor = '#FFEBEE';
+        statusDiv.style.color = '#C62828';
+        statusDiv.textContent = '✗ Error saving schedule: ' + error.message;
+    })
+    .finally(() => {
+        // Restore button state
+        submitBtn.textContent = originalText;
+        submitBtn.disabled = false;
+    });
+
+    return false;
+}
+
+// Initialize the interface when page loads
+document.addEventListener('DOMContentLoaded', function() {
+    // Check URL parameters (or the legacy /settings path) for tab switching
+    const urlParams = new URLSearchParams(window.location.search);
+    let tabParam = urlParams.get('tab');
+    if (!tabParam && window.location.pathname === '/settings') tabParam = 'settings';
+    const initialTab = tabParam && ['status', 'settings', 'schedule', 'weather', 'system'].includes(tabParam) ? tabParam : 'status';
+
+    loadState().then(() => showTab(initialTab));
+    initOtaUpload();
+});
+
+// Weather source toggle function
+function updateWeatherFields(source) {
+    const owmSettings = document.getElementById('owm-settings');
+    const haSettings = document.getElementById('ha-settings');
+
+    if (source == '1') {
+        owmSettings.style.display = 'block';
+        haSettings.style.display = 'none';
+    } else if (source == '2') {
+        owmSettings.style.display = 'none';
+        haSettings.style.display = 'block';
+    } else {
+        owmSettings.style.display = 'none';
+        haSettings.style.display = 'none';
+    }
+}
+
+// Handle weather form submission
+document.addEventListener('DOMContentLoaded', function() {
+    const weatherForm = document.getElementById('weather-form');
+    if (weatherForm) {
+        weatherForm.addEventListener('submit', function(e) {
+            e.preventDefault();
+
+            // Get form data
+            const formData = new FormData(weatherForm);
+
+            // Convert to URL encoded string
+            const params = new URLSearchParams(formData).toString();
+
+            // Send AJAX request
+            fetch('/set', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/x-www-form-urlencoded',
+                },
+                body: params
+            })
+            .then(response => response.json())
+            .then(data => {
+                // Show success message
+                alert('Weather settings saved successfully!');
+            })
+            .catch(error => {
+                console.error('Error:', error);
+                alert('Failed to save weather settings');
+            });
+        });
+    }
+});
+
+// Force weather update
+function forceWeatherUpdate() {
+    fetch('/weather_refresh', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        }
+    })
+    .then(response => response.text())
+    .then(data => {
+        alert('Weather update triggered! Checking for new data...');
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        alert('Failed to trigger weather update');
+    });
+}
+
+// Handle page visibility for auto-refresh
+document.addEventListener('visibilitychange', function() {
+    if (document.hidden) {
+        stopAutoRefresh();
+    } else if (currentTab === 'status') {
+        startAutoRefresh();
+    }
+});
+
+// Mutual exclusion for stage 2 heating and reversing valve
+document.addEventListener('DOMContentLoaded', function() {
+    const stage2Heat = document.getElementById('stage2HeatingEnabled');
+    const revValve = document.getElementById('reversingValveEnabled');
+
+    if (stage2Heat && revValve) {
+        stage2Heat.addEventListener('change', function() {
+            if (this.checked && revValve.checked) {
+                revValve.checked = false;
+            }
+        });
+
+        revValve.addEventListener('change', function() {
+            if (this.checked && stage2Heat.checked) {
+                stage2Heat.checked = false;
+            }
+        });
+    }
+});
+
+// ============================================================================
+// SYSTEM TAB - firmware upload and reboot
+// ============================================================================
+
+function waitForVersion(setStatus, eta) {
+    setTimeout(() => {
+        const begin = Date.now();
+        const iv = setInterval(() => {
+            fetch('/version').then(r => r.json()).then(j => {
+                setStatus(true, '✓ Update successful! Version ' + j.version);
+                eta.textContent = 'Device ready.';
+                clearInterval(iv);
+            }).catch(() => {
+                if (Date.now() - begin > 70000) {
+                    setStatus(false, 'Device did not return in 70s');
+                    eta.textContent = 'Timeout.';
+                    clearInterval(iv);
+                }
+            });
+        }, 2500);
+    }, 3000);
+}
+
+function initOtaUpload() {
+    const file = document.getElementById('otaFile');
+    const btn = document.getElementById('otaStart');
+    const prog = document.getElementById('otaProgress');
+    const bar = document.getElementById('otaBar');
+    const eta = document.getElementById('otaEta');
+    const status = document.getElementById('otaStatus');
+    if (!file || !btn) return;
+    let poll = null;
+
+    function setStatus(ok, msg) {
+        status.style.display = 'block';
+        status.style.background = ok ? '#1b5e20' : '#b71c1c';
+        status.style.color = '#fff';
+        status.textContent = msg;
+    }
+    function human(ms) {
+        if (ms < 1000) return ms + ' ms';
+        let s = ms / 1000;
+        if (s < 60) return s.toFixed(1) + ' s';
+        let m = s / 60;
+        return m.toFixed(1) + ' m';
+    }
+    function stopPoll() {
+        if (poll) { clearInterval(poll); poll = null; }
+    }
+    function flashComplete() {
+        setStatus(true, 'Flash complete. Device rebooting...');
+        bar.style.width = '100%';
+        bar.textContent = '100%';
+        eta.textContent = 'Waiting for reboot and startup (up to 15s)...';
+        stopPoll();
+        waitForVersion(setStatus, eta);
+    }
+
+    btn.addEventListener('click', () => {
+        if (!file.files.length) { alert('Select a .bin file'); return; }
+        const f = file.files[0];
+        if (!f.name.endsWith('.bin')) { alert('Select a .bin file'); return; }
+        btn.disabled = true;
+        prog.style.display = 'block';
+        status.style.display = 'none';
+        eta.textContent = 'Starting...';
+        bar.textContent = '0%';
+        bar.style.width = '0%';
+        let started = Date.now();
+        let fallbackStarted = false;
+        let lastPct = 0;
+
+        // Some browsers never report upload progress - fall back to polling the flash writer
+        const fallbackTimer = setTimeout(() => {
+            if (bar.style.width === '0%' && !fallbackStarted) {
+                fallbackStarted = true;
+                eta.textContent = 'Upload complete, writing to flash...';
+                poll = setInterval(() => {
+                    fetch('/update_status').then(r => r.json()).then(j => {
+                        if (j.state === 'writing' && j.total > 0) {
+                            let pct = Math.round((j.bytes / j.total) * 100);
+                            if (pct > 100) pct = 100;
+                            if (pct > lastPct) {
+                                bar.style.width = pct + '%';
+                                bar.textContent = pct + '%';
+                                lastPct = pct;
+                                eta.textContent = 'Writing firmware to flash: ' + pct + '%';
+                            }
+                        } else if (j.state === 'rebooting') {
+                            setStatus(true, 'Firmware written. Rebooting...');
+                            eta.textContent = 'Waiting for restart...';
+                            stopPoll();
+                        }
+                    }).catch(() => {});
+                }, 800);
+            }
+        }, 2500);
+
+        const xhr = new XMLHttpRequest();
+        xhr.open('POST', '/update');
+        const fd = new FormData();
+        fd.append('firmware', f);
+        xhr.upload.onprogress = (e) => {
+            if (e.lengthComputable) {
+                const p = Math.round(e.loaded / e.total * 100);
+                bar.style.width = p + '%';
+                bar.textContent = p + '%';
+                const elapsed = Date.now() - started;
+                const rate = e.loaded / (elapsed / 1000);
+                if (rate > 0) {
+                    const remain = (e.total - e.loaded) / rate * 1000;
+                    eta.textContent = 'Uploading: ' + human(remain) + ' remaining';
+                }
+                if (p >= 99) {
+                    eta.textContent = 'Upload complete, writing to flash...';
+                }
+                if (p > 0) stopPoll();
+            }
+        };
+        xhr.onload = () => {
+            clearTimeout(fallbackTimer);
+            if (xhr.status == 200) {
+                flashComplete();
+            } else {
+                setStatus(false, 'Update failed: ' + xhr.responseText);
+                eta.textContent = 'Error.';
+                btn.disabled = false;
+                stopPoll();
+            }
+        };
+        // The device may drop the connection while it restarts
+        xhr.onerror = () => {
+            clearTimeout(fallbackTimer);
+            flashComplete();
+        };
+        xhr.send(fd);
+    });
+}
+
+function rebootDevice() {
+    if (!confirm('Are you sure you want to reboot the device?')) return;
+    var status = document.getElementById('reboot-status');
+    status.style.display = 'block';
+    status.style.backgroundColor = '#FFF3E0';
+    status.style.color = '#E65100';
+    status.innerHTML = '🔄 Rebooting device... Please wait.';
+    fetch('/reboot', {method: 'POST'}).then(function(r) {return r.json();}).catch(function(e) {});
+    setTimeout(function() {
+        status.innerHTML = '⏳ Waiting for device to restart...';
+        var startTime = Date.now();
+        var checkInterval = setInterval(function() {
+            fetch('/version').then(function(r) {
+                if (r.ok) {
+                    clearInterval(checkInterval);
+                    status.style.backgroundColor = '#E8F5E9';
+                    status.style.color = '#2E7D32';
+                    status.innerHTML = '✅ Device restarted successfully!';
+                    setTimeout(function() { location.reload(); }, 2000);
+                }
+            }).catch(function() {
+                if (Date.now() - startTime > 60000) {
+                    clearInterval(checkInterval);
+                    status.style.backgroundColor = '#FFEBEE';
+                    status.style.color = '#C62828';
+                    status.innerHTML = '⚠️ Timeout - please refresh page manually';
+                }
+            });
+        }, 2000);
+    }, 3000);
+}
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Build the web interface into gzipped PROGMEM arrays (include/WebAssets.h).
+
+The pages live as plain files in web/ (index.html, reset.html, app.css,
+app.js and icons/*.svg). At build time they are:
+  1. Expanded - <!--#icon name--> inlines web/icons/name.svg, {{NAME}} is
+     replaced by the matching #define string from include/HardwarePins.h and
+     {{app.css}} / {{app.js}} by that asset's ETag (cache-busting query)
+  2. Minified - comments and indentation removed from HTML, CSS and JS
+  3. Gzipped (level 9, mtime 0 so the output is reproducible)
+  4. Written as byte arrays with a strong ETag (SHA-256 of the gzip data)
+
+The firmware serves them with Content-Encoding: gzip, ETag and
+Cache-Control and answers If-None-Match with 304. CSS/JS are immutable
+(versioned URLs); the HTML pages revalidate on every load. Everything
+dynamic comes from /api/state as JSON.
+
+Runs automatically as a PlatformIO pre-build script (extra_scripts in
+platformio.ini); the header is only rewritten when its content changes so
+unchanged pages do not trigger a recompile.
+
+Usage:
+  python3 web_assets.py            # regenerate include/WebAssets.h and print sizes
+  python3 web_assets.py --check    # exit 1 if include/WebAssets.h is stale
+"""
+
+import argparse
+import gzip
+import hashlib
+import os
+import re
+import sys
+import tempfile
+
+WEB_DIR = 'web'
+OUTPUT = os.path.join('include', 'WebAssets.h')
+DEFINES_HEADER = os.path.join('include', 'HardwarePins.h')
+
+CACHE_IMMUTABLE = 'public, max-age=31536000, immutable'
+CACHE_REVALIDATE = 'no-cache'
+
+# (source file, URL, content type, Cache-Control) - CSS/JS first so pages can reference their ETags
+ASSETS = [
+    ('app.css', '/app.css', 'text/css', CACHE_IMMUTABLE),
+    ('app.js', '/app.js', 'application/javascript', CACHE_IMMUTABLE),
+    ('index.html', '/', 'text/html', CACHE_REVALIDATE),
+    ('reset.html', '/confirm_restore', 'text/html', CACHE_REVALIDATE),
+]
+
+
+# ============================================================================
+# MINIFIERS
+# Conservative on purpose: quoted strings are copied untouched and JS keeps
+# its line breaks so automatic semicolon insertion still works.
+# ============================================================================
+
+def split_strings(text, quotes):
+    """Yield (is_string, chunk) pieces; string chunks include their quotes."""
+    i = 0
+    start = 0
+    n = len(text)
+    while i < n:
+        c = text[i]
+        if c in quotes:
+            if start < i:
+                yield False, text[start:i]
+            j = i + 1
+            while j < n and text[j] != c:
+                j += 2 if text[j] == '\\' else 1
+            yield True, text[i:j + 1]
+            i = start = j + 1
+        else:
+            i += 1
+    if start < n:
+        yield False, text[start:]
+
+
+def minify_css(css):
+    out = []
+    for is_string, chunk in split_strings(re.sub(r'/\*.*?\*/', '', css, flags=re.S), '"\''):
+        if is_string:
+            out.append(chunk)
+            continue
+        chunk = re.sub(r'\s+', ' ', chunk)
+        chunk = re.sub(r'\s*([{};,>])\s*', r'\1', chunk)
+        chunk = re.sub(r':\s+', ':', chunk)
+        out.append(chunk)
+    return ''.join(out).replace(';}', '}').strip()
+
+
+def strip_js_comments(js):
+    out = []
+    i = 0
+    n = len(js)
+    while i < n:
+        c = js[i]
+        if c in '"\'`':
+            j = i + 1
+            while j < n and js[j] != c:
+                j += 2 if js[j] == '\\' else 1
+            out.append(js[i:j + 1])
+            i = j + 1
+        elif js.startswith('//', i):
+            while i < n and js[i] != '\n':
+                i += 1
+        elif js.startswith('/*', i):
+            end = js.find('*/', i + 2)
+            i = n if end < 0 else end + 2
+        else:
+            out.append(c)
+            i += 1
+    return ''.join(out)
+
+
+def minify_js(js):
+    lines = (line.strip() for line in strip_js_comments(js).split('\n'))
+    return '\n'.join(line for line in lines if line)
+
+
+def minify_html(html):
+    html = re.sub(r'<!--(?!#).*?-->', '', html, flags=re.S)
+    html = re.sub(r'(<style[^>]*>)(.*?)(</style>)',
+                  lambda m: m.group(1) + minify_css(m.group(2)) + m.group(3), html, flags=re.S)
+    html = re.sub(r'(<script[^>]*>)(.*?)(</script>)',
+                  lambda m: m.group(1) + minify_js(m.group(2)) + m.group(3), html, flags=re.S)
+    # Whitespace containing a line break is indentation; same-line spaces are content
+    html = re.sub(r'>\s*\n\s*<', '><', html)
+    html = re.sub(r'\s*\n\s*', ' ', html)
+    return html.strip()
+
+
+MINIFIERS = {'.css': minify_css, '.js': minify_js, '.html': minify_html}
+
+
+# ============================================================================
+# BUILD
+# ============================================================================
+
+def read_defines(path):
+    with open(path, encoding='utf-8') as f:
+        return dict(re.findall(r'^#define\s+(\w+)\s+"([^"]*)"', f.read(), re.M))
+
+
+def expand(text, web_dir, defines, etags):
+    def icon(match):
+        with open(os.path.join(web_dir, 'icons', match.group(1) + '.svg'), encoding='utf-8') as f:
+            return f.read().strip()
+
+    def placeholder(match):
+        key = match.group(1)
+        if key in etags:
+            return etags[key]
+        if key in defines:
+            return defines[key]
+        raise KeyError('unknown placeholder {{%s}}' % key)
+
+    text = re.sub(r'<!--#icon\s+([\w-]+)\s*-->', icon, text)
+    return re.sub(r'\{\{([\w.]+)\}\}', placeholder, text)
+
+
+def build_assets(project_dir):
+    """Return [(source, url, type, cache, raw_size, minified_size, gz_bytes, etag)]."""
+    web_dir = os.path.join(project_dir, WEB_DIR)
+    defines = read_defines(os.path.join(project_dir, DEFINES_HEADER))
+    etags = {}
+    built = []
+    for source, url, content_type, cache in ASSETS:
+        with open(os.path.join(web_dir, source), encoding='utf-8') as f:
+            text = expand(f.read(), web_dir, defines, etags)
+        minified = MINIFIERS[os.path.splitext(source)[1]](text).encode('utf-8')
+        data = gzip.compress(minified, 9, mtime=0)
+        etag = hashlib.sha256(data).hexdigest()[:16]
+        etags[source] = etag
+        built.append((source, url, content_type, cache, len(text.encode('utf-8')), len(minified), data, etag))
+    return built
+
+
+def c_name(source):
+    return 'WEB_ASSET_' + re.sub(r'\W', '_', source).upper()
+
+
+def render_header(built):
+    lines = [
+        '/*',
+        ' * WebAssets.h - Gzipped web interface (generated by web_assets.py from web/ - do not edit)',
+        ' */',
+        '',
+        '#ifndef WEB_ASSETS_H',
+        '#define WEB_ASSETS_H',
+        '',
+        '#include <Arduino.h>',
+        '',
+        'struct WebAsset {',
+        '    const char* path;           // URL the asset is served at',
+        '    const char* contentType;',
+        '    const char* cacheControl;',
+        '    const char* etag;           // Strong ETag, quoted',
+        '    const uint8_t* data;        // Gzip data in flash',
+        '    size_t length;',
+        '};',
+        '',
+    ]
+    for source, _, _, _, raw, minified, data, etag in built:
+        lines.append('// %s: %d bytes -> %d minified -> %d gzip' % (source, raw, minified, len(data)))
+        lines.append('static const uint8_t %s[] PROGMEM = {' % c_name(source))
+        for offset in range(0, len(data), 20):
+            lines.append('    ' + ','.join('0x%02x' % b for b in data[offset:offset + 20]) + ',')
+        lines.append('};')
+        lines.append('')
+    lines.append('static const WebAsset WEB_ASSETS[] = {')
+    for source, url, content_type, cache, _, _, data, etag in built:
+        lines.append('    {"%s", "%s", "%s", "\\"%s\\"", %s, %d},' % (
+            url, content_type, cache, etag, c_name(source), len(data)))
+    lines.append('};')
+    lines.append('')
+    lines.append('#define WEB_ASSET_COUNT (sizeof(WEB_ASSETS) / sizeof(WEB_ASSETS[0]))')
+    lines += [
+        '',
+        'static inline const WebAsset* findWebAsset(const char* path) {',
+        '    for (size_t i = 0; i < WEB_ASSET_COUNT; i++) {',
+        '        if (strcmp(WEB_ASSETS[i].path, path) == 0) return &WEB_ASSETS[i];',
+        '    }',
+        '    return NULL;',
+        '}',
+        '',
+    ]
+    lines.append('#endif // WEB_ASSETS_H')
+    return '\n'.join(lines) + '\n'
+
+
+def write_if_changed(path, content):
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            if f.read() == content:
+                return False
+    # Write a temp file and rename it over the header, so a parallel build (build_orchestrator.py)
+    # compiling against it never sees an empty or half-written file
+    fd, temp = tempfile.mkstemp(prefix='.WebAssets.', suffix='.tmp', dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.chmod(temp, 0o644)   # mkstemp creates it 0600
+        os.replace(temp, path)
+    except BaseException:
+        os.unlink(temp)
+        raise
+    return True
+
+
+def print_report(built):
+    print('%-12s %-18s %8s %8s %8s %6s' % ('ASSET', 'URL', 'SOURCE', 'MINIFIED', 'GZIP', 'RATIO'))
+    total_raw = total_gz = 0
+    for source, url, _, _, raw, minified, data, _ in built:
+        print('%-12s %-18s %8d %8d %8d %5.1fx' % (source, url, raw, minified, len(data), raw / len(data)))
+        total_raw += raw
+        total_gz += len(data)
+    print('%-12s %-18s %8d %8s %8d %5.1fx' % ('total', '', total_raw, '', total_gz, total_raw / total_gz))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Minify and gzip web/ into include/WebAssets.h')
+    parser.add_argument('--project-dir', default=os.path.dirname(os.path.abspath(__file__)))
+    parser.add_argument('--check', action='store_true', help='Only check that the header is up to date')
+    args = parser.parse_args()
+
+    built = build_assets(args.project_dir)
+    output = os.path.join(args.project_dir, OUTPUT)
+    content = render_header(built)
+    if args.check:
+        current = open(output, encoding='utf-8').read() if os.path.exists(output) else ''
+        if current != content:
+            print('%s is stale - run web_assets.py' % OUTPUT)
+            return 1
+        return 0
+    changed = write_if_changed(output, content)
+    print_report(built)
+    print('%s %s' % (OUTPUT, 'updated' if changed else 'unchanged'))
+    return 0
+
+
+try:
+    Import('env')  # noqa: F821 - defined when run as a PlatformIO extra script
+except NameError:
+    if __name__ == '__main__':
+        sys.exit(main())
+else:
+    project = env.subst('$PROJECT_DIR')  # noqa: F821
+    if write_if_changed(os.path.join(project, OUTPUT), render_header(build_assets(project))):
+        print('[web_assets] Regenerated %s' % OUTPUT)